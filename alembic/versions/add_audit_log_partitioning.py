@@ -0,0 +1,114 @@
+"""partition audit_logs by month and add keyset indexes
+
+Revision ID: audit_log_partitioning
+Revises: 2012a7987e7f, add_documents_json, portal_001
+Create Date: 2026-10-19 09:00:00.000000
+
+Converts domain_shared.audit_logs into a table range-partitioned by month on
+``timestamp`` (PRIMARY KEY (id, timestamp)). Existing rows are copied into
+the new partitions. Also merges the three open heads.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.infrastructure.models.audit_partitions import (
+    AUDIT_LOG_DEFAULT_PARTITION,
+    AUDIT_LOG_PARTITION_FUNCTION,
+    AUDIT_LOG_PARTITION_MONTHS_AHEAD,
+)
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'audit_log_partitioning'
+down_revision: Union[str, Sequence[str], None] = ('2012a7987e7f', 'add_documents_json', 'portal_001')
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = {
+    "ix_audit_logs_ts_id": "(timestamp, id)",
+    "ix_audit_logs_tenant_ts_id": "(tenant_id, timestamp, id)",
+    "ix_audit_logs_tenant_entity_ts_id": "(tenant_id, entity_type, entity_id, timestamp, id)",
+    "ix_audit_logs_tenant_user_ts_id": "(tenant_id, user_id, timestamp, id)",
+    "ix_audit_logs_tenant_action_ts_id": "(tenant_id, action, timestamp, id)",
+}
+
+
+def upgrade() -> None:
+    op.execute("CREATE SCHEMA IF NOT EXISTS domain_shared")
+
+    # Keep existing data aside if audit_logs is a plain table
+    op.execute("""
+        DO $$
+        BEGIN
+            IF EXISTS (
+                SELECT 1 FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+                WHERE n.nspname = 'domain_shared' AND c.relname = 'audit_logs' AND c.relkind = 'r'
+            ) THEN
+                ALTER TABLE domain_shared.audit_logs RENAME TO audit_logs_unpartitioned;
+                ALTER TABLE domain_shared.audit_logs_unpartitioned
+                    RENAME CONSTRAINT audit_logs_pkey TO audit_logs_unpartitioned_pkey;
+            END IF;
+        END $$;
+    """)
+
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS domain_shared.audit_logs (
+            id VARCHAR NOT NULL,
+            timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            user_id VARCHAR NOT NULL REFERENCES domain_shared.users (id),
+            user_email VARCHAR(100) NOT NULL,
+            tenant_id VARCHAR NOT NULL REFERENCES domain_shared.tenants (id),
+            action VARCHAR(50) NOT NULL,
+            entity_type VARCHAR(50) NOT NULL,
+            entity_id VARCHAR NOT NULL,
+            changes JSONB NOT NULL,
+            ip_address VARCHAR(50),
+            user_agent VARCHAR(200),
+            correlation_id VARCHAR(50),
+            PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+    """)
+    op.execute(AUDIT_LOG_PARTITION_FUNCTION)
+    op.execute(AUDIT_LOG_DEFAULT_PARTITION)
+
+    for name, columns in INDEXES.items():
+        op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON domain_shared.audit_logs {columns}")
+
+    # Create partitions covering the legacy data, then move it over
+    op.execute(f"""
+        DO $$
+        DECLARE
+            oldest date;
+        BEGIN
+            IF to_regclass('domain_shared.audit_logs_unpartitioned') IS NOT NULL THEN
+                SELECT coalesce(min(timestamp), now())::date INTO oldest
+                FROM domain_shared.audit_logs_unpartitioned;
+                PERFORM domain_shared.ensure_audit_log_partitions(oldest, {AUDIT_LOG_PARTITION_MONTHS_AHEAD});
+                INSERT INTO domain_shared.audit_logs
+                    (id, timestamp, user_id, user_email, tenant_id, action, entity_type,
+                     entity_id, changes, ip_address, user_agent, correlation_id)
+                SELECT id, timestamp, user_id, user_email, tenant_id, action, entity_type,
+                       entity_id, changes, ip_address, user_agent, correlation_id
+                FROM domain_shared.audit_logs_unpartitioned;
+                DROP TABLE domain_shared.audit_logs_unpartitioned;
+            ELSE
+                PERFORM domain_shared.ensure_audit_log_partitions(now()::date, {AUDIT_LOG_PARTITION_MONTHS_AHEAD});
+            END IF;
+        END $$;
+    """)
+
+
+def downgrade() -> None:
+    op.execute("""
+        CREATE TABLE domain_shared.audit_logs_flat (
+            LIKE domain_shared.audit_logs INCLUDING DEFAULTS
+        )
+    """)
+    op.execute("INSERT INTO domain_shared.audit_logs_flat SELECT * FROM domain_shared.audit_logs")
+    op.execute("DROP TABLE domain_shared.audit_logs CASCADE")
+    op.execute("DROP FUNCTION IF EXISTS domain_shared.ensure_audit_log_partitions(date, int)")
+    op.execute("ALTER TABLE domain_shared.audit_logs_flat RENAME TO audit_logs")
+    op.execute("ALTER TABLE domain_shared.audit_logs ADD PRIMARY KEY (id)")
+    op.execute("CREATE INDEX ix_audit_logs_timestamp ON domain_shared.audit_logs (timestamp)")
@@ -0,0 +1,40 @@
+"""trigram search and keyset indexes for customers
+
+Revision ID: crm_customer_search
+Revises: inventory_movement_article_idx
+Create Date: 2026-10-19 15:00:00.000000
+
+Customer search matches LIKE '%term%' against one normalized expression
+(see app.infrastructure.repositories.search.search_text); a pg_trgm GIN
+index on exactly that expression serves the match and the word_similarity
+ranking. Lists without a term page by (company_name, id).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'crm_customer_search'
+down_revision: Union[str, Sequence[str], None] = 'inventory_movement_article_idx'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_TEXT = "lower((coalesce(company_name, '') || ' ') || coalesce(contact_person, ''))"
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_customers_search_trgm ON domain_crm.customers "
+        f"USING gin (({SEARCH_TEXT}) gin_trgm_ops) WHERE is_active"
+    )
+    op.create_index(
+        'ix_customers_tenant_name_id', 'customers', ['tenant_id', 'company_name', 'id'],
+        schema='domain_crm', postgresql_where='is_active',
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_customers_tenant_name_id', table_name='customers', schema='domain_crm')
+    op.execute("DROP INDEX IF EXISTS domain_crm.ix_customers_search_trgm")
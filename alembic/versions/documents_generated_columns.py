@@ -0,0 +1,74 @@
+"""generated filter columns and keyset indexes for JSON documents
+
+Revision ID: documents_generated_columns
+Revises: crm_customer_search
+Create Date: 2026-10-19 17:00:00.000000
+
+DocumentRepository filters on customerId, supplierId, status and date of the
+JSONB payload. Those fields become STORED generated columns, each with a
+composite index ending in the keyset sort key (created_at DESC, id DESC).
+
+The GIN indexes on (data->>'...') from add_documents_json cannot be built
+(text has no default GIN operator class) and are dropped if present.
+
+Migration path for large tables: ADD COLUMN ... GENERATED ALWAYS AS ... STORED
+rewrites the table under an ACCESS EXCLUSIVE lock (about a minute per 10M
+rows, plan a maintenance window). The indexes are built CONCURRENTLY
+afterwards, so reads and writes continue while they build.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'documents_generated_columns'
+down_revision: Union[str, Sequence[str], None] = 'crm_customer_search'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+GENERATED_COLUMNS = {
+    'customer_id': "data->>'customerId'",
+    'supplier_id': "data->>'supplierId'",
+    'status': "data->>'status'",
+    'doc_date': "left(data->>'date', 10)",  # YYYY-MM-DD, sorts as text
+}
+
+INDEXES = {
+    'ix_documents_type_created': "(doc_type, created_at DESC, id DESC)",
+    'ix_documents_type_status_created': "(doc_type, status, created_at DESC, id DESC)",
+    'ix_documents_type_customer_created': "(doc_type, customer_id, created_at DESC, id DESC) "
+                                          "WHERE customer_id IS NOT NULL",
+    'ix_documents_type_supplier_created': "(doc_type, supplier_id, created_at DESC, id DESC) "
+                                          "WHERE supplier_id IS NOT NULL",
+    'ix_documents_type_date': "(doc_type, doc_date)",
+}
+
+
+def upgrade() -> None:
+    for name in ('idx_documents_data_status', 'idx_documents_data_customer', 'idx_documents_data_supplier'):
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+
+    op.execute(
+        "ALTER TABLE documents "
+        + ", ".join(
+            f"ADD COLUMN IF NOT EXISTS {column} text GENERATED ALWAYS AS ({expression}) STORED"
+            for column, expression in GENERATED_COLUMNS.items()
+        )
+    )
+
+    with op.get_context().autocommit_block():
+        for name, definition in INDEXES.items():
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON documents {definition}")
+        # Superseded by ix_documents_type_created
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_documents_type")
+
+
+def downgrade() -> None:
+    op.execute("CREATE INDEX IF NOT EXISTS idx_documents_type ON documents (doc_type)")
+    for name in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+    op.execute(
+        "ALTER TABLE documents "
+        + ", ".join(f"DROP COLUMN IF EXISTS {column}" for column in GENERATED_COLUMNS)
+    )
@@ -0,0 +1,70 @@
+"""add per-article stock statistics and report indexes
+
+Revision ID: inventory_article_stats
+Revises: audit_log_partitioning
+Create Date: 2026-10-19 12:00:00.000000
+
+domain_inventory.article_stock_stats keeps last movement, outbound
+quantity and COGS over rolling 30/90 day windows per article. It is
+refreshed set-based from inventory_stock_movements and touched on every
+processed movement; replenishment, slow-moving and turnover reports read
+it instead of walking movement history per article.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'inventory_article_stats'
+down_revision: Union[str, Sequence[str], None] = 'audit_log_partitioning'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'article_stock_stats',
+        sa.Column('article_id', sa.String(), nullable=False),
+        sa.Column('tenant_id', sa.String(), nullable=False),
+        sa.Column('last_movement_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_outbound_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('outbound_qty_30d', sa.DECIMAL(14, 2), nullable=False, server_default='0'),
+        sa.Column('outbound_qty_90d', sa.DECIMAL(14, 2), nullable=False, server_default='0'),
+        sa.Column('cogs_30d', sa.DECIMAL(16, 2), nullable=False, server_default='0'),
+        sa.Column('cogs_90d', sa.DECIMAL(16, 2), nullable=False, server_default='0'),
+        sa.Column('movements_90d', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('refreshed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['article_id'], ['domain_inventory.articles.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('article_id'),
+        schema='domain_inventory',
+    )
+    op.create_index(
+        'ix_article_stock_stats_tenant_refreshed', 'article_stock_stats',
+        ['tenant_id', 'refreshed_at'], schema='domain_inventory',
+    )
+
+    # Report scans: active articles of a tenant, outbound movements of a period
+    op.create_index(
+        'ix_articles_tenant_active', 'articles', ['tenant_id', 'is_active'], schema='domain_inventory',
+    )
+    op.create_index(
+        'ix_stock_movements_tenant_type_created', 'inventory_stock_movements',
+        ['tenant_id', 'movement_type', 'created_at'], schema='domain_inventory',
+    )
+    op.create_index(
+        'ix_stock_movements_tenant_created_article', 'inventory_stock_movements',
+        ['tenant_id', 'created_at', 'article_id'], schema='domain_inventory',
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_stock_movements_tenant_created_article', table_name='inventory_stock_movements',
+                  schema='domain_inventory')
+    op.drop_index('ix_stock_movements_tenant_type_created', table_name='inventory_stock_movements',
+                  schema='domain_inventory')
+    op.drop_index('ix_articles_tenant_active', table_name='articles', schema='domain_inventory')
+    op.drop_index('ix_article_stock_stats_tenant_refreshed', table_name='article_stock_stats',
+                  schema='domain_inventory')
+    op.drop_table('article_stock_stats', schema='domain_inventory')
@@ -0,0 +1,31 @@
+"""index stock movements by article for consumption history
+
+Revision ID: inventory_movement_article_idx
+Revises: inventory_article_stats
+Create Date: 2026-10-19 13:00:00.000000
+
+The Bestellvorschlag agent aggregates outbound movements for chunks of
+articles (article_id IN (...) AND created_at >= since).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'inventory_movement_article_idx'
+down_revision: Union[str, Sequence[str], None] = 'inventory_article_stats'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_stock_movements_tenant_article_created', 'inventory_stock_movements',
+        ['tenant_id', 'article_id', 'created_at'], schema='domain_inventory',
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_stock_movements_tenant_article_created', table_name='inventory_stock_movements',
+                  schema='domain_inventory')
@@ -3,9 +3,11 @@ Bestellvorschlag Agent Workflow
 Analyzes stock levels and generates purchase order proposals using LangGraph and OpenAI
 """
 
+import asyncio
+import heapq
 import logging
 from typing import TypedDict, Annotated, Dict, Any
-from datetime import datetime
+from datetime import datetime, timedelta
 import httpx
 
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
@@ -43,6 +45,49 @@ class BestellvorschlagState(TypedDict):
     created_at: datetime | None
 
 
+# Data access: articles are streamed in keyset pages, consumption is fetched
+# with one aggregated query per chunk, chunks run with bounded concurrency
+ARTICLE_PAGE_SIZE = 1000
+HISTORY_CHUNK_SIZE = 1000
+HISTORY_CONCURRENCY = 4
+HISTORY_MONTHS = 12
+PROMPT_ARTICLE_LIMIT = 200
+
+
+def _chunks(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def summarize_sales(article_id: str, monthly: dict) -> dict | None:
+    """Average monthly outbound quantity and trend of the last three months."""
+    monthly_sales = monthly["months"]
+    if not monthly_sales:
+        return None
+
+    avg_monthly_sales = sum(monthly_sales.values()) / len(monthly_sales)
+
+    # Determine trend (simplified: compare last 3 months)
+    sorted_months = sorted(monthly_sales.keys())
+    if len(sorted_months) >= 3:
+        recent_sales = [monthly_sales[m] for m in sorted_months[-3:]]
+        if recent_sales[-1] > recent_sales[0] * 1.1:  # 10% increase
+            trend = "increasing"
+        elif recent_sales[-1] < recent_sales[0] * 0.9:  # 10% decrease
+            trend = "decreasing"
+        else:
+            trend = "stable"
+    else:
+        trend = "stable"
+
+    return {
+        "article_id": article_id,
+        "avg_monthly_sales": float(avg_monthly_sales),
+        "trend": trend,
+        "total_movements": monthly["movements"]
+    }
+
+
 # Workflow Nodes
 async def analyze_stock_levels(state: BestellvorschlagState) -> BestellvorschlagState:
     """
@@ -53,22 +98,32 @@ async def analyze_stock_levels(state: BestellvorschlagState) -> Bestellvorschlag
     try:
         article_repo = container.resolve(ArticleRepository)
 
-        # Get all articles for the tenant
-        articles = await article_repo.get_all(state['tenant_id'], limit=1000)
-
-        # Filter for low stock articles (current_stock < min_stock_level)
         low_stock_articles = []
-        for article in articles:
-            if article.min_stock_level and article.current_stock < article.min_stock_level:
-                shortage = article.min_stock_level - article.current_stock
-                low_stock_articles.append({
-                    "article_id": str(article.id),
-                    "name": article.name,
-                    "current": float(article.current_stock or 0),
-                    "min": float(article.min_stock_level or 0),
-                    "shortage": float(shortage),
-                    "unit": article.unit or "Stk"
-                })
+        try:
+            # Stream every low stock article (current_stock < min_stock) page by page
+            after_id = None
+            while True:
+                articles = await article_repo.get_low_stock_page(
+                    state['tenant_id'], after_id=after_id, limit=ARTICLE_PAGE_SIZE
+                )
+                for article in articles:
+                    shortage = article.min_stock - (article.current_stock or 0)
+                    low_stock_articles.append({
+                        "article_id": str(article.id),
+                        "name": article.name,
+                        "current": float(article.current_stock or 0),
+                        "min": float(article.min_stock or 0),
+                        "shortage": float(shortage),
+                        "unit": article.unit or "Stk",
+                        # Kept for the order step so it does not reload each article
+                        "purchase_price": float(article.purchase_price) if article.purchase_price is not None else None,
+                        "supplier_number": article.supplier_number,
+                    })
+                if len(articles) < ARTICLE_PAGE_SIZE:
+                    break
+                after_id = articles[-1].id
+        finally:
+            article_repo.session.close()
 
         state["low_stock_articles"] = low_stock_articles
         logger.info(f"Found {len(low_stock_articles)} low stock articles")
@@ -87,58 +142,35 @@ async def check_sales_history(state: BestellvorschlagState) -> BestellvorschlagS
     """
     logger.info("Checking sales history")
 
+    since = datetime.utcnow() - timedelta(days=HISTORY_MONTHS * 31)
+    semaphore = asyncio.Semaphore(HISTORY_CONCURRENCY)
+
+    async def load_chunk(article_ids: list[str]) -> dict:
+        async with semaphore:
+            # Own repository (and session) per chunk so chunks can overlap
+            stock_movement_repo = container.resolve(StockMovementRepository)
+            try:
+                return await stock_movement_repo.get_monthly_outbound(article_ids, state['tenant_id'], since)
+            finally:
+                stock_movement_repo.session.close()
+
     try:
-        stock_movement_repo = container.resolve(StockMovementRepository)
+        article_ids = [article["article_id"] for article in state["low_stock_articles"]]
+        results = await asyncio.gather(*(
+            load_chunk(chunk) for chunk in _chunks(article_ids, HISTORY_CHUNK_SIZE)
+        ))
 
-        # Get sales history for each low stock article
-        sales_history = []
+        monthly_by_article = {}
+        for result in results:
+            monthly_by_article.update(result)
 
-        for article in state["low_stock_articles"]:
-            article_id = article["article_id"]
-
-            # Get stock movements for this article (outbound movements = sales)
-            # This is a simplified approach - in production, you'd filter by movement_type = 'outbound'
-            movements = await stock_movement_repo.get_all(
-                state['tenant_id'],
-                limit=1000,
-                article_id=article_id  # Assuming the repo supports this filter
-            )
-
-            if movements:
-                # Calculate monthly sales averages
-                # Group by month and calculate totals
-                monthly_sales = {}
-                for movement in movements:
-                    if hasattr(movement, 'movement_type') and movement.movement_type == 'outbound':
-                        month_key = movement.created_at.strftime('%Y-%m') if movement.created_at else 'unknown'
-                        if month_key not in monthly_sales:
-                            monthly_sales[month_key] = 0
-                        monthly_sales[month_key] += abs(movement.quantity or 0)
-
-                # Calculate average monthly sales
-                if monthly_sales:
-                    avg_monthly_sales = sum(monthly_sales.values()) / len(monthly_sales)
-
-                    # Determine trend (simplified: compare last 3 months)
-                    sorted_months = sorted(monthly_sales.keys())
-                    if len(sorted_months) >= 3:
-                        recent_months = sorted_months[-3:]
-                        recent_sales = [monthly_sales[m] for m in recent_months]
-                        if recent_sales[-1] > recent_sales[0] * 1.1:  # 10% increase
-                            trend = "increasing"
-                        elif recent_sales[-1] < recent_sales[0] * 0.9:  # 10% decrease
-                            trend = "decreasing"
-                        else:
-                            trend = "stable"
-                    else:
-                        trend = "stable"
-
-                    sales_history.append({
-                        "article_id": article_id,
-                        "avg_monthly_sales": float(avg_monthly_sales),
-                        "trend": trend,
-                        "total_movements": len(movements)
-                    })
+        # Outbound movements = sales; keep the low stock order
+        sales_history = []
+        for article_id in article_ids:
+            monthly = monthly_by_article.get(article_id)
+            history = summarize_sales(article_id, monthly) if monthly else None
+            if history:
+                sales_history.append(history)
 
         state["sales_history"] = sales_history
         logger.info(f"Analyzed sales history for {len(sales_history)} articles")
@@ -157,15 +189,18 @@ async def generate_order_proposal(state: BestellvorschlagState) -> Bestellvorsch
     """
     logger.info("Generating AI-enhanced order proposal")
 
-    # Prepare data for AI analysis
+    # Prepare data for AI analysis (largest shortages only, the prompt must stay bounded)
+    prompt_articles = heapq.nlargest(PROMPT_ARTICLE_LIMIT, state["low_stock_articles"], key=lambda a: a["shortage"])
+    prompt_ids = {article["article_id"] for article in prompt_articles}
     stock_data = "\n".join([
         f"- {article['name']}: Current {article['current']}, Min {article['min']}, Shortage {article['shortage']}"
-        for article in state["low_stock_articles"]
+        for article in prompt_articles
     ])
 
     sales_data = "\n".join([
         f"- {history['article_id']}: {history['avg_monthly_sales']} units/month, Trend: {history['trend']}"
         for history in state["sales_history"]
+        if history["article_id"] in prompt_ids
     ])
 
     context = f"""
@@ -206,12 +241,10 @@ Consider seasonal patterns, supplier lead times, and optimal order quantities.
     # Enhanced algorithm with AI insights
     proposals = []
 
+    history_by_article = {h["article_id"]: h for h in state["sales_history"]}
+
     for article in state["low_stock_articles"]:
-        # Find sales history
-        history = next(
-            (h for h in state["sales_history"] if h["article_id"] == article["article_id"]),
-            None
-        )
+        history = history_by_article.get(article["article_id"])
 
         if history:
             # Base calculation: shortage + 1 month safety stock
@@ -232,7 +265,9 @@ Consider seasonal patterns, supplier lead times, and optimal order quantities.
                 "article_name": article["name"],
                 "order_quantity": round(order_qty, 2),
                 "reason": f"AI-optimized: Low stock ({article['current']}/{article['min']}) + trend-adjusted safety stock",
-                "estimated_cost": order_qty * 50,  # Mock price
+                "estimated_cost": order_qty * (article.get("purchase_price") or 50),  # Mock price if unknown
+                "unit": article.get("unit", "Stk"),
+                "purchase_price": article.get("purchase_price"),
                 "ai_factors": [f"Trend: {history['trend']}", f"Base qty: {base_qty}"]
             })
 
@@ -279,18 +314,14 @@ async def create_purchase_order(state: BestellvorschlagState) -> Bestellvorschla
         proposal = state["proposal"]
         items = []
 
+        # Article details were collected by the stock analysis, no lookups per item
         for item in proposal["items"]:
-            # Get article details for proper item creation
-            article_repo = container.resolve(ArticleRepository)
-            article = await article_repo.get_by_id(item["article_id"], state["tenant_id"])
-
-            if article:
-                items.append({
-                    "article_id": item["article_id"],
-                    "qty": item["order_quantity"],
-                    "price": article.purchase_price or 0,  # Use purchase price if available
-                    "uom": article.unit or "Stk"
-                })
+            items.append({
+                "article_id": item["article_id"],
+                "qty": item["order_quantity"],
+                "price": item.get("purchase_price") or 0,  # Use purchase price if available
+                "uom": item.get("unit") or "Stk"
+            })
 
         # Create purchase order payload
         po_data = {
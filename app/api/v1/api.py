@@ -67,35 +67,35 @@ async def api_status():
 
 # Include domain routers
 api_router.include_router(
-    health,
+    health.router,
     prefix="/health",
     tags=["health"]
 )
 
 api_router.include_router(
-    tenants,
+    tenants.router,
     tags=["tenants"]
 )
 
 api_router.include_router(
-    users,
+    users.router,
     tags=["users"]
 )
 
 api_router.include_router(
-    customers,
+    customers.router,
     prefix="/crm/customers",
     tags=["crm", "customers"]
 )
 
 api_router.include_router(
-    leads,
+    leads.router,
     prefix="/crm/leads",
     tags=["crm", "leads"]
 )
 
 api_router.include_router(
-    contacts,
+    contacts.router,
     prefix="/crm/contacts",
     tags=["crm", "contacts"]
 )
@@ -125,13 +125,13 @@ api_router.include_router(
 )
 
 api_router.include_router(
-    accounts,
+    accounts.router,
     prefix="/accounts",
     tags=["finance", "accounts"]
 )
 
 api_router.include_router(
-    journal_entries,
+    journal_entries.router,
     prefix="/journal-entries",
     tags=["finance", "journal-entries"]
 )
@@ -274,13 +274,13 @@ api_router.include_router(
 )
 
 api_router.include_router(
-    articles,
+    articles.router,
     prefix="/articles",
     tags=["inventory", "articles"]
 )
 
 api_router.include_router(
-    warehouses,
+    warehouses.router,
     prefix="/warehouses",
     tags=["inventory", "warehouses"]
 )
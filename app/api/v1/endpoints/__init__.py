@@ -1,42 +1,5 @@
 # VALEO-NeuroERP API v1 Endpoints Package
-
-from .health import router as health
-from .tenants import router as tenants
-from .users import router as users
-from .customers import router as customers
-from .leads import router as leads
-from .contacts import router as contacts
-from . import activities
-from . import farm_profiles
-from .accounts import router as accounts
-from .journal_entries import router as journal_entries
-from .articles import router as articles
-from .warehouses import router as warehouses
-from . import gap
-from . import prospecting
-from .chart_of_accounts import router as chart_of_accounts
-from . import policies
-from . import finance_invoices
-from . import audit
-from . import accounting_periods
-from . import payment_matching
-from . import ap_invoices
-from . import bank_accounts
-from . import debtors
-from . import open_items
-from . import bank_statement_import
-from . import bank_reconciliation
-from . import tax_keys
-from . import subsidiary_ledger_reconciliation
-from . import financial_reports
-from . import bulk_journal_import
-from . import exchange_rates
-from . import booking_templates
-from . import dunning
-from . import ap_approval_workflow
-from . import payment_runs
-from . import auto_matching
-from . import vat_return_export
-from . import closing_checklists
-from . import iban_lookup
-from . import credit_debit_memos
\ No newline at end of file
+#
+# Module werden nicht mehr beim Paket-Import geladen: die Health-Probes
+# (app.core.startup) sollen ohne alle Fachmodule starten. Router über
+# ``from app.api.v1.endpoints import <modul>`` und ``<modul>.router`` einbinden.
@@ -3,9 +3,10 @@ Audit Logging API
 Extended audit trail for compliance (GDPR, GoBD, etc.)
 """
 
-from fastapi import APIRouter, Depends, Query
-from typing import List, Optional
-from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from typing import List, Optional, Tuple
+from datetime import datetime, timezone
+import base64
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 import logging
@@ -49,57 +50,90 @@ class AuditLogCreate(BaseModel):
     user_agent: Optional[str] = None
 
 
-@router.post("/log", response_model=AuditLogEntry)
-async def create_audit_log(
-    entry: AuditLogCreate,
-    db: Session = Depends(get_db)
-):
-    """Create new audit log entry."""
-    from app.infrastructure.models import AuditLog
+class AuditLogAccepted(BaseModel):
+    """Receipt for a queued audit log entry (not yet persisted)."""
+    id: str
+    status: str = "queued"
+    correlation_id: Optional[str] = None
+
+
+def encode_cursor(timestamp: datetime, entry_id: str) -> str:
+    """Opaque keyset cursor for (timestamp, id)."""
+    raw = f"{timestamp.isoformat()}|{entry_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        ts, entry_id = raw.split("|", 1)
+        return datetime.fromisoformat(ts), entry_id
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.post("/log", response_model=AuditLogAccepted, status_code=202)
+async def create_audit_log(entry: AuditLogCreate):
+    """
+    Create new audit log entry.
+
+    The entry is buffered and written in batches by the audit log writer
+    (bounded latency, spooled to disk if the database is unavailable).
+    The response only acknowledges the queued entry; it shows up in
+    ``GET /logs`` once the writer has flushed it.
+    """
     from uuid import uuid4
     from app.core.logging import get_correlation_id
+    from app.workers.audit_log_writer import get_audit_writer
+    
+    row = {
+        "id": str(uuid4()),
+        "timestamp": datetime.now(timezone.utc),
+        "user_id": entry.user_id,
+        "user_email": entry.user_email,
+        "tenant_id": entry.tenant_id,
+        "action": entry.action,
+        "entity_type": entry.entity_type,
+        "entity_id": entry.entity_id,
+        "changes": entry.changes,
+        "ip_address": entry.ip_address,
+        "user_agent": entry.user_agent,
+        "correlation_id": get_correlation_id()
+    }
     
-    log_entry = AuditLog(
-        id=str(uuid4()),
-        timestamp=datetime.utcnow(),
-        user_id=entry.user_id,
-        user_email=entry.user_email,
-        tenant_id=entry.tenant_id,
-        action=entry.action,
-        entity_type=entry.entity_type,
-        entity_id=entry.entity_id,
-        changes=entry.changes,
-        ip_address=entry.ip_address,
-        user_agent=entry.user_agent,
-        correlation_id=get_correlation_id()
-    )
-    
-    db.add(log_entry)
-    db.commit()
-    db.refresh(log_entry)
+    await get_audit_writer().submit(row)
     
-    logger.info(
+    logger.debug(
         f"Audit: {entry.action} on {entry.entity_type}/{entry.entity_id} "
         f"by {entry.user_email}"
     )
     
-    return log_entry
+    return AuditLogAccepted(id=row["id"], correlation_id=row["correlation_id"])
 
 
 @router.get("/logs", response_model=List[AuditLogEntry])
 async def get_audit_logs(
+    response: Response,
     tenant_id: Optional[str] = Query(None),
     entity_type: Optional[str] = Query(None),
     entity_id: Optional[str] = Query(None),
     user_id: Optional[str] = Query(None),
     action: Optional[str] = Query(None),
+    from_date: Optional[datetime] = Query(None),
+    to_date: Optional[datetime] = Query(None),
     limit: int = Query(100, le=1000),
-    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    skip: int = Query(0, ge=0, description="Deprecated: use cursor"),
     db: Session = Depends(get_db)
 ):
-    """Query audit logs with filters."""
+    """
+    Query audit logs with filters.
+
+    Keyset pagination over (timestamp DESC, id DESC): pass the
+    ``X-Next-Cursor`` response header as ``cursor`` to get the next page.
+    """
     from app.infrastructure.models import AuditLog
-    from sqlalchemy import and_
+    from sqlalchemy import and_, tuple_
     
     query = db.query(AuditLog)
     
@@ -114,11 +148,24 @@ async def get_audit_logs(
         filters.append(AuditLog.user_id == user_id)
     if action:
         filters.append(AuditLog.action == action)
+    if from_date:
+        filters.append(AuditLog.timestamp >= from_date)
+    if to_date:
+        filters.append(AuditLog.timestamp < to_date)
+    if cursor:
+        cursor_ts, cursor_id = decode_cursor(cursor)
+        filters.append(tuple_(AuditLog.timestamp, AuditLog.id) < tuple_(cursor_ts, cursor_id))
     
     if filters:
         query = query.filter(and_(*filters))
     
-    logs = query.order_by(AuditLog.timestamp.desc()).offset(skip).limit(limit).all()
+    query = query.order_by(AuditLog.timestamp.desc(), AuditLog.id.desc())
+    if skip and not cursor:
+        query = query.offset(skip)
+    logs = query.limit(limit).all()
+    
+    if len(logs) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(logs[-1].timestamp, logs[-1].id)
     
     return logs
 
@@ -13,6 +13,14 @@ from pydantic import BaseModel
 import logging
 
 from ....core.database import get_db
+from ....finance.bank_reconciliation import (
+    BANK_ACCOUNT_NUMBER,
+    DEFAULT_COUNTER_ACCOUNT,
+    apply_booking_plan,
+    find_differences,
+    plan_bookings,
+    resolve_accounts,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -53,6 +61,8 @@ class ReconciliationResult(BaseModel):
     total_differences: int
     can_be_booked: bool
     booking_suggestions: Optional[List[dict]] = None
+    booked_entries: int = 0
+    booking_plan: Optional[dict] = None  # dry-run view of the entries auto-booking would create
 
 
 @router.get("/{statement_id}/balance-comparison", response_model=BalanceComparison)
@@ -155,43 +165,15 @@ async def get_reconciliation_differences(
 ):
     """
     Get list of differences between bank statement and accounting records.
+
+    Unmatched statement lines and bank-account bookings without a statement
+    line are both found by anti-joins in a single query.
     """
     try:
-        differences = []
-        
-        # Get unmatched statement lines
-        unmatched_statement_query = text("""
-            SELECT id, booking_date, amount, reference, remittance_info
-            FROM domain_erp.bank_statement_lines
-            WHERE statement_id = :statement_id 
-            AND tenant_id = :tenant_id
-            AND status = 'UNMATCHED'
-            ORDER BY booking_date
-        """)
-        
-        unmatched_statement_rows = db.execute(unmatched_statement_query, {
-            "statement_id": statement_id,
-            "tenant_id": tenant_id
-        }).fetchall()
-        
-        for row in unmatched_statement_rows:
-            differences.append(DifferenceItem(
-                item_type="UNMATCHED_STATEMENT",
-                statement_line_id=str(row[0]),
-                date=row[1],
-                amount=Decimal(str(row[2])),
-                bank_amount=Decimal(str(row[2])),
-                reference=row[3],
-                description=row[4] or row[3] or "Unmatched bank transaction",
-                suggested_account="1200",  # Default: Accounts Receivable
-                suggested_action="CREATE_ENTRY"
-            ))
-        
-        # Get accounting entries that might not be in bank statement
-        # This is more complex - we'd need to match by date/amount
-        # For now, we'll focus on unmatched statement lines
-        
-        return differences
+        return [
+            DifferenceItem(**item)
+            for item in find_differences(db, statement_id, bank_account_id, tenant_id)
+        ]
         
     except Exception as e:
         logger.error(f"Error getting differences: {e}")
@@ -204,10 +186,15 @@ async def reconcile_bank_statement(
     bank_account_id: str = Query(..., description="Bank account ID"),
     tenant_id: str = Query("system", description="Tenant ID"),
     auto_book: bool = Query(False, description="Automatically book differences"),
+    dry_run: bool = Query(False, description="Return the entries auto-booking would create without writing them"),
     db: Session = Depends(get_db)
 ):
     """
     Perform bank reconciliation and generate booking suggestions.
+
+    Auto-booking resolves all accounts in one query and writes every entry,
+    line and statement-line status in one transaction. With ``dry_run`` the
+    planned entries are returned as ``booking_plan`` and nothing is written.
     """
     try:
         # Get balance comparison
@@ -217,134 +204,45 @@ async def reconcile_bank_statement(
         differences = await get_reconciliation_differences(statement_id, bank_account_id, tenant_id, db)
         
         # Generate booking suggestions for unmatched items
-        booking_suggestions = []
-        
-        for diff in differences:
-            if diff.item_type == "UNMATCHED_STATEMENT" and diff.suggested_action == "CREATE_ENTRY":
-                # Suggest journal entry for unmatched bank transaction
-                suggestion = {
-                    "type": "journal_entry",
-                    "description": diff.description,
-                    "date": diff.date.isoformat(),
-                    "account_debit": "1000",  # Bank account
-                    "account_credit": diff.suggested_account or "1200",  # Default AR
-                    "amount": float(diff.amount),
-                    "reference": diff.reference,
-                    "statement_line_id": diff.statement_line_id
-                }
-                booking_suggestions.append(suggestion)
+        booking_suggestions = [
+            {
+                "type": "journal_entry",
+                "description": diff.description,
+                "date": diff.date.isoformat(),
+                "account_debit": BANK_ACCOUNT_NUMBER,
+                "account_credit": diff.suggested_account or DEFAULT_COUNTER_ACCOUNT,
+                "amount": float(diff.amount),
+                "reference": diff.reference,
+                "statement_line_id": diff.statement_line_id
+            }
+            for diff in differences
+            if diff.item_type == "UNMATCHED_STATEMENT" and diff.suggested_action == "CREATE_ENTRY"
+        ]
         
         can_be_booked = balance_comp.is_balanced or len(differences) == 0
+        booked_entries = 0
+        booking_plan = None
         
-        # Auto-book if requested and balanced
-        if auto_book and can_be_booked and booking_suggestions:
-            for suggestion in booking_suggestions:
-                try:
-                    # Create journal entry
-                    journal_entry_id = f"JE-RECON-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
-                    
-                    journal_insert = text("""
-                        INSERT INTO domain_erp.journal_entries
-                        (id, tenant_id, entry_number, entry_date, posting_date, description,
-                         source, currency, status, total_debit, total_credit, created_at, updated_at)
-                        VALUES (:id, :tenant_id, :entry_number, :entry_date, :posting_date, :description,
-                                :source, :currency, :status, :total_debit, :total_credit, NOW(), NOW())
-                        RETURNING id
-                    """)
-                    
-                    entry_date = datetime.strptime(suggestion["date"], '%Y-%m-%d').date()
-                    entry_number = f"BANK-RECON-{entry_date.strftime('%Y%m%d')}"
-                    
-                    db.execute(journal_insert, {
-                        "id": journal_entry_id,
-                        "tenant_id": tenant_id,
-                        "entry_number": entry_number,
-                        "entry_date": entry_date,
-                        "posting_date": entry_date,
-                        "description": suggestion["description"],
-                        "source": "bank_reconciliation",
-                        "currency": "EUR",
-                        "status": "posted",
-                        "total_debit": Decimal(str(suggestion["amount"])),
-                        "total_credit": Decimal(str(suggestion["amount"]))
-                    })
-                    
-                    # Create journal entry lines
-                    # Debit: Bank account
-                    bank_account_query = text("""
-                        SELECT id FROM domain_erp.chart_of_accounts
-                        WHERE account_number = :account_number AND tenant_id = :tenant_id
-                        LIMIT 1
-                    """)
-                    bank_account_row = db.execute(bank_account_query, {
-                        "account_number": suggestion["account_debit"],
-                        "tenant_id": tenant_id
-                    }).fetchone()
-                    
-                    if bank_account_row:
-                        journal_line1 = text("""
-                            INSERT INTO domain_erp.journal_entry_lines
-                            (id, tenant_id, journal_entry_id, account_id, debit_amount, credit_amount,
-                             line_number, description, created_at, updated_at)
-                            VALUES (:id, :tenant_id, :journal_entry_id, :account_id, :debit_amount, :credit_amount,
-                                    :line_number, :description, NOW(), NOW())
-                        """)
-                        
-                        db.execute(journal_line1, {
-                            "id": f"{journal_entry_id}-L1",
-                            "tenant_id": tenant_id,
-                            "journal_entry_id": journal_entry_id,
-                            "account_id": str(bank_account_row[0]),
-                            "debit_amount": Decimal(str(suggestion["amount"])),
-                            "credit_amount": Decimal("0.00"),
-                            "line_number": 1,
-                            "description": suggestion["description"]
-                        })
-                    
-                    # Credit: Suggested account
-                    credit_account_row = db.execute(bank_account_query, {
-                        "account_number": suggestion["account_credit"],
-                        "tenant_id": tenant_id
-                    }).fetchone()
-                    
-                    if credit_account_row:
-                        journal_line2 = text("""
-                            INSERT INTO domain_erp.journal_entry_lines
-                            (id, tenant_id, journal_entry_id, account_id, debit_amount, credit_amount,
-                             line_number, description, created_at, updated_at)
-                            VALUES (:id, :tenant_id, :journal_entry_id, :account_id, :debit_amount, :credit_amount,
-                                    :line_number, :description, NOW(), NOW())
-                        """)
-                        
-                        db.execute(journal_line2, {
-                            "id": f"{journal_entry_id}-L2",
-                            "tenant_id": tenant_id,
-                            "journal_entry_id": journal_entry_id,
-                            "account_id": str(credit_account_row[0]),
-                            "debit_amount": Decimal("0.00"),
-                            "credit_amount": Decimal(str(suggestion["amount"])),
-                            "line_number": 2,
-                            "description": suggestion["description"]
-                        })
-                    
-                    # Mark statement line as matched
-                    if suggestion.get("statement_line_id"):
-                        update_line = text("""
-                            UPDATE domain_erp.bank_statement_lines
-                            SET status = 'MATCHED', updated_at = NOW()
-                            WHERE id = :line_id AND tenant_id = :tenant_id
-                        """)
-                        
-                        db.execute(update_line, {
-                            "line_id": suggestion["statement_line_id"],
-                            "tenant_id": tenant_id
-                        })
-                    
-                except Exception as e:
-                    logger.error(f"Error creating journal entry for suggestion: {e}")
-                    continue
+        if (auto_book or dry_run) and booking_suggestions:
+            accounts = resolve_accounts(
+                db, tenant_id,
+                [s["account_debit"] for s in booking_suggestions] +
+                [s["account_credit"] for s in booking_suggestions]
+            )
+            plan = plan_bookings(booking_suggestions, accounts, tenant_id, datetime.now())
+            if plan.skipped:
+                logger.warning(f"Skipping {len(plan.skipped)} booking suggestions without accounts")
             
-            db.commit()
+            if dry_run:
+                booking_plan = plan.to_dict()
+                booking_plan["projected_difference"] = float(
+                    balance_comp.difference - plan.bank_balance_change
+                )
+            elif can_be_booked:
+                # Auto-book if requested and balanced
+                apply_booking_plan(db, plan, tenant_id)
+                db.commit()
+                booked_entries = len(plan.entries)
         
         return ReconciliationResult(
             statement_id=statement_id,
@@ -353,7 +251,9 @@ async def reconcile_bank_statement(
             differences=differences,
             total_differences=len(differences),
             can_be_booked=can_be_booked,
-            booking_suggestions=booking_suggestions if not auto_book else None
+            booking_suggestions=booking_suggestions if not auto_book or dry_run else None,
+            booked_entries=booked_entries,
+            booking_plan=booking_plan
         )
         
     except HTTPException:
@@ -5,9 +5,10 @@ Chart of Accounts management endpoints
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ....core.database import get_db
+from ....core.database import get_async_db
 from ....infrastructure.models import Account as AccountModel
 from ..schemas.base import PaginatedResponse
 from ..schemas.finance import Account, AccountCreate, AccountUpdate
@@ -23,22 +24,22 @@ async def list_accounts(
     search: Optional[str] = Query(None, description="Search in account number or name"),
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(50, ge=1, le=200, description="Maximum number of records"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Return a paginated list of chart-of-account entries."""
     effective_tenant = tenant_id or DEFAULT_TENANT
 
-    query = db.query(AccountModel).filter(AccountModel.is_active == True)  # noqa: E712
-    query = query.filter(AccountModel.tenant_id == effective_tenant)
+    query = select(AccountModel).where(AccountModel.is_active == True)  # noqa: E712
+    query = query.where(AccountModel.tenant_id == effective_tenant)
 
     if search:
         like = f"%{search}%"
-        query = query.filter(
+        query = query.where(
             (AccountModel.account_number.ilike(like)) | (AccountModel.account_name.ilike(like))
         )
 
-    total = query.count()
-    items = query.offset(skip).limit(limit).all()
+    total = await db.scalar(select(func.count()).select_from(query.subquery()))
+    items = (await db.scalars(query.offset(skip).limit(limit))).all()
 
     page = (skip // limit) + 1
     pages = (total + limit - 1) // limit if total else 1
@@ -55,29 +56,29 @@ async def list_accounts(
 
 
 @router.get("/{account_id}", response_model=Account)
-async def get_account(account_id: str, db: Session = Depends(get_db)):
+async def get_account(account_id: str, db: AsyncSession = Depends(get_async_db)):
     """Fetch a single account by identifier."""
-    account = db.query(AccountModel).filter(AccountModel.id == account_id).first()
+    account = await db.get(AccountModel, account_id)
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
     return Account.model_validate(account)
 
 
 @router.post("/", response_model=Account)
-async def create_account(account: AccountCreate, db: Session = Depends(get_db)):
+async def create_account(account: AccountCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new account."""
     # Check if account number already exists
-    existing = db.query(AccountModel).filter(
+    existing = await db.scalar(select(AccountModel).where(
         AccountModel.account_number == account.account_number,
         AccountModel.tenant_id == account.tenant_id
-    ).first()
+    ).limit(1))
     if existing:
         raise HTTPException(status_code=400, detail="Account number already exists")
 
     db_account = AccountModel(**account.model_dump())
     db.add(db_account)
-    db.commit()
-    db.refresh(db_account)
+    await db.commit()
+    await db.refresh(db_account)
     return Account.model_validate(db_account)
 
 
@@ -85,10 +86,10 @@ async def create_account(account: AccountCreate, db: Session = Depends(get_db)):
 async def update_account(
     account_id: str,
     account_update: AccountUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update an existing account."""
-    account = db.query(AccountModel).filter(AccountModel.id == account_id).first()
+    account = await db.get(AccountModel, account_id)
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
 
@@ -98,15 +99,15 @@ async def update_account(
         for field, value in update_data.items():
             setattr(account, field, value)
 
-    db.commit()
-    db.refresh(account)
+    await db.commit()
+    await db.refresh(account)
     return Account.model_validate(account)
 
 
 @router.delete("/{account_id}")
-async def delete_account(account_id: str, db: Session = Depends(get_db)):
+async def delete_account(account_id: str, db: AsyncSession = Depends(get_async_db)):
     """Delete an account (soft delete by setting is_active to False)."""
-    account = db.query(AccountModel).filter(AccountModel.id == account_id).first()
+    account = await db.get(AccountModel, account_id)
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
 
@@ -118,6 +119,6 @@ async def delete_account(account_id: str, db: Session = Depends(get_db)):
         )
 
     account.is_active = False
-    db.commit()
+    await db.commit()
     return {"message": "Account deactivated successfully"}
 
@@ -5,14 +5,14 @@ FIBU-REP-01: Standardreports (Bilanz/GuV/BWA) Backend-Integration
 
 from typing import List, Optional, Dict, Any
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from decimal import Decimal
 from datetime import date, datetime
 from pydantic import BaseModel
 import logging
 
-from ....core.database import get_db
+from ....core.database import get_report_db
 
 logger = logging.getLogger(__name__)
 
@@ -86,7 +86,7 @@ async def get_balance_sheet(
     period: str = Query(..., description="Accounting period (YYYY-MM)"),
     as_of_date: Optional[date] = Query(None, description="As of date (defaults to end of period)"),
     tenant_id: str = Query("system", description="Tenant ID"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_report_db)
 ):
     """
     Get balance sheet for a period.
@@ -119,10 +119,10 @@ async def get_balance_sheet(
             ORDER BY coa.account_number
         """)
         
-        rows = db.execute(accounts_query, {
+        rows = (await db.execute(accounts_query, {
             "tenant_id": tenant_id,
             "period": period
-        }).fetchall()
+        })).fetchall()
         
         assets = []
         liabilities = []
@@ -190,7 +190,7 @@ async def get_balance_sheet(
 async def get_profit_loss(
     period: str = Query(..., description="Accounting period (YYYY-MM)"),
     tenant_id: str = Query("system", description="Tenant ID"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_report_db)
 ):
     """
     Get profit & loss statement for a period.
@@ -218,10 +218,10 @@ async def get_profit_loss(
             ORDER BY coa.account_number
         """)
         
-        revenue_rows = db.execute(revenue_query, {
+        revenue_rows = (await db.execute(revenue_query, {
             "tenant_id": tenant_id,
             "period": period
-        }).fetchall()
+        })).fetchall()
         
         revenue = []
         for row in revenue_rows:
@@ -261,10 +261,10 @@ async def get_profit_loss(
             ORDER BY coa.account_number
         """)
         
-        expense_rows = db.execute(expense_query, {
+        expense_rows = (await db.execute(expense_query, {
             "tenant_id": tenant_id,
             "period": period
-        }).fetchall()
+        })).fetchall()
         
         expenses = []
         for row in expense_rows:
@@ -303,7 +303,7 @@ async def get_profit_loss(
 async def get_bwa(
     period: str = Query(..., description="Accounting period (YYYY-MM)"),
     tenant_id: str = Query("system", description="Tenant ID"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_report_db)
 ):
     """
     Get BWA (Betriebswirtschaftliche Auswertung) for a period.
@@ -420,7 +420,7 @@ async def export_report(
     period: str = Query(..., description="Accounting period (YYYY-MM)"),
     format: str = Query("pdf", description="Export format (pdf, excel)"),
     tenant_id: str = Query("system", description="Tenant ID"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_report_db)
 ):
     """
     Export financial report in PDF or Excel format.
@@ -3,14 +3,16 @@ GDPR API Endpoints
 Implements Right-to-Access, Right-to-Delete, Data-Portability
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import Dict, Any
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from typing import Dict, Any, Optional
 from datetime import datetime
 import logging
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
-from app.core.rbac import require_role, Role, get_tenant_id
+from app.core.database import get_db, SessionLocal
+from app.core.rbac import require_role, has_role, Role, get_tenant_id
+from app.services import gdpr_export_service as gdpr_export
 from fastapi import Request
 
 logger = logging.getLogger(__name__)
@@ -18,82 +20,129 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+EXPORT_FORMATS = ("json", "ndjson", "zip")
+
+PORTABILITY_METADATA = {
+    "schema_version": "1.0",
+    "standards": ["GDPR Article 20"],
+    "compatible_with": ["other_erp_systems"]
+}
+
+
+def _authorize_subject(request: Request, user_id: str) -> None:
+    """Exports and their jobs are only available to the data subject or an admin."""
+    if has_role(request, Role.ADMIN):
+        return
+    claims = getattr(request.state, "token_claims", None) or {}
+    subject = claims.get("sub")
+    if subject is None or str(subject) != str(user_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not allowed to access personal data of this user"
+        )
+
+
+def _authorize_job(request: Request, job: Optional["gdpr_export.ExportJob"]) -> "gdpr_export.ExportJob":
+    """Same checks as job creation: tenant plus subject/admin."""
+    if job is None or job.tenant_id != get_tenant_id(request):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Export job not found")
+    _authorize_subject(request, job.user_id)
+    return job
+
+
+def _run_export(
+    user_id: str,
+    request: Request,
+    db: Session,
+    background_tasks: BackgroundTasks,
+    fmt: str,
+    extra_metadata: Optional[Dict[str, Any]] = None
+):
+    """
+    Shared implementation for Art. 15 and Art. 20 exports.
+
+    - ``json``: single document, only for subjects below INLINE_EXPORT_MAX_ROWS
+      (larger subjects are switched to a background ZIP job)
+    - ``ndjson``: streamed from server-side cursors
+    - ``zip``: background job, one NDJSON file per entity, download via token
+    """
+    _authorize_subject(request, user_id)
+    tenant_id = get_tenant_id(request)
+
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported format '{fmt}', expected one of {EXPORT_FORMATS}"
+        )
+
+    if gdpr_export.load_subject(db, user_id, tenant_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+    if fmt == "ndjson":
+        def stream():
+            # Own session: the request-scoped one is closed before streaming ends
+            stream_db = SessionLocal()
+            try:
+                yield from gdpr_export.iter_ndjson(stream_db, user_id, tenant_id, extra_metadata)
+            finally:
+                stream_db.close()
+
+        return StreamingResponse(
+            stream(),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": f'attachment; filename="gdpr-export-{user_id}.ndjson"'}
+        )
+
+    if fmt == "json":
+        total_rows = sum(gdpr_export.count_subject_rows(db, user_id, tenant_id).values())
+        if total_rows <= gdpr_export.INLINE_EXPORT_MAX_ROWS:
+            data = gdpr_export.build_inline_export(db, user_id, tenant_id)
+            data["export_metadata"].update(extra_metadata or {})
+            logger.info(
+                f"GDPR data-export completed for {user_id}: "
+                f"{len(data['audit_logs'])} audit logs"
+            )
+            return data
+        logger.info(
+            f"GDPR data-export for {user_id} has {total_rows} rows, "
+            f"switching to background ZIP export"
+        )
+
+    job = gdpr_export.export_jobs.submit(user_id, tenant_id, extra_metadata)
+    background_tasks.add_task(gdpr_export.export_jobs.run, job.id)
+    if gdpr_export.export_jobs.cleanup_due():
+        background_tasks.add_task(gdpr_export.export_jobs.cleanup_expired)
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={
+            **job.to_dict(),
+            "status_url": str(request.url_for("get_export_job", job_id=job.id)),
+            "download_url": str(request.url_for("download_export", job_id=job.id)) + f"?token={job.token}",
+        }
+    )
+
+
 @router.get("/data-export/{user_id}")
 async def export_user_data(
     user_id: str,
     request: Request,
+    background_tasks: BackgroundTasks,
+    format: str = Query("json", description="json, ndjson or zip"),
     db: Session = Depends(get_db)
-) -> Dict[str, Any]:
+):
     """
     GDPR Article 15: Right to Access
     Export all data for a user.
     """
-    tenant_id = get_tenant_id(request)
-    
-    logger.info(f"GDPR data-export requested for user: {user_id}")
-    
+    logger.info(f"GDPR data-export requested for user: {user_id} (format={format})")
+
     try:
-        from app.infrastructure.models import (
-            User, Customer, AuditLog, JournalEntry
-        )
-        
-        # Get user
-        user = db.query(User).filter(
-            User.id == user_id,
-            User.tenant_id == tenant_id
-        ).first()
-        
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
-        # Collect all user data
-        data = {
-            "personal_data": {
-                "id": user.id,
-                "username": user.username,
-                "email": user.email,
-                "first_name": user.first_name,
-                "last_name": user.last_name,
-                "roles": user.roles,
-                "created_at": user.created_at.isoformat(),
-            },
-            "audit_logs": [],
-            "created_entities": {
-                "customers": [],
-                "journal_entries": []
-            },
-            "export_metadata": {
-                "exported_at": datetime.utcnow().isoformat(),
-                "tenant_id": tenant_id,
-                "format": "JSON"
-            }
-        }
-        
-        # Get audit logs
-        audit_logs = db.query(AuditLog).filter(
-            AuditLog.user_id == user_id
-        ).limit(1000).all()
-        
-        data["audit_logs"] = [
-            {
-                "timestamp": log.timestamp.isoformat(),
-                "action": log.action,
-                "entity_type": log.entity_type,
-                "entity_id": log.entity_id
-            }
-            for log in audit_logs
-        ]
-        
-        logger.info(
-            f"GDPR data-export completed for {user_id}: "
-            f"{len(audit_logs)} audit logs"
-        )
-        
-        return data
-        
+        return _run_export(user_id, request, db, background_tasks, format)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"GDPR data-export failed: {e}", exc_info=True)
         raise HTTPException(
@@ -102,6 +151,31 @@ async def export_user_data(
         )
 
 
+@router.get("/data-export/jobs/{job_id}", name="get_export_job")
+async def get_export_job(job_id: str, request: Request) -> Dict[str, Any]:
+    """Status of a background export job."""
+    return _authorize_job(request, gdpr_export.export_jobs.get(job_id)).to_dict()
+
+
+@router.get("/data-export/jobs/{job_id}/download", name="download_export")
+async def download_export(job_id: str, request: Request, token: str = Query(...)) -> FileResponse:
+    """
+    Download a finished export.
+
+    Requires the token handed out when the job was created and the same
+    authorization as the job itself (data subject or admin).
+    """
+    _authorize_job(request, gdpr_export.export_jobs.get(job_id))
+    job = gdpr_export.export_jobs.resolve_download(job_id, token)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Export not available")
+    return FileResponse(
+        job.file_path,
+        media_type="application/zip",
+        filename=f"gdpr-export-{job.user_id}.zip"
+    )
+
+
 @router.delete("/delete-user/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_user_data(
     user_id: str,
@@ -167,26 +241,31 @@ async def delete_user_data(
 async def export_portable_data(
     user_id: str,
     request: Request,
+    background_tasks: BackgroundTasks,
+    format: str = Query("json", description="json, ndjson or zip"),
     db: Session = Depends(get_db)
-) -> Dict[str, Any]:
+):
     """
     GDPR Article 20: Right to Data Portability
     Export data in structured, machine-readable format.
     """
-    tenant_id = get_tenant_id(request)
-    
-    logger.info(f"GDPR portable-export requested for user: {user_id}")
-    
-    # Same as data-export but in standardized format
-    data = await export_user_data(user_id, request, db)
-    
-    # Add portability-specific metadata
-    data["portability_metadata"] = {
-        "format": "JSON",
-        "schema_version": "1.0",
-        "standards": ["GDPR Article 20"],
-        "compatible_with": ["other_erp_systems"]
-    }
-    
-    return data
+    logger.info(f"GDPR portable-export requested for user: {user_id} (format={format})")
+
+    # Same as data-export, tagged with portability metadata
+    try:
+        result = _run_export(
+            user_id, request, db, background_tasks, format,
+            extra_metadata={"portability": PORTABILITY_METADATA}
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"GDPR portable-export failed: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
 
+    if isinstance(result, dict):
+        result["portability_metadata"] = {"format": "JSON", **PORTABILITY_METADATA}
+    return result
@@ -8,16 +8,22 @@ from typing import Optional
 from fastapi import APIRouter, HTTPException, Query
 import httpx
 from pydantic import BaseModel
-from datetime import datetime, timedelta
 import hashlib
-import json
+
+from app.core.cache import get_cache
 
 router = APIRouter(prefix="/iban-lookup", tags=["finance", "iban"])
 
-# In-memory cache for IBAN lookups (in production, use Redis or similar)
-_iban_cache: dict[str, tuple[dict, datetime]] = {}
 CACHE_TTL_HOURS = 24  # Cache for 24 hours
 
+# Bounded LRU/TTL cache, shared across replicas when CACHE_BACKEND_URL is set
+_iban_cache = get_cache(
+    "iban_lookup",
+    shared=True,
+    max_entries=1000,
+    default_ttl=CACHE_TTL_HOURS * 3600,
+)
+
 
 def _get_cache_key(iban: str) -> str:
     """Generate cache key from normalized IBAN"""
@@ -27,27 +33,12 @@ def _get_cache_key(iban: str) -> str:
 
 def _get_cached(iban: str) -> Optional[dict]:
     """Get cached IBAN lookup result if available and not expired"""
-    cache_key = _get_cache_key(iban)
-    if cache_key in _iban_cache:
-        cached_data, cached_time = _iban_cache[cache_key]
-        if datetime.now() - cached_time < timedelta(hours=CACHE_TTL_HOURS):
-            return cached_data
-        else:
-            # Remove expired entry
-            del _iban_cache[cache_key]
-    return None
+    return _iban_cache.get(_get_cache_key(iban))
 
 
 def _set_cache(iban: str, data: dict):
-    """Cache IBAN lookup result"""
-    cache_key = _get_cache_key(iban)
-    _iban_cache[cache_key] = (data, datetime.now())
-    # Limit cache size (keep last 1000 entries)
-    if len(_iban_cache) > 1000:
-        # Remove oldest entries
-        sorted_entries = sorted(_iban_cache.items(), key=lambda x: x[1][1])
-        for key, _ in sorted_entries[:100]:
-            del _iban_cache[key]
+    """Cache IBAN lookup result (least recently used entries are evicted)"""
+    _iban_cache.set(_get_cache_key(iban), data)
 
 
 class IBANLookupResponse(BaseModel):
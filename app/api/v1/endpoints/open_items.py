@@ -6,14 +6,14 @@ FIBU-AR-05: OP-Verwaltung Ausgleich/Verrechnung
 
 from typing import Optional, List
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from decimal import Decimal
 from datetime import datetime
 import json
 import logging
 
-from ....core.database import get_db
+from ....core.database import get_async_db
 from ..schemas.base import PaginatedResponse
 from pydantic import BaseModel
 
@@ -49,7 +49,7 @@ async def settle_open_item(
     op_id: str,
     settlement: OpenItemSettlement,
     tenant_id: str = Query("system", description="Tenant ID"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Settle an open item with a payment.
@@ -64,7 +64,7 @@ async def settle_open_item(
             WHERE id = :op_id AND tenant_id = :tenant_id
         """)
         
-        op_row = db.execute(op_query, {"op_id": op_id, "tenant_id": tenant_id}).fetchone()
+        op_row = (await db.execute(op_query, {"op_id": op_id, "tenant_id": tenant_id})).fetchone()
         
         if not op_row:
             raise HTTPException(status_code=404, detail="Open item not found")
@@ -104,7 +104,7 @@ async def settle_open_item(
             RETURNING id
         """)
         
-        db.execute(update_query, {
+        await db.execute(update_query, {
             "op_id": op_id,
             "new_open_amount": new_open_amount,
             "new_status": new_status,
@@ -135,7 +135,7 @@ async def settle_open_item(
                 "payment_type": settlement.payment_type
             }
             
-            db.execute(audit_insert, {
+            await db.execute(audit_insert, {
                 "id": audit_trail_id,
                 "user_id": None,  # TODO: Get from context
                 "action": "settle_open_item",
@@ -165,7 +165,7 @@ async def settle_open_item(
         entry_number = f"OP-SETTLE-{datetime.now().strftime('%Y%m%d')}-{op_id[:8]}"
         description = f"OP-Ausgleich {op_row[2]} - {settlement.payment_reference or 'Zahlung'}"
         
-        db.execute(journal_insert, {
+        await db.execute(journal_insert, {
             "id": journal_entry_id,
             "tenant_id": tenant_id,
             "entry_number": entry_number,
@@ -190,7 +190,7 @@ async def settle_open_item(
                     :line_number, :description, NOW(), NOW())
         """)
         
-        db.execute(journal_line1, {
+        await db.execute(journal_line1, {
             "id": f"{journal_entry_id}-L1",
             "tenant_id": tenant_id,
             "journal_entry_id": journal_entry_id,
@@ -211,7 +211,7 @@ async def settle_open_item(
                     :line_number, :description, NOW(), NOW())
         """)
         
-        db.execute(journal_line2, {
+        await db.execute(journal_line2, {
             "id": f"{journal_entry_id}-L2",
             "tenant_id": tenant_id,
             "journal_entry_id": journal_entry_id,
@@ -222,7 +222,7 @@ async def settle_open_item(
             "description": f"OP-Ausgleich {op_row[3]}"
         })
         
-        db.commit()
+        await db.commit()
         
         return SettlementResult(
             op_id=op_id,
@@ -238,7 +238,7 @@ async def settle_open_item(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to settle open item: {str(e)}")
 
 
@@ -246,7 +246,7 @@ async def settle_open_item(
 async def get_settlements(
     op_id: str,
     tenant_id: str = Query("system", description="Tenant ID"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all settlements for an open item (audit trail).
@@ -263,7 +263,7 @@ async def get_settlements(
         """)
         
         op_pattern = f"%{op_id}%"
-        rows = db.execute(query, {"op_id": op_id, "tenant_id": tenant_id, "op_pattern": op_pattern}).fetchall()
+        rows = (await db.execute(query, {"op_id": op_id, "tenant_id": tenant_id, "op_pattern": op_pattern})).fetchall()
         
         return [
             {
@@ -288,7 +288,7 @@ async def reverse_settlement(
     settlement_id: str,
     reason: str = Query(..., min_length=10, description="Reason for reversal (min 10 chars)"),
     tenant_id: str = Query("system", description="Tenant ID"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Reverse a settlement (Storno).
@@ -303,10 +303,10 @@ async def reverse_settlement(
             AND source = 'op_settlement'
         """)
         
-        settlement_row = db.execute(settlement_query, {
+        settlement_row = (await db.execute(settlement_query, {
             "settlement_id": settlement_id,
             "tenant_id": tenant_id
-        }).fetchone()
+        })).fetchone()
         
         if not settlement_row:
             raise HTTPException(status_code=404, detail="Settlement not found")
@@ -320,7 +320,7 @@ async def reverse_settlement(
             WHERE id = :op_id AND tenant_id = :tenant_id
         """)
         
-        op_row = db.execute(op_query, {"op_id": op_id, "tenant_id": tenant_id}).fetchone()
+        op_row = (await db.execute(op_query, {"op_id": op_id, "tenant_id": tenant_id})).fetchone()
         
         if not op_row:
             raise HTTPException(status_code=404, detail="Open item not found")
@@ -336,7 +336,7 @@ async def reverse_settlement(
             WHERE id = :op_id
         """)
         
-        db.execute(update_query, {
+        await db.execute(update_query, {
             "op_id": op_id,
             "new_open_amount": new_open_amount
         })
@@ -350,7 +350,7 @@ async def reverse_settlement(
             WHERE id = :settlement_id
         """)
         
-        db.execute(reverse_query, {
+        await db.execute(reverse_query, {
             "settlement_id": settlement_id,
             "reason": reason
         })
@@ -373,7 +373,7 @@ async def reverse_settlement(
                 "reason": reason
             }
             
-            db.execute(audit_insert, {
+            await db.execute(audit_insert, {
                 "id": audit_trail_id,
                 "user_id": None,  # TODO: Get from context
                 "action": "reverse_settlement",
@@ -385,7 +385,7 @@ async def reverse_settlement(
             # If audit_log table doesn't exist, continue without audit trail
             audit_trail_id = None
         
-        db.commit()
+        await db.commit()
         
         return {
             "success": True,
@@ -398,6 +398,6 @@ async def reverse_settlement(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to reverse settlement: {str(e)}")
 
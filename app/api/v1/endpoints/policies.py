@@ -174,8 +174,7 @@ async def test_policy(request: TestRequest) -> TestResponse:
         TestResponse mit Decision
     """
     try:
-        rules = policy_store.list()
-        decision = PolicyEngine.decide(request.roles, request.alert, rules)
+        decision = PolicyEngine.decide(request.roles, request.alert, policy_store.index())
         logger.info(f"Policy test: {request.alert.kpiId} -> {decision.type}")
         return TestResponse(ok=True, decision=decision)
     except Exception as e:
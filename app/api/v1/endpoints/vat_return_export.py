@@ -10,12 +10,14 @@ from sqlalchemy import text
 from decimal import Decimal
 from datetime import date, datetime
 from pydantic import BaseModel, Field
+import json
 import logging
 import uuid
 import xml.etree.ElementTree as ET
 from xml.dom import minidom
 
 from ....core.database import get_db
+from ....finance.vat_buckets import compute_positions, expand_period, get_buckets, gl_totals, load_tax_keys
 
 logger = logging.getLogger(__name__)
 
@@ -33,8 +35,8 @@ class VATReturnPosition(BaseModel):
 
 class VATReturnCreate(BaseModel):
     """Schema for creating a VAT return"""
-    period: str = Field(..., description="Period in YYYY-MM format")
-    return_type: str = Field(default="monthly", description="monthly or quarterly")
+    period: str = Field(..., description="Period in YYYY-MM, YYYY-Qn or YYYY format")
+    return_type: str = Field(default="monthly", description="monthly, quarterly or yearly")
     taxpayer_name: str = Field(..., description="Taxpayer name")
     tax_id: Optional[str] = Field(None, description="Tax ID (Steuernummer)")
     vat_id: Optional[str] = Field(None, description="VAT ID (USt-IdNr)")
@@ -66,8 +68,13 @@ class VATReturnResponse(BaseModel):
 
 class VATReturnCalculationRequest(BaseModel):
     """Request to calculate VAT return from journal entries"""
-    period: str = Field(..., description="Period in YYYY-MM format")
+    period: str = Field(..., description="Period: YYYY-MM (monthly), YYYY-Qn (quarterly) or YYYY (yearly)")
     tenant_id: str = Field(default="system")
+    refresh_buckets: bool = Field(
+        default=False,
+        description="Recompute all monthly tax buckets; by default only months without buckets or with "
+                    "journal changes since their last refresh are recomputed"
+    )
 
 
 class ELSTERExportRequest(BaseModel):
@@ -83,134 +90,35 @@ async def calculate_vat_return(
 ):
     """
     Calculate VAT return from journal entries for a period.
+
+    Amounts come from the monthly tax buckets (one GROUP BY per refresh);
+    quarterly and yearly returns combine the buckets of their months.
     """
     try:
-        # Get journal entries for period
-        period_start = f"{request.period}-01"
-        period_end = f"{request.period}-31"
-        
-        # Get tax keys with UStVA positions
-        tax_keys_query = text("""
-            SELECT code, steuersatz, ustva_position, ustva_bezeichnung
-            FROM domain_erp.tax_keys
-            WHERE tenant_id = :tenant_id AND active = true
-        """)
-        
-        tax_keys_rows = db.execute(tax_keys_query, {
-            "tenant_id": request.tenant_id
-        }).fetchall()
-        
-        # Build tax key lookup
-        tax_key_map = {}
-        for row in tax_keys_rows:
-            code = str(row[0])
-            rate = Decimal(str(row[1]))
-            ustva_pos = str(row[2]) if row[2] else ""
-            ustva_desc = str(row[3]) if row[3] else ""
-            tax_key_map[code] = {
-                "rate": rate,
-                "ustva_position": ustva_pos,
-                "ustva_description": ustva_desc
-            }
-        
-        # Get journal entry lines with tax codes
-        journal_query = text("""
-            SELECT jel.account_id, jel.debit_amount, jel.credit_amount, jel.tax_code,
-                   jel.description, jel.reference, je.entry_date, je.document_type
-            FROM domain_erp.journal_entry_lines jel
-            JOIN domain_erp.journal_entries je ON jel.journal_entry_id = je.id
-            WHERE je.tenant_id = :tenant_id
-            AND je.period = :period
-            AND je.status = 'posted'
-            AND jel.tax_code IS NOT NULL
-            ORDER BY je.entry_date, jel.line_number
-        """)
-        
-        journal_rows = db.execute(journal_query, {
-            "tenant_id": request.tenant_id,
-            "period": request.period
-        }).fetchall()
-        
-        # Aggregate by UStVA position
-        position_totals = {}
-        
-        for row in journal_rows:
-            account_id = str(row[0])
-            debit = Decimal(str(row[1]))
-            credit = Decimal(str(row[2]))
-            tax_code = str(row[3]) if row[3] else ""
-            
-            # Determine if this is sales (output tax) or purchase (input tax)
-            # Typically: debit on expense accounts = input tax, credit on revenue accounts = output tax
-            # For simplicity, we'll use account ranges (this should be configurable)
-            is_sales = account_id.startswith("8") or account_id.startswith("4")  # Revenue accounts
-            is_purchase = account_id.startswith("6") or account_id.startswith("5")  # Expense accounts
-            
-            if tax_code and tax_code in tax_key_map:
-                tax_key = tax_key_map[tax_code]
-                ustva_pos = tax_key["ustva_position"]
-                
-                if not ustva_pos:
-                    continue
-                
-                if ustva_pos not in position_totals:
-                    position_totals[ustva_pos] = {
-                        "position_code": ustva_pos,
-                        "description": tax_key["ustva_description"],
-                        "net_amount": Decimal("0.00"),
-                        "tax_amount": Decimal("0.00"),
-                        "tax_rate": tax_key["rate"],
-                        "sales_net": Decimal("0.00"),
-                        "sales_tax": Decimal("0.00"),
-                        "purchase_net": Decimal("0.00"),
-                        "purchase_tax": Decimal("0.00")
-                    }
-                
-                # Calculate net and tax amounts
-                if is_sales:
-                    # Output tax (Umsatzsteuer)
-                    amount = credit if credit > 0 else debit
-                    net_amount = amount / (Decimal("1") + tax_key["rate"] / Decimal("100"))
-                    tax_amount = amount - net_amount
-                    
-                    position_totals[ustva_pos]["sales_net"] += net_amount
-                    position_totals[ustva_pos]["sales_tax"] += tax_amount
-                elif is_purchase:
-                    # Input tax (Vorsteuer)
-                    amount = debit if debit > 0 else credit
-                    net_amount = amount / (Decimal("1") + tax_key["rate"] / Decimal("100"))
-                    tax_amount = amount - net_amount
-                    
-                    position_totals[ustva_pos]["purchase_net"] += net_amount
-                    position_totals[ustva_pos]["purchase_tax"] += tax_amount
-                
-                position_totals[ustva_pos]["net_amount"] += net_amount
-                position_totals[ustva_pos]["tax_amount"] += tax_amount
-        
-        # Convert to positions list
-        positions = []
-        for pos_code, totals in position_totals.items():
-            positions.append(VATReturnPosition(
-                position_code=pos_code,
+        try:
+            return_type, months = expand_period(request.period)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        tax_key_map = load_tax_keys(db, request.tenant_id)
+        buckets = get_buckets(db, request.tenant_id, months, refresh=request.refresh_buckets)
+        result = compute_positions(buckets, tax_key_map)
+
+        positions = [
+            VATReturnPosition(
+                position_code=totals["position_code"],
                 description=totals["description"],
                 net_amount=totals["net_amount"],
                 tax_amount=totals["tax_amount"],
                 tax_rate=totals["tax_rate"]
-            ))
-        
-        # Calculate totals
-        total_sales_net = sum(p["sales_net"] for p in position_totals.values())
-        total_purchase_net = sum(p["purchase_net"] for p in position_totals.values())
-        total_output_tax = sum(p["sales_tax"] for p in position_totals.values())
-        total_input_tax = sum(p["purchase_tax"] for p in position_totals.values())
-        vat_payable = total_output_tax - total_input_tax
-        
+            )
+            for totals in result["positions"]
+        ]
+
         # Create VAT return
         return_id = str(uuid.uuid4())
-        
-        import json
-        positions_json = json.dumps([p.dict() for p in positions])
-        
+        positions_json = json.dumps([p.dict() for p in positions], default=str)
+
         insert_query = text("""
             INSERT INTO domain_erp.vat_returns
             (id, tenant_id, period, return_type, taxpayer_name, tax_id, vat_id,
@@ -225,28 +133,27 @@ async def calculate_vat_return(
                       positions, status, calculated_at, validated_at, submitted_at,
                       notes, created_at, updated_at
         """)
-        
+
         row = db.execute(insert_query, {
             "id": return_id,
             "tenant_id": request.tenant_id,
             "period": request.period,
-            "return_type": "monthly",
+            "return_type": return_type,
             "taxpayer_name": "Company Name",  # Should come from company master data
             "tax_id": None,
             "vat_id": None,
-            "total_sales_net": total_sales_net,
-            "total_input_tax": total_input_tax,
-            "total_output_tax": total_output_tax,
-            "vat_payable": vat_payable,
+            "total_sales_net": result["total_sales_net"],
+            "total_input_tax": result["total_input_tax"],
+            "total_output_tax": result["total_output_tax"],
+            "vat_payable": result["vat_payable"],
             "positions": positions_json,
             "status": "calculated"
         }).fetchone()
-        
+
         db.commit()
-        
-        import json
-        positions_data = json.loads(row[11]) if row[11] else []
-        
+
+        positions_data = json.loads(row[10]) if isinstance(row[10], str) else (row[10] or [])
+
         return VATReturnResponse(
             id=str(row[0]),
             period=str(row[1]),
@@ -259,15 +166,17 @@ async def calculate_vat_return(
             total_output_tax=Decimal(str(row[8])),
             vat_payable=Decimal(str(row[9])),
             positions=positions_data,
-            status=str(row[12]),
-            calculated_at=row[13] if row[13] else None,
-            validated_at=row[14] if row[14] else None,
-            submitted_at=row[15] if row[15] else None,
-            notes=str(row[16]) if row[16] else None,
-            created_at=row[17],
-            updated_at=row[18]
+            status=str(row[11]),
+            calculated_at=row[12] if row[12] else None,
+            validated_at=row[13] if row[13] else None,
+            submitted_at=row[14] if row[14] else None,
+            notes=str(row[15]) if row[15] else None,
+            created_at=row[16],
+            updated_at=row[17]
         )
-        
+
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         logger.error(f"Error calculating VAT return: {e}")
@@ -301,7 +210,6 @@ async def get_vat_return(
         if not row:
             raise HTTPException(status_code=404, detail="VAT return not found")
         
-        import json
         positions_data = json.loads(row[10]) if row[10] else []
         
         return VATReturnResponse(
@@ -407,39 +315,24 @@ async def export_elster_xml(
 async def validate_vat_return(
     return_id: str,
     tenant_id: str = Query("system", description="Tenant ID"),
+    refresh_buckets: bool = Query(False, description="Recompute all months instead of only stale ones"),
     db: Session = Depends(get_db)
 ):
     """
     Validate VAT return against GL totals.
+
+    Months with journal changes since their last bucket refresh are
+    recomputed first, so postings made after the calculation show up as
+    differences instead of being validated against stale buckets.
     """
     try:
         vat_return = await get_vat_return(return_id, tenant_id, db)
         
-        # Recalculate from GL to validate
-        period = vat_return.period
-        
-        # Get GL totals for period
-        gl_query = text("""
-            SELECT 
-                SUM(CASE WHEN jel.tax_code IS NOT NULL AND je.document_type LIKE 'AR%' 
-                    THEN jel.credit_amount ELSE 0 END) as sales_total,
-                SUM(CASE WHEN jel.tax_code IS NOT NULL AND je.document_type LIKE 'AP%' 
-                    THEN jel.debit_amount ELSE 0 END) as purchase_total
-            FROM domain_erp.journal_entry_lines jel
-            JOIN domain_erp.journal_entries je ON jel.journal_entry_id = je.id
-            WHERE je.tenant_id = :tenant_id
-            AND je.period = :period
-            AND je.status = 'posted'
-        """)
-        
-        gl_row = db.execute(gl_query, {
-            "tenant_id": tenant_id,
-            "period": period
-        }).fetchone()
-        
-        gl_sales = Decimal(str(gl_row[0])) if gl_row[0] else Decimal("0.00")
-        gl_purchases = Decimal(str(gl_row[1])) if gl_row[1] else Decimal("0.00")
-        
+        # GL totals from the up-to-date monthly tax buckets of the return's period
+        _, months = expand_period(vat_return.period)
+        buckets = get_buckets(db, tenant_id, months, refresh=refresh_buckets)
+        gl_sales, gl_purchases = gl_totals(buckets)
+
         # Compare with VAT return
         differences = []
         
@@ -463,7 +356,7 @@ async def validate_vat_return(
         
         is_valid = len(differences) == 0
         
-        # Update validation status
+        # Update validation status (the refreshed buckets are committed either way)
         if is_valid:
             update_query = text("""
                 UPDATE domain_erp.vat_returns
@@ -475,7 +368,7 @@ async def validate_vat_return(
                 "return_id": return_id,
                 "tenant_id": tenant_id
             })
-            db.commit()
+        db.commit()
         
         return {
             "valid": is_valid,
@@ -522,7 +415,6 @@ async def list_vat_returns(
         
         result = []
         for row in rows:
-            import json
             positions_data = json.loads(row[10]) if row[10] else []
             
             result.append(VATReturnResponse(
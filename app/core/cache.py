@@ -0,0 +1,462 @@
+"""
+In-Process Cache
+Bounded LRU + TTL cache with byte accounting, single-flight loaders,
+Prometheus metrics and an optional shared (Redis) backend
+"""
+
+import asyncio
+import json
+import logging
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, Awaitable, Callable, Dict, Generic, Iterator, List, Optional, Tuple, TypeVar
+
+from prometheus_client import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+V = TypeVar("V")
+
+_MISSING = object()
+
+cache_events_total = Counter(
+    'cache_events_total',
+    'Cache events (hit, miss, eviction, expiration, load, load_error)',
+    ['cache', 'event']
+)
+
+cache_entries = Gauge(
+    'cache_entries',
+    'Current number of cache entries',
+    ['cache']
+)
+
+cache_size_bytes = Gauge(
+    'cache_size_bytes',
+    'Estimated memory held by cache entries',
+    ['cache']
+)
+
+
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """Rough deep size estimate in bytes (containers are followed 3 levels deep)."""
+    size = sys.getsizeof(value)
+    if _depth >= 3:
+        return size
+    if isinstance(value, dict):
+        for k, v in value.items():
+            size += estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for item in value:
+            size += estimate_size(item, _depth + 1)
+    elif hasattr(value, "__dict__"):
+        size += estimate_size(vars(value), _depth + 1)
+    return size
+
+
+@dataclass
+class CacheStats:
+    """Counters for a single cache instance."""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    loads: int = 0
+    load_errors: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class CacheBackend(ABC):
+    """Shared second-level store used by several replicas (values are JSON)."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Tuple[Any, Optional[float]]]:
+        """``(value, remaining TTL in seconds or None)``, None on a miss."""
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float]) -> None:
+        """Store ``value`` for ``ttl`` seconds (None = no expiry)."""
+        pass
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        pass
+
+    @abstractmethod
+    def clear(self, namespace: str) -> None:
+        """Remove all keys of one cache (``<namespace>:*``)."""
+        pass
+
+
+class RedisCacheBackend(CacheBackend):
+    """Redis-backed shared cache; failures degrade to local-only caching."""
+
+    def __init__(self, url: str):
+        import redis  # optional dependency, only needed for shared caching
+
+        self._client = redis.Redis.from_url(url, socket_timeout=0.25)
+
+    def get(self, key: str) -> Optional[Tuple[Any, Optional[float]]]:
+        try:
+            raw, pttl = self._client.pipeline().get(key).pttl(key).execute()
+        except Exception as e:
+            logger.warning(f"Shared cache get failed for {key}: {e}")
+            return None
+        if raw is None:
+            return None
+        # PTTL: -1 = no expiry, -2 = expired between GET and PTTL
+        return json.loads(raw), (pttl / 1000 if pttl >= 0 else None)
+
+    def set(self, key: str, value: Any, ttl: Optional[float]) -> None:
+        try:
+            payload = json.dumps(value, default=str)
+            if ttl:
+                self._client.set(key, payload, px=int(ttl * 1000))
+            else:
+                self._client.set(key, payload)
+        except Exception as e:
+            logger.warning(f"Shared cache set failed for {key}: {e}")
+
+    def delete(self, key: str) -> None:
+        try:
+            self._client.delete(key)
+        except Exception as e:
+            logger.warning(f"Shared cache delete failed for {key}: {e}")
+
+    def clear(self, namespace: str) -> None:
+        try:
+            keys = list(self._client.scan_iter(match=f"{namespace}:*", count=500))
+            if keys:
+                self._client.delete(*keys)
+        except Exception as e:
+            logger.warning(f"Shared cache clear failed for {namespace}: {e}")
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "size")
+
+    def __init__(self, value: Any, expires_at: Optional[float], size: int):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+
+
+class TTLCache(Generic[V]):
+    """
+    Bounded LRU cache with per-entry TTL.
+
+    - O(1) get/set/evict (OrderedDict, least recently used entry evicted first)
+    - Limits on entry count and estimated bytes
+    - Single-flight loaders: concurrent misses for the same key share one load
+    - Optional shared backend consulted on local misses and written through on set
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = 1024,
+        max_bytes: Optional[int] = None,
+        default_ttl: Optional[float] = None,
+        sizer: Optional[Callable[[Any], int]] = None,
+        backend: Optional[CacheBackend] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.backend = backend
+        self.stats = CacheStats()
+        self._sizer = sizer or (estimate_size if max_bytes else None)
+        self._clock = clock
+        self._data: "OrderedDict[Any, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._sync_loads: Dict[Any, threading.Lock] = {}
+        self._async_loads: Dict[Any, asyncio.Future] = {}
+
+        self._m_hit = cache_events_total.labels(name, "hit")
+        self._m_miss = cache_events_total.labels(name, "miss")
+        self._m_evict = cache_events_total.labels(name, "eviction")
+        self._m_expire = cache_events_total.labels(name, "expiration")
+        self._m_load = cache_events_total.labels(name, "load")
+        self._m_load_error = cache_events_total.labels(name, "load_error")
+        self._m_entries = cache_entries.labels(name)
+        self._m_bytes = cache_size_bytes.labels(name)
+
+    # ------------------------------------------------------------------
+    # Basic operations
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Any) -> bool:
+        return self._lookup(key, record=False) is not _MISSING
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        """Return the cached value (refreshing its LRU position) or ``default``."""
+        value = self._lookup(key)
+        if value is not _MISSING:
+            return value
+        if self.backend is not None:
+            shared = self.backend.get(self._backend_key(key))
+            if shared is not None:
+                # Local copy expires with the shared entry, not a full TTL later
+                value, remaining = shared
+                self._store(key, value, remaining if remaining is not None else self.default_ttl)
+                return value
+        return default
+
+    def set(self, key: Any, value: V, ttl: Optional[float] = None) -> None:
+        """Store ``value``; ``ttl`` seconds overrides the cache default."""
+        ttl = ttl if ttl is not None else self.default_ttl
+        self._store(key, value, ttl)
+        if self.backend is not None:
+            self.backend.set(self._backend_key(key), value, ttl)
+
+    def delete(self, key: Any) -> bool:
+        with self._lock:
+            entry = self._data.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry.size
+                self._update_gauges()
+        if self.backend is not None:
+            self.backend.delete(self._backend_key(key))
+        return entry is not None
+
+    def clear(self) -> int:
+        with self._lock:
+            count = len(self._data)
+            self._data.clear()
+            self._bytes = 0
+            self._update_gauges()
+        if self.backend is not None:
+            self.backend.clear(self.name)
+        return count
+
+    def items(self) -> List[Tuple[Any, V]]:
+        """Snapshot of all live (non-expired) entries, oldest first."""
+        now = self._clock()
+        with self._lock:
+            return [
+                (k, e.value) for k, e in self._data.items()
+                if e.expires_at is None or e.expires_at > now
+            ]
+
+    def values(self) -> List[V]:
+        return [v for _, v in self.items()]
+
+    def keys(self) -> Iterator[Any]:
+        return iter([k for k, _ in self.items()])
+
+    def cleanup_expired(self) -> int:
+        """Remove expired entries. Returns count of removed entries."""
+        now = self._clock()
+        with self._lock:
+            expired = [
+                k for k, e in self._data.items()
+                if e.expires_at is not None and e.expires_at <= now
+            ]
+            for key in expired:
+                self._bytes -= self._data.pop(key).size
+            self.stats.expirations += len(expired)
+            self._update_gauges()
+        if expired:
+            self._m_expire.inc(len(expired))
+        return len(expired)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = asdict(self.stats)
+        stats.update(
+            name=self.name,
+            size=len(self._data),
+            size_bytes=self._bytes,
+            max_entries=self.max_entries,
+            max_bytes=self.max_bytes,
+            hit_rate=self.stats.hit_rate,
+        )
+        return stats
+
+    # ------------------------------------------------------------------
+    # Single-flight loaders
+    # ------------------------------------------------------------------
+
+    def get_or_load(self, key: Any, loader: Callable[[], V], ttl: Optional[float] = None) -> V:
+        """Return cached value or call ``loader`` once, even under concurrent misses."""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        with self._lock:
+            key_lock = self._sync_loads.setdefault(key, threading.Lock())
+        with key_lock:
+            value = self._lookup(key, record=False)
+            if value is not _MISSING:
+                return value
+            try:
+                value = loader()
+            except Exception:
+                self.stats.load_errors += 1
+                self._m_load_error.inc()
+                raise
+            finally:
+                with self._lock:
+                    self._sync_loads.pop(key, None)
+            self.stats.loads += 1
+            self._m_load.inc()
+            self.set(key, value, ttl)
+            return value
+
+    async def aget_or_load(
+        self,
+        key: Any,
+        loader: Callable[[], Awaitable[V]],
+        ttl: Optional[float] = None,
+    ) -> V:
+        """Async variant of :meth:`get_or_load`; waiters share the in-flight load."""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        pending = self._async_loads.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._async_loads[key] = future
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            self.stats.load_errors += 1
+            self._m_load_error.inc()
+            future.set_exception(e)
+            # Mark as retrieved so an exception without waiters is not logged
+            future.exception()
+            raise
+        else:
+            self.stats.loads += 1
+            self._m_load.inc()
+            self.set(key, value, ttl)
+            future.set_result(value)
+            return value
+        finally:
+            self._async_loads.pop(key, None)
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _backend_key(self, key: Any) -> str:
+        return f"{self.name}:{key}"
+
+    def _lookup(self, key: Any, record: bool = True) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                if record:
+                    self.stats.misses += 1
+                    self._m_miss.inc()
+                return _MISSING
+            if entry.expires_at is not None and entry.expires_at <= self._clock():
+                del self._data[key]
+                self._bytes -= entry.size
+                self.stats.expirations += 1
+                self._m_expire.inc()
+                self._update_gauges()
+                if record:
+                    self.stats.misses += 1
+                    self._m_miss.inc()
+                return _MISSING
+            self._data.move_to_end(key)
+            if record:
+                self.stats.hits += 1
+                self._m_hit.inc()
+            return entry.value
+
+    def _store(self, key: Any, value: Any, ttl: Optional[float]) -> None:
+        size = self._sizer(value) if self._sizer is not None else 0
+        expires_at = self._clock() + ttl if ttl else None
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._data[key] = _Entry(value, expires_at, size)
+            self._bytes += size
+            self._evict()
+            self._update_gauges()
+
+    def _evict(self) -> None:
+        evicted = 0
+        data = self._data
+        while len(data) > self.max_entries or (
+            self.max_bytes is not None and self._bytes > self.max_bytes and len(data) > 1
+        ):
+            _, entry = data.popitem(last=False)
+            self._bytes -= entry.size
+            evicted += 1
+        if evicted:
+            self.stats.evictions += evicted
+            self._m_evict.inc(evicted)
+
+    def _update_gauges(self) -> None:
+        self._m_entries.set(len(self._data))
+        self._m_bytes.set(self._bytes)
+
+
+# ----------------------------------------------------------------------
+# Registry
+# ----------------------------------------------------------------------
+
+_caches: Dict[str, TTLCache] = {}
+_shared_backend: Optional[CacheBackend] = None
+_shared_backend_resolved = False
+
+
+def get_shared_backend() -> Optional[CacheBackend]:
+    """Shared backend configured via ``CACHE_BACKEND_URL`` (None = process-local only)."""
+    global _shared_backend, _shared_backend_resolved
+    if not _shared_backend_resolved:
+        _shared_backend_resolved = True
+        from app.core.config import settings
+
+        url = settings.CACHE_BACKEND_URL
+        if url and settings.ENABLE_CACHE:
+            try:
+                _shared_backend = RedisCacheBackend(url)
+            except ImportError:
+                logger.warning("redis not installed - shared cache backend disabled")
+    return _shared_backend
+
+
+def get_cache(name: str, shared: bool = False, **kwargs: Any) -> TTLCache:
+    """Return the named cache, creating it with ``kwargs`` on first use."""
+    cache = _caches.get(name)
+    if cache is None:
+        if shared:
+            kwargs.setdefault("backend", get_shared_backend())
+        cache = TTLCache(name, **kwargs)
+        _caches[name] = cache
+    return cache
+
+
+def get_all_cache_stats() -> List[Dict[str, Any]]:
+    return [cache.get_stats() for cache in _caches.values()]
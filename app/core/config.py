@@ -24,6 +24,11 @@ class Settings(BaseSettings):
     PORT: int = 8000
     DEBUG: bool = True
 
+    # Startup Configuration
+    STARTUP_LAZY_ROUTERS: bool = True  # Router erst beim ersten Request laden (app.core.startup)
+    STARTUP_PRELOAD_ROUTERS: bool = True  # Restliche Router nach dem Start im Hintergrund laden
+    STARTUP_CREATE_TABLES: bool = False  # Sonst: python -m app.core.startup migrate
+
     # CORS Configuration
     BACKEND_CORS_ORIGINS: List[str] = [
         "http://localhost:3000",  # React dev server
@@ -52,10 +57,21 @@ class Settings(BaseSettings):
         env="DATABASE_URL"
     )
     DATABASE_CONNECT_ARGS: dict = {}
+    # Pools je Workload-Klasse: synchron (Legacy-Sessions), interaktiv und Reports (async)
+    DATABASE_POOL_SIZE: int = 10
+    DATABASE_MAX_OVERFLOW: int = 20
+    DATABASE_POOL_TIMEOUT: int = 30
+    ASYNC_DATABASE_URL: Optional[str] = None  # Default: DATABASE_URL mit asyncpg/aiosqlite
+    DATABASE_INTERACTIVE_POOL_SIZE: int = 20
+    DATABASE_INTERACTIVE_MAX_OVERFLOW: int = 10
+    DATABASE_REPORT_POOL_SIZE: int = 4
+    DATABASE_REPORT_MAX_OVERFLOW: int = 2
+    DATABASE_SYNC_THREADS: int = 16  # Threads für verbleibende synchrone DB-Arbeit
 
     # Redis Configuration
     REDIS_URL: str = "redis://localhost:6379/0"
     REDIS_CACHE_TTL: int = 3600  # 1 hour
+    CACHE_BACKEND_URL: Optional[str] = None  # e.g. REDIS_URL to share caches across replicas
 
     # Keycloak Configuration
     KEYCLOAK_URL: str = "http://localhost:8080"
@@ -98,12 +114,52 @@ class Settings(BaseSettings):
 
     # File Storage
     UPLOAD_DIR: str = "uploads"
+    GDPR_EXPORT_DIR: str = "data/gdpr_exports"  # Auf allen Replicas dasselbe (geteilte) Verzeichnis
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB
 
     # Pagination
     DEFAULT_PAGE_SIZE: int = 50
     MAX_PAGE_SIZE: int = 1000
 
+    # Autocomplete (app.services.autocomplete_index)
+    AUTOCOMPLETE_HALF_LIFE_DAYS: float = 30.0  # Nutzung zählt nach 30 Tagen noch halb
+    AUTOCOMPLETE_OVERLAY_MAX: int = 5000  # Änderungen bis zum Neuaufbau des Segments
+    AUTOCOMPLETE_REBUILD_SECONDS: int = 900  # Spätester Neuaufbau (Änderungen anderer Prozesse)
+
+    # Competitor crawler (app.services.crawler)
+    CRAWLER_USER_AGENT: str = "VALEO-NeuroERP-PriceMonitor/1.0"
+    CRAWLER_CONCURRENCY: int = 32
+    CRAWLER_PER_HOST_CONCURRENCY: int = 2
+    CRAWLER_HOST_DELAY_SECONDS: float = 1.0  # Mindestabstand zwischen Requests an denselben Shop
+    CRAWLER_TIMEOUT_SECONDS: float = 10.0
+    CRAWLER_RESPECT_ROBOTS: bool = True
+    CRAWLER_CACHE_MAX_ENTRIES: int = 50_000  # Validatoren und Parse-Ergebnisse je URL (LRU)
+    CRAWLER_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    CRAWLER_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+
+    # Admission control (app.middleware.admission)
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_MAX_CONCURRENCY: int = 64  # Gleichzeitig bearbeitete Requests je Replica
+    ADMISSION_TARGET_P99_SECONDS: float = 0.5  # Ziel für interaktive Requests inkl. Wartezeit
+    ADMISSION_REPORT_MAX_CONCURRENCY: int = 8
+    ADMISSION_REPORT_MIN_CONCURRENCY: int = 1
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 5.0
+    ADMISSION_REPORT_QUEUE_TIMEOUT_SECONDS: float = 30.0
+    ADMISSION_MAX_QUEUE: int = 500
+    ADMISSION_REPORT_MAX_QUEUE: int = 50
+    ADMISSION_TENANT_MAX_CONCURRENCY: int = 32  # Je Tenant und Replica
+    ADMISSION_COUNTER_URL: Optional[str] = None  # e.g. REDIS_URL to enforce tenant quotas across replicas
+    ADMISSION_TENANT_SHARED_MAX_CONCURRENCY: int = 96  # Je Tenant über alle Replicas
+    ADMISSION_SHARED_LEASE_SECONDS: float = 300.0  # Plätze abgestürzter Replicas verfallen danach
+    ADMISSION_REPORT_PATHS: List[str] = [  # Regex auf den Pfad: niedrige Priorität
+        r"/api/reports/",
+        r"/finance/(balance-sheet|profit-loss|bwa)",
+        r"/(data-)?export",
+        r"analytics",
+        r"/datev",
+    ]
+    ADMISSION_EXEMPT_PATHS: List[str] = ["/healthz", "/readyz", "/metrics", "/api/v1/health"]
+
     # API Authentication
     API_DEV_TOKEN: Optional[str] = "dev-token"
     API_AUTH_EXEMPT_PATHS: List[str] = [
@@ -3,8 +3,15 @@ VALEO-NeuroERP Database Connection and Setup
 PostgreSQL database connection with SQLAlchemy
 """
 
+import functools
 import logging
+from typing import AsyncIterator, Callable, Dict, TypeVar
+
+import anyio
+from anyio import to_thread
 from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import QueuePool
@@ -17,9 +24,9 @@ logger = logging.getLogger(__name__)
 engine = create_engine(
     settings.DATABASE_URL,
     poolclass=QueuePool,  # Better for PostgreSQL
-    pool_size=10,
-    max_overflow=20,
-    pool_timeout=30,
+    pool_size=settings.DATABASE_POOL_SIZE,
+    max_overflow=settings.DATABASE_MAX_OVERFLOW,
+    pool_timeout=settings.DATABASE_POOL_TIMEOUT,
     pool_recycle=3600,
     echo=settings.DEBUG,  # SQL query logging in debug mode
 )
@@ -38,6 +45,107 @@ def get_db() -> Session:
     finally:
         db.close()
 
+
+# --- Async-Zugriff -----------------------------------------------------------
+#
+# Jede Workload-Klasse bekommt einen eigenen Pool: lange Reports belegen
+# höchstens ihre eigenen Verbindungen, kurze Requests warten nie auf sie.
+
+T = TypeVar("T")
+
+# Workload-Klasse -> Präfix der Settings <PRÄFIX>_POOL_SIZE / <PRÄFIX>_MAX_OVERFLOW
+WORKLOAD_POOLS = {
+    "interactive": "DATABASE_INTERACTIVE",
+    "reports": "DATABASE_REPORT",
+}
+
+_ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def async_database_url(url: str) -> str:
+    """Leitet aus einer synchronen Datenbank-URL die Async-Variante ab (asyncpg bzw. aiosqlite)"""
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None or parsed.drivername in _ASYNC_DRIVERS.values():
+        return url
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+_async_engines: Dict[str, AsyncEngine] = {}
+_async_session_factories: Dict[str, async_sessionmaker] = {}
+
+
+def get_async_engine(workload: str = "interactive") -> AsyncEngine:
+    """Async-Engine der Workload-Klasse; wird beim ersten Zugriff angelegt"""
+    engine = _async_engines.get(workload)
+    if engine is None:
+        if workload not in WORKLOAD_POOLS:
+            raise ValueError(f"Unknown database workload: {workload}")
+        url = make_url(settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL))
+        options = {"pool_pre_ping": True, "pool_recycle": 3600, "echo": settings.DEBUG}
+        if url.get_backend_name() != "sqlite" or url.database not in (None, "", ":memory:"):
+            prefix = WORKLOAD_POOLS[workload]
+            options.update(
+                pool_size=getattr(settings, f"{prefix}_POOL_SIZE"),
+                max_overflow=getattr(settings, f"{prefix}_MAX_OVERFLOW"),
+                pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+            )
+        engine = _async_engines[workload] = create_async_engine(url, **options)
+    return engine
+
+
+def get_async_session_factory(workload: str = "interactive") -> async_sessionmaker:
+    """Session-Factory der Workload-Klasse (``expire_on_commit=False``)"""
+    factory = _async_session_factories.get(workload)
+    if factory is None:
+        factory = _async_session_factories[workload] = async_sessionmaker(
+            get_async_engine(workload), expire_on_commit=False, autoflush=False
+        )
+    return factory
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """
+    Dependency für kurze, interaktive Requests (AsyncSession)
+    """
+    async with get_async_session_factory("interactive")() as session:
+        yield session
+
+
+async def get_report_db() -> AsyncIterator[AsyncSession]:
+    """
+    Dependency für Auswertungen (Bilanz, GuV, BWA) mit eigenem, kleinem Pool
+    """
+    async with get_async_session_factory("reports")() as session:
+        yield session
+
+
+async def dispose_async_engines() -> None:
+    """Schließt alle Async-Pools (Shutdown, Tests)"""
+    engines = list(_async_engines.values())
+    _async_engines.clear()
+    _async_session_factories.clear()
+    for engine in engines:
+        await engine.dispose()
+
+
+@functools.lru_cache(maxsize=1)
+def _sync_limiter() -> anyio.CapacityLimiter:
+    return anyio.CapacityLimiter(settings.DATABASE_SYNC_THREADS)
+
+
+async def run_in_db_threadpool(func: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Führt blockierenden Code mit synchroner Session in einem begrenzten Threadpool aus
+
+    Höchstens ``DATABASE_SYNC_THREADS`` Aufrufe laufen gleichzeitig; weitere
+    warten, ohne den Event-Loop zu blockieren. Der Wert sollte den
+    synchronen Pool (``DATABASE_POOL_SIZE`` + ``DATABASE_MAX_OVERFLOW``) nicht
+    überschreiten, sonst warten Threads auf Verbindungen statt auf den Limiter.
+    """
+    return await to_thread.run_sync(functools.partial(func, *args, **kwargs), limiter=_sync_limiter())
+
+
 def create_tables():
     """
     Create all database tables
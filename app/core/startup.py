@@ -0,0 +1,257 @@
+"""
+VALEO-NeuroERP Startup
+Router-Manifest, Lazy Loading der Router und Import-Profil beim Boot
+
+Die Router der App werden aus ``ROUTER_MANIFEST`` registriert statt in
+``main.py`` importiert zu werden. Eager-Einträge (Health-Probes) werden sofort
+eingebunden. Für alle anderen steht zunächst nur ein Platzhalter je Pfad-Präfix
+in der Routing-Tabelle. Der erste Request auf einen dieser Pfade importiert das
+Modul, setzt dessen Routen an die Stelle des Platzhalters und wird neu
+geroutet. Damit bleibt die Reihenfolge der Routen die des Manifests, egal in
+welcher Reihenfolge geladen wird. ``/openapi.json`` lädt alle Router.
+
+Nach dem Start lädt ``preload()`` die restlichen Router nacheinander im
+Hintergrund (``STARTUP_PRELOAD_ROUTERS``). ``STARTUP_LAZY_ROUTERS=false``
+bindet alles schon beim Import ein.
+
+Das Schema wird nicht mehr beim Start angelegt. Das übernimmt ein eigener
+Schritt vor dem Rollout::
+
+    python -m app.core.startup migrate
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib
+import logging
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import FastAPI
+from starlette._utils import get_route_path
+from starlette.routing import BaseRoute, Match, NoMatchFound
+from starlette.types import Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RouterSpec:
+    """Eintrag im Router-Manifest"""
+    module: str
+    # Pfad-Präfixe der fertigen Routen; nur für Lazy Loading relevant
+    paths: Tuple[str, ...] = ()
+    attr: str = "router"
+    prefix: str = ""
+    tags: Tuple[str, ...] = ()
+    # Fehlende Abhängigkeiten nur loggen statt den Start abzubrechen
+    optional: bool = False
+    eager: bool = False
+
+
+V1 = settings.API_V1_STR
+
+ROUTER_MANIFEST: List[RouterSpec] = [
+    # Health & Probes: sofort verfügbar, ohne die Fachmodule zu laden
+    RouterSpec("app.api.v1.endpoints.health", tags=("Health",), eager=True),
+    # API v1 (Fachdomänen)
+    RouterSpec("app.api.v1.api", (V1,), attr="api_router", prefix=V1),
+    RouterSpec("app.api.v1.endpoints.policies", ("/api/mcp/policy",), prefix="/api/mcp"),
+    RouterSpec("app.crm.router", (f"{V1}/api/v1/crm",), prefix=V1, tags=("CRM",), optional=True),
+    RouterSpec("app.finance.router", ("/api/finance",), tags=("Finance",), optional=True),
+    RouterSpec("app.einkauf.router", ("/einkauf",), tags=("Einkauf",), optional=True),
+    RouterSpec("app.domains.inventory.api", (f"{V1}/inventory",), prefix=f"{V1}/inventory", tags=("Inventory",), optional=True),
+    RouterSpec("app.domains.agrar.api", (f"{V1}/agrar",), prefix=f"{V1}/agrar", tags=("Agrar",), optional=True),
+    # Observability & Compliance
+    RouterSpec("app.api.v1.endpoints.system_metrics", (f"{V1}/metrics",), prefix=f"{V1}/metrics", tags=("System Metrics",)),
+    RouterSpec("app.api.v1.endpoints.audit", (f"{V1}/audit",), prefix=f"{V1}/audit", tags=("Audit",)),
+    RouterSpec("app.api.v1.endpoints.gdpr", (f"{V1}/gdpr",), prefix=f"{V1}/gdpr", tags=("GDPR",)),
+    RouterSpec("app.api.v1.endpoints.websocket", (f"{V1}/ws",), prefix=V1, tags=("WebSocket",)),
+    # Agents & RAG (LangGraph, chromadb, sentence-transformers) bleiben deaktiviert
+    # RouterSpec("app.api.v1.endpoints.agents", (f"{V1}/agents",), prefix=f"{V1}/agents", tags=("Agents",)),
+    # RouterSpec("app.api.v1.endpoints.rag", (f"{V1}/rag",), prefix=f"{V1}/rag", tags=("RAG",)),
+    # Authentifizierung (⚠️ NUR FÜR ENTWICKLUNG!)
+    RouterSpec("app.auth.router", ("/auth",)),
+    # Policy Manager, Belege & Formulare (Phase O)
+    RouterSpec("app.policy.router", ("/api/mcp/policy",)),
+    RouterSpec("app.documents.router", ("/api/mcp/documents",)),
+    RouterSpec("app.forms.router", ("/api/mcp/form-specs",)),
+    RouterSpec("app.lookup.router", ("/api/mcp/lookup",)),
+    # Druck & Export (ReportLab, pandas)
+    RouterSpec("app.routers.print_router", ("/api/documents",)),
+    RouterSpec("app.routers.export_router", ("/api/export",)),
+    # Workflow, SSE, Verifikation
+    RouterSpec("app.routers.workflow_router", ("/api/workflow",)),
+    RouterSpec("app.routers.sse_router", ("/api/events", "/api/stream")),
+    RouterSpec("app.routers.verify_router", ("/verify",)),
+    # GDPR Compliance, Nummernkreise, DMS
+    RouterSpec("app.routers.gdpr_router", ("/api/gdpr",)),
+    RouterSpec("app.routers.numbering_router", ("/api/numbering",)),
+    RouterSpec("app.routers.admin_dms_router", ("/api/admin/dms",)),
+    RouterSpec("app.routers.dms_webhook_router", ("/api/dms",)),
+    # Finanzbuchhaltung (130 Masken)
+    RouterSpec("app.routers.fibu_router", ("/api/fibu",)),
+]
+
+
+# Für ``load``/``_include``: Modul wurde noch nicht importiert (None = optional und fehlt)
+_NOT_IMPORTED = object()
+
+
+class _Placeholder(BaseRoute):
+    """Steht für einen noch nicht geladenen Router in der Routing-Tabelle"""
+
+    def __init__(self, loader: "RouterLoader", spec: RouterSpec, path: str) -> None:
+        self.loader = loader
+        self.spec = spec
+        self.path = path.rstrip("/")
+
+    def matches(self, scope: Scope) -> Tuple[Match, Scope]:
+        if scope["type"] in ("http", "websocket"):
+            path = get_route_path(scope)
+            if path == self.path or path.startswith(self.path + "/"):
+                return Match.FULL, {}
+        return Match.NONE, {}
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Import im Thread, eingehängt wird auf dem Event-Loop (wie beim Preload)
+        if self.spec in self.loader._pending:
+            module = await asyncio.to_thread(self.loader._import, self.spec)
+            self.loader.load(self.spec, module)
+        await self.loader.app.router(scope, receive, send)
+
+    def url_path_for(self, name: str, /, **path_params):
+        raise NoMatchFound(name, path_params)
+
+
+class RouterLoader:
+    """Registriert die Router des Manifests und lädt Lazy-Einträge bei Bedarf"""
+
+    def __init__(self, app: FastAPI, manifest: List[RouterSpec]) -> None:
+        self.app = app
+        self.manifest = manifest
+        self.profile: Dict[str, float] = {}
+        self._pending: List[RouterSpec] = []
+        self._placeholders: Dict[RouterSpec, List[_Placeholder]] = {}
+
+    def install(self, *, lazy: bool) -> None:
+        for spec in self.manifest:
+            if spec.eager or not lazy or not spec.paths:
+                self._include(spec)
+                continue
+            self._pending.append(spec)
+            placeholders = [_Placeholder(self, spec, path) for path in spec.paths]
+            self._placeholders[spec] = placeholders
+            self.app.router.routes.extend(placeholders)
+
+        openapi = self.app.openapi
+
+        def openapi_with_all_routers():
+            self.load_all()
+            return openapi()
+
+        self.app.openapi = openapi_with_all_routers
+
+    @property
+    def pending(self) -> List[str]:
+        return [spec.module for spec in self._pending]
+
+    def load(self, spec: RouterSpec, module=_NOT_IMPORTED) -> None:
+        if spec not in self._pending:
+            return
+        self._pending.remove(spec)
+        placeholders = self._placeholders.pop(spec)
+        routes = self.app.router.routes
+        start = len(routes)
+        self._include(spec, module)
+        # Neue Routen an die Stelle des ersten Platzhalters setzen (Manifest-Reihenfolge)
+        added = routes[start:]
+        del routes[start:]
+        index = routes.index(placeholders[0])
+        routes[index:index] = added
+        for placeholder in placeholders:
+            routes.remove(placeholder)
+        self.app.openapi_schema = None
+        logger.debug("Router %s geladen (%d Routen)", spec.module, len(added))
+
+    def load_all(self) -> None:
+        for spec in list(self._pending):
+            self.load(spec)
+
+    async def preload(self) -> None:
+        """Restliche Router nacheinander laden; importiert wird im Thread, der Event-Loop bleibt frei"""
+        while self._pending:
+            spec = self._pending[0]
+            try:
+                module = await asyncio.to_thread(self._import, spec)
+            except Exception:
+                logger.exception("Router %s konnte nicht geladen werden", spec.module)
+                raise
+            self.load(spec, module)
+        logger.info("Alle Router geladen; langsamste Imports: %s", format_profile(self.profile, top=5))
+
+    def _import(self, spec: RouterSpec):
+        start = time.perf_counter()
+        try:
+            return importlib.import_module(spec.module)
+        except ImportError as exc:
+            if not spec.optional:
+                raise
+            logger.warning("Router %s nicht verfügbar: %s", spec.module, exc)
+            return None
+        finally:
+            self.profile.setdefault(spec.module, time.perf_counter() - start)
+
+    def _include(self, spec: RouterSpec, module=_NOT_IMPORTED) -> None:
+        if module is _NOT_IMPORTED:
+            module = self._import(spec)
+        if module is None:
+            return
+        kwargs = {"prefix": spec.prefix} if spec.prefix else {}
+        if spec.tags:
+            kwargs["tags"] = list(spec.tags)
+        self.app.include_router(getattr(module, spec.attr), **kwargs)
+
+
+def register_routers(app: FastAPI, manifest: Optional[List[RouterSpec]] = None) -> RouterLoader:
+    """Bindet das Manifest in die App ein; Lazy Loading gemäß ``STARTUP_LAZY_ROUTERS``"""
+    loader = RouterLoader(app, ROUTER_MANIFEST if manifest is None else manifest)
+    loader.install(lazy=settings.STARTUP_LAZY_ROUTERS)
+    app.state.router_loader = loader
+    return loader
+
+
+def format_profile(profile: Dict[str, float], top: int = 10) -> str:
+    slowest = sorted(profile.items(), key=lambda item: item[1], reverse=True)[:top]
+    return ", ".join(f"{module} {seconds * 1000:.0f} ms" for module, seconds in slowest)
+
+
+def log_boot_profile(loader: RouterLoader, boot_started: float) -> None:
+    """Import-Profil beim Boot: Gesamtzeit, Module, langsamste Router, ausstehende Router"""
+    logger.info(
+        "Boot in %.0f ms (%d Module geladen); Router: %s; lazy ausstehend: %d",
+        (time.perf_counter() - boot_started) * 1000,
+        len(sys.modules),
+        format_profile(loader.profile) or "-",
+        len(loader.pending),
+    )
+
+
+def migrate() -> None:
+    """Expliziter Migrationsschritt: Tabellen anlegen (idempotent, ``create_all``)"""
+    from app.core.database import create_tables
+
+    create_tables()
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command != "migrate":
+        sys.exit("usage: python -m app.core.startup migrate")
+    logging.basicConfig(level=logging.INFO)
+    migrate()
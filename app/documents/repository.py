@@ -1,17 +1,66 @@
 """
 Document Repository
 Datenbank-Zugriff für Dokumente (Sales, Purchase)
+
+Häufig gefilterte JSON-Felder liegen als generierte, indizierte Spalten vor
+(customer_id, supplier_id, status, doc_date; alembic revision
+``documents_generated_columns``). Listen blättern per Keyset-Cursor über
+(created_at, id), Speichern ist ein einzelnes INSERT ... ON CONFLICT.
 """
 
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import DateTime, bindparam, text
+from sqlalchemy.dialects.postgresql import JSONB
 from datetime import datetime
 import json
 import logging
+import uuid
+
+from app.infrastructure.repositories.search import decode_cursor, encode_cursor
 
 logger = logging.getLogger(__name__)
 
+# Filter key (JSON field name) -> generated column
+FILTER_COLUMNS = {
+    "status": "status",
+    "customerId": "customer_id",
+    "supplierId": "supplier_id",
+}
+
+_UPSERT = text("""
+    INSERT INTO documents (id, doc_type, doc_number, data, created_at, updated_at)
+    VALUES (:id, :doc_type, :doc_number, :data, :now, :now)
+    ON CONFLICT (doc_number) DO UPDATE
+        SET data = excluded.data, updated_at = excluded.updated_at
+        WHERE documents.doc_type = excluded.doc_type
+    RETURNING id
+""").bindparams(bindparam("data", type_=JSONB), bindparam("now", type_=DateTime(timezone=True)))
+
+
+def _where(doc_type: str, filters: Optional[Dict[str, Any]]) -> Tuple[List[str], Dict[str, Any]]:
+    """WHERE-Bedingungen über die generierten Spalten (``dateFrom``/``dateTo``: YYYY-MM-DD)."""
+    clauses = ["doc_type = :doc_type"]
+    params: Dict[str, Any] = {"doc_type": doc_type}
+    for key, value in (filters or {}).items():
+        if value is None:
+            continue
+        if key in FILTER_COLUMNS:
+            clauses.append(f"{FILTER_COLUMNS[key]} = :{key}")
+            params[key] = value
+        elif key == "dateFrom":
+            clauses.append("doc_date >= :dateFrom")
+            params[key] = value
+        elif key == "dateTo":
+            clauses.append("doc_date <= :dateTo")
+            params[key] = value
+    return clauses, params
+
+
+def _load(data: Any) -> dict:
+    # PostgreSQL JSONB wird bereits als dict zurückgegeben
+    return data if isinstance(data, dict) else json.loads(data)
+
 
 class DocumentRepository:
     """Repository für Dokument-Verwaltung"""
@@ -20,52 +69,25 @@ class DocumentRepository:
         self.db = db
     
     def save_document(self, doc_type: str, doc_number: str, data: dict) -> dict:
-        """Speichert oder aktualisiert ein Dokument"""
+        """Speichert oder aktualisiert ein Dokument (ein Upsert-Statement)"""
         try:
-            import uuid
-            
-            # Prüfe ob Dokument existiert
-            existing = self.db.execute(
-                text("""
-                    SELECT id, data FROM documents 
-                    WHERE doc_type = :doc_type AND doc_number = :doc_number
-                """),
-                {"doc_type": doc_type, "doc_number": doc_number}
-            ).fetchone()
-            
             # Stelle sicher, dass number im data enthalten ist
             data["number"] = doc_number
             data["type"] = doc_type
             
-            now = datetime.utcnow()
-            
-            if existing:
-                # Update
-                self.db.execute(
-                    text("""
-                        UPDATE documents 
-                        SET data = :data::jsonb, updated_at = :updated_at
-                        WHERE id = :id
-                    """),
-                    {"id": existing.id, "data": json.dumps(data), "updated_at": now}
-                )
-            else:
-                # Insert
-                doc_id = str(uuid.uuid4())
-                self.db.execute(
-                    text("""
-                        INSERT INTO documents (id, doc_type, doc_number, data, created_at, updated_at)
-                        VALUES (:id, :doc_type, :doc_number, :data::jsonb, :created_at, :updated_at)
-                    """),
-                    {
-                        "id": doc_id,
-                        "doc_type": doc_type,
-                        "doc_number": doc_number,
-                        "data": json.dumps(data),
-                        "created_at": now,
-                        "updated_at": now
-                    }
-                )
+            saved = self.db.execute(
+                _UPSERT,
+                {
+                    "id": str(uuid.uuid4()),
+                    "doc_type": doc_type,
+                    "doc_number": doc_number,
+                    "data": data,
+                    "now": datetime.utcnow(),
+                },
+            ).fetchone()
+            if saved is None:
+                # Nummer ist bereits von einem Dokument anderen Typs belegt
+                raise ValueError(f"Document number {doc_number} already used by another document type")
             
             self.db.commit()
             logger.info(f"Saved document: {doc_type}/{doc_number}")
@@ -103,33 +125,48 @@ class DocumentRepository:
         limit: int = 100,
         filters: Optional[Dict[str, Any]] = None
     ) -> List[dict]:
-        """Listet Dokumente eines Typs"""
-        try:
-            query = """
-                SELECT data FROM documents 
-                WHERE doc_type = :doc_type
-            """
-            params = {"doc_type": doc_type, "skip": skip, "limit": limit}
-            
-            # Filter hinzufügen falls vorhanden
-            if filters:
-                if "status" in filters:
-                    query += " AND data::jsonb->>'status' = :status"
-                    params["status"] = filters["status"]
-                if "customerId" in filters:
-                    query += " AND data::jsonb->>'customerId' = :customerId"
-                    params["customerId"] = filters["customerId"]
-            
-            query += " ORDER BY created_at DESC LIMIT :limit OFFSET :skip"
-            
-            results = self.db.execute(text(query), params).fetchall()
-            # PostgreSQL JSONB wird bereits als dict zurückgegeben
-            return [
-                row.data if isinstance(row.data, dict) else json.loads(row.data) 
-                for row in results
-            ]
-        except Exception as e:
-            raise
+        """Listet Dokumente eines Typs (OFFSET-Variante; für tiefe Seiten list_page verwenden)"""
+        clauses, params = _where(doc_type, filters)
+        params.update({"skip": skip, "limit": limit})
+        query = (
+            f"SELECT data FROM documents WHERE {' AND '.join(clauses)} "
+            "ORDER BY created_at DESC, id DESC LIMIT :limit OFFSET :skip"
+        )
+        return [_load(row.data) for row in self.db.execute(text(query), params)]
+    
+    def list_page(
+        self,
+        doc_type: str,
+        limit: int = 100,
+        filters: Optional[Dict[str, Any]] = None,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[dict], Optional[str]]:
+        """
+        Keyset-Seite der Dokumente eines Typs, neueste zuerst.
+        
+        Gibt die Dokumente und den Cursor der nächsten Seite zurück (None auf
+        der letzten Seite). Ungültige Cursor lösen ValueError aus.
+        """
+        clauses, params = _where(doc_type, filters)
+        if cursor:
+            created_at, last_id = decode_cursor(cursor, 2)
+            # Zeilenwert-Vergleich: wird als Bereich auf dem (…, created_at, id)-Index ausgewertet
+            clauses.append("(created_at, id) < (:cursor_at, :cursor_id)")
+            params.update({"cursor_at": datetime.fromisoformat(created_at), "cursor_id": last_id})
+        params["limit"] = limit + 1
+        query = text(
+            f"SELECT id, data, created_at FROM documents WHERE {' AND '.join(clauses)} "
+            "ORDER BY created_at DESC, id DESC LIMIT :limit"
+        ).columns(created_at=DateTime(timezone=True))
+        if cursor:
+            query = query.bindparams(bindparam("cursor_at", type_=DateTime(timezone=True)))
+        rows = self.db.execute(query, params).fetchall()
+        
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = encode_cursor(last.created_at.isoformat(), last.id)
+        return [_load(row.data) for row in rows[:limit]], next_cursor
     
     def delete_document(self, doc_type: str, doc_number: str) -> bool:
         """Löscht ein Dokument"""
@@ -150,14 +187,8 @@ class DocumentRepository:
     def count_documents(self, doc_type: str, filters: Optional[Dict[str, Any]] = None) -> int:
         """Zählt Dokumente eines Typs"""
         try:
-            query = "SELECT COUNT(*) FROM documents WHERE doc_type = :doc_type"
-            params = {"doc_type": doc_type}
-            
-            if filters:
-                if "status" in filters:
-                    query += " AND data::jsonb->>'status' = :status"
-                    params["status"] = filters["status"]
-            
+            clauses, params = _where(doc_type, filters)
+            query = f"SELECT COUNT(*) FROM documents WHERE {' AND '.join(clauses)}"
             result = self.db.execute(text(query), params).scalar()
             return result or 0
         except Exception as e:
@@ -19,7 +19,7 @@ from .models import (
 from .router_helpers import (
     get_repository, save_to_store, get_from_store, list_from_store, delete_from_store
 )
-from app.core.database import get_db
+from app.core.database import get_db, run_in_db_threadpool
 
 logger = logging.getLogger(__name__)
 
@@ -35,7 +35,7 @@ async def upsert_customer_inquiry(doc: CustomerInquiry, db: Session = Depends(ge
     try:
         repo = get_repository(db)
         # Status-Transition-Logik
-        existing = get_from_store("customer_inquiry", doc.number, repo)
+        existing = await run_in_db_threadpool(get_from_store, "customer_inquiry", doc.number, repo)
         if existing:
             old_status = existing.get("status", "OFFEN")
             new_status = doc.status
@@ -54,7 +54,7 @@ async def upsert_customer_inquiry(doc: CustomerInquiry, db: Session = Depends(ge
                     detail=f"Invalid status transition: {old_status} → {new_status}"
                 )
 
-        result = save_to_store("customer_inquiry", doc.number, doc.model_dump(), repo)
+        result = await run_in_db_threadpool(save_to_store, "customer_inquiry", doc.number, doc.model_dump(), repo)
         logger.info(f"Saved customer inquiry: {doc.number} (status: {doc.status})")
         return result
     except HTTPException:
@@ -81,7 +81,7 @@ async def upsert_sales_offer(doc: SalesOffer, db: Session = Depends(get_db)) ->
             doc_data["totalGross"] = doc_data["subtotalNet"] + doc_data["totalTax"]
 
         # Status-Transition-Logik
-        existing = get_from_store("sales_offer", doc.number, repo)
+        existing = await run_in_db_threadpool(get_from_store, "sales_offer", doc.number, repo)
         if existing:
             old_status = existing.get("status", "ENTWURF")
             new_status = doc.status
@@ -100,7 +100,7 @@ async def upsert_sales_offer(doc: SalesOffer, db: Session = Depends(get_db)) ->
                     detail=f"Invalid status transition: {old_status} → {new_status}"
                 )
 
-        result = save_to_store("sales_offer", doc.number, doc_data, repo)
+        result = await run_in_db_threadpool(save_to_store, "sales_offer", doc.number, doc_data, repo)
         logger.info(f"Saved sales offer: {doc.number} (status: {doc.status})")
         return result
     except HTTPException:
@@ -115,19 +115,19 @@ async def upsert_sales_order(doc: SalesOrder, db: Session = Depends(get_db)) ->
     """Erstellt oder aktualisiert Verkaufsauftrag"""
     try:
         repo = get_repository(db)
-        return save_to_store("sales_order", doc.number, doc.model_dump(), repo)
+        return await run_in_db_threadpool(save_to_store, "sales_order", doc.number, doc.model_dump(), repo)
     except Exception as e:
         logger.error(f"Failed to save sales order: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/sales_delivery")
-async def upsert_sales_delivery(doc: SalesDelivery) -> dict:
+async def upsert_sales_delivery(doc: SalesDelivery, db: Session = Depends(get_db)) -> dict:
     """Erstellt oder aktualisiert Lieferschein"""
     try:
         # Wird durch save_to_store ersetzt
         repo = get_repository(db)
-        save_to_store("sales_delivery", doc.number, doc.model_dump(), repo)
+        await run_in_db_threadpool(save_to_store, "sales_delivery", doc.number, doc.model_dump(), repo)
         logger.info(f"Saved sales delivery: {doc.number}")
         return {"ok": True, "number": doc.number}
     except Exception as e:
@@ -152,7 +152,7 @@ async def upsert_sales_invoice(doc: SalesInvoice, db: Session = Depends(get_db))
             doc_data["totalGross"] = doc_data["subtotalNet"] + doc_data["totalTax"]
 
         # Status-Transition-Logik
-        existing = get_from_store("sales_invoice", doc.number, repo)
+        existing = await run_in_db_threadpool(get_from_store, "sales_invoice", doc.number, repo)
         if existing:
             old_status = existing.get("status", "ENTWURF")
             new_status = doc.status
@@ -171,7 +171,7 @@ async def upsert_sales_invoice(doc: SalesInvoice, db: Session = Depends(get_db))
                     detail=f"Invalid status transition: {old_status} → {new_status}"
                 )
 
-        result = save_to_store("sales_invoice", doc.number, doc_data, repo)
+        result = await run_in_db_threadpool(save_to_store, "sales_invoice", doc.number, doc_data, repo)
         logger.info(f"Saved sales invoice: {doc.number} (status: {doc.status})")
         return result
     except HTTPException:
@@ -187,7 +187,7 @@ async def upsert_payment_received(doc: PaymentReceived, db: Session = Depends(ge
     try:
         repo = get_repository(db)
         # Status-Transition-Logik
-        existing = get_from_store("payment_received", doc.number, repo)
+        existing = await run_in_db_threadpool(get_from_store, "payment_received", doc.number, repo)
         if existing:
             old_status = existing.get("status", "EINGEGANGEN")
             new_status = doc.status
@@ -205,7 +205,7 @@ async def upsert_payment_received(doc: PaymentReceived, db: Session = Depends(ge
                     detail=f"Invalid status transition: {old_status} → {new_status}"
                 )
 
-        result = save_to_store("payment_received", doc.number, doc.model_dump(), repo)
+        result = await run_in_db_threadpool(save_to_store, "payment_received", doc.number, doc.model_dump(), repo)
         logger.info(f"Saved payment received: {doc.number} (status: {doc.status})")
         return result
     except HTTPException:
@@ -224,7 +224,7 @@ async def upsert_purchase_request(doc: PurchaseRequest, db: Session = Depends(ge
     try:
         repo = get_repository(db)
         # Status-Transition-Logik
-        existing = get_from_store("purchase_request", doc.number, repo)
+        existing = await run_in_db_threadpool(get_from_store, "purchase_request", doc.number, repo)
         if existing:
             old_status = existing.get("status", "OFFEN")
             new_status = doc.status
@@ -243,7 +243,7 @@ async def upsert_purchase_request(doc: PurchaseRequest, db: Session = Depends(ge
                     detail=f"Invalid status transition: {old_status} → {new_status}"
                 )
 
-        result = save_to_store("purchase_request", doc.number, doc.model_dump(), repo)
+        result = await run_in_db_threadpool(save_to_store, "purchase_request", doc.number, doc.model_dump(), repo)
         logger.info(f"Saved purchase request: {doc.number} (status: {doc.status})")
         return result
     except HTTPException:
@@ -270,7 +270,7 @@ async def upsert_purchase_offer(doc: PurchaseOffer, db: Session = Depends(get_db
             doc_data["totalGross"] = doc_data["subtotalNet"] + doc_data["totalTax"]
 
         # Status-Transition-Logik
-        existing = get_from_store("purchase_offer", doc.number, repo)
+        existing = await run_in_db_threadpool(get_from_store, "purchase_offer", doc.number, repo)
         if existing:
             old_status = existing.get("status", "ENTWURF")
             new_status = doc.status
@@ -289,7 +289,7 @@ async def upsert_purchase_offer(doc: PurchaseOffer, db: Session = Depends(get_db
                     detail=f"Invalid status transition: {old_status} → {new_status}"
                 )
 
-        result = save_to_store("purchase_offer", doc.number, doc_data, repo)
+        result = await run_in_db_threadpool(save_to_store, "purchase_offer", doc.number, doc_data, repo)
         logger.info(f"Saved purchase offer: {doc.number} (status: {doc.status})")
         return result
     except HTTPException:
@@ -316,7 +316,7 @@ async def upsert_purchase_order(doc: PurchaseOrder, db: Session = Depends(get_db
             doc_data["totalGross"] = doc_data["subtotalNet"] + doc_data["totalTax"]
 
         # Status-Transition-Logik
-        existing = get_from_store("purchase_order", doc.number, repo)
+        existing = await run_in_db_threadpool(get_from_store, "purchase_order", doc.number, repo)
         if existing:
             old_status = existing.get("status", "ENTWURF")
             new_status = doc.status
@@ -336,7 +336,7 @@ async def upsert_purchase_order(doc: PurchaseOrder, db: Session = Depends(get_db
                     detail=f"Invalid status transition: {old_status} → {new_status}"
                 )
 
-        result = save_to_store("purchase_order", doc.number, doc_data, repo)
+        result = await run_in_db_threadpool(save_to_store, "purchase_order", doc.number, doc_data, repo)
         logger.info(f"Saved purchase order: {doc.number} (status: {doc.status})")
         return result
     except HTTPException:
@@ -350,40 +350,32 @@ async def upsert_purchase_order(doc: PurchaseOrder, db: Session = Depends(get_db
 
 
 @router.get("/{doc_type}")
-async def list_documents(doc_type: str, skip: int = 0, limit: int = 100) -> dict:
-    """Holt Liste aller Belege eines Typs"""
+async def list_documents(
+    doc_type: str,
+    skip: int = Query(0, ge=0, description="Deprecated: cursor verwenden"),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="next_cursor der vorherigen Seite"),
+    status: Optional[str] = None,
+    customer_id: Optional[str] = Query(None, alias="customerId"),
+    supplier_id: Optional[str] = Query(None, alias="supplierId"),
+    date_from: Optional[str] = Query(None, alias="dateFrom", description="YYYY-MM-DD"),
+    date_to: Optional[str] = Query(None, alias="dateTo", description="YYYY-MM-DD"),
+    db: Session = Depends(get_db),
+) -> dict:
+    """Holt Liste der Belege eines Typs, neueste zuerst (Keyset-Pagination)"""
+    filters = {
+        key: value for key, value in {
+            "status": status,
+            "customerId": customer_id,
+            "supplierId": supplier_id,
+            "dateFrom": date_from,
+            "dateTo": date_to,
+        }.items() if value is not None
+    }
     try:
-        # Filtere nach Dokumenttyp
-        filtered_docs = []
-        for key, value in _DB.items():
-            # Prüfe ob Dokumentnummer dem Typ entspricht (z.B. "PO-" für purchase_order)
-            type_prefixes = {
-                "customer_inquiry": ["INQ-"],
-                "sales_offer": ["SO-", "ANG-"],
-                "sales_order": ["SO-"],
-                "sales_delivery": ["DL-"],
-                "sales_invoice": ["INV-"],
-                "payment_received": ["PAY-"],
-                "purchase_request": ["PR-"],
-                "purchase_offer": ["POF-"],
-                "purchase_order": ["PO-", "EK-"],
-            }
-            
-            prefixes = type_prefixes.get(doc_type, [])
-            if any(key.startswith(prefix) for prefix in prefixes) or doc_type in str(value.get("type", "")):
-                filtered_docs.append(value)
-        
-        # Pagination
-        total = len(filtered_docs)
-        paginated_docs = filtered_docs[skip:skip + limit]
-        
-        return {
-            "ok": True,
-            "data": paginated_docs,
-            "total": total,
-            "skip": skip,
-            "limit": limit
-        }
+        return await run_in_db_threadpool(list_from_store, doc_type, skip, limit, filters, get_repository(db), cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Failed to list documents: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -394,7 +386,7 @@ async def get_document(doc_type: str, doc_number: str, db: Session = Depends(get
     """Holt einzelnen Beleg nach Typ und Nummer"""
     try:
         repo = get_repository(db)
-        doc = get_from_store(doc_type, doc_number, repo)
+        doc = await run_in_db_threadpool(get_from_store, doc_type, doc_number, repo)
         if not doc:
             raise HTTPException(status_code=404, detail="Document not found")
         return {"ok": True, "data": doc}
@@ -410,7 +402,7 @@ async def update_document(doc_type: str, doc_number: str, doc: dict, db: Session
     """Aktualisiert einen Beleg"""
     try:
         repo = get_repository(db)
-        existing = get_from_store(doc_type, doc_number, repo)
+        existing = await run_in_db_threadpool(get_from_store, doc_type, doc_number, repo)
         if not existing:
             raise HTTPException(status_code=404, detail="Document not found")
         
@@ -425,7 +417,7 @@ async def update_document(doc_type: str, doc_number: str, doc: dict, db: Session
         
         # Aktualisiere Dokument
         updated_data = {**existing, **doc, "number": doc_number}
-        result = save_to_store(doc_type, doc_number, updated_data, repo)
+        result = await run_in_db_threadpool(save_to_store, doc_type, doc_number, updated_data, repo)
         logger.info(f"Updated document: {doc_number}")
         return result
     except HTTPException:
@@ -440,7 +432,7 @@ async def delete_document(doc_type: str, doc_number: str, db: Session = Depends(
     """Löscht einen Beleg"""
     try:
         repo = get_repository(db)
-        doc = get_from_store(doc_type, doc_number, repo)
+        doc = await run_in_db_threadpool(get_from_store, doc_type, doc_number, repo)
         if not doc:
             raise HTTPException(status_code=404, detail="Document not found")
         
@@ -455,7 +447,7 @@ async def delete_document(doc_type: str, doc_number: str, db: Session = Depends(
                 detail=f"Cannot delete document with final status: {status}"
             )
         
-        deleted = delete_from_store(doc_type, doc_number, repo)
+        deleted = await run_in_db_threadpool(delete_from_store, doc_type, doc_number, repo)
         if not deleted:
             raise HTTPException(status_code=404, detail="Document not found")
         
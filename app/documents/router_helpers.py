@@ -53,25 +53,58 @@ def get_from_store(doc_type: str, doc_number: str, repo: Optional[DocumentReposi
     return _DB.get(doc_number)
 
 
+def _matches(doc: dict, filters: Optional[Dict]) -> bool:
+    """In-Memory-Gegenstück zu den Filtern des Repositories"""
+    for key, value in (filters or {}).items():
+        date = str(doc.get("date") or "")[:10]
+        if key == "dateFrom":
+            if date < value:
+                return False
+        elif key == "dateTo":
+            if date > value:
+                return False
+        elif doc.get(key) != value:
+            return False
+    return True
+
+
 def list_from_store(
     doc_type: str, 
     skip: int = 0, 
     limit: int = 100,
     filters: Optional[Dict] = None,
-    repo: Optional[DocumentRepository] = None
+    repo: Optional[DocumentRepository] = None,
+    cursor: Optional[str] = None
 ) -> Dict:
-    """Listet Dokumente aus DB oder In-Memory Store"""
+    """
+    Listet Dokumente aus DB oder In-Memory Store
+
+    In der DB wird per Keyset-Cursor geblättert (``next_cursor`` der Antwort
+    als ``cursor`` übergeben); ``skip`` bleibt für bestehende Aufrufer.
+    ``total`` wird nur für die erste Seite gezählt.
+    """
     if repo:
         try:
-            docs = repo.list_documents(doc_type, skip, limit, filters)
-            total = repo.count_documents(doc_type, filters)
+            if skip and not cursor:
+                docs, next_cursor = repo.list_documents(doc_type, skip, limit, filters), None
+            else:
+                docs, next_cursor = repo.list_page(doc_type, limit, filters, cursor)
+            if cursor:
+                total = None
+            elif next_cursor is None and not skip:
+                total = len(docs)
+            else:
+                total = repo.count_documents(doc_type, filters)
             return {
                 "ok": True,
                 "data": docs,
                 "total": total,
                 "skip": skip,
-                "limit": limit
+                "limit": limit,
+                "next_cursor": next_cursor
             }
+        except ValueError:
+            raise
         except Exception as e:
             logger.warning(f"DB list failed, using in-memory: {e}")
     
@@ -91,8 +124,8 @@ def list_from_store(
         }
         
         prefixes = type_prefixes.get(doc_type, [])
-        if any(key.startswith(prefix) for prefix in prefixes):
-            if not filters or all(value.get(k) == v for k, v in filters.items()):
+        if any(key.startswith(prefix) for prefix in prefixes) or doc_type in str(value.get("type", "")):
+            if _matches(value, filters):
                 filtered_docs.append(value)
     
     total = len(filtered_docs)
@@ -772,36 +772,32 @@ async def scrape_competitor_data(
     effective_tenant = tenant_id or DEFAULT_TENANT
 
     try:
-        scraped_data = []
-
-        for url in product_urls[:20]:  # Limit to 20 URLs per request
-            product_data = await competitor_monitor.scrape_product_data(url)
-            if product_data:
-                scraped_data.append({
-                    "shop_name": product_data.shop_name,
-                    "product_url": product_data.product_url,
-                    "product_name": product_data.product_name,
-                    "price": product_data.price,
-                    "currency": product_data.currency,
-                    "brand": product_data.brand,
-                    "gtin": product_data.gtin,
-                    "images": [
-                        {
-                            "url": img.url,
-                            "hash": img.hash,
-                            "width": img.width,
-                            "height": img.height
-                        } for img in product_data.images
-                    ],
-                    "scraped_at": product_data.scraped_at.isoformat() if product_data.scraped_at else None
-                })
+        prices = await competitor_monitor.scrape_products(product_urls[:20])  # Limit to 20 URLs per request
+        scraped_data = [
+            {
+                "shop_name": product_data.shop_name,
+                "product_url": product_data.product_url,
+                "product_name": product_data.product_name,
+                "price": product_data.price,
+                "currency": product_data.currency,
+                "brand": product_data.brand,
+                "gtin": product_data.gtin,
+                "images": [
+                    {
+                        "url": img.url,
+                        "hash": img.hash,
+                        "width": img.width,
+                        "height": img.height
+                    } for img in product_data.images
+                ],
+                "scraped_at": product_data.scraped_at.isoformat() if product_data.scraped_at else None
+            }
+            for product_data in prices
+        ]
 
         # Save to price history
-        if scraped_data:
-            competitor_monitor.save_price_history([
-                competitor_monitor._parse_scraped_data(item) for item in scraped_data
-                if competitor_monitor._parse_scraped_data(item)
-            ])
+        if prices:
+            competitor_monitor.save_price_history(prices)
 
         return {
             "scraped_count": len(scraped_data),
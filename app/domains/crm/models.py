@@ -62,8 +62,8 @@ class Customer(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
-    contacts = relationship("Contact", back_populates="customer", cascade="all, delete-orphan")
-    activities = relationship("Activity", back_populates="customer", cascade="all, delete-orphan")
+    contacts = relationship("app.domains.crm.models.Contact", back_populates="customer", cascade="all, delete-orphan")
+    activities = relationship("app.domains.crm.models.Activity", back_populates="customer", cascade="all, delete-orphan")
 
 
 class Contact(Base):
@@ -103,7 +103,7 @@ class Contact(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
-    customer = relationship("Customer", back_populates="contacts")
+    customer = relationship("app.domains.crm.models.Customer", back_populates="contacts")
 
 
 class Activity(Base):
@@ -138,7 +138,8 @@ class Activity(Base):
     longitude = Column(DECIMAL(11, 8))
 
     # Additional data
-    metadata = Column(JSONB)  # Flexible storage for type-specific data
+    # "metadata" is reserved by the declarative base, hence the attribute name
+    metadata_ = Column("metadata", JSONB)  # Flexible storage for type-specific data
 
     # Metadata
     tenant_id = Column(String, ForeignKey("domain_shared.tenants.id"), nullable=False)
@@ -146,7 +147,7 @@ class Activity(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
-    customer = relationship("Customer", back_populates="activities")
+    customer = relationship("app.domains.crm.models.Customer", back_populates="activities")
 
 
 class VisitReport(Base):
@@ -197,7 +198,7 @@ class VisitReport(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
-    customer = relationship("Customer")
+    customer = relationship("app.domains.crm.models.Customer")
 
 
 class Opportunity(Base):
@@ -240,4 +241,4 @@ class Opportunity(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
-    customer = relationship("Customer")
\ No newline at end of file
+    customer = relationship("app.domains.crm.models.Customer")
\ No newline at end of file
@@ -1,17 +1,20 @@
 """
 CRM Daily Report Service
 Generates automated daily reports for field sales activities
+
+All reps are reported from a fixed set of queries per chunk of reps (see
+``report_data``): activities and visits come pre-joined with customer and
+contact names, totals are grouped in SQL.
 """
 
 import logging
 from datetime import datetime, time, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Callable, Sequence
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func, desc
 
-from ....core.database import get_db
-from ....infrastructure.models import User
-from .models import Activity, VisitReport, Customer, Contact
+from ....core.database import get_db, SessionLocal
+from . import report_data
+from .report_data import customer_name
 
 logger = logging.getLogger(__name__)
 
@@ -19,8 +22,10 @@ logger = logging.getLogger(__name__)
 class DailyReportService:
     """Service for generating automated daily reports"""
 
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, session_factory: Optional[Callable[[], Session]] = None):
         self.db = db
+        # Optional: lets chunks of reps be generated concurrently, one session each
+        self.session_factory = session_factory
 
     def generate_daily_reports(self, report_date: Optional[datetime] = None) -> Dict[str, Any]:
         """
@@ -35,83 +40,70 @@ class DailyReportService:
         if report_date is None:
             report_date = datetime.now() - timedelta(days=1)
 
-        # Get all active sales reps
-        sales_reps = self.db.query(User).filter(
-            User.is_active == True,
-            User.role.in_(['sales', 'field_sales', 'manager'])
-        ).all()
+        sales_reps = {rep.id: rep for rep in report_data.load_sales_reps(self.db)}
+        start_date = datetime.combine(report_date.date(), time.min)
+        end_date = datetime.combine(report_date.date(), time.max)
+
+        def build(db: Session, rep_ids: Sequence[str]) -> Dict[str, Any]:
+            return self._generate_chunk_reports(db, rep_ids, start_date, end_date)
+
+        data = report_data.build_in_chunks(self.db, list(sales_reps), build, self.session_factory)
+
+        return {
+            rep_id: {
+                'sales_rep': sales_reps[rep_id],
+                'report_date': report_date.date(),
+                'data': report
+            }
+            for rep_id, report in data.items()
+        }
+
+    def _generate_chunk_reports(self, db: Session, rep_ids: Sequence[str],
+                                start_date: datetime, end_date: datetime) -> Dict[str, Dict[str, Any]]:
+        """Generate the reports of a group of reps from four queries"""
+        activities = report_data.load_activities(db, rep_ids, start_date, end_date)
+        visits = report_data.load_visits(db, rep_ids, start_date, end_date)
+        activity_totals = report_data.activity_totals(db, rep_ids, start_date, end_date)
+        visit_totals = report_data.visit_totals(db, rep_ids, start_date, end_date)
 
         reports = {}
-        for rep in sales_reps:
+        for rep_id in rep_ids:
+            if rep_id not in activities and rep_id not in visits:
+                continue
             try:
-                report = self._generate_rep_report(rep.id, report_date)
-                if report and (report['activities'] or report['visits']):
-                    reports[rep.id] = {
-                        'sales_rep': rep,
-                        'report_date': report_date.date(),
-                        'data': report
-                    }
+                reports[rep_id] = self._generate_rep_report(
+                    activities.get(rep_id, []),
+                    visits.get(rep_id, []),
+                    activity_totals.get(rep_id),
+                    visit_totals.get(rep_id),
+                )
             except Exception as e:
-                logger.error(f"Error generating report for {rep.username}: {e}")
-                continue
-
+                logger.error(f"Error generating report for {rep_id}: {e}")
         return reports
 
-    def _generate_rep_report(self, sales_rep_id: str, report_date: datetime) -> Optional[Dict[str, Any]]:
-        """Generate report for a specific sales rep"""
-
-        # Date range for the report (full day)
-        start_date = datetime.combine(report_date.date(), time.min)
-        end_date = datetime.combine(report_date.date(), time.max)
-
-        # Get activities for the day
-        activities = self.db.query(Activity).filter(
-            and_(
-                Activity.assigned_to == sales_rep_id,
-                Activity.activity_date >= start_date,
-                Activity.activity_date <= end_date,
-                Activity.status == 'completed'
-            )
-        ).order_by(Activity.activity_date).all()
-
-        # Get visit reports for the day
-        visits = self.db.query(VisitReport).filter(
-            and_(
-                VisitReport.sales_rep == sales_rep_id,
-                VisitReport.visit_date >= start_date,
-                VisitReport.visit_date <= end_date
-            )
-        ).order_by(VisitReport.visit_date).all()
-
-        if not activities and not visits:
-            return None
-
-        # Aggregate data
-        report_data = {
+    def _generate_rep_report(self, activities: List[Any], visits: List[Any],
+                             activity_totals: Optional[Dict[str, Any]],
+                             visit_totals: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Generate report for a specific sales rep from pre-loaded rows"""
+        return {
             'activities': self._format_activities(activities),
             'visits': self._format_visits(visits),
-            'summary': self._calculate_summary(activities, visits),
+            'summary': self._calculate_summary(visits, activity_totals, visit_totals),
             'route': self._calculate_route(visits),
             'follow_ups': self._extract_follow_ups(activities, visits)
         }
 
-        return report_data
-
-    def _format_activities(self, activities: List[Activity]) -> List[Dict[str, Any]]:
+    def _format_activities(self, activities: List[Any]) -> List[Dict[str, Any]]:
         """Format activities for report"""
         formatted = []
 
-        for activity in activities:
-            customer = self.db.query(Customer).filter(Customer.id == activity.customer_id).first()
-            contact = None
-            if activity.contact_id:
-                contact = self.db.query(Contact).filter(Contact.id == activity.contact_id).first()
-
+        for row in activities:
+            activity = row.Activity
             formatted.append({
                 'time': activity.activity_date.strftime('%H:%M'),
                 'type': activity.activity_type,
-                'customer': customer.company_name if customer else 'Unbekannt',
-                'contact': f"{contact.first_name} {contact.last_name}" if contact else None,
+                'customer': customer_name(row),
+                'contact': row.contact_name,
                 'subject': activity.subject,
                 'description': activity.description,
                 'duration': activity.duration_minutes,
@@ -121,20 +113,16 @@ class DailyReportService:
 
         return formatted
 
-    def _format_visits(self, visits: List[VisitReport]) -> List[Dict[str, Any]]:
+    def _format_visits(self, visits: List[Any]) -> List[Dict[str, Any]]:
         """Format visit reports for report"""
         formatted = []
 
-        for visit in visits:
-            customer = self.db.query(Customer).filter(Customer.id == visit.customer_id).first()
-            contact = None
-            if visit.contact_person:
-                contact = self.db.query(Contact).filter(Contact.id == visit.contact_person).first()
-
+        for row in visits:
+            visit = row.VisitReport
             formatted.append({
                 'time': visit.visit_date.strftime('%H:%M'),
-                'customer': customer.company_name if customer else 'Unbekannt',
-                'contact': f"{contact.first_name} {contact.last_name}" if contact else None,
+                'customer': customer_name(row),
+                'contact': row.contact_name,
                 'location': visit.location,
                 'kilometers': float(visit.kilometers_driven) if visit.kilometers_driven else 0,
                 'main_topics': visit.main_topics or [],
@@ -149,55 +137,45 @@ class DailyReportService:
 
         return formatted
 
-    def _calculate_summary(self, activities: List[Activity], visits: List[VisitReport]) -> Dict[str, Any]:
-        """Calculate summary statistics"""
-        total_activities = len(activities)
-        total_visits = len(visits)
-
-        # Calculate total time spent
-        total_minutes = sum(activity.duration_minutes or 0 for activity in activities)
-        total_kilometers = sum(float(visit.kilometers_driven or 0) for visit in visits)
+    def _calculate_summary(self, visits: List[Any], activity_totals: Optional[Dict[str, Any]],
+                           visit_totals: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Calculate summary statistics (counts and sums come from SQL)"""
+        activity_totals = activity_totals or {'count': 0, 'minutes': 0, 'types': {}}
+        visit_totals = visit_totals or {'count': 0, 'kilometers': 0.0}
 
-        # Count different activity types
-        activity_types = {}
-        for activity in activities:
-            activity_types[activity.activity_type] = activity_types.get(activity.activity_type, 0) + 1
-
-        # Extract main topics from visits
+        # Topics, products, orders and quotes are JSON arrays on the visit rows
         all_topics = []
         all_products = []
-        for visit in visits:
-            if visit.main_topics:
-                all_topics.extend(visit.main_topics)
-            if visit.products_discussed:
-                all_products.extend(visit.products_discussed)
-
-        # Count orders and quotes
-        total_orders = sum(len(visit.orders_placed or []) for visit in visits)
-        total_quotes = sum(len(visit.quotes_created or []) for visit in visits)
+        total_orders = 0
+        total_quotes = 0
+        for row in visits:
+            visit = row.VisitReport
+            all_topics.extend(visit.main_topics or [])
+            all_products.extend(visit.products_discussed or [])
+            total_orders += len(visit.orders_placed or [])
+            total_quotes += len(visit.quotes_created or [])
 
         return {
-            'total_activities': total_activities,
-            'total_visits': total_visits,
-            'total_time_minutes': total_minutes,
-            'total_kilometers': total_kilometers,
-            'activity_types': activity_types,
+            'total_activities': activity_totals['count'],
+            'total_visits': visit_totals['count'],
+            'total_time_minutes': activity_totals['minutes'],
+            'total_kilometers': visit_totals['kilometers'],
+            'activity_types': dict(activity_totals['types']),
             'main_topics': list(set(all_topics)),
             'products_discussed': list(set(all_products)),
             'orders_placed': total_orders,
             'quotes_created': total_quotes
         }
 
-    def _calculate_route(self, visits: List[VisitReport]) -> List[Dict[str, Any]]:
+    def _calculate_route(self, visits: List[Any]) -> List[Dict[str, Any]]:
         """Calculate the route taken during visits"""
         route = []
 
-        for visit in visits:
-            customer = self.db.query(Customer).filter(Customer.id == visit.customer_id).first()
-
+        for row in visits:
+            visit = row.VisitReport
             route.append({
                 'time': visit.visit_date.strftime('%H:%M'),
-                'customer': customer.company_name if customer else 'Unbekannt',
+                'customer': customer_name(row),
                 'location': visit.location,
                 'latitude': float(visit.latitude) if visit.latitude else None,
                 'longitude': float(visit.longitude) if visit.longitude else None,
@@ -206,38 +184,36 @@ class DailyReportService:
 
         return route
 
-    def _extract_follow_ups(self, activities: List[Activity], visits: List[VisitReport]) -> List[Dict[str, Any]]:
+    def _extract_follow_ups(self, activities: List[Any], visits: List[Any]) -> List[Dict[str, Any]]:
         """Extract all follow-up actions"""
         follow_ups = []
 
         # From activities
-        for activity in activities:
+        for row in activities:
+            activity = row.Activity
             if activity.next_action_description and activity.next_action_date:
-                customer = self.db.query(Customer).filter(Customer.id == activity.customer_id).first()
                 follow_ups.append({
                     'date': activity.next_action_date.isoformat(),
-                    'customer': customer.company_name if customer else 'Unbekannt',
+                    'customer': customer_name(row),
                     'action': activity.next_action_description,
                     'source': 'activity'
                 })
 
         # From visits
-        for visit in visits:
-            if visit.follow_up_actions:
-                customer = self.db.query(Customer).filter(Customer.id == visit.customer_id).first()
-                for action in visit.follow_up_actions:
-                    follow_ups.append({
-                        'date': action.get('due_date'),
-                        'customer': customer.company_name if customer else 'Unbekannt',
-                        'action': action.get('description'),
-                        'source': 'visit'
-                    })
+        for row in visits:
+            visit = row.VisitReport
+            for action in visit.follow_up_actions or []:
+                follow_ups.append({
+                    'date': action.get('due_date'),
+                    'customer': customer_name(row),
+                    'action': action.get('description'),
+                    'source': 'visit'
+                })
 
             if visit.next_visit_date:
-                customer = self.db.query(Customer).filter(Customer.id == visit.customer_id).first()
                 follow_ups.append({
                     'date': visit.next_visit_date.isoformat(),
-                    'customer': customer.company_name if customer else 'Unbekannt',
+                    'customer': customer_name(row),
                     'action': 'Nächster Besuch',
                     'source': 'visit'
                 })
@@ -372,25 +348,25 @@ class DailyReportService:
         """
         results = {}
 
-        for rep_id, report_data in reports.items():
+        for rep_id, rep_report in reports.items():
             try:
                 # Generate markdown report
-                markdown_report = self.format_report_markdown(report_data)
+                markdown_report = self.format_report_markdown(rep_report)
 
                 # Here you would integrate with your notification/email service
                 # For now, we'll just log the report
-                logger.info(f"Daily report for {report_data['sales_rep'].username}:")
+                logger.info(f"Daily report for {rep_report['sales_rep'].username}:")
                 logger.info(markdown_report)
 
                 # TODO: Send via email, Teams, Telegram, etc.
-                # self.email_service.send_report(report_data['sales_rep'].email, markdown_report)
+                # self.email_service.send_report(rep_report['sales_rep'].email, markdown_report)
                 # self.notification_service.send_to_management(markdown_report)
 
                 results[rep_id] = {
                     'success': True,
                     'report_length': len(markdown_report),
-                    'activities_count': len(report_data['data']['activities']),
-                    'visits_count': len(report_data['data']['visits'])
+                    'activities_count': len(rep_report['data']['activities']),
+                    'visits_count': len(rep_report['data']['visits'])
                 }
 
             except Exception as e:
@@ -409,7 +385,7 @@ def generate_daily_reports():
     db = next(get_db())
 
     try:
-        service = DailyReportService(db)
+        service = DailyReportService(db, session_factory=SessionLocal)
         reports = service.generate_daily_reports()
 
         if reports:
@@ -0,0 +1,229 @@
+"""
+CRM Report Data
+Set-based loaders for the daily and weekly sales reports. Activities and
+visits of a group of reps are read together with customer and contact names
+in one joined query each, counts and sums are grouped in SQL, so the number
+of statements per report run depends on the number of rep chunks, never on
+the number of activities or visits.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import distinct, func, or_
+from sqlalchemy.orm import Session
+
+from ....infrastructure.models import User
+from ..models import Activity, Contact, Customer, VisitReport
+
+SALES_ROLES = ("sales", "field_sales", "manager")
+
+# Reps per chunk (one set of queries each) and chunks generated in parallel
+REP_CHUNK_SIZE = 100
+REPORT_WORKERS = 4
+
+UNKNOWN_CUSTOMER = "Unbekannt"
+
+
+def load_sales_reps(db: Session) -> List[User]:
+    """Active users with a sales role (``roles`` is a JSON array stored as text)."""
+    return db.query(User).filter(
+        User.is_active == True,  # noqa: E712
+        or_(*[User.roles.like(f'%"{role}"%') for role in SALES_ROLES]),
+    ).order_by(User.id).all()
+
+
+def _contact_name():
+    return (Contact.first_name + " " + Contact.last_name).label("contact_name")
+
+
+def load_activities(
+    db: Session, rep_ids: Sequence[str], start: datetime, end: datetime
+) -> Dict[str, List[Any]]:
+    """Completed activities per rep, ordered by time, with ``customer_name`` and ``contact_name``."""
+    rows = db.query(
+        Activity,
+        Customer.company_name.label("customer_name"),
+        _contact_name(),
+    ).outerjoin(
+        Customer, Customer.id == Activity.customer_id
+    ).outerjoin(
+        Contact, Contact.id == Activity.contact_id
+    ).filter(
+        Activity.assigned_to.in_(rep_ids),
+        Activity.activity_date >= start,
+        Activity.activity_date <= end,
+        Activity.status == "completed",
+    ).order_by(Activity.assigned_to, Activity.activity_date).all()
+
+    by_rep: Dict[str, List[Any]] = {}
+    for row in rows:
+        by_rep.setdefault(row.Activity.assigned_to, []).append(row)
+    return by_rep
+
+
+def load_visits(
+    db: Session, rep_ids: Sequence[str], start: datetime, end: datetime
+) -> Dict[str, List[Any]]:
+    """Visit reports per rep, ordered by time, with ``customer_name`` and ``contact_name``."""
+    rows = db.query(
+        VisitReport,
+        Customer.company_name.label("customer_name"),
+        _contact_name(),
+    ).outerjoin(
+        Customer, Customer.id == VisitReport.customer_id
+    ).outerjoin(
+        Contact, Contact.id == VisitReport.contact_person
+    ).filter(
+        VisitReport.sales_rep.in_(rep_ids),
+        VisitReport.visit_date >= start,
+        VisitReport.visit_date <= end,
+    ).order_by(VisitReport.sales_rep, VisitReport.visit_date).all()
+
+    by_rep: Dict[str, List[Any]] = {}
+    for row in rows:
+        by_rep.setdefault(row.VisitReport.sales_rep, []).append(row)
+    return by_rep
+
+
+def activity_totals(
+    db: Session, rep_ids: Sequence[str], start: datetime, end: datetime
+) -> Dict[str, Dict[str, Any]]:
+    """Completed activity count, minutes and count per type for each rep."""
+    rows = db.query(
+        Activity.assigned_to,
+        Activity.activity_type,
+        func.count(Activity.id),
+        func.coalesce(func.sum(Activity.duration_minutes), 0),
+    ).filter(
+        Activity.assigned_to.in_(rep_ids),
+        Activity.activity_date >= start,
+        Activity.activity_date <= end,
+        Activity.status == "completed",
+    ).group_by(Activity.assigned_to, Activity.activity_type).all()
+
+    totals: Dict[str, Dict[str, Any]] = {}
+    for rep_id, activity_type, count, minutes in rows:
+        rep = totals.setdefault(rep_id, {"count": 0, "minutes": 0, "types": {}})
+        rep["count"] += count
+        rep["minutes"] += int(minutes or 0)
+        rep["types"][activity_type] = count
+    return totals
+
+
+def visit_totals(
+    db: Session, rep_ids: Sequence[str], start: datetime, end: datetime
+) -> Dict[str, Dict[str, Any]]:
+    """Visit count, kilometers and distinct customers for each rep."""
+    rows = db.query(
+        VisitReport.sales_rep,
+        func.count(VisitReport.id),
+        func.coalesce(func.sum(VisitReport.kilometers_driven), 0),
+        func.count(distinct(VisitReport.customer_id)),
+    ).filter(
+        VisitReport.sales_rep.in_(rep_ids),
+        VisitReport.visit_date >= start,
+        VisitReport.visit_date <= end,
+    ).group_by(VisitReport.sales_rep).all()
+
+    return {
+        rep_id: {"count": count, "kilometers": float(kilometers or 0), "customers": customers}
+        for rep_id, count, kilometers, customers in rows
+    }
+
+
+def _as_date(value) -> date:
+    # PostgreSQL returns a date, SQLite an ISO string
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def daily_totals(
+    db: Session, rep_ids: Sequence[str], start: datetime, end: datetime
+) -> Dict[str, Dict[date, Dict[str, Any]]]:
+    """Activities, minutes, visits and kilometers per rep and calendar day."""
+    activity_day = func.date(Activity.activity_date)
+    visit_day = func.date(VisitReport.visit_date)
+    activity_rows = db.query(
+        Activity.assigned_to,
+        activity_day,
+        func.count(Activity.id),
+        func.coalesce(func.sum(Activity.duration_minutes), 0),
+    ).filter(
+        Activity.assigned_to.in_(rep_ids),
+        Activity.activity_date >= start,
+        Activity.activity_date <= end,
+        Activity.status == "completed",
+    ).group_by(Activity.assigned_to, activity_day).all()
+    visit_rows = db.query(
+        VisitReport.sales_rep,
+        visit_day,
+        func.count(VisitReport.id),
+        func.coalesce(func.sum(VisitReport.kilometers_driven), 0),
+    ).filter(
+        VisitReport.sales_rep.in_(rep_ids),
+        VisitReport.visit_date >= start,
+        VisitReport.visit_date <= end,
+    ).group_by(VisitReport.sales_rep, visit_day).all()
+
+    def _day(rep_id, value) -> Dict[str, Any]:
+        days = totals.setdefault(rep_id, {})
+        return days.setdefault(_as_date(value), {"activities": 0, "time_minutes": 0, "visits": 0, "kilometers": 0.0})
+
+    totals: Dict[str, Dict[date, Dict[str, Any]]] = {}
+    for rep_id, day, count, minutes in activity_rows:
+        stats = _day(rep_id, day)
+        stats["activities"] = count
+        stats["time_minutes"] = int(minutes or 0)
+    for rep_id, day, count, kilometers in visit_rows:
+        stats = _day(rep_id, day)
+        stats["visits"] = count
+        stats["kilometers"] = float(kilometers or 0)
+    return totals
+
+
+def _chunks(items: Sequence[str], size: int) -> Iterable[Sequence[str]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def build_in_chunks(
+    db: Session,
+    rep_ids: Sequence[str],
+    build: Callable[[Session, Sequence[str]], Dict[str, Any]],
+    session_factory: Optional[Callable[[], Session]] = None,
+    chunk_size: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Run ``build(session, rep_ids)`` per chunk of reps and merge the results.
+
+    With a ``session_factory`` the chunks run on a thread pool, each with its
+    own session; otherwise they run one after another on ``db``.
+    """
+    chunks = list(_chunks(list(rep_ids), chunk_size or REP_CHUNK_SIZE))
+    results: Dict[str, Any] = {}
+    if session_factory is None or len(chunks) < 2:
+        for chunk in chunks:
+            results.update(build(db, chunk))
+        return results
+
+    def _run(chunk: Sequence[str]) -> Dict[str, Any]:
+        session = session_factory()
+        try:
+            return build(session, chunk)
+        finally:
+            session.close()
+
+    with ThreadPoolExecutor(max_workers=workers or REPORT_WORKERS) as pool:
+        for partial in pool.map(_run, chunks):
+            results.update(partial)
+    return results
+
+
+def customer_name(row) -> str:
+    return row.customer_name or UNKNOWN_CUSTOMER
@@ -1,22 +1,32 @@
 """
 CRM Weekly Report Service
 Generates automated weekly reports for sales performance and trends
+
+Metrics, the daily breakdown and the previous week comparison are grouped in
+SQL per chunk of reps (see ``report_data``); only the visit rows are loaded,
+pre-joined with customer names, for feedback and order/quote counts.
 """
 
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from datetime import datetime, time, timedelta
+from typing import Dict, List, Any, Optional, Callable, Sequence
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func, desc, extract
+
+from . import report_data
+from .report_data import customer_name
 
 logger = logging.getLogger(__name__)
 
+POSITIVE_FEEDBACK_WORDS = ('gut', 'zufrieden', 'super', 'exzellent')
+
 
 class WeeklyReportService:
     """Service for generating automated weekly reports"""
 
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, session_factory: Optional[Callable[[], Session]] = None):
         self.db = db
+        # Optional: lets chunks of reps be generated concurrently, one session each
+        self.session_factory = session_factory
 
     def generate_weekly_reports(self, week_start: Optional[datetime] = None) -> Dict[str, Any]:
         """
@@ -34,114 +44,114 @@ class WeeklyReportService:
             days_since_monday = today.weekday()  # 0 = Monday, 6 = Sunday
             week_start = today - timedelta(days=days_since_monday + 7)  # Last Monday
 
-        week_end = week_start + timedelta(days=6)
+        week_start = datetime.combine(week_start.date(), time.min)
+        week_end = datetime.combine((week_start + timedelta(days=6)).date(), time.max)
+
+        sales_reps = {rep.id: rep for rep in report_data.load_sales_reps(self.db)}
 
-        # Get all active sales reps
-        sales_reps = self.db.query(self.db.query().filter(
-            and_(
-                self.db.query().c.is_active == True,
-                self.db.query().c.role.in_(['sales', 'field_sales', 'manager'])
-            )
-        )).all()
+        def build(db: Session, rep_ids: Sequence[str]) -> Dict[str, Any]:
+            return self._generate_chunk_reports(db, rep_ids, week_start, week_end)
+
+        data = report_data.build_in_chunks(self.db, list(sales_reps), build, self.session_factory)
+
+        return {
+            rep_id: {
+                'sales_rep': sales_reps[rep_id],
+                'week_start': week_start.date(),
+                'week_end': week_end.date(),
+                'data': report
+            }
+            for rep_id, report in data.items()
+        }
+
+    def _generate_chunk_reports(self, db: Session, rep_ids: Sequence[str],
+                                week_start: datetime, week_end: datetime) -> Dict[str, Dict[str, Any]]:
+        """Generate the weekly reports of a group of reps from a fixed set of queries"""
+        prev_start = week_start - timedelta(days=7)
+        prev_end = week_end - timedelta(days=7)
+
+        activity_totals = report_data.activity_totals(db, rep_ids, week_start, week_end)
+        visit_totals = report_data.visit_totals(db, rep_ids, week_start, week_end)
+        if not activity_totals and not visit_totals:
+            return {}
+        visits = report_data.load_visits(db, rep_ids, week_start, week_end)
+        daily = report_data.daily_totals(db, rep_ids, week_start, week_end)
+        prev_activities = report_data.activity_totals(db, rep_ids, prev_start, prev_end)
+        prev_visits = report_data.visit_totals(db, rep_ids, prev_start, prev_end)
 
         reports = {}
-        for rep in sales_reps:
+        for rep_id in rep_ids:
+            if rep_id not in activity_totals and rep_id not in visit_totals:
+                continue
             try:
-                report = self._generate_rep_weekly_report(rep.id, week_start, week_end)
-                if report:
-                    reports[rep.id] = {
-                        'sales_rep': rep,
-                        'week_start': week_start.date(),
-                        'week_end': week_end.date(),
-                        'data': report
-                    }
+                reports[rep_id] = self._generate_rep_weekly_report(
+                    activity_totals.get(rep_id, {'count': 0, 'minutes': 0, 'types': {}}),
+                    visit_totals.get(rep_id, {'count': 0, 'kilometers': 0.0, 'customers': 0}),
+                    visits.get(rep_id, []),
+                    daily.get(rep_id, {}),
+                    prev_activities.get(rep_id, {}).get('count', 0),
+                    prev_visits.get(rep_id, {}).get('count', 0),
+                    week_start,
+                    week_end,
+                )
             except Exception as e:
-                logger.error(f"Error generating weekly report for {rep.username}: {e}")
-                continue
-
+                logger.error(f"Error generating weekly report for {rep_id}: {e}")
         return reports
 
-    def _generate_rep_weekly_report(self, sales_rep_id: str, week_start: datetime, week_end: datetime) -> Optional[Dict[str, Any]]:
-        """Generate weekly report for a specific sales rep"""
-
-        # Get activities for the week
-        activities = self.db.query(self.db.query().filter(
-            and_(
-                self.db.query().c.assigned_to == sales_rep_id,
-                self.db.query().c.activity_date >= week_start,
-                self.db.query().c.activity_date <= week_end,
-                self.db.query().c.status == 'completed'
-            )
-        )).order_by(self.db.query().c.activity_date).all()
-
-        # Get visit reports for the week
-        visits = self.db.query(self.db.query().filter(
-            and_(
-                self.db.query().c.sales_rep == sales_rep_id,
-                self.db.query().c.visit_date >= week_start,
-                self.db.query().c.visit_date <= week_end
-            )
-        )).order_by(self.db.query().c.visit_date).all()
-
-        if not activities and not visits:
-            return None
+    def _generate_rep_weekly_report(self, activity_totals: Dict[str, Any], visit_totals: Dict[str, Any],
+                                    visits: List[Any], daily: Dict[Any, Dict[str, Any]],
+                                    prev_activities: int, prev_visits: int,
+                                    week_start: datetime, week_end: datetime) -> Dict[str, Any]:
+        """Generate weekly report for a specific sales rep from pre-aggregated data"""
 
         # Calculate metrics
-        metrics = self._calculate_weekly_metrics(activities, visits, week_start, week_end)
+        metrics = self._calculate_weekly_metrics(activity_totals, visit_totals, visits)
 
         # Analyze trends
-        trends = self._analyze_weekly_trends(activities, visits, sales_rep_id)
+        trends = self._analyze_weekly_trends(metrics, prev_activities, prev_visits)
 
         # Generate insights
         insights = self._generate_weekly_insights(metrics, trends)
 
+        daily_breakdown = self._daily_breakdown(daily, week_start, week_end)
+
         return {
             'metrics': metrics,
             'trends': trends,
             'insights': insights,
-            'daily_breakdown': self._daily_breakdown(activities, visits, week_start, week_end),
-            'top_performers': self._top_performers(activities, visits),
-            'challenges': self._identify_challenges(activities, visits)
+            'daily_breakdown': daily_breakdown,
+            'top_performers': self._top_performers(activity_totals, visits),
+            'challenges': self._identify_challenges(metrics, daily_breakdown)
         }
 
-    def _calculate_weekly_metrics(self, activities: List[Any], visits: List[Any], week_start: datetime, week_end: datetime) -> Dict[str, Any]:
+    def _calculate_weekly_metrics(self, activity_totals: Dict[str, Any], visit_totals: Dict[str, Any],
+                                  visits: List[Any]) -> Dict[str, Any]:
         """Calculate key weekly metrics"""
 
-        # Basic counts
-        total_activities = len(activities)
-        total_visits = len(visits)
-
-        # Time and distance
-        total_minutes = sum(activity.duration_minutes or 0 for activity in activities)
-        total_kilometers = sum(float(visit.kilometers_driven or 0) for visit in visits)
-
-        # Activity types
-        activity_types = {}
-        for activity in activities:
-            activity_types[activity.activity_type] = activity_types.get(activity.activity_type, 0) + 1
+        total_activities = activity_totals['count']
+        total_visits = visit_totals['count']
 
-        # Visit metrics
-        unique_customers = len(set(visit.customer_id for visit in visits))
-
-        # Orders and quotes
-        total_orders = sum(len(visit.orders_placed or []) for visit in visits)
-        total_quotes = sum(len(visit.quotes_created or []) for visit in visits)
+        # Orders and quotes are JSON arrays on the visit rows
+        total_orders = sum(len(row.VisitReport.orders_placed or []) for row in visits)
+        total_quotes = sum(len(row.VisitReport.quotes_created or []) for row in visits)
 
         # Conversion rates
         conversion_rate = (total_orders / max(1, total_quotes)) * 100 if total_quotes > 0 else 0
 
         # Customer feedback (simplified)
-        positive_feedback = sum(1 for visit in visits if visit.customer_feedback and
-                               any(word in visit.customer_feedback.lower()
-                                   for word in ['gut', 'zufrieden', 'super', 'exzellent']))
+        positive_feedback = sum(
+            1 for row in visits
+            if row.VisitReport.customer_feedback
+            and any(word in row.VisitReport.customer_feedback.lower() for word in POSITIVE_FEEDBACK_WORDS)
+        )
 
         return {
             'total_activities': total_activities,
             'total_visits': total_visits,
-            'total_time_minutes': total_minutes,
-            'total_kilometers': total_kilometers,
-            'unique_customers': unique_customers,
-            'activity_types': activity_types,
+            'total_time_minutes': activity_totals['minutes'],
+            'total_kilometers': visit_totals['kilometers'],
+            'unique_customers': visit_totals['customers'],
+            'activity_types': dict(activity_totals['types']),
             'orders_placed': total_orders,
             'quotes_created': total_quotes,
             'conversion_rate': conversion_rate,
@@ -150,32 +160,11 @@ class WeeklyReportService:
             'avg_visits_per_day': total_visits / 5
         }
 
-    def _analyze_weekly_trends(self, activities: List[Any], visits: List[Any], sales_rep_id: str) -> Dict[str, Any]:
-        """Analyze trends compared to previous weeks"""
-
-        # Get previous week data for comparison
-        prev_week_start = datetime.now() - timedelta(days=14)
-        prev_week_end = datetime.now() - timedelta(days=8)
-
-        prev_activities = self.db.query(self.db.query().filter(
-            and_(
-                self.db.query().c.assigned_to == sales_rep_id,
-                self.db.query().c.activity_date >= prev_week_start,
-                self.db.query().c.activity_date <= prev_week_end,
-                self.db.query().c.status == 'completed'
-            )
-        )).count()
-
-        prev_visits = self.db.query(self.db.query().filter(
-            and_(
-                self.db.query().c.sales_rep == sales_rep_id,
-                self.db.query().c.visit_date >= prev_week_start,
-                self.db.query().c.visit_date <= prev_week_end
-            )
-        )).count()
-
-        current_activities = len(activities)
-        current_visits = len(visits)
+    def _analyze_weekly_trends(self, metrics: Dict[str, Any], prev_activities: int, prev_visits: int) -> Dict[str, Any]:
+        """Analyze trends compared to the previous week"""
+
+        current_activities = metrics['total_activities']
+        current_visits = metrics['total_visits']
 
         return {
             'activities_change': ((current_activities - prev_activities) / max(1, prev_activities)) * 100,
@@ -234,61 +223,56 @@ class WeeklyReportService:
 
         return insights
 
-    def _daily_breakdown(self, activities: List[Any], visits: List[Any], week_start: datetime, week_end: datetime) -> Dict[str, Any]:
-        """Break down activities by day"""
+    def _daily_breakdown(self, daily: Dict[Any, Dict[str, Any]], week_start: datetime,
+                         week_end: datetime) -> Dict[str, Any]:
+        """Break down activities by day (totals grouped per day in SQL)"""
 
         daily_stats = {}
         current_date = week_start
 
         while current_date <= week_end:
-            day_activities = [a for a in activities if a.activity_date.date() == current_date.date()]
-            day_visits = [v for v in visits if v.visit_date.date() == current_date.date()]
-
+            stats = daily.get(current_date.date(), {})
             daily_stats[current_date.strftime('%A')] = {
                 'date': current_date.date(),
-                'activities': len(day_activities),
-                'visits': len(day_visits),
-                'time_minutes': sum(a.duration_minutes or 0 for a in day_activities),
-                'kilometers': sum(float(v.kilometers_driven or 0) for v in day_visits)
+                'activities': stats.get('activities', 0),
+                'visits': stats.get('visits', 0),
+                'time_minutes': stats.get('time_minutes', 0),
+                'kilometers': stats.get('kilometers', 0.0)
             }
 
             current_date += timedelta(days=1)
 
         return daily_stats
 
-    def _top_performers(self, activities: List[Any], visits: List[Any]) -> Dict[str, Any]:
+    def _top_performers(self, activity_totals: Dict[str, Any], visits: List[Any]) -> Dict[str, Any]:
         """Identify top performing customers and activities"""
 
         # Top customers by visits
         customer_visits = {}
-        for visit in visits:
-            customer_visits[visit.customer_id] = customer_visits.get(visit.customer_id, 0) + 1
+        for row in visits:
+            name = customer_name(row)
+            customer_visits[name] = customer_visits.get(name, 0) + 1
 
         top_customers = sorted(customer_visits.items(), key=lambda x: x[1], reverse=True)[:5]
 
-        # Most successful activity types
-        activity_success = {}
-        for activity in activities:
-            # Simplified success metric
-            success_score = 1  # Could be enhanced with actual success tracking
-            activity_success[activity.activity_type] = activity_success.get(activity.activity_type, 0) + success_score
-
-        top_activities = sorted(activity_success.items(), key=lambda x: x[1], reverse=True)[:3]
+        # Most frequent activity types (simplified success metric)
+        top_activities = sorted(activity_totals['types'].items(), key=lambda x: x[1], reverse=True)[:3]
 
         return {
             'top_customers': top_customers,
             'top_activity_types': top_activities
         }
 
-    def _identify_challenges(self, activities: List[Any], visits: List[Any]) -> List[Dict[str, Any]]:
+    def _identify_challenges(self, metrics: Dict[str, Any], daily_breakdown: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Identify potential challenges and areas for improvement"""
 
         challenges = []
 
-        # Check for days with no activity
-        daily_breakdown = self._daily_breakdown(activities, visits, datetime.now() - timedelta(days=7), datetime.now() - timedelta(days=1))
-
-        inactive_days = [day for day, stats in daily_breakdown.items() if stats['activities'] == 0 and stats['visits'] == 0]
+        # Check for business days with no activity
+        inactive_days = [
+            day for day, stats in daily_breakdown.items()
+            if stats['date'].weekday() < 5 and stats['activities'] == 0 and stats['visits'] == 0
+        ]
         if inactive_days:
             challenges.append({
                 'type': 'inactive_days',
@@ -298,8 +282,8 @@ class WeeklyReportService:
             })
 
         # Check for low conversion
-        total_quotes = sum(len(visit.quotes_created or []) for visit in visits)
-        total_orders = sum(len(visit.orders_placed or []) for visit in visits)
+        total_quotes = metrics['quotes_created']
+        total_orders = metrics['orders_placed']
 
         if total_quotes > 0 and (total_orders / total_quotes) < 0.1:
             challenges.append({
@@ -358,26 +342,26 @@ class WeeklyReportService:
 # Scheduled task function
 def generate_weekly_reports():
     """Scheduled function to generate and send weekly reports"""
-    from ....core.database import get_db
-    from ..services.notification_service import notification_service
+    from ....core.database import get_db, SessionLocal
+    from ....services.notification_service import notification_service
 
     db = next(get_db())
 
     try:
-        service = WeeklyReportService(db)
+        service = WeeklyReportService(db, session_factory=SessionLocal)
         reports = service.generate_weekly_reports()
 
         if reports:
             # Send reports via notification service
             results = {}
-            for rep_id, report_data in reports.items():
-                markdown_report = service.format_weekly_report_markdown(report_data)
+            for rep_id, rep_report in reports.items():
+                markdown_report = service.format_weekly_report_markdown(rep_report)
 
                 # Send to management team
                 result = notification_service.send_notification(
                     'teams',
                     'management',
-                    f'📈 Wöchentlicher Verkaufsreport: {report_data["sales_rep"].first_name} {report_data["sales_rep"].last_name}',
+                    f'📈 Wöchentlicher Verkaufsreport: {rep_report["sales_rep"].first_name} {rep_report["sales_rep"].last_name}',
                     markdown_report,
                     'markdown'
                 )
@@ -5,6 +5,7 @@ Analytics and reporting for inventory management
 
 from typing import Optional
 from fastapi import APIRouter, Depends, Query
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from ....core.database import get_db
@@ -16,6 +17,10 @@ router = APIRouter()
 
 DEFAULT_TENANT = "system"
 
+# Report lists are capped; counts and totals are aggregated over all matching articles
+REPORT_LIMIT = 1000
+MAX_REPORT_LIMIT = 50000
+
 
 @router.get("/stock-alerts")
 async def get_stock_alerts(
@@ -57,29 +62,29 @@ async def get_inventory_value(
 async def get_replenishment_suggestions(
     tenant_id: Optional[str] = Query(None),
     days_ahead: int = Query(30, ge=1, le=365),
+    limit: int = Query(REPORT_LIMIT, ge=1, le=MAX_REPORT_LIMIT, description="Most urgent suggestions to list"),
+    refresh_stats: bool = Query(False, description="Recompute usage statistics before reporting"),
     db: Session = Depends(get_db),
     _: str = Depends(require_inventory_access),
     effective_tenant: str = Depends(get_current_tenant_id),
 ):
-    """Get automated replenishment suggestions."""
+    """Get automated replenishment suggestions (totals cover all suggestions, the list the most urgent)."""
     effective_tenant = tenant_id or effective_tenant
 
     service = ReplenishmentService(db)
-    suggestions = service.get_replenishment_suggestions(effective_tenant, days_ahead)
+    suggestions = service.get_replenishment_suggestions(
+        effective_tenant, days_ahead, refresh_stats=refresh_stats, limit=limit
+    )
 
     # Group by priority
     by_priority = {}
     for suggestion in suggestions:
-        priority = suggestion["priority"]
-        if priority not in by_priority:
-            by_priority[priority] = []
-        by_priority[priority].append(suggestion)
+        by_priority.setdefault(suggestion["priority"], []).append(suggestion)
 
     return {
         "suggestions": suggestions,
-        "total_suggestions": len(suggestions),
         "by_priority": by_priority,
-        "estimated_total_cost": sum(s["estimated_cost"] or 0 for s in suggestions if s["estimated_cost"])
+        **service.get_replenishment_summary(effective_tenant, days_ahead),
     }
 
 
@@ -87,6 +92,9 @@ async def get_replenishment_suggestions(
 async def get_slow_moving_inventory(
     tenant_id: Optional[str] = Query(None),
     days_threshold: int = Query(90, ge=30, le=365),
+    min_stock_value: float = Query(1000, ge=0),
+    limit: int = Query(REPORT_LIMIT, ge=1, le=MAX_REPORT_LIMIT, description="Most valuable items to list"),
+    refresh_stats: bool = Query(False, description="Recompute movement statistics before reporting"),
     db: Session = Depends(get_db),
     _: str = Depends(require_inventory_access),
     effective_tenant: str = Depends(get_current_tenant_id),
@@ -95,12 +103,13 @@ async def get_slow_moving_inventory(
     effective_tenant = tenant_id or effective_tenant
 
     service = ReplenishmentService(db)
-    slow_moving = service.get_slow_moving_inventory(effective_tenant, days_threshold)
+    slow_moving = service.get_slow_moving_inventory(
+        effective_tenant, days_threshold, min_stock_value, refresh_stats=refresh_stats, limit=limit
+    )
 
     return {
         "slow_moving_items": slow_moving,
-        "total_items": len(slow_moving),
-        "total_value": sum(item["stock_value"] for item in slow_moving)
+        **service.get_slow_moving_summary(effective_tenant, days_threshold, min_stock_value),
     }
 
 
@@ -108,6 +117,7 @@ async def get_slow_moving_inventory(
 async def get_purchase_order_suggestions(
     tenant_id: Optional[str] = Query(None),
     supplier_filter: Optional[str] = Query(None),
+    limit: int = Query(REPORT_LIMIT, ge=1, le=MAX_REPORT_LIMIT, description="Most urgent suggestions to list"),
     db: Session = Depends(get_db),
     _: str = Depends(require_inventory_access),
     effective_tenant: str = Depends(get_current_tenant_id),
@@ -117,21 +127,15 @@ async def get_purchase_order_suggestions(
 
     service = ReplenishmentService(db)
     suggestions_by_supplier = service.generate_purchase_order_suggestions(
-        effective_tenant, supplier_filter
-    )
-
-    # Calculate totals
-    total_suggestions = sum(len(items) for items in suggestions_by_supplier.values())
-    total_cost = sum(
-        sum(item["estimated_cost"] or 0 for item in items if item["estimated_cost"])
-        for items in suggestions_by_supplier.values()
+        effective_tenant, supplier_filter, limit=limit
     )
+    totals = service.get_replenishment_summary(effective_tenant, supplier_filter=supplier_filter)
 
     return {
         "suggestions_by_supplier": suggestions_by_supplier,
-        "total_suggestions": total_suggestions,
+        "total_suggestions": totals["total_suggestions"],
         "total_suppliers": len(suggestions_by_supplier),
-        "estimated_total_cost": total_cost
+        "estimated_total_cost": totals["estimated_total_cost"]
     }
 
 
@@ -139,6 +143,7 @@ async def get_purchase_order_suggestions(
 async def get_turnover_analysis(
     tenant_id: Optional[str] = Query(None),
     period_days: int = Query(30, ge=7, le=365),
+    refresh_stats: bool = Query(False, description="Recompute movement statistics before reporting"),
     db: Session = Depends(get_db),
     _: str = Depends(require_inventory_access),
     effective_tenant: str = Depends(get_current_tenant_id),
@@ -147,7 +152,7 @@ async def get_turnover_analysis(
     effective_tenant = tenant_id or effective_tenant
 
     service = ReplenishmentService(db)
-    analysis = service.get_inventory_turnover_report(effective_tenant, period_days)
+    analysis = service.get_inventory_turnover_report(effective_tenant, period_days, refresh_stats=refresh_stats)
 
     return analysis
 
@@ -157,84 +162,84 @@ async def get_stock_levels_report(
     tenant_id: Optional[str] = Query(None),
     category_filter: Optional[str] = Query(None),
     warehouse_filter: Optional[str] = Query(None),
+    limit: int = Query(REPORT_LIMIT, ge=1, le=MAX_REPORT_LIMIT, description="Articles to list"),
     db: Session = Depends(get_db),
     _: str = Depends(require_inventory_access),
     effective_tenant: str = Depends(get_current_tenant_id),
 ):
     """Get comprehensive stock levels report."""
-    from ....infrastructure.models import Article as ArticleModel
-
     effective_tenant = tenant_id or effective_tenant
 
-    query = (
-        db.query(ArticleModel)
-        .filter(
-            ArticleModel.tenant_id == effective_tenant,
-            ArticleModel.is_active == True
-        )
-    )
-
+    filters = "a.tenant_id = :tenant_id AND a.is_active = true"
+    params = {"tenant_id": effective_tenant, "limit": limit}
     if category_filter:
-        query = query.filter(ArticleModel.category == category_filter)
-
-    articles = query.all()
+        filters += " AND a.category = :category"
+        params["category"] = category_filter
+
+    # Summary and category totals are aggregated in SQL; only the article rows are shaped here
+    category_rows = db.execute(text(f"""
+        SELECT COALESCE(NULLIF(a.category, ''), 'Uncategorized') AS category,
+               COUNT(*) AS count,
+               COALESCE(SUM(a.current_stock), 0) AS total_stock,
+               COALESCE(SUM(a.current_stock * a.sales_price), 0) AS total_value,
+               COALESCE(SUM(a.available_stock), 0) AS total_available,
+               COALESCE(SUM(a.reserved_stock), 0) AS total_reserved,
+               COUNT(CASE WHEN COALESCE(a.current_stock, 0) <= 0 THEN 1 END) AS out_of_stock,
+               COUNT(CASE WHEN COALESCE(a.current_stock, 0) > 0
+                           AND a.current_stock < COALESCE(a.min_stock, 0) THEN 1 END) AS low_stock
+        FROM domain_inventory.articles a
+        WHERE {filters}
+        GROUP BY COALESCE(NULLIF(a.category, ''), 'Uncategorized')
+    """), params).fetchall()
 
     report = {
-        "total_articles": len(articles),
-        "categories": {},
+        "total_articles": sum(row.count for row in category_rows),
+        "categories": {
+            row.category: {
+                "count": row.count,
+                "total_stock": float(row.total_stock),
+                "total_value": float(row.total_value),
+            }
+            for row in category_rows
+        },
         "stock_summary": {
-            "total_current_stock": 0,
-            "total_available_stock": 0,
-            "total_reserved_stock": 0,
-            "low_stock_count": 0,
-            "out_of_stock_count": 0
+            "total_current_stock": float(sum(row.total_stock for row in category_rows)),
+            "total_available_stock": float(sum(row.total_available for row in category_rows)),
+            "total_reserved_stock": float(sum(row.total_reserved for row in category_rows)),
+            "low_stock_count": sum(row.low_stock for row in category_rows),
+            "out_of_stock_count": sum(row.out_of_stock for row in category_rows)
         },
         "articles": []
     }
 
-    for article in articles:
-        current_stock = float(article.current_stock or 0)
-        available_stock = float(article.available_stock or 0)
-        reserved_stock = float(article.reserved_stock or 0)
-        min_stock = float(article.min_stock or 0)
-
-        # Update summary
-        report["stock_summary"]["total_current_stock"] += current_stock
-        report["stock_summary"]["total_available_stock"] += available_stock
-        report["stock_summary"]["total_reserved_stock"] += reserved_stock
-
-        if current_stock <= 0:
-            report["stock_summary"]["out_of_stock_count"] += 1
-        elif current_stock < min_stock:
-            report["stock_summary"]["low_stock_count"] += 1
-
-        # Update categories
-        category = article.category or "Uncategorized"
-        if category not in report["categories"]:
-            report["categories"][category] = {
-                "count": 0,
-                "total_stock": 0,
-                "total_value": 0
-            }
-
-        report["categories"][category]["count"] += 1
-        report["categories"][category]["total_stock"] += current_stock
-        if article.sales_price:
-            report["categories"][category]["total_value"] += current_stock * float(article.sales_price)
-
-        # Add article details
+    rows = db.execute(text(f"""
+        SELECT a.id, a.article_number, a.name, COALESCE(NULLIF(a.category, ''), 'Uncategorized') AS category,
+               COALESCE(a.current_stock, 0) AS current_stock,
+               COALESCE(a.available_stock, 0) AS available_stock,
+               COALESCE(a.reserved_stock, 0) AS reserved_stock,
+               COALESCE(a.min_stock, 0) AS min_stock,
+               a.unit, a.sales_price
+        FROM domain_inventory.articles a
+        WHERE {filters}
+        ORDER BY a.article_number
+        LIMIT :limit
+    """), params)
+
+    for row in rows:
+        current_stock = float(row.current_stock)
+        min_stock = float(row.min_stock)
         report["articles"].append({
-            "id": article.id,
-            "article_number": article.article_number,
-            "name": article.name,
-            "category": category,
+            "id": row.id,
+            "article_number": row.article_number,
+            "name": row.name,
+            "category": row.category,
             "current_stock": current_stock,
-            "available_stock": available_stock,
-            "reserved_stock": reserved_stock,
+            "available_stock": float(row.available_stock),
+            "reserved_stock": float(row.reserved_stock),
             "min_stock": min_stock,
-            "unit": article.unit,
-            "sales_price": float(article.sales_price) if article.sales_price else None,
+            "unit": row.unit,
+            "sales_price": float(row.sales_price) if row.sales_price else None,
             "stock_status": "out_of_stock" if current_stock <= 0 else "low_stock" if current_stock < min_stock else "normal"
         })
 
-    return report
\ No newline at end of file
+    return report
@@ -0,0 +1,175 @@
+"""
+Article Stock Statistics
+Per-article rolling statistics (last movement, outbound quantity and COGS over
+30/90 days) in domain_inventory.article_stock_stats. Refreshed with one
+INSERT ... SELECT ... GROUP BY over the movement window and touched
+incrementally when a movement is processed, so replenishment, slow-moving and
+turnover reports never walk the movement history per article.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import DateTime, Numeric, bindparam, text
+from sqlalchemy.orm import Session
+
+STATS_WINDOWS = (30, 90)
+STATS_MAX_AGE = timedelta(hours=6)
+
+_EPOCH = datetime(1970, 1, 1)
+
+# Movement cost: booked total, else quantity at movement or article purchase price.
+# The price lookup only runs for movements booked without a cost (COALESCE short-circuits).
+MOVEMENT_COST = """COALESCE(m.total_cost, ABS(m.quantity) * COALESCE(
+    m.unit_cost,
+    (SELECT a.purchase_price FROM domain_inventory.articles a WHERE a.id = m.article_id),
+    0
+))"""
+
+_REFRESH = f"""
+    INSERT INTO domain_inventory.article_stock_stats (
+        article_id, tenant_id, last_movement_at, last_outbound_at,
+        outbound_qty_30d, outbound_qty_90d, cogs_30d, cogs_90d, movements_90d, refreshed_at
+    )
+    SELECT m.article_id, m.tenant_id,
+           MAX(m.created_at),
+           MAX(CASE WHEN m.movement_type = 'out' THEN m.created_at END),
+           SUM(CASE WHEN m.movement_type = 'out' AND m.created_at >= :since_30d THEN ABS(m.quantity) ELSE 0 END),
+           SUM(CASE WHEN m.movement_type = 'out' AND m.created_at >= :since_90d THEN ABS(m.quantity) ELSE 0 END),
+           SUM(CASE WHEN m.movement_type = 'out' AND m.created_at >= :since_30d THEN {MOVEMENT_COST} ELSE 0 END),
+           SUM(CASE WHEN m.movement_type = 'out' AND m.created_at >= :since_90d THEN {MOVEMENT_COST} ELSE 0 END),
+           SUM(CASE WHEN m.created_at >= :since_90d THEN 1 ELSE 0 END),
+           :as_of
+    FROM domain_inventory.inventory_stock_movements m
+    WHERE m.tenant_id = :tenant_id AND m.created_at >= :since
+    GROUP BY m.article_id, m.tenant_id
+    ON CONFLICT (article_id) DO UPDATE SET
+        last_movement_at = CASE
+            WHEN article_stock_stats.last_movement_at IS NULL
+              OR excluded.last_movement_at > article_stock_stats.last_movement_at
+            THEN excluded.last_movement_at ELSE article_stock_stats.last_movement_at END,
+        last_outbound_at = CASE
+            WHEN article_stock_stats.last_outbound_at IS NULL
+              OR excluded.last_outbound_at > article_stock_stats.last_outbound_at
+            THEN excluded.last_outbound_at ELSE article_stock_stats.last_outbound_at END,
+        outbound_qty_30d = excluded.outbound_qty_30d,
+        outbound_qty_90d = excluded.outbound_qty_90d,
+        cogs_30d = excluded.cogs_30d,
+        cogs_90d = excluded.cogs_90d,
+        movements_90d = excluded.movements_90d,
+        refreshed_at = excluded.refreshed_at
+"""
+
+# Articles without movements inside the window keep their last movement but drop to zero usage
+_EXPIRE = """
+    UPDATE domain_inventory.article_stock_stats
+    SET outbound_qty_30d = 0, outbound_qty_90d = 0, cogs_30d = 0, cogs_90d = 0,
+        movements_90d = 0, refreshed_at = :as_of
+    WHERE tenant_id = :tenant_id AND (refreshed_at IS NULL OR refreshed_at < :as_of)
+"""
+
+_TOUCH = """
+    INSERT INTO domain_inventory.article_stock_stats (
+        article_id, tenant_id, last_movement_at, last_outbound_at,
+        outbound_qty_30d, outbound_qty_90d, cogs_30d, cogs_90d, movements_90d
+    )
+    VALUES (:article_id, :tenant_id, :moved_at, :outbound_at, :qty, :qty, :cost, :cost, 1)
+    ON CONFLICT (article_id) DO UPDATE SET
+        last_movement_at = excluded.last_movement_at,
+        last_outbound_at = COALESCE(excluded.last_outbound_at, article_stock_stats.last_outbound_at),
+        outbound_qty_30d = article_stock_stats.outbound_qty_30d + excluded.outbound_qty_30d,
+        outbound_qty_90d = article_stock_stats.outbound_qty_90d + excluded.outbound_qty_90d,
+        cogs_30d = article_stock_stats.cogs_30d + excluded.cogs_30d,
+        cogs_90d = article_stock_stats.cogs_90d + excluded.cogs_90d,
+        movements_90d = article_stock_stats.movements_90d + 1
+"""
+
+
+def _timestamps(*names: str):
+    return [bindparam(name, type_=DateTime()) for name in names]
+
+
+def refresh_article_stats(
+    db: Session,
+    tenant_id: str,
+    as_of: Optional[datetime] = None,
+    full: bool = False,
+) -> None:
+    """
+    Recompute the 30/90 day windows of ``tenant_id`` from movements.
+
+    Only movements of the last 90 days are aggregated; ``full`` also scans
+    older history so articles get their last movement on the first build.
+    """
+    as_of = as_of or datetime.utcnow()
+    params = {
+        "tenant_id": tenant_id,
+        "as_of": as_of,
+        "since": _EPOCH if full else as_of - timedelta(days=90),
+        "since_30d": as_of - timedelta(days=30),
+        "since_90d": as_of - timedelta(days=90),
+    }
+    db.execute(text(_REFRESH).bindparams(*_timestamps("as_of", "since", "since_30d", "since_90d")), params)
+    db.execute(text(_EXPIRE).bindparams(*_timestamps("as_of")), params)
+
+
+def stats_refreshed_at(db: Session, tenant_id: str) -> Optional[datetime]:
+    return db.execute(
+        text(
+            "SELECT refreshed_at FROM domain_inventory.article_stock_stats "
+            "WHERE tenant_id = :tenant_id AND refreshed_at IS NOT NULL "
+            "ORDER BY refreshed_at DESC LIMIT 1"
+        ).columns(refreshed_at=DateTime()),
+        {"tenant_id": tenant_id},
+    ).scalar()
+
+
+def ensure_article_stats(
+    db: Session,
+    tenant_id: str,
+    max_age: timedelta = STATS_MAX_AGE,
+    as_of: Optional[datetime] = None,
+    refresh: bool = False,
+) -> datetime:
+    """Refresh the statistics if forced, never built or older than ``max_age``."""
+    as_of = as_of or datetime.utcnow()
+    refreshed_at = stats_refreshed_at(db, tenant_id)
+    if refreshed_at is not None:
+        refreshed_at = refreshed_at.replace(tzinfo=None)
+    if refresh or refreshed_at is None or as_of - refreshed_at > max_age:
+        refresh_article_stats(db, tenant_id, as_of, full=refreshed_at is None)
+        db.commit()
+        return as_of
+    return refreshed_at
+
+
+def touch_article_stats(
+    db: Session,
+    tenant_id: str,
+    article_id: str,
+    movement_type: str,
+    quantity: Decimal,
+    cost: Optional[Decimal],
+    moved_at: Optional[datetime] = None,
+) -> None:
+    """Fold one processed movement into the article's statistics (same transaction)."""
+    moved_at = moved_at or datetime.utcnow()
+    outbound = movement_type == "out"
+    db.execute(
+        text(_TOUCH).bindparams(
+            *_timestamps("moved_at", "outbound_at"),
+            bindparam("qty", type_=Numeric(14, 2)),
+            bindparam("cost", type_=Numeric(16, 2)),
+        ),
+        {
+            "article_id": article_id,
+            "tenant_id": tenant_id,
+            "moved_at": moved_at,
+            "outbound_at": moved_at if outbound else None,
+            "qty": abs(quantity) if outbound else Decimal(0),
+            "cost": (cost or Decimal(0)) if outbound else Decimal(0),
+        },
+    )
@@ -7,9 +7,11 @@ from typing import List, Optional, Dict, Any
 from decimal import Decimal
 import uuid
 from datetime import datetime
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
+from app.domains.inventory.application.services.article_stats import touch_article_stats
 from app.infrastructure.models import Article as ArticleModel, Warehouse as WarehouseModel, StockMovement as StockMovementModel
 from app.domains.inventory.domain.entities import Article, Warehouse, StockMovement
 
@@ -142,6 +144,14 @@ class InventoryService:
 
         # Save changes
         self.db.add(movement)
+        touch_article_stats(
+            self.db,
+            tenant_id=movement.tenant_id,
+            article_id=article_id,
+            movement_type=movement_type,
+            quantity=quantity,
+            cost=total_cost if total_cost is not None else abs(quantity) * (article.purchase_price or Decimal(0)),
+        )
         self.db.commit()
         self.db.refresh(movement)
 
@@ -197,33 +207,18 @@ class InventoryService:
     def calculate_inventory_value(self, tenant_id: str) -> Dict[str, Any]:
         """Calculate total inventory value and statistics."""
 
-        articles = (
-            self.db.query(ArticleModel)
-            .filter(
-                ArticleModel.tenant_id == tenant_id,
-                ArticleModel.is_active == True
-            )
-            .all()
-        )
-
-        total_value = Decimal(0)
-        total_items = 0
-        low_stock_items = 0
-
-        for article in articles:
-            if article.current_stock and article.current_stock > 0:
-                # Use sales price for valuation (could also use purchase price)
-                if article.sales_price:
-                    total_value += article.current_stock * article.sales_price
-                total_items += 1
-
-            # Check for low stock
-            if article.min_stock and article.current_stock and article.current_stock < article.min_stock:
-                low_stock_items += 1
+        # Valued at sales price (could also use purchase price)
+        row = self.db.execute(text("""
+            SELECT COALESCE(SUM(CASE WHEN current_stock > 0 THEN current_stock * COALESCE(sales_price, 0) END), 0),
+                   COUNT(CASE WHEN current_stock > 0 THEN 1 END),
+                   COUNT(CASE WHEN min_stock <> 0 AND current_stock <> 0 AND current_stock < min_stock THEN 1 END)
+            FROM domain_inventory.articles
+            WHERE tenant_id = :tenant_id AND is_active = true
+        """), {"tenant_id": tenant_id}).one()
 
         return {
-            "total_value": float(total_value),
-            "total_items": total_items,
-            "low_stock_items": low_stock_items,
+            "total_value": float(row[0] or 0),
+            "total_items": int(row[1] or 0),
+            "low_stock_items": int(row[2] or 0),
             "currency": "EUR"  # Could be made configurable per tenant
-        }
\ No newline at end of file
+        }
@@ -1,16 +1,107 @@
 """
 Replenishment Service
 Handles automated replenishment logic and purchase order suggestions
+
+Candidates, priorities and valuations are selected in SQL over articles and
+the per-article rolling statistics (see ``article_stats``); Python only shapes
+the rows that are returned.
 """
 
 from typing import List, Dict, Any, Optional
 from decimal import Decimal
 from datetime import datetime, timedelta
+from sqlalchemy import DateTime, bindparam, text
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
-from app.infrastructure.models import Article as ArticleModel
-from app.domains.inventory.domain.entities import Article
+from app.domains.inventory.application.services.article_stats import (
+    MOVEMENT_COST,
+    STATS_WINDOWS,
+    ensure_article_stats,
+)
+
+# Priority 1-5 (5 = out of stock); 2 = above minimum now but projected to fall
+# below it within ``days_ahead`` at the 30 day average usage. Replenish to the
+# max level, or further if the horizon's usage would undercut the minimum.
+_CANDIDATES = """
+    SELECT id, article_number, name, unit, currency, supplier_number, purchase_price,
+           current_stock, min_stock, max_stock, avg_daily_usage,
+           CASE
+               WHEN current_stock <= 0 THEN 5
+               WHEN current_stock < min_stock * 0.5 THEN 4
+               WHEN current_stock < min_stock THEN 3
+               ELSE 2
+           END AS priority,
+           CASE
+               WHEN max_stock >= min_stock + avg_daily_usage * :days_ahead THEN max_stock - current_stock
+               ELSE min_stock + avg_daily_usage * :days_ahead - current_stock
+           END AS suggested_quantity
+    FROM (
+        SELECT a.id, a.article_number, a.name, a.unit, a.currency, a.supplier_number, a.purchase_price,
+               COALESCE(a.current_stock, 0) AS current_stock,
+               a.min_stock,
+               COALESCE(a.max_stock, a.min_stock * 2) AS max_stock,
+               COALESCE(s.outbound_qty_30d, 0) / 30.0 AS avg_daily_usage
+        FROM domain_inventory.articles a
+        LEFT JOIN domain_inventory.article_stock_stats s ON s.article_id = a.id
+        WHERE a.tenant_id = :tenant_id
+          AND a.is_active = true
+          AND a.min_stock IS NOT NULL
+          {supplier_filter}
+    ) candidates
+    WHERE current_stock < min_stock + avg_daily_usage * :days_ahead
+"""
+
+_REPLENISHMENT_SUMMARY = """
+    SELECT priority, COUNT(*) AS count,
+           COALESCE(SUM(CASE WHEN purchase_price <> 0 THEN suggested_quantity * purchase_price END), 0) AS cost
+    FROM ({candidates}) suggestions
+    GROUP BY priority
+"""
+
+_SLOW_MOVING_FILTER = """
+    FROM domain_inventory.articles a
+    LEFT JOIN domain_inventory.article_stock_stats s ON s.article_id = a.id
+    WHERE a.tenant_id = :tenant_id
+      AND a.is_active = true
+      AND a.current_stock > 0
+      AND a.current_stock * COALESCE(NULLIF(a.purchase_price, 0), a.sales_price, 0) > :min_stock_value
+      AND (s.last_movement_at IS NULL OR s.last_movement_at < :cutoff)
+"""
+
+_SLOW_MOVING = """
+    SELECT a.id, a.article_number, a.name, a.category, a.current_stock,
+           a.current_stock * COALESCE(NULLIF(a.purchase_price, 0), a.sales_price, 0) AS stock_value,
+           s.last_movement_at
+""" + _SLOW_MOVING_FILTER + """
+    ORDER BY stock_value DESC, a.article_number
+"""
+
+_SLOW_MOVING_SUMMARY = """
+    SELECT COUNT(*),
+           COALESCE(SUM(a.current_stock * COALESCE(NULLIF(a.purchase_price, 0), a.sales_price, 0)), 0)
+""" + _SLOW_MOVING_FILTER
+
+_INVENTORY_VALUE = """
+    SELECT COALESCE(SUM(current_stock * purchase_price), 0)
+    FROM domain_inventory.articles
+    WHERE tenant_id = :tenant_id AND is_active = true
+"""
+
+_COGS_FROM_MOVEMENTS = f"""
+    SELECT COALESCE(SUM({MOVEMENT_COST}), 0)
+    FROM domain_inventory.inventory_stock_movements m
+    WHERE m.tenant_id = :tenant_id AND m.movement_type = 'out' AND m.created_at >= :since
+"""
+
+_COGS_FROM_STATS = """
+    SELECT COALESCE(SUM(cogs_{days}d), 0)
+    FROM domain_inventory.article_stock_stats
+    WHERE tenant_id = :tenant_id
+"""
+
+
+def _decimal(value) -> Decimal:
+    return value if isinstance(value, Decimal) else Decimal(str(value or 0))
 
 
 class ReplenishmentService:
@@ -19,162 +110,175 @@ class ReplenishmentService:
     def __init__(self, db: Session):
         self.db = db
 
-    def get_replenishment_suggestions(self, tenant_id: str, days_ahead: int = 30) -> List[Dict[str, Any]]:
-        """Generate replenishment suggestions based on stock levels and usage patterns."""
-
-        # Get articles that need replenishment
-        articles = (
-            self.db.query(ArticleModel)
-            .filter(
-                ArticleModel.tenant_id == tenant_id,
-                ArticleModel.is_active == True,
-                ArticleModel.min_stock.isnot(None)
-            )
-            .all()
+    def _candidates(self, supplier_filter: Optional[str]) -> str:
+        return _CANDIDATES.format(
+            supplier_filter="AND a.supplier_number = :supplier_number" if supplier_filter else ""
         )
 
-        suggestions = []
+    def get_replenishment_suggestions(
+        self,
+        tenant_id: str,
+        days_ahead: int = 30,
+        refresh_stats: bool = False,
+        limit: Optional[int] = None,
+        supplier_filter: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Generate replenishment suggestions based on stock levels and usage patterns."""
+        ensure_article_stats(self.db, tenant_id, refresh=refresh_stats)
+        sql = self._candidates(supplier_filter) + " ORDER BY priority DESC, article_number"
+        params = {"tenant_id": tenant_id, "days_ahead": days_ahead, "supplier_number": supplier_filter}
+        if limit is not None:
+            sql += " LIMIT :limit"
+            params["limit"] = limit
 
-        for article in articles:
-            current_stock = article.current_stock or Decimal(0)
-            min_stock = article.min_stock or Decimal(0)
-            max_stock = article.max_stock or min_stock * Decimal(2)  # Default max = 2x min
-
-            # Check if replenishment is needed
-            if current_stock < min_stock:
-                deficit = min_stock - current_stock
-                suggested_quantity = max_stock - current_stock  # Replenish to max level
-
-                # Calculate estimated cost
-                estimated_cost = None
-                if article.purchase_price:
-                    estimated_cost = suggested_quantity * article.purchase_price
-
-                suggestions.append({
-                    "article_id": article.id,
-                    "article_number": article.article_number,
-                    "name": article.name,
-                    "current_stock": float(current_stock),
-                    "min_stock": float(min_stock),
-                    "max_stock": float(max_stock),
-                    "deficit": float(deficit),
-                    "suggested_quantity": float(suggested_quantity),
-                    "unit": article.unit,
-                    "estimated_cost": float(estimated_cost) if estimated_cost else None,
-                    "currency": article.currency,
-                    "supplier_number": article.supplier_number,
-                    "priority": self._calculate_priority(current_stock, min_stock, max_stock)
-                })
-
-        # Sort by priority (high first)
-        suggestions.sort(key=lambda x: x["priority"], reverse=True)
+        suggestions = []
+        for row in self.db.execute(text(sql), params):
+            current_stock = float(row.current_stock)
+            min_stock = float(row.min_stock)
+            usage = float(row.avg_daily_usage)
+            suggested_quantity = float(row.suggested_quantity)
+            estimated_cost = suggested_quantity * float(row.purchase_price) if row.purchase_price else None
+
+            suggestions.append({
+                "article_id": row.id,
+                "article_number": row.article_number,
+                "name": row.name,
+                "current_stock": current_stock,
+                "min_stock": min_stock,
+                "max_stock": float(row.max_stock),
+                "deficit": max(min_stock - current_stock, 0.0),
+                "suggested_quantity": suggested_quantity,
+                "unit": row.unit,
+                "estimated_cost": estimated_cost or None,
+                "currency": row.currency,
+                "supplier_number": row.supplier_number,
+                "priority": int(row.priority),
+                "avg_daily_usage": usage,
+                "days_of_cover": current_stock / usage if usage > 0 else None,
+            })
 
         return suggestions
 
-    def _calculate_priority(self, current: Decimal, min_stock: Decimal, max_stock: Decimal) -> int:
-        """Calculate replenishment priority (1-5, 5 being highest)."""
-
-        if current <= 0:
-            return 5  # Critical - out of stock
-        elif current < min_stock * Decimal(0.5):
-            return 4  # Very urgent
-        elif current < min_stock:
-            return 3  # Urgent
-        elif current < min_stock * Decimal(1.5):
-            return 2  # Soon
-        else:
-            return 1  # Normal
-
-    def get_slow_moving_inventory(self, tenant_id: str, days_threshold: int = 90) -> List[Dict[str, Any]]:
-        """Identify slow-moving inventory that may need special handling."""
-
-        # This would typically analyze stock movement history
-        # For now, return articles with no recent movements (simplified)
-
-        cutoff_date = datetime.utcnow() - timedelta(days=days_threshold)
-
-        # Get articles with low turnover (simplified logic)
-        articles = (
-            self.db.query(ArticleModel)
-            .filter(
-                ArticleModel.tenant_id == tenant_id,
-                ArticleModel.is_active == True,
-                ArticleModel.current_stock.isnot(None),
-                ArticleModel.current_stock > 0
-            )
-            .all()
+    def get_replenishment_summary(
+        self,
+        tenant_id: str,
+        days_ahead: int = 30,
+        supplier_filter: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Count and cost of all suggestions per priority, aggregated in SQL."""
+        rows = self.db.execute(
+            text(_REPLENISHMENT_SUMMARY.format(candidates=self._candidates(supplier_filter))),
+            {"tenant_id": tenant_id, "days_ahead": days_ahead, "supplier_number": supplier_filter},
+        ).fetchall()
+        return {
+            "total_suggestions": sum(row.count for row in rows),
+            "priority_counts": {int(row.priority): row.count for row in sorted(rows, reverse=True)},
+            "estimated_total_cost": float(sum(_decimal(row.cost) for row in rows)),
+        }
+
+    def get_slow_moving_inventory(
+        self,
+        tenant_id: str,
+        days_threshold: int = 90,
+        min_stock_value: float = 1000,
+        refresh_stats: bool = False,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Identify valuable stock without movements for ``days_threshold`` days, most valuable first."""
+        ensure_article_stats(self.db, tenant_id, refresh=refresh_stats)
+        as_of = datetime.utcnow()
+        sql = _SLOW_MOVING
+        params = {
+            "tenant_id": tenant_id,
+            "cutoff": as_of - timedelta(days=days_threshold),
+            "min_stock_value": min_stock_value,
+        }
+        if limit is not None:
+            sql += " LIMIT :limit"
+            params["limit"] = limit
+        rows = self.db.execute(
+            text(sql).bindparams(bindparam("cutoff", type_=DateTime())).columns(last_movement_at=DateTime()),
+            params,
         )
 
         slow_moving = []
-        for article in articles:
-            # Calculate stock turnover ratio (simplified)
-            # In a real implementation, this would analyze actual movement history
-            stock_value = float((article.current_stock or 0) * (article.purchase_price or article.sales_price or 0))
-
-            # Flag as slow moving if stock value is significant but no recent activity
-            if stock_value > 1000:  # Configurable threshold
-                slow_moving.append({
-                    "article_id": article.id,
-                    "article_number": article.article_number,
-                    "name": article.name,
-                    "current_stock": float(article.current_stock or 0),
-                    "stock_value": stock_value,
-                    "days_since_last_movement": days_threshold,  # Placeholder
-                    "category": article.category,
-                    "recommendation": "Consider markdown or special promotion"
-                })
+        for row in rows:
+            last_movement_at = row.last_movement_at.replace(tzinfo=None) if row.last_movement_at else None
+            slow_moving.append({
+                "article_id": row.id,
+                "article_number": row.article_number,
+                "name": row.name,
+                "current_stock": float(row.current_stock or 0),
+                "stock_value": float(row.stock_value or 0),
+                "last_movement_at": last_movement_at.isoformat() if last_movement_at else None,
+                "days_since_last_movement": (as_of - last_movement_at).days if last_movement_at else None,
+                "category": row.category,
+                "recommendation": "Consider markdown or special promotion"
+            })
 
         return slow_moving
 
+    def get_slow_moving_summary(
+        self,
+        tenant_id: str,
+        days_threshold: int = 90,
+        min_stock_value: float = 1000,
+    ) -> Dict[str, Any]:
+        """Number and value of all slow-moving articles, aggregated in SQL."""
+        count, value = self.db.execute(
+            text(_SLOW_MOVING_SUMMARY).bindparams(bindparam("cutoff", type_=DateTime())),
+            {
+                "tenant_id": tenant_id,
+                "cutoff": datetime.utcnow() - timedelta(days=days_threshold),
+                "min_stock_value": min_stock_value,
+            },
+        ).one()
+        return {"total_items": int(count or 0), "total_value": float(_decimal(value))}
+
     def generate_purchase_order_suggestions(
         self,
         tenant_id: str,
-        supplier_filter: Optional[str] = None
+        supplier_filter: Optional[str] = None,
+        limit: Optional[int] = None,
     ) -> Dict[str, List[Dict[str, Any]]]:
         """Generate purchase order suggestions grouped by supplier."""
 
-        suggestions = self.get_replenishment_suggestions(tenant_id)
+        suggestions = self.get_replenishment_suggestions(
+            tenant_id, limit=limit, supplier_filter=supplier_filter
+        )
 
-        # Group by supplier
+        # Suggestions arrive sorted by priority, so each supplier's items stay sorted
         by_supplier = {}
         for suggestion in suggestions:
-            supplier = suggestion.get("supplier_number", "Unknown Supplier")
-
-            if supplier_filter and supplier != supplier_filter:
-                continue
-
-            if supplier not in by_supplier:
-                by_supplier[supplier] = []
-
-            by_supplier[supplier].append(suggestion)
-
-        # Sort items within each supplier by priority
-        for supplier_items in by_supplier.values():
-            supplier_items.sort(key=lambda x: x["priority"], reverse=True)
+            by_supplier.setdefault(suggestion.get("supplier_number", "Unknown Supplier"), []).append(suggestion)
 
         return by_supplier
 
-    def get_inventory_turnover_report(self, tenant_id: str, period_days: int = 30) -> Dict[str, Any]:
-        """Generate inventory turnover analysis."""
-
-        # This is a simplified version - real implementation would analyze movement history
-        articles = (
-            self.db.query(ArticleModel)
-            .filter(
-                ArticleModel.tenant_id == tenant_id,
-                ArticleModel.is_active == True
-            )
-            .all()
-        )
+    def get_inventory_turnover_report(
+        self,
+        tenant_id: str,
+        period_days: int = 30,
+        refresh_stats: bool = False,
+    ) -> Dict[str, Any]:
+        """Generate inventory turnover analysis (COGS of outbound movements / inventory value)."""
 
-        total_inventory_value = Decimal(0)
-        total_cost_of_goods_sold = Decimal(0)  # Would be calculated from actual sales
+        total_inventory_value = _decimal(
+            self.db.execute(text(_INVENTORY_VALUE), {"tenant_id": tenant_id}).scalar()
+        )
 
-        for article in articles:
-            if article.current_stock and article.purchase_price:
-                total_inventory_value += article.current_stock * article.purchase_price
+        # 30/90 day windows are maintained per article; other periods aggregate the movements
+        if period_days in STATS_WINDOWS:
+            ensure_article_stats(self.db, tenant_id, refresh=refresh_stats)
+            cogs = self.db.execute(
+                text(_COGS_FROM_STATS.format(days=period_days)), {"tenant_id": tenant_id}
+            ).scalar()
+        else:
+            cogs = self.db.execute(
+                text(_COGS_FROM_MOVEMENTS).bindparams(bindparam("since", type_=DateTime())),
+                {"tenant_id": tenant_id, "since": datetime.utcnow() - timedelta(days=period_days)},
+            ).scalar()
+        total_cost_of_goods_sold = _decimal(cogs)
 
-        # Calculate turnover ratio (simplified)
         if total_inventory_value > 0:
             turnover_ratio = total_cost_of_goods_sold / total_inventory_value
             turnover_days = period_days / float(turnover_ratio) if turnover_ratio > 0 else float('inf')
@@ -189,4 +293,4 @@ class ReplenishmentService:
             "turnover_ratio": float(turnover_ratio),
             "turnover_days": turnover_days,
             "analysis_date": datetime.utcnow().isoformat()
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,292 @@
+"""
+Bank reconciliation booking
+Set-based difference detection and bulk auto-booking of unmatched bank
+statement lines. Accounts are resolved once per run, all journal entries
+and lines go out as multi-row INSERTs in the caller's transaction.
+"""
+
+from __future__ import annotations
+
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List
+
+from sqlalchemy import Date, DateTime, Numeric, bindparam, column, insert, table, text
+from sqlalchemy.orm import Session
+
+BANK_ACCOUNT_NUMBER = "1000"
+DEFAULT_COUNTER_ACCOUNT = "1200"  # Accounts Receivable
+INSERT_CHUNK_SIZE = 5000
+
+journal_entries = table(
+    "journal_entries",
+    column("id"), column("tenant_id"), column("entry_number"), column("entry_date", Date),
+    column("posting_date", Date), column("description"), column("reference"), column("source"),
+    column("currency"), column("status"),
+    column("total_debit", Numeric(15, 2)), column("total_credit", Numeric(15, 2)),
+    column("created_at", DateTime(timezone=True)), column("updated_at", DateTime(timezone=True)),
+    schema="domain_erp",
+)
+
+journal_entry_lines = table(
+    "journal_entry_lines",
+    column("id"), column("tenant_id"), column("journal_entry_id"), column("account_id"),
+    column("debit_amount", Numeric(15, 2)), column("credit_amount", Numeric(15, 2)),
+    column("line_number"), column("description"),
+    column("created_at", DateTime(timezone=True)), column("updated_at", DateTime(timezone=True)),
+    schema="domain_erp",
+)
+
+# Both directions in one statement, matched one-to-one:
+# - an entry referencing a statement line is matched to exactly that line
+# - the remaining lines are paired per (amount, date) by their position in
+#   that group (row_number() on both sides), so two equal bank transactions
+#   need two bookings and one booking cannot clear several transactions
+# Unpaired statement lines with status UNMATCHED and unpaired posted
+# bank-account lines within the statement window are the differences.
+DIFFERENCES_QUERY = text("""
+    WITH bank_lines AS (
+        SELECT je.id AS journal_entry_id, jel.id AS line_id, je.entry_date,
+               CAST(je.reference AS TEXT) AS reference, je.description,
+               jel.debit_amount - jel.credit_amount AS amount
+        FROM domain_erp.journal_entry_lines jel
+        JOIN domain_erp.journal_entries je ON jel.journal_entry_id = je.id
+        JOIN domain_erp.chart_of_accounts coa ON jel.account_id = coa.id
+        JOIN domain_erp.bank_accounts ba
+          ON coa.account_number = ba.account_number AND coa.tenant_id = ba.tenant_id
+        WHERE ba.id = :bank_account_id
+          AND ba.tenant_id = :tenant_id
+          AND je.tenant_id = :tenant_id
+          AND jel.tenant_id = :tenant_id
+          AND je.status = 'posted'
+          AND je.entry_date BETWEEN
+              (SELECT MIN(booking_date) FROM domain_erp.bank_statement_lines
+               WHERE statement_id = :statement_id AND tenant_id = :tenant_id)
+          AND (SELECT MAX(booking_date) FROM domain_erp.bank_statement_lines
+               WHERE statement_id = :statement_id AND tenant_id = :tenant_id)
+    ),
+    statement_lines AS (
+        SELECT CAST(bsl.id AS TEXT) AS statement_line_id, bsl.booking_date, bsl.amount, bsl.status,
+               bsl.reference, COALESCE(bsl.remittance_info, bsl.reference) AS description
+        FROM domain_erp.bank_statement_lines bsl
+        WHERE bsl.statement_id = :statement_id
+          AND bsl.tenant_id = :tenant_id
+    ),
+    open_bank AS (
+        SELECT b.*, ROW_NUMBER() OVER (
+                   PARTITION BY b.amount, b.entry_date ORDER BY b.journal_entry_id, b.line_id
+               ) AS pair_no
+        FROM bank_lines b
+        WHERE NOT EXISTS (SELECT 1 FROM statement_lines s WHERE s.statement_line_id = b.reference)
+    ),
+    open_statement AS (
+        SELECT s.*, ROW_NUMBER() OVER (
+                   PARTITION BY s.amount, s.booking_date ORDER BY s.statement_line_id
+               ) AS pair_no
+        FROM statement_lines s
+        WHERE NOT EXISTS (SELECT 1 FROM bank_lines b WHERE b.reference = s.statement_line_id)
+    )
+    SELECT 'UNMATCHED_STATEMENT' AS item_type, s.statement_line_id,
+           NULL AS journal_entry_id, s.booking_date AS item_date, s.amount,
+           s.reference, s.description
+    FROM open_statement s
+    WHERE s.status = 'UNMATCHED'
+      AND NOT EXISTS (
+          SELECT 1 FROM open_bank b
+          WHERE b.amount = s.amount AND b.entry_date = s.booking_date AND b.pair_no = s.pair_no
+      )
+    UNION ALL
+    SELECT 'UNMATCHED_ACCOUNTING', NULL, CAST(b.journal_entry_id AS TEXT), b.entry_date, b.amount,
+           b.reference, b.description
+    FROM open_bank b
+    WHERE NOT EXISTS (
+        SELECT 1 FROM open_statement s
+        WHERE s.amount = b.amount AND s.booking_date = b.entry_date AND s.pair_no = b.pair_no
+    )
+    ORDER BY item_date
+""")
+
+
+def find_differences(db: Session, statement_id: str, bank_account_id: str, tenant_id: str) -> List[Dict[str, Any]]:
+    """Unmatched statement and accounting items of one statement (one query)."""
+    rows = db.execute(DIFFERENCES_QUERY, {
+        "statement_id": statement_id,
+        "bank_account_id": bank_account_id,
+        "tenant_id": tenant_id,
+    }).fetchall()
+
+    differences = []
+    for row in rows:
+        item_date = row[3]
+        if isinstance(item_date, str):
+            item_date = date.fromisoformat(item_date[:10])
+        amount = Decimal(str(row[4]))
+        if row[0] == "UNMATCHED_STATEMENT":
+            differences.append({
+                "item_type": "UNMATCHED_STATEMENT",
+                "statement_line_id": row[1],
+                "date": item_date,
+                "amount": amount,
+                "bank_amount": amount,
+                "reference": row[5],
+                "description": row[6] or "Unmatched bank transaction",
+                "suggested_account": DEFAULT_COUNTER_ACCOUNT,
+                "suggested_action": "CREATE_ENTRY",
+            })
+        else:
+            differences.append({
+                "item_type": "UNMATCHED_ACCOUNTING",
+                "journal_entry_id": row[2],
+                "date": item_date,
+                "amount": amount,
+                "accounting_amount": amount,
+                "reference": row[5],
+                "description": row[6] or "Booking without bank transaction",
+                "suggested_action": "INVESTIGATE",
+            })
+    return differences
+
+
+def resolve_accounts(db: Session, tenant_id: str, account_numbers: Iterable[str]) -> Dict[str, str]:
+    """account_number -> chart_of_accounts.id for all requested numbers (one query)."""
+    numbers = sorted(set(account_numbers))
+    if not numbers:
+        return {}
+    rows = db.execute(
+        text(
+            "SELECT account_number, id FROM domain_erp.chart_of_accounts "
+            "WHERE tenant_id = :tenant_id AND account_number IN :numbers"
+        ).bindparams(bindparam("numbers", expanding=True)),
+        {"tenant_id": tenant_id, "numbers": numbers},
+    ).fetchall()
+    accounts: Dict[str, str] = {}
+    for number, account_id in rows:
+        accounts.setdefault(str(number), str(account_id))
+    return accounts
+
+
+@dataclass
+class BookingPlan:
+    """Journal entries/lines an auto-booking run would write."""
+    entries: List[Dict[str, Any]] = field(default_factory=list)
+    lines: List[Dict[str, Any]] = field(default_factory=list)
+    matched_line_ids: List[str] = field(default_factory=list)
+    skipped: List[Dict[str, Any]] = field(default_factory=list)
+    bank_balance_change: Decimal = Decimal("0.00")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Dry-run view of the plan."""
+        return {
+            "entries": [
+                {
+                    "id": e["id"],
+                    "entry_number": e["entry_number"],
+                    "entry_date": e["entry_date"].isoformat(),
+                    "description": e["description"],
+                    "statement_line_id": e["reference"],
+                    "amount": float(e["total_debit"]),
+                }
+                for e in self.entries
+            ],
+            "lines": [
+                {
+                    "journal_entry_id": line["journal_entry_id"],
+                    "line_number": line["line_number"],
+                    "account_id": line["account_id"],
+                    "debit_amount": float(line["debit_amount"]),
+                    "credit_amount": float(line["credit_amount"]),
+                }
+                for line in self.lines
+            ],
+            "statement_lines_to_match": self.matched_line_ids,
+            "skipped": self.skipped,
+            "bank_balance_change": float(self.bank_balance_change),
+        }
+
+
+def plan_bookings(
+    suggestions: List[Dict[str, Any]],
+    accounts: Dict[str, str],
+    tenant_id: str,
+    now: datetime,
+) -> BookingPlan:
+    """
+    Build the entries and lines for ``suggestions``.
+
+    Suggestions whose debit or credit account does not exist are skipped
+    instead of producing a one-sided entry.
+    """
+    plan = BookingPlan()
+    for suggestion in suggestions:
+        debit_account = accounts.get(suggestion["account_debit"])
+        credit_account = accounts.get(suggestion["account_credit"])
+        if debit_account is None or credit_account is None:
+            missing = suggestion["account_debit"] if debit_account is None else suggestion["account_credit"]
+            plan.skipped.append({
+                "statement_line_id": suggestion.get("statement_line_id"),
+                "reason": f"Account {missing} not found",
+            })
+            continue
+
+        entry_id = str(uuid.uuid4())
+        entry_date = suggestion["date"]
+        if isinstance(entry_date, str):
+            entry_date = date.fromisoformat(entry_date)
+        amount = Decimal(str(suggestion["amount"]))
+
+        plan.entries.append({
+            "id": entry_id,
+            "tenant_id": tenant_id,
+            "entry_number": f"BANK-RECON-{entry_date.strftime('%Y%m%d')}-{entry_id.replace('-', '')[:24]}",
+            "entry_date": entry_date,
+            "posting_date": entry_date,
+            "description": suggestion["description"],
+            "reference": suggestion.get("statement_line_id"),
+            "source": "bank_reconciliation",
+            "currency": "EUR",
+            "status": "posted",
+            "total_debit": amount,
+            "total_credit": amount,
+            "created_at": now,
+            "updated_at": now,
+        })
+        for line_number, account_id, debit, credit in (
+            (1, debit_account, amount, Decimal("0.00")),
+            (2, credit_account, Decimal("0.00"), amount),
+        ):
+            plan.lines.append({
+                "id": f"{entry_id}-L{line_number}",
+                "tenant_id": tenant_id,
+                "journal_entry_id": entry_id,
+                "account_id": account_id,
+                "debit_amount": debit,
+                "credit_amount": credit,
+                "line_number": line_number,
+                "description": suggestion["description"],
+                "created_at": now,
+                "updated_at": now,
+            })
+        if suggestion.get("statement_line_id"):
+            plan.matched_line_ids.append(suggestion["statement_line_id"])
+        plan.bank_balance_change += amount
+    return plan
+
+
+def apply_booking_plan(db: Session, plan: BookingPlan, tenant_id: str) -> None:
+    """Write the plan with multi-row INSERTs; the caller commits."""
+    for start in range(0, len(plan.entries), INSERT_CHUNK_SIZE):
+        db.execute(insert(journal_entries), plan.entries[start:start + INSERT_CHUNK_SIZE])
+    for start in range(0, len(plan.lines), INSERT_CHUNK_SIZE):
+        db.execute(insert(journal_entry_lines), plan.lines[start:start + INSERT_CHUNK_SIZE])
+
+    update_lines = text(
+        "UPDATE domain_erp.bank_statement_lines SET status = 'MATCHED', updated_at = CURRENT_TIMESTAMP "
+        "WHERE tenant_id = :tenant_id AND id IN :ids"
+    ).bindparams(bindparam("ids", expanding=True))
+    for start in range(0, len(plan.matched_line_ids), INSERT_CHUNK_SIZE):
+        db.execute(update_lines, {
+            "tenant_id": tenant_id,
+            "ids": plan.matched_line_ids[start:start + INSERT_CHUNK_SIZE],
+        })
@@ -0,0 +1,285 @@
+"""
+UStVA tax buckets
+Per-period, per-tax-code aggregates of posted journal lines, computed with
+one GROUP BY in SQL. VAT returns, validation and the ELSTER export read the
+buckets instead of the journal lines; quarterly and yearly returns combine
+the monthly buckets.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+ZERO = Decimal("0.00")
+
+_MONTH_RE = re.compile(r"^(\d{4})-(0[1-9]|1[0-2])$")
+_QUARTER_RE = re.compile(r"^(\d{4})-Q([1-4])$")
+_YEAR_RE = re.compile(r"^(\d{4})$")
+
+
+@dataclass(frozen=True)
+class TaxBucket:
+    """Aggregated posted lines for one (period, tax_code, side, doc_class)."""
+    period: str
+    tax_code: str
+    side: str          # sales, purchase, other (account class)
+    doc_class: str     # AR, AP, other (document type prefix)
+    gross_amount: Decimal
+    debit_total: Decimal
+    credit_total: Decimal
+    line_count: int
+
+
+def expand_period(period: str) -> Tuple[str, List[str]]:
+    """
+    Return (return_type, months) for ``YYYY-MM``, ``YYYY-Qn`` or ``YYYY``.
+
+    >>> expand_period("2025-Q2")
+    ('quarterly', ['2025-04', '2025-05', '2025-06'])
+    """
+    if _MONTH_RE.match(period):
+        return "monthly", [period]
+    match = _QUARTER_RE.match(period)
+    if match:
+        year, quarter = match.group(1), int(match.group(2))
+        first = (quarter - 1) * 3 + 1
+        return "quarterly", [f"{year}-{m:02d}" for m in range(first, first + 3)]
+    match = _YEAR_RE.match(period)
+    if match:
+        return "yearly", [f"{period}-{m:02d}" for m in range(1, 13)]
+    raise ValueError(f"Invalid period '{period}', expected YYYY-MM, YYYY-Qn or YYYY")
+
+
+# Side/doc class are derived exactly as the former Python loop did:
+# revenue accounts 8xxx/4xxx = output tax, expense accounts 6xxx/5xxx = input tax
+_BUCKET_SELECT = """
+    SELECT tenant_id, period, tax_code, side, doc_class,
+           SUM(CASE
+                   WHEN side = 'sales' THEN CASE WHEN credit_amount > 0 THEN credit_amount ELSE debit_amount END
+                   WHEN side = 'purchase' THEN CASE WHEN debit_amount > 0 THEN debit_amount ELSE credit_amount END
+                   ELSE 0
+               END) AS gross_amount,
+           SUM(debit_amount) AS debit_total,
+           SUM(credit_amount) AS credit_total,
+           COUNT(*) AS line_count
+    FROM (
+        SELECT je.tenant_id, je.period, jel.tax_code,
+               jel.debit_amount, jel.credit_amount,
+               CASE
+                   WHEN substr(CAST(jel.account_id AS TEXT), 1, 1) IN ('8', '4') THEN 'sales'
+                   WHEN substr(CAST(jel.account_id AS TEXT), 1, 1) IN ('6', '5') THEN 'purchase'
+                   ELSE 'other'
+               END AS side,
+               CASE
+                   WHEN je.document_type LIKE 'AR%' THEN 'AR'
+                   WHEN je.document_type LIKE 'AP%' THEN 'AP'
+                   ELSE 'other'
+               END AS doc_class
+        FROM domain_erp.journal_entry_lines jel
+        JOIN domain_erp.journal_entries je ON jel.journal_entry_id = je.id
+        WHERE je.tenant_id = :tenant_id
+          AND je.period IN :periods
+          AND je.status = 'posted'
+          AND jel.tax_code IS NOT NULL
+    ) lines
+    GROUP BY tenant_id, period, tax_code, side, doc_class
+"""
+
+_BUCKET_COLUMNS = (
+    "tenant_id, period, tax_code, side, doc_class, "
+    "gross_amount, debit_total, credit_total, line_count"
+)
+
+
+def _lock_periods(db: Session, tenant_id: str, periods: List[str]) -> None:
+    """
+    Serialize refreshes of the same tenant/month (transaction-scoped).
+
+    Without the lock two concurrent refreshes both delete, then both insert
+    and the second one fails on the primary key. Locks are taken in sorted
+    order so overlapping period sets cannot deadlock. Other databases
+    (SQLite in tests) serialize writers anyway.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    for period in sorted(periods):
+        db.execute(
+            text("SELECT pg_advisory_xact_lock(hashtext(:key))"),
+            {"key": f"vat_tax_buckets:{tenant_id}:{period}"},
+        )
+
+
+def refresh_buckets(db: Session, tenant_id: str, periods: Iterable[str]) -> None:
+    """Recompute the buckets of ``periods`` from posted lines (one statement per step)."""
+    periods = list(periods)
+    if not periods:
+        return
+    _lock_periods(db, tenant_id, periods)
+    params = {"tenant_id": tenant_id, "periods": periods}
+    db.execute(
+        text(
+            "DELETE FROM domain_erp.vat_tax_buckets "
+            "WHERE tenant_id = :tenant_id AND period IN :periods"
+        ).bindparams(bindparam("periods", expanding=True)),
+        params,
+    )
+    db.execute(
+        text(
+            f"INSERT INTO domain_erp.vat_tax_buckets ({_BUCKET_COLUMNS}) {_BUCKET_SELECT}"
+        ).bindparams(bindparam("periods", expanding=True)),
+        params,
+    )
+
+
+def stale_periods(db: Session, tenant_id: str, periods: Iterable[str]) -> List[str]:
+    """
+    Months of ``periods`` whose buckets are missing or outdated.
+
+    A month is outdated if one of its journal entries (in any status, so
+    reversals and cancellations count) was created or changed at or after
+    the bucket refresh. Closed months stay untouched.
+    """
+    periods = list(periods)
+    if not periods:
+        return []
+    rows = db.execute(
+        text("""
+            SELECT b.period
+            FROM (
+                SELECT period, MIN(refreshed_at) AS refreshed_at
+                FROM domain_erp.vat_tax_buckets
+                WHERE tenant_id = :tenant_id AND period IN :periods
+                GROUP BY period
+            ) b
+            WHERE NOT EXISTS (
+                SELECT 1 FROM domain_erp.journal_entries je
+                WHERE je.tenant_id = :tenant_id
+                  AND je.period = b.period
+                  AND COALESCE(je.updated_at, je.created_at) >= b.refreshed_at
+            )
+        """).bindparams(bindparam("periods", expanding=True)),
+        {"tenant_id": tenant_id, "periods": periods},
+    ).fetchall()
+    fresh = {str(row[0]) for row in rows}
+    return [p for p in periods if p not in fresh]
+
+
+def load_buckets(db: Session, tenant_id: str, periods: Iterable[str]) -> List[TaxBucket]:
+    rows = db.execute(
+        text(
+            "SELECT period, tax_code, side, doc_class, gross_amount, debit_total, credit_total, line_count "
+            "FROM domain_erp.vat_tax_buckets "
+            "WHERE tenant_id = :tenant_id AND period IN :periods"
+        ).bindparams(bindparam("periods", expanding=True)),
+        {"tenant_id": tenant_id, "periods": list(periods)},
+    ).fetchall()
+    return [
+        TaxBucket(
+            period=str(row[0]),
+            tax_code=str(row[1]),
+            side=str(row[2]),
+            doc_class=str(row[3]),
+            gross_amount=Decimal(str(row[4] or 0)),
+            debit_total=Decimal(str(row[5] or 0)),
+            credit_total=Decimal(str(row[6] or 0)),
+            line_count=int(row[7] or 0),
+        )
+        for row in rows
+    ]
+
+
+def get_buckets(
+    db: Session,
+    tenant_id: str,
+    periods: List[str],
+    refresh: bool = False,
+) -> List[TaxBucket]:
+    """
+    Monthly buckets for ``periods``.
+
+    Only stale months (see ``stale_periods``) are recomputed; ``refresh``
+    recomputes all of them, e.g. after entries were deleted outright.
+    """
+    stale = periods if refresh else stale_periods(db, tenant_id, periods)
+    refresh_buckets(db, tenant_id, stale)
+    return load_buckets(db, tenant_id, periods)
+
+
+def load_tax_keys(db: Session, tenant_id: str) -> Dict[str, Dict]:
+    rows = db.execute(text("""
+        SELECT code, steuersatz, ustva_position, ustva_bezeichnung
+        FROM domain_erp.tax_keys
+        WHERE tenant_id = :tenant_id AND active = true
+    """), {"tenant_id": tenant_id}).fetchall()
+    return {
+        str(row[0]): {
+            "rate": Decimal(str(row[1])),
+            "ustva_position": str(row[2]) if row[2] else "",
+            "ustva_description": str(row[3]) if row[3] else "",
+        }
+        for row in rows
+    }
+
+
+def compute_positions(buckets: Iterable[TaxBucket], tax_key_map: Dict[str, Dict]) -> Dict:
+    """
+    Turn buckets into UStVA positions and return totals.
+
+    Net/tax are split from the gross sum of each bucket; since the split is
+    linear this equals summing per-line splits.
+    """
+    position_totals: Dict[str, Dict] = {}
+
+    for bucket in buckets:
+        tax_key = tax_key_map.get(bucket.tax_code)
+        if not tax_key or not tax_key["ustva_position"] or bucket.side == "other":
+            continue
+        ustva_pos = tax_key["ustva_position"]
+        totals = position_totals.setdefault(ustva_pos, {
+            "position_code": ustva_pos,
+            "description": tax_key["ustva_description"],
+            "net_amount": ZERO,
+            "tax_amount": ZERO,
+            "tax_rate": tax_key["rate"],
+            "sales_net": ZERO,
+            "sales_tax": ZERO,
+            "purchase_net": ZERO,
+            "purchase_tax": ZERO,
+        })
+
+        net_amount = bucket.gross_amount / (Decimal("1") + tax_key["rate"] / Decimal("100"))
+        tax_amount = bucket.gross_amount - net_amount
+        prefix = "sales" if bucket.side == "sales" else "purchase"
+        totals[f"{prefix}_net"] += net_amount
+        totals[f"{prefix}_tax"] += tax_amount
+        totals["net_amount"] += net_amount
+        totals["tax_amount"] += tax_amount
+
+    total_output_tax = sum((p["sales_tax"] for p in position_totals.values()), ZERO)
+    total_input_tax = sum((p["purchase_tax"] for p in position_totals.values()), ZERO)
+    return {
+        "positions": list(position_totals.values()),
+        "total_sales_net": sum((p["sales_net"] for p in position_totals.values()), ZERO),
+        "total_purchase_net": sum((p["purchase_net"] for p in position_totals.values()), ZERO),
+        "total_output_tax": total_output_tax,
+        "total_input_tax": total_input_tax,
+        "vat_payable": total_output_tax - total_input_tax,
+    }
+
+
+def gl_totals(buckets: Iterable[TaxBucket]) -> Tuple[Decimal, Decimal]:
+    """(sales, purchases) as used by validation: AR credits and AP debits of tax-coded lines."""
+    sales = ZERO
+    purchases = ZERO
+    for bucket in buckets:
+        if bucket.doc_class == "AR":
+            sales += bucket.credit_total
+        elif bucket.doc_class == "AP":
+            purchases += bucket.debit_total
+    return sales, purchases
@@ -329,7 +329,8 @@ async def search_customers(q: str = "", tenant_id: str = "system") -> dict:
     """Sucht Kunden (Autocomplete)"""
     try:
         customer_repo = container.resolve(CustomerRepository)
-        customers = await customer_repo.get_all(tenant_id, search=q, limit=10)
+        page = await customer_repo.search_page(tenant_id, search=q, limit=10)
+        customers = page.items
 
         # Format for autocomplete
         results = [
@@ -3,7 +3,7 @@ SQLAlchemy models for VALEO-NeuroERP
 Database entities following domain-driven design
 """
 
-from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, Text, ForeignKey, DECIMAL
+from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, Text, ForeignKey, DECIMAL, DDL, Index, event
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects import postgresql
@@ -338,12 +338,26 @@ class PolicyRule(Base):
 
 # Audit & Compliance Models
 class AuditLog(Base):
-    """Audit log for compliance tracking"""
+    """Audit log for compliance tracking (monthly range partitions on timestamp)"""
     __tablename__ = "audit_logs"
-    __table_args__ = {"schema": "domain_shared", "extend_existing": True}
+    __table_args__ = (
+        # Composite indexes match the /audit/logs filter set and the
+        # keyset order (timestamp DESC, id DESC)
+        Index("ix_audit_logs_ts_id", "timestamp", "id"),
+        Index("ix_audit_logs_tenant_ts_id", "tenant_id", "timestamp", "id"),
+        Index("ix_audit_logs_tenant_entity_ts_id", "tenant_id", "entity_type", "entity_id", "timestamp", "id"),
+        Index("ix_audit_logs_tenant_user_ts_id", "tenant_id", "user_id", "timestamp", "id"),
+        Index("ix_audit_logs_tenant_action_ts_id", "tenant_id", "action", "timestamp", "id"),
+        {
+            "schema": "domain_shared",
+            "extend_existing": True,
+            "postgresql_partition_by": "RANGE (timestamp)",
+        },
+    )
 
     id = Column(String, primary_key=True)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # Part of the primary key because PostgreSQL requires the partition key in it
+    timestamp = Column(DateTime(timezone=True), primary_key=True, server_default=func.now(), nullable=False)
     user_id = Column(String, ForeignKey("domain_shared.users.id"), nullable=False)
     user_email = Column(String(100), nullable=False)
     tenant_id = Column(String, ForeignKey("domain_shared.tenants.id"), nullable=False)
@@ -356,6 +370,28 @@ class AuditLog(Base):
     correlation_id = Column(String(50), nullable=True)
 
 
+# Partition maintenance for audit_logs (DDL shared with the Alembic migration)
+from .audit_partitions import (  # noqa: E402
+    AUDIT_LOG_DEFAULT_PARTITION,
+    AUDIT_LOG_PARTITION_FUNCTION,
+    AUDIT_LOG_PARTITION_MONTHS_AHEAD,
+)
+
+event.listen(
+    AuditLog.__table__,
+    "after_create",
+    DDL(AUDIT_LOG_PARTITION_FUNCTION).execute_if(dialect="postgresql"),
+)
+event.listen(
+    AuditLog.__table__,
+    "after_create",
+    DDL(
+        f"{AUDIT_LOG_DEFAULT_PARTITION}; "
+        f"SELECT domain_shared.ensure_audit_log_partitions(now()::date, {AUDIT_LOG_PARTITION_MONTHS_AHEAD});"
+    ).execute_if(dialect="postgresql"),
+)
+
+
 # Import Agrar models
 from .agrar_models import (
     Saatgut,
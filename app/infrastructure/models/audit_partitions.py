@@ -0,0 +1,53 @@
+"""
+Partition maintenance for domain_shared.audit_logs
+
+Single definition of the DDL used by ``Base.metadata.create_all`` (see
+``AuditLog``) and by the Alembic migration ``audit_log_partitioning``.
+"""
+
+# Monthly partitions are kept this many months ahead of the current month
+AUDIT_LOG_PARTITION_MONTHS_AHEAD = 3
+
+# Creates the missing monthly partitions from ``from_month`` up to
+# ``months_ahead`` months after the current month. Rows of a month that
+# already landed in the DEFAULT partition (no partition existed yet) would
+# make ``CREATE TABLE ... PARTITION OF`` fail, so each new partition is
+# created detached, those rows are moved into it and it is attached
+# afterwards. The advisory lock serializes concurrent callers (replicas).
+AUDIT_LOG_PARTITION_FUNCTION = """
+CREATE OR REPLACE FUNCTION domain_shared.ensure_audit_log_partitions(from_month date, months_ahead int)
+RETURNS void AS $$
+DECLARE
+    month_start date := date_trunc('month', from_month)::date;
+    month_end date;
+    last_month date := (date_trunc('month', now()) + make_interval(months => months_ahead))::date;
+    partition_name text;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('domain_shared.audit_logs partitions'));
+    WHILE month_start <= last_month LOOP
+        month_end := (month_start + interval '1 month')::date;
+        partition_name := 'audit_logs_' || to_char(month_start, 'YYYY_MM');
+        IF to_regclass('domain_shared.' || quote_ident(partition_name)) IS NULL THEN
+            EXECUTE 'CREATE TABLE domain_shared.' || quote_ident(partition_name)
+                || ' (LIKE domain_shared.audit_logs INCLUDING DEFAULTS INCLUDING CONSTRAINTS)';
+            IF to_regclass('domain_shared.audit_logs_default') IS NOT NULL THEN
+                EXECUTE 'WITH moved AS (DELETE FROM domain_shared.audit_logs_default'
+                    || ' WHERE timestamp >= ' || quote_literal(month_start)
+                    || ' AND timestamp < ' || quote_literal(month_end)
+                    || ' RETURNING *) INSERT INTO domain_shared.' || quote_ident(partition_name)
+                    || ' SELECT * FROM moved';
+            END IF;
+            EXECUTE 'ALTER TABLE domain_shared.audit_logs ATTACH PARTITION domain_shared.'
+                || quote_ident(partition_name) || ' FOR VALUES FROM ('
+                || quote_literal(month_start) || ') TO (' || quote_literal(month_end) || ')';
+        END IF;
+        month_start := month_end;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+AUDIT_LOG_DEFAULT_PARTITION = (
+    "CREATE TABLE IF NOT EXISTS domain_shared.audit_logs_default "
+    "PARTITION OF domain_shared.audit_logs DEFAULT"
+)
@@ -6,38 +6,44 @@ Caches vector search results to improve performance
 import hashlib
 import json
 import logging
-from typing import Any, Dict, List, Optional
-from datetime import datetime, timedelta
-from dataclasses import dataclass, asdict
-
-logger = logging.getLogger(__name__)
+from typing import Any, Dict, List, Optional, Set
 
+from app.core.cache import CacheBackend, TTLCache, get_cache, get_shared_backend
 
-@dataclass
-class CachedResult:
-    """Cached RAG query result."""
-    query: str
-    results: List[Dict[str, Any]]
-    timestamp: datetime
-    ttl_seconds: int
-    
-    def is_expired(self) -> bool:
-        """Check if cache entry is expired."""
-        expiry = self.timestamp + timedelta(seconds=self.ttl_seconds)
-        return datetime.utcnow() > expiry
+logger = logging.getLogger(__name__)
 
 
 class RAGQueryCache:
     """
-    In-memory cache for RAG queries.
-    In production: Use Redis for distributed caching.
+    Bounded LRU/TTL cache for RAG queries.
+    Shared across replicas when CACHE_BACKEND_URL is configured.
     """
     
-    def __init__(self, default_ttl: int = 300):  # 5 minutes
-        self.cache: Dict[str, CachedResult] = {}
+    def __init__(
+        self,
+        default_ttl: int = 300,  # 5 minutes
+        max_entries: int = 2048,
+        max_bytes: int = 64 * 1024 * 1024,
+        backend: Optional[CacheBackend] = None
+    ):
         self.default_ttl = default_ttl
-        self.hits = 0
-        self.misses = 0
+        self.cache: TTLCache[List[Dict[str, Any]]] = get_cache(
+            "rag_query",
+            max_entries=max_entries,
+            max_bytes=max_bytes,
+            default_ttl=default_ttl,
+            backend=backend
+        )
+        # Cache keys per collection, used for targeted invalidation
+        self._collections: Dict[str, Set[str]] = {}
+    
+    @property
+    def hits(self) -> int:
+        return self.cache.stats.hits
+    
+    @property
+    def misses(self) -> int:
+        return self.cache.stats.misses
     
     def _make_key(
         self,
@@ -62,21 +68,10 @@ class RAGQueryCache:
     ) -> Optional[List[Dict[str, Any]]]:
         """Get cached results if available and not expired."""
         key = self._make_key(query, collection, filters)
-        
-        cached = self.cache.get(key)
-        if cached is None:
-            self.misses += 1
-            return None
-        
-        if cached.is_expired():
-            logger.debug(f"Cache expired for key: {key}")
-            del self.cache[key]
-            self.misses += 1
-            return None
-        
-        self.hits += 1
-        logger.debug(f"Cache hit for query: {query[:50]}...")
-        return cached.results
+        results = self.cache.get(key)
+        if results is not None:
+            logger.debug(f"Cache hit for query: {query[:50]}...")
+        return results
     
     def set(
         self,
@@ -88,15 +83,12 @@ class RAGQueryCache:
     ) -> None:
         """Cache query results."""
         key = self._make_key(query, collection, filters)
-        
-        cached_result = CachedResult(
-            query=query,
-            results=results,
-            timestamp=datetime.utcnow(),
-            ttl_seconds=ttl or self.default_ttl
-        )
-        
-        self.cache[key] = cached_result
+        self.cache.set(key, results, ttl=ttl or self.default_ttl)
+        keys = self._collections.setdefault(collection, set())
+        keys.add(key)
+        if len(keys) > self.cache.max_entries:
+            # Drop keys the LRU has already evicted
+            keys &= set(self.cache.keys())
         logger.debug(f"Cached results for query: {query[:50]}...")
     
     def invalidate(
@@ -111,15 +103,15 @@ class RAGQueryCache:
         """
         if collection is None:
             # Clear all
-            count = len(self.cache)
-            self.cache.clear()
+            count = self.cache.clear()
+            self._collections.clear()
             logger.info(f"Invalidated entire RAG cache ({count} entries)")
             return count
         
-        # Invalidate by collection
-        # (Simple implementation: clear all for now)
-        count = len(self.cache)
-        self.cache.clear()
+        count = 0
+        for key in self._collections.pop(collection, set()):
+            if self.cache.delete(key):
+                count += 1
         logger.info(
             f"Invalidated RAG cache for collection={collection} "
             f"({count} entries)"
@@ -128,34 +120,19 @@ class RAGQueryCache:
     
     def cleanup_expired(self) -> int:
         """Remove expired entries. Returns count of removed entries."""
-        before_count = len(self.cache)
-        
-        expired_keys = [
-            key for key, cached in self.cache.items()
-            if cached.is_expired()
-        ]
-        
-        for key in expired_keys:
-            del self.cache[key]
-        
-        removed = len(expired_keys)
+        removed = self.cache.cleanup_expired()
+        live = set(self.cache.keys())
+        for keys in self._collections.values():
+            keys &= live
         if removed > 0:
             logger.info(f"Cleaned up {removed} expired cache entries")
-        
         return removed
     
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics."""
-        total_requests = self.hits + self.misses
-        hit_rate = self.hits / total_requests if total_requests > 0 else 0
-        
-        return {
-            "size": len(self.cache),
-            "hits": self.hits,
-            "misses": self.misses,
-            "hit_rate": hit_rate,
-            "total_requests": total_requests
-        }
+        stats = self.cache.get_stats()
+        stats["total_requests"] = stats["hits"] + stats["misses"]
+        return stats
 
 
 # Global instance
@@ -166,6 +143,6 @@ def get_query_cache() -> RAGQueryCache:
     """Get the global query cache instance."""
     global _query_cache
     if _query_cache is None:
-        _query_cache = RAGQueryCache()
+        _query_cache = RAGQueryCache(backend=get_shared_backend())
     return _query_cache
 
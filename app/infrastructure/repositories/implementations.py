@@ -3,9 +3,10 @@ Concrete repository implementations for VALEO-NeuroERP
 SQLAlchemy-based implementations of repository interfaces
 """
 
+import asyncio
 from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func, or_
+from sqlalchemy import and_, case, extract, func, select
 
 from .base_repository import BaseRepositoryImpl
 from .interfaces import (
@@ -18,6 +19,13 @@ from ..models import (
     Tenant, User, Customer, Lead, Contact, Activity, FarmProfile, Article, Warehouse,
     StockMovement, InventoryCount, Account, JournalEntry, JournalEntryLine
 )
+from .search import (
+    SearchPage, decode_cursor, encode_cursor, estimate_count, keyset_after, match, normalize_term, rank,
+    search_text,
+)
+
+# Must match the expression of the trigram index ix_customers_search_trgm
+CUSTOMER_SEARCH_TEXT = search_text(Customer.company_name, Customer.contact_person)
 
 
 # Shared Repositories
@@ -73,6 +81,14 @@ class CustomerRepositoryImpl(BaseRepositoryImpl[Customer, dict, dict], CustomerR
             .first()
         )
 
+    def _filters(self, tenant_id: str, term: str | None) -> list:
+        filters = [Customer.is_active == True]
+        if tenant_id:
+            filters.append(Customer.tenant_id == tenant_id)
+        if term:
+            filters.append(match(CUSTOMER_SEARCH_TEXT, term))
+        return filters
+
     async def get_all(
         self,
         tenant_id: str,
@@ -81,40 +97,74 @@ class CustomerRepositoryImpl(BaseRepositoryImpl[Customer, dict, dict], CustomerR
         search: str | None = None,
         **kwargs
     ) -> list[Customer]:
-        """Get customers for a tenant with optional search."""
-        query = self.session.query(Customer).filter(Customer.is_active == True)
-
-        if tenant_id:
-            query = query.filter(Customer.tenant_id == tenant_id)
-
-        if search:
-            like = f"%{search}%"
-            query = query.filter(
-                or_(
-                    Customer.company_name.ilike(like),
-                    Customer.contact_person.ilike(like)
-                )
-            )
-
-        return query.order_by(Customer.company_name.asc()).offset(skip).limit(limit).all()
-
-    async def count(self, tenant_id: str, search: str | None = None, **kwargs) -> int:
-        """Count customers for a tenant with optional search."""
-        query = self.session.query(Customer).filter(Customer.is_active == True)
-
-        if tenant_id:
-            query = query.filter(Customer.tenant_id == tenant_id)
+        """Get customers for a tenant with optional search (OFFSET paging; prefer search_page)."""
+        return (
+            self.session.query(Customer)
+            .filter(*self._filters(tenant_id, normalize_term(search)))
+            .order_by(Customer.company_name.asc(), Customer.id.asc())
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
 
-        if search:
-            like = f"%{search}%"
-            query = query.filter(
-                or_(
-                    Customer.company_name.ilike(like),
-                    Customer.contact_person.ilike(like)
-                )
-            )
+    async def count(self, tenant_id: str, search: str | None = None, exact: bool = True, **kwargs) -> int:
+        """Count customers for a tenant with optional search; ``exact=False`` asks the planner."""
+        filters = self._filters(tenant_id, normalize_term(search))
+        if not exact:
+            return estimate_count(self.session, select(Customer.id).where(*filters))
+        return self.session.query(Customer).filter(*filters).count()
 
-        return query.count()
+    async def search_page(
+        self,
+        tenant_id: str,
+        search: str | None = None,
+        cursor: str | None = None,
+        limit: int = 50,
+        exact_count: bool = False,
+    ) -> SearchPage:
+        """
+        Keyset page of active customers.
+
+        With a search term hits are ranked by similarity (ties by id),
+        otherwise sorted by company name. ``total`` is only computed for the
+        first page; it is a planner estimate unless ``exact_count`` is set or
+        the first page already holds every hit. Raises ValueError for a
+        malformed cursor.
+        """
+        term = normalize_term(search)
+        filters = self._filters(tenant_id, term)
+        if term:
+            score = rank(self.session, CUSTOMER_SEARCH_TEXT, term)
+            keys, descending = [score, Customer.id], [True, False]
+            query = self.session.query(Customer, score.label("score"))
+        else:
+            keys, descending = [Customer.company_name, Customer.id], [False, False]
+            query = self.session.query(Customer, Customer.company_name)
+
+        if cursor:
+            values = decode_cursor(cursor, 2)
+            if term:
+                values[0] = float(values[0])
+            filters.append(keyset_after(keys, values, descending))
+
+        rows = (
+            query.filter(*filters)
+            .order_by(*[key.desc() if desc else key.asc() for key, desc in zip(keys, descending)])
+            .limit(limit + 1)
+            .all()
+        )
+        page = SearchPage(items=[row[0] for row in rows[:limit]])
+        if len(rows) > limit:
+            last_customer, last_key = rows[limit - 1]
+            page.next_cursor = encode_cursor(last_key, last_customer.id)
+
+        if cursor is None:
+            if page.next_cursor is None:
+                page.total = len(page.items)
+            else:
+                page.total = await self.count(tenant_id, search=term, exact=exact_count)
+                page.total_is_estimate = not exact_count
+        return page
 
 
 class LeadRepositoryImpl(BaseRepositoryImpl[Lead, dict, dict], LeadRepository):
@@ -235,6 +285,23 @@ class ArticleRepositoryImpl(BaseRepositoryImpl[Article, dict, dict], ArticleRepo
             self.session.rollback()
             return False
 
+    async def get_low_stock_page(self, tenant_id: str, after_id: str | None = None, limit: int = 1000) -> list[Article]:
+        """Get active articles below minimum stock, keyset-paged by id (in a worker thread)"""
+        return await asyncio.to_thread(self._low_stock_page, tenant_id, after_id, limit)
+
+    def _low_stock_page(self, tenant_id: str, after_id: str | None, limit: int) -> list[Article]:
+        query = self.session.query(Article).filter(
+            and_(
+                Article.tenant_id == tenant_id,
+                Article.is_active == True,
+                Article.min_stock.isnot(None),
+                Article.current_stock < Article.min_stock
+            )
+        )
+        if after_id is not None:
+            query = query.filter(Article.id > after_id)
+        return query.order_by(Article.id).limit(limit).all()
+
 
 class WarehouseRepositoryImpl(BaseRepositoryImpl[Warehouse, dict, dict], WarehouseRepository):
     """Warehouse repository implementation"""
@@ -244,9 +311,50 @@ class WarehouseRepositoryImpl(BaseRepositoryImpl[Warehouse, dict, dict], Warehou
 
 class StockMovementRepositoryImpl(BaseRepositoryImpl[StockMovement, dict, dict], StockMovementRepository):
     """Stock movement repository implementation"""
+    OUTBOUND_TYPES = ("out", "outbound")
+
     def __init__(self, session: Session):
         super().__init__(session, StockMovement)
 
+    async def get_monthly_outbound(
+        self, article_ids: list[str], tenant_id: str, since: datetime
+    ) -> dict[str, dict]:
+        """
+        Get outbound quantity per month and movement count per article since a date.
+
+        One GROUP BY over the batch; runs in a worker thread so batches on
+        separate repositories (sessions) can overlap.
+        """
+        return await asyncio.to_thread(self._monthly_outbound, article_ids, tenant_id, since)
+
+    def _monthly_outbound(self, article_ids: list[str], tenant_id: str, since: datetime) -> dict[str, dict]:
+        year = extract("year", StockMovement.created_at)
+        month = extract("month", StockMovement.created_at)
+        outbound = case(
+            (StockMovement.movement_type.in_(self.OUTBOUND_TYPES), func.abs(StockMovement.quantity)),
+            else_=0,
+        )
+        rows = (
+            self.session.query(StockMovement.article_id, year, month, func.sum(outbound), func.count())
+            .filter(
+                and_(
+                    StockMovement.tenant_id == tenant_id,
+                    StockMovement.article_id.in_(article_ids),
+                    StockMovement.created_at >= since
+                )
+            )
+            .group_by(StockMovement.article_id, year, month)
+            .all()
+        )
+
+        stats: dict[str, dict] = {}
+        for article_id, row_year, row_month, quantity, count in rows:
+            entry = stats.setdefault(article_id, {"months": {}, "movements": 0})
+            entry["movements"] += count
+            if quantity:
+                entry["months"][f"{int(row_year):04d}-{int(row_month):02d}"] = float(quantity)
+        return stats
+
 
 class InventoryCountRepositoryImpl(BaseRepositoryImpl[InventoryCount, dict, dict], InventoryCountRepository):
     """Inventory count repository implementation"""
@@ -4,6 +4,7 @@ Abstract interfaces defining repository contracts
 """
 
 from abc import ABC, abstractmethod
+from datetime import datetime
 from typing import List, Optional, Dict, Any, TypeVar, Generic
 
 T = TypeVar('T')
@@ -94,6 +95,18 @@ class CustomerRepository(BaseRepository[T, TCreate, TUpdate], ABC):
         """Get customer by customer number"""
         pass
 
+    @abstractmethod
+    async def search_page(
+        self,
+        tenant_id: str,
+        search: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        exact_count: bool = False,
+    ) -> Any:
+        """Keyset page of customers, ranked by relevance when searching"""
+        pass
+
 
 class LeadRepository(BaseRepository[T, TCreate, TUpdate], ABC):
     """Lead repository interface"""
@@ -133,6 +146,11 @@ class ArticleRepository(BaseRepository[T, TCreate, TUpdate], ABC):
         """Update article stock level"""
         pass
 
+    @abstractmethod
+    async def get_low_stock_page(self, tenant_id: str, after_id: Optional[str] = None, limit: int = 1000) -> List[T]:
+        """Get active articles below minimum stock, keyset-paged by id"""
+        pass
+
 
 class WarehouseRepository(BaseRepository[T, TCreate, TUpdate], ABC):
     """Warehouse repository interface"""
@@ -141,7 +159,13 @@ class WarehouseRepository(BaseRepository[T, TCreate, TUpdate], ABC):
 
 class StockMovementRepository(BaseRepository[T, TCreate, TUpdate], ABC):
     """Stock movement repository interface"""
-    pass
+
+    @abstractmethod
+    async def get_monthly_outbound(
+        self, article_ids: List[str], tenant_id: str, since: datetime
+    ) -> Dict[str, Dict[str, Any]]:
+        """Get outbound quantity per month and movement count per article since a date"""
+        pass
 
 
 class InventoryCountRepository(BaseRepository[T, TCreate, TUpdate], ABC):
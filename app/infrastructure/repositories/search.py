@@ -0,0 +1,117 @@
+"""
+Search and keyset pagination helpers for repository list queries.
+
+Search terms are matched against one normalized expression (lower-cased,
+concatenated columns) so PostgreSQL can serve ``LIKE '%term%'`` from a single
+``pg_trgm`` GIN expression index and rank hits by ``word_similarity``. Pages
+are addressed by opaque cursors over the sort key instead of OFFSET, and
+totals can be estimated from the planner instead of a second COUNT(*).
+"""
+
+import base64
+import json
+from dataclasses import dataclass
+from typing import Any, List, Optional, Sequence
+
+from sqlalchemy import and_, case, func, literal, literal_column, or_, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import ColumnElement, Select
+
+
+@dataclass
+class SearchPage:
+    """One page of a keyset-paginated list."""
+    items: List[Any]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+    total_is_estimate: bool = False
+
+
+def encode_cursor(*values: Any) -> str:
+    """Opaque cursor for the sort key of the last row of a page."""
+    raw = json.dumps(values, default=str, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Decode a cursor with ``size`` key values; raises ValueError if it is malformed."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def search_text(*columns) -> ColumnElement:
+    """
+    Lower-cased concatenation of ``columns``; must match the trigram index expression.
+
+    The separators are inlined as SQL literals: with server-side parameters
+    the planner would not match a parameterised expression to the index.
+    """
+    empty, space = literal_column("''"), literal_column("' '")
+    expression = func.coalesce(columns[0], empty)
+    for column in columns[1:]:
+        expression = expression.op("||")(space).op("||")(func.coalesce(column, empty))
+    return func.lower(expression)
+
+
+def normalize_term(term: Optional[str]) -> Optional[str]:
+    term = " ".join((term or "").split()).lower()
+    return term or None
+
+
+def match(expression: ColumnElement, term: str) -> ColumnElement:
+    """Substring match (``LIKE '%term%'``, wildcards escaped) served by the trigram index."""
+    return expression.like(f"%{escape_like(term)}%", escape="/")
+
+
+def escape_like(term: str) -> str:
+    return term.replace("/", "//").replace("%", "/%").replace("_", "/_")
+
+
+def rank(session: Session, expression: ColumnElement, term: str) -> ColumnElement:
+    """
+    Relevance of a hit, higher is better.
+
+    PostgreSQL: ``word_similarity`` from pg_trgm. Elsewhere (SQLite tests)
+    prefix hits rank before other substring hits.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        return func.word_similarity(term, expression)
+    return case((expression.like(f"{escape_like(term)}%", escape="/"), literal(1.0)), else_=literal(0.5))
+
+
+def estimate_count(session: Session, stmt: Select) -> int:
+    """
+    Planner row estimate of ``stmt`` (PostgreSQL), exact COUNT(*) elsewhere.
+
+    Good enough for "about N results" and page counts; use an exact count
+    where the number is shown as a fact (exports, reconciliations).
+    """
+    bind = session.get_bind()
+    if bind.dialect.name != "postgresql":
+        return session.execute(select(func.count()).select_from(stmt.order_by(None).subquery())).scalar() or 0
+    compiled = stmt.order_by(None).compile(dialect=bind.dialect)
+    plan = session.connection().exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def keyset_after(keys: Sequence[ColumnElement], values: Sequence[Any], descending: Sequence[bool]) -> ColumnElement:
+    """
+    Rows strictly after ``values`` in the order given by ``keys``.
+
+    Written as an OR chain so mixed sort directions work and each branch can
+    use the index on the sort key.
+    """
+    branches = []
+    for position, (key, value, desc) in enumerate(zip(keys, values, descending)):
+        equal = [k == v for k, v in zip(keys[:position], values[:position])]
+        branches.append(and_(*equal, key < value if desc else key > value))
+    return or_(*branches)
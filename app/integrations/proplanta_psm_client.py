@@ -9,6 +9,8 @@ from pathlib import Path
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 
+from app.core.cache import TTLCache
+
 logger = logging.getLogger(__name__)
 
 # Config-Pfad
@@ -26,6 +28,7 @@ if CONFIG_PATH.exists():
 PROPLANTA_PSM_URL = _cfg.get("url") or "https://psm.proplanta.de/list"
 PROPLANTA_USERNAME = _cfg.get("username") or ""
 PROPLANTA_PASSWORD = _cfg.get("password") or ""
+PSM_CACHE_TTL_SECONDS = 24 * 3600
 
 
 class PSMData:
@@ -73,7 +76,12 @@ class ProplantaPSMClient:
 
     def __init__(self):
         self.mcp_server_name = "proplanta-psm-scraper"
-        self._cache = {}  # Simple cache für PSM Daten
+        # Vollständiger Datenbestand des letzten Syncs (wird beim Sync ersetzt)
+        self._synced: Dict[str, PSMData] = {}
+        # Begrenzter LRU/TTL-Cache nur für Einzelabfragen (Einträge verfallen nach 24h)
+        self._cache: TTLCache[PSMData] = TTLCache(
+            "proplanta_psm", max_entries=20000, default_ttl=PSM_CACHE_TTL_SECONDS
+        )
         self._last_sync = None
 
     def _call_mcp_tool(self, tool_name: str, args: Dict[str, Any]) -> Dict[str, Any]:
@@ -199,8 +207,9 @@ class ProplantaPSMClient:
                     except json.JSONDecodeError as e:
                         logger.error(f"Failed to parse PSM data: {e}")
 
-            # Cache the data
-            self._cache = {item.id: item for item in psm_items}
+            # Store the complete dataset; cached lookups may be outdated now
+            self._synced = {item.id: item for item in psm_items}
+            self._cache.clear()
             self._last_sync = datetime.now()
 
             logger.info(f"Synchronized {len(psm_items)} PSM items")
@@ -263,9 +272,10 @@ class ProplantaPSMClient:
             PSM Daten oder None wenn nicht gefunden
         """
         try:
-            # Check cache first
-            if psm_id in self._cache:
-                return self._cache[psm_id]
+            # Check synced data and cache first
+            cached = self._synced.get(psm_id) or self._cache.get(psm_id)
+            if cached is not None:
+                return cached
 
             # Call MCP tool to get PSM details
             result = self._call_mcp_tool("get_psm_details", {
@@ -286,7 +296,7 @@ class ProplantaPSMClient:
 
                             psm_item = PSMData(item_data)
                             # Cache the result
-                            self._cache[psm_id] = psm_item
+                            self._cache.set(psm_id, psm_item)
                             return psm_item
                     except json.JSONDecodeError as e:
                         logger.error(f"Failed to parse PSM details: {e}")
@@ -299,12 +309,12 @@ class ProplantaPSMClient:
 
     def get_all_psm(self) -> List[PSMData]:
         """
-        Holt alle gecachten PSM Daten
+        Holt alle PSM Daten des letzten Syncs
 
         Returns:
             Liste aller PSM Daten
         """
-        return list(self._cache.values())
+        return list(self._synced.values())
 
     def get_active_psm(self) -> List[PSMData]:
         """
@@ -313,7 +323,7 @@ class ProplantaPSMClient:
         Returns:
             Liste der aktiven PSM Daten
         """
-        return [psm for psm in self._cache.values() if not psm.is_expired()]
+        return [psm for psm in self._synced.values() if not psm.is_expired()]
 
     def get_expired_psm(self) -> List[PSMData]:
         """
@@ -322,7 +332,7 @@ class ProplantaPSMClient:
         Returns:
             Liste der abgelaufenen PSM Daten
         """
-        return [psm for psm in self._cache.values() if psm.is_expired()]
+        return [psm for psm in self._synced.values() if psm.is_expired()]
 
 
 # Global client instance
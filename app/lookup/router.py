@@ -1,73 +1,79 @@
 """
 Lookup Router
-Autocomplete-API für Kunden, Artikel, etc.
+Autocomplete-API für Kunden, Artikel, Lieferanten und Konten
 """
 
 from __future__ import annotations
-from fastapi import APIRouter, Query
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, Query
+from typing import Dict, Any, Optional
 import logging
 
+from app.einkauf.models import Lieferant
+from app.infrastructure.models import Account, Article, Customer
+from app.services.autocomplete_index import DEFAULT_TENANT, AutocompleteService, AutocompleteSource
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/mcp/lookup", tags=["lookup"])
 
-# Mock-Daten (TODO: durch echte DB-Suche ersetzen)
-_FAKE_CUSTOMERS = [
-    {"id": "CUST-001", "label": "Landhandel Meyer GmbH", "hint": "Emden"},
-    {"id": "CUST-002", "label": "AGRAR Nord GmbH", "hint": "Oldenburg"},
-    {"id": "CUST-003", "label": "Müller Agrar KG", "hint": "Bremen"},
-    {"id": "CUST-004", "label": "Schmidt Landtechnik", "hint": "Leer"},
-    {"id": "CUST-005", "label": "Weber Großhandel", "hint": "Wilhelmshaven"},
-]
+AUTOCOMPLETE_SOURCES = {
+    source.kind: source
+    for source in (
+        AutocompleteSource("customers", Customer, number="customer_number", label="company_name", hint="city"),
+        AutocompleteSource(
+            "articles", Article, number="article_number", label="name", hint="unit",
+            extras=(("cost", "purchase_price"), ("price", "sales_price")),
+        ),
+        AutocompleteSource(
+            "suppliers", Lieferant, number="lieferantennummer", label="firmenname", hint="ort",
+            tenant=None, active="aktiv", deleted=None,
+        ),
+        AutocompleteSource("accounts", Account, number="account_number", label="account_name", hint="account_type"),
+    )
+}
+
+autocomplete = AutocompleteService(AUTOCOMPLETE_SOURCES)
+autocomplete.install_hooks()
 
-_FAKE_ARTICLES = [
-    {"id": "WHEAT-11", "label": "Weizen A", "hint": "25kg Sack", "cost": 2.1, "price": 2.8},
-    {"id": "CORN-07", "label": "Mais B", "hint": "25kg Sack", "cost": 1.8, "price": 2.4},
-    {"id": "APPL-01", "label": "Apfel Gala", "hint": "Kiste 10kg", "cost": 1.2, "price": 1.8},
-    {"id": "PEAR-03", "label": "Birne Conference", "hint": "Kiste 10kg", "cost": 1.5, "price": 2.2},
-    {"id": "POTATO-05", "label": "Kartoffel festkochend", "hint": "25kg Sack", "cost": 0.8, "price": 1.2},
-]
 
+def _source(kind: str) -> str:
+    if kind not in AUTOCOMPLETE_SOURCES:
+        raise HTTPException(status_code=404, detail=f"Unknown lookup: {kind}")
+    return kind
 
-@router.get("/customers")
-async def lookup_customers(q: str = Query("")) -> Dict[str, Any]:
+
+@router.get("/{kind}")
+async def lookup(
+    kind: str,
+    q: str = Query(""),
+    limit: int = Query(10, ge=1, le=50),
+    tenant_id: Optional[str] = Query(None),
+) -> Dict[str, Any]:
     """
-    Sucht Kunden (Autocomplete)
+    Sucht Stammdaten (Autocomplete)
 
     Args:
-        q: Suchbegriff
+        kind: customers, articles, suppliers oder accounts
+        q: Suchbegriff (Präfixe von Nummer und Bezeichnung, Tippfehler werden toleriert)
+        limit: Maximale Anzahl Treffer
+        tenant_id: Mandant
 
     Returns:
-        Liste von Kunden mit id, label, hint
+        Treffer mit id (Nummer), key, label, hint; häufig und kürzlich gewählte zuerst
     """
-    ql = q.lower()
-    data = [
-        c
-        for c in _FAKE_CUSTOMERS
-        if ql in c["id"].lower() or ql in c["label"].lower()
-    ]
-    logger.debug(f"Customer lookup: '{q}' → {len(data)} results")
+    data = await autocomplete.search(_source(kind), tenant_id or DEFAULT_TENANT, q, limit)
+    logger.debug(f"{kind} lookup: '{q}' → {len(data)} results")
     return {"ok": True, "data": data}
 
 
-@router.get("/articles")
-async def lookup_articles(q: str = Query("")) -> Dict[str, Any]:
+@router.post("/{kind}/{key}/used")
+async def record_lookup_use(kind: str, key: str, tenant_id: Optional[str] = Query(None)) -> Dict[str, Any]:
     """
-    Sucht Artikel (Autocomplete)
+    Zählt die Auswahl eines Treffers für das Ranking (Häufigkeit und Aktualität)
 
     Args:
-        q: Suchbegriff
-
-    Returns:
-        Liste von Artikeln mit id, label, hint, cost
+        kind: customers, articles, suppliers oder accounts
+        key: ``key`` des gewählten Treffers
+        tenant_id: Mandant
     """
-    ql = q.lower()
-    data = [
-        a
-        for a in _FAKE_ARTICLES
-        if ql in a["id"].lower() or ql in a["label"].lower()
-    ]
-    logger.debug(f"Article lookup: '{q}' → {len(data)} results")
-    return {"ok": True, "data": data}
-
+    return {"ok": await autocomplete.record_use(_source(kind), tenant_id or DEFAULT_TENANT, key)}
@@ -0,0 +1,470 @@
+"""
+Admission Control Middleware
+Load-aware admission with workload classes and per-tenant concurrency quotas
+
+Requests are classified as ``interactive`` (default) or ``reports``
+(reports, exports, analytics; ADMISSION_REPORT_PATHS) and admitted against
+
+- a per-replica concurrency limit (ADMISSION_MAX_CONCURRENCY),
+- an adaptive limit for reports: halved while the interactive p99 latency
+  (queueing included) or the oldest queued interactive request exceeds
+  ADMISSION_TARGET_P99_SECONDS, raised by one per second while it stays well
+  below. An increase after which the latency leaves that headroom is taken
+  back and not tried again for PROBE_INTERVAL seconds,
+- a per-tenant quota (ADMISSION_TENANT_MAX_CONCURRENCY) and optionally a
+  quota across replicas (ADMISSION_COUNTER_URL, Redis leases). The tenant
+  comes from the token claims only; requests without a tenant claim
+  (unauthenticated, dev token) share the ``SHARED_TENANT`` quota.
+
+Requests that cannot start wait in a queue per class; interactive requests
+are dispatched first, and within a class the tenant with the least work in
+flight goes next. Queues are bounded and waiting is limited by a timeout;
+shed requests get 503 (overload) or 429 (tenant quota) with Retry-After.
+
+The static per-IP limits in ``rate_limit.py`` remain for abuse protection.
+"""
+
+import asyncio
+import logging
+import re
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import Counter as Counts, OrderedDict, deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, Iterable, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+REPORTS = "reports"
+WORKLOADS = (INTERACTIVE, REPORTS)
+SHARED_TENANT = "shared"  # Quote aller Requests ohne Tenant-Claim
+
+ADJUST_INTERVAL = 0.25  # Sekunden zwischen zwei Prüfungen des Report-Limits
+INCREASE_INTERVAL = 1.0  # Mindestabstand, bevor das Limit nach einer Änderung wieder wächst
+PROBE_INTERVAL = 10.0  # Über das Limit der letzten Überlast hinaus wird nur so selten getestet
+LATENCY_WINDOW = 2.0  # Sekunden, über die das interaktive p99 gebildet wird
+LATENCY_SAMPLES = 2048
+MIN_SAMPLES = 20
+DECREASE = 0.5
+HEADROOM = 0.7  # Limit wächst erst unter 70 % des Ziels wieder
+TENANT_RETRY_INTERVAL = 0.05  # Warten auf einen freien Platz der Tenant-Quote aller Replicas
+RETRY_AFTER = {INTERACTIVE: 1, REPORTS: 10}
+
+admission_in_flight = Gauge(
+    'admission_in_flight',
+    'Admitted requests in progress',
+    ['workload']
+)
+
+admission_queued = Gauge(
+    'admission_queued',
+    'Requests waiting for admission',
+    ['workload']
+)
+
+admission_report_limit = Gauge(
+    'admission_report_limit',
+    'Current adaptive concurrency limit for report requests'
+)
+
+admission_queue_delay_seconds = Histogram(
+    'admission_queue_delay_seconds',
+    'Time requests waited for admission',
+    ['workload'],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+
+admission_rejected_total = Counter(
+    'admission_rejected_total',
+    'Requests shed by admission control',
+    ['workload', 'reason']
+)
+
+
+class Rejected(Exception):
+    """Request shed by admission control"""
+
+    def __init__(self, workload: str, reason: str, status_code: int):
+        super().__init__(reason)
+        self.workload = workload
+        self.reason = reason
+        self.status_code = status_code
+        self.retry_after = RETRY_AFTER[workload]
+
+
+class TenantCounter(ABC):
+    """Tenant concurrency shared by several replicas"""
+
+    @abstractmethod
+    async def acquire(self, tenant: str, permit_id: str, limit: int) -> bool:
+        """Take a lease for ``permit_id`` unless ``tenant`` already holds ``limit``"""
+        pass
+
+    @abstractmethod
+    async def release(self, tenant: str, permit_id: str) -> None:
+        """Return the lease of ``permit_id``"""
+        pass
+
+
+class RedisTenantCounter(TenantCounter):
+    """
+    Leases in a sorted set per tenant (score = expiry on the Redis clock).
+    Leases of crashed replicas expire after ``lease`` seconds; Redis errors
+    admit the request (the per-replica quota still applies).
+    """
+
+    _ACQUIRE = """
+    local now = redis.call('TIME')
+    local t = tonumber(now[1]) + tonumber(now[2]) / 1000000
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', t)
+    if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[1]) then
+        return 0
+    end
+    redis.call('ZADD', KEYS[1], t + tonumber(ARGV[2]), ARGV[3])
+    redis.call('PEXPIRE', KEYS[1], math.ceil(tonumber(ARGV[2]) * 1000))
+    return 1
+    """
+
+    def __init__(self, url: str, lease: float = 300.0):
+        import redis.asyncio as redis  # optional dependency, only needed for shared quotas
+
+        self._client = redis.Redis.from_url(url, socket_timeout=0.25)
+        self._acquire = self._client.register_script(self._ACQUIRE)
+        self.lease = lease
+
+    async def acquire(self, tenant: str, permit_id: str, limit: int) -> bool:
+        try:
+            return bool(await self._acquire(keys=[f"admission:tenant:{tenant}"], args=[limit, self.lease, permit_id]))
+        except Exception as e:
+            logger.warning(f"Shared admission counter unavailable: {e}")
+            return True
+
+    async def release(self, tenant: str, permit_id: str) -> None:
+        try:
+            await self._client.zrem(f"admission:tenant:{tenant}", permit_id)
+        except Exception as e:
+            logger.warning(f"Shared admission counter release failed for {tenant}: {e}")
+
+
+@dataclass
+class Permit:
+    """Admission of one request; hand back with ``AdmissionController.release``"""
+    workload: str
+    tenant: str
+    arrived: float
+    started: float = 0.0
+    shared_id: Optional[str] = None
+
+
+class _Waiter:
+    __slots__ = ("permit", "future")
+
+    def __init__(self, permit: Permit, future: asyncio.Future):
+        self.permit = permit
+        self.future = future
+
+
+def _percentile(values: Iterable[float], percent: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+class AdmissionController:
+    """
+    Admission decisions for one replica (one event loop).
+
+    Call ``acquire(workload, tenant)`` before and ``release(permit)`` after
+    handling a request; ``acquire`` raises ``Rejected`` when the request is shed.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_concurrency: Optional[int] = None,
+        report_max: Optional[int] = None,
+        report_min: Optional[int] = None,
+        target_p99: Optional[float] = None,
+        queue_timeout: Optional[float] = None,
+        report_queue_timeout: Optional[float] = None,
+        max_queue: Optional[int] = None,
+        report_max_queue: Optional[int] = None,
+        tenant_limit: Optional[int] = None,
+        counter: Optional[TenantCounter] = None,
+        shared_tenant_limit: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_concurrency = max_concurrency or settings.ADMISSION_MAX_CONCURRENCY
+        self.report_max = report_max or settings.ADMISSION_REPORT_MAX_CONCURRENCY
+        self.report_min = report_min or settings.ADMISSION_REPORT_MIN_CONCURRENCY
+        self.target_p99 = target_p99 or settings.ADMISSION_TARGET_P99_SECONDS
+        self.queue_timeout = {
+            INTERACTIVE: queue_timeout or settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+            REPORTS: report_queue_timeout or settings.ADMISSION_REPORT_QUEUE_TIMEOUT_SECONDS,
+        }
+        self.max_queue = {
+            INTERACTIVE: max_queue or settings.ADMISSION_MAX_QUEUE,
+            REPORTS: report_max_queue or settings.ADMISSION_REPORT_MAX_QUEUE,
+        }
+        self.tenant_limit = tenant_limit or settings.ADMISSION_TENANT_MAX_CONCURRENCY
+        self.counter = counter
+        self.shared_tenant_limit = shared_tenant_limit or settings.ADMISSION_TENANT_SHARED_MAX_CONCURRENCY
+        self._clock = clock
+
+        self.report_limit = float(self.report_max)
+        self.p99 = 0.0
+        self.in_flight: Counts = Counts()
+        self.tenant_in_flight: Counts = Counts()
+        self.queued: Counts = Counts()
+        self.stats: Counts = Counts()
+        # Je Klasse: Tenant -> wartende Requests (Reihenfolge der Tenants = Round Robin)
+        self._queues: Dict[str, "OrderedDict[str, Deque[_Waiter]]"] = {w: OrderedDict() for w in WORKLOADS}
+        self._latencies: Deque = deque(maxlen=LATENCY_SAMPLES)
+        self._running: Dict[int, Permit] = {}  # laufende interaktive Requests
+        self._last_adjust = 0.0
+        self._last_change = 0.0
+        self._probing = False  # Letzte Änderung war eine Erhöhung
+        self._overload_limit = float("inf")  # Zuletzt zurückgenommene Erhöhung
+        self._overload_at = 0.0
+        admission_report_limit.set(self.report_limit)
+
+    @property
+    def total_in_flight(self) -> int:
+        return self.in_flight[INTERACTIVE] + self.in_flight[REPORTS]
+
+    async def acquire(self, workload: str, tenant: str) -> Permit:
+        deadline = self._clock() + self.queue_timeout[workload]
+        permit = await self._acquire_local(workload, tenant, self._clock(), deadline)
+        if self.counter is None:
+            return permit
+        # Quote über alle Replicas: lokalen Platz nur halten, solange auch der gemeinsame frei ist
+        permit_id = uuid.uuid4().hex
+        while True:
+            try:
+                if await self.counter.acquire(tenant, permit_id, self.shared_tenant_limit):
+                    break
+            except BaseException:
+                self._release_local(permit, record=False)
+                raise
+            self._release_local(permit, record=False)
+            if self._clock() + TENANT_RETRY_INTERVAL > deadline:
+                self._reject(workload, "tenant_quota", 429)
+            await asyncio.sleep(TENANT_RETRY_INTERVAL)
+            permit = await self._acquire_local(workload, tenant, permit.arrived, deadline)
+        permit.shared_id = permit_id
+        return permit
+
+    async def release(self, permit: Permit) -> None:
+        self._release_local(permit, record=True)
+        if permit.shared_id is not None:
+            await self.counter.release(permit.tenant, permit.shared_id)
+
+    async def _acquire_local(self, workload: str, tenant: str, arrived: float, deadline: float) -> Permit:
+        now = self._clock()
+        self._adjust(now)
+        if self.queued[workload] >= self.max_queue[workload]:
+            self._reject(workload, "queue_full", 503)
+
+        waiter = _Waiter(Permit(workload, tenant, arrived), asyncio.get_running_loop().create_future())
+        self._queues[workload].setdefault(tenant, deque()).append(waiter)
+        self.queued[workload] += 1
+        admission_queued.labels(workload=workload).inc()
+        self._dispatch()
+        if waiter.future.done():
+            return waiter.future.result()
+
+        try:
+            await asyncio.wait((waiter.future,), timeout=max(0.0, deadline - now))
+        except asyncio.CancelledError:
+            # Client weg: einen inzwischen erteilten Platz zurückgeben
+            if waiter.future.done():
+                self._release_local(waiter.future.result(), record=False)
+            else:
+                self._remove(waiter)
+            raise
+        if waiter.future.done():
+            return waiter.future.result()
+        self._remove(waiter)
+        quota = self.tenant_in_flight[tenant] >= self.tenant_limit
+        self._reject(workload, "tenant_quota" if quota else "timeout", 429 if quota else 503)
+
+    def _reject(self, workload: str, reason: str, status_code: int) -> None:
+        self.stats[f"rejected_{workload}"] += 1
+        admission_rejected_total.labels(workload=workload, reason=reason).inc()
+        raise Rejected(workload, reason, status_code)
+
+    def _can_start(self, workload: str, tenant: str) -> bool:
+        if self.total_in_flight >= self.max_concurrency:
+            return False
+        if self.tenant_in_flight[tenant] >= self.tenant_limit:
+            return False
+        return workload != REPORTS or self.in_flight[REPORTS] < int(self.report_limit)
+
+    def _dispatch(self) -> None:
+        # Interaktive zuerst; innerhalb einer Klasse der Tenant mit der wenigsten laufenden Arbeit
+        for workload in WORKLOADS:
+            queue = self._queues[workload]
+            while queue:
+                pick = None
+                for tenant in queue:
+                    if self._can_start(workload, tenant) and (
+                        pick is None or self.tenant_in_flight[tenant] < self.tenant_in_flight[pick]
+                    ):
+                        pick = tenant
+                if pick is None:
+                    break
+                waiters = queue[pick]
+                waiter = waiters.popleft()
+                if waiters:
+                    queue.move_to_end(pick)
+                else:
+                    del queue[pick]
+                self.queued[workload] -= 1
+                admission_queued.labels(workload=workload).dec()
+                self._start(waiter)
+
+    def _start(self, waiter: _Waiter) -> None:
+        permit = waiter.permit
+        permit.started = self._clock()
+        self.in_flight[permit.workload] += 1
+        self.tenant_in_flight[permit.tenant] += 1
+        if permit.workload == INTERACTIVE:
+            self._running[id(permit)] = permit
+        admission_in_flight.labels(workload=permit.workload).inc()
+        admission_queue_delay_seconds.labels(workload=permit.workload).observe(permit.started - permit.arrived)
+        waiter.future.set_result(permit)
+
+    def _remove(self, waiter: _Waiter) -> None:
+        permit = waiter.permit
+        queue = self._queues[permit.workload]
+        waiters = queue.get(permit.tenant)
+        if waiters is None or waiter not in waiters:
+            return
+        waiters.remove(waiter)
+        if not waiters:
+            del queue[permit.tenant]
+        self.queued[permit.workload] -= 1
+        admission_queued.labels(workload=permit.workload).dec()
+
+    def _release_local(self, permit: Permit, record: bool) -> None:
+        now = self._clock()
+        self.in_flight[permit.workload] -= 1
+        self.tenant_in_flight[permit.tenant] -= 1
+        if not self.tenant_in_flight[permit.tenant]:
+            del self.tenant_in_flight[permit.tenant]
+        self._running.pop(id(permit), None)
+        admission_in_flight.labels(workload=permit.workload).dec()
+        if record and permit.workload == INTERACTIVE:
+            self._latencies.append((now, now - permit.arrived))
+        self._adjust(now)
+        self._dispatch()
+
+    def _adjust(self, now: float) -> None:
+        """AIMD on the report limit, driven by interactive latency and queueing delay"""
+        if now - self._last_adjust < ADJUST_INTERVAL:
+            return
+        self._last_adjust = now
+        # Nur Requests, die nach der letzten Änderung des Limits ankamen, zeigen dessen Wirkung
+        since = max(now - LATENCY_WINDOW, self._last_change)
+        recent = [seconds for at, seconds in self._latencies if at - seconds >= since]
+        # Laufende Requests zählen mit ihrem bisherigen Alter: Überlast zeigt sich, bevor sie fertig sind
+        recent.extend(now - permit.arrived for permit in self._running.values() if permit.arrived >= since)
+        waiting = self._queues[INTERACTIVE]
+        oldest = max((now - waiters[0].permit.arrived for waiters in waiting.values()), default=0.0)
+        settled = len(recent) >= MIN_SAMPLES or now - self._last_change >= LATENCY_WINDOW
+        self.p99 = max(_percentile(recent, 99), oldest)
+        if self._probing and self.p99 > self.target_p99 * HEADROOM and (settled or oldest > self.target_p99):
+            # Die letzte Erhöhung war zu viel: zurücknehmen und bis PROBE_INTERVAL darunter bleiben
+            self._overload_limit, self._overload_at = int(self.report_limit), now
+            self._change(now, self.report_limit - 1, probing=False)
+        elif self.p99 > self.target_p99 and (settled or oldest > self.target_p99):
+            if self.report_limit > self.report_min:
+                self._change(now, max(float(self.report_min), self.report_limit * DECREASE), probing=False)
+        elif (self.p99 < self.target_p99 * HEADROOM and settled and self.report_limit < self.report_max
+              and now - self._last_change >= INCREASE_INTERVAL
+              and (int(self.report_limit) + 1 < self._overload_limit or now - self._overload_at >= PROBE_INTERVAL)):
+            self._change(now, min(float(self.report_max), int(self.report_limit) + 1.0), probing=True)
+        admission_report_limit.set(self.report_limit)
+
+    def _change(self, now: float, limit: float, probing: bool) -> None:
+        self.report_limit = limit
+        self._probing = probing
+        self._last_change = now
+
+
+def create_tenant_counter() -> Optional[TenantCounter]:
+    """Shared tenant counter configured via ``ADMISSION_COUNTER_URL`` (None = per replica only)."""
+    url = settings.ADMISSION_COUNTER_URL
+    if not url:
+        return None
+    try:
+        return RedisTenantCounter(url, lease=settings.ADMISSION_SHARED_LEASE_SECONDS)
+    except ImportError:
+        logger.warning("redis not installed - shared admission counter disabled")
+        return None
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware around ``AdmissionController``.
+
+    Plain ASGI instead of BaseHTTPMiddleware so that the permit is held until
+    the response body (streamed exports) has been sent completely.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        controller: Optional[AdmissionController] = None,
+        report_paths: Optional[Iterable[str]] = None,
+        exempt_paths: Optional[Iterable[str]] = None,
+    ):
+        self.app = app
+        self.controller = controller or AdmissionController(counter=create_tenant_counter())
+        patterns = settings.ADMISSION_REPORT_PATHS if report_paths is None else report_paths
+        self._report_paths = re.compile("|".join(f"(?:{p})" for p in patterns)) if patterns else None
+        self._exempt_paths = tuple(settings.ADMISSION_EXEMPT_PATHS if exempt_paths is None else exempt_paths)
+
+    def classify(self, path: str) -> str:
+        if self._report_paths is not None and self._report_paths.search(path):
+            return REPORTS
+        return INTERACTIVE
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        path = scope.get("path", "")
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or path.startswith(self._exempt_paths):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            permit = await self.controller.acquire(self.classify(path), _tenant(scope))
+        except Rejected as exc:
+            response = JSONResponse(
+                status_code=exc.status_code,
+                content={"detail": "Server busy, please retry later", "type": exc.reason},
+                headers={"Retry-After": str(exc.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            await self.controller.release(permit)
+
+
+def _tenant(scope: Scope) -> str:
+    # Nur Token-Claims (gesetzt von der Authentifizierung): Header und Query-Parameter
+    # wählt der Client selbst und könnte damit die Quote eines anderen Tenants belasten
+    claims = (scope.get("state") or {}).get("token_claims") or {}
+    tenant = claims.get("tenant_id") or claims.get("tenant")
+    return str(tenant) if tenant else SHARED_TENANT
@@ -1,5 +1,6 @@
 """
 Rate Limiting Middleware
+Static per-IP limits; load-aware admission and tenant quotas: admission.py
 """
 
 from slowapi import Limiter
@@ -158,7 +158,7 @@ async def test_decision(
         Decision-Objekt
     """
     try:
-        decision: Decision = decide(roles, alert, store.list())
+        decision: Decision = decide(roles, alert, store.index())
         logger.info(f"Policy test: {alert.kpiId} -> {decision.type}")
         return {"ok": True, "decision": decision.model_dump()}
     except Exception as e:
@@ -7,13 +7,29 @@ from __future__ import annotations
 
 from typing import List, Optional
 
+from app.services.policy_compiler import PolicyIndex
 from app.services.policy_service import PolicyStore as ServicePolicyStore, Rule as ServiceRule
 
-from .models import Rule
+from .models import Approval, Rule, When, Window
 
 DEFAULT_DB = None  # Retained for backwards compatibility
 
 
+def _adopt(rule: ServiceRule) -> Rule:
+    """Übernimmt eine bereits validierte Service-Regel ohne erneute Validierung."""
+    return Rule.model_construct(
+        id=rule.id,
+        when=When.model_construct(kpiId=rule.when.kpiId, severity=rule.when.severity),
+        action=rule.action,
+        params=rule.params,
+        limits=rule.limits,
+        window=Window.model_construct(**dict(rule.window)) if rule.window else None,
+        approval=Approval.model_construct(**dict(rule.approval)) if rule.approval else None,
+        autoExecute=rule.autoExecute,
+        autoSuggest=rule.autoSuggest,
+    )
+
+
 class PolicyStore:
     """Compatibility wrapper delegating to the shared PolicyService."""
 
@@ -21,18 +37,22 @@ class PolicyStore:
         self._delegate = ServicePolicyStore()
 
     def list(self) -> List[Rule]:
-        return [Rule.model_validate(rule.model_dump()) for rule in self._delegate.list()]
+        return [_adopt(rule) for rule in self._delegate.list()]
 
     def get(self, rule_id: str) -> Optional[Rule]:
         rule = self._delegate.get(rule_id)
-        return Rule.model_validate(rule.model_dump()) if rule else None
+        return _adopt(rule) if rule else None
+
+    def index(self) -> PolicyIndex:
+        """Kompilierter Entscheidungs-Index (Wochentage 0=So oder 0=Mo, wie ``decide``)."""
+        return self._delegate.index(either_day_convention=True)
 
     def upsert(self, rule: Rule) -> None:
-        self._delegate.upsert(ServiceRule.model_validate(rule.model_dump()))
+        # Der Service liest nur Attribute; die Regel ist bereits validiert
+        self._delegate.upsert(rule)
 
     def bulk_upsert(self, rules: List[Rule]) -> None:
-        service_rules = [ServiceRule.model_validate(rule.model_dump()) for rule in rules]
-        self._delegate.bulk_upsert(service_rules)
+        self._delegate.bulk_upsert(rules)
 
     def delete(self, rule_id: str) -> None:
         self._delegate.delete(rule_id)
@@ -8,7 +8,6 @@ from fastapi import APIRouter, Query, Depends, HTTPException
 from fastapi.responses import FileResponse
 from pathlib import Path
 from typing import Dict, List
-import pandas as pd
 import logging
 import time
 
@@ -100,6 +99,9 @@ async def export_documents(
         temp_dir.mkdir(parents=True, exist_ok=True)
         output_path = temp_dir / f"export_{domain}.{fmt}"
 
+        # pandas erst beim Export laden (~0,5 s Importzeit)
+        import pandas as pd
+
         df = pd.DataFrame(rows)
 
         if fmt == "xlsx":
@@ -0,0 +1,214 @@
+"""
+Audit Chain Checkpoints
+Signierte Checkpoints und parallele Verifikation der ISMS-Audit-Hash-Chain
+
+Die Kette wird in Intervalle zu AUDIT_CHECKPOINT_INTERVAL Einträgen geteilt.
+Für jedes verifizierte Intervall wird ein HMAC-signierter Checkpoint mit
+letztem Hash und Merkle-Wurzel über die Intervall-Hashes abgelegt; die
+Checkpoints sind über die Signatur des Vorgängers verkettet. Die inkrementelle
+Prüfung hasht nur Einträge nach dem letzten Checkpoint, die Vollprüfung
+verteilt die Intervalle auf Prozesse und vergleicht sie mit den Checkpoints.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import hashlib
+import hmac
+import json
+import os
+
+AUDIT_CHECKPOINT_INTERVAL = 10_000
+
+# Gleiche Ausgabe wie json.dumps(details, sort_keys=True), ohne Encoder-Neubau je Aufruf
+_details_json = json.JSONEncoder(sort_keys=True).encode
+
+# (previous_hash, id, timestamp, event_type, user_id, tenant_id, resource_type,
+#  resource_id, action, details, risk_score, integrity_hash)
+AuditRecord = Tuple[Any, ...]
+
+
+def audit_record(entry) -> AuditRecord:
+    """Picklebare Form eines AuditEntry für die Verifikation in Worker-Prozessen"""
+    return (
+        entry.previous_hash, entry.id, entry.timestamp, entry.event_type, entry.user_id,
+        entry.tenant_id, entry.resource_type, entry.resource_id, entry.action,
+        entry.details, entry.risk_score, entry.integrity_hash,
+    )
+
+
+def integrity_content(record: AuditRecord) -> str:
+    """Hash-Inhalt eines Eintrags (Format von ISMSAuditService._create_integrity_hash)"""
+    return "|".join((*record[:9], _details_json(record[9]), str(record[10])))
+
+
+def integrity_hash(record: AuditRecord) -> str:
+    return hashlib.sha256(integrity_content(record).encode("utf-8")).hexdigest()
+
+
+def merkle_root(hashes: Sequence[str]) -> str:
+    """Merkle-Wurzel (SHA-256, Blatt-/Knoten-Präfix 0x00/0x01)"""
+    level = [hashlib.sha256(b"\x00" + value.encode("utf-8")).digest() for value in hashes]
+    if not level:
+        return hashlib.sha256(b"").hexdigest()
+    while len(level) > 1:
+        paired = [hashlib.sha256(b"\x01" + level[i] + level[i + 1]).digest() for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            paired.append(level[-1])
+        level = paired
+    return level[0].hex()
+
+
+@dataclass(frozen=True)
+class AuditCheckpoint:
+    """Signierter Stand der Kette über die Einträge start bis end (exklusiv)"""
+    start: int
+    end: int
+    last_hash: str
+    merkle_root: str
+    previous_signature: Optional[str]
+    signature: str = ""
+
+    def signed_content(self) -> bytes:
+        content = asdict(self)
+        content.pop("signature")
+        return json.dumps(content, sort_keys=True).encode("utf-8")
+
+
+@dataclass
+class SegmentResult:
+    start: int
+    end: int
+    last_hash: Optional[str]
+    merkle_root: str
+    breaches: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def verify_records(
+    records: Sequence[AuditRecord],
+    start: int,
+    previous_hash: Optional[str],
+    hash_fn: Callable[[AuditRecord], str] = integrity_hash,
+) -> SegmentResult:
+    """
+    Prüft Hash und Verkettung jedes Eintrags.
+
+    ``previous_hash`` ist der gespeicherte Hash des Vorgängers (None: keine
+    Prüfung der Verkettung für den ersten Eintrag).
+    """
+    breaches: List[Dict[str, Any]] = []
+    hashes: List[str] = []
+    for offset, record in enumerate(records):
+        stored = record[-1]
+        if previous_hash is not None and record[0] != previous_hash:
+            breaches.append({
+                'index': start + offset, 'type': 'link', 'entry_id': record[1],
+                'expected_hash': previous_hash, 'stored_hash': record[0], 'timestamp': record[2],
+            })
+        calculated = hash_fn(record)
+        if calculated != stored:
+            breaches.append({
+                'index': start + offset, 'type': 'hash', 'entry_id': record[1],
+                'expected_hash': calculated, 'stored_hash': stored, 'timestamp': record[2],
+            })
+        hashes.append(stored)
+        previous_hash = stored
+    return SegmentResult(start, start + len(records), previous_hash, merkle_root(hashes), breaches)
+
+
+def _verify_task(task: tuple) -> SegmentResult:
+    records, start, previous_hash, hash_fn = task
+    return verify_records(records, start, previous_hash, hash_fn)
+
+
+class AuditChainVerifier:
+    """Inkrementelle bzw. parallele Verifikation mit HMAC-signierten Checkpoints"""
+
+    def __init__(
+        self,
+        key: bytes,
+        hash_fn: Callable[[AuditRecord], str] = integrity_hash,
+        interval: int = AUDIT_CHECKPOINT_INTERVAL,
+        workers: Optional[int] = None,
+    ):
+        self._key = key
+        self.hash_fn = hash_fn
+        self.interval = interval
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+
+    def sign(self, checkpoint: AuditCheckpoint) -> AuditCheckpoint:
+        signature = hmac.new(self._key, checkpoint.signed_content(), hashlib.sha256).hexdigest()
+        return AuditCheckpoint(**{**asdict(checkpoint), "signature": signature})
+
+    def checkpoint_errors(self, checkpoints: Sequence[AuditCheckpoint], count: int) -> List[str]:
+        errors = []
+        previous: Optional[AuditCheckpoint] = None
+        for checkpoint in checkpoints:
+            if not hmac.compare_digest(self.sign(checkpoint).signature, checkpoint.signature):
+                errors.append(f"checkpoint {checkpoint.start}-{checkpoint.end}: invalid signature")
+            elif checkpoint.start != (previous.end if previous else 0) or \
+                    checkpoint.previous_signature != (previous.signature if previous else None):
+                errors.append(f"checkpoint {checkpoint.start}-{checkpoint.end}: broken checkpoint chain")
+            previous = checkpoint
+        if previous and previous.end > count:
+            errors.append("audit trail is shorter than the last checkpoint")
+        return errors
+
+    def verify(
+        self,
+        records: Sequence[AuditRecord],
+        checkpoints: Sequence[AuditCheckpoint] = (),
+        full: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Verifiziert ab dem letzten Checkpoint (``full``: alle Einträge).
+
+        Liefert Breaches, Checkpoint-Fehler und die neuen Checkpoints für
+        vollständig fehlerfreie Intervalle.
+        """
+        last = checkpoints[-1] if checkpoints else None
+        start = 0 if full or last is None else last.end
+        checkpoint_errors = self.checkpoint_errors(checkpoints, len(records))
+
+        tasks = []
+        for lo in range(start, len(records), self.interval):
+            hi = min(lo + self.interval, len(records))
+            previous_hash = records[lo - 1][-1] if lo else None
+            if lo == start and last is not None and not full:
+                # Einstieg beim signierten letzten Hash statt beim (möglicherweise neu geschriebenen) Vorgänger
+                previous_hash = last.last_hash
+            tasks.append((list(records[lo:hi]), lo, previous_hash, self.hash_fn))
+
+        existing = {(c.start, c.end): c for c in checkpoints}
+        previous = None if full else last
+        breaches: List[Dict[str, Any]] = []
+        new_checkpoints: List[AuditCheckpoint] = []
+        for result in self._run(tasks):
+            breaches.extend(result.breaches)
+            known = existing.get((result.start, result.end))
+            if known is not None:
+                if (known.merkle_root, known.last_hash) != (result.merkle_root, result.last_hash):
+                    checkpoint_errors.append(f"checkpoint {known.start}-{known.end}: merkle root mismatch")
+                previous = known
+            elif not breaches and not checkpoint_errors and result.end - result.start == self.interval \
+                    and (previous.end if previous else 0) == result.start:
+                previous = self.sign(AuditCheckpoint(
+                    start=result.start, end=result.end, last_hash=result.last_hash,
+                    merkle_root=result.merkle_root,
+                    previous_signature=previous.signature if previous else None,
+                ))
+                new_checkpoints.append(previous)
+
+        return {
+            'verified_from': start,
+            'entries_checked': len(records) - start,
+            'breaches': breaches,
+            'checkpoint_errors': checkpoint_errors,
+            'new_checkpoints': new_checkpoints,
+        }
+
+    def _run(self, tasks: List[tuple]) -> List[SegmentResult]:
+        if self.workers <= 1 or len(tasks) <= 1:
+            return [_verify_task(task) for task in tasks]
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(_verify_task, tasks, chunksize=max(1, len(tasks) // (self.workers * 4))))
@@ -6,14 +6,23 @@ Dieses Modul implementiert das Audit Logging System gemäß ISO 27001 Annex A.12
 für VALEO-NeuroERP mit tamper-proof Hash-Chains.
 """
 
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
 import hashlib
-import json
 import logging
+import os
 import uuid
 
+from .audit_checkpoints import (
+    AUDIT_CHECKPOINT_INTERVAL,
+    AuditChainVerifier,
+    AuditCheckpoint,
+    audit_record,
+    integrity_content,
+    integrity_hash,
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -44,11 +53,16 @@ class ISMSAuditService:
     Implements Annex A.12.4 - Logging and Monitoring
     """
 
-    def __init__(self, db_session, crypto_service=None):
+    def __init__(self, db_session, crypto_service=None, checkpoint_key: Optional[bytes] = None,
+                 checkpoint_interval: int = AUDIT_CHECKPOINT_INTERVAL):
         self.db = db_session
         self.crypto = crypto_service
         self.audit_trail = []
         self.last_hash = self._get_last_audit_hash()
+        # Signierte Checkpoints für die inkrementelle Integritätsprüfung (ohne Schlüssel: immer Vollprüfung)
+        self.checkpoint_key = checkpoint_key or os.getenv("AUDIT_CHECKPOINT_KEY", "").encode()
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoints: List[AuditCheckpoint] = []
 
     def log_security_event(self, event_data: Dict[str, Any]) -> str:
         """
@@ -94,21 +108,7 @@ class ISMSAuditService:
     def _create_integrity_hash(self, entry: AuditEntry) -> str:
         """Create cryptographic hash for audit trail integrity"""
         # Create content string for hashing
-        content_parts = [
-            entry.previous_hash,
-            entry.id,
-            entry.timestamp,
-            entry.event_type,
-            entry.user_id,
-            entry.tenant_id,
-            entry.resource_type,
-            entry.resource_id,
-            entry.action,
-            json.dumps(entry.details, sort_keys=True),
-            str(entry.risk_score)
-        ]
-
-        content = "|".join(content_parts)
+        content = integrity_content(audit_record(entry))
 
         # Use SHA-256 for integrity
         if self.crypto and hasattr(self.crypto, 'create_hash'):
@@ -264,29 +264,43 @@ class ISMSAuditService:
         # This would integrate with alerting systems (email, SMS, Slack, etc.)
         logger.critical(f"SECURITY ALERT: {alert_data['description']}")
 
-    def verify_audit_integrity(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> Dict[str, Any]:
-        """Verify audit trail integrity"""
-        entries = self._get_audit_entries_in_range(start_date, end_date)
+    def verify_audit_integrity(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                               full: bool = False, workers: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Verify audit trail integrity
 
-        integrity_breaches = []
-        expected_hash = self._get_hash_at_date(start_date) if start_date else "genesis"
+        Without a date range only entries after the last signed checkpoint are
+        re-hashed (``full`` re-checks everything against the checkpoints);
+        intervals are verified in parallel worker processes.
+        """
+        entries = self._get_audit_entries_in_range(start_date, end_date)
+        records = [audit_record(entry) for entry in entries]
+
+        custom_hash = bool(self.crypto and hasattr(self.crypto, 'create_hash'))
+        # Der Crypto-Service ist nicht picklebar: dann sequentiell über dessen Hash-Funktion
+        verifier = AuditChainVerifier(
+            self.checkpoint_key or b"unsigned",
+            hash_fn=(lambda r: self.crypto.create_hash(integrity_content(r))) if custom_hash else integrity_hash,
+            interval=self.checkpoint_interval,
+            workers=1 if custom_hash else workers,
+        )
 
-        for entry in entries:
-            calculated_hash = self._create_integrity_hash(entry)
-            if calculated_hash != entry.integrity_hash:
-                integrity_breaches.append({
-                    'entry_id': entry.id,
-                    'expected_hash': calculated_hash,
-                    'stored_hash': entry.integrity_hash,
-                    'timestamp': entry.timestamp
-                })
-            expected_hash = entry.integrity_hash
+        ranged = start_date is not None or end_date is not None
+        use_checkpoints = bool(self.checkpoint_key) and not custom_hash and not ranged
+        result = verifier.verify(records, self.checkpoints if use_checkpoints else (),
+                                 full=full or not use_checkpoints)
+        if use_checkpoints:
+            self.checkpoints.extend(result['new_checkpoints'])
 
+        integrity_breaches = result['breaches']
         return {
-            'entries_checked': len(entries),
+            'entries_checked': result['entries_checked'],
+            'verified_from': result['verified_from'],
             'integrity_breaches': len(integrity_breaches),
             'breach_details': integrity_breaches,
-            'integrity_maintained': len(integrity_breaches) == 0
+            'checkpoint_errors': result['checkpoint_errors'],
+            'checkpoints': len(self.checkpoints),
+            'integrity_maintained': not integrity_breaches and not result['checkpoint_errors']
         }
 
     def _get_audit_entries_in_range(self, start_date: Optional[datetime], end_date: Optional[datetime]) -> List[AuditEntry]:
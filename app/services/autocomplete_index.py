@@ -0,0 +1,742 @@
+"""
+Autocomplete-Index
+Type-Ahead über Stammdaten (Kunden, Artikel, Lieferanten, Konten) je Mandant
+
+Je Mandant und Stammdatenart hält ``AutocompleteIndex`` ein unveränderliches
+Segment aus numpy-Arrays:
+
+- Termwörterbuch: sortierte, normalisierte Wörter aus Nummer und Bezeichnung
+  (Kleinschreibung, ohne Akzente). Ein Präfix ist ein Bereich im Wörterbuch;
+  die Postings der Terme liegen in Wörterbuch-Reihenfolge, der Bereich ist
+  also ein zusammenhängender Ausschnitt (wie ein FST über die Terme).
+- Vorwärtsindex Eintrag → Terme: weitere Suchwörter werden vektorisiert über
+  die Kandidaten des Wortes mit dem kleinsten Bereich geprüft.
+- Trigramme über dem Termwörterbuch für Tippfehler: gesucht werden ähnliche
+  Terme, nicht Einträge, dadurch bleibt der Fuzzy-Index klein.
+- Score je Eintrag: exponentiell abklingende Nutzungshäufigkeit
+  ``log2(Σ 2^(t/H))`` mit Halbwertszeit ``H``. Häufig und kürzlich genutzte
+  Einträge stehen vorne; ``record_use`` zählt eine Auswahl, beim Bau zählt
+  die letzte Änderung als Nutzung.
+
+Änderungen: ORM-Hooks (``after_flush``/``after_commit``) übernehmen
+gespeicherte Kunden, Artikel, Lieferanten und Konten in ein kleines Overlay.
+Ab ``AUTOCOMPLETE_OVERLAY_MAX`` Änderungen und spätestens nach
+``AUTOCOMPLETE_REBUILD_SECONDS`` wird das Segment im Hintergrund neu aus der
+Datenbank gebaut; damit kommen auch Änderungen anderer Prozesse an.
+Änderungen während des Baus werden auf das neue Segment nachgespielt.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import logging
+import re
+import threading
+import time
+import unicodedata
+from itertools import islice
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import event, func, null, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TENANT = "system"
+
+# Terme werden auf diese Länge (Bytes) gekürzt; längere Suchwörter werden am Eintrag geprüft
+TERM_WIDTH = 16
+MAX_TERMS_PER_ENTRY = 8
+# Ab dieser Bereichsgröße wird die Top-Liste eines Präfixes einmal berechnet und gehalten
+LARGE_RANGE = 4096
+TOP_CACHE_SIZE = 256
+# Mehrere Suchwörter: reicht die Top-Liste nicht, zuerst eine längere, dann der ganze Bereich
+DEEP_CACHE_SIZE = 8192
+DEEP_CACHE_KEYS = 256
+FUZZY_MIN_SIMILARITY = 0.5
+FUZZY_MAX_TERMS = 16
+LOAD_FETCH_SIZE = 10_000
+BUILD_CHUNK = 50_000
+
+_SEPARATOR = "\x1f"
+_WORD = re.compile(r"\w+")
+
+
+def _strip_accents(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+# Schneller Weg für lateinische Buchstaben (Latin-1 bis Latin Extended-B)
+_FOLD = {code: _strip_accents(chr(code)) for code in range(0xC0, 0x250) if _strip_accents(chr(code)) != chr(code)}
+
+
+def normalize(text: Optional[str]) -> str:
+    """Kleinschreibung ohne Akzente: ``Müller`` → ``muller``, ``Straße`` → ``strasse``"""
+    if not text:
+        return ""
+    if text.isascii():
+        return text.lower()
+    folded = text.casefold().translate(_FOLD)
+    return folded if folded.isascii() else _strip_accents(folded)
+
+
+def terms(*texts: Optional[str]) -> List[str]:
+    """Suchterme eines Eintrags (oder einer Anfrage) in Reihenfolge, ohne Duplikate"""
+    return list(dict.fromkeys(_WORD.findall(normalize(" ".join(text for text in texts if text)))))
+
+
+def _trigrams(term: str) -> set:
+    padded = "  " + term
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _key_hash(key: str) -> int:
+    # Nur innerhalb des Prozesses verglichen; hash() von str ist gecacht
+    return hash(key)
+
+
+def _matches(entry_terms: Sequence[str], words: Iterable[str]) -> bool:
+    return all(any(term.startswith(word) for term in entry_terms) for word in words)
+
+
+@dataclass(frozen=True)
+class AutocompleteSource:
+    """Stammdatenart im Index: ORM-Modell und die Attribute für Nummer, Bezeichnung, Hinweis"""
+    kind: str
+    model: Any
+    number: str
+    label: str
+    hint: Optional[str] = None
+    tenant: Optional[str] = "tenant_id"
+    active: Optional[str] = "is_active"
+    deleted: Optional[str] = "deleted_at"
+    changed: Tuple[str, ...] = ("updated_at", "created_at")
+    # Zusätzliche Zahlenfelder der Antwort: (Feldname, Attribut)
+    extras: Tuple[Tuple[str, str], ...] = ()
+
+    def key_of(self, obj: Any) -> str:
+        return str(getattr(obj, self.model.__mapper__.primary_key[0].key))
+
+    def row(self, obj: Any, changed: Optional[float] = None) -> Optional[Tuple]:
+        """Indexzeile eines ORM-Objekts; ``None`` für inaktive oder gelöschte Einträge"""
+        if self.active and getattr(obj, self.active) is False:
+            return None
+        if self.deleted and getattr(obj, self.deleted) is not None:
+            return None
+        return (
+            self.key_of(obj),
+            getattr(obj, self.number),
+            getattr(obj, self.label),
+            getattr(obj, self.hint) if self.hint else None,
+            changed,
+            *(getattr(obj, attr) for _, attr in self.extras),
+        )
+
+    def tenant_of(self, obj: Any) -> str:
+        return getattr(obj, self.tenant) if self.tenant else DEFAULT_TENANT
+
+    def query(self, tenant: str):
+        """Alle aktiven Einträge eines Mandanten in Zeilenform von ``row``"""
+        model = self.model
+        statement = select(
+            model.__mapper__.primary_key[0],
+            getattr(model, self.number),
+            getattr(model, self.label),
+            getattr(model, self.hint) if self.hint else null(),
+            func.coalesce(*(getattr(model, name) for name in self.changed)),
+            *(getattr(model, attr) for _, attr in self.extras),
+        )
+        if self.tenant:
+            statement = statement.where(getattr(model, self.tenant) == tenant)
+        if self.active:
+            statement = statement.where(getattr(model, self.active).is_not(False))
+        if self.deleted:
+            statement = statement.where(getattr(model, self.deleted).is_(None))
+        return statement
+
+
+def _timestamp(value: Any) -> float:
+    if value is None:
+        return 0.0
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    return float(value)
+
+
+@dataclass
+class _Entry:
+    """Eintrag im Overlay (geänderte oder neue Stammdaten seit dem letzten Bau)"""
+    key: str
+    fields: Tuple[str, str, str, Optional[str]]
+    extras: Tuple[Optional[float], ...]
+    score: float
+    terms: List[str]
+
+
+class _Segment:
+    """Unveränderliches Segment; nur die Scores und die Lebend-Maske werden fortgeschrieben"""
+
+    def __init__(self, rows: Iterable[Tuple], extras: int, half_life: float) -> None:
+        text_chunks: List[bytes] = []
+        length_chunks: List[np.ndarray] = [np.zeros(1, dtype=np.int64)]
+        term_chunks: List[np.ndarray] = []
+        entry_chunks: List[np.ndarray] = []
+        score_chunks: List[np.ndarray] = []
+        hash_chunks: List[np.ndarray] = []
+        extra_chunks: List[List[np.ndarray]] = [[] for _ in range(extras)]
+
+        count = 0
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, BUILD_CHUNK))
+            if not chunk:
+                break
+            keys, numbers, labels, hints, changed, *extra_columns = zip(*chunk)
+            keys = [str(key) for key in keys]
+            encoded = [
+                _SEPARATOR.join((key, number or "", label or "", hint or "")).encode()
+                for key, number, label, hint in zip(keys, numbers, labels, hints)
+            ]
+            text_chunks.append(b"".join(encoded))
+            length_chunks.append(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)))
+            entry_terms = [terms(number, label)[:MAX_TERMS_PER_ENTRY] for number, label in zip(numbers, labels)]
+            # Kürzt auf TERM_WIDTH Bytes
+            term_chunks.append(np.array([term.encode() for row in entry_terms for term in row], dtype=f"S{TERM_WIDTH}"))
+            entry_chunks.append(np.repeat(
+                np.arange(count, count + len(chunk), dtype=np.int32), [len(row) for row in entry_terms]
+            ))
+            score_chunks.append(np.fromiter(map(_timestamp, changed), dtype=np.float64, count=len(chunk)) / half_life)
+            hash_chunks.append(np.fromiter(map(_key_hash, keys), dtype=np.int64, count=len(chunk)))
+            for values, column in zip(extra_chunks, extra_columns):
+                values.append(np.array([np.nan if value is None else float(value) for value in column], dtype=np.float64))
+            count += len(chunk)
+
+        def joined(chunks: List[np.ndarray], dtype) -> np.ndarray:
+            return np.concatenate(chunks) if chunks else np.zeros(0, dtype=dtype)
+
+        self.size = count
+        self.text = b"".join(text_chunks)
+        self.text_offsets = np.cumsum(np.concatenate(length_chunks))
+        del text_chunks, length_chunks
+        self.scores = joined(score_chunks, np.float64)
+        self.alive = np.ones(count, dtype=bool)
+        self.extras = [joined(values, np.float64) for values in extra_chunks]
+        hashes = joined(hash_chunks, np.int64)
+
+        self.key_order = np.argsort(hashes, kind="stable").astype(np.int32)
+        self.key_hashes = hashes[self.key_order]
+
+        all_terms = joined(term_chunks, f"S{TERM_WIDTH}").astype(f"S{TERM_WIDTH}")
+        del term_chunks
+        order = np.argsort(all_terms, kind="stable")
+        sorted_terms = all_terms[order]
+        self.postings = joined(entry_chunks, np.int32)[order]
+        del all_terms, order, entry_chunks
+        if len(sorted_terms):
+            starts = np.flatnonzero(np.concatenate(([True], sorted_terms[1:] != sorted_terms[:-1])))
+        else:
+            starts = np.zeros(0, dtype=np.int64)
+        self.terms = sorted_terms[starts]
+        self.offsets = np.append(starts, len(sorted_terms)).astype(np.int64)
+        del sorted_terms
+
+        # Vorwärtsindex Eintrag → Term-Ids (CSR) für die Prüfung weiterer Suchwörter
+        term_ids = np.repeat(np.arange(len(self.terms), dtype=np.int32), np.diff(self.offsets))
+        self.entry_terms = term_ids[np.argsort(self.postings, kind="stable")]
+        del term_ids
+        self.entry_offsets = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.postings, minlength=count), out=self.entry_offsets[1:])
+
+        # Trigramme nur für Wort-Terme; Nummern werden nicht unscharf gesucht
+        trigrams: Dict[str, List[int]] = {}
+        for term_id, raw in enumerate(self.terms.tolist()):
+            term = raw.decode(errors="ignore")
+            if term.isalpha():
+                for trigram in _trigrams(term):
+                    trigrams.setdefault(trigram, []).append(term_id)
+        self.trigrams = {trigram: np.array(ids, dtype=np.int32) for trigram, ids in trigrams.items()}
+        self.top_cache: Dict[bytes, np.ndarray] = {}
+        self.deep_cache: Dict[bytes, np.ndarray] = {}
+        # Die größten Bereiche (ein und zwei Zeichen) nicht erst bei der ersten Anfrage ranken
+        for width in (1, 2):
+            for prefix in np.unique(self.terms.astype(f"S{width}")).tolist():
+                start, end = self.postings_range(*self.prefix_range(prefix))
+                self.ranked(start, end, prefix)
+
+    def fields(self, position: int) -> List[str]:
+        start, end = self.text_offsets[position], self.text_offsets[position + 1]
+        return self.text[start:end].decode().split(_SEPARATOR)
+
+    def position(self, key: str) -> Optional[int]:
+        key_hash = _key_hash(key)
+        index = int(np.searchsorted(self.key_hashes, key_hash))
+        if index < len(self.key_hashes) and self.key_hashes[index] == key_hash:
+            return int(self.key_order[index])
+        return None
+
+    def prefix_range(self, prefix: bytes) -> Tuple[int, int]:
+        """Term-Ids ``[lo, hi)`` aller Terme mit Präfix ``prefix`` (höchstens TERM_WIDTH - 1 Bytes)"""
+        lo = int(np.searchsorted(self.terms, prefix, "left"))
+        hi = int(np.searchsorted(self.terms, prefix + b"\xff", "left"))
+        return lo, hi
+
+    def postings_range(self, lo: int, hi: int) -> Tuple[int, int]:
+        return int(self.offsets[lo]), int(self.offsets[hi])
+
+    def _has_term(self, entries: np.ndarray, lo: int, hi: int) -> np.ndarray:
+        """Maske: Eintrag hat einen Term mit Id in ``[lo, hi)``"""
+        starts = self.entry_offsets[entries]
+        counts = self.entry_offsets[entries + 1] - starts
+        firsts = np.cumsum(counts) - counts
+        term_ids = self.entry_terms[np.arange(int(counts.sum())) + np.repeat(starts - firsts, counts)]
+        return np.logical_or.reduceat((term_ids >= lo) & (term_ids < hi), firsts)
+
+    def _filter(self, entries: np.ndarray, others: Sequence[Tuple[int, int]]) -> np.ndarray:
+        entries = entries[self.alive[entries]]
+        for lo, hi in others:
+            if not len(entries):
+                break
+            entries = entries[self._has_term(entries, lo, hi)]
+        return entries
+
+    def matching(
+        self, span: Tuple[int, int], others: Sequence[Tuple[int, int]], cache_key: bytes, limit: int, exhaustive: bool = True
+    ) -> np.ndarray:
+        """
+        Einträge mit einem Term aus ``span`` und je einem Term aus jedem Bereich in
+        ``others``, nach Score absteigend. Zuerst wird nur die gehaltene Top-Liste
+        geprüft; reicht sie nicht für ``limit`` Treffer (und ``exhaustive``), eine längere Top-Liste
+        und zuletzt der ganze Bereich.
+        """
+        start, end = self.postings_range(*span)
+        ranked = self.ranked(start, end, cache_key)
+        if not others:
+            return ranked
+        found = self._filter(ranked, others)
+        if len(found) >= limit or len(ranked) == end - start or not exhaustive:
+            return found
+        if end - start > DEEP_CACHE_SIZE:
+            found = self._filter(self.deep_ranked(start, end, cache_key), others)
+            if len(found) >= limit:
+                return found
+        found = np.unique(self._filter(self.postings[start:end], others))
+        return found[np.argsort(-self.scores[found], kind="stable")]
+
+    def _top(self, entries: np.ndarray, depth: int) -> np.ndarray:
+        scores = self.scores[entries]
+        count = min(len(entries), depth * 2)
+        best = entries[np.argpartition(-scores, count - 1)[:count]]
+        best = best[np.argsort(-self.scores[best], kind="stable")]
+        _, first = np.unique(best, return_index=True)
+        return best[np.sort(first)][:depth]
+
+    def ranked(self, start: int, end: int, cache_key: bytes) -> np.ndarray:
+        """Einträge eines Postings-Bereichs nach Score absteigend (große Bereiche: gehaltene Top-Liste)"""
+        entries = self.postings[start:end]
+        if len(entries) <= LARGE_RANGE:
+            return entries[np.argsort(-self.scores[entries], kind="stable")]
+        top = self.top_cache.get(cache_key)
+        if top is None:
+            top = self.top_cache[cache_key] = self._top(entries, TOP_CACHE_SIZE)
+        return top
+
+    def deep_ranked(self, start: int, end: int, cache_key: bytes) -> np.ndarray:
+        """Längere Top-Liste für mehrere Suchwörter; gehalten für höchstens DEEP_CACHE_KEYS Präfixe"""
+        top = self.deep_cache.get(cache_key)
+        if top is None:
+            top = self._top(self.postings[start:end], DEEP_CACHE_SIZE)
+            if len(self.deep_cache) < DEEP_CACHE_KEYS:
+                self.deep_cache[cache_key] = top
+        return top
+
+    def bump(self, position: int, score: float) -> None:
+        """Neuer Score eines Eintrags; gehaltene Top-Listen seiner Präfixe nachziehen"""
+        self.scores[position] = score
+        if not self.top_cache and not self.deep_cache:
+            return
+        _, number, label, _ = self.fields(position)
+        for term in terms(number, label):
+            encoded = term.encode()[:TERM_WIDTH - 1]
+            for length in range(1, len(encoded) + 1):
+                key = encoded[:length]
+                for cache, depth in ((self.top_cache, TOP_CACHE_SIZE), (self.deep_cache, DEEP_CACHE_SIZE)):
+                    top = cache.get(key)
+                    if top is not None and (position in top or score > self.scores[top[-1]]):
+                        merged = np.unique(np.append(top, position))
+                        cache[key] = merged[np.argsort(-self.scores[merged], kind="stable")][:depth]
+
+    def similar_terms(self, word: str) -> List[Tuple[float, int]]:
+        """Ähnliche Wort-Terme über Trigramme: (Ähnlichkeit, Term-Id), beste zuerst"""
+        query = _trigrams(word)
+        # Tippfehler im ersten Zeichen sind selten: Kandidaten sind die Terme mit gleichem Anfang,
+        # das führende Trigramm teilen sie alle
+        lo, hi = self.prefix_range(word[0].encode())
+        lists = []
+        for trigram in query - {"  " + word[0]}:
+            term_ids = self.trigrams.get(trigram)
+            if term_ids is not None:
+                first, last = np.searchsorted(term_ids, (lo, hi))
+                lists.append(term_ids[first:last])
+        if not lists:
+            return []
+        counts = np.bincount(np.concatenate(lists) - lo, minlength=hi - lo)
+        ids = np.flatnonzero(counts)
+        similarity = (counts[ids] + 1) / len(query)
+        ids += lo
+        keep = similarity >= FUZZY_MIN_SIMILARITY
+        ids, similarity = ids[keep], similarity[keep]
+        best = np.argsort(-similarity, kind="stable")[:FUZZY_MAX_TERMS]
+        return [(float(similarity[i]), int(ids[i])) for i in best]
+
+
+class AutocompleteIndex:
+    """Autocomplete über eine Stammdatenart eines Mandanten: Segment plus Overlay"""
+
+    def __init__(self, source: AutocompleteSource, rows: Iterable[Tuple], half_life: Optional[float] = None) -> None:
+        self.source = source
+        self.half_life = half_life or settings.AUTOCOMPLETE_HALF_LIFE_DAYS * 86400
+        self._lock = threading.RLock()
+        self._segment = _Segment(rows, len(source.extras), self.half_life)
+        self._overlay: Dict[str, _Entry] = {}
+        self._overlay_terms: List[Tuple[str, str]] = []
+        self._replay: Optional[List[Tuple[str, Any]]] = None
+        # Durch Nutzung gestiegene Scores; überleben den Neuaufbau aus der Datenbank
+        self._used: Dict[str, float] = {}
+        self.built_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return int(self._segment.alive.sum()) + len(self._overlay)
+
+    @property
+    def overlay_size(self) -> int:
+        return len(self._overlay)
+
+    # -- Suche -------------------------------------------------------------
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Beste Treffer: Präfixe aller Suchwörter, sonst unscharf über Trigramme"""
+        words = terms(query)
+        if not words or limit <= 0:
+            return []
+        segment = self._segment
+        encoded = {word: word.encode() for word in words}
+        spans = {word: segment.prefix_range(encoded[word][:TERM_WIDTH - 1]) for word in words}
+        # Das Wort mit dem kleinsten Bereich führt, die übrigen werden über den Vorwärtsindex geprüft
+        primary = min(words, key=lambda word: segment.offsets[spans[word][1]] - segment.offsets[spans[word][0]])
+        others = [spans[word] for word in words if word != primary]
+        # Gekürzte Suchwörter zusätzlich am Eintrag prüfen
+        long_words = [word for word in words if len(encoded[word]) >= TERM_WIDTH]
+
+        results: List[Tuple[float, float, Dict[str, Any]]] = []
+        seen: set = set()
+        candidates = segment.matching(spans[primary], others, encoded[primary][:TERM_WIDTH - 1], limit)
+        self._collect(candidates, long_words, 1.0, limit, seen, results)
+
+        with self._lock:
+            overlay = [self._overlay[key] for key in self._overlay_keys(primary)]
+        for entry in overlay:
+            if _matches(entry.terms, words):
+                results.append((1.0, entry.score, self._result(entry.fields, entry=entry)))
+
+        # Unscharf auffüllen; bei mehreren Wörtern nur, wenn exakt nichts passt
+        if len(results) < limit and (len(words) == 1 or not results) and primary.isalpha() and len(primary) >= 3:
+            long_others = [word for word in long_words if word != primary]
+            for similarity, term_id in segment.similar_terms(primary):
+                # Unscharfe Treffer füllen nur auf: große Bereiche nur über ihre Top-Liste
+                candidates = segment.matching(
+                    (term_id, term_id + 1), others, segment.terms[term_id] + b"\0", limit, exhaustive=False
+                )
+                self._collect(candidates, long_others, min(similarity, 0.99), limit, seen, results)
+                if len(results) >= limit:
+                    break
+
+        results.sort(key=lambda result: (-result[0], -result[1]))
+        unique: Dict[str, Dict[str, Any]] = {}
+        for _, _, result in results:
+            unique.setdefault(result["key"], result)
+        return list(unique.values())[:limit]
+
+    def _collect(self, candidates: np.ndarray, long_words: List[str], similarity: float, limit: int, seen: set, results: list):
+        segment = self._segment
+        for position in candidates.tolist():
+            if len(results) >= limit:
+                return
+            if position in seen or not segment.alive[position]:
+                continue
+            seen.add(position)
+            fields = segment.fields(position)
+            if long_words and not _matches(terms(fields[1], fields[2]), long_words):
+                continue
+            results.append((similarity, float(segment.scores[position]), self._result(fields, position)))
+
+    def _overlay_keys(self, word: str) -> List[str]:
+        items = self._overlay_terms
+        lo = bisect.bisect_left(items, (word, ""))
+        hi = bisect.bisect_left(items, (word + "￿", ""))
+        return list(dict.fromkeys(key for _, key in items[lo:hi]))
+
+    def _result(self, fields: Sequence[Optional[str]], position: Optional[int] = None, entry: Optional[_Entry] = None):
+        key, number, label, hint = fields
+        result = {"id": number, "key": key, "label": label, "hint": hint or None}
+        for index, (name, _) in enumerate(self.source.extras):
+            value = entry.extras[index] if entry is not None else self._segment.extras[index][position]
+            result[name] = None if value is None or value != value else float(value)
+        return result
+
+    # -- Nutzung und Änderungen -------------------------------------------
+
+    def record_use(self, key: str, at: Optional[float] = None) -> bool:
+        """Auswahl eines Eintrags zählen (Häufigkeit und Aktualität)"""
+        now = (time.time() if at is None else at) / self.half_life
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append(("use", (key, at)))
+            entry = self._overlay.get(key)
+            if entry is not None:
+                entry.score = self._used[key] = float(np.logaddexp2(entry.score, now))
+                return True
+            segment = self._segment
+            position = segment.position(key)
+            if position is None or not segment.alive[position]:
+                return False
+            self._used[key] = score = float(np.logaddexp2(segment.scores[position], now))
+            segment.bump(position, score)
+            return True
+
+    def upsert(self, row: Tuple) -> None:
+        key, number, label, hint, changed, *extras = row
+        key = str(key)
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append(("upsert", row))
+            score = self._remove(key)
+            changed_score = (time.time() if changed is None else _timestamp(changed)) / self.half_life
+            entry = _Entry(
+                key=key,
+                fields=(key, number or "", label or "", hint),
+                extras=tuple(None if value is None else float(value) for value in extras),
+                score=changed_score if score is None else max(score, changed_score),
+                terms=terms(number, label)[:MAX_TERMS_PER_ENTRY],
+            )
+            self._overlay[key] = entry
+            for term in entry.terms:
+                bisect.insort(self._overlay_terms, (term, key))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append(("delete", key))
+            self._remove(str(key))
+
+    def _remove(self, key: str) -> Optional[float]:
+        """Eintrag aus Overlay oder Segment entfernen; liefert seinen bisherigen Score"""
+        entry = self._overlay.pop(key, None)
+        if entry is not None:
+            for term in entry.terms:
+                index = bisect.bisect_left(self._overlay_terms, (term, key))
+                if index < len(self._overlay_terms) and self._overlay_terms[index] == (term, key):
+                    del self._overlay_terms[index]
+            return entry.score
+        segment = self._segment
+        position = segment.position(key)
+        if position is not None and segment.alive[position]:
+            segment.alive[position] = False
+            return float(segment.scores[position])
+        return None
+
+    # -- Neuaufbau ----------------------------------------------------------
+
+    def needs_rebuild(self) -> bool:
+        return (
+            self._replay is None
+            and (
+                len(self._overlay) >= settings.AUTOCOMPLETE_OVERLAY_MAX
+                or time.monotonic() - self.built_at >= settings.AUTOCOMPLETE_REBUILD_SECONDS
+            )
+        )
+
+    def rebuild(self, rows: Iterable[Tuple]) -> None:
+        """Segment neu bauen; Nutzung und Änderungen während des Baus werden übernommen"""
+        with self._lock:
+            if self._replay is not None:
+                return
+            self._replay = []
+            used = dict(self._used)
+        try:
+            fresh = AutocompleteIndex(self.source, rows, self.half_life)
+        except Exception:
+            with self._lock:
+                self._replay = None
+            raise
+        # Der Bau zählt nur die letzte Änderung als Nutzung
+        for key, score in used.items():
+            position = fresh._segment.position(key)
+            if position is not None and score > fresh._segment.scores[position]:
+                fresh._segment.scores[position] = score
+                fresh._used[key] = score
+        with self._lock:
+            for operation, payload in self._replay:
+                if operation == "upsert":
+                    fresh.upsert(payload)
+                elif operation == "delete":
+                    fresh.delete(payload)
+                else:
+                    fresh.record_use(*payload)
+            self._segment = fresh._segment
+            self._overlay = fresh._overlay
+            self._overlay_terms = fresh._overlay_terms
+            self._used = fresh._used
+            self._replay = None
+            self.built_at = time.monotonic()
+
+
+class AutocompleteService:
+    """Indizes je (Art, Mandant): Bau beim ersten Zugriff, Neuaufbau im Hintergrund"""
+
+    def __init__(
+        self,
+        sources: Dict[str, AutocompleteSource],
+        session_factory: Optional[Callable[[], Session]] = None,
+    ) -> None:
+        self.sources = sources
+        self._session_factory = session_factory
+        self._lock = threading.Lock()
+        self._indexes: Dict[Tuple[str, str], AutocompleteIndex] = {}
+        self._building: Dict[Tuple[str, str], asyncio.Future] = {}
+        # Änderungen, die während des ersten Baus eines Index eintreffen
+        self._early: Dict[Tuple[str, str], List[Tuple[str, Any]]] = {}
+        self._rebuilds: set = set()
+        self._models = {source.model: source for source in sources.values()}
+        self._hooks_installed = False
+
+    def load(self, kind: str, tenant: str) -> List[Tuple]:
+        """Alle aktiven Einträge einer Art aus der Datenbank"""
+        if self._session_factory is None:
+            from app.core.database import SessionLocal
+            self._session_factory = SessionLocal
+        statement = self.sources[kind].query(tenant).execution_options(yield_per=LOAD_FETCH_SIZE)
+        with self._session_factory() as session:
+            return [tuple(row) for row in session.execute(statement)]
+
+    def build(self, kind: str, tenant: str) -> AutocompleteIndex:
+        start = time.perf_counter()
+        index = AutocompleteIndex(self.sources[kind], self.load(kind, tenant))
+        logger.info("Autocomplete-Index %s/%s gebaut: %d Einträge in %.0f ms",
+                    kind, tenant, len(index), (time.perf_counter() - start) * 1000)
+        return index
+
+    async def index(self, kind: str, tenant: str) -> AutocompleteIndex:
+        if kind not in self.sources:
+            raise KeyError(kind)
+        key = (kind, tenant)
+        index = self._indexes.get(key)
+        if index is None:
+            future = self._building.get(key)
+            if future is None:
+                future = self._building[key] = asyncio.ensure_future(self._build_first(key))
+                future.add_done_callback(lambda _: self._building.pop(key, None))
+            return await asyncio.shield(future)
+        if index.needs_rebuild() and key not in self._rebuilds:
+            self._rebuilds.add(key)
+            asyncio.ensure_future(self._rebuild(key, index))
+        return index
+
+    async def _build_first(self, key: Tuple[str, str]) -> AutocompleteIndex:
+        from app.core.database import run_in_db_threadpool
+
+        with self._lock:
+            self._early[key] = []
+        try:
+            index = await run_in_db_threadpool(self.build, *key)
+            with self._lock:
+                for operation, payload in self._early.pop(key):
+                    getattr(index, operation)(payload)
+                self._indexes[key] = index
+            return index
+        finally:
+            with self._lock:
+                self._early.pop(key, None)
+
+    async def _rebuild(self, key: Tuple[str, str], index: AutocompleteIndex) -> None:
+        from app.core.database import run_in_db_threadpool
+
+        try:
+            await run_in_db_threadpool(lambda: index.rebuild(self.load(*key)))
+        except Exception:
+            logger.exception("Autocomplete-Index %s/%s: Neuaufbau fehlgeschlagen", *key)
+        finally:
+            self._rebuilds.discard(key)
+
+    async def search(self, kind: str, tenant: str, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        return (await self.index(kind, tenant)).search(query, limit)
+
+    async def record_use(self, kind: str, tenant: str, key: str) -> bool:
+        return (await self.index(kind, tenant)).record_use(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._indexes.clear()
+
+    # -- Änderungen aus ORM-Sessions ---------------------------------------
+
+    def collect(self, session: Session) -> None:
+        """``after_flush``: geänderte Stammdaten der Session vormerken (Zeitpunkt: jetzt)"""
+        now = time.time()
+        changes = None
+        for obj in (*session.new, *session.dirty, *session.deleted):
+            source = self._models.get(type(obj))
+            if source is None:
+                continue
+            if changes is None:
+                changes = session.info.setdefault("autocomplete_changes", [])
+            row = None if obj in session.deleted else source.row(obj, now)
+            change = ("upsert", row) if row is not None else ("delete", source.key_of(obj))
+            changes.append(((source.kind, source.tenant_of(obj)), change))
+
+    def apply(self, session: Session) -> None:
+        """``after_commit``: vorgemerkte Änderungen in geladene Indizes übernehmen"""
+        changes = session.info.pop("autocomplete_changes", None)
+        if not changes:
+            return
+        with self._lock:
+            for key, (operation, payload) in changes:
+                index = self._indexes.get(key)
+                if index is not None:
+                    getattr(index, operation)(payload)
+                elif key in self._early:
+                    self._early[key].append((operation, payload))
+
+    def _after_flush(self, session: Session, _flush_context) -> None:
+        self.collect(session)
+
+    def _after_soft_rollback(self, session: Session, _previous_transaction) -> None:
+        session.info.pop("autocomplete_changes", None)
+
+    def _listeners(self):
+        return (
+            ("after_flush", self._after_flush),
+            ("after_commit", self.apply),
+            ("after_soft_rollback", self._after_soft_rollback),
+        )
+
+    def install_hooks(self) -> None:
+        """ORM-Hooks für alle Sessions registrieren (auch die von ``AsyncSession``)"""
+        if not self._hooks_installed:
+            for name, listener in self._listeners():
+                event.listen(Session, name, listener)
+            self._hooks_installed = True
+
+    def remove_hooks(self) -> None:
+        if self._hooks_installed:
+            for name, listener in self._listeners():
+                event.remove(Session, name, listener)
+            self._hooks_installed = False
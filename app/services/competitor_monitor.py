@@ -1,20 +1,27 @@
 """
 Competitor Price & Image Monitoring Service
 Hybrid approach: Search API discovery + structured scraping with JSON-LD/schema.org
+
+Seiten und Bilder werden über den PoliteCrawler (app.services.crawler) geladen:
+nebenläufig mit Limits je Shop, bedingten GETs und Parsen im Threadpool.
+Unveränderte Seiten liefern das zuletzt geparste Ergebnis.
 """
 
 import asyncio
+import io
 import logging
 import json
 import hashlib
-import requests
+import httpx
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple, Any
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from pathlib import Path
 import re
 from urllib.parse import urlparse, urljoin
 
+from .crawler import PoliteCrawler
+
 logger = logging.getLogger(__name__)
 
 
@@ -54,14 +61,12 @@ class CompetitorPrice:
 class CompetitorMonitor:
     """Monitor competitor prices and product images from agricultural B2B shops"""
 
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+    def __init__(self, shops: Optional[Dict[str, Dict]] = None, crawler: Optional[PoliteCrawler] = None):
+        # Identifiziert sich mit CRAWLER_USER_AGENT, hält Limits je Shop und robots.txt ein
+        self.crawler = crawler or PoliteCrawler()
 
         # Agricultural B2B shop configurations
-        self.shops = {
+        self.shops = shops if shops is not None else {
             'baywa': {
                 'name': 'BayWa',
                 'base_url': 'https://www.baywa.de',
@@ -118,32 +123,27 @@ class CompetitorMonitor:
 
     async def search_products(self, query: str, category: str = 'psm',
                             max_results: int = 50) -> List[str]:
-        """Search for product URLs using shop search APIs"""
-        product_urls = []
-
-        for shop_key, shop_config in self.shops.items():
-            if category not in shop_config['categories']:
-                continue
+        """Search for product URLs using shop search APIs (all shops concurrently)"""
 
+        async def search_shop(shop_key: str, shop_config: Dict) -> List[str]:
             try:
                 # Use Google Custom Search API or similar for discovery
                 search_urls = await self._google_custom_search(
                     f"site:{shop_config['base_url']} {query} {category}",
                     max_results=max_results // len(self.shops)
                 )
-
-                # Filter and validate URLs
-                for url in search_urls:
-                    if self._is_product_url(url, shop_config):
-                        product_urls.append(url)
-
                 logger.info(f"Found {len(search_urls)} potential products from {shop_key}")
-
+                # Filter and validate URLs
+                return [url for url in search_urls if self._is_product_url(url, shop_config)]
             except Exception as e:
                 logger.warning(f"Failed to search {shop_key}: {e}")
-                continue
+                return []
 
-        return list(set(product_urls))  # Remove duplicates
+        results = await asyncio.gather(*(
+            search_shop(shop_key, shop_config) for shop_key, shop_config in self.shops.items()
+            if category in shop_config['categories']
+        ))
+        return list({url for urls in results for url in urls})  # Remove duplicates
 
     async def scrape_product_data(self, product_url: str) -> Optional[CompetitorPrice]:
         """Scrape product data using structured approach (JSON-LD first, then HTML)"""
@@ -153,22 +153,43 @@ class CompetitorMonitor:
             if not shop_config:
                 return None
 
-            # Fetch page
-            response = self.session.get(product_url, timeout=10)
-            response.raise_for_status()
-
-            # Try JSON-LD/schema.org first
-            product_data = self._extract_json_ld(response.text)
-            if product_data:
-                return self._parse_json_ld_product(product_data, product_url, shop_config)
-
-            # Fallback to HTML parsing
-            return self._parse_html_product(response.text, product_url, shop_config)
+            # Parsen im Threadpool und nur, wenn sich die Seite geändert hat
+            result = await self.crawler.fetch(
+                product_url, lambda response: self._parse_page(response.text, product_url, shop_config)
+            )
+            if result.error:
+                logger.warning(f"Failed to scrape {product_url}: {result.error}")
+                return None
+            if result.data is None:
+                return None
+            if result.changed:
+                await self._hash_images(result.data)
+            return replace(result.data, scraped_at=datetime.now())
 
         except Exception as e:
             logger.warning(f"Failed to scrape {product_url}: {e}")
             return None
 
+    async def scrape_products(self, product_urls: List[str]) -> List[CompetitorPrice]:
+        """Scrape several product pages concurrently (limits per shop apply)"""
+        prices = await asyncio.gather(*(self.scrape_product_data(url) for url in product_urls))
+        return [price for price in prices if price is not None]
+
+    def _parse_page(self, html: str, url: str, shop_config: Dict) -> Optional[CompetitorPrice]:
+        """Parse a product page; runs in the thread pool, image hashes are filled in afterwards"""
+        # Try JSON-LD/schema.org first
+        product_data = self._extract_json_ld(html)
+        if product_data:
+            return self._parse_json_ld_product(product_data, url, shop_config)
+
+        # Fallback to HTML parsing
+        return self._parse_html_product(html, url, shop_config)
+
+    async def _hash_images(self, price: CompetitorPrice) -> None:
+        hashes = await asyncio.gather(*(self._calculate_image_hash(img.url) for img in price.images))
+        for image, image_hash in zip(price.images, hashes):
+            image.hash = image_hash
+
     def _extract_json_ld(self, html: str) -> Optional[Dict[str, Any]]:
         """Extract JSON-LD structured data from HTML"""
         import json
@@ -222,8 +243,8 @@ class CompetitorMonitor:
         for img_url in image_urls:
             if isinstance(img_url, str):
                 images.append(ProductImage(
-                    url=img_url,
-                    hash=self._calculate_image_hash(img_url),
+                    url=urljoin(url, img_url),
+                    hash='',
                     source_url=url,
                     scraped_at=datetime.now()
                 ))
@@ -288,7 +309,7 @@ class CompetitorMonitor:
                     img_url = urljoin(url, img_url)
                     images.append(ProductImage(
                         url=img_url,
-                        hash=self._calculate_image_hash(img_url),
+                        hash='',
                         width=int(img.get('width', 0)) if img.get('width') else None,
                         height=int(img.get('height', 0)) if img.get('height') else None,
                         source_url=url,
@@ -308,34 +329,30 @@ class CompetitorMonitor:
             scraped_at=datetime.now()
         )
 
-    def _calculate_image_hash(self, image_url: str) -> str:
+    async def _calculate_image_hash(self, image_url: str) -> str:
         """Calculate perceptual hash for image deduplication"""
+        # Try to download and hash the actual image (unchanged images keep their hash)
+        result = await self.crawler.fetch(image_url, self._hash_image_content)
+        if result.data:
+            return result.data
+        # Fallback to URL hash
+        return hashlib.md5(image_url.encode()).hexdigest()[:16]
+
+    @staticmethod
+    def _hash_image_content(response: httpx.Response) -> Optional[str]:
+        # Use imagehash for perceptual hashing if available
         try:
-            # Try to download and hash the actual image
-            response = self.session.get(image_url, timeout=5, stream=True)
-            if response.status_code == 200:
-                # Use imagehash for perceptual hashing if available
-                try:
-                    import imagehash
-                    from PIL import Image
-                    import io
-
-                    image_data = io.BytesIO(response.content)
-                    img = Image.open(image_data)
-                    # Calculate perceptual hash
-                    phash = imagehash.phash(img)
-                    return str(phash)
-                except ImportError:
-                    # Fallback to content hash
-                    return hashlib.md5(response.content).hexdigest()[:16]
-                except Exception:
-                    # Fallback to URL hash
-                    return hashlib.md5(image_url.encode()).hexdigest()[:16]
-            else:
-                return hashlib.md5(image_url.encode()).hexdigest()[:16]
+            import imagehash
+            from PIL import Image
+
+            img = Image.open(io.BytesIO(response.content))
+            # Calculate perceptual hash
+            return str(imagehash.phash(img))
+        except ImportError:
+            # Fallback to content hash
+            return hashlib.md5(response.content).hexdigest()[:16]
         except Exception:
-            # Fallback to URL hash
-            return hashlib.md5(image_url.encode()).hexdigest()[:16]
+            return None
 
     async def _google_custom_search(self, query: str, max_results: int = 10) -> List[str]:
         """Use Google Custom Search API for product discovery"""
@@ -0,0 +1,248 @@
+"""
+Crawler
+Asynchroner, höflicher HTTP-Crawler (Wettbewerber-Preismonitoring)
+
+- ``httpx.AsyncClient``; höchstens CRAWLER_CONCURRENCY Requests gleichzeitig,
+  je Host höchstens CRAWLER_PER_HOST_CONCURRENCY.
+- Höflichkeit: Mindestabstand CRAWLER_HOST_DELAY_SECONDS zwischen zwei
+  Request-Starts an denselben Host; ``Crawl-delay`` aus robots.txt und
+  ``Retry-After`` (429/503) verlängern ihn. robots.txt wird je Host einmal
+  geladen und beachtet.
+- Bedingte GETs: ETag/Last-Modified der letzten Antwort werden mitgeschickt.
+  Bei 304 oder unverändertem Inhalt (SHA-256 des Bodys) wird das gespeicherte
+  Parse-Ergebnis zurückgegeben, die Seite also nicht erneut geparst.
+- Parsen läuft im Threadpool (``asyncio.to_thread``), nicht auf dem Event-Loop.
+- Gleichzeitige Abrufe derselben URL (z. B. ein Produktbild auf vielen Seiten)
+  teilen sich einen Request.
+
+Client und Semaphoren gehören zum Event-Loop; läuft der Crawler in einem
+neuen Loop, werden sie neu angelegt (der Cache bleibt).
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import httpx
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Obergrenze für Crawl-delay und Retry-After, damit ein Host den Lauf nicht blockiert
+MAX_HOST_DELAY = 60.0
+
+
+@dataclass
+class CacheEntry:
+    """Letzter Stand einer URL: Validatoren, Inhalts-Hash und Parse-Ergebnis"""
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_hash: str
+    data: Any
+    fetched_at: float
+
+
+@dataclass
+class FetchResult:
+    """Ergebnis eines Abrufs; ``changed`` ist False bei 304 oder gleichem Inhalt"""
+    url: str
+    status: int
+    changed: bool = False
+    data: Any = None
+    error: Optional[str] = None
+
+
+class _Host:
+    """Parallelität und Abstand der Requests an einen Host"""
+
+    def __init__(self, concurrency: int, delay: float) -> None:
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.delay = delay
+        self.next_start = 0.0
+        self.lock = asyncio.Lock()
+        self.robots: Optional[RobotFileParser] = None
+        self.robots_lock = asyncio.Lock()
+
+    async def wait_turn(self) -> None:
+        async with self.lock:
+            loop = asyncio.get_running_loop()
+            wait = self.next_start - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self.next_start = loop.time() + self.delay
+
+    def back_off(self, seconds: float) -> None:
+        self.next_start = max(self.next_start, asyncio.get_running_loop().time() + min(seconds, MAX_HOST_DELAY))
+
+
+class PoliteCrawler:
+    """Abruf von Seiten mit Limits je Host, bedingten GETs und Parsen im Threadpool"""
+
+    def __init__(
+        self,
+        *,
+        user_agent: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        per_host: Optional[int] = None,
+        delay: Optional[float] = None,
+        timeout: Optional[float] = None,
+        respect_robots: Optional[bool] = None,
+    ) -> None:
+        self.user_agent = user_agent or settings.CRAWLER_USER_AGENT
+        self.concurrency = concurrency or settings.CRAWLER_CONCURRENCY
+        self.per_host = per_host or settings.CRAWLER_PER_HOST_CONCURRENCY
+        self.delay = settings.CRAWLER_HOST_DELAY_SECONDS if delay is None else delay
+        self.timeout = timeout or settings.CRAWLER_TIMEOUT_SECONDS
+        self.respect_robots = settings.CRAWLER_RESPECT_ROBOTS if respect_robots is None else respect_robots
+        # Begrenzt (LRU, Bytes, TTL): verdrängte URLs werden beim nächsten Mal ohne Validatoren geholt
+        self.cache: TTLCache[CacheEntry] = TTLCache(
+            "crawler_pages",
+            max_entries=settings.CRAWLER_CACHE_MAX_ENTRIES,
+            max_bytes=settings.CRAWLER_CACHE_MAX_BYTES,
+            default_ttl=settings.CRAWLER_CACHE_TTL_SECONDS,
+        )
+        self.stats: Counter = Counter()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._hosts: Dict[str, _Host] = {}
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    def _bind(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._client = httpx.AsyncClient(
+                headers={"User-Agent": self.user_agent},
+                timeout=self.timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+            )
+            self._slots = asyncio.Semaphore(self.concurrency)
+            self._hosts = {}
+            self._pending = {}
+        return self._client
+
+    def _host(self, url: str) -> _Host:
+        netloc = urlsplit(url).netloc.lower()
+        host = self._hosts.get(netloc)
+        if host is None:
+            host = self._hosts[netloc] = _Host(self.per_host, self.delay)
+        return host
+
+    async def close(self) -> None:
+        if self._client is not None and self._loop is asyncio.get_running_loop():
+            await self._client.aclose()
+        self._client = self._loop = None
+
+    async def _get(self, url: str, host: _Host, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        client = self._bind()
+        # Erst den Host-Platz, dann den globalen: wartende Hosts blockieren keine anderen
+        async with host.semaphore:
+            await host.wait_turn()
+            async with self._slots:
+                self.stats["requests"] += 1
+                response = await client.get(url, headers=headers)
+        if response.status_code in (429, 503):
+            retry_after = response.headers.get("Retry-After", "")
+            host.back_off(float(retry_after) if retry_after.isdigit() else host.delay * 4)
+        return response
+
+    async def _allowed(self, url: str, host: _Host) -> bool:
+        if not self.respect_robots:
+            return True
+        async with host.robots_lock:
+            if host.robots is None:
+                parts = urlsplit(url)
+                robots = RobotFileParser()
+                try:
+                    response = await self._get(f"{parts.scheme}://{parts.netloc}/robots.txt", host)
+                    if response.status_code == 200:
+                        robots.parse(response.text.splitlines())
+                    else:
+                        robots.allow_all = True
+                except httpx.HTTPError as exc:
+                    logger.warning(f"robots.txt of {parts.netloc} not available: {exc}")
+                    robots.allow_all = True
+                crawl_delay = robots.crawl_delay(self.user_agent)
+                if crawl_delay:
+                    host.delay = max(host.delay, min(float(crawl_delay), MAX_HOST_DELAY))
+                host.robots = robots
+        return host.robots.can_fetch(self.user_agent, url)
+
+    async def fetch(self, url: str, parse: Optional[Callable[[httpx.Response], Any]] = None) -> FetchResult:
+        """
+        Ruft eine URL ab; ``parse(response)`` läuft im Threadpool und nur bei neuem Inhalt
+
+        Args:
+            url: Absolute URL
+            parse: Wandelt die Antwort in das gespeicherte Ergebnis (``FetchResult.data``)
+        """
+        self._bind()
+        pending = self._pending.get(url)
+        if pending is None:
+            pending = self._pending[url] = asyncio.ensure_future(self._fetch(url, parse))
+            pending.add_done_callback(lambda _: self._pending.pop(url, None))
+        else:
+            self.stats["coalesced"] += 1
+        # shield: ein abgebrochener Aufrufer bricht den Abruf der anderen nicht ab
+        return await asyncio.shield(pending)
+
+    async def _fetch(self, url: str, parse: Optional[Callable[[httpx.Response], Any]]) -> FetchResult:
+        host = self._host(url)
+        try:
+            if not await self._allowed(url, host):
+                self.stats["disallowed"] += 1
+                return FetchResult(url, 0, error="disallowed by robots.txt")
+            entry = self.cache.get(url)
+            headers = {}
+            if entry is not None:
+                if entry.etag:
+                    headers["If-None-Match"] = entry.etag
+                if entry.last_modified:
+                    headers["If-Modified-Since"] = entry.last_modified
+            response = await self._get(url, host, headers)
+        except httpx.HTTPError as exc:
+            self.stats["errors"] += 1
+            return FetchResult(url, 0, error=str(exc) or type(exc).__name__)
+
+        if response.status_code == 304 and entry is not None:
+            self.stats["not_modified"] += 1
+            entry.fetched_at = time.time()
+            self.cache.set(url, entry)
+            return FetchResult(url, 304, data=entry.data)
+        if response.status_code >= 400:
+            self.stats["errors"] += 1
+            return FetchResult(url, response.status_code, error=f"HTTP {response.status_code}")
+
+        content_hash = hashlib.sha256(response.content).hexdigest()
+        etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        if entry is not None and entry.content_hash == content_hash:
+            self.stats["unchanged"] += 1
+            entry.etag, entry.last_modified, entry.fetched_at = etag, last_modified, time.time()
+            self.cache.set(url, entry)
+            return FetchResult(url, response.status_code, data=entry.data)
+
+        data = None
+        if parse is not None:
+            try:
+                data = await asyncio.to_thread(parse, response)
+            except Exception as exc:
+                self.stats["parse_errors"] += 1
+                logger.warning(f"Failed to parse {url}: {exc}")
+                return FetchResult(url, response.status_code, error=f"parse failed: {exc}")
+        self.stats["parsed"] += 1
+        self.cache.set(url, CacheEntry(etag, last_modified, content_hash, data, time.time()))
+        return FetchResult(url, response.status_code, changed=True, data=data)
+
+    async def crawl(self, urls: Iterable[str], parse: Optional[Callable[[httpx.Response], Any]] = None) -> List[FetchResult]:
+        """Ruft alle URLs nebenläufig ab (Limits wie bei ``fetch``), Ergebnisse in Reihenfolge der URLs"""
+        return list(await asyncio.gather(*(self.fetch(url, parse) for url in urls)))
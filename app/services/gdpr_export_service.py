@@ -0,0 +1,472 @@
+"""
+GDPR Export Service
+Streaming Art. 15 / Art. 20 exports over a registry of personal-data tables
+
+Rows of other tables that merely reference the subject (created_by,
+approved_by, ...) are exported as references only: key columns, timestamps
+and the subject's role in the row, not the business data of third parties.
+
+Background jobs keep their state next to the ZIP in GDPR_EXPORT_DIR, which
+must be shared by all replicas, so status and download work on any of them.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import secrets
+import time
+import uuid
+import zipfile
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from sqlalchemy import MetaData, String, Table, Uuid, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per round-trip from the server-side cursor
+STREAM_BATCH_SIZE = 5000
+
+# Subjects with more rows than this are exported as a background job
+INLINE_EXPORT_MAX_ROWS = 50_000
+
+DOWNLOAD_TOKEN_TTL_SECONDS = 24 * 3600
+
+# Expired jobs are removed at most this often (triggered by new jobs)
+CLEANUP_INTERVAL_SECONDS = 3600
+
+# Exported for rows of created_entities sources besides key and subject columns
+REFERENCE_TIMESTAMP_COLUMNS = ("created_at", "updated_at", "timestamp")
+
+# Columns that link a row to the user who created, owns or processed it
+SUBJECT_COLUMNS = (
+    "user_id",
+    "created_by",
+    "updated_by",
+    "posted_by",
+    "assigned_to",
+    "counted_by",
+    "approved_by",
+    "owner_id",
+)
+
+
+@dataclass(frozen=True)
+class PersonalDataSource:
+    """A table holding personal data of a subject, matched via ``subject_columns``."""
+    name: str
+    table: Table
+    subject_columns: Sequence[str]
+    category: str = "created_entities"
+    order_by: Optional[str] = None
+    # Exported columns; default: all for audit_logs, otherwise key and timestamps
+    columns: Optional[Sequence[str]] = None
+
+    def export_columns(self) -> List[str]:
+        if self.columns is not None:
+            return list(self.columns)
+        if self.category == "audit_logs":
+            return [c.name for c in self.table.columns]
+        keys = [c.name for c in self.table.primary_key.columns]
+        return keys + [c for c in REFERENCE_TIMESTAMP_COLUMNS if c in self.table.c and c not in keys]
+
+    def subject_filter(self, user_id: str, tenant_id: Optional[str]):
+        clauses = [self.table.c[col] == user_id for col in self.subject_columns]
+        condition = or_(*clauses) if len(clauses) > 1 else clauses[0]
+        if tenant_id is not None and "tenant_id" in self.table.c:
+            condition = condition & (self.table.c.tenant_id == tenant_id)
+        return condition
+
+
+_registry: Dict[str, PersonalDataSource] = {}
+_discovered = False
+
+
+def register_personal_data_source(source: PersonalDataSource) -> None:
+    """Register (or replace) a personal-data source explicitly."""
+    _registry[source.name] = source
+
+
+def discover_personal_data_sources(metadata: MetaData) -> List[PersonalDataSource]:
+    """Find all tables in ``metadata`` that reference a subject via SUBJECT_COLUMNS."""
+    sources = []
+    for table in metadata.sorted_tables:
+        if table.name == "users":
+            continue
+        # Only textual/UUID references can hold a user id
+        columns = [
+            col for col in SUBJECT_COLUMNS
+            if col in table.c and isinstance(table.c[col].type, (String, Uuid))
+        ]
+        if not columns:
+            continue
+        order_by = next((c for c in ("timestamp", "created_at", "id") if c in table.c), None)
+        category = "audit_logs" if table.name == "audit_logs" else "created_entities"
+        sources.append(PersonalDataSource(table.fullname, table, columns, category, order_by))
+    return sources
+
+
+def get_personal_data_sources() -> List[PersonalDataSource]:
+    """All known sources; explicit registrations win over discovered ones."""
+    global _discovered
+    if not _discovered:
+        from app.core.database import Base
+        import app.infrastructure.models  # noqa: F401  (registers tables on Base)
+
+        for source in discover_personal_data_sources(Base.metadata):
+            _registry.setdefault(source.name, source)
+        _discovered = True
+    return list(_registry.values())
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (uuid.UUID, bytes)):
+        return str(value)
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+def _dumps(record: Dict[str, Any]) -> bytes:
+    return json.dumps(record, default=_json_default, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+def iter_source_rows(
+    db: Session,
+    source: PersonalDataSource,
+    user_id: str,
+    tenant_id: Optional[str],
+    batch_size: int = STREAM_BATCH_SIZE,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Stream rows of one source through a server-side cursor.
+
+    Only ``source.export_columns()`` are exported; for sources that merely
+    reference the subject, ``subject_roles`` lists the columns naming them.
+    """
+    columns = source.export_columns()
+    references = source.category != "audit_logs"
+    selected = columns + [c for c in source.subject_columns if references and c not in columns]
+    stmt = select(*(source.table.c[c] for c in selected)).where(source.subject_filter(user_id, tenant_id))
+    if source.order_by:
+        stmt = stmt.order_by(source.table.c[source.order_by])
+    result = db.execute(stmt.execution_options(yield_per=batch_size))
+    for partition in result.mappings().partitions():
+        for row in partition:
+            record = {c: row[c] for c in columns}
+            if references:
+                record["subject_roles"] = [c for c in source.subject_columns if str(row[c]) == str(user_id)]
+            yield record
+
+
+def count_subject_rows(db: Session, user_id: str, tenant_id: Optional[str]) -> Dict[str, int]:
+    """Row count per source (used to pick inline vs. background export)."""
+    counts = {}
+    for source in get_personal_data_sources():
+        stmt = select(func.count()).select_from(source.table).where(
+            source.subject_filter(user_id, tenant_id)
+        )
+        counts[source.name] = db.execute(stmt).scalar_one()
+    return counts
+
+
+def load_subject(db: Session, user_id: str, tenant_id: Optional[str]) -> Optional[Dict[str, Any]]:
+    from app.infrastructure.models import User
+
+    users = User.__table__
+    stmt = select(users).where(users.c.id == user_id)
+    if tenant_id is not None:
+        stmt = stmt.where(users.c.tenant_id == tenant_id)
+    row = db.execute(stmt).mappings().first()
+    return dict(row) if row else None
+
+
+def _export_metadata(user_id: str, tenant_id: Optional[str], fmt: str) -> Dict[str, Any]:
+    return {
+        "subject_id": user_id,
+        "exported_at": datetime.utcnow().isoformat(),
+        "tenant_id": tenant_id,
+        "format": fmt,
+        "sources": [s.name for s in get_personal_data_sources()],
+    }
+
+
+def iter_ndjson(
+    db: Session,
+    user_id: str,
+    tenant_id: Optional[str],
+    extra_metadata: Optional[Dict[str, Any]] = None,
+) -> Iterator[bytes]:
+    """
+    Yield the complete export as NDJSON lines.
+
+    Every line carries a ``_type``: ``export_metadata`` first, then
+    ``personal_data``, one line per row of each source and a closing
+    ``export_summary`` with row counts.
+    """
+    metadata = _export_metadata(user_id, tenant_id, "NDJSON")
+    metadata.update(extra_metadata or {})
+    yield _dumps({"_type": "export_metadata", **metadata})
+    yield _dumps({"_type": "personal_data", **(load_subject(db, user_id, tenant_id) or {})})
+
+    counts: Dict[str, int] = {}
+    for source in get_personal_data_sources():
+        n = 0
+        for row in iter_source_rows(db, source, user_id, tenant_id):
+            n += 1
+            yield _dumps({"_type": source.name, **row})
+        counts[source.name] = n
+    yield _dumps({"_type": "export_summary", "row_counts": counts})
+
+
+def write_zip(
+    db: Session,
+    user_id: str,
+    tenant_id: Optional[str],
+    target: Path,
+    extra_metadata: Optional[Dict[str, Any]] = None,
+) -> Dict[str, int]:
+    """Write a ZIP with one NDJSON file per source; rows are streamed, never buffered."""
+    counts: Dict[str, int] = {}
+    with zipfile.ZipFile(target, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        with zf.open("personal_data.json", "w") as fh:
+            fh.write(_dumps(load_subject(db, user_id, tenant_id) or {}))
+        for source in get_personal_data_sources():
+            n = 0
+            with zf.open(f"{source.category}/{source.name}.ndjson", "w") as fh:
+                for row in iter_source_rows(db, source, user_id, tenant_id):
+                    fh.write(_dumps(row))
+                    n += 1
+            counts[source.name] = n
+        metadata = _export_metadata(user_id, tenant_id, "ZIP")
+        metadata.update(extra_metadata or {})
+        metadata["row_counts"] = counts
+        zf.writestr("export_metadata.json", json.dumps(metadata, default=_json_default, indent=2))
+    return counts
+
+
+def build_inline_export(db: Session, user_id: str, tenant_id: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Legacy single-document JSON export (only used for small subjects)."""
+    subject = load_subject(db, user_id, tenant_id)
+    if subject is None:
+        return None
+
+    data: Dict[str, Any] = {
+        "personal_data": subject,
+        "audit_logs": [],
+        "created_entities": {},
+        "export_metadata": _export_metadata(user_id, tenant_id, "JSON"),
+    }
+    for source in get_personal_data_sources():
+        rows = list(iter_source_rows(db, source, user_id, tenant_id))
+        if source.category == "audit_logs":
+            data["audit_logs"].extend(rows)
+        else:
+            data["created_entities"][source.name] = rows
+    # Round-trip through JSON so datetimes/decimals match the NDJSON/ZIP output
+    return json.loads(json.dumps(data, default=_json_default))
+
+
+# ----------------------------------------------------------------------
+# Background export jobs
+# ----------------------------------------------------------------------
+
+@dataclass
+class ExportJob:
+    """Background GDPR export; downloadable with its token until ``expires_at``."""
+    id: str
+    user_id: str
+    tenant_id: Optional[str]
+    token_hash: str
+    token: Optional[str] = None  # only known right after submit
+    status: str = "pending"  # pending, running, completed, failed
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    completed_at: Optional[datetime] = None
+    file_path: Optional[str] = None
+    row_counts: Dict[str, int] = field(default_factory=dict)
+    error: Optional[str] = None
+    extra_metadata: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def expires_at(self) -> datetime:
+        return self.created_at + timedelta(seconds=DOWNLOAD_TOKEN_TTL_SECONDS)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at.isoformat(),
+            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
+            "expires_at": self.expires_at.isoformat(),
+            "row_counts": self.row_counts,
+            "error": self.error,
+        }
+
+    def to_record(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "tenant_id": self.tenant_id,
+            "token_hash": self.token_hash,
+            "status": self.status,
+            "created_at": self.created_at.isoformat(),
+            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
+            "file_path": self.file_path,
+            "row_counts": self.row_counts,
+            "error": self.error,
+            "extra_metadata": self.extra_metadata,
+        }
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "ExportJob":
+        record = dict(record)
+        record["created_at"] = datetime.fromisoformat(record["created_at"])
+        if record.get("completed_at"):
+            record["completed_at"] = datetime.fromisoformat(record["completed_at"])
+        return cls(**record)
+
+
+def _hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class GDPRExportJobManager:
+    """
+    Runs ZIP exports off the request path and hands out download tokens.
+
+    Job state is a JSON file next to the ZIP (``<job_id>.json``, only the
+    token hash is stored), written atomically on every status change.
+    """
+
+    def __init__(self, export_dir: Optional[Path] = None, session_factory=None):
+        self.export_dir = Path(export_dir or settings.GDPR_EXPORT_DIR)
+        self._session_factory = session_factory
+        self._last_cleanup = 0.0
+
+    def _new_session(self) -> Session:
+        if self._session_factory is None:
+            from app.core.database import SessionLocal
+
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    def _job_file(self, job_id: str) -> Path:
+        return self.export_dir / f"{job_id}.json"
+
+    def _save(self, job: ExportJob) -> None:
+        self.export_dir.mkdir(parents=True, exist_ok=True)
+        target = self._job_file(job.id)
+        tmp = target.with_suffix(".tmp")
+        tmp.write_text(json.dumps(job.to_record(), default=_json_default), encoding="utf-8")
+        os.replace(tmp, target)
+
+    def _load(self, path: Path) -> Optional[ExportJob]:
+        try:
+            return ExportJob.from_record(json.loads(path.read_text(encoding="utf-8")))
+        except FileNotFoundError:
+            return None
+        except (ValueError, TypeError, KeyError) as e:
+            logger.warning(f"Unreadable GDPR export job {path.name}: {e}")
+            return None
+
+    def submit(
+        self,
+        user_id: str,
+        tenant_id: Optional[str],
+        extra_metadata: Optional[Dict[str, Any]] = None,
+    ) -> ExportJob:
+        token = secrets.token_urlsafe(32)
+        job = ExportJob(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            tenant_id=tenant_id,
+            token_hash=_hash_token(token),
+            token=token,
+            extra_metadata=extra_metadata or {},
+        )
+        self._save(job)
+        return job
+
+    def run(self, job_id: str) -> None:
+        """Execute a submitted job (called from BackgroundTasks or a thread)."""
+        job = self.get(job_id)
+        if job is None:
+            return
+        job.status = "running"
+        self._save(job)
+        target = self.export_dir / f"{job.id}.zip"
+        db = self._new_session()
+        try:
+            job.row_counts = write_zip(db, job.user_id, job.tenant_id, target, job.extra_metadata)
+            job.file_path = str(target)
+            job.status = "completed"
+            logger.info(f"GDPR export job {job.id} completed: {job.row_counts}")
+        except Exception as e:
+            logger.error(f"GDPR export job {job.id} failed: {e}", exc_info=True)
+            job.status = "failed"
+            job.error = str(e)
+            target.unlink(missing_ok=True)
+        finally:
+            job.completed_at = datetime.utcnow()
+            db.close()
+            self._save(job)
+
+    def get(self, job_id: str) -> Optional[ExportJob]:
+        """Job by id, None if unknown or expired."""
+        try:
+            job_id = str(uuid.UUID(job_id))
+        except ValueError:
+            return None
+        job = self._load(self._job_file(job_id))
+        if job is None or job.expires_at <= datetime.utcnow():
+            return None
+        return job
+
+    def resolve_download(self, job_id: str, token: str) -> Optional[ExportJob]:
+        """Return the completed job if ``token`` matches, else None."""
+        job = self.get(job_id)
+        if job is None or job.status != "completed":
+            return None
+        if not secrets.compare_digest(job.token_hash, _hash_token(token)):
+            return None
+        return job
+
+    def cleanup_due(self) -> bool:
+        return time.monotonic() - self._last_cleanup >= CLEANUP_INTERVAL_SECONDS
+
+    def cleanup_expired(self) -> int:
+        """Delete expired jobs and their export files. Returns removed files."""
+        self._last_cleanup = time.monotonic()
+        if not self.export_dir.exists():
+            return 0
+        now = datetime.utcnow()
+        live = set()
+        removed = 0
+        for path in self.export_dir.glob("*.json"):
+            job = self._load(path)
+            if job is not None and job.expires_at > now:
+                live.add(job.id)
+                continue
+            path.unlink(missing_ok=True)
+            removed += 1
+        cutoff = time.time() - DOWNLOAD_TOKEN_TTL_SECONDS
+        for path in self.export_dir.glob("*.zip"):
+            # Files without a live job; fresh files may belong to a job being written
+            if path.stem not in live and path.stat().st_mtime < cutoff:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+
+export_jobs = GDPRExportJobManager()
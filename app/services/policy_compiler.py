@@ -0,0 +1,245 @@
+"""
+Policy Compiler
+Übersetzt Policy-Regeln in einen Entscheidungs-Index nach (kpiId, severity)
+
+Zeitfenster werden beim Kompilieren in Wochentage und Minuten zerlegt,
+Parameter je Severity vorab aufgelöst und Approval-Regeln vorberechnet.
+Ein Index ist nach dem Bau unveränderlich und wird von allen Requests
+geteilt; Änderungen an den Regeln erzeugen einen neuen Index, der die
+Referenz des alten atomar ersetzt (PolicyIndexCache).
+
+Die Regeln werden nur über Attribute gelesen, damit sowohl
+``app.policy.models.Rule`` als auch ``app.services.policy_service.Rule``
+kompiliert werden können.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Mapping, Optional, Tuple
+
+DENY_NO_RULE = {"type": "deny", "reason": "No matching rule"}
+DENY_OUTSIDE_WINDOW = {"type": "deny", "reason": "Outside window"}
+
+# Nach dieser Zeit prüft der Cache per Fingerprint, ob andere Prozesse Regeln geändert haben
+INDEX_MAX_AGE = 30.0
+
+
+@dataclass(frozen=True)
+class CompiledWindow:
+    """Zeitfenster mit Wochentagen in ``datetime.weekday()``-Zählung (0=Mo) und Minuten"""
+    weekdays: frozenset
+    start: int
+    end: int
+
+    def contains(self, now: datetime) -> bool:
+        minute = now.hour * 60 + now.minute
+        return now.weekday() in self.weekdays and self.start <= minute <= self.end
+
+
+def _minutes(value: str) -> int:
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def compile_window(window: Any, either_day_convention: bool = False) -> Optional[CompiledWindow]:
+    """
+    Zerlegt ein Zeitfenster einmalig.
+
+    ``days`` zählt 0=So..6=Sa; mit ``either_day_convention`` gilt wie in
+    ``app.policy.engine`` zusätzlich 0=Mo..6=So.
+    """
+    if not window:
+        return None
+    if isinstance(window, Mapping):
+        days, start, end = window.get("days", []), window.get("start", "00:00"), window.get("end", "23:59")
+    else:
+        days, start, end = window.days, window.start, window.end
+    weekdays = frozenset(
+        day for day in range(7)
+        if (day + 1) % 7 in days or (either_day_convention and day in days)
+    )
+    return CompiledWindow(weekdays, _minutes(start), _minutes(end))
+
+
+def _param_resolver(params: Optional[Dict[str, Any]], severities: Iterable[str]):
+    """
+    Basis-Parameter je Severity plus die ``{delta}``-Vorlagen.
+
+    Entspricht ``PolicyEngine.resolve_params``: Severity-abhängige Werte
+    (``{"warn": .., "crit": ..}``) vor Delta-Platzhaltern vor festen Werten.
+    """
+    templates: List[Tuple[str, str]] = []
+    base: Dict[str, Mapping[str, Any]] = {}
+    for severity in severities:
+        resolved: Dict[str, Any] = {}
+        for key, value in (params or {}).items():
+            if isinstance(value, dict) and "warn" in value and "crit" in value:
+                resolved[key] = value.get(severity, value.get("warn"))
+            else:
+                resolved[key] = value
+        base[severity] = MappingProxyType(resolved)
+    for key, value in (params or {}).items():
+        if isinstance(value, str) and "{delta}" in value:
+            templates.append((key, value))
+    return MappingProxyType(base), tuple(templates)
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    """Vorkompilierte Regel; ``evaluate`` liefert die Felder einer Decision"""
+    rule_id: str
+    window: Optional[CompiledWindow]
+    params: Mapping[str, Mapping[str, Any]]
+    templates: Tuple[Tuple[str, str], ...]
+    needs_approval: frozenset
+    approver_roles: Optional[Tuple[str, ...]]
+    auto_execute: bool
+
+    def evaluate(
+        self,
+        user_roles: Iterable[str],
+        severity: str,
+        delta: Optional[float] = None,
+        now: Optional[datetime] = None,
+    ) -> Dict[str, Any]:
+        if self.window is not None and not self.window.contains(now or datetime.now()):
+            return dict(DENY_OUTSIDE_WINDOW)
+
+        params = dict(self.params.get(severity, ()))
+        if delta is not None:
+            for key, template in self.templates:
+                params[key] = template.replace("{delta}", str(delta))
+
+        needs_approval = severity in self.needs_approval
+        role_ok = not needs_approval or any(role in (self.approver_roles or ()) for role in user_roles)
+        return {
+            "type": "allow",
+            "execute": self.auto_execute and role_ok,
+            "needsApproval": needs_approval,
+            "approverRoles": list(self.approver_roles) if self.approver_roles else None,
+            "ruleId": self.rule_id,
+            "resolvedParams": params,
+        }
+
+
+def compile_rule(rule: Any, either_day_convention: bool = False) -> CompiledRule:
+    severities = tuple(rule.when.severity)
+    approval = rule.approval
+    needs_approval = frozenset(
+        severity for severity in severities
+        if approval and approval.required
+        and not (approval.bypassIfSeverity and severity == approval.bypassIfSeverity)
+    )
+    params, templates = _param_resolver(rule.params, severities)
+    return CompiledRule(
+        rule_id=rule.id,
+        window=compile_window(rule.window, either_day_convention),
+        params=params,
+        templates=templates,
+        needs_approval=needs_approval,
+        approver_roles=tuple(approval.roles) if approval and approval.roles else None,
+        auto_execute=bool(rule.autoExecute),
+    )
+
+
+class PolicyIndex:
+    """
+    Unveränderlicher Entscheidungs-Index über einen Regelsatz.
+
+    Je (kpiId, severity) gewinnt wie bei der linearen Suche die erste Regel
+    in Listenreihenfolge; eine Entscheidung ist ein Dict-Lookup.
+    """
+
+    def __init__(self, rules: Iterable[Any], either_day_convention: bool = False):
+        index: Dict[Tuple[str, str], CompiledRule] = {}
+        count = 0
+        for rule in rules:
+            count += 1
+            compiled = None
+            for severity in rule.when.severity:
+                key = (rule.when.kpiId, severity)
+                if key not in index:
+                    compiled = compiled or compile_rule(rule, either_day_convention)
+                    index[key] = compiled
+        self.rule_count = count
+        self._index: Mapping[Tuple[str, str], CompiledRule] = MappingProxyType(index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def lookup(self, kpi_id: str, severity: str) -> Optional[CompiledRule]:
+        return self._index.get((kpi_id, severity))
+
+    def decide(
+        self,
+        user_roles: Iterable[str],
+        kpi_id: str,
+        severity: str,
+        delta: Optional[float] = None,
+        now: Optional[datetime] = None,
+    ) -> Dict[str, Any]:
+        """Felder der Decision für einen Alert (``type`` allow oder deny)"""
+        rule = self._index.get((kpi_id, severity))
+        if rule is None:
+            return dict(DENY_NO_RULE)
+        return rule.evaluate(user_roles, severity, delta, now)
+
+
+class PolicyIndexCache:
+    """
+    Prozessweit geteilter PolicyIndex, neu gebaut bei Änderungen.
+
+    ``invalidate()`` markiert den Index nach Schreibzugriffen dieses Prozesses
+    als veraltet. Änderungen anderer Prozesse werden spätestens nach
+    ``max_age`` Sekunden über ``fingerprint`` (z.B. Anzahl und letzter
+    Änderungszeitpunkt der Regeln) erkannt. Der neue Index wird vollständig
+    gebaut, bevor er den alten ersetzt; Leser sehen immer einen konsistenten
+    Index.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[], Iterable[Any]],
+        fingerprint: Optional[Callable[[], Hashable]] = None,
+        either_day_convention: bool = False,
+        max_age: float = INDEX_MAX_AGE,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._load = load
+        self._fingerprint = fingerprint
+        self._either_day_convention = either_day_convention
+        self._max_age = max_age
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._index: Optional[PolicyIndex] = None
+        self._built_from: Hashable = None
+        self._checked_at = 0.0
+        self._stale = True
+
+    def get(self) -> PolicyIndex:
+        index = self._index
+        if index is not None and not self._stale and self._clock() - self._checked_at < self._max_age:
+            return index
+        with self._lock:
+            if self._index is not None and not self._stale and self._clock() - self._checked_at < self._max_age:
+                return self._index
+            # Vor dem Laden zurücksetzen: eine Invalidierung während des Baus erzwingt den nächsten
+            stale, self._stale = self._stale, False
+            try:
+                fingerprint = self._fingerprint() if self._fingerprint else None
+                if stale or self._index is None or fingerprint != self._built_from:
+                    self._index = PolicyIndex(self._load(), self._either_day_convention)
+                    self._built_from = fingerprint
+            except Exception:
+                self._stale = True
+                raise
+            self._checked_at = self._clock()
+            return self._index
+
+    def invalidate(self) -> None:
+        self._stale = True
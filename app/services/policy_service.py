@@ -6,15 +6,19 @@ Verwaltung von Policy-Regeln mit PostgreSQL-Persistenz
 from __future__ import annotations
 
 import json
+import threading
 from datetime import datetime
-from typing import Any, Callable, Dict, List, Optional, Literal
+from typing import Any, Callable, Dict, List, Optional, Literal, Tuple, Union
 
 from pydantic import BaseModel, Field
-from sqlalchemy import delete, select
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
 from app.core.database import SessionLocal
 from app.infrastructure.models import PolicyRule
+from app.services.policy_compiler import PolicyIndex, PolicyIndexCache, compile_rule
 
 # Types
 Severity = Literal["ok", "warn", "crit"]
@@ -75,9 +79,41 @@ class Decision(BaseModel):
     resolvedParams: Optional[Dict[str, Any]] = None
 
 
+_UPSERT_COLUMNS = (
+    "when_kpi_id", "when_severity", "action", "params", "limits",
+    "window", "approval", "auto_execute", "auto_suggest",
+)
+
+
+def _model_dict(value: Any) -> Optional[Dict[str, Any]]:
+    if value is None:
+        return None
+    return value if isinstance(value, dict) else value.model_dump()
+
+
+def _row(rule: Rule) -> Dict[str, Any]:
+    """Spaltenwerte einer Regel (liest nur Attribute, auch app.policy.models.Rule)"""
+    return {
+        "id": rule.id,
+        "when_kpi_id": rule.when.kpiId,
+        "when_severity": list(rule.when.severity),
+        "action": rule.action,
+        "params": rule.params,
+        "limits": rule.limits,
+        "window": _model_dict(rule.window),
+        "approval": _model_dict(rule.approval),
+        "auto_execute": bool(rule.autoExecute),
+        "auto_suggest": bool(rule.autoSuggest),
+    }
+
+
 class PolicyStore:
     """PostgreSQL-basierte Policy-Persistenz."""
 
+    # Kompilierte Indizes je (Session-Factory, Tageskonvention), prozessweit geteilt
+    _indexes: Dict[Tuple[Any, bool], PolicyIndexCache] = {}
+    _indexes_lock = threading.Lock()
+
     def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
         self._session_factory = session_factory
 
@@ -96,49 +132,45 @@ class PolicyStore:
             entity = session.get(PolicyRule, rule_id)
             return self._to_rule(entity) if entity else None
 
+    def index(self, either_day_convention: bool = False) -> PolicyIndex:
+        """
+        Geteilter, kompilierter Entscheidungs-Index über alle Policies.
+
+        Wird nach Änderungen über diesen Store sofort, nach Änderungen anderer
+        Prozesse spätestens nach ``INDEX_MAX_AGE`` Sekunden neu gebaut.
+        """
+        key = (self._session_factory, either_day_convention)
+        cache = self._indexes.get(key)
+        if cache is None:
+            with self._indexes_lock:
+                cache = self._indexes.setdefault(key, PolicyIndexCache(
+                    self.list, self._fingerprint, either_day_convention=either_day_convention
+                ))
+        return cache.get()
+
     # Mutation operations -----------------------------------------------
     def upsert(self, rule: Rule) -> None:
         """Erstellt oder aktualisiert eine Policy."""
-        with self._session_factory() as session:
-            entity = session.get(PolicyRule, rule.id)
-            if entity is None:
-                entity = PolicyRule(id=rule.id)
-
-            entity.when_kpi_id = rule.when.kpiId
-            entity.when_severity = rule.when.severity
-            entity.action = rule.action
-            entity.params = rule.params
-            entity.limits = rule.limits
-            entity.window = rule.window.dict() if rule.window else None
-            entity.approval = rule.approval.dict() if rule.approval else None
-            entity.auto_execute = bool(rule.autoExecute)
-            entity.auto_suggest = bool(rule.autoSuggest)
-
-            session.add(entity)
-            session.commit()
+        self.bulk_upsert([rule])
 
     def bulk_upsert(self, rules: List[Rule]) -> None:
-        """Upsert für mehrere Policies."""
+        """Upsert für mehrere Policies in einem INSERT ... ON CONFLICT DO UPDATE."""
+        # Letzte Version je id gewinnt, ON CONFLICT darf eine Zeile nur einmal treffen
+        rows = list({rule.id: _row(rule) for rule in rules}.values())
+        if not rows:
+            return
         with self._session_factory() as session:
-            for rule in rules:
-                entity = session.get(PolicyRule, rule.id) or PolicyRule(id=rule.id)
-                entity.when_kpi_id = rule.when.kpiId
-                entity.when_severity = rule.when.severity
-                entity.action = rule.action
-                entity.params = rule.params
-                entity.limits = rule.limits
-                entity.window = rule.window.dict() if rule.window else None
-                entity.approval = rule.approval.dict() if rule.approval else None
-                entity.auto_execute = bool(rule.autoExecute)
-                entity.auto_suggest = bool(rule.autoSuggest)
-                session.add(entity)
+            # executemany: psycopg2 bündelt zu mehrzeiligen VALUES (insertmanyvalues), SQLite nutzt ein Prepared Statement
+            session.execute(self._upsert_statement(session), rows)
             session.commit()
+        self._invalidate()
 
     def delete(self, rule_id: str) -> None:
         """Löscht eine Policy."""
         with self._session_factory() as session:
             session.execute(delete(PolicyRule).where(PolicyRule.id == rule_id))
             session.commit()
+        self._invalidate()
 
     # Import / Export ---------------------------------------------------
     def export_json(self) -> str:
@@ -154,24 +186,48 @@ class PolicyStore:
         with self._session_factory() as session:
             session.execute(delete(PolicyRule))
             session.commit()
+        self._invalidate()
 
         if rules:
             self.bulk_upsert(rules)
 
     # Utilities ---------------------------------------------------------
+    def _invalidate(self) -> None:
+        for (factory, _), cache in list(self._indexes.items()):
+            if factory is self._session_factory:
+                cache.invalidate()
+
+    def _fingerprint(self) -> Tuple[int, Any]:
+        """Anzahl und letzte Änderung der Regeln; ändert sich mit jedem Schreibzugriff."""
+        with self._session_factory() as session:
+            count, changed = session.execute(
+                select(func.count(), func.max(func.coalesce(PolicyRule.updated_at, PolicyRule.created_at)))
+            ).one()
+            return count, changed
+
+    @staticmethod
+    def _upsert_statement(session: Session):
+        insert = pg_insert if session.get_bind().dialect.name == "postgresql" else sqlite_insert
+        stmt = insert(PolicyRule.__table__)
+        updates = {column: stmt.excluded[column] for column in _UPSERT_COLUMNS}
+        updates["updated_at"] = func.now()
+        return stmt.on_conflict_do_update(index_elements=[PolicyRule.id], set_=updates)
+
     @staticmethod
     def _to_rule(entity: PolicyRule | None) -> Rule | None:
+        """Gespeicherte Regeln wurden beim Schreiben validiert und werden ohne erneute Validierung geladen."""
         if entity is None:
             return None
 
-        return Rule(
+        return Rule.model_construct(
             id=entity.id,
-            when={"kpiId": entity.when_kpi_id, "severity": entity.when_severity or []},
+            when=When.model_construct(kpiId=entity.when_kpi_id, severity=entity.when_severity or []),
             action=entity.action,
             params=entity.params,
             limits=entity.limits,
-            window=Window(**entity.window) if entity.window else None,
-            approval=Approval(**entity.approval) if entity.approval else None,
+            window=Window.model_construct(**entity.window) if entity.window else None,
+            approval=Approval.model_construct(**{"roles": None, "bypassIfSeverity": None, **entity.approval})
+            if entity.approval else None,
             autoExecute=entity.auto_execute,
             autoSuggest=entity.auto_suggest,
         )
@@ -219,35 +275,21 @@ class PolicyEngine:
         return resolved
 
     @staticmethod
-    def decide(user_roles: List[str], alert: Alert, rules: List[Rule]) -> Decision:
-        """Policy-Entscheidung treffen"""
-        rule = next(
-            (r for r in rules if r.when.kpiId == alert.kpiId and alert.severity in r.when.severity),
-            None
-        )
-
-        if not rule:
-            return Decision(type="deny", reason="No matching rule")
-
-        if not PolicyEngine.within_window(rule.window):
-            return Decision(type="deny", reason="Outside window")
-
-        params = PolicyEngine.resolve_params(rule, alert.severity, alert)
-
-        needs_approval = False
-        if rule.approval and rule.approval.required:
-            if not (rule.approval.bypassIfSeverity and alert.severity == rule.approval.bypassIfSeverity):
-                needs_approval = True
-
-        approver_roles = rule.approval.roles if rule.approval else None
-        role_ok = not needs_approval or any(r in (approver_roles or []) for r in user_roles)
-        execute = rule.autoExecute and (not needs_approval or role_ok)
-
-        return Decision(
-            type="allow",
-            execute=execute,
-            needsApproval=needs_approval,
-            approverRoles=approver_roles,
-            ruleId=rule.id,
-            resolvedParams=params
-        )
+    def decide(user_roles: List[str], alert: Alert, rules: Union[List[Rule], PolicyIndex]) -> Decision:
+        """
+        Policy-Entscheidung treffen
+
+        ``rules`` ist bevorzugt der kompilierte Index (``PolicyStore.index()``);
+        für eine Liste wird die erste passende Regel gesucht und kompiliert.
+        """
+        if isinstance(rules, PolicyIndex):
+            fields = rules.decide(user_roles, alert.kpiId, alert.severity, alert.delta)
+        else:
+            rule = next(
+                (r for r in rules if r.when.kpiId == alert.kpiId and alert.severity in r.when.severity),
+                None
+            )
+            if not rule:
+                return Decision(type="deny", reason="No matching rule")
+            fields = compile_rule(rule).evaluate(user_roles, alert.severity, alert.delta)
+        return Decision.model_construct(**fields)
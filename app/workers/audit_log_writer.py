@@ -0,0 +1,428 @@
+"""
+Audit Log Writer Background Worker
+Buffers audit events in-process and writes them in multi-row batches
+"""
+
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import Table, insert, text
+from sqlalchemy.exc import DataError, IntegrityError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPOOL_DIR = Path("data/audit_spool")
+
+_SPOOL_NAME = re.compile(r"audit-(\d+)\.ndjson")
+
+# Errors for which the database rejected one row; anything else (connection
+# lost, timeouts) is not the row's fault
+ROW_ERRORS = (IntegrityError, DataError)
+
+# Spool locks held by this process (flock conflicts between two descriptors
+# of the same process, so writers sharing a spool directory share the lock)
+_held_spool_locks: Dict[Path, Any] = {}
+_held_spool_locks_guard = threading.Lock()
+
+# How often monthly partitions for the coming months are (re)ensured
+PARTITION_CHECK_INTERVAL_SECONDS = 6 * 3600
+
+
+class AuditLogWriter:
+    """
+    Batched audit-log ingestion.
+
+    - ``enqueue`` is O(1) and never touches the database
+    - a flush happens when ``max_batch_size`` rows are buffered or the oldest
+      buffered row is ``max_latency`` seconds old
+    - each flush is one multi-row INSERT in one transaction
+    - rows of a failed flush are appended to an NDJSON spool file and
+      replayed before the next successful flush, so nothing is lost when the
+      database is briefly unavailable
+    - if the database is reachable but rejects the batch, the rows are
+      inserted one by one; rows rejected with an integrity or data error go
+      to a dead-letter file (``dead_letter_file``) instead of blocking every
+      later flush. Any other error stops the pass and the rest of the batch
+      is spooled as above
+    - the spool file is named after the process; while a process may have
+      one it holds ``audit-<pid>.lock``. ``start`` takes over the spool files
+      of processes that are gone (their lock is free) and replays them
+    - flushes run on the background task (in a worker thread); without a
+      running task ``enqueue`` writes on the caller's thread, async callers
+      use ``submit``
+    """
+
+    def __init__(
+        self,
+        table: Optional[Table] = None,
+        session_factory: Optional[Callable] = None,
+        max_batch_size: int = 500,
+        max_latency: float = 0.5,
+        spool_dir: Path = DEFAULT_SPOOL_DIR,
+    ):
+        self._table = table
+        self._session_factory = session_factory
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.spool_dir = Path(spool_dir)
+        self._buffer: List[Dict[str, Any]] = []
+        self._oldest: Optional[float] = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.running = False
+        self._last_partition_check = 0.0
+        self.written = 0
+        self.spooled = 0
+        self.dead_lettered = 0
+        self.flushes = 0
+
+    @property
+    def table(self) -> Table:
+        if self._table is None:
+            from app.infrastructure.models import AuditLog
+
+            self._table = AuditLog.__table__
+        return self._table
+
+    def _new_session(self):
+        if self._session_factory is None:
+            from app.core.database import SessionLocal
+
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    @property
+    def spool_file(self) -> Path:
+        return self.spool_dir / f"audit-{os.getpid()}.ndjson"
+
+    @property
+    def dead_letter_file(self) -> Path:
+        return self.spool_dir / f"audit-{os.getpid()}.rejected.ndjson"
+
+    def _lock_file(self, pid: int) -> Path:
+        return self.spool_dir / f"audit-{pid}.lock"
+
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    # ------------------------------------------------------------------
+    # Write path
+    # ------------------------------------------------------------------
+
+    def enqueue(self, row: Dict[str, Any]) -> None:
+        """Buffer one audit row (dict of AuditLog column values)."""
+        with self._lock:
+            if not self._buffer:
+                self._oldest = time.monotonic()
+            self._buffer.append(row)
+            size = len(self._buffer)
+
+        if not self.running:
+            # No background task (scripts, tests): write on the caller's thread
+            self.flush()
+        elif size >= self.max_batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    async def submit(self, row: Dict[str, Any]) -> None:
+        """``enqueue`` for async callers; never writes on the event loop."""
+        if self.running:
+            self.enqueue(row)
+        else:
+            await asyncio.to_thread(self.enqueue, row)
+
+    def _take(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+            self._oldest = None
+        return rows
+
+    def flush(self) -> int:
+        """Write all buffered rows (plus any spooled rows). Returns rows written."""
+        with self._flush_lock:
+            rows = self._take()
+            spooled = self._read_spool()
+            batch = spooled + rows
+            if not batch:
+                return 0
+
+            try:
+                self._insert_batch(batch)
+                written, rejected, remaining = len(batch), [], []
+            except Exception as e:
+                logger.error(f"Audit log flush of {len(batch)} rows failed: {e}")
+                if self._database_available():
+                    written, rejected, remaining = self._insert_rows(batch)
+                else:
+                    written, rejected, remaining = 0, [], batch
+
+            if rejected:
+                self._dead_letter(rejected)
+            if len(remaining) == len(batch):
+                logger.error(f"Spooling {len(rows)} audit rows")
+                # Spooled rows are still in the spool file, only new rows are appended
+                self._spool(rows)
+                return 0
+            if remaining:
+                # ``remaining`` is the tail of spooled + rows
+                logger.error(f"Spooling {len(remaining)} audit rows after a partial flush")
+                self._replace_spool(remaining, new=min(len(rows), len(remaining)))
+            elif spooled:
+                self.spool_file.unlink(missing_ok=True)
+                logger.info(f"Replayed {len(spooled)} spooled audit rows")
+            self.written += written
+            self.flushes += 1
+            return written
+
+    def _insert_batch(self, batch: List[Dict[str, Any]]) -> None:
+        db = self._new_session()
+        try:
+            table = self.table
+            for start in range(0, len(batch), self.max_batch_size):
+                db.execute(insert(table), batch[start:start + self.max_batch_size])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _insert_rows(self, batch: List[Dict[str, Any]]):
+        """
+        Insert row by row after a failed batch.
+
+        Returns (written, rejected rows with error, rows not attempted). The
+        pass stops at the first error that is not a ``ROW_ERRORS`` rejection;
+        that row and all after it are returned as not attempted.
+        """
+        written = 0
+        rejected = []
+        db = self._new_session()
+        try:
+            for i, row in enumerate(batch):
+                try:
+                    db.execute(insert(self.table), [row])
+                    db.commit()
+                    written += 1
+                except ROW_ERRORS as e:
+                    db.rollback()
+                    rejected.append((row, f"{type(e).__name__}: {e}"))
+                except Exception as e:
+                    db.rollback()
+                    logger.error(f"Audit row insert failed, stopping after {written} rows: {e}")
+                    return written, rejected, batch[i:]
+        finally:
+            db.close()
+        return written, rejected, []
+
+    def _database_available(self) -> bool:
+        try:
+            db = self._new_session()
+        except Exception:
+            return False
+        try:
+            db.execute(text("SELECT 1"))
+            return True
+        except Exception:
+            return False
+        finally:
+            db.close()
+
+    # ------------------------------------------------------------------
+    # Durable spool
+    # ------------------------------------------------------------------
+
+    def _claim_spool(self) -> None:
+        """Hold this process's spool lock until exit, so no other writer adopts the spool file."""
+        path = self._lock_file(os.getpid()).resolve()
+        with _held_spool_locks_guard:
+            if path not in _held_spool_locks:
+                self.spool_dir.mkdir(parents=True, exist_ok=True)
+                fh = open(path, "a")
+                fcntl.flock(fh, fcntl.LOCK_EX)
+                _held_spool_locks[path] = fh
+
+    def _spool(self, rows: List[Dict[str, Any]]) -> None:
+        if not rows:
+            return
+        self._claim_spool()
+        with open(self.spool_file, "a", encoding="utf-8") as fh:
+            for row in rows:
+                fh.write(json.dumps(row, default=_json_default) + "\n")
+            fh.flush()
+            os.fsync(fh.fileno())
+        self.spooled += len(rows)
+
+    def _replace_spool(self, rows: List[Dict[str, Any]], new: int) -> None:
+        self._claim_spool()
+        tmp = self.spool_file.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            for row in rows:
+                fh.write(json.dumps(row, default=_json_default) + "\n")
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, self.spool_file)
+        self.spooled += new
+
+    def adopt_orphaned_spools(self) -> int:
+        """
+        Move the spool files of writers that are gone into this one's spool.
+
+        A spool file belongs to a live process as long as that process holds
+        its ``audit-<pid>.lock``. Returns the number of rows taken over.
+        """
+        if not self.spool_dir.exists():
+            return 0
+        adopted = 0
+        with self._flush_lock:
+            for path in sorted(self.spool_dir.glob("audit-*.ndjson")):
+                match = _SPOOL_NAME.fullmatch(path.name)
+                if not match or path == self.spool_file:
+                    continue
+                # Lock files are never removed: a new process reusing the PID
+                # could otherwise lock a different file than the adopter
+                with open(self._lock_file(int(match.group(1))), "a") as lock:
+                    try:
+                        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        continue
+                    rows = self._read_spool(path)
+                    self._spool(rows)
+                    path.unlink()
+                adopted += len(rows)
+        if adopted:
+            logger.info(f"Took over {adopted} audit rows spooled by stopped writers")
+        return adopted
+
+    def _dead_letter(self, rejected) -> None:
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.dead_letter_file, "a", encoding="utf-8") as fh:
+            for row, error in rejected:
+                fh.write(json.dumps({**row, "error": error}, default=_json_default) + "\n")
+            fh.flush()
+            os.fsync(fh.fileno())
+        self.dead_lettered += len(rejected)
+        logger.error(f"Moved {len(rejected)} audit rows rejected by the database to {self.dead_letter_file}")
+
+    def _read_spool(self, path: Optional[Path] = None) -> List[Dict[str, Any]]:
+        path = path or self.spool_file
+        if not path.exists():
+            return []
+        rows = []
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    row = json.loads(line)
+                    if isinstance(row.get("timestamp"), str):
+                        row["timestamp"] = datetime.fromisoformat(row["timestamp"])
+                    rows.append(row)
+        return rows
+
+    def ensure_partitions(self) -> None:
+        """Create monthly audit_logs partitions ahead of time (PostgreSQL only)."""
+        from app.infrastructure.models.audit_partitions import AUDIT_LOG_PARTITION_MONTHS_AHEAD
+
+        self._last_partition_check = time.monotonic()
+        db = self._new_session()
+        try:
+            if db.get_bind().dialect.name != "postgresql":
+                return
+            db.execute(
+                text("SELECT domain_shared.ensure_audit_log_partitions(now()::date, :ahead)"),
+                {"ahead": AUDIT_LOG_PARTITION_MONTHS_AHEAD}
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Could not ensure audit log partitions: {e}")
+        finally:
+            db.close()
+
+    # ------------------------------------------------------------------
+    # Background loop
+    # ------------------------------------------------------------------
+
+    async def start(self) -> None:
+        """Start the flush loop on the running event loop."""
+        if self.running:
+            return
+        self.running = True
+        self._wakeup = asyncio.Event()
+        try:
+            await asyncio.to_thread(self.adopt_orphaned_spools)
+        except OSError as e:
+            logger.error(f"Could not take over orphaned audit spool files: {e}")
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"Audit log writer started (batch={self.max_batch_size}, "
+            f"max_latency={self.max_latency}s)"
+        )
+
+    async def stop(self) -> None:
+        """Stop the loop and flush what is left."""
+        self.running = False
+        if self._wakeup is not None:
+            self._wakeup.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        await asyncio.to_thread(self.flush)
+        logger.info("Audit log writer stopped")
+
+    async def _run(self) -> None:
+        while self.running:
+            timeout = self.max_latency
+            if self._oldest is not None:
+                timeout = max(0.0, self.max_latency - (time.monotonic() - self._oldest))
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            if time.monotonic() - self._last_partition_check > PARTITION_CHECK_INTERVAL_SECONDS:
+                await asyncio.to_thread(self.ensure_partitions)
+
+            if self._buffer or self.spool_file.exists():
+                try:
+                    await asyncio.to_thread(self.flush)
+                except Exception as e:
+                    logger.error(f"Audit log writer error: {e}", exc_info=True)
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+# Global writer instance
+_audit_writer: Optional[AuditLogWriter] = None
+
+
+def get_audit_writer() -> AuditLogWriter:
+    """Get the global audit log writer instance."""
+    global _audit_writer
+    if _audit_writer is None:
+        _audit_writer = AuditLogWriter()
+    return _audit_writer
+
+
+async def start_audit_writer() -> None:
+    """Start the global audit log writer."""
+    await get_audit_writer().start()
+
+
+async def stop_audit_writer() -> None:
+    """Flush and stop the global audit log writer."""
+    await get_audit_writer().stop()
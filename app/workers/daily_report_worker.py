@@ -9,7 +9,7 @@ from datetime import datetime, time
 from typing import Dict, Any
 
 from ..core.config import settings
-from ..core.database import get_db
+from ..core.database import get_db, SessionLocal
 from ..domains.crm.services.daily_report_service import DailyReportService
 
 logger = logging.getLogger(__name__)
@@ -25,7 +25,7 @@ class DailyReportWorker:
     async def initialize(self):
         """Initialize database connection"""
         self.db = next(get_db())
-        self.service = DailyReportService(self.db)
+        self.service = DailyReportService(self.db, session_factory=SessionLocal)
 
     async def generate_daily_reports(self) -> Dict[str, Any]:
         """
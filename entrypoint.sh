@@ -48,6 +48,7 @@ echo "📦 Führe Alembic Migrations aus..."
 if [ -f "alembic.ini" ]; then
   alembic upgrade head || echo "⚠️ Alembic failed, continuing..."
 fi
+python -m app.core.startup migrate
 
 echo "🚀 Starte Backend..."
 exec uvicorn main:app --host 0.0.0.0 --port 8000 --reload
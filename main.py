@@ -4,6 +4,12 @@ VALEO-NeuroERP FastAPI Application
 Main entry point for the ERP system API
 """
 
+import time
+
+# Startzeitpunkt für das Import-Profil beim Boot
+BOOT_STARTED = time.perf_counter()
+
+import asyncio
 import uvicorn
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
@@ -11,57 +17,18 @@ from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.responses import JSONResponse
 from prometheus_client import make_asgi_app
 import logging
-import time
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 
 from app.core.config import settings
-from app.core.database import create_tables
-from app.api.v1.api import api_router
-from app.api.v1.endpoints import policies as policies_v1
+from app.core.database import create_tables, dispose_async_engines
 from app.core.logging import setup_logging
 from app.core.security import require_bearer_token
 from app.core.container_config import configure_container  # Import container configuration
+from app.core.startup import log_boot_profile, register_routers
 
 # Logger muss vor der Verwendung definiert werden
 logger = logging.getLogger(__name__)
 
-from app.policy.router import router as policy_router  # Policy Manager
-from app.auth.router import router as auth_router  # Authentication
-from app.documents.router import router as documents_router  # Documents & Flows
-from app.forms.router import router as forms_router  # Form Specs
-from app.lookup.router import router as lookup_router  # Lookup/Autocomplete
-from app.routers.print_router import router as print_router  # Print & Archive
-from app.routers.export_router import router as export_router  # Export CSV/XLSX
-from app.routers.workflow_router import router as workflow_router  # Workflow & Approval
-from app.routers.sse_router import router as sse_router  # SSE Streams
-from app.routers.verify_router import router as verify_router  # Document Verification
-from app.routers.gdpr_router import router as gdpr_router  # GDPR Compliance
-from app.routers.numbering_router import router as numbering_router  # Numbering Service
-from app.routers.admin_dms_router import router as admin_dms_router  # Admin DMS Integration
-from app.routers.dms_webhook_router import router as dms_webhook_router  # DMS Webhooks & Inbox
-from app.routers.fibu_router import router as fibu_router  # Finanzbuchhaltung (130 Masken)
-
-# Import domain-specific routers with error handling
-try:
-    from app.crm.router import router as crm_router  # CRM
-except ImportError:
-    crm_router = None
-    logger.warning("CRM router not available")
-
-try:
-    from app.finance.router import router as finance_router  # Finance (DATEV, SEPA)
-except ImportError:
-    finance_router = None
-    logger.warning("Finance router not available")
-
-try:
-    from app.einkauf.router import router as einkauf_router  # Einkauf/Beschaffung
-except ImportError:
-    einkauf_router = None
-    logger.warning("Einkauf router not available")
-
-from prometheus_client import make_asgi_app
-
 # Setup logging
 setup_logging()
 
@@ -79,18 +46,34 @@ async def lifespan(app: FastAPI):
         logger.error(f"Failed to configure dependency container: {e}")
         raise
 
-    # Create database tables
-    try:
-        create_tables()
-        logger.info("Database tables initialized successfully")
-    except Exception as e:
-        logger.error(f"Failed to initialize database: {e}")
-        raise
+    # Create database tables (Standard: eigener Schritt `python -m app.core.startup migrate`)
+    if settings.STARTUP_CREATE_TABLES:
+        try:
+            create_tables()
+            logger.info("Database tables initialized successfully")
+        except Exception as e:
+            logger.error(f"Failed to initialize database: {e}")
+            raise
+
+    # Batched audit log ingestion
+    from app.workers.audit_log_writer import start_audit_writer, stop_audit_writer
+    await start_audit_writer()
+
+    log_boot_profile(router_loader, BOOT_STARTED)
+    preload = None
+    if settings.STARTUP_PRELOAD_ROUTERS and router_loader.pending:
+        preload = asyncio.create_task(router_loader.preload())
 
     yield
 
     # Shutdown
     logger.info("Shutting down VALEO-NeuroERP API server...")
+    if preload is not None:
+        preload.cancel()
+        with suppress(asyncio.CancelledError, Exception):
+            await preload
+    await stop_audit_writer()
+    await dispose_async_engines()
 
 # Create FastAPI application
 app = FastAPI(
@@ -136,6 +119,11 @@ app.add_middleware(PrometheusMiddleware)
 from app.middleware.correlation import CorrelationMiddleware
 app.add_middleware(CorrelationMiddleware)
 
+# Admission control (innerhalb der Authentifizierung: Tenant aus den Token-Claims)
+if settings.ADMISSION_ENABLED:
+    from app.middleware.admission import AdmissionMiddleware
+    app.add_middleware(AdmissionMiddleware)
+
 # Authentication middleware
 @app.middleware("http")
 async def enforce_bearer_token(request: Request, call_next):
@@ -248,36 +236,6 @@ async def root():
         "api_v1": settings.API_V1_STR
     }
 
-# Include API routers
-app.include_router(api_router, prefix=settings.API_V1_STR)
-app.include_router(policies_v1.router, prefix='/api/mcp')
-
-# Include Domain routers (Phase 1 - Service-Kernel)
-# CRM
-if crm_router:
-    app.include_router(crm_router, prefix="/api/v1", tags=["CRM"])
-
-# Finance (DATEV, SEPA)
-if finance_router:
-    app.include_router(finance_router, tags=["Finance"])
-
-# Einkauf/Beschaffung
-if einkauf_router:
-    app.include_router(einkauf_router, tags=["Einkauf"])
-
-# Legacy domain routers
-try:
-    from app.domains.inventory.api import router as inventory_router
-    app.include_router(inventory_router, prefix="/api/v1/inventory", tags=["Inventory"])
-except ImportError:
-    logger.warning("Inventory router not available")
-
-try:
-    from app.domains.agrar.api import router as agrar_router
-    app.include_router(agrar_router, prefix="/api/v1/agrar", tags=["Agrar"])
-except ImportError:
-    logger.warning("Agrar router not available")
-
 # Lightweight stubs for missing MCP/stream endpoints to avoid frontend 404s during development
 @app.post("/api/mcp/analytics/kpis")
 async def mcp_kpis_stub():
@@ -302,74 +260,8 @@ async def stream_workflow_stub():
 metrics_app = make_asgi_app()
 app.mount("/metrics", metrics_app)
 
-# Include Agents API (Phase 3 - Agentik) - TEMPORARILY DISABLED for CRM testing
-# from app.api.v1.endpoints.agents import router as agents_router
-# app.include_router(agents_router, prefix="/api/v1/agents", tags=["Agents"])
-
-# Include Health & System Metrics API (Phase 4 - Observability for AI)
-from app.api.v1.endpoints.health import router as health_router
-from app.api.v1.endpoints.system_metrics import router as system_metrics_router
-app.include_router(health_router, tags=["Health"])
-app.include_router(system_metrics_router, prefix="/api/v1/metrics", tags=["System Metrics"])
-
-# Include Audit API (Compliance)
-from app.api.v1.endpoints.audit import router as audit_router
-app.include_router(audit_router, prefix="/api/v1/audit", tags=["Audit"])
-
-# Include GDPR API (Compliance)
-from app.api.v1.endpoints.gdpr import router as gdpr_router
-app.include_router(gdpr_router, prefix="/api/v1/gdpr", tags=["GDPR"])
-
-# Include RAG API (Phase 3 - Semantic Search) - TEMPORARILY DISABLED for CRM testing
-# from app.api.v1.endpoints.rag import router as rag_router
-# app.include_router(rag_router, prefix="/api/v1/rag", tags=["RAG"])
-
-# Include WebSocket API (Phase 3 - Realtime)
-from app.api.v1.endpoints.websocket import router as websocket_router
-app.include_router(websocket_router, prefix="/api/v1", tags=["WebSocket"])
-
-# Include Authentication Router (⚠️ NUR FÜR ENTWICKLUNG!)
-app.include_router(auth_router)
-
-# Include Policy Manager (direkt, ohne prefix - hat eigenen prefix)
-app.include_router(policy_router)
-
-# Include Documents & Forms (Phase O - Belegfluss)
-app.include_router(documents_router)
-app.include_router(forms_router)
-app.include_router(lookup_router)
-
-# Include Print & Export (Phase P - Dokumenten-Druck)
-app.include_router(print_router)
-app.include_router(export_router)
-
-# Include Workflow & Approval (Phase Q - Workflow-Management)
-app.include_router(workflow_router)
-
-# Include SSE Streams (Phase P - Realtime Events)
-app.include_router(sse_router)
-
-# Include Document Verification (Phase Q - Document Integrity)
-app.include_router(verify_router)
-
-# Include GDPR Compliance
-app.include_router(gdpr_router)
-
-# Include Numbering Service (PostgreSQL)
-app.include_router(numbering_router)
-
-# Include Admin DMS Integration
-app.include_router(admin_dms_router)
-
-# Include DMS Webhooks & Inbox
-app.include_router(dms_webhook_router)
-
-# Include Finanzbuchhaltung (130 Masken Integration)
-app.include_router(fibu_router)
-
-# Mount Prometheus metrics endpoint
-metrics_app = make_asgi_app()
-app.mount("/metrics", metrics_app)
+# Include API routers (Manifest in app.core.startup, Fachmodule lazy beim ersten Request)
+router_loader = register_routers(app)
 
 if __name__ == "__main__":
     uvicorn.run(
@@ -0,0 +1,31 @@
+-- VALEO NeuroERP 3.0 - Finance Domain UStVA Tax Buckets
+-- Per-period, per-tax-code aggregates of posted journal lines
+-- Migration: 004_vat_tax_buckets.sql
+
+-- ===== VAT TAX BUCKETS =====
+
+CREATE TABLE IF NOT EXISTS domain_erp.vat_tax_buckets (
+    tenant_id VARCHAR(255) NOT NULL,
+    period VARCHAR(7) NOT NULL,              -- YYYY-MM
+    tax_code VARCHAR(20) NOT NULL,
+    side VARCHAR(10) NOT NULL,               -- sales, purchase, other (account class)
+    doc_class VARCHAR(10) NOT NULL,          -- AR, AP, other (document type)
+    gross_amount DECIMAL(20,4) NOT NULL DEFAULT 0,
+    debit_total DECIMAL(20,4) NOT NULL DEFAULT 0,
+    credit_total DECIMAL(20,4) NOT NULL DEFAULT 0,
+    line_count BIGINT NOT NULL DEFAULT 0,
+    refreshed_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+
+    PRIMARY KEY (tenant_id, period, tax_code, side, doc_class)
+);
+
+-- Drives the bucket GROUP BY: posted entries of one tenant and period
+CREATE INDEX IF NOT EXISTS idx_journal_entries_tenant_period_status
+    ON domain_erp.journal_entries(tenant_id, period, status);
+
+CREATE INDEX IF NOT EXISTS idx_journal_lines_entry_tax_code
+    ON domain_erp.journal_entry_lines(journal_entry_id)
+    INCLUDE (tax_code, account_id, debit_amount, credit_amount)
+    WHERE tax_code IS NOT NULL;
+
+COMMENT ON TABLE domain_erp.vat_tax_buckets IS 'UStVA aggregates per month; quarterly/yearly returns sum the monthly rows';
@@ -0,0 +1,19 @@
+-- VALEO NeuroERP 3.0 - Finance Domain Bank Reconciliation Indexes
+-- Support the set-based difference query and bulk auto-booking
+-- Migration: 005_bank_reconciliation_indexes.sql
+
+-- Statement lines of one statement, filtered by status
+CREATE INDEX IF NOT EXISTS idx_bank_statement_lines_statement_status
+    ON domain_erp.bank_statement_lines(tenant_id, statement_id, status);
+
+-- Anti-join: bookings referencing a statement line
+CREATE INDEX IF NOT EXISTS idx_journal_entries_tenant_reference
+    ON domain_erp.journal_entries(tenant_id, reference)
+    WHERE reference IS NOT NULL;
+
+-- Bank-account lines in the statement window
+CREATE INDEX IF NOT EXISTS idx_journal_lines_account_entry
+    ON domain_erp.journal_entry_lines(account_id, journal_entry_id);
+
+CREATE INDEX IF NOT EXISTS idx_chart_of_accounts_tenant_number
+    ON domain_erp.chart_of_accounts(tenant_id, account_number);
@@ -5,13 +5,25 @@ from .audit_trail import (
     GoBDAuditTrail,
     HashVerificationError,
     compute_entry_hash,
+    entry_record,
+)
+from .verification import (
+    ChainCheckpoint,
+    ChainVerifier,
+    VerificationReport,
+    entry_hash,
+    merkle_root,
 )
 
 __all__ = [
     "AuditTrailEntry",
+    "ChainCheckpoint",
+    "ChainVerifier",
     "GoBDAuditTrail",
     "HashVerificationError",
+    "VerificationReport",
     "compute_entry_hash",
+    "entry_hash",
+    "entry_record",
+    "merkle_root",
 ]
-
-
@@ -3,7 +3,6 @@
 from __future__ import annotations
 
 import hashlib
-import json
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from typing import Iterable, List, Sequence
@@ -11,13 +10,23 @@ from uuid import UUID, uuid4
 
 from pydantic import BaseModel, Field
 
+from .verification import (
+    CHECKPOINT_INTERVAL,
+    ChainCheckpoint,
+    ChainVerifier,
+    Record,
+    VerificationReport,
+    canonical_json,
+    verify_segment,
+)
+
 
 def compute_entry_hash(entry_payload: dict, previous_hash: str | None = None) -> str:
     """Bildet einen Hash über Payload + Vorgänger-Hash."""
     hasher = hashlib.sha256()
     if previous_hash:
         hasher.update(previous_hash.encode("utf-8"))
-    hasher.update(json.dumps(entry_payload, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+    hasher.update(canonical_json(entry_payload).encode("utf-8"))
     return hasher.hexdigest()
 
 
@@ -40,12 +49,28 @@ class HashVerificationError(RuntimeError):
     """Wird geworfen, wenn eine Hash-Kette beschädigt ist."""
 
 
+def entry_record(entry: AuditTrailEntry) -> Record:
+    """Picklebare Form eines Eintrags für die (parallele) Verifikation."""
+    return (entry.tenant_id, entry.entity_type, entry.entity_id, entry.action, entry.payload, entry.user_id, entry.hash)
+
+
 @dataclass
 class GoBDAuditTrail:
-    """Minimale Hash-Chain-Verwaltung für Services ohne eigene Persistenz."""
+    """Minimale Hash-Chain-Verwaltung für Services ohne eigene Persistenz.
+
+    Mit ``checkpoint_key`` verifiziert ``verify_incremental`` nur die Einträge
+    nach dem letzten signierten Checkpoint und legt neue Checkpoints an.
+    """
 
     tenant_id: str
     _entries: List[AuditTrailEntry] = field(default_factory=list)
+    checkpoint_key: bytes | None = None
+    checkpoint_interval: int = CHECKPOINT_INTERVAL
+    _checkpoints: List[ChainCheckpoint] = field(default_factory=list)
+    _records: List[Record] = field(default_factory=list, repr=False)
+
+    def __post_init__(self) -> None:
+        self._records = [entry_record(entry) for entry in self._entries]
 
     def create_entry(
         self,
@@ -65,7 +90,6 @@ class GoBDAuditTrail:
             "payload": payload,
             "user_id": user_id,
         }
-        entry_hash = compute_entry_hash(entry_payload, previous_hash)
         return AuditTrailEntry(
             tenant_id=self.tenant_id,
             entity_type=entity_type,
@@ -74,34 +98,34 @@ class GoBDAuditTrail:
             payload=payload,
             user_id=user_id,
             previous_hash=previous_hash,
-            hash=entry_hash,
+            hash=compute_entry_hash(entry_payload, previous_hash),
         )
 
     def append_entry(self, entry: AuditTrailEntry) -> None:
         if self._entries and entry.previous_hash != self._entries[-1].hash:
             raise HashVerificationError("Vorgänger-Hash stimmt nicht überein.")
         self._entries.append(entry)
+        self._records.append(entry_record(entry))
 
     def entries(self) -> Sequence[AuditTrailEntry]:
         return tuple(self._entries)
 
+    def checkpoints(self) -> Sequence[ChainCheckpoint]:
+        return tuple(self._checkpoints)
+
     def verify_chain(self, entries: Iterable[AuditTrailEntry] | None = None) -> None:
         data = list(entries or self._entries)
-        previous_hash = None
-        for entry in data:
-            expected_hash = compute_entry_hash(
-                {
-                    "tenant_id": entry.tenant_id,
-                    "entity_type": entry.entity_type,
-                    "entity_id": entry.entity_id,
-                    "action": entry.action,
-                    "payload": entry.payload,
-                    "user_id": entry.user_id,
-                },
-                previous_hash,
-            )
-            if entry.hash != expected_hash:
-                raise HashVerificationError("Hash-Kette beschädigt.")
-            previous_hash = entry.hash
-
-
+        result = verify_segment([entry_record(entry) for entry in data], None)
+        if result.broken_at is not None:
+            raise HashVerificationError("Hash-Kette beschädigt.")
+
+    def verify_incremental(self, *, full: bool = False, workers: int | None = 1) -> VerificationReport:
+        """Verifiziert ab dem letzten Checkpoint (``full``: ab Genesis, gegen alle Checkpoints)."""
+        if not self.checkpoint_key:
+            raise HashVerificationError("Kein Checkpoint-Schlüssel konfiguriert.")
+        verifier = ChainVerifier(self.checkpoint_key, checkpoint_interval=self.checkpoint_interval, workers=workers)
+        report = verifier.verify(self._records, len(self._records), self._checkpoints, full=full)
+        if not report.ok:
+            raise HashVerificationError(report.reason or "Hash-Kette beschädigt.")
+        self._checkpoints.extend(report.new_checkpoints)
+        return report
@@ -0,0 +1,273 @@
+"""Parallele, checkpoint-basierte Verifikation von GoBD-Hash-Chains.
+
+Die Kette wird in Intervalle fester Länge geteilt. Für jedes verifizierte
+Intervall entsteht ein per HMAC signierter Checkpoint mit dem letzten Hash
+und der Merkle-Wurzel über die Hashes des Intervalls. Checkpoints sind
+untereinander über die Signatur des Vorgängers verkettet.
+
+* Inkrementell: Signaturen prüfen, dann nur die Einträge nach dem letzten
+  Checkpoint neu hashen (ausgehend von dessen letztem Hash).
+* Vollständig: alle Intervalle unabhängig voneinander in Prozessen prüfen.
+  Jedes Intervall startet beim gespeicherten Hash seines Vorgängers, den das
+  vorherige Intervall bestätigt; zusammen entspricht das der sequentiellen
+  Prüfung ab Genesis. Merkle-Wurzeln und letzte Hashes müssen zu den
+  Checkpoints passen, sodass auch eine komplett neu berechnete Kette auffällt.
+
+Quellen sind entweder Sequenzen von Records oder ``load(start, end)``-Funktionen
+(picklebar, z.B. ``functools.partial`` über eine Modulfunktion mit DB-URL),
+die jeder Worker-Prozess selbst aufruft.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, List, Optional, Sequence, Tuple, Union
+
+CHECKPOINT_INTERVAL = 10_000
+
+# (tenant_id, entity_type, entity_id, action, payload, user_id, hash)
+Record = Tuple[str, str, str, str, dict, str, str]
+RecordHasher = Callable[[Record, Optional[str]], str]
+Source = Union[Sequence[Record], Callable[[int, int], Sequence[Record]]]
+
+# json.dumps baut pro Aufruf mit sort_keys/separators einen neuen Encoder
+_encode = json.JSONEncoder(sort_keys=True, separators=(",", ":")).encode
+
+
+def canonical_json(value: Any) -> str:
+    """Kanonisches JSON, identisch zu ``json.dumps(value, sort_keys=True, separators=(",", ":"))``."""
+    return _encode(value)
+
+
+def entry_hash(
+    tenant_id: str,
+    entity_type: str,
+    entity_id: str,
+    action: str,
+    payload: dict,
+    user_id: str,
+    previous_hash: str | None = None,
+) -> str:
+    """Hash eines Eintrags, byte-identisch zu ``compute_entry_hash`` über das Entry-Payload.
+
+    Die Schlüssel stehen bereits sortiert im Template; nur ``payload`` wird
+    rekursiv sortiert serialisiert.
+    """
+    body = (
+        f'{{"action":{_encode(action)},"entity_id":{_encode(entity_id)},'
+        f'"entity_type":{_encode(entity_type)},"payload":{_encode(payload)},'
+        f'"tenant_id":{_encode(tenant_id)},"user_id":{_encode(user_id)}}}'
+    )
+    return hashlib.sha256(((previous_hash or "") + body).encode("utf-8")).hexdigest()
+
+
+def entry_record_hash(record: Record, previous_hash: str | None) -> str:
+    return entry_hash(*record[:6], previous_hash)
+
+
+def merkle_root(hashes: Sequence[str]) -> str:
+    """Merkle-Wurzel (SHA-256, Blatt-/Knoten-Präfix 0x00/0x01, ungerades Element wird hochgereicht)."""
+    level = [hashlib.sha256(b"\x00" + value.encode("ascii")).digest() for value in hashes]
+    if not level:
+        return hashlib.sha256(b"").hexdigest()
+    while len(level) > 1:
+        paired = [hashlib.sha256(b"\x01" + level[i] + level[i + 1]).digest() for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            paired.append(level[-1])
+        level = paired
+    return level[0].hex()
+
+
+@dataclass(frozen=True)
+class ChainCheckpoint:
+    """Signierter Stand der Kette über die Einträge ``start`` bis ``end`` (exklusiv)."""
+
+    start: int
+    end: int
+    start_previous_hash: str | None
+    last_hash: str
+    merkle_root: str
+    previous_signature: str | None
+    signature: str = ""
+
+    def signed_content(self) -> bytes:
+        fields = asdict(self)
+        fields.pop("signature")
+        return canonical_json(fields).encode("utf-8")
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ChainCheckpoint":
+        return cls(**data)
+
+
+@dataclass(frozen=True)
+class SegmentResult:
+    start: int
+    end: int
+    last_hash: str | None
+    merkle_root: str
+    broken_at: int | None = None
+
+
+@dataclass
+class VerificationReport:
+    entries: int
+    verified_from: int
+    entries_checked: int = 0
+    broken_at: int | None = None
+    reason: str | None = None
+    new_checkpoints: List[ChainCheckpoint] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.broken_at is None
+
+
+def verify_segment(
+    records: Sequence[Record],
+    previous_hash: str | None,
+    start: int = 0,
+    hash_record: RecordHasher = entry_record_hash,
+) -> SegmentResult:
+    """Prüft ``records`` ab ``previous_hash``; ``start`` ist die Position des ersten Records in der Kette."""
+    hashes: List[str] = []
+    for offset, record in enumerate(records):
+        stored = record[-1]
+        if hash_record(record, previous_hash) != stored:
+            return SegmentResult(start, start + len(records), None, "", broken_at=start + offset)
+        hashes.append(stored)
+        previous_hash = stored
+    return SegmentResult(start, start + len(records), previous_hash, merkle_root(hashes))
+
+
+def _verify_task(task: tuple) -> SegmentResult:
+    """Worker: lädt bei Bedarf den Bereich selbst; mit ``linked`` liefert der erste Record nur den Vorgänger-Hash."""
+    records, start, end, previous_hash, linked, hash_record = task
+    if callable(records):
+        records = records(start - 1 if linked else start, end)
+    if linked:
+        previous_hash, records = records[0][-1], records[1:]
+    return verify_segment(records, previous_hash, start, hash_record)
+
+
+class ChainVerifier:
+    """Verifiziert Hash-Chains parallel und signiert Checkpoints (HMAC-SHA256 mit ``key``)."""
+
+    def __init__(
+        self,
+        key: bytes,
+        hash_record: RecordHasher = entry_record_hash,
+        checkpoint_interval: int = CHECKPOINT_INTERVAL,
+        workers: int | None = None,
+    ) -> None:
+        if not key:
+            raise ValueError("Checkpoint-Schlüssel fehlt.")
+        if checkpoint_interval <= 0:
+            raise ValueError("checkpoint_interval muss positiv sein.")
+        self._key = key
+        self.hash_record = hash_record
+        self.checkpoint_interval = checkpoint_interval
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+
+    # Checkpoints -------------------------------------------------------
+    def sign(self, checkpoint: ChainCheckpoint) -> ChainCheckpoint:
+        signature = hmac.new(self._key, checkpoint.signed_content(), hashlib.sha256).hexdigest()
+        return ChainCheckpoint(**{**checkpoint.to_dict(), "signature": signature})
+
+    def checkpoint_valid(self, checkpoint: ChainCheckpoint) -> bool:
+        return hmac.compare_digest(self.sign(checkpoint).signature, checkpoint.signature)
+
+    def _check_checkpoints(self, checkpoints: Sequence[ChainCheckpoint], count: int) -> str | None:
+        previous: ChainCheckpoint | None = None
+        for checkpoint in checkpoints:
+            if not self.checkpoint_valid(checkpoint):
+                return f"Checkpoint {checkpoint.start}-{checkpoint.end}: Signatur ungültig."
+            expected_start = previous.end if previous else 0
+            if (
+                checkpoint.start != expected_start
+                or checkpoint.previous_signature != (previous.signature if previous else None)
+                or checkpoint.start_previous_hash != (previous.last_hash if previous else None)
+            ):
+                return f"Checkpoint {checkpoint.start}-{checkpoint.end}: Verkettung unterbrochen."
+            previous = checkpoint
+        if previous and previous.end > count:
+            return "Kette ist kürzer als der letzte Checkpoint."
+        return None
+
+    # Verifikation ------------------------------------------------------
+    def verify(
+        self,
+        source: Source,
+        count: int,
+        checkpoints: Sequence[ChainCheckpoint] = (),
+        full: bool = False,
+    ) -> VerificationReport:
+        """Prüft die Kette; neue Checkpoints für vollständig verifizierte Intervalle liegen im Report."""
+        last = checkpoints[-1] if checkpoints else None
+        start = 0 if full or last is None else last.end
+        report = VerificationReport(entries=count, verified_from=start)
+
+        reason = self._check_checkpoints(checkpoints, count)
+        if reason:
+            report.broken_at, report.reason = (last.end if last else 0), reason
+            return report
+        if not full and last is not None:
+            # Stichprobe an der Grenze: wurde der Präfix samt Hashes neu geschrieben?
+            boundary = self._load(source, last.end - 1, last.end)
+            if boundary[0][-1] != last.last_hash:
+                report.broken_at, report.reason = last.end - 1, "Letzter Checkpoint passt nicht zur Kette."
+                return report
+
+        bounds = [(s, min(s + self.checkpoint_interval, count)) for s in range(start, count, self.checkpoint_interval)]
+        # Nur das erste Intervall startet bei einem bekannten Hash (Genesis oder letzter Checkpoint)
+        first_previous = last.last_hash if start else None
+        tasks = [self._task(source, s, e, first_previous, linked=i > 0) for i, (s, e) in enumerate(bounds)]
+        existing = {(c.start, c.end): c for c in checkpoints}
+        previous = last if not full else None
+        for result in self._run(tasks):
+            if result.broken_at is not None:
+                report.broken_at, report.reason = result.broken_at, "Hash-Kette beschädigt."
+                break
+            report.entries_checked += result.end - result.start
+            known = existing.get((result.start, result.end))
+            if known is not None:
+                if (known.merkle_root, known.last_hash) != (result.merkle_root, result.last_hash):
+                    report.broken_at, report.reason = result.start, "Merkle-Wurzel weicht vom Checkpoint ab."
+                    break
+                previous = known
+            elif result.end - result.start == self.checkpoint_interval and (previous is None or previous.end == result.start):
+                previous = self.sign(ChainCheckpoint(
+                    start=result.start,
+                    end=result.end,
+                    start_previous_hash=previous.last_hash if previous else None,
+                    last_hash=result.last_hash,
+                    merkle_root=result.merkle_root,
+                    previous_signature=previous.signature if previous else None,
+                ))
+                report.new_checkpoints.append(previous)
+        return report
+
+    def _task(self, source: Source, start: int, end: int, previous_hash: str | None, linked: bool) -> tuple:
+        if callable(source):
+            return (source, start, end, previous_hash, linked, self.hash_record)
+        # Sequenzen werden vorab geschnitten, damit nur der Bereich an den Worker geht
+        return (list(source[start - 1 if linked else start:end]), start, end, previous_hash, linked, self.hash_record)
+
+    @staticmethod
+    def _load(source: Source, start: int, end: int) -> Sequence[Record]:
+        return source(start, end) if callable(source) else source[start:end]
+
+    def _run(self, tasks: List[tuple]):
+        if self.workers <= 1 or len(tasks) <= 1:
+            return map(_verify_task, tasks)
+        chunksize = max(1, len(tasks) // (self.workers * 4))
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(_verify_task, tasks, chunksize=chunksize))
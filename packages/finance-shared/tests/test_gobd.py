@@ -1,4 +1,15 @@
-from finance_shared.gobd import GoBDAuditTrail
+from dataclasses import replace
+
+import pytest
+
+from finance_shared.gobd import (
+    ChainVerifier,
+    GoBDAuditTrail,
+    HashVerificationError,
+    compute_entry_hash,
+    entry_hash,
+    entry_record,
+)
 
 
 def test_audit_trail_hash_chain():
@@ -16,3 +27,83 @@ def test_audit_trail_hash_chain():
     trail.verify_chain()
 
 
+
+
+def _trail(count, **kwargs):
+    trail = GoBDAuditTrail(tenant_id="tenant-x", **kwargs)
+    for i in range(count):
+        trail.append_entry(trail.create_entry(
+            entity_type="journal",
+            entity_id=f"J-{i}",
+            action="create",
+            payload={"betrag": i, "konto": {"soll": "1200", "haben": "8400"}, "text": "Überweisung ä"},
+            user_id="user-1",
+        ))
+    return trail
+
+
+def test_fast_entry_hash_matches_json_dumps():
+    payload = {"b": [1, {"z": None, "a": 1.5}], "a": "Ölmühle  ", "c": True}
+    fields = {"tenant_id": "t", "entity_type": "journal", "entity_id": "J-1",
+              "action": "create", "payload": payload, "user_id": "u"}
+    assert entry_hash(**fields) == compute_entry_hash(fields)
+    assert entry_hash(**fields, previous_hash="ab" * 32) == compute_entry_hash(fields, "ab" * 32)
+
+
+def test_incremental_verification_checks_only_new_entries():
+    trail = _trail(25, checkpoint_key=b"geheim", checkpoint_interval=10)
+
+    report = trail.verify_incremental()
+    assert report.ok and report.entries_checked == 25
+    assert [(c.start, c.end) for c in trail.checkpoints()] == [(0, 10), (10, 20)]
+
+    for i in range(25, 37):
+        trail.append_entry(trail.create_entry(entity_type="journal", entity_id=f"J-{i}", action="create",
+                                              payload={"betrag": i}, user_id="user-1"))
+    report = trail.verify_incremental()
+    assert report.verified_from == 20 and report.entries_checked == 17
+    assert [(c.start, c.end) for c in report.new_checkpoints] == [(20, 30)]
+
+    # Manipulation vor dem letzten Checkpoint fällt erst bei der Vollprüfung auf
+    trail.entries()[3].payload["betrag"] = 999
+    assert trail.verify_incremental().ok
+    with pytest.raises(HashVerificationError):
+        trail.verify_incremental(full=True)
+
+
+def test_parallel_full_verification_matches_sequential():
+    trail = _trail(95, checkpoint_key=b"geheim", checkpoint_interval=10)
+    sequential = trail.verify_incremental(full=True, workers=1)
+    records = [entry_record(entry) for entry in trail.entries()]
+    verifier = ChainVerifier(b"geheim", checkpoint_interval=10, workers=2)
+
+    parallel = verifier.verify(records, len(records), trail.checkpoints(), full=True)
+    assert parallel.ok and parallel.entries_checked == sequential.entries_checked == 95
+
+    records[57] = records[57][:-1] + ("0" * 64,)
+    broken = verifier.verify(records, len(records), trail.checkpoints(), full=True)
+    assert broken.broken_at == 57
+
+
+def test_rewritten_chain_or_forged_checkpoint_is_detected():
+    trail = _trail(30, checkpoint_key=b"geheim", checkpoint_interval=10)
+    trail.verify_incremental()
+    checkpoints = list(trail.checkpoints())
+
+    # Komplett neu gehashte Kette mit geändertem Eintrag: Hashes stimmen, Checkpoints nicht
+    forged = _trail(30)
+    forged.entries()[0].payload["betrag"] = 1
+    rewritten = GoBDAuditTrail(tenant_id="tenant-x")
+    for entry in forged.entries():
+        rewritten.append_entry(rewritten.create_entry(entity_type=entry.entity_type, entity_id=entry.entity_id,
+                                                      action=entry.action, payload=entry.payload,
+                                                      user_id=entry.user_id))
+    records = [entry_record(entry) for entry in rewritten.entries()]
+    verifier = ChainVerifier(b"geheim", checkpoint_interval=10, workers=1)
+    assert verifier.verify(records, 30, checkpoints).broken_at == 29
+    assert verifier.verify(records, 30, checkpoints, full=True).broken_at == 0
+
+    tampered = replace(checkpoints[1], last_hash="0" * 64)
+    report = ChainVerifier(b"geheim", checkpoint_interval=10).verify(
+        [entry_record(entry) for entry in trail.entries()], 30, [checkpoints[0], tampered])
+    assert not report.ok and "Signatur" in report.reason
@@ -0,0 +1,156 @@
+"""
+Benchmark: admission control under month-end report load
+
+In-process load test of ``AdmissionMiddleware``. The test app shares a
+pool of ``--workers`` slots (stand-in for DB connections/worker threads)
+between interactive bookings (``--booking-ms`` each) and reports
+(``--report-ms`` each, ``/api/reports/...``). Bookings arrive open-loop
+(Poisson, ``--booking-rate`` per second, several tenants) while
+``--report-clients`` closed-loop clients of ``--report-tenants`` tenants keep
+requesting reports, retrying shed requests after a short pause.
+
+The same load runs without and with admission control; reported are the
+booking latency percentiles against ``--target`` (the p99 goal), the report
+throughput per tenant and the shed requests.
+
+Admission takes the tenant from the token claims only, so the bench app
+has a small stand-in for the auth middleware that turns the
+``X-Bench-Tenant`` header into ``request.state.token_claims``.
+
+Usage:
+    python scripts/benchmarks/bench_admission_control.py --duration 20
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from app.middleware.admission import AdmissionController, AdmissionMiddleware  # noqa: E402
+
+
+def build_app(args, admission: bool):
+    app = FastAPI()
+    pool = asyncio.Semaphore(args.workers)
+
+    async def work(seconds: float) -> None:
+        async with pool:
+            await asyncio.sleep(seconds)
+
+    @app.post("/api/v1/bookings")
+    async def booking():
+        await work(args.booking_ms / 1000)
+        return {"ok": True}
+
+    @app.get("/api/reports/month-end")
+    async def report():
+        await work(args.report_ms / 1000)
+        return {"ok": True}
+
+    controller = None
+    if admission:
+        controller = AdmissionController(target_p99=args.target, report_max=args.workers, report_min=1,
+                                         tenant_limit=args.workers)
+        app.add_middleware(AdmissionMiddleware, controller=controller)
+
+    @app.middleware("http")
+    async def authenticate(request, call_next):
+        # Outermost, like the real auth middleware: claims before admission
+        request.state.token_claims = {"tenant_id": request.headers["X-Bench-Tenant"]}
+        return await call_next(request)
+
+    return app, controller
+
+
+async def run(args, admission: bool) -> dict:
+    app, controller = build_app(args, admission)
+    transport = httpx.ASGITransport(app=app)
+    latencies, statuses, reports = [], Counter(), Counter()
+    warmup_end = time.perf_counter() + args.warmup
+    end = warmup_end + args.duration
+    rng = random.Random(1)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        async def booking(tenant: str) -> None:
+            start = time.perf_counter()
+            response = await client.post("/api/v1/bookings", headers={"X-Bench-Tenant": tenant})
+            if start >= warmup_end:
+                latencies.append(time.perf_counter() - start)
+                statuses[response.status_code] += 1
+
+        async def bookings() -> None:
+            pending = set()
+            while time.perf_counter() < end:
+                await asyncio.sleep(rng.expovariate(args.booking_rate))
+                task = asyncio.ensure_future(booking(f"tenant-{rng.randrange(args.booking_tenants)}"))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            await asyncio.gather(*pending)
+
+        async def report_client(tenant: str) -> None:
+            while time.perf_counter() < end:
+                response = await client.get("/api/reports/month-end", headers={"X-Bench-Tenant": tenant})
+                counted = time.perf_counter() >= warmup_end
+                if response.status_code == 200:
+                    reports[tenant] += counted
+                else:
+                    reports["shed"] += counted
+                    await asyncio.sleep(min(float(response.headers.get("Retry-After", 1)), args.retry_pause))
+
+        await asyncio.gather(bookings(), *(report_client(f"report-tenant-{n % args.report_tenants}")
+                                           for n in range(args.report_clients)))
+
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p / 100))] * 1000
+
+    return {
+        "bookings": len(latencies),
+        "p50": percentile(50), "p95": percentile(95), "p99": percentile(99), "max": latencies[-1] * 1000,
+        "statuses": dict(statuses),
+        "reports": dict(reports),
+        "report_limit": controller.report_limit if controller else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--booking-rate", type=float, default=150.0)
+    parser.add_argument("--booking-ms", type=float, default=10.0)
+    parser.add_argument("--booking-tenants", type=int, default=20)
+    parser.add_argument("--report-clients", type=int, default=48)
+    parser.add_argument("--report-tenants", type=int, default=3)
+    parser.add_argument("--report-ms", type=float, default=250.0)
+    parser.add_argument("--retry-pause", type=float, default=0.5, help="cap on Retry-After for report clients")
+    parser.add_argument("--target", type=float, default=0.1, help="booking p99 goal in seconds")
+    args = parser.parse_args()
+
+    print(f"{'mode':<20} {'bookings':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}  reports")
+    for admission in (False, True):
+        result = asyncio.run(run(args, admission))
+        reports = result["reports"]
+        done = sum(count for tenant, count in reports.items() if tenant != "shed")
+        per_tenant = " ".join(f"{count}" for tenant, count in sorted(reports.items()) if tenant != "shed")
+        print(f"{'admission control' if admission else 'no admission':<20} {result['bookings']:8d} "
+              f"{result['p50']:8.1f} {result['p95']:8.1f} {result['p99']:8.1f} {result['max']:8.1f}  "
+              f"{done / args.duration:5.1f}/s (per tenant {per_tenant}; shed {reports.get('shed', 0)})"
+              f"  booking status {result['statuses']}")
+        if admission:
+            verdict = "held" if result["p99"] <= args.target * 1000 else "MISSED"
+            print(f"booking p99 target {args.target * 1000:.0f} ms {verdict}; final report limit {result['report_limit']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
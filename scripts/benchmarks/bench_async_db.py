@@ -0,0 +1,221 @@
+"""
+Benchmark: latency of fast GETs while a slow report is running
+
+Seeds ``--lines`` journal lines over ``--accounts`` accounts and serves one
+in-process FastAPI app (httpx ``ASGITransport``, a single event loop like one
+uvicorn worker) in three variants:
+
+* ``sync session``: ``async def`` endpoints with a synchronous ``Session``,
+  as before. Every query blocks the event loop.
+* ``async session``: fast GETs on ``get_async_db`` (interactive pool) and the
+  report on ``get_report_db`` (reports pool).
+* ``threadpool``: the synchronous session, but offloaded through
+  ``run_in_db_threadpool``, as done for the document endpoints.
+
+``--reporters`` clients request the report (an aggregate over all lines) in a
+loop. At the same time ``--clients`` clients send ``--requests`` account
+lookups by primary key. The benchmark prints p50/p99/max of the fast requests
+and the number of reports completed.
+
+Uses a temporary SQLite file database (WAL) unless ``--database-url`` points
+at an empty PostgreSQL database (``postgresql://...``; the async variant
+uses asyncpg).
+
+Usage:
+    python scripts/benchmarks/bench_async_db.py --lines 2000000
+    python scripts/benchmarks/bench_async_db.py --lines 20000000 --database-url postgresql://...
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import httpx  # noqa: E402
+from fastapi import Depends, FastAPI  # noqa: E402
+from sqlalchemy import create_engine, event, text  # noqa: E402
+from sqlalchemy.orm import Session, sessionmaker  # noqa: E402
+
+from app.core import database  # noqa: E402
+from app.core.config import settings  # noqa: E402
+
+DDL = [
+    "CREATE TABLE bench_accounts (id INTEGER PRIMARY KEY, account_number VARCHAR(20), name VARCHAR(100))",
+    "CREATE TABLE bench_journal_lines (id BIGINT PRIMARY KEY, account_id INTEGER, period VARCHAR(7), "
+    "debit_amount NUMERIC(15, 2), credit_amount NUMERIC(15, 2))",
+]
+
+SEED_SQLITE = [
+    "INSERT INTO bench_accounts WITH RECURSIVE s(n) AS (SELECT 0 UNION ALL SELECT n + 1 FROM s WHERE n + 1 < :accounts) "
+    "SELECT n, printf('%04d', 1000 + n), 'Konto ' || n FROM s",
+    "INSERT INTO bench_journal_lines WITH RECURSIVE s(n) AS (SELECT 0 UNION ALL SELECT n + 1 FROM s WHERE n + 1 < :lines) "
+    "SELECT n, n % :accounts, printf('2025-%02d', 1 + n % 12), CASE WHEN n % 2 = 0 THEN n % 997 ELSE 0 END, "
+    "CASE WHEN n % 2 = 1 THEN n % 997 ELSE 0 END FROM s",
+]
+
+SEED_POSTGRES = [
+    "INSERT INTO bench_accounts SELECT n, (1000 + n)::text, 'Konto ' || n FROM generate_series(0, :accounts - 1) AS n",
+    "INSERT INTO bench_journal_lines SELECT n, n % :accounts, '2025-' || lpad((1 + n % 12)::text, 2, '0'), "
+    "CASE WHEN n % 2 = 0 THEN n % 997 ELSE 0 END, CASE WHEN n % 2 = 1 THEN n % 997 ELSE 0 END "
+    "FROM generate_series(0, :lines - 1) AS n",
+]
+
+# Bilanz-artige Auswertung: volle Aggregation über alle Buchungszeilen
+REPORT = text("""
+    SELECT a.account_number, a.name, SUM(l.debit_amount) AS debit, SUM(l.credit_amount) AS credit
+    FROM bench_accounts a JOIN bench_journal_lines l ON l.account_id = a.id
+    WHERE l.period <= :period
+    GROUP BY a.account_number, a.name
+    ORDER BY a.account_number
+""")
+LOOKUP = text("SELECT id, account_number, name FROM bench_accounts WHERE id = :id")
+
+
+def _report(rows) -> dict:
+    return {"accounts": len(rows)}
+
+
+def _lookup(row) -> dict:
+    return {"id": row[0], "account_number": row[1], "name": row[2]}
+
+
+def build_app(variant: str, session_factory: sessionmaker) -> FastAPI:
+    app = FastAPI()
+
+    def get_sync_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    if variant == "sync session":
+        @app.get("/report")
+        async def report(db: Session = Depends(get_sync_db)):
+            return _report(db.execute(REPORT, {"period": "2025-12"}).fetchall())
+
+        @app.get("/accounts/{account_id}")
+        async def account(account_id: int, db: Session = Depends(get_sync_db)):
+            return _lookup(db.execute(LOOKUP, {"id": account_id}).fetchone())
+
+    elif variant == "async session":
+        @app.get("/report")
+        async def report(db=Depends(database.get_report_db)):
+            return _report((await db.execute(REPORT, {"period": "2025-12"})).fetchall())
+
+        @app.get("/accounts/{account_id}")
+        async def account(account_id: int, db=Depends(database.get_async_db)):
+            return _lookup((await db.execute(LOOKUP, {"id": account_id})).fetchone())
+
+    else:
+        @app.get("/report")
+        async def report(db: Session = Depends(get_sync_db)):
+            rows = await database.run_in_db_threadpool(lambda: db.execute(REPORT, {"period": "2025-12"}).fetchall())
+            return _report(rows)
+
+        @app.get("/accounts/{account_id}")
+        async def account(account_id: int, db: Session = Depends(get_sync_db)):
+            row = await database.run_in_db_threadpool(lambda: db.execute(LOOKUP, {"id": account_id}).fetchone())
+            return _lookup(row)
+
+    return app
+
+
+async def measure(app: FastAPI, args) -> tuple[list[float], int]:
+    transport = httpx.ASGITransport(app=app)
+    latencies: list[float] = []
+    reports = 0
+    done = asyncio.Event()
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def reporter():
+            nonlocal reports
+            while not done.is_set():
+                (await client.get("/report")).raise_for_status()
+                reports += 1
+
+        async def fast_client(count: int, rng: random.Random):
+            for _ in range(count):
+                start = time.perf_counter()
+                (await client.get(f"/accounts/{rng.randrange(args.accounts)}")).raise_for_status()
+                latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(args.think_time / 1000)
+
+        reporter_tasks = [asyncio.create_task(reporter()) for _ in range(args.reporters)]
+        # Reports zuerst anlaufen lassen
+        await asyncio.sleep(0.05)
+        await asyncio.gather(*(
+            fast_client(args.requests // args.clients, random.Random(n)) for n in range(args.clients)
+        ))
+        done.set()
+        await asyncio.gather(*reporter_tasks)
+    return latencies, reports
+
+
+def _sqlite_url() -> str:
+    path = Path(tempfile.mkdtemp(prefix="bench-async-db-")) / "erp.db"
+    return f"sqlite:///{path}"
+
+
+def seed(engine, accounts: int, lines: int) -> None:
+    statements = SEED_POSTGRES if engine.dialect.name == "postgresql" else SEED_SQLITE
+    with engine.begin() as conn:
+        for ddl in DDL:
+            conn.execute(text(ddl))
+        for statement in statements:
+            conn.execute(text(statement), {"accounts": accounts, "lines": lines})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=2_000_000)
+    parser.add_argument("--accounts", type=int, default=1_000)
+    parser.add_argument("--clients", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=2_000, help="Fast GETs in total")
+    parser.add_argument("--reporters", type=int, default=1)
+    parser.add_argument("--think-time", type=float, default=20.0, help="Pause between fast GETs per client (ms)")
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    url = args.database_url or _sqlite_url()
+    settings.DEBUG = False
+    settings.ASYNC_DATABASE_URL = database.async_database_url(url)
+    # Synchroner Pool groß genug für alle Clients: gemessen wird der blockierte Loop, nicht Pool-Wartezeit
+    engine = create_engine(url, pool_size=args.clients + args.reporters, max_overflow=settings.DATABASE_MAX_OVERFLOW)
+    if engine.dialect.name == "sqlite":
+        @event.listens_for(engine, "connect")
+        def _wal(dbapi_conn, _):
+            dbapi_conn.execute("PRAGMA journal_mode=WAL")
+
+    start = time.perf_counter()
+    seed(engine, args.accounts, args.lines)
+    print(f"seeded {args.lines:,} journal lines in {time.perf_counter() - start:.1f} s")
+    session_factory = sessionmaker(bind=engine)
+
+    print(f"{'variant':<16} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9} {'req/s':>8} {'reports':>8}")
+    for variant in ("sync session", "async session", "threadpool"):
+        app = build_app(variant, session_factory)
+
+        async def run():
+            start = time.perf_counter()
+            latencies, reports = await measure(app, args)
+            await database.dispose_async_engines()
+            return latencies, reports, time.perf_counter() - start
+
+        latencies, reports, elapsed = asyncio.run(run())
+        latencies.sort()
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(
+            f"{variant:<16} {statistics.median(latencies) * 1000:9.1f} {p99 * 1000:9.1f} "
+            f"{latencies[-1] * 1000:9.1f} {len(latencies) / elapsed:8.0f} {reports:8d}"
+        )
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
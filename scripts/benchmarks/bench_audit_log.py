@@ -0,0 +1,160 @@
+"""
+Benchmark: audit-log ingestion and deep-page reads
+
+Requires PostgreSQL with the partitioned domain_shared.audit_logs table.
+
+  writes  sustained rows/s through AuditLogWriter vs. one commit per row
+  reads   page latency at increasing depth, OFFSET vs. keyset (timestamp, id)
+
+Usage:
+    python scripts/benchmarks/bench_audit_log.py writes --seconds 30
+    python scripts/benchmarks/bench_audit_log.py seed --rows 100000000
+    python scripts/benchmarks/bench_audit_log.py reads --depths 1000,100000,1000000
+"""
+
+import argparse
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from sqlalchemy import insert, text  # noqa: E402
+
+from app.core.database import SessionLocal  # noqa: E402
+from app.infrastructure.models import AuditLog  # noqa: E402
+from app.workers.audit_log_writer import AuditLogWriter  # noqa: E402
+
+TENANT_ID = "bench-audit-tenant"
+USER_ID = "bench-audit-user"
+PAGE_SIZE = 100
+
+
+def _ensure_subject() -> None:
+    with SessionLocal() as db:
+        db.execute(text(
+            "INSERT INTO domain_shared.tenants (id, name, domain) VALUES (:t, 'Bench', 'bench.local') "
+            "ON CONFLICT (id) DO NOTHING"
+        ), {"t": TENANT_ID})
+        db.execute(text(
+            "INSERT INTO domain_shared.users (id, username, email, first_name, last_name, tenant_id) "
+            "VALUES (:u, 'bench-audit', 'bench-audit@example.com', 'Bench', 'User', :t) "
+            "ON CONFLICT (id) DO NOTHING"
+        ), {"u": USER_ID, "t": TENANT_ID})
+        db.commit()
+
+
+def _row() -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "timestamp": datetime.now(timezone.utc),
+        "user_id": USER_ID,
+        "user_email": "bench-audit@example.com",
+        "tenant_id": TENANT_ID,
+        "action": "update",
+        "entity_type": "customer",
+        "entity_id": "c-1",
+        "changes": {"field": "name"},
+    }
+
+
+def bench_writes(seconds: float) -> None:
+    _ensure_subject()
+
+    # Baseline: one transaction per entry (previous create_audit_log behaviour)
+    db = SessionLocal()
+    n, start = 0, time.perf_counter()
+    while time.perf_counter() - start < min(seconds, 10):
+        db.execute(insert(AuditLog.__table__), [_row()])
+        db.commit()
+        n += 1
+    db.close()
+    print(f"per-row commit   {n / (time.perf_counter() - start):10,.0f} rows/s")
+
+    writer = AuditLogWriter(max_batch_size=1000)
+    n, start = 0, time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        writer.enqueue(_row())
+        n += 1
+        if writer.pending() >= writer.max_batch_size:
+            writer.flush()
+    writer.flush()
+    print(f"batched writer   {n / (time.perf_counter() - start):10,.0f} rows/s ({writer.flushes} flushes)")
+
+
+def seed(rows: int) -> None:
+    _ensure_subject()
+    with SessionLocal() as db:
+        db.execute(text("SELECT domain_shared.ensure_audit_log_partitions((now() - interval '3 years')::date, 3)"))
+        step = 1_000_000
+        for offset in range(0, rows, step):
+            start = time.perf_counter()
+            db.execute(text(
+                "INSERT INTO domain_shared.audit_logs "
+                "(id, timestamp, user_id, user_email, tenant_id, action, entity_type, entity_id, changes) "
+                "SELECT 'seed-' || g, now() - (g * interval '1 second'), :u, 'bench-audit@example.com', :t, "
+                "(ARRAY['create','update','delete'])[1 + g % 3], 'customer', 'c-' || (g % 10000), '{}'::jsonb "
+                "FROM generate_series(:a, :b) AS g"
+            ), {"u": USER_ID, "t": TENANT_ID, "a": offset + 1, "b": min(offset + step, rows)})
+            db.commit()
+            print(f"seeded {min(offset + step, rows):,} rows ({time.perf_counter() - start:.1f}s)")
+        db.execute(text("ANALYZE domain_shared.audit_logs"))
+        db.commit()
+
+
+def bench_reads(depths) -> None:
+    with SessionLocal() as db:
+        for depth in depths:
+            t_offset = []
+            for _ in range(3):
+                start = time.perf_counter()
+                db.execute(text(
+                    "SELECT * FROM domain_shared.audit_logs WHERE tenant_id = :t "
+                    "ORDER BY timestamp DESC, id DESC OFFSET :o LIMIT :l"
+                ), {"t": TENANT_ID, "o": depth, "l": PAGE_SIZE}).fetchall()
+                t_offset.append(time.perf_counter() - start)
+
+            # Cursor of the page just before `depth` (what a client would hold)
+            cursor = db.execute(text(
+                "SELECT timestamp, id FROM domain_shared.audit_logs WHERE tenant_id = :t "
+                "ORDER BY timestamp DESC, id DESC OFFSET :o LIMIT 1"
+            ), {"t": TENANT_ID, "o": max(depth - 1, 0)}).first()
+            t_keyset = []
+            for _ in range(3):
+                start = time.perf_counter()
+                db.execute(text(
+                    "SELECT * FROM domain_shared.audit_logs WHERE tenant_id = :t "
+                    "AND (timestamp, id) < (:ts, :id) ORDER BY timestamp DESC, id DESC LIMIT :l"
+                ), {"t": TENANT_ID, "ts": cursor[0], "id": cursor[1], "l": PAGE_SIZE}).fetchall()
+                t_keyset.append(time.perf_counter() - start)
+
+            print(
+                f"depth {depth:>12,}  offset {statistics.median(t_offset) * 1000:9.1f} ms"
+                f"  keyset {statistics.median(t_keyset) * 1000:7.2f} ms"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    w = sub.add_parser("writes")
+    w.add_argument("--seconds", type=float, default=30)
+    s = sub.add_parser("seed")
+    s.add_argument("--rows", type=int, default=100_000_000)
+    r = sub.add_parser("reads")
+    r.add_argument("--depths", default="1000,100000,1000000,10000000")
+    args = parser.parse_args()
+
+    if args.command == "writes":
+        bench_writes(args.seconds)
+    elif args.command == "seed":
+        seed(args.rows)
+    else:
+        bench_reads([int(d) for d in args.depths.split(",")])
+
+
+if __name__ == "__main__":
+    main()
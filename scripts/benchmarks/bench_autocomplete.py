@@ -0,0 +1,145 @@
+"""
+Benchmark: autocomplete latency over a large master-data index
+
+Builds one ``AutocompleteIndex`` (a single tenant's customers) from
+``--entries`` synthetic rows (company names from a German word list, 20 % with
+umlauts, customer numbers ``K-0000001`` ...) and reports build time and peak
+RSS. Then sends ``--queries`` type-ahead queries in a mix like a user typing:
+
+* ``prefix``: 1 to 6 leading characters of a word of an existing name
+* ``two words``: a full word plus the prefix of a second word
+* ``number``: a prefix of a customer number
+* ``typo``: a word with one character replaced (trigram fallback)
+
+Every 20th query records a use (``record_use``) of a random entry. Prints
+p50/p99/max per query type. For comparison the old lookup (substring scan over
+a list of dicts) runs ``--scan-queries`` times over the same entries.
+
+Usage:
+    python scripts/benchmarks/bench_autocomplete.py --entries 5000000
+"""
+
+import argparse
+import random
+import resource
+import statistics
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from app.infrastructure.models import Customer  # noqa: E402
+from app.services.autocomplete_index import AutocompleteIndex, AutocompleteSource  # noqa: E402
+
+STEMS = [
+    "Agrar", "Land", "Handel", "Technik", "Mühle", "Hof", "Saaten", "Futter", "Dünger", "Getreide", "Raiffeisen",
+    "Nord", "Süd", "West", "Ost", "Weser", "Ems", "Elbe", "Marsch", "Geest", "Bauern", "Milch", "Kartoffel",
+    "Zucker", "Rüben", "Obst", "Gemüse", "Forst", "Holz", "Bau", "Transport", "Logistik", "Service", "Landtechnik",
+]
+NAMES = [
+    "Meyer", "Müller", "Schmidt", "Schulz", "Weber", "Becker", "Hoffmann", "Schäfer", "Koch", "Bauer", "Richter",
+    "Klein", "Wolf", "Schröder", "Neumann", "Schwarz", "Zimmermann", "Braun", "Krüger", "Hofmann", "Hartmann",
+    "Lange", "Schmitt", "Werner", "Krause", "Meier", "Lehmann", "Köhler", "Janssen", "Onken", "Gerdes", "Ahlers",
+]
+FORMS = ["GmbH", "KG", "GmbH & Co. KG", "eG", "AG", "OHG", "e.K.", ""]
+CITIES = ["Emden", "Leer", "Aurich", "Oldenburg", "Bremen", "Cloppenburg", "Vechta", "Papenburg", "Norden"]
+DAY = 86400.0
+
+
+def synthetic_name(rng: random.Random) -> str:
+    stem = rng.choice(STEMS) + rng.choice(STEMS).lower()
+    # Seltene Wörter wie in echten Stammdaten: Silben-Komposita
+    rare = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(0, 5)))
+    parts = [rng.choice(NAMES), stem + rare, rng.choice(FORMS)]
+    if rng.random() < 0.5:
+        parts.reverse()
+    return " ".join(part for part in parts if part)
+
+
+def rows(count: int, seed: int):
+    rng = random.Random(seed)
+    now = time.time()
+    for n in range(count):
+        yield (f"c{n}", f"K-{n:07d}", synthetic_name(rng), rng.choice(CITIES), now - rng.random() * 720 * DAY)
+
+
+def typo(word: str, rng: random.Random) -> str:
+    position = rng.randrange(1, len(word))
+    return word[:position] + rng.choice("aeiourst") + word[position + 1:]
+
+
+def queries(count: int, entries: int, seed: int):
+    rng = random.Random(seed)
+    names = [row[2] for row in rows(min(entries, 50_000), seed)]
+    for _ in range(count):
+        words = [word for word in rng.choice(names).split() if word.isalpha() and len(word) >= 4]
+        if not words:
+            continue
+        kind = rng.choices(["prefix", "two words", "number", "typo"], weights=[60, 20, 10, 10])[0]
+        if kind == "prefix":
+            query = rng.choice(words)[:rng.randint(1, 6)]
+        elif kind == "two words" and len(words) >= 2:
+            first, second = rng.sample(words, 2)
+            query = f"{first} {second[:rng.randint(1, 4)]}"
+        elif kind == "number":
+            query = f"K-{rng.randrange(entries):07d}"[:rng.randint(4, 9)]
+        else:
+            kind = "typo"
+            query = typo(max(words, key=len), rng)
+        yield kind, query
+
+
+def percentile(values, fraction: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=5_000_000)
+    parser.add_argument("--queries", type=int, default=20_000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--scan-queries", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    source = AutocompleteSource("customers", Customer, number="customer_number", label="company_name", hint="city")
+    start = time.perf_counter()
+    index = AutocompleteIndex(source, rows(args.entries, args.seed), half_life=30 * DAY)
+    build = time.perf_counter() - start
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    segment = index._segment
+    print(f"built {args.entries:,} entries in {build:.1f} s ({len(segment.terms):,} terms, "
+          f"{len(segment.trigrams):,} trigrams, peak RSS {rss:,.0f} MB)")
+
+    rng = random.Random(args.seed)
+    latencies = {}
+    for n, (kind, query) in enumerate(queries(args.queries, args.entries, args.seed)):
+        if n % 20 == 0:
+            index.record_use(f"c{rng.randrange(args.entries)}")
+        start = time.perf_counter()
+        index.search(query, args.limit)
+        latencies.setdefault(kind, []).append(time.perf_counter() - start)
+    latencies["all"] = [value for values in latencies.values() for value in values]
+
+    print(f"{'query':<10} {'count':>7} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for kind, values in latencies.items():
+        values.sort()
+        print(f"{kind:<10} {len(values):7d} {statistics.median(values) * 1000:8.3f} "
+              f"{percentile(values, 0.99) * 1000:8.3f} {values[-1] * 1000:8.3f}")
+
+    if args.scan_queries:
+        # Bisheriger Lookup: Teilstring-Suche über eine Liste von Dicts
+        entries = [{"id": number, "label": label, "hint": hint} for _, number, label, hint, _ in rows(args.entries, args.seed)]
+        scan = []
+        for _, query in list(queries(args.scan_queries, args.entries, args.seed + 1)):
+            ql = query.lower()
+            start = time.perf_counter()
+            [entry for entry in entries if ql in entry["id"].lower() or ql in entry["label"].lower()]
+            scan.append(time.perf_counter() - start)
+        print(f"{'scan':<10} {len(scan):7d} {statistics.median(scan) * 1000:8.1f} {'':>8} {max(scan) * 1000:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Benchmark: bank reconciliation auto-booking
+
+Seeds a statement with N unmatched lines and books all of them through
+the bulk path (one account lookup, multi-row INSERTs, one transaction).
+
+Runs against PostgreSQL by default; ``--sqlite`` uses an in-memory
+database with the same tables for a quick local check.
+
+Usage:
+    python scripts/benchmarks/bench_bank_reconciliation.py --lines 10000
+    python scripts/benchmarks/bench_bank_reconciliation.py --lines 10000 --sqlite
+"""
+
+import argparse
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from sqlalchemy import create_engine, event, text  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.finance.bank_reconciliation import (  # noqa: E402
+    BANK_ACCOUNT_NUMBER,
+    DEFAULT_COUNTER_ACCOUNT,
+    apply_booking_plan,
+    find_differences,
+    plan_bookings,
+    resolve_accounts,
+)
+
+TENANT_ID = "bench-recon-tenant"
+
+SQLITE_SCHEMA = [
+    "CREATE TABLE domain_erp.chart_of_accounts (id TEXT PRIMARY KEY, tenant_id TEXT, account_number TEXT)",
+    "CREATE TABLE domain_erp.bank_accounts (id TEXT PRIMARY KEY, tenant_id TEXT, account_number TEXT)",
+    "CREATE TABLE domain_erp.bank_statement_lines (id TEXT PRIMARY KEY, tenant_id TEXT, statement_id TEXT, "
+    "booking_date DATE, amount NUMERIC, reference TEXT, remittance_info TEXT, status TEXT, updated_at TIMESTAMP)",
+    "CREATE TABLE domain_erp.journal_entries (id TEXT PRIMARY KEY, tenant_id TEXT, entry_number TEXT UNIQUE, "
+    "entry_date DATE, posting_date DATE, description TEXT, reference TEXT, source TEXT, currency TEXT, "
+    "status TEXT, total_debit NUMERIC, total_credit NUMERIC, created_at TIMESTAMP, updated_at TIMESTAMP)",
+    "CREATE TABLE domain_erp.journal_entry_lines (id TEXT PRIMARY KEY, tenant_id TEXT, journal_entry_id TEXT, "
+    "account_id TEXT, debit_amount NUMERIC, credit_amount NUMERIC, line_number INTEGER, description TEXT, "
+    "created_at TIMESTAMP, updated_at TIMESTAMP)",
+]
+
+
+def _sqlite_session():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+
+    @event.listens_for(engine, "connect")
+    def _attach(dbapi_conn, _):
+        dbapi_conn.execute("ATTACH DATABASE ':memory:' AS domain_erp")
+
+    with engine.begin() as conn:
+        for ddl in SQLITE_SCHEMA:
+            conn.execute(text(ddl))
+    return sessionmaker(bind=engine)()
+
+
+def seed(db, lines: int) -> tuple:
+    statement_id = f"bench-{uuid.uuid4().hex[:8]}"
+    bank_account_id = f"ba-{statement_id}"
+    db.execute(text(
+        "INSERT INTO domain_erp.chart_of_accounts (id, tenant_id, account_number) "
+        "SELECT :id, :t, :n WHERE NOT EXISTS (SELECT 1 FROM domain_erp.chart_of_accounts "
+        "WHERE tenant_id = :t AND account_number = :n)"
+    ), [
+        {"id": str(uuid.uuid4()), "t": TENANT_ID, "n": BANK_ACCOUNT_NUMBER},
+        {"id": str(uuid.uuid4()), "t": TENANT_ID, "n": DEFAULT_COUNTER_ACCOUNT},
+    ])
+    db.execute(text(
+        "INSERT INTO domain_erp.bank_accounts (id, tenant_id, account_number) VALUES (:id, :t, :n)"
+    ), {"id": bank_account_id, "t": TENANT_ID, "n": f"BENCH-{statement_id}"})
+    start_date = date(2025, 1, 1)
+    db.execute(text(
+        "INSERT INTO domain_erp.bank_statement_lines "
+        "(id, tenant_id, statement_id, booking_date, amount, reference, remittance_info, status) "
+        "VALUES (:id, :t, :s, :d, :a, :r, :info, 'UNMATCHED')"
+    ), [
+        {
+            "id": f"{statement_id}-L{i}", "t": TENANT_ID, "s": statement_id,
+            "d": start_date + timedelta(days=i % 28), "a": 10 + (i % 5000) / 100,
+            "r": f"REF{i}", "info": f"Zahlung {i}",
+        }
+        for i in range(lines)
+    ])
+    db.commit()
+    return statement_id, bank_account_id
+
+
+def run(db, lines: int) -> None:
+    statement_id, bank_account_id = seed(db, lines)
+
+    start = time.perf_counter()
+    differences = find_differences(db, statement_id, bank_account_id, TENANT_ID)
+    t_diff = time.perf_counter() - start
+
+    suggestions = [
+        {
+            "description": d["description"],
+            "date": d["date"],
+            "account_debit": BANK_ACCOUNT_NUMBER,
+            "account_credit": d["suggested_account"],
+            "amount": d["amount"],
+            "statement_line_id": d["statement_line_id"],
+        }
+        for d in differences
+        if d["item_type"] == "UNMATCHED_STATEMENT"
+    ]
+    start = time.perf_counter()
+    accounts = resolve_accounts(db, TENANT_ID, [BANK_ACCOUNT_NUMBER, DEFAULT_COUNTER_ACCOUNT])
+    plan = plan_bookings(suggestions, accounts, TENANT_ID, datetime.now())
+    apply_booking_plan(db, plan, TENANT_ID)
+    db.commit()
+    t_book = time.perf_counter() - start
+
+    print(f"differences  {len(differences):>7,} items  {t_diff * 1000:9.1f} ms")
+    print(f"auto-booking {len(plan.entries):>7,} entries {t_book * 1000:9.1f} ms "
+          f"({len(plan.lines):,} lines, {len(plan.skipped)} skipped)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=10_000)
+    parser.add_argument("--sqlite", action="store_true", help="Use an in-memory SQLite database")
+    args = parser.parse_args()
+
+    if args.sqlite:
+        db = _sqlite_session()
+    else:
+        from app.core.database import SessionLocal
+
+        db = SessionLocal()
+    try:
+        run(db, args.lines)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Benchmark: Bestellvorschlag data gathering
+
+Seeds N articles (about a third below minimum stock) and M stock movements
+over the last year, then runs the workflow's ``analyze_stock`` and
+``check_history`` nodes: keyset pages of articles, one aggregated movement
+query per chunk, chunks with bounded concurrency. For comparison a sample of
+articles is queried one by one (the previous per-article path) and
+extrapolated.
+
+Runs against PostgreSQL by default; ``--sqlite`` uses a temporary file
+database (the chunks need separate connections).
+
+Usage:
+    python scripts/benchmarks/bench_bestellvorschlag.py --articles 100000 --movements 10000000
+    python scripts/benchmarks/bench_bestellvorschlag.py --articles 100000 --movements 10000000 --sqlite
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from sqlalchemy import create_engine, event, text  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.agents.workflows import bestellvorschlag  # noqa: E402
+from app.core.dependency_container import container  # noqa: E402
+from app.infrastructure.models import Article, StockMovement  # noqa: E402
+from app.infrastructure.repositories import ArticleRepository, StockMovementRepository  # noqa: E402
+from app.infrastructure.repositories.implementations import (  # noqa: E402
+    ArticleRepositoryImpl,
+    StockMovementRepositoryImpl,
+)
+
+TENANT_ID = "bench-bestellvorschlag"
+
+# Articles and movements are generated in SQL; 10M rows through executemany would dominate the run
+SEED_SQLITE = [
+    """
+    INSERT INTO domain_inventory.articles (id, article_number, name, unit, category, sales_price,
+        purchase_price, min_stock, current_stock, tenant_id, is_active)
+    WITH RECURSIVE g(n) AS (SELECT 0 UNION ALL SELECT n + 1 FROM g WHERE n + 1 < :articles)
+    SELECT printf('bench-art-%07d', n), printf('B%07d', n), 'Artikel ' || n, 'Stk', 'Dünger', 5, 3,
+           50, (n * 7919) % 150, :tenant_id, 1
+    FROM g
+    """,
+    """
+    INSERT INTO domain_inventory.inventory_stock_movements (id, article_id, warehouse_id, movement_type,
+        quantity, previous_stock, new_stock, tenant_id, created_at)
+    WITH RECURSIVE g(n) AS (SELECT 0 UNION ALL SELECT n + 1 FROM g WHERE n + 1 < :movements)
+    SELECT 'bench-mov-' || n, printf('bench-art-%07d', (n * 2654435761) % :articles), 'w1',
+           CASE WHEN n % 3 = 0 THEN 'in' ELSE 'out' END,
+           CASE WHEN n % 3 = 0 THEN 20 ELSE -(1 + n % 9) END, 0, 0, :tenant_id,
+           datetime(:now, '-' || ((n * 40503) % 365) || ' days')
+    FROM g
+    """,
+]
+
+SEED_POSTGRES = [
+    """
+    INSERT INTO domain_inventory.articles (id, article_number, name, unit, category, sales_price,
+        purchase_price, min_stock, current_stock, tenant_id, is_active)
+    SELECT 'bench-art-' || lpad(n::text, 7, '0'), 'B' || lpad(n::text, 7, '0'), 'Artikel ' || n, 'Stk',
+           'Dünger', 5, 3, 50, (n * 7919) % 150, :tenant_id, true
+    FROM generate_series(0, :articles - 1) AS n
+    """,
+    """
+    INSERT INTO domain_inventory.inventory_stock_movements (id, article_id, warehouse_id, movement_type,
+        quantity, previous_stock, new_stock, tenant_id, created_at)
+    SELECT 'bench-mov-' || n, 'bench-art-' || lpad(((n * 2654435761) % :articles)::text, 7, '0'), :warehouse_id,
+           CASE WHEN n % 3 = 0 THEN 'in' ELSE 'out' END,
+           CASE WHEN n % 3 = 0 THEN 20 ELSE -(1 + n % 9) END, 0, 0, :tenant_id,
+           :now - make_interval(days => ((n * 40503) % 365)::int)
+    FROM generate_series(0, :movements - 1) AS n
+    """,
+]
+
+
+def _sqlite_engine():
+    directory = Path(tempfile.mkdtemp(prefix="bench-bestellvorschlag-"))
+    engine = create_engine(f"sqlite:///{directory / 'main.db'}")
+
+    @event.listens_for(engine, "connect")
+    def _attach(dbapi_conn, _):
+        dbapi_conn.execute(f"ATTACH DATABASE '{directory / 'inventory.db'}' AS domain_inventory")
+
+    Article.__table__.create(engine)
+    StockMovement.__table__.create(engine)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE INDEX domain_inventory.ix_movements_article "
+            "ON inventory_stock_movements (tenant_id, article_id, created_at)"
+        ))
+    return engine
+
+
+def seed(engine, articles: int, movements: int, warehouse_id: str) -> None:
+    statements = SEED_SQLITE if engine.dialect.name == "sqlite" else SEED_POSTGRES
+    now = datetime.utcnow()
+    params = {
+        "tenant_id": TENANT_ID, "articles": articles, "movements": movements, "warehouse_id": warehouse_id,
+        "now": now.strftime("%Y-%m-%d %H:%M:%S") if engine.dialect.name == "sqlite" else now,
+    }
+    with engine.begin() as conn:
+        for statement in statements:
+            conn.execute(text(statement), params)
+
+
+async def run(engine, args) -> None:
+    Session = sessionmaker(bind=engine)
+    container.register_factory(ArticleRepository, lambda: ArticleRepositoryImpl(Session()))
+    container.register_factory(StockMovementRepository, lambda: StockMovementRepositoryImpl(Session()))
+    bestellvorschlag.HISTORY_CONCURRENCY = args.concurrency
+
+    statements = [0]
+    event.listen(engine, "before_cursor_execute", lambda *a: statements.__setitem__(0, statements[0] + 1))
+
+    state = {"tenant_id": TENANT_ID, "low_stock_articles": [], "sales_history": []}
+    start = time.perf_counter()
+    state = await bestellvorschlag.analyze_stock_levels(state)
+    t_stock = time.perf_counter() - start
+    stock_statements = statements[0]
+
+    start = time.perf_counter()
+    state = await bestellvorschlag.check_sales_history(state)
+    t_history = time.perf_counter() - start
+    history_statements = statements[0] - stock_statements
+
+    # Previous path: one movement query per low stock article
+    sample = [a["article_id"] for a in state["low_stock_articles"][:args.sample]]
+    since = datetime.utcnow() - timedelta(days=365)
+    start = time.perf_counter()
+    with Session() as db:
+        for article_id in sample:
+            db.query(StockMovement).filter(
+                StockMovement.tenant_id == TENANT_ID,
+                StockMovement.article_id == article_id,
+                StockMovement.created_at >= since,
+            ).limit(1000).all()
+    t_single = time.perf_counter() - start
+
+    low_stock = len(state["low_stock_articles"])
+    print(f"analyze_stock    {low_stock:,} low stock articles in {t_stock:.2f} s ({stock_statements} statements)")
+    print(f"check_history    {len(state['sales_history']):,} histories in {t_history:.2f} s "
+          f"({history_statements} statements, concurrency {args.concurrency})")
+    print(f"per-article path {len(sample):,} in {t_single:.2f} s, "
+          f"~{low_stock * t_single / max(len(sample), 1):.1f} s for all")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=100_000)
+    parser.add_argument("--movements", type=int, default=10_000_000)
+    parser.add_argument("--concurrency", type=int, default=bestellvorschlag.HISTORY_CONCURRENCY)
+    parser.add_argument("--sample", type=int, default=500)
+    parser.add_argument("--warehouse-id", default="bench-warehouse",
+                        help="Existing warehouse id (PostgreSQL enforces the foreign key)")
+    parser.add_argument("--sqlite", action="store_true", help="Use a temporary SQLite file database")
+    args = parser.parse_args()
+
+    if args.sqlite:
+        engine = _sqlite_engine()
+    else:
+        from app.core.database import engine
+
+    start = time.perf_counter()
+    seed(engine, args.articles, args.movements, args.warehouse_id)
+    print(f"seeded {args.articles:,} articles / {args.movements:,} movements in {time.perf_counter() - start:.1f} s")
+    asyncio.run(run(engine, args))
+
+
+if __name__ == "__main__":
+    main()
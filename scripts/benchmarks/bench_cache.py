@@ -0,0 +1,74 @@
+"""
+Microbenchmark: app.core.cache.TTLCache
+
+Misst get/set-Durchsatz (ops/s) und Speicher pro Eintrag.
+
+Usage:
+    python scripts/benchmarks/bench_cache.py [--entries 100000]
+"""
+
+import argparse
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from app.core.cache import TTLCache  # noqa: E402
+
+
+def _rate(ops: int, seconds: float) -> str:
+    return f"{ops / seconds:,.0f} ops/s"
+
+
+def bench_throughput(entries: int) -> None:
+    cache = TTLCache("bench", max_entries=entries, default_ttl=3600)
+    keys = [f"key-{i}" for i in range(entries)]
+    value = {"valid": True, "bank_name": "Testbank", "bic": "TESTDEFFXXX"}
+
+    start = time.perf_counter()
+    for key in keys:
+        cache.set(key, value)
+    print(f"set (fill)        {_rate(entries, time.perf_counter() - start)}")
+
+    lookups = [random.choice(keys) for _ in range(entries)]
+    start = time.perf_counter()
+    for key in lookups:
+        cache.get(key)
+    print(f"get (hit)         {_rate(entries, time.perf_counter() - start)}")
+
+    start = time.perf_counter()
+    for i in range(entries):
+        cache.set(f"overflow-{i}", value)
+    print(f"set (evicting)    {_rate(entries, time.perf_counter() - start)}")
+    print(f"evictions         {cache.stats.evictions:,}")
+
+
+def bench_memory(entries: int) -> None:
+    value = {"valid": True, "bank_name": "Testbank", "bic": "TESTDEFFXXX"}
+    for label, kwargs in (("count-bound", {}), ("byte-bound", {"max_bytes": 1 << 40})):
+        gc.collect()
+        tracemalloc.start()
+        cache = TTLCache(f"bench_mem_{label}", max_entries=entries, default_ttl=3600, **kwargs)
+        before = tracemalloc.get_traced_memory()[0]
+        for i in range(entries):
+            cache.set(i, value)
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"memory/entry ({label:11}) {(after - before) / entries:,.0f} B (overhead, value shared)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=100_000)
+    args = parser.parse_args()
+
+    bench_throughput(args.entries)
+    bench_memory(args.entries)
+
+
+if __name__ == "__main__":
+    main()
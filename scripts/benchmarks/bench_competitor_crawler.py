@@ -0,0 +1,105 @@
+"""
+Benchmark: competitor price crawler, pages per minute
+
+Starts ``--shops`` local fixture shops (recorded product pages from
+``tests/fixtures/competitor_shops``, one port per shop, ``--latency`` seconds
+per response) and scrapes ``--pages`` product pages per shop with
+
+- the former approach: one blocking ``requests.Session``, pages one after
+  another, parsing and image download on the event loop;
+- ``CompetitorMonitor`` with the ``PoliteCrawler`` (``--per-host``
+  concurrent requests and ``--delay`` seconds between request starts per
+  shop), cold and then warm (conditional GETs answered with 304, nothing is
+  parsed again).
+
+Usage:
+    python scripts/benchmarks/bench_competitor_crawler.py --shops 8 --pages 200
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from contextlib import ExitStack
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from app.services.competitor_monitor import CompetitorMonitor  # noqa: E402
+from app.services.crawler import PoliteCrawler  # noqa: E402
+from tests.fixtures.shop_server import FixtureShopServer  # noqa: E402
+
+PAGES = ("jsonld_product", "html_product")
+
+
+def shop_config(server: FixtureShopServer, n: int) -> dict:
+    return {
+        "name": f"Shop {n}",
+        "base_url": server.url(""),
+        "search_url": server.url("/suche"),
+        "categories": ["duenger", "saatgut"],
+        "selectors": {"product_link": ".product-link", "price": ".price", "image": ".product-image img",
+                      "name": ".product-name"},
+    }
+
+
+def serial_baseline(monitor: CompetitorMonitor, urls: list) -> int:
+    # Bisheriger Ablauf: ein Request nach dem anderen, Parsen und Bild-Download inline
+    session = requests.Session()
+    found = 0
+    for url in urls:
+        response = session.get(url, timeout=10)
+        response.raise_for_status()
+        price = monitor._parse_page(response.text, url, monitor._get_shop_config(url))
+        for image in price.images if price else []:
+            session.get(image.url, timeout=5).content
+        found += price is not None
+    return found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shops", type=int, default=8)
+    parser.add_argument("--pages", type=int, default=200, help="product pages per shop")
+    parser.add_argument("--latency", type=float, default=0.05, help="server response time in seconds")
+    parser.add_argument("--delay", type=float, default=0.1, help="seconds between request starts per shop")
+    parser.add_argument("--per-host", type=int, default=2)
+    parser.add_argument("--baseline-pages", type=int, default=40, help="pages per shop for the serial run")
+    args = parser.parse_args()
+
+    with ExitStack() as stack:
+        servers = [stack.enter_context(FixtureShopServer(latency=args.latency)) for _ in range(args.shops)]
+        shops = {f"shop{n}": shop_config(server, n) for n, server in enumerate(servers)}
+        urls = [server.url(f"/produkt/{PAGES[n % 2]}/{n}") for n in range(args.pages) for server in servers]
+
+        monitor = CompetitorMonitor(shops=shops, crawler=PoliteCrawler(
+            per_host=args.per_host, delay=args.delay, concurrency=max(32, args.shops * args.per_host)))
+
+        baseline_urls = [server.url(f"/produkt/{PAGES[n % 2]}/{n}") for n in range(args.baseline_pages)
+                         for server in servers]
+        start = time.perf_counter()
+        found = serial_baseline(monitor, baseline_urls)
+        elapsed = time.perf_counter() - start
+        print(f"{'serial requests':<22} {found:6d} pages {elapsed:8.2f} s {found / elapsed * 60:10.0f} pages/min")
+
+        async def run():
+            for label in ("crawler cold", "crawler warm (304)"):
+                before = dict(monitor.crawler.stats)
+                start = time.perf_counter()
+                prices = await monitor.scrape_products(urls)
+                elapsed = time.perf_counter() - start
+                stats = {key: value - before.get(key, 0) for key, value in monitor.crawler.stats.items()}
+                print(f"{label:<22} {len(prices):6d} pages {elapsed:8.2f} s {len(prices) / elapsed * 60:10.0f} pages/min"
+                      f"  requests={stats.get('requests', 0)} parsed={stats.get('parsed', 0)}"
+                      f" not_modified={stats.get('not_modified', 0)}")
+            await monitor.crawler.close()
+
+        asyncio.run(run())
+        lower_bound = args.pages * args.delay
+        print(f"politeness floor: {args.pages} pages per shop x {args.delay} s = {lower_bound:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
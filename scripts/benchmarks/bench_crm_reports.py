@@ -0,0 +1,174 @@
+"""
+Benchmark: CRM daily and weekly reports
+
+Seeds R sales reps with A completed activities and A visit reports each on
+the report day (every one with its own customer and contact) and times the
+daily and weekly report generation: a fixed set of joined and grouped
+queries per chunk of reps, chunks on a thread pool. For comparison the
+previous per-item path (one customer and one contact lookup per activity and
+visit) is timed on a sample and extrapolated.
+
+Runs against PostgreSQL by default; ``--sqlite`` uses a temporary file
+database (the chunks need separate connections).
+
+Usage:
+    python scripts/benchmarks/bench_crm_reports.py --reps 200 --activities 50
+    python scripts/benchmarks/bench_crm_reports.py --reps 200 --activities 50 --sqlite
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.dialects.postgresql import JSONB  # noqa: E402
+from sqlalchemy.ext.compiler import compiles  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.domains.crm.models import Activity, Contact, Customer, VisitReport  # noqa: E402
+from app.domains.crm.services import report_data  # noqa: E402
+from app.domains.crm.services.daily_report_service import DailyReportService  # noqa: E402
+from app.domains.crm.services.weekly_report_service import WeeklyReportService  # noqa: E402
+from app.infrastructure.models import User  # noqa: E402
+
+REPORT_DAY = datetime(2025, 3, 12)
+WEEK_START = datetime(2025, 3, 10)
+BATCH = 20_000
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+def _sqlite_engine():
+    directory = Path(tempfile.mkdtemp(prefix="bench-crm-reports-"))
+    engine = create_engine(f"sqlite:///{directory / 'main.db'}")
+
+    @event.listens_for(engine, "connect")
+    def _attach(dbapi_conn, _):
+        dbapi_conn.execute(f"ATTACH DATABASE '{directory / 'crm.db'}' AS domain_crm")
+        dbapi_conn.execute(f"ATTACH DATABASE '{directory / 'shared.db'}' AS domain_shared")
+
+    for model in (User, Customer, Contact, Activity, VisitReport):
+        model.__table__.create(engine)
+    return engine
+
+
+def _insert(conn, table, rows) -> None:
+    for start in range(0, len(rows), BATCH):
+        conn.execute(table.insert(), rows[start:start + BATCH])
+
+
+def seed(engine, reps: int, activities: int, tenant_id: str) -> None:
+    users, customers, contacts, activity_rows, visit_rows = [], [], [], [], []
+    for r in range(reps):
+        rep_id = f"bench-rep-{r:05d}"
+        users.append({
+            "id": rep_id, "username": rep_id, "email": f"{rep_id}@bench.local", "first_name": "Rep",
+            "last_name": str(r), "roles": json.dumps(["field_sales"]), "tenant_id": tenant_id, "is_active": True,
+        })
+        for i in range(activities):
+            key = f"{r:05d}-{i:05d}"
+            at = REPORT_DAY + timedelta(minutes=5 * i)
+            customers.append({
+                "id": f"bench-cust-{key}", "customer_number": f"BC{key}", "company_name": f"Kunde {key}",
+                "last_name": "Bench", "street": "Feldweg 1", "postal_code": "12345", "city": "Celle",
+                "tenant_id": tenant_id,
+            })
+            contacts.append({
+                "id": f"bench-cont-{key}", "customer_id": f"bench-cust-{key}", "first_name": "Eva",
+                "last_name": key, "email": f"{key}@bench.local", "tenant_id": tenant_id,
+            })
+            activity_rows.append({
+                "id": f"bench-act-{key}", "customer_id": f"bench-cust-{key}", "contact_id": f"bench-cont-{key}",
+                "activity_type": ("call", "visit", "email")[i % 3], "subject": f"Termin {i}",
+                "activity_date": at, "duration_minutes": 20, "assigned_to": rep_id, "status": "completed",
+                "next_action_description": "Nachfassen", "next_action_date": at + timedelta(days=2),
+                "tenant_id": tenant_id,
+            })
+            visit_rows.append({
+                "id": f"bench-visit-{key}", "customer_id": f"bench-cust-{key}", "contact_person": f"bench-cont-{key}",
+                "visit_date": at, "sales_rep": rep_id, "kilometers_driven": 14, "main_topics": ["Saatgut"],
+                "orders_placed": ["A-1"] if i % 4 == 0 else [], "quotes_created": ["Q-1"],
+                "customer_feedback": "zufrieden", "tenant_id": tenant_id,
+            })
+    with engine.begin() as conn:
+        _insert(conn, User.__table__, users)
+        _insert(conn, Customer.__table__, customers)
+        _insert(conn, Contact.__table__, contacts)
+        _insert(conn, Activity.__table__, activity_rows)
+        _insert(conn, VisitReport.__table__, visit_rows)
+
+
+def _timed(label: str, fn, statements):
+    statements[0] = 0
+    start = time.perf_counter()
+    result = fn()
+    print(f"{label:<28} {(time.perf_counter() - start) * 1000:9.1f} ms  {statements[0]:>7,} statements  {result}")
+
+
+def previous_path(Session, sample: int) -> int:
+    """One customer and one contact lookup per activity and visit, as before."""
+    with Session() as db:
+        rows = db.query(Activity).filter(Activity.status == "completed").limit(sample).all()
+        for activity in rows:
+            db.query(Customer).filter(Customer.id == activity.customer_id).first()
+            db.query(Contact).filter(Contact.id == activity.contact_id).first()
+        return len(rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reps", type=int, default=200)
+    parser.add_argument("--activities", type=int, default=50, help="Activities and visits per rep")
+    parser.add_argument("--workers", type=int, default=report_data.REPORT_WORKERS)
+    parser.add_argument("--chunk-size", type=int, default=report_data.REP_CHUNK_SIZE)
+    parser.add_argument("--sample", type=int, default=1000)
+    parser.add_argument("--tenant-id", default="bench-tenant",
+                        help="Existing tenant id (PostgreSQL enforces the foreign key)")
+    parser.add_argument("--sqlite", action="store_true", help="Use a temporary SQLite file database")
+    args = parser.parse_args()
+
+    if args.sqlite:
+        engine = _sqlite_engine()
+    else:
+        from app.core.database import engine
+
+    report_data.REPORT_WORKERS = args.workers
+    report_data.REP_CHUNK_SIZE = args.chunk_size
+
+    start = time.perf_counter()
+    seed(engine, args.reps, args.activities, args.tenant_id)
+    total = args.reps * args.activities
+    print(f"seeded {args.reps:,} reps / {total:,} activities and visits in {time.perf_counter() - start:.1f} s")
+
+    Session = sessionmaker(bind=engine)
+    statements = [0]
+    event.listen(engine, "before_cursor_execute", lambda *a: statements.__setitem__(0, statements[0] + 1))
+
+    with Session() as db:
+        _timed("daily (sequential)",
+               lambda: f"{len(DailyReportService(db).generate_daily_reports(REPORT_DAY)):,} reports", statements)
+        _timed("daily (thread pool)", lambda: "{:,} reports".format(len(
+            DailyReportService(db, session_factory=Session).generate_daily_reports(REPORT_DAY))), statements)
+        _timed("weekly (thread pool)", lambda: "{:,} reports".format(len(
+            WeeklyReportService(db, session_factory=Session).generate_weekly_reports(WEEK_START))), statements)
+
+    statements[0] = 0
+    start = time.perf_counter()
+    sampled = previous_path(Session, args.sample)
+    elapsed = time.perf_counter() - start
+    per_item = elapsed / max(sampled, 1)
+    print(f"{'per-item lookups (before)':<28} {elapsed * 1000:9.1f} ms  {statements[0]:>7,} statements  "
+          f"{sampled:,} sampled, ~{per_item * 2 * total:.1f} s for activities and visits")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Benchmark: customer search and deep pagination
+
+Seeds N customers (company names from a small vocabulary plus a number,
+contact persons from first/last names) and measures through
+``CustomerRepositoryImpl``:
+
+* p50/p95 latency of first-page searches (ranked, with estimated total)
+  for a mix of whole words, fragments and misses
+* latency of page 1000 reached by keyset cursor versus OFFSET
+* estimated versus exact total
+
+Runs against PostgreSQL by default (indexes from alembic revision
+``crm_customer_search``); ``--sqlite`` uses a temporary file database, where
+there is no trigram index and searches scan.
+
+Usage:
+    python scripts/benchmarks/bench_customer_search.py --customers 5000000
+    python scripts/benchmarks/bench_customer_search.py --customers 500000 --sqlite
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from sqlalchemy import create_engine, event, text  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.infrastructure.models import Customer  # noqa: E402
+from app.infrastructure.repositories.implementations import CustomerRepositoryImpl  # noqa: E402
+
+PREFIXES = ["Agrar", "Raiffeisen", "Landhandel", "Hof", "Mühle", "Gärtnerei", "Lohnunternehmen",
+            "Milchhof", "Saatzucht", "Forst", "Baumschule", "Landtechnik"]
+PLACES = ["Celle", "Uelzen", "Vechta", "Cloppenburg", "Soltau", "Verden", "Rotenburg", "Diepholz",
+          "Nienburg", "Stade", "Lüneburg", "Gifhorn", "Peine", "Emsland", "Oldenburg"]
+FIRST = ["Anna", "Bernd", "Clara", "Dieter", "Eva", "Frank", "Gerda", "Hans", "Ilse", "Jens"]
+LAST = ["Meyer", "Schulze", "Müller", "Bruns", "Lange", "Hinrichs", "Wessels", "Köhler", "Brandt", "Ahrens"]
+TERMS = ["raiffeisen", "mühle vechta", "hof 1234", "landtech", "saatzucht st", "meyer", "hinrichs",
+         "gärtnerei lüne", "forst 99", "milchhof cloppenburg", "xylophon"]
+
+
+def _sql_array(words):
+    return "ARRAY[" + ", ".join(f"'{w}'" for w in words) + "]"
+
+
+def _json_array(words):
+    return "'[" + ", ".join(f'"{w}"' for w in words) + "]'"
+
+
+SEED_POSTGRES = f"""
+    INSERT INTO domain_crm.customers (id, customer_number, company_name, contact_person, tenant_id, is_active)
+    SELECT 'bench-cust-' || n, 'K' || lpad(n::text, 8, '0'),
+           ({_sql_array(PREFIXES)})[1 + n % {len(PREFIXES)}] || ' '
+               || ({_sql_array(PLACES)})[1 + (n / 7) % {len(PLACES)}] || ' ' || (n % 10000),
+           ({_sql_array(FIRST)})[1 + (n / 3) % {len(FIRST)}] || ' ' || ({_sql_array(LAST)})[1 + (n / 11) % {len(LAST)}],
+           :tenant_id, true
+    FROM generate_series(0, :customers - 1) AS n
+"""
+
+SEED_SQLITE = f"""
+    INSERT INTO domain_crm.customers (id, customer_number, company_name, contact_person, tenant_id, is_active)
+    WITH RECURSIVE g(n) AS (SELECT 0 UNION ALL SELECT n + 1 FROM g WHERE n + 1 < :customers)
+    SELECT 'bench-cust-' || n, printf('K%08d', n),
+           json_extract({_json_array(PREFIXES)}, '$[' || (n % {len(PREFIXES)}) || ']') || ' '
+               || json_extract({_json_array(PLACES)}, '$[' || ((n / 7) % {len(PLACES)}) || ']') || ' ' || (n % 10000),
+           json_extract({_json_array(FIRST)}, '$[' || ((n / 3) % {len(FIRST)}) || ']') || ' '
+               || json_extract({_json_array(LAST)}, '$[' || ((n / 11) % {len(LAST)}) || ']'),
+           :tenant_id, 1
+    FROM g
+"""
+
+
+def _sqlite_engine():
+    directory = Path(tempfile.mkdtemp(prefix="bench-customer-search-"))
+    engine = create_engine(f"sqlite:///{directory / 'main.db'}")
+
+    @event.listens_for(engine, "connect")
+    def _attach(dbapi_conn, _):
+        dbapi_conn.execute(f"ATTACH DATABASE '{directory / 'crm.db'}' AS domain_crm")
+
+    Customer.__table__.create(engine)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE INDEX domain_crm.ix_customers_tenant_name_id ON customers (tenant_id, company_name, id)"
+        ))
+    return engine
+
+
+def seed(engine, customers: int, tenant_id: str) -> None:
+    sql = SEED_SQLITE if engine.dialect.name == "sqlite" else SEED_POSTGRES
+    with engine.begin() as conn:
+        conn.execute(text(sql), {"customers": customers, "tenant_id": tenant_id})
+        if engine.dialect.name == "postgresql":
+            conn.execute(text("ANALYZE domain_crm.customers"))
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:8.1f} ms"
+
+
+def _percentiles(samples):
+    ordered = sorted(samples)
+    return statistics.median(ordered), ordered[max(0, int(len(ordered) * 0.95) - 1)]
+
+
+def run(repo: CustomerRepositoryImpl, tenant_id: str, args) -> None:
+    rng = random.Random(7)
+
+    latencies = []
+    for _ in range(args.searches):
+        term = rng.choice(TERMS)
+        start = time.perf_counter()
+        asyncio.run(repo.search_page(tenant_id, search=term, limit=args.limit))
+        latencies.append(time.perf_counter() - start)
+    p50, p95 = _percentiles(latencies)
+    print(f"search first page          p50 {_ms(p50)}  p95 {_ms(p95)}  ({args.searches} searches)")
+
+    # Walk to page 1000 by cursor; every page is one index range scan
+    cursor, page_latencies = None, []
+    for _ in range(args.pages):
+        start = time.perf_counter()
+        page = asyncio.run(repo.search_page(tenant_id, cursor=cursor, limit=args.limit))
+        page_latencies.append(time.perf_counter() - start)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    p50, p95 = _percentiles(page_latencies[1:] or page_latencies)
+    print(f"keyset pages 2..{len(page_latencies):<10} p50 {_ms(p50)}  p95 {_ms(p95)}  "
+          f"page {len(page_latencies)}: {_ms(page_latencies[-1])}")
+
+    offset_latencies = []
+    for _ in range(3):
+        start = time.perf_counter()
+        asyncio.run(repo.get_all(tenant_id, skip=(args.pages - 1) * args.limit, limit=args.limit))
+        offset_latencies.append(time.perf_counter() - start)
+    print(f"offset page {args.pages:<14} median {_ms(statistics.median(offset_latencies))}")
+
+    for term in (None, "raiffeisen"):
+        start = time.perf_counter()
+        estimate = asyncio.run(repo.count(tenant_id, search=term, exact=False))
+        t_estimate = time.perf_counter() - start
+        start = time.perf_counter()
+        exact = asyncio.run(repo.count(tenant_id, search=term))
+        t_exact = time.perf_counter() - start
+        print(f"count {term or '(all)':<20} estimate {estimate:>10,} in {_ms(t_estimate)}   "
+              f"exact {exact:>10,} in {_ms(t_exact)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--customers", type=int, default=5_000_000)
+    parser.add_argument("--searches", type=int, default=200)
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--tenant-id", default="bench-tenant",
+                        help="Existing tenant id (PostgreSQL enforces the foreign key)")
+    parser.add_argument("--sqlite", action="store_true", help="Use a temporary SQLite file database")
+    args = parser.parse_args()
+
+    if args.sqlite:
+        engine = _sqlite_engine()
+    else:
+        from app.core.database import engine
+
+    start = time.perf_counter()
+    seed(engine, args.customers, args.tenant_id)
+    print(f"seeded {args.customers:,} customers in {time.perf_counter() - start:.1f} s")
+
+    session = sessionmaker(bind=engine)()
+    try:
+        run(CustomerRepositoryImpl(session), args.tenant_id, args)
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark: local document classifier (AI service) throughput and accuracy
+
+Trains the classifier of ``services/ai`` on ``--train`` synthetic labelled
+documents (invoices, delivery notes, order and complaint mails, lab reports,
+certificates, field records, general mail; shortened, forwarded and with OCR
+noise) and evaluates on ``--holdout`` documents from a different seed.
+Reports training time, held-out accuracy and recall per label, and
+documents/second for batch sizes 1 to ``--max-batch``. For comparison the
+former keyword rules of ``/classify/text`` run on the same held-out set.
+
+Usage:
+    python scripts/benchmarks/bench_document_classifier.py --train 20000 --holdout 5000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Der AI-Service ist ein eigenes Projekt mit eigenem ``app``-Paket
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "services" / "ai"))
+
+from app.services import document_classifier  # noqa: E402
+from app.services.classifier_samples import synthetic_documents  # noqa: E402
+
+
+def keyword_label(text: str) -> str:
+    # Bisherige Regeln aus classify_text
+    text_lower = text.lower()
+    if any(word in text_lower for word in ["bestellung", "order", "bestell"]):
+        return "purchase_order"
+    if any(word in text_lower for word in ["reklamation", "complaint", "problem"]):
+        return "complaint"
+    return "general"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--train", type=int, default=20_000)
+    parser.add_argument("--holdout", type=int, default=5_000)
+    parser.add_argument("--epochs", type=int, default=40)
+    parser.add_argument("--max-batch", type=int, default=2048)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    texts, labels = map(list, zip(*synthetic_documents(args.train, args.seed)))
+    holdout_texts, holdout_labels = map(list, zip(*synthetic_documents(args.holdout, args.seed + 1000)))
+
+    start = time.perf_counter()
+    model = document_classifier.train(texts, labels, epochs=args.epochs)
+    print(f"trained on {len(texts):,} documents in {time.perf_counter() - start:.1f} s "
+          f"({model.metrics['features']:,} features, {len(model.labels)} labels)")
+
+    metrics = document_classifier.evaluate(model, holdout_texts, holdout_labels)
+    print(f"held-out accuracy {metrics['accuracy']:.4f} on {metrics['documents']:,} documents")
+    for label, recall in metrics["recall"].items():
+        print(f"  {label:<16} recall {recall:.4f}")
+
+    keyword = sum(keyword_label(text) == label for text, label in zip(holdout_texts, holdout_labels))
+    print(f"keyword rules accuracy {keyword / len(holdout_texts):.4f}")
+
+    print(f"{'batch':>6} {'docs/s':>10} {'ms/batch':>10}")
+    batch = 1
+    while batch <= args.max_batch:
+        rounds = max(1, min(200, 2000 // batch))
+        start = time.perf_counter()
+        for n in range(rounds):
+            offset = (n * batch) % max(1, len(holdout_texts) - batch)
+            model.predict(holdout_texts[offset:offset + batch])
+        elapsed = time.perf_counter() - start
+        print(f"{batch:6d} {rounds * batch / elapsed:10.0f} {elapsed / rounds * 1000:10.2f}")
+        batch *= 8 if batch < 512 else 4
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+Benchmark: document list latency before and after generated columns
+
+Seeds N JSON documents (sales orders with customerId, status and date; one
+in ten a purchase order with supplierId) and times, for each list query,
+the previous form (``data->>'field'`` filters, OFFSET paging, ordered by
+created_at) against ``DocumentRepository.list_page`` (generated, indexed
+columns, keyset cursor):
+
+* first page filtered by customer, by status and by date range
+* a deep page (page 1000) by OFFSET versus by cursor
+* save of an existing document: SELECT + UPDATE versus one upsert
+
+Runs against PostgreSQL by default (schema after alembic revision
+``documents_generated_columns``); ``--sqlite`` uses a temporary file database
+with equivalent generated columns and indexes.
+
+Usage:
+    python scripts/benchmarks/bench_documents.py --documents 10000000
+    python scripts/benchmarks/bench_documents.py --documents 1000000 --sqlite
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from sqlalchemy import create_engine, text  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.documents.repository import DocumentRepository  # noqa: E402
+
+CUSTOMERS = 50_000
+STATUSES = ["draft", "open", "confirmed", "delivered", "invoiced"]
+
+SEED_POSTGRES = f"""
+    INSERT INTO documents (id, doc_type, doc_number, data, created_at, updated_at)
+    SELECT 'bench-doc-' || n,
+           CASE WHEN n % 10 = 0 THEN 'purchase_order' ELSE 'sales_order' END,
+           'BENCH-' || n,
+           jsonb_build_object(
+               'number', 'BENCH-' || n,
+               'customerId', 'K' || (n % {CUSTOMERS}),
+               'supplierId', CASE WHEN n % 10 = 0 THEN 'L' || (n % 500) END,
+               'status', (ARRAY{STATUSES})[1 + n % {len(STATUSES)}],
+               'date', to_char(date '2020-01-01' + (n % 2000), 'YYYY-MM-DD'),
+               'total', n % 10000),
+           timestamptz '2020-01-01' + n * interval '1 second',
+           timestamptz '2020-01-01' + n * interval '1 second'
+    FROM generate_series(0, :documents - 1) AS n
+"""
+
+SEED_SQLITE = f"""
+    INSERT INTO documents (id, doc_type, doc_number, data, created_at, updated_at)
+    WITH RECURSIVE g(n) AS (SELECT 0 UNION ALL SELECT n + 1 FROM g WHERE n + 1 < :documents)
+    SELECT 'bench-doc-' || n,
+           CASE WHEN n % 10 = 0 THEN 'purchase_order' ELSE 'sales_order' END,
+           'BENCH-' || n,
+           json_object(
+               'number', 'BENCH-' || n,
+               'customerId', 'K' || (n % {CUSTOMERS}),
+               'supplierId', CASE WHEN n % 10 = 0 THEN 'L' || (n % 500) END,
+               'status', json_extract('{json.dumps(STATUSES)}', '$[' || (n % {len(STATUSES)}) || ']'),
+               'date', date('2020-01-01', '+' || (n % 2000) || ' days'),
+               'total', n % 10000),
+           strftime('%Y-%m-%d %H:%M:%S.000000', '2020-01-01', '+' || n || ' seconds'),
+           strftime('%Y-%m-%d %H:%M:%S.000000', '2020-01-01', '+' || n || ' seconds')
+    FROM g
+"""
+
+SQLITE_SCHEMA = [
+    """
+    CREATE TABLE documents (
+        id VARCHAR(36) PRIMARY KEY,
+        doc_type VARCHAR(50) NOT NULL,
+        doc_number VARCHAR(100) NOT NULL UNIQUE,
+        data JSON NOT NULL,
+        created_at TIMESTAMP,
+        updated_at TIMESTAMP,
+        customer_id TEXT GENERATED ALWAYS AS (json_extract(data, '$.customerId')) STORED,
+        supplier_id TEXT GENERATED ALWAYS AS (json_extract(data, '$.supplierId')) STORED,
+        status TEXT GENERATED ALWAYS AS (json_extract(data, '$.status')) STORED,
+        doc_date TEXT GENERATED ALWAYS AS (substr(json_extract(data, '$.date'), 1, 10)) STORED
+    )
+    """,
+    "CREATE INDEX ix_documents_type_created ON documents (doc_type, created_at DESC, id DESC)",
+    "CREATE INDEX ix_documents_type_status_created ON documents (doc_type, status, created_at DESC, id DESC)",
+    "CREATE INDEX ix_documents_type_customer_created ON documents (doc_type, customer_id, created_at DESC, id DESC)",
+    "CREATE INDEX ix_documents_type_supplier_created ON documents (doc_type, supplier_id, created_at DESC, id DESC)",
+    "CREATE INDEX ix_documents_type_date ON documents (doc_type, doc_date)",
+]
+
+
+def _json_field(dialect: str, field: str) -> str:
+    return f"data->>'{field}'" if dialect == "postgresql" else f"json_extract(data, '$.{field}')"
+
+
+def _sqlite_engine():
+    directory = Path(tempfile.mkdtemp(prefix="bench-documents-"))
+    engine = create_engine(f"sqlite:///{directory / 'main.db'}")
+    with engine.begin() as conn:
+        for statement in SQLITE_SCHEMA:
+            conn.execute(text(statement))
+    return engine
+
+
+def seed(engine, documents: int) -> None:
+    sql = SEED_SQLITE if engine.dialect.name == "sqlite" else SEED_POSTGRES
+    with engine.begin() as conn:
+        conn.execute(text(sql), {"documents": documents})
+        conn.execute(text("ANALYZE documents" if engine.dialect.name == "postgresql" else "ANALYZE"))
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:8.1f} ms"
+
+
+def _median(fn, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def previous_list(db, dialect: str, doc_type: str, filters: dict, skip: int, limit: int) -> list:
+    """List query as before the migration: JSON expressions and OFFSET."""
+    clauses, params = ["doc_type = :doc_type"], {"doc_type": doc_type, "skip": skip, "limit": limit}
+    for key, value in filters.items():
+        if key == "dateFrom":
+            clauses.append(f"{_json_field(dialect, 'date')} >= :{key}")
+        elif key == "dateTo":
+            clauses.append(f"{_json_field(dialect, 'date')} <= :{key}")
+        else:
+            clauses.append(f"{_json_field(dialect, key)} = :{key}")
+        params[key] = value
+    query = (f"SELECT data FROM documents WHERE {' AND '.join(clauses)} "
+             "ORDER BY created_at DESC LIMIT :limit OFFSET :skip")
+    return db.execute(text(query), params).fetchall()
+
+
+def previous_save(db, doc_type: str, doc_number: str, data: dict) -> None:
+    """SELECT followed by UPDATE, as save_document did before."""
+    existing = db.execute(text("SELECT id FROM documents WHERE doc_number = :doc_number"),
+                          {"doc_number": doc_number}).fetchone()
+    if existing:
+        db.execute(text("UPDATE documents SET data = :data WHERE doc_number = :doc_number"),
+                   {"data": json.dumps(data), "doc_number": doc_number})
+    db.commit()
+
+
+def run(db, args) -> None:
+    dialect = db.get_bind().dialect.name
+    repo = DocumentRepository(db)
+    cases = {
+        "customer": {"customerId": "K4711"},
+        "status": {"status": "open"},
+        "date range": {"dateFrom": "2024-06-01", "dateTo": "2024-06-07"},
+    }
+    print(f"{'first page':<22} {'before':>11} {'after':>11}")
+    for label, filters in cases.items():
+        before = _median(lambda: previous_list(db, dialect, "sales_order", filters, 0, args.limit), args.runs)
+        after = _median(lambda: repo.list_page("sales_order", args.limit, filters), args.runs)
+        print(f"{label:<22} {_ms(before)} {_ms(after)}")
+
+    skip = (args.pages - 1) * args.limit
+    before = _median(lambda: previous_list(db, dialect, "sales_order", {}, skip, args.limit), 3)
+    cursor = None
+    for _ in range(args.pages - 1):
+        _, cursor = repo.list_page("sales_order", args.limit, cursor=cursor)
+    after = _median(lambda: repo.list_page("sales_order", args.limit, cursor=cursor), args.runs)
+    print(f"{f'page {args.pages}':<22} {_ms(before)} {_ms(after)}")
+
+    data = {"customerId": "K1", "status": "confirmed", "date": "2024-06-01"}
+    before = _median(lambda: previous_save(db, "sales_order", "BENCH-1", data), args.runs)
+    after = _median(lambda: repo.save_document("sales_order", "BENCH-1", dict(data)), args.runs)
+    print(f"{'save existing':<22} {_ms(before)} {_ms(after)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=10_000_000)
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--sqlite", action="store_true", help="Use a temporary SQLite file database")
+    args = parser.parse_args()
+
+    if args.sqlite:
+        engine = _sqlite_engine()
+    else:
+        from app.core.database import engine
+
+    start = time.perf_counter()
+    seed(engine, args.documents)
+    print(f"seeded {args.documents:,} documents in {time.perf_counter() - start:.1f} s")
+
+    db = sessionmaker(bind=engine)()
+    try:
+        run(db, args)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
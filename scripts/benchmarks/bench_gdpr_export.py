@@ -0,0 +1,107 @@
+"""
+Benchmark: GDPR export (NDJSON stream and ZIP) for a subject with many audit-log rows
+
+Requires PostgreSQL with the VALEO schema (DATABASE_URL). Seeds a benchmark
+tenant/user plus N audit-log rows with generate_series, then measures wall
+time and peak Python heap while exporting.
+
+Usage:
+    python scripts/benchmarks/bench_gdpr_export.py --rows 5000000
+    python scripts/benchmarks/bench_gdpr_export.py --rows 5000000 --keep   # reuse seed data
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from sqlalchemy import text  # noqa: E402
+
+from app.core.database import SessionLocal  # noqa: E402
+from app.services import gdpr_export_service as gdpr_export  # noqa: E402
+
+TENANT_ID = "bench-gdpr-tenant"
+USER_ID = "bench-gdpr-user"
+
+
+def seed(rows: int) -> None:
+    with SessionLocal() as db:
+        existing = db.execute(
+            text("SELECT count(*) FROM domain_shared.audit_logs WHERE user_id = :u"), {"u": USER_ID}
+        ).scalar_one()
+        if existing >= rows:
+            print(f"seed: {existing:,} audit rows already present")
+            return
+        db.execute(text(
+            "INSERT INTO domain_shared.tenants (id, name, domain) VALUES (:t, 'Bench', 'bench.local') "
+            "ON CONFLICT (id) DO NOTHING"
+        ), {"t": TENANT_ID})
+        db.execute(text(
+            "INSERT INTO domain_shared.users (id, username, email, first_name, last_name, tenant_id) "
+            "VALUES (:u, 'bench-gdpr', 'bench-gdpr@example.com', 'Bench', 'User', :t) "
+            "ON CONFLICT (id) DO NOTHING"
+        ), {"u": USER_ID, "t": TENANT_ID})
+        start = time.perf_counter()
+        db.execute(text(
+            "INSERT INTO domain_shared.audit_logs "
+            "(id, timestamp, user_id, user_email, tenant_id, action, entity_type, entity_id, changes) "
+            "SELECT 'bench-' || g, now() - (g || ' seconds')::interval, :u, 'bench-gdpr@example.com', :t, "
+            "'update', 'customer', 'c-' || (g % 1000), jsonb_build_object('field', 'name', 'seq', g) "
+            "FROM generate_series(:from, :to) AS g"
+        ), {"u": USER_ID, "t": TENANT_ID, "from": existing + 1, "to": rows})
+        db.commit()
+        print(f"seed: inserted {rows - existing:,} rows in {time.perf_counter() - start:.1f}s")
+
+
+def cleanup() -> None:
+    with SessionLocal() as db:
+        db.execute(text("DELETE FROM domain_shared.audit_logs WHERE user_id = :u"), {"u": USER_ID})
+        db.execute(text("DELETE FROM domain_shared.users WHERE id = :u"), {"u": USER_ID})
+        db.commit()
+
+
+def measure(label: str, fn) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<8} {elapsed:8.1f}s  peak heap {peak / 1024 / 1024:8.1f} MiB  {result}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--keep", action="store_true", help="keep seeded rows after the run")
+    args = parser.parse_args()
+
+    seed(args.rows)
+
+    def ndjson():
+        with SessionLocal() as db:
+            total = 0
+            for line in gdpr_export.iter_ndjson(db, USER_ID, TENANT_ID):
+                total += len(line)
+            return f"{total / 1024 / 1024:,.0f} MiB written"
+
+    def zip_export():
+        with SessionLocal() as db, tempfile.TemporaryDirectory() as tmp:
+            target = Path(tmp) / "export.zip"
+            counts = gdpr_export.write_zip(db, USER_ID, TENANT_ID, target)
+            return f"{target.stat().st_size / 1024 / 1024:,.0f} MiB zip, rows={sum(counts.values()):,}"
+
+    try:
+        measure("ndjson", ndjson)
+        measure("zip", zip_export)
+    finally:
+        if not args.keep:
+            cleanup()
+
+
+if __name__ == "__main__":
+    main()
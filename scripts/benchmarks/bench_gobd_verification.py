@@ -0,0 +1,127 @@
+"""
+Benchmark: GoBD hash-chain verification
+
+Generates a synthetic chain of N entries (hashes stored as raw digests in a
+temporary file, entry fields derived from the position, like rows read from
+a database) and measures:
+
+* the previous sequential verification (json.dumps + SHA-256 per entry,
+  from genesis), timed on a sample and extrapolated
+* full verification with ChainVerifier across worker processes, which also
+  creates the signed checkpoints
+* incremental verification after appending M new entries (only entries after
+  the last checkpoint are re-hashed)
+
+Workers load their own intervals through a picklable loader, so nothing but
+interval bounds and results crosses process boundaries.
+
+Usage:
+    python scripts/benchmarks/bench_gobd_verification.py --entries 100000000 --new 1000000
+    python scripts/benchmarks/bench_gobd_verification.py --entries 2000000 --new 1000000 --workers 4
+"""
+
+import argparse
+import functools
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "packages" / "finance-shared" / "src"))
+
+from finance_shared.gobd.verification import ChainVerifier, entry_hash  # noqa: E402
+
+TENANT = "bench-tenant"
+DIGEST = 32
+WRITE_BATCH = 100_000
+
+
+def fields(i: int):
+    return (TENANT, "journal", f"J-{i}", "create", {"betrag": i % 100_000, "konto": "1200", "beleg": f"RE-{i}"},
+            f"user-{i % 50}")
+
+
+def load_records(path: str, start: int, end: int):
+    """Picklable loader: entries ``start``..``end`` with their stored hashes."""
+    with open(path, "rb") as handle:
+        handle.seek(start * DIGEST)
+        raw = handle.read((end - start) * DIGEST)
+    return [(*fields(start + n), raw[n * DIGEST:(n + 1) * DIGEST].hex()) for n in range(end - start)]
+
+
+def extend_chain(path: str, start: int, count: int) -> None:
+    """Appends ``count`` entries, chaining from the last stored hash."""
+    previous = load_records(path, start - 1, start)[0][-1] if start else None
+    with open(path, "ab") as handle:
+        for lo in range(start, start + count, WRITE_BATCH):
+            batch = bytearray()
+            for i in range(lo, min(lo + WRITE_BATCH, start + count)):
+                previous = entry_hash(*fields(i), previous)
+                batch += bytes.fromhex(previous)
+            handle.write(batch)
+
+
+def previous_verify(records, previous_hash):
+    """Sequential verification as before (json.dumps per entry)."""
+    for tenant_id, entity_type, entity_id, action, payload, user_id, stored in records:
+        hasher = hashlib.sha256()
+        if previous_hash:
+            hasher.update(previous_hash.encode("utf-8"))
+        hasher.update(json.dumps({
+            "tenant_id": tenant_id, "entity_type": entity_type, "entity_id": entity_id,
+            "action": action, "payload": payload, "user_id": user_id,
+        }, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+        if hasher.hexdigest() != stored:
+            raise RuntimeError("broken chain")
+        previous_hash = stored
+
+
+def _line(label: str, entries: int, seconds: float, note: str = "") -> None:
+    print(f"{label:<38} {entries:>13,} entries {seconds:9.1f} s {entries / seconds:>12,.0f}/s  {note}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=100_000_000)
+    parser.add_argument("--new", type=int, default=1_000_000, help="Entries appended before the incremental run")
+    parser.add_argument("--interval", type=int, default=100_000, help="Checkpoint interval")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--sample", type=int, default=500_000, help="Entries timed for the sequential baseline")
+    args = parser.parse_args()
+
+    path = str(Path(tempfile.mkdtemp(prefix="bench-gobd-")) / "chain.bin")
+    Path(path).touch()
+    start = time.perf_counter()
+    extend_chain(path, 0, args.entries)
+    print(f"generated {args.entries:,} entries in {time.perf_counter() - start:.1f} s")
+
+    sample = min(args.sample, args.entries)
+    start = time.perf_counter()
+    previous_verify(load_records(path, 0, sample), None)  # load included, as in the runs below
+    per_entry = (time.perf_counter() - start) / sample
+    _line("sequential from genesis (before)", args.entries, per_entry * args.entries, f"extrapolated from {sample:,}")
+
+    source = functools.partial(load_records, path)
+    verifier = ChainVerifier(b"bench-key", checkpoint_interval=args.interval, workers=args.workers)
+    start = time.perf_counter()
+    report = verifier.verify(source, args.entries)
+    _line(f"full, {args.workers} workers", args.entries, time.perf_counter() - start,
+          f"{len(report.new_checkpoints):,} checkpoints")
+    assert report.ok, report.reason
+    checkpoints = report.new_checkpoints
+
+    extend_chain(path, args.entries, args.new)
+    total = args.entries + args.new
+    start = time.perf_counter()
+    report = verifier.verify(source, total, checkpoints)
+    elapsed = time.perf_counter() - start
+    assert report.ok, report.reason
+    _line(f"incremental after {args.new:,} new", report.entries_checked, elapsed,
+          f"from entry {report.verified_from:,}, {len(report.new_checkpoints):,} new checkpoints")
+
+
+if __name__ == "__main__":
+    main()
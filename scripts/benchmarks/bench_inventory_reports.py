@@ -0,0 +1,188 @@
+"""
+Benchmark: inventory analytics reports
+
+Generates a synthetic catalogue of N articles with M stock movements spread
+over the last year, builds the per-article statistics and times the
+replenishment, slow-moving, turnover and inventory-value reports.
+
+For comparison the script also times fetching every active article row into
+Python, which is the lower bound of the previous per-article loops.
+
+Runs against PostgreSQL by default (tables from alembic revision
+``inventory_article_stats``); ``--sqlite`` uses an in-memory database with
+the same tables for a quick local check.
+
+Usage:
+    python scripts/benchmarks/bench_inventory_reports.py --articles 500000 --movements 2000000
+    python scripts/benchmarks/bench_inventory_reports.py --articles 500000 --movements 2000000 --sqlite
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from sqlalchemy import create_engine, event, text  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.domains.inventory.application.services.article_stats import refresh_article_stats  # noqa: E402
+from app.domains.inventory.application.services.inventory_service import InventoryService  # noqa: E402
+from app.domains.inventory.application.services.replenishment_service import ReplenishmentService  # noqa: E402
+
+TENANT_ID = "bench-inventory-tenant"
+CATEGORIES = ["Dünger", "Saatgut", "Futtermittel", "Pflanzenschutz", "Ersatzteile", "Schmierstoffe"]
+BATCH = 20_000
+
+SQLITE_SCHEMA = [
+    "CREATE TABLE domain_inventory.articles (id TEXT PRIMARY KEY, article_number TEXT, name TEXT, "
+    "unit TEXT, category TEXT, supplier_number TEXT, purchase_price NUMERIC, sales_price NUMERIC, "
+    "currency TEXT, min_stock NUMERIC, max_stock NUMERIC, current_stock NUMERIC, reserved_stock NUMERIC, "
+    "available_stock NUMERIC, tenant_id TEXT, is_active BOOLEAN)",
+    "CREATE TABLE domain_inventory.inventory_stock_movements (id TEXT PRIMARY KEY, article_id TEXT, "
+    "warehouse_id TEXT, movement_type TEXT, quantity NUMERIC, unit_cost NUMERIC, previous_stock NUMERIC, "
+    "new_stock NUMERIC, total_cost NUMERIC, tenant_id TEXT, created_at DATETIME)",
+    "CREATE TABLE domain_inventory.article_stock_stats (article_id TEXT PRIMARY KEY, tenant_id TEXT, "
+    "last_movement_at DATETIME, last_outbound_at DATETIME, outbound_qty_30d NUMERIC DEFAULT 0, "
+    "outbound_qty_90d NUMERIC DEFAULT 0, cogs_30d NUMERIC DEFAULT 0, cogs_90d NUMERIC DEFAULT 0, "
+    "movements_90d INTEGER DEFAULT 0, refreshed_at DATETIME)",
+    "CREATE INDEX domain_inventory.ix_article_stock_stats_tenant_refreshed "
+    "ON article_stock_stats (tenant_id, refreshed_at)",
+    "CREATE INDEX domain_inventory.ix_articles_tenant_active ON articles (tenant_id, is_active)",
+    "CREATE INDEX domain_inventory.ix_stock_movements_tenant_type_created "
+    "ON inventory_stock_movements (tenant_id, movement_type, created_at)",
+    "CREATE INDEX domain_inventory.ix_stock_movements_tenant_created_article "
+    "ON inventory_stock_movements (tenant_id, created_at, article_id)",
+]
+
+
+def _sqlite_session():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+
+    @event.listens_for(engine, "connect")
+    def _attach(dbapi_conn, _):
+        dbapi_conn.execute("ATTACH DATABASE ':memory:' AS domain_inventory")
+
+    with engine.begin() as conn:
+        for ddl in SQLITE_SCHEMA:
+            conn.execute(text(ddl))
+    return sessionmaker(bind=engine)()
+
+
+def generate(db, articles: int, movements: int, warehouse_id: str, seed: int = 42) -> None:
+    """Synthetic catalogue: skewed usage (few fast movers), some dormant stock."""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    article_rows = []
+    for i in range(articles):
+        min_stock = rng.choice([None, 10, 25, 50, 100])
+        purchase_price = round(rng.uniform(0.5, 120), 2)
+        current = rng.randint(0, 400)
+        article_rows.append({
+            "id": f"bench-art-{i}", "n": f"B{i:07d}", "name": f"Artikel {i}",
+            "cat": rng.choice(CATEGORIES), "sup": f"S{rng.randrange(200):03d}",
+            "pp": purchase_price, "sp": round(purchase_price * 1.4, 2),
+            "min": min_stock, "max": min_stock * 3 if min_stock and rng.random() < 0.7 else None,
+            "cur": current, "t": TENANT_ID,
+        })
+    insert_article = text(
+        "INSERT INTO domain_inventory.articles (id, article_number, name, unit, category, supplier_number, "
+        "purchase_price, sales_price, currency, min_stock, max_stock, current_stock, reserved_stock, "
+        "available_stock, tenant_id, is_active) VALUES (:id, :n, :name, 'Stk', :cat, :sup, :pp, :sp, 'EUR', "
+        ":min, :max, :cur, 0, :cur, :t, true)"
+    )
+    for start in range(0, len(article_rows), BATCH):
+        db.execute(insert_article, article_rows[start:start + BATCH])
+
+    insert_movement = text(
+        "INSERT INTO domain_inventory.inventory_stock_movements (id, article_id, warehouse_id, movement_type, "
+        "quantity, unit_cost, previous_stock, new_stock, total_cost, tenant_id, created_at) "
+        "VALUES (:id, :a, :w, :mt, :q, :uc, 0, 0, :tc, :t, :at)"
+    )
+    batch = []
+    for i in range(movements):
+        # Pareto-ish: 20% of the catalogue gets most of the traffic
+        index = int(articles * 0.2 * rng.random()) if rng.random() < 0.8 else rng.randrange(articles)
+        movement_type = "out" if rng.random() < 0.65 else "in"
+        quantity = rng.randint(1, 40)
+        unit_cost = article_rows[index]["pp"]
+        batch.append({
+            "id": f"bench-mov-{i}", "a": article_rows[index]["id"], "w": warehouse_id, "mt": movement_type,
+            "q": -quantity if movement_type == "out" else quantity, "uc": unit_cost,
+            "tc": round(quantity * unit_cost, 2), "t": TENANT_ID,
+            "at": now - timedelta(seconds=rng.randrange(365 * 86400)),
+        })
+        if len(batch) == BATCH:
+            db.execute(insert_movement, batch)
+            batch = []
+    if batch:
+        db.execute(insert_movement, batch)
+    db.commit()
+
+
+def _timed(label: str, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"{label:<28} {(time.perf_counter() - start) * 1000:9.1f} ms  {result}")
+
+
+def run(db, articles: int, movements: int, warehouse_id: str) -> None:
+    start = time.perf_counter()
+    generate(db, articles, movements, warehouse_id)
+    print(f"generated {articles:,} articles / {movements:,} movements in {time.perf_counter() - start:.1f} s")
+
+    service = ReplenishmentService(db)
+    _timed("stats build (full)", lambda: refresh_article_stats(db, TENANT_ID, full=True) or "")
+    db.commit()
+    _timed("stats refresh (90d window)", lambda: refresh_article_stats(db, TENANT_ID) or "")
+    db.commit()
+
+    # What the report endpoints run: capped list plus totals over all matches
+    _timed("replenishment", lambda: "{:,} suggestions, {:,} listed".format(
+        service.get_replenishment_summary(TENANT_ID)["total_suggestions"],
+        len(service.get_replenishment_suggestions(TENANT_ID, limit=1000)),
+    ))
+    _timed("purchase orders", lambda: "{:,} suppliers".format(
+        len(service.generate_purchase_order_suggestions(TENANT_ID, limit=1000))
+    ))
+    _timed("slow moving (90d)", lambda: "{:,} items, {:,} listed".format(
+        service.get_slow_moving_summary(TENANT_ID, 90)["total_items"],
+        len(service.get_slow_moving_inventory(TENANT_ID, 90, limit=1000)),
+    ))
+    _timed("turnover (30d, stats)",
+           lambda: f"cogs {service.get_inventory_turnover_report(TENANT_ID, 30)['total_cogs']:,.0f}")
+    _timed("turnover (180d, movements)",
+           lambda: f"cogs {service.get_inventory_turnover_report(TENANT_ID, 180)['total_cogs']:,.0f}")
+    _timed("inventory value",
+           lambda: f"{InventoryService(db).calculate_inventory_value(TENANT_ID)['total_value']:,.0f} EUR")
+    fetch_all = text("SELECT * FROM domain_inventory.articles WHERE tenant_id = :t AND is_active = true")
+    _timed("fetch all articles (before)",
+           lambda: f"{len(db.execute(fetch_all, {'t': TENANT_ID}).fetchall()):,} rows")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=500_000)
+    parser.add_argument("--movements", type=int, default=2_000_000)
+    parser.add_argument("--warehouse-id", default="bench-warehouse",
+                        help="Existing warehouse id (PostgreSQL enforces the foreign key)")
+    parser.add_argument("--sqlite", action="store_true", help="Use an in-memory SQLite database")
+    args = parser.parse_args()
+
+    if args.sqlite:
+        db = _sqlite_session()
+    else:
+        from app.core.database import SessionLocal
+
+        db = SessionLocal()
+    try:
+        run(db, args.articles, args.movements, args.warehouse_id)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Benchmark: policy decisions per second
+
+Builds R rules over K KPIs (random severities, time windows and approvals)
+and measures decisions per second for random alerts:
+
+* linear scan over the rule list with per-decision window parsing (before)
+* the compiled PolicyIndex (one dict lookup per decision)
+
+plus the time to compile the index, and the bulk upsert of all rules into a
+temporary SQLite database: one ``session.get`` per rule (before) versus one
+one INSERT ... ON CONFLICT executed for all rules.
+
+Usage:
+    python scripts/benchmarks/bench_policy_decisions.py --rules 10000
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.dialects.postgresql import JSONB  # noqa: E402
+from sqlalchemy.ext.compiler import compiles  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.infrastructure.models import PolicyRule  # noqa: E402
+from app.services.policy_compiler import PolicyIndex  # noqa: E402
+from app.services.policy_service import Alert, PolicyEngine, PolicyStore, Rule  # noqa: E402
+
+SEVERITIES = ["ok", "warn", "crit"]
+ACTIONS = ["pricing.adjust", "inventory.reorder", "sales.notify"]
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+def _sqlite_engine():
+    directory = Path(tempfile.mkdtemp(prefix="bench-policy-"))
+    engine = create_engine(f"sqlite:///{directory / 'main.db'}")
+
+    @event.listens_for(engine, "connect")
+    def _attach(dbapi_conn, _):
+        dbapi_conn.execute(f"ATTACH DATABASE '{directory / 'shared.db'}' AS domain_shared")
+
+    PolicyRule.__table__.create(engine)
+    return engine
+
+
+def make_rules(count: int, kpis: int, rng: random.Random):
+    windows = [None, {"days": [1, 2, 3, 4, 5], "start": "06:00", "end": "20:00"}]
+    approvals = [None, {"required": True, "roles": ["manager", "admin"], "bypassIfSeverity": "crit"}]
+    return [
+        Rule(
+            id=f"bench-rule-{i:06d}",
+            when={"kpiId": f"kpi-{rng.randrange(kpis)}", "severity": rng.sample(SEVERITIES, rng.randint(1, 2))},
+            action=rng.choice(ACTIONS),
+            params={"pct": {"warn": 2, "crit": 5}, "note": "Abweichung {delta}"},
+            window=rng.choice(windows),
+            approval=rng.choice(approvals),
+            autoExecute=rng.random() < 0.5,
+        )
+        for i in range(count)
+    ]
+
+
+def previous_decide(user_roles, alert, rules):
+    """Linear scan as before: first matching rule, window parsed per decision."""
+    rule = next((r for r in rules if r.when.kpiId == alert.kpiId and alert.severity in r.when.severity), None)
+    if not rule:
+        return "deny"
+    if not PolicyEngine.within_window(rule.window):
+        return "deny"
+    PolicyEngine.resolve_params(rule, alert.severity, alert)
+    return "allow"
+
+
+def _rate(label: str, fn, alerts) -> None:
+    start = time.perf_counter()
+    for alert in alerts:
+        fn(alert)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {len(alerts) / elapsed:>12,.0f} decisions/s")
+
+
+def previous_bulk_upsert(Session, rules) -> None:
+    with Session() as session:
+        for rule in rules:
+            entity = session.get(PolicyRule, rule.id) or PolicyRule(id=rule.id)
+            entity.when_kpi_id = rule.when.kpiId
+            entity.when_severity = rule.when.severity
+            entity.action = rule.action
+            entity.params = rule.params
+            entity.window = rule.window.model_dump() if rule.window else None
+            entity.approval = rule.approval.model_dump() if rule.approval else None
+            entity.auto_execute = bool(rule.autoExecute)
+            session.add(entity)
+        session.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rules", type=int, default=10_000)
+    parser.add_argument("--kpis", type=int, default=2_000)
+    parser.add_argument("--decisions", type=int, default=20_000)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    rules = make_rules(args.rules, args.kpis, rng)
+    alerts = [
+        Alert(id=str(n), kpiId=f"kpi-{rng.randrange(int(args.kpis * 1.1))}", title="t", message="m",
+              severity=rng.choice(SEVERITIES), delta=1.5)
+        for n in range(args.decisions)
+    ]
+    roles = ["operator"]
+
+    start = time.perf_counter()
+    index = PolicyIndex(rules)
+    print(f"compiled {args.rules:,} rules into {len(index):,} keys in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    # The linear scan is slow; a slice of the alerts is enough for a stable rate
+    _rate("linear scan (before)", lambda a: previous_decide(roles, a, rules), alerts[: max(1, args.decisions // 20)])
+    _rate("compiled index, PolicyEngine.decide", lambda a: PolicyEngine.decide(roles, a, index), alerts)
+    _rate("compiled index, raw fields", lambda a: index.decide(roles, a.kpiId, a.severity, a.delta), alerts)
+
+    # Each variant writes into a fresh database: inserts first, then the same rules again as updates
+    for label, upsert in (
+        ("bulk upsert per rule (before)", previous_bulk_upsert),
+        ("bulk upsert ON CONFLICT", lambda Session, rules: PolicyStore(Session).bulk_upsert(rules)),
+    ):
+        engine = _sqlite_engine()
+        Session = sessionmaker(bind=engine)
+        statements = [0]
+        event.listen(engine, "before_cursor_execute", lambda *a: statements.__setitem__(0, statements[0] + 1))
+        for run in ("insert", "update"):
+            statements[0] = 0
+            start = time.perf_counter()
+            upsert(Session, rules)
+            print(f"{label + ', ' + run:<42} {(time.perf_counter() - start) * 1000:9.1f} ms  "
+                  f"{statements[0]:>7,} statements")
+
+
+if __name__ == "__main__":
+    main()
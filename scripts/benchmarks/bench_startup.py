@@ -0,0 +1,87 @@
+"""
+Benchmark: time to first request (TTFR) of the API process
+
+Starts a fresh interpreter ``--runs`` times per variant, imports ``main`` and
+sends requests through httpx ``ASGITransport`` (no server, no lifespan):
+
+* ``/healthz``: the first request a load balancer or Kubernetes probe sends
+* ``/api/v1/health/ready``: the first request into the v1 API (with lazy
+  routers this one imports the API v1 package)
+
+Variants: ``eager`` (``STARTUP_LAZY_ROUTERS=false``, every router imported at
+boot as before) and ``lazy`` (routers from the manifest in
+``app.core.startup``, loaded on first use). Times are measured from process
+spawn and reported as the median over all runs. Run from a warm file system
+cache; the first run after a checkout also pays for compiling ``.pyc`` files.
+
+Usage:
+    python scripts/benchmarks/bench_startup.py --runs 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+
+CHILD = """
+import asyncio, json, sys, time
+import httpx
+
+imported_at = time.time()
+import main
+imported = time.time()
+
+async def first_requests():
+    timings = {}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for path in ("/healthz", "/api/v1/health/ready"):
+            await client.get(path)
+            timings[path] = time.time()
+    return timings
+
+timings = asyncio.run(first_requests())
+print(json.dumps({"imported": imported, "modules": len(sys.modules), **timings}))
+"""
+
+
+def run_once(lazy: bool) -> dict:
+    env = dict(os.environ, STARTUP_LAZY_ROUTERS=str(lazy).lower(), PYTHONPATH=str(ROOT))
+    spawned = time.time()
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    return {
+        "import": result["imported"] - spawned,
+        "healthz": result["/healthz"] - spawned,
+        "v1": result["/api/v1/health/ready"] - spawned,
+        "modules": result["modules"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    # Einmal vorab: .pyc-Dateien erzeugen, damit alle Läufe gleich starten
+    run_once(lazy=False)
+    print(f"{'variant':<8} {'import s':>9} {'/healthz s':>11} {'/api/v1 s':>10} {'modules':>8}")
+    for variant, lazy in (("eager", False), ("lazy", True)):
+        runs = [run_once(lazy) for _ in range(args.runs)]
+        median = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+        print(
+            f"{variant:<8} {median['import']:9.2f} {median['healthz']:11.2f} "
+            f"{median['v1']:10.2f} {median['modules']:8.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark: UStVA computation, line-by-line vs. tax buckets
+
+Requires PostgreSQL with domain_erp.journal_entries/-lines, tax_keys and
+vat_tax_buckets (migrations/sql/finance/004_vat_tax_buckets.sql).
+
+  seed   generate N posted lines per month for a bench tenant
+  run    time a monthly and a quarterly filing both ways
+
+Usage:
+    python scripts/benchmarks/bench_vat_return.py seed --lines-per-month 1000000 --months 2025-01,2025-02,2025-03
+    python scripts/benchmarks/bench_vat_return.py run --period 2025-Q1
+"""
+
+import argparse
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from sqlalchemy import text  # noqa: E402
+
+from app.core.database import SessionLocal  # noqa: E402
+from app.finance.vat_buckets import (  # noqa: E402
+    compute_positions,
+    expand_period,
+    get_buckets,
+    load_tax_keys,
+)
+
+TENANT_ID = "bench-vat-tenant"
+LINES_PER_ENTRY = 4
+
+
+def seed(lines_per_month: int, months) -> None:
+    with SessionLocal() as db:
+        for code, rate, pos in (("U19", 19, "81"), ("U7", 7, "86"), ("V19", 19, "66"), ("V7", 7, "66")):
+            db.execute(text(
+                "INSERT INTO domain_erp.tax_keys (code, tenant_id, steuersatz, ustva_position, ustva_bezeichnung, active) "
+                "VALUES (:c, :t, :r, :p, :c, true) ON CONFLICT DO NOTHING"
+            ), {"c": code, "t": TENANT_ID, "r": rate, "p": pos})
+        for period in months:
+            start = time.perf_counter()
+            entries = lines_per_month // LINES_PER_ENTRY
+            db.execute(text(
+                "INSERT INTO domain_erp.journal_entries (id, tenant_id, period, status, document_type, "
+                "entry_number, entry_date, posting_date) "
+                "SELECT :p || '-' || g, :t, :p, 'posted', "
+                "(ARRAY['AR_INVOICE','AP_INVOICE'])[1 + g % 2], 'BENCH-' || :p || '-' || g, "
+                "(:p || '-01')::date, (:p || '-01')::date "
+                "FROM generate_series(1, :n) AS g"
+            ), {"p": period, "t": TENANT_ID, "n": entries})
+            db.execute(text(
+                "INSERT INTO domain_erp.journal_entry_lines (journal_entry_id, line_number, account_id, "
+                "debit_amount, credit_amount, tax_code) "
+                "SELECT :p || '-' || g, l, "
+                "CASE WHEN g % 2 = 0 THEN '8400' ELSE '6300' END, "
+                "CASE WHEN g % 2 = 0 THEN 0 ELSE (g % 997) + 0.19 END, "
+                "CASE WHEN g % 2 = 0 THEN (g % 991) + 0.07 ELSE 0 END, "
+                "(ARRAY['U19','U7','V19','V7'])[1 + (g + l) % 4] "
+                "FROM generate_series(1, :n) AS g, generate_series(1, :lines) AS l"
+            ), {"p": period, "n": entries, "lines": LINES_PER_ENTRY})
+            db.commit()
+            print(f"seeded {period}: {entries * LINES_PER_ENTRY:,} lines ({time.perf_counter() - start:.1f}s)")
+        db.execute(text("ANALYZE domain_erp.journal_entries"))
+        db.execute(text("ANALYZE domain_erp.journal_entry_lines"))
+        db.commit()
+
+
+def _line_by_line(db, months, tax_key_map) -> Decimal:
+    """Previous implementation: fetch all lines and bucket them in Python."""
+    payable = Decimal("0")
+    for period in months:
+        rows = db.execute(text("""
+            SELECT jel.account_id, jel.debit_amount, jel.credit_amount, jel.tax_code
+            FROM domain_erp.journal_entry_lines jel
+            JOIN domain_erp.journal_entries je ON jel.journal_entry_id = je.id
+            WHERE je.tenant_id = :t AND je.period = :p AND je.status = 'posted'
+              AND jel.tax_code IS NOT NULL
+        """), {"t": TENANT_ID, "p": period}).fetchall()
+        for account_id, debit, credit, tax_code in rows:
+            key = tax_key_map.get(tax_code)
+            if not key:
+                continue
+            account_id = str(account_id)
+            divisor = Decimal("1") + key["rate"] / Decimal("100")
+            if account_id[0] in "84":
+                amount = credit if credit > 0 else debit
+                payable += amount - amount / divisor
+            elif account_id[0] in "65":
+                amount = debit if debit > 0 else credit
+                payable -= amount - amount / divisor
+    return payable
+
+
+def run(period: str) -> None:
+    _, months = expand_period(period)
+    with SessionLocal() as db:
+        tax_key_map = load_tax_keys(db, TENANT_ID)
+
+        start = time.perf_counter()
+        legacy = _line_by_line(db, months, tax_key_map)
+        print(f"line-by-line      {time.perf_counter() - start:8.2f} s  payable {legacy:,.2f}")
+
+        start = time.perf_counter()
+        result = compute_positions(get_buckets(db, TENANT_ID, months, refresh=True), tax_key_map)
+        db.commit()
+        print(f"buckets (refresh) {time.perf_counter() - start:8.2f} s  payable {result['vat_payable']:,.2f}")
+
+        start = time.perf_counter()
+        result = compute_positions(get_buckets(db, TENANT_ID, months, refresh=False), tax_key_map)
+        print(f"buckets (reuse)   {(time.perf_counter() - start) * 1000:8.2f} ms payable {result['vat_payable']:,.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    s = sub.add_parser("seed")
+    s.add_argument("--lines-per-month", type=int, default=1_000_000)
+    s.add_argument("--months", default="2025-01,2025-02,2025-03")
+    r = sub.add_parser("run")
+    r.add_argument("--period", default="2025-Q1")
+    args = parser.parse_args()
+
+    if args.command == "seed":
+        seed(args.lines_per_month, args.months.split(","))
+    else:
+        run(args.period)
+
+
+if __name__ == "__main__":
+    main()
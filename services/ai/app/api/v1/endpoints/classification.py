@@ -1,11 +1,24 @@
 """
 Document Classification Endpoint
 Klassifiziert Dokumente (PDFs, E-Mails, Bilder) automatisch
+
+Lokales Modell aus app.services.document_classifier (CPU, ohne externen
+Dienst); Batches werden in einem Durchlauf vektorisiert klassifiziert.
 """
 
-from typing import Optional
-from fastapi import APIRouter, UploadFile, File
+import email
+import io
+import time
+from email import policy
+from pathlib import Path
+from typing import List, Optional
+
+from fastapi import APIRouter, File, HTTPException, UploadFile
 from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.services import document_classifier
 
 router = APIRouter()
 
@@ -16,6 +29,68 @@ class ClassificationResult(BaseModel):
     confidence: float = Field(..., ge=0.0, le=1.0)
     extracted_data: dict = Field(default_factory=dict)
     suggested_actions: list[str] = Field(default_factory=list)
+    model_version: Optional[str] = Field(None, description="Version des Klassifikationsmodells")
+
+
+class BatchDocument(BaseModel):
+    """Dokument im Batch"""
+    id: Optional[str] = Field(None, description="Referenz des Aufrufers (z.B. DMS-ID, Message-ID)")
+    text: str = Field(..., description="Extrahierter Text (E-Mail-Body, OCR)")
+    filename: Optional[str] = None
+
+
+class BatchClassificationRequest(BaseModel):
+    """Batch request"""
+    documents: List[BatchDocument] = Field(..., min_length=1)
+    model_version: Optional[str] = Field(None, description="Default: aktive Version")
+
+
+class BatchClassificationItem(ClassificationResult):
+    """Result for one document of a batch"""
+    id: Optional[str] = None
+
+
+class BatchClassificationResponse(BaseModel):
+    """Batch response"""
+    model_version: str
+    results: List[BatchClassificationItem]
+    processing_time_ms: float
+
+
+def _result(label: str, confidence: float, model_version: str) -> ClassificationResult:
+    document_type = label if confidence >= settings.CLASSIFIER_MIN_CONFIDENCE else "unknown"
+    return ClassificationResult(
+        document_type=document_type,
+        confidence=round(confidence, 4),
+        suggested_actions=document_classifier.SUGGESTED_ACTIONS.get(document_type, []),
+        model_version=model_version,
+    )
+
+
+def _classify(texts: List[str], model_version: Optional[str] = None):
+    try:
+        model = document_classifier.get_model(model_version)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=404 if model_version else 503, detail=str(exc))
+    return model, model.predict(texts)
+
+
+def _extract_text(filename: str, content_type: str, data: bytes) -> str:
+    """Text eines Uploads: Text/E-Mail direkt, PDF über pypdf (falls installiert), sonst nur der Dateiname"""
+    if filename.endswith(".eml") or content_type == "message/rfc822":
+        message = email.message_from_bytes(data, policy=policy.default)
+        body = message.get_body(preferencelist=("plain", "html"))
+        return f"{message.get('subject', '')}\n{body.get_content() if body else ''}"
+    if content_type.startswith("text/") or filename.endswith((".txt", ".csv", ".xml", ".json")):
+        return data.decode("utf-8", errors="replace")
+    if filename.endswith(".pdf") or content_type == "application/pdf":
+        try:
+            from pypdf import PdfReader
+        except ImportError:
+            return ""
+        reader = PdfReader(io.BytesIO(data))
+        return "\n".join(page.extract_text() or "" for page in reader.pages[:3])
+    return ""
 
 
 @router.post("/document", response_model=ClassificationResult)
@@ -25,54 +100,20 @@ async def classify_document(
 ) -> ClassificationResult:
     """
     Klassifiziert hochgeladene Dokumente
-    
+
     Erkennt automatisch:
-    - Rechnungen (mit Beträgen, Lieferanten)
+    - Rechnungen
     - Lieferscheine
+    - Bestellungen und Reklamationen (E-Mails)
     - Analyseberichte
     - Zertifikate
     - Feldbuch-Einträge
     """
-    
-    # Mock implementation
-    filename = file.filename.lower() if file.filename else ""
-    
-    if "rechnung" in filename or "invoice" in filename:
-        return ClassificationResult(
-            document_type="invoice",
-            confidence=0.92,
-            extracted_data={
-                "invoice_number": "RE-2025-001",
-                "amount": 1250.00,
-                "supplier": "Agro Supplies GmbH",
-                "date": "2025-10-14"
-            },
-            suggested_actions=[
-                "In Kreditorenbuchhaltung erfassen",
-                "Zahlungsfreigabe anfordern"
-            ]
-        )
-    elif "lieferschein" in filename or "delivery" in filename:
-        return ClassificationResult(
-            document_type="delivery_note",
-            confidence=0.88,
-            extracted_data={
-                "delivery_number": "LS-2025-042",
-                "articles": ["Weizen A", "Gerste B"],
-                "date": "2025-10-13"
-            },
-            suggested_actions=[
-                "Wareneingang erfassen",
-                "Qualitätsprüfung durchführen"
-            ]
-        )
-    else:
-        return ClassificationResult(
-            document_type="unknown",
-            confidence=0.45,
-            extracted_data={},
-            suggested_actions=["Manuell prüfen"]
-        )
+    filename = file.filename or ""
+    data = await file.read()
+    text = _extract_text(filename.lower(), file.content_type or "", data)
+    model, [(label, confidence)] = await run_in_threadpool(_classify, [f"{filename}\n{context or ''}\n{text}"])
+    return _result(label, confidence, model.version)
 
 
 @router.post("/text", response_model=ClassificationResult)
@@ -83,28 +124,38 @@ async def classify_text(
     """
     Klassifiziert Text (z.B. E-Mail-Inhalt)
     """
-    text_lower = text.lower()
-    
-    # Einfache Keyword-Klassifizierung (später: LLM)
-    if any(word in text_lower for word in ["bestellung", "order", "bestell"]):
-        return ClassificationResult(
-            document_type="purchase_order",
-            confidence=0.75,
-            extracted_data={"intent": "ordering"},
-            suggested_actions=["Neue Bestellung anlegen"]
-        )
-    elif any(word in text_lower for word in ["reklamation", "complaint", "problem"]):
-        return ClassificationResult(
-            document_type="complaint",
-            confidence=0.80,
-            extracted_data={"intent": "complaint"},
-            suggested_actions=["Ticket erstellen", "Vertrieb informieren"]
-        )
-    else:
-        return ClassificationResult(
-            document_type="general",
-            confidence=0.60,
-            extracted_data={},
-            suggested_actions=[]
-        )
+    model, [(label, confidence)] = await run_in_threadpool(_classify, [text])
+    return _result(label, confidence, model.version)
+
+
+@router.post("/batch", response_model=BatchClassificationResponse)
+async def classify_batch(request: BatchClassificationRequest) -> BatchClassificationResponse:
+    """
+    Klassifiziert viele Dokumente in einem Aufruf (Posteingang, DMS-Import)
+
+    Der ganze Batch wird in einem vektorisierten Durchlauf klassifiziert.
+    """
+    if len(request.documents) > settings.CLASSIFIER_MAX_BATCH:
+        raise HTTPException(status_code=413, detail=f"At most {settings.CLASSIFIER_MAX_BATCH} documents per batch")
+    started = time.perf_counter()
+    texts = [f"{document.filename or ''}\n{document.text}" for document in request.documents]
+    model, predictions = await run_in_threadpool(_classify, texts, request.model_version)
+    results = [
+        BatchClassificationItem(id=document.id, **_result(label, confidence, model.version).model_dump())
+        for document, (label, confidence) in zip(request.documents, predictions)
+    ]
+    return BatchClassificationResponse(
+        model_version=model.version,
+        results=results,
+        processing_time_ms=round((time.perf_counter() - started) * 1000, 2),
+    )
+
 
+@router.get("/models")
+async def list_models() -> dict:
+    """Gespeicherte Modellversionen mit Metriken; ``active`` ist die Default-Version"""
+    directory = Path(settings.CLASSIFIER_MODEL_DIR)
+    return {
+        "active": document_classifier.active_version(directory),
+        "versions": document_classifier.list_versions(directory) if directory.exists() else [],
+    }
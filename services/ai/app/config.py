@@ -34,6 +34,13 @@ class Settings(BaseSettings):
     CHROMA_PERSIST_DIR: str = "/app/data/chroma"
     CHROMA_COLLECTION_NAME: str = "valeo_erp_knowledge"
     
+    # Document Classifier (app.services.document_classifier)
+    CLASSIFIER_MODEL_DIR: str = "/app/data/classifier"
+    CLASSIFIER_MIN_CONFIDENCE: float = 0.5  # Darunter: document_type "unknown"
+    CLASSIFIER_MAX_BATCH: int = 5000
+    CLASSIFIER_BOOTSTRAP_SYNTHETIC: bool = True  # Ohne Modell einmalig aus synthetischen Dokumenten trainieren
+    CLASSIFIER_BOOTSTRAP_DOCUMENTS: int = 8000
+    
     # Redis Configuration
     REDIS_URL: str = "redis://redis:6379/1"
     REDIS_CACHE_TTL: int = 3600
@@ -0,0 +1,204 @@
+"""
+Synthetic Classifier Samples
+Erzeugt gelabelte Beispieldokumente für Training und Evaluation des Dokumentklassifikators
+
+Die Vorlagen folgen typischen Eingängen eines Agrarhändlers (Rechnungen,
+Lieferscheine, Bestellungen per Mail, Reklamationen, Laborberichte,
+Zertifikate, Feldbuch-Auszüge, allgemeine Korrespondenz). Klassen teilen sich
+bewusst Vokabular (Reklamationen nennen Lieferscheine, Bestellungen Artikel
+und Preise), Dokumente werden gekürzt und mit OCR-Fehlern versehen.
+"""
+
+import random
+from typing import Callable, Dict, Iterator, List, Tuple
+
+SUPPLIERS = [
+    "Agro Supplies GmbH", "Raiffeisen Weser-Ems eG", "Landhandel Meyer GmbH", "Saatzucht Nord KG", "Düngerkontor Emden",
+    "Futtermittelwerk Oldenburg", "Agrarservice Ahlers", "Mühle Janssen OHG", "BayWa AG", "Landtechnik Onken",
+]
+ARTICLES = [
+    "Weizen A", "Gerste B", "Raps", "Mais Körner", "KAS 27 % N", "Harnstoff 46 %", "Milchleistungsfutter 18/3",
+    "Sojaschrot 44", "Saatgut Winterweizen Patras", "Pflanzenschutz Folicur", "Mineralfutter Rind", "Kalkammonsalpeter",
+    "Big Bag 500 kg", "Dieselkraftstoff", "Netzwickel", "Silofolie 12 m",
+]
+UNITS = ["t", "kg", "dt", "Sack", "Stück", "l"]
+PEOPLE = ["Herr Gerdes", "Frau Schulz", "Herr Meyer", "Frau Onken", "Herr Janssen", "Frau Krüger"]
+FIELDS = ["Schlag Hohe Geest", "Schlag Marschwiese 3", "Acker am Deich", "Flur 12 Leer", "Schlag Kirchweg"]
+CROPS = ["Winterweizen", "Wintergerste", "Silomais", "Winterraps", "Zuckerrüben", "Kartoffeln"]
+FORWARDS = [
+    "Anbei erhalten Sie das Dokument im Anhang.", "Weitergeleitete Nachricht", "Siehe Anhang.", "Bitte um Prüfung.",
+    "WG: Ihre Anfrage", "Scan vom Kopierer", "Kurze Info zum Vorgang:",
+]
+NOISE = [
+    "Bitte beachten Sie unsere neuen Öffnungszeiten.", "Mit freundlichen Grüßen", "Tel. 04921 12345",
+    "Sitz der Gesellschaft: Emden, HRB 1234", "Seite 1 von 2", "USt-IdNr. DE123456789", "www.beispiel-agrar.de",
+    "Diese E-Mail kann vertrauliche Informationen enthalten.", "Bankverbindung: Sparkasse Emden",
+]
+
+
+def _date(rng: random.Random) -> str:
+    return f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.{rng.choice([2024, 2025, 2026])}"
+
+
+def _amount(rng: random.Random) -> str:
+    return f"{rng.uniform(20, 60000):,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def _positions(rng: random.Random, prices: bool) -> List[str]:
+    lines = []
+    for n in range(1, rng.randint(2, 6)):
+        line = f"{n} {rng.choice(ARTICLES)} {rng.randint(1, 40)} {rng.choice(UNITS)}"
+        if prices:
+            line += f" {_amount(rng)} EUR"
+        lines.append(line)
+    return lines
+
+
+def _invoice(rng: random.Random) -> List[str]:
+    return [
+        rng.choice(SUPPLIERS), rng.choice(["Rechnung", "RECHNUNG", "Rechnung Nr.", "Invoice"]),
+        f"Rechnungsnummer RE-{rng.randint(2024, 2026)}-{rng.randint(1, 9999):04d}", f"Rechnungsdatum {_date(rng)}",
+        f"Kundennummer K-{rng.randint(1000, 9999)}", f"Lieferdatum {_date(rng)}", *_positions(rng, prices=True),
+        f"Nettobetrag {_amount(rng)} EUR", rng.choice(["zzgl. 19 % MwSt.", "zzgl. 7 % USt.", "Umsatzsteuer 19 %"]),
+        f"Gesamtbetrag {_amount(rng)} EUR",
+        rng.choice(["Zahlbar innerhalb 14 Tagen ohne Abzug.", "Zahlungsziel 30 Tage netto, 2 % Skonto bei Zahlung binnen 8 Tagen."]),
+    ]
+
+
+def _delivery_note(rng: random.Random) -> List[str]:
+    return [
+        rng.choice(SUPPLIERS), rng.choice(["Lieferschein", "LIEFERSCHEIN", "Lieferschein / Wiegeschein", "Delivery note"]),
+        f"Lieferschein-Nr. LS-{rng.randint(2024, 2026)}-{rng.randint(1, 999):03d}", f"Lieferdatum {_date(rng)}",
+        f"Ihre Bestellung vom {_date(rng)}", *_positions(rng, prices=False),
+        f"Bruttogewicht {rng.randint(1000, 40000)} kg", f"Kennzeichen LER-{rng.choice('ABCDEFGH')}{rng.randint(100, 999)}",
+        rng.choice(["Ware erhalten:", "Unterschrift Fahrer", "Ware in einwandfreiem Zustand übernommen."]),
+    ]
+
+
+def _purchase_order(rng: random.Random) -> List[str]:
+    article = rng.choice(ARTICLES)
+    return [
+        rng.choice(["Guten Tag,", "Moin,", "Sehr geehrte Damen und Herren,", "Hallo " + rng.choice(PEOPLE) + ","]),
+        rng.choice([
+            f"hiermit bestellen wir {rng.randint(1, 30)} {rng.choice(UNITS)} {article}.",
+            f"bitte liefern Sie uns {rng.randint(1, 30)} {rng.choice(UNITS)} {article} bis zum {_date(rng)}.",
+            f"wir möchten folgende Bestellung aufgeben: {article}, {rng.randint(1, 30)} {rng.choice(UNITS)}.",
+            f"Bestellung {article} wie besprochen, Lieferung frei Hof.",
+        ]),
+        *(_positions(rng, prices=rng.random() < 0.3) if rng.random() < 0.5 else []),
+        rng.choice(["Bitte bestätigen Sie den Liefertermin.", "Preis wie im Angebot vom " + _date(rng) + ".",
+                    "Auftragsbestätigung bitte an diese Adresse.", "Order reference PO-" + str(rng.randint(100, 999))]),
+    ]
+
+
+def _complaint(rng: random.Random) -> List[str]:
+    return [
+        rng.choice(["Guten Tag,", "Sehr geehrte Damen und Herren,", "Hallo,"]),
+        rng.choice([
+            f"leider müssen wir die Lieferung laut Lieferschein LS-{rng.randint(2024, 2026)}-{rng.randint(1, 999):03d} reklamieren.",
+            f"die gelieferte Ware {rng.choice(ARTICLES)} ist beschädigt angekommen.",
+            f"in Ihrer Rechnung RE-{rng.randint(2024, 2026)}-{rng.randint(1, 9999):04d} wurde eine falsche Menge berechnet.",
+            f"wir haben ein Problem mit der letzten Lieferung {rng.choice(ARTICLES)}.",
+        ]),
+        rng.choice([
+            "Die Säcke waren nass und teilweise gerissen.", "Die Feuchtigkeit lag deutlich über dem vereinbarten Wert.",
+            "Es fehlen zwei Paletten.", "Das Produkt entspricht nicht der bestellten Qualität.",
+            "Wir bitten um Gutschrift bzw. Ersatzlieferung.", "Bitte holen Sie die Ware wieder ab.",
+        ]),
+        rng.choice(["Wir erwarten Ihre Stellungnahme.", "Bitte melden Sie sich umgehend.", "Reklamation / complaint"]),
+    ]
+
+
+def _analysis_report(rng: random.Random) -> List[str]:
+    return [
+        rng.choice(["LUFA Nord-West", "Agrolab GmbH", "Labor Dr. Janssen", "Eurofins Agro"]),
+        rng.choice(["Prüfbericht", "Analysebericht", "Untersuchungsbericht", "Analysenergebnis"]),
+        f"Probe Nr. {rng.randint(10000, 99999)}", f"Probeneingang {_date(rng)}", f"Material {rng.choice(ARTICLES)}",
+        *[f"{name} {rng.uniform(0.1, 90):.1f} {unit}" for name, unit in rng.sample([
+            ("Feuchte", "%"), ("Rohprotein", "%"), ("Hektolitergewicht", "kg/hl"), ("Fallzahl", "s"),
+            ("Besatz", "%"), ("DON", "µg/kg"), ("Rohfaser", "%"), ("Ölgehalt", "%"), ("pH-Wert", ""),
+        ], rng.randint(2, 6))],
+        rng.choice(["Methode: VDLUFA", "Die Ergebnisse beziehen sich ausschließlich auf die Probe.", "Grenzwert eingehalten"]),
+    ]
+
+
+def _certificate(rng: random.Random) -> List[str]:
+    return [
+        rng.choice(["Zertifikat", "Certificate", "Bescheinigung", "Konformitätsbescheinigung"]),
+        rng.choice(["QS-Zertifizierung", "GMP+ FSA", "Bio-Zertifikat nach VO (EU) 2018/848", "ISCC EU", "ISO 9001:2015"]),
+        f"Hiermit wird bestätigt, dass {rng.choice(SUPPLIERS)}",
+        rng.choice(["die Anforderungen des Standards erfüllt.", "für den Geltungsbereich Handel und Lagerung zertifiziert ist."]),
+        f"Zertifikat-Nr. {rng.choice(['QS', 'GMP', 'DE-ÖKO-006', 'ISCC'])}-{rng.randint(10000, 99999)}",
+        f"Gültig von {_date(rng)} bis {_date(rng)}", rng.choice(["Zertifizierungsstelle", "Auditor", "Ausstellungsdatum " + _date(rng)]),
+    ]
+
+
+def _field_record(rng: random.Random) -> List[str]:
+    return [
+        rng.choice(["Feldbuch", "Schlagkartei", "Ackerschlagkartei", "Maßnahmen-Dokumentation"]),
+        f"{rng.choice(FIELDS)} ({rng.uniform(1, 40):.2f} ha)", f"Kultur {rng.choice(CROPS)}", f"Datum {_date(rng)}",
+        rng.choice([
+            f"Düngung {rng.choice(['KAS 27 % N', 'Gülle', 'Harnstoff 46 %'])} {rng.randint(50, 300)} kg/ha",
+            f"Pflanzenschutz {rng.choice(['Folicur', 'Roundup', 'Input Triple'])} {rng.uniform(0.5, 3):.1f} l/ha, BBCH {rng.randint(10, 69)}",
+            f"Aussaat {rng.choice(CROPS)} {rng.randint(120, 380)} Körner/m²", f"Ernte Ertrag {rng.randint(40, 110)} dt/ha",
+        ]),
+        rng.choice(["Anwender: " + rng.choice(PEOPLE), "Wetter: trocken, 14 °C", "Bodenbearbeitung Grubber"]),
+    ]
+
+
+def _general(rng: random.Random) -> List[str]:
+    return [
+        rng.choice(["Hallo,", "Moin " + rng.choice(PEOPLE) + ",", "Sehr geehrte Damen und Herren,"]),
+        rng.choice([
+            "anbei wie besprochen unsere aktuelle Preisliste.", "wir laden Sie herzlich zu unserem Feldtag ein.",
+            "unsere Bankverbindung hat sich geändert.", "vielen Dank für das nette Gespräch auf der Messe.",
+            "bitte senden Sie uns Ihre aktuellen Stammdaten.", "wir sind vom " + _date(rng) + " bis " + _date(rng) + " im Urlaub.",
+            "kurze Rückfrage zu Ihrem Angebot für " + rng.choice(ARTICLES) + ".", "Newsletter: Marktbericht Getreide KW " + str(rng.randint(1, 52)),
+        ]),
+        rng.choice(["Viele Grüße", "Mit freundlichen Grüßen", "Beste Grüße"]), rng.choice(PEOPLE),
+    ]
+
+
+TEMPLATES: Dict[str, Callable[[random.Random], List[str]]] = {
+    "invoice": _invoice,
+    "delivery_note": _delivery_note,
+    "purchase_order": _purchase_order,
+    "complaint": _complaint,
+    "analysis_report": _analysis_report,
+    "certificate": _certificate,
+    "field_record": _field_record,
+    "general": _general,
+}
+
+
+def _ocr_noise(text: str, rng: random.Random, rate: float) -> str:
+    chars = list(text)
+    for i in range(len(chars)):
+        if rng.random() < rate:
+            chars[i] = rng.choice("il1o0ec ")
+    return "".join(chars)
+
+
+def synthetic_documents(count: int, seed: int = 0, noise: float = 0.04) -> Iterator[Tuple[str, str]]:
+    """
+    Erzeugt ``count`` Dokumente als (Text, Label), Klassen gleich verteilt
+
+    Args:
+        count: Anzahl Dokumente
+        seed: Startwert (gleicher Seed, gleiche Dokumente)
+        noise: Anteil zufällig ersetzter Zeichen (OCR-Fehler)
+    """
+    rng = random.Random(seed)
+    labels = list(TEMPLATES)
+    for _ in range(count):
+        label = rng.choice(labels)
+        lines = TEMPLATES[label](rng)
+        if rng.random() < 0.3:
+            # Nur ein Ausschnitt ist lesbar (erste Zeilen, schlechter Scan)
+            start = rng.randrange(len(lines))
+            lines = lines[start:start + rng.randint(1, 3)]
+        if rng.random() < 0.3:
+            # Weitergeleitet oder mit Begleittext eines anderen Vorgangs
+            lines = rng.sample(FORWARDS, 1) + lines + rng.choice(list(TEMPLATES.values()))(rng)[:1]
+        lines += rng.sample(NOISE, rng.randint(0, 3))
+        yield _ocr_noise("\n".join(lines), rng, noise * rng.random() * 2), label
@@ -0,0 +1,358 @@
+"""
+Document Classifier
+Lokales, CPU-only Klassifikationsmodell für eingehende Dokumente (E-Mails, DMS-Uploads)
+
+TF-IDF über Wörter, Wort-Bigramme und Zeichen-4-Gramme (festes Vokabular aus
+dem Training) mit multinomialer logistischer Regression. Dokumente werden im
+Batch verarbeitet: nur das Zerlegen in Merkmale läuft pro Dokument in Python,
+Gewichtung, Normierung und Scoring laufen als numpy-Operationen über den
+ganzen Batch (dünn besetzt als Zeile/Spalte/Wert-Arrays).
+
+Modelle liegen versioniert unter CLASSIFIER_MODEL_DIR: ``<version>.npz``
+(Vokabular, IDF, Gewichte) und ``<version>.json`` (Labels, Metriken). Die Datei
+``LATEST`` enthält die aktive Version.
+
+Training und Evaluation (JSONL mit ``text`` und ``label`` je Zeile):
+    python -m app.services.document_classifier synthetic --count 20000 --out docs.jsonl
+    python -m app.services.document_classifier train --data docs.jsonl
+    python -m app.services.document_classifier evaluate --data holdout.jsonl [--version 20261019-101500]
+"""
+
+import argparse
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAX_CHARS = 6000  # Der Dokumenttyp steht am Anfang; lange Anhänge nicht komplett zerlegen
+CHAR_NGRAM = 4
+MIN_DF = 2
+MAX_FEATURES = 200_000
+LATEST = "LATEST"
+
+_WORD = re.compile(r"\w+")
+_DIGIT = re.compile(r"\d")
+
+SUGGESTED_ACTIONS: Dict[str, List[str]] = {
+    "invoice": ["In Kreditorenbuchhaltung erfassen", "Zahlungsfreigabe anfordern"],
+    "delivery_note": ["Wareneingang erfassen", "Qualitätsprüfung durchführen"],
+    "purchase_order": ["Neue Bestellung anlegen"],
+    "complaint": ["Ticket erstellen", "Vertrieb informieren"],
+    "analysis_report": ["Analysewerte der Partie zuordnen"],
+    "certificate": ["Zertifikat im DMS ablegen", "Gültigkeit überwachen"],
+    "field_record": ["Feldbuch-Eintrag übernehmen"],
+    "unknown": ["Manuell prüfen"],
+}
+
+
+def features(text: str) -> List[str]:
+    """Merkmale eines Dokuments: Wörter, Wort-Bigramme, Zeichen-4-Gramme (Ziffern → 0)"""
+    words = _WORD.findall(_DIGIT.sub("0", text[:MAX_CHARS].lower()))
+    result = list(words)
+    result += [f"{a} {b}" for a, b in zip(words, words[1:])]
+    for word in set(words):
+        if len(word) > CHAR_NGRAM:
+            padded = f"<{word}>"
+            result += ["#" + padded[i:i + CHAR_NGRAM] for i in range(len(padded) - CHAR_NGRAM + 1)]
+    return result
+
+
+@dataclass
+class _Batch:
+    """Dünn besetzte TF-IDF-Matrix eines Batches (Zeilen sortiert)"""
+    size: int
+    rows: np.ndarray
+    cols: np.ndarray
+    values: np.ndarray
+
+    def dot(self, weights: np.ndarray) -> np.ndarray:
+        return np.stack(
+            [np.bincount(self.rows, self.values * weights[self.cols, c], minlength=self.size) for c in range(weights.shape[1])],
+            axis=1,
+        )
+
+    def dot_transposed(self, residual: np.ndarray, width: int) -> np.ndarray:
+        return np.stack(
+            [np.bincount(self.cols, self.values * residual[self.rows, c], minlength=width) for c in range(residual.shape[1])],
+            axis=1,
+        )
+
+
+def _tfidf(documents: Sequence[List[str]], vocabulary: Dict[str, int], idf: np.ndarray) -> _Batch:
+    """TF-IDF (sublinear, L2-normiert) aus den Merkmalslisten eines Batches"""
+    lookup = vocabulary.get
+    ids: List[int] = []
+    lengths = np.zeros(len(documents), dtype=np.int64)
+    for n, document in enumerate(documents):
+        found = [i for i in map(lookup, document) if i is not None]
+        ids += found
+        lengths[n] = len(found)
+    width = max(len(vocabulary), 1)
+    keys = np.repeat(np.arange(len(documents), dtype=np.int64), lengths) * width + np.fromiter(ids, np.int64, len(ids))
+    keys, counts = np.unique(keys, return_counts=True)
+    rows, cols = keys // width, keys % width
+    values = (1.0 + np.log(counts)) * idf[cols]
+    norms = np.sqrt(np.bincount(rows, values * values, minlength=len(documents)))
+    values /= np.where(norms > 0, norms, 1.0)[rows]
+    return _Batch(len(documents), rows, cols, values.astype(np.float32))
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    logits = logits - logits.max(axis=1, keepdims=True)
+    np.exp(logits, out=logits)
+    return logits / logits.sum(axis=1, keepdims=True)
+
+
+@dataclass
+class ClassifierModel:
+    """Trainiertes Modell (unveränderlich nach dem Training)"""
+    version: str
+    labels: Tuple[str, ...]
+    vocabulary: Dict[str, int]
+    idf: np.ndarray
+    weights: np.ndarray
+    bias: np.ndarray
+    metrics: dict = field(default_factory=dict)
+
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        """Wahrscheinlichkeiten je Label, eine Zeile je Dokument"""
+        if not texts:
+            return np.zeros((0, len(self.labels)))
+        batch = _tfidf([features(text) for text in texts], self.vocabulary, self.idf)
+        return _softmax(batch.dot(self.weights) + self.bias)
+
+    def predict(self, texts: Sequence[str]) -> List[Tuple[str, float]]:
+        """(Label, Konfidenz) je Dokument"""
+        proba = self.predict_proba(texts)
+        best = proba.argmax(axis=1)
+        return [(self.labels[i], float(p)) for i, p in zip(best, proba[np.arange(len(best)), best])]
+
+
+def train(
+    texts: Sequence[str],
+    labels: Sequence[str],
+    *,
+    epochs: int = 40,
+    learning_rate: float = 0.05,
+    l2: float = 1e-5,
+    version: Optional[str] = None,
+) -> ClassifierModel:
+    """
+    Trainiert TF-IDF + logistische Regression (Adam, voller Batch)
+
+    Args:
+        texts: Dokumenttexte
+        labels: Label je Dokument
+        epochs: Gradientenschritte
+        learning_rate: Schrittweite
+        l2: L2-Regularisierung der Gewichte
+        version: Modellversion (Default: Zeitstempel)
+    """
+    if len(texts) != len(labels) or not texts:
+        raise ValueError("texts and labels must be non-empty and of equal length")
+    classes = tuple(sorted(set(labels)))
+    documents = [features(text) for text in texts]
+    document_frequency: Counter = Counter()
+    for document in documents:
+        document_frequency.update(set(document))
+    kept = [term for term, df in document_frequency.most_common(MAX_FEATURES) if df >= MIN_DF]
+    vocabulary = {term: i for i, term in enumerate(kept)}
+    idf = np.log((1 + len(texts)) / (1 + np.array([document_frequency[t] for t in kept], dtype=np.float64))) + 1.0
+
+    batch = _tfidf(documents, vocabulary, idf)
+    del documents
+    target = np.zeros((len(texts), len(classes)))
+    target[np.arange(len(texts)), [classes.index(label) for label in labels]] = 1.0
+    weights = np.zeros((len(vocabulary), len(classes)))
+    bias = np.zeros(len(classes))
+    moments = [np.zeros_like(weights), np.zeros_like(weights), np.zeros_like(bias), np.zeros_like(bias)]
+    beta1, beta2 = 0.9, 0.999
+    for step in range(1, epochs + 1):
+        residual = (_softmax(batch.dot(weights) + bias) - target) / len(texts)
+        gradients = (batch.dot_transposed(residual, len(vocabulary)) + l2 * weights, residual.sum(axis=0))
+        for n, (param, grad) in enumerate(zip((weights, bias), gradients)):
+            first, second = moments[2 * n], moments[2 * n + 1]
+            first *= beta1
+            first += (1 - beta1) * grad
+            second *= beta2
+            second += (1 - beta2) * grad * grad
+            param -= learning_rate * (first / (1 - beta1 ** step)) / (np.sqrt(second / (1 - beta2 ** step)) + 1e-8)
+
+    return ClassifierModel(
+        version=version or time.strftime("%Y%m%d-%H%M%S"),
+        labels=classes,
+        vocabulary=vocabulary,
+        idf=idf.astype(np.float32),
+        weights=weights.astype(np.float32),
+        bias=bias.astype(np.float32),
+        metrics={"documents": len(texts), "features": len(vocabulary)},
+    )
+
+
+def evaluate(model: ClassifierModel, texts: Sequence[str], labels: Sequence[str], batch_size: int = 1000) -> dict:
+    """Genauigkeit (gesamt und je Label) und Durchsatz auf einem Hold-out-Set"""
+    started = time.perf_counter()
+    predicted = []
+    for offset in range(0, len(texts), batch_size):
+        predicted += [label for label, _ in model.predict(texts[offset:offset + batch_size])]
+    elapsed = time.perf_counter() - started
+    per_label = {}
+    for label in sorted(set(labels)):
+        hits = [p == label for p, t in zip(predicted, labels) if t == label]
+        per_label[label] = round(sum(hits) / len(hits), 4)
+    return {
+        "documents": len(texts),
+        "accuracy": round(sum(p == t for p, t in zip(predicted, labels)) / max(len(texts), 1), 4),
+        "recall": per_label,
+        "documents_per_second": round(len(texts) / elapsed, 1) if elapsed else None,
+    }
+
+
+def save(model: ClassifierModel, directory: Path, activate: bool = True) -> Path:
+    """Speichert eine Modellversion und setzt sie optional als aktiv"""
+    directory.mkdir(parents=True, exist_ok=True)
+    terms = sorted(model.vocabulary, key=model.vocabulary.__getitem__)
+    path = directory / f"{model.version}.npz"
+    np.savez_compressed(path, terms=np.array(terms, dtype=str), idf=model.idf, weights=model.weights, bias=model.bias)
+    (directory / f"{model.version}.json").write_text(json.dumps(
+        {"version": model.version, "labels": list(model.labels), "metrics": model.metrics}, indent=2, ensure_ascii=False,
+    ))
+    if activate:
+        (directory / LATEST).write_text(model.version)
+    logger.info(f"Saved classifier model {model.version} ({len(terms)} features)")
+    return path
+
+
+def list_versions(directory: Path) -> List[dict]:
+    """Metadaten aller gespeicherten Versionen, neueste zuerst"""
+    return [json.loads(path.read_text()) for path in sorted(directory.glob("*.json"), reverse=True)]
+
+
+def active_version(directory: Path) -> Optional[str]:
+    latest = directory / LATEST
+    return latest.read_text().strip() if latest.exists() else None
+
+
+def load(directory: Path, version: Optional[str] = None) -> ClassifierModel:
+    """Lädt eine Version (Default: aktive Version)"""
+    version = version or active_version(directory)
+    if not version or not (directory / f"{version}.npz").exists():
+        raise FileNotFoundError(f"Classifier model not found: {version or LATEST} in {directory}")
+    meta = json.loads((directory / f"{version}.json").read_text())
+    with np.load(directory / f"{version}.npz", allow_pickle=False) as data:
+        return ClassifierModel(
+            version=version,
+            labels=tuple(meta["labels"]),
+            vocabulary={term: i for i, term in enumerate(data["terms"].tolist())},
+            idf=data["idf"],
+            weights=data["weights"],
+            bias=data["bias"],
+            metrics=meta.get("metrics", {}),
+        )
+
+
+def train_and_save(
+    texts: Sequence[str], labels: Sequence[str], directory: Path, holdout: float = 0.2, seed: int = 0, **options
+) -> ClassifierModel:
+    """Trainiert auf (1 - holdout) der Dokumente, misst auf dem Rest und speichert die Version"""
+    order = np.random.default_rng(seed).permutation(len(texts))
+    cut = int(len(texts) * (1 - holdout))
+    fit, test = order[:cut], order[cut:]
+    model = train([texts[i] for i in fit], [labels[i] for i in fit], **options)
+    if len(test):
+        model.metrics["holdout"] = evaluate(model, [texts[i] for i in test], [labels[i] for i in test])
+    save(model, directory)
+    return model
+
+
+_models: Dict[str, ClassifierModel] = {}
+_lock = threading.Lock()
+
+
+def get_model(version: Optional[str] = None) -> ClassifierModel:
+    """
+    Modell für die Endpoints (gecacht je Version)
+
+    Ohne gespeichertes Modell wird bei CLASSIFIER_BOOTSTRAP_SYNTHETIC einmalig
+    ein Startmodell aus synthetischen Dokumenten trainiert.
+    """
+    from app.config import settings
+
+    directory = Path(settings.CLASSIFIER_MODEL_DIR)
+    with _lock:
+        version = version or active_version(directory)
+        if version in _models:
+            return _models[version]
+        if version is None and settings.CLASSIFIER_BOOTSTRAP_SYNTHETIC:
+            from app.services.classifier_samples import synthetic_documents
+
+            logger.warning("No classifier model found, training bootstrap model from synthetic documents")
+            texts, labels = zip(*synthetic_documents(settings.CLASSIFIER_BOOTSTRAP_DOCUMENTS))
+            model = train_and_save(list(texts), list(labels), directory, version=time.strftime("%Y%m%d-%H%M%S") + "-synthetic")
+        else:
+            model = load(directory, version)
+        _models[model.version] = model
+        return model
+
+
+def _read_jsonl(path: str) -> Tuple[List[str], List[str]]:
+    texts, labels = [], []
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            if line.strip():
+                record = json.loads(line)
+                texts.append(record["text"])
+                labels.append(record["label"])
+    return texts, labels
+
+
+def main(argv: Optional[Iterable[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Train and evaluate the local document classifier")
+    parser.add_argument("--model-dir", default=None, help="Default: CLASSIFIER_MODEL_DIR")
+    commands = parser.add_subparsers(dest="command", required=True)
+    synthetic = commands.add_parser("synthetic", help="Write synthetic labelled documents as JSONL")
+    synthetic.add_argument("--count", type=int, default=20_000)
+    synthetic.add_argument("--seed", type=int, default=0)
+    synthetic.add_argument("--out", required=True)
+    fit = commands.add_parser("train", help="Train a new model version and activate it")
+    fit.add_argument("--data", required=True)
+    fit.add_argument("--holdout", type=float, default=0.2)
+    fit.add_argument("--epochs", type=int, default=40)
+    check = commands.add_parser("evaluate", help="Evaluate a model version on labelled documents")
+    check.add_argument("--data", required=True)
+    check.add_argument("--version", default=None)
+    args = parser.parse_args(argv)
+
+    if args.command == "synthetic":
+        from app.services.classifier_samples import synthetic_documents
+
+        with open(args.out, "w", encoding="utf-8") as handle:
+            for text, label in synthetic_documents(args.count, args.seed):
+                handle.write(json.dumps({"text": text, "label": label}, ensure_ascii=False) + "\n")
+        return
+
+    if args.model_dir is None:
+        from app.config import settings
+
+        args.model_dir = settings.CLASSIFIER_MODEL_DIR
+    directory = Path(args.model_dir)
+    texts, labels = _read_jsonl(args.data)
+    if args.command == "train":
+        model = train_and_save(texts, labels, directory, holdout=args.holdout, epochs=args.epochs)
+        print(json.dumps({"version": model.version, **model.metrics}, indent=2, ensure_ascii=False))
+    else:
+        model = load(directory, args.version)
+        print(json.dumps({"version": model.version, **evaluate(model, texts, labels)}, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
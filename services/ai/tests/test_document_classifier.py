@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+SERVICE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(SERVICE_DIR))
+
+# Drop another service's (or the monolith's) ``app`` package if one is loaded
+if not str(getattr(sys.modules.get("app"), "__file__", "")).startswith(str(SERVICE_DIR)):
+    for name in [m for m in sys.modules if m == "app" or m.startswith("app.")]:
+        del sys.modules[name]
+
+from app.api.v1.endpoints import classification  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.services import document_classifier  # noqa: E402
+from app.services.classifier_samples import synthetic_documents  # noqa: E402
+
+INVOICE = "Rechnung Nr. 2025-0412\nRechnungsdatum 03.04.2025\nZahlbar innerhalb 14 Tagen netto\nMwSt 19 %"
+
+
+@pytest.fixture(scope="module")
+def samples():
+    texts, labels = zip(*synthetic_documents(800, seed=3))
+    return list(texts), list(labels)
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "CLASSIFIER_MODEL_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "CLASSIFIER_BOOTSTRAP_SYNTHETIC", False)
+    monkeypatch.setattr(document_classifier, "_models", {})
+    return tmp_path
+
+
+def test_train_save_load_predict(samples, model_dir):
+    texts, labels = samples
+    model = document_classifier.train_and_save(texts, labels, model_dir, version="v1")
+
+    loaded = document_classifier.load(model_dir)
+    assert loaded.version == "v1" and loaded.labels == model.labels
+    assert loaded.metrics["holdout"]["accuracy"] > 0.8
+    # Gespeichertes Modell liefert dieselben Wahrscheinlichkeiten wie das trainierte
+    assert loaded.predict_proba(texts[:50]) == pytest.approx(model.predict_proba(texts[:50]), abs=1e-5)
+    label, confidence = loaded.predict([INVOICE])[0]
+    assert label == "invoice" and confidence > 0.5
+    # Batch und Einzeldokumente ergeben dieselben Ergebnisse
+    assert loaded.predict(texts[:20]) == [loaded.predict([text])[0] for text in texts[:20]]
+
+
+def test_latest_selects_active_version(samples, model_dir):
+    texts, labels = samples
+    document_classifier.train_and_save(texts, labels, model_dir, version="v1", epochs=5)
+    document_classifier.save(document_classifier.train(texts, labels, version="v2", epochs=5), model_dir, activate=False)
+
+    assert document_classifier.get_model().version == "v1"
+    (model_dir / document_classifier.LATEST).write_text("v2")
+    assert document_classifier.get_model().version == "v2"
+    assert document_classifier.get_model("v1").version == "v1"
+    assert [meta["version"] for meta in document_classifier.list_versions(model_dir)] == ["v2", "v1"]
+    with pytest.raises(FileNotFoundError):
+        document_classifier.get_model("v3")
+
+
+@pytest.fixture
+def client(samples, model_dir, monkeypatch):
+    texts, labels = samples
+    document_classifier.train_and_save(texts, labels, model_dir, version="v1")
+    monkeypatch.setattr(settings, "CLASSIFIER_MAX_BATCH", 3)
+    app = FastAPI()
+    app.include_router(classification.router, prefix="/classify")
+    return TestClient(app)
+
+
+def test_batch_size_is_limited(client):
+    documents = [{"id": str(n), "text": INVOICE} for n in range(4)]
+
+    assert client.post("/classify/batch", json={"documents": documents}).status_code == 413
+    response = client.post("/classify/batch", json={"documents": documents[:3]})
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()["results"]] == ["0", "1", "2"]
+    assert {item["document_type"] for item in response.json()["results"]} == {"invoice"}
+
+
+def test_low_confidence_is_unknown(client, monkeypatch):
+    # Ohne bekannte Merkmale bleibt nur der Bias: keine Klasse erreicht die Mindestkonfidenz
+    response = client.post("/classify/batch", json={"documents": [{"text": "qqqq"}]}).json()
+    [item] = response["results"]
+    assert item["document_type"] == "unknown" and item["confidence"] < settings.CLASSIFIER_MIN_CONFIDENCE
+    assert item["suggested_actions"] == document_classifier.SUGGESTED_ACTIONS["unknown"]
+
+    monkeypatch.setattr(settings, "CLASSIFIER_MIN_CONFIDENCE", 0.0)
+    [item] = client.post("/classify/batch", json={"documents": [{"text": "qqqq"}]}).json()["results"]
+    assert item["document_type"] != "unknown"
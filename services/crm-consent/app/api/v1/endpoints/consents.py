@@ -16,8 +16,16 @@ from app.schemas.consent import (
     ConsentHistory as ConsentHistorySchema,
     ConsentCheckRequest,
     ConsentCheckResponse,
+    ConsentBulkCheckRequest,
+    ConsentBulkCheckResponse,
 )
 from app.config.settings import settings
+from app.services.consent_index import (
+    get_consent_index,
+    latest_consent_query,
+    load_active_consents,
+    naive_utc,
+)
 from app.services.events import get_event_publisher
 
 router = APIRouter()
@@ -71,6 +79,7 @@ async def create_consent(
     )
     db.add(history)
     await db.commit()
+    get_consent_index().upsert(consent)
     
     # Publish event
     event_publisher = get_event_publisher()
@@ -169,6 +178,7 @@ async def update_consent(
     
     await db.commit()
     await db.refresh(consent)
+    get_consent_index().upsert(consent)
     
     # Publish event if status changed
     if old_status != consent.status:
@@ -196,6 +206,7 @@ async def delete_consent(
     
     await db.delete(consent)
     await db.commit()
+    get_consent_index().remove(consent.tenant_id, consent.id)
     
     return None
 
@@ -250,6 +261,7 @@ async def confirm_double_opt_in(
     
     await db.commit()
     await db.refresh(consent)
+    get_consent_index().upsert(consent)
     
     # Publish event
     event_publisher = get_event_publisher()
@@ -307,6 +319,7 @@ async def revoke_consent(
     
     await db.commit()
     await db.refresh(consent)
+    get_consent_index().upsert(consent)
     
     # Publish event
     event_publisher = get_event_publisher()
@@ -364,17 +377,14 @@ async def check_consent(
     db: AsyncSession = Depends(get_db),
 ):
     """Check if a contact has active consent for a channel."""
-    filters = [
-        Consent.tenant_id == tenant_id,
-        Consent.contact_id == check_request.contact_id,
-        Consent.channel == ConsentChannel(check_request.channel),
-        Consent.status == ConsentStatus.GRANTED,
-    ]
-    
-    if check_request.consent_type:
-        filters.append(Consent.consent_type == ConsentType(check_request.consent_type))
-    
-    stmt = select(Consent).where(and_(*filters)).order_by(Consent.granted_at.desc())
+    now = datetime.utcnow()
+    stmt = latest_consent_query(
+        tenant_id,
+        check_request.contact_id,
+        check_request.channel,
+        check_request.consent_type,
+        now,
+    )
     result = await db.execute(stmt)
     consent = result.scalar_one_or_none()
     
@@ -384,9 +394,9 @@ async def check_consent(
             is_expired=False,
         )
     
-    # Check if expired
+    # Only returned when no active consent exists
     is_expired = False
-    if consent.expires_at and consent.expires_at < datetime.utcnow():
+    if consent.expires_at and naive_utc(consent.expires_at) <= now:
         is_expired = True
     
     return ConsentCheckResponse(
@@ -398,3 +408,51 @@ async def check_consent(
         is_expired=is_expired,
     )
 
+
+@router.post("/check/bulk", response_model=ConsentBulkCheckResponse)
+async def check_consent_bulk(
+    bulk_request: ConsentBulkCheckRequest,
+    tenant_id: str = Query(..., description="Tenant ID"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Check consent for many contacts/channels at once.
+    
+    Answered from the in-memory consent index, "granted" answers are
+    confirmed with one primary-key query; while the index is not built,
+    active consents of the requested contacts are loaded in one query per
+    chunk instead.
+    """
+    if len(bulk_request.checks) > settings.CONSENT_BULK_CHECK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.CONSENT_BULK_CHECK_MAX_ITEMS} checks per request",
+        )
+    
+    checks = [(c.contact_id, c.channel, c.consent_type) for c in bulk_request.checks]
+    index = get_consent_index()
+    if index.ready:
+        decisions = await index.check_many_verified(db, tenant_id, checks)
+        source = "index"
+    else:
+        index = await load_active_consents(db, tenant_id, {c[0] for c in checks}, datetime.utcnow())
+        decisions = index.check_many(tenant_id, checks)
+        source = "database"
+    
+    results = [
+        {
+            "contact_id": contact_id,
+            "channel": channel,
+            "consent_type": consent_type,
+            "has_consent": decision.has_consent,
+            "consent_id": decision.consent_id,
+            "granted_at": decision.granted_at,
+            "expires_at": decision.expires_at,
+        }
+        for (contact_id, channel, consent_type), decision in zip(checks, decisions)
+    ]
+    return ConsentBulkCheckResponse(
+        results=results,
+        granted=sum(1 for d in decisions if d.has_consent),
+        source=source,
+    )
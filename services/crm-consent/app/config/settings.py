@@ -28,6 +28,11 @@ class Settings(BaseSettings):
     # Double Opt-In
     DOUBLE_OPT_IN_TOKEN_EXPIRY_HOURS: int = Field(default=48)
     
+    # Consent index (bulk checks)
+    CONSENT_INDEX_REFRESH_INTERVAL: float = Field(default=30.0)  # Seconds between incremental refreshes
+    CONSENT_INDEX_REBUILD_INTERVAL: float = Field(default=900.0)  # Full rebuild (bulk checks verify "granted" meanwhile)
+    CONSENT_BULK_CHECK_MAX_ITEMS: int = Field(default=50_000)  # Checks per bulk request
+    
     # Event Bus (future use)
     EVENT_BUS_URL: str | None = Field(default=None)
     
@@ -8,6 +8,9 @@ from .consent import (
     ConsentHistory,
     ConsentCheckRequest,
     ConsentCheckResponse,
+    ConsentBulkCheckRequest,
+    ConsentBulkCheckResult,
+    ConsentBulkCheckResponse,
 )
 
 __all__ = [
@@ -18,5 +21,8 @@ __all__ = [
     "ConsentHistory",
     "ConsentCheckRequest",
     "ConsentCheckResponse",
+    "ConsentBulkCheckRequest",
+    "ConsentBulkCheckResult",
+    "ConsentBulkCheckResponse",
 ]
 
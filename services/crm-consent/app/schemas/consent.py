@@ -83,3 +83,26 @@ class ConsentCheckResponse(BaseModel):
     expires_at: datetime | None = None
     is_expired: bool = False
 
+
+
+class ConsentBulkCheckRequest(BaseModel):
+    """Request to check consent for many contacts at once."""
+    checks: list[ConsentCheckRequest]
+
+
+class ConsentBulkCheckResult(BaseModel):
+    """Result of one check in a bulk request."""
+    contact_id: UUID
+    channel: str
+    consent_type: str | None = None
+    has_consent: bool
+    consent_id: UUID | None = None
+    granted_at: datetime | None = None
+    expires_at: datetime | None = None
+
+
+class ConsentBulkCheckResponse(BaseModel):
+    """Response to a bulk consent check (results in request order)."""
+    results: list[ConsentBulkCheckResult]
+    granted: int
+    source: str  # "index" or "database"
@@ -0,0 +1,474 @@
+"""In-memory index of active consents.
+
+Campaign and multichannel sends check consent for thousands of recipients
+at once. Instead of one query per (contact, channel, type) the bulk check
+answers from an index of all currently granted, non-expired consents:
+
+- the index is built per tenant with one query on startup
+- changes made through this service are applied directly (``upsert`` /
+  ``remove``); changes made by other replicas are picked up by an
+  incremental refresh on ``updated_at``, a periodic full rebuild catches
+  deletes
+- the bulk check confirms every "granted" answer against the database
+  (one primary-key query per request, ``check_many_verified``), so a
+  consent revoked or deleted on another replica is never reported as
+  granted while the index lags behind; stale entries are dropped
+- consents with ``expires_at`` are dropped by an expiry timer; lookups also
+  re-check expiry, so a late timer never yields a stale "granted"
+
+Semantics are the same as the query path (``latest_consent_query``): the
+latest granted, non-expired consent for the contact/channel (and type, if
+given) wins.
+"""
+
+import asyncio
+import heapq
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import and_, bindparam, case, or_, select
+
+from app.config.settings import settings
+from app.db.models import Consent, ConsentChannel, ConsentStatus, ConsentType
+
+logger = logging.getLogger(__name__)
+
+REBUILD_FETCH_SIZE = 10_000
+
+_ALL_TYPES = None  # key component for "any consent type"
+_EPOCH = datetime(1970, 1, 1)
+
+IndexKey = Tuple[UUID, str, Optional[str]]
+
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Timestamps are compared as naive UTC (the service writes ``utcnow()``)."""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def latest_consent_query(
+    tenant_id: str,
+    contact_id: UUID,
+    channel: str,
+    consent_type: Optional[str],
+    now: datetime,
+):
+    """
+    Latest granted consent for one contact/channel (query path).
+
+    Active (non-expired) consents sort first, so an expired row is only
+    returned when no active one exists.
+    """
+    filters = [
+        Consent.tenant_id == tenant_id,
+        Consent.contact_id == contact_id,
+        Consent.channel == ConsentChannel(channel),
+        Consent.status == ConsentStatus.GRANTED,
+    ]
+    if consent_type:
+        filters.append(Consent.consent_type == ConsentType(consent_type))
+    active_first = case((or_(Consent.expires_at.is_(None), Consent.expires_at > now), 0), else_=1)
+    return (
+        select(Consent)
+        .where(and_(*filters))
+        .order_by(active_first, Consent.granted_at.desc().nulls_last(), Consent.id.desc())
+        .limit(1)
+    )
+
+
+@dataclass(slots=True)
+class IndexedConsent:
+    """Active consent as kept in the index."""
+    id: UUID
+    contact_id: UUID
+    channel: str
+    consent_type: str
+    granted_at: Optional[datetime]
+    expires_at: Optional[datetime]
+
+    @property
+    def rank(self) -> Tuple[datetime, str]:
+        # Same order as the query path: granted_at desc (NULL last), id desc
+        return (self.granted_at or _EPOCH, str(self.id))
+
+
+@dataclass(slots=True)
+class ConsentDecision:
+    """Answer for one (contact, channel, type) check."""
+    has_consent: bool
+    consent_id: Optional[UUID] = None
+    granted_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+
+
+_NO_CONSENT = ConsentDecision(has_consent=False)
+
+
+class _TenantIndex:
+    """Active consents of one tenant, keyed by contact/channel/type."""
+
+    __slots__ = ("consents", "keys", "best")
+
+    def __init__(self):
+        self.consents: Dict[UUID, IndexedConsent] = {}
+        self.keys: Dict[IndexKey, List[UUID]] = {}
+        self.best: Dict[IndexKey, IndexedConsent] = {}
+
+    def add(self, consent: IndexedConsent) -> None:
+        self.consents[consent.id] = consent
+        for key in ((consent.contact_id, consent.channel, consent.consent_type),
+                    (consent.contact_id, consent.channel, _ALL_TYPES)):
+            self.keys.setdefault(key, []).append(consent.id)
+            best = self.best.get(key)
+            if best is None or consent.rank > best.rank:
+                self.best[key] = consent
+
+    def discard(self, consent_id: UUID) -> Optional[IndexedConsent]:
+        consent = self.consents.pop(consent_id, None)
+        if consent is None:
+            return None
+        for key in ((consent.contact_id, consent.channel, consent.consent_type),
+                    (consent.contact_id, consent.channel, _ALL_TYPES)):
+            ids = self.keys[key]
+            ids.remove(consent_id)
+            if not ids:
+                del self.keys[key]
+                del self.best[key]
+            elif self.best[key].id == consent_id:
+                self.best[key] = max((self.consents[i] for i in ids), key=lambda c: c.rank)
+        return consent
+
+
+class ConsentIndex:
+    """Per-tenant index of granted, non-expired consents."""
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable] = None,
+        refresh_interval: float = settings.CONSENT_INDEX_REFRESH_INTERVAL,
+        rebuild_interval: float = settings.CONSENT_INDEX_REBUILD_INTERVAL,
+        clock: Callable[[], datetime] = datetime.utcnow,
+    ):
+        self._session_factory = session_factory
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+        self.clock = clock
+        self._tenants: Dict[str, _TenantIndex] = {}
+        self._expiry: List[Tuple[datetime, str, UUID]] = []  # heap of (expires_at, tenant, consent)
+        self._watermark: Optional[datetime] = None
+        self._last_rebuild = 0.0
+        self._lock = asyncio.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.ready = False
+        self.running = False
+
+    @property
+    def session_factory(self) -> Callable:
+        if self._session_factory is None:
+            from app.db.session import async_session
+
+            self._session_factory = async_session
+        return self._session_factory
+
+    def __len__(self) -> int:
+        return sum(len(t.consents) for t in self._tenants.values())
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def check(
+        self,
+        tenant_id: str,
+        contact_id: UUID,
+        channel: str,
+        consent_type: Optional[str] = None,
+    ) -> ConsentDecision:
+        """Answer one check from the index."""
+        tenant = self._tenants.get(tenant_id)
+        if tenant is None:
+            return _NO_CONSENT
+        key = (contact_id, channel, consent_type or _ALL_TYPES)
+        best = tenant.best.get(key)
+        if best is None:
+            return _NO_CONSENT
+        if best.expires_at is not None and best.expires_at <= self.clock():
+            # Expiry timer has not run yet
+            self._expire(self.clock())
+            best = tenant.best.get(key)
+            if best is None:
+                return _NO_CONSENT
+        return ConsentDecision(True, best.id, best.granted_at, best.expires_at)
+
+    def check_many(
+        self,
+        tenant_id: str,
+        checks: Iterable[Tuple[UUID, str, Optional[str]]],
+    ) -> List[ConsentDecision]:
+        """Answer many (contact_id, channel, consent_type) checks, in order."""
+        self._expire(self.clock())
+        tenant = self._tenants.get(tenant_id)
+        if tenant is None:
+            return [_NO_CONSENT for _ in checks]
+        best = tenant.best.get
+        results = []
+        for contact_id, channel, consent_type in checks:
+            consent = best((contact_id, channel, consent_type or _ALL_TYPES))
+            if consent is None:
+                results.append(_NO_CONSENT)
+            else:
+                results.append(ConsentDecision(True, consent.id, consent.granted_at, consent.expires_at))
+        return results
+
+    async def check_many_verified(
+        self,
+        db,
+        tenant_id: str,
+        checks: List[Tuple[UUID, str, Optional[str]]],
+        chunk_size: int = 5000,
+    ) -> List[ConsentDecision]:
+        """
+        ``check_many`` with every "granted" answer confirmed in the database.
+
+        Consents that are no longer granted (revoked or deleted by another
+        replica, expiry moved) are removed from the index and the checks are
+        answered again, until all remaining "granted" answers are confirmed.
+        Consents granted elsewhere show up with the next refresh; until then
+        the answer errs on the side of "no consent".
+        """
+        decisions = self.check_many(tenant_id, checks)
+        confirmed: set = set()
+        while True:
+            ids = list({d.consent_id for d in decisions if d.has_consent} - confirmed)
+            if not ids:
+                return decisions
+            now = self.clock()
+            valid = set()
+            for start in range(0, len(ids), chunk_size):
+                valid.update(await db.scalars(
+                    select(Consent.id).where(
+                        Consent.id.in_(ids[start:start + chunk_size]),
+                        Consent.tenant_id == tenant_id,
+                        Consent.status == ConsentStatus.GRANTED,
+                        or_(Consent.expires_at.is_(None), Consent.expires_at > now),
+                    )
+                ))
+            stale = set(ids) - valid
+            if not stale:
+                return decisions
+            logger.info(f"Dropping {len(stale)} stale consents from the index of tenant {tenant_id}")
+            for consent_id in stale:
+                self.remove(tenant_id, consent_id)
+            confirmed |= valid
+            decisions = self.check_many(tenant_id, checks)
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def upsert(self, consent: Consent) -> None:
+        """Apply a consent row after it was written (any status)."""
+        tenant = self._tenants.setdefault(consent.tenant_id, _TenantIndex())
+        tenant.discard(consent.id)
+        if consent.status != ConsentStatus.GRANTED:
+            return
+        expires_at = naive_utc(consent.expires_at)
+        if expires_at is not None and expires_at <= self.clock():
+            return
+        tenant.add(_indexed(consent))
+        if expires_at is not None:
+            heapq.heappush(self._expiry, (expires_at, consent.tenant_id, consent.id))
+            if self._wakeup is not None and self._expiry[0][2] == consent.id:
+                self._wakeup.set()
+
+    def remove(self, tenant_id: str, consent_id: UUID) -> None:
+        """Drop a deleted consent."""
+        tenant = self._tenants.get(tenant_id)
+        if tenant is not None:
+            tenant.discard(consent_id)
+
+    def _expire(self, now: datetime) -> int:
+        expired = 0
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, tenant_id, consent_id = heapq.heappop(self._expiry)
+            tenant = self._tenants.get(tenant_id)
+            consent = tenant.consents.get(consent_id) if tenant else None
+            # The consent may have been extended or revoked since it was queued
+            if consent is not None and consent.expires_at == expires_at:
+                tenant.discard(consent_id)
+                expired += 1
+        return expired
+
+    async def rebuild(self) -> int:
+        """Load all active consents (one query). Returns indexed consents."""
+        async with self._lock:
+            started = self.clock()
+            tenants: Dict[str, _TenantIndex] = {}
+            expiry: List[Tuple[datetime, str, UUID]] = []
+            async with self.session_factory() as db:
+                result = await db.stream(_ACTIVE_CONSENTS, {"now": started})
+                async for rows in result.partitions(REBUILD_FETCH_SIZE):
+                    for row in rows:
+                        consent = _indexed(row)
+                        tenants.setdefault(row.tenant_id, _TenantIndex()).add(consent)
+                        if consent.expires_at is not None:
+                            expiry.append((consent.expires_at, row.tenant_id, row.id))
+            heapq.heapify(expiry)
+            self._tenants = tenants
+            self._expiry = expiry
+            self._watermark = started
+            self._last_rebuild = time.monotonic()
+            self.ready = True
+            size = len(self)
+        logger.info(f"Consent index rebuilt: {size} active consents in {len(tenants)} tenants")
+        return size
+
+    async def refresh(self) -> int:
+        """Apply rows changed since the last rebuild/refresh (other replicas)."""
+        if self._watermark is None:
+            return await self.rebuild()
+        async with self._lock:
+            started = self.clock()
+            async with self.session_factory() as db:
+                result = await db.execute(
+                    select(Consent).where(Consent.updated_at >= self._watermark)
+                )
+                changed = result.scalars().all()
+            for consent in changed:
+                self.upsert(consent)
+            self._watermark = started
+        return len(changed)
+
+    # ------------------------------------------------------------------
+    # Background loop
+    # ------------------------------------------------------------------
+
+    async def start(self) -> None:
+        """Build the index and start expiry/refresh timers."""
+        if self.running:
+            return
+        try:
+            await self.rebuild()
+        except Exception as e:
+            # Bulk checks fall back to the query path until a rebuild succeeds
+            logger.error(f"Initial consent index build failed: {e}")
+        self.running = True
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self.running = False
+        if self._wakeup is not None:
+            self._wakeup.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    async def _run(self) -> None:
+        next_refresh = time.monotonic() + self.refresh_interval
+        while self.running:
+            timeout = max(0.0, next_refresh - time.monotonic())
+            if self._expiry:
+                until_expiry = (self._expiry[0][0] - self.clock()).total_seconds()
+                timeout = min(timeout, max(0.0, until_expiry))
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if not self.running:
+                break
+
+            self._expire(self.clock())
+            if time.monotonic() >= next_refresh:
+                next_refresh = time.monotonic() + self.refresh_interval
+                try:
+                    if not self.ready or time.monotonic() - self._last_rebuild >= self.rebuild_interval:
+                        await self.rebuild()
+                    else:
+                        await self.refresh()
+                except Exception as e:
+                    logger.error(f"Consent index refresh failed: {e}")
+
+
+def _indexed(row) -> IndexedConsent:
+    """IndexedConsent from a Consent row or an ``_ACTIVE_CONSENTS`` result row."""
+    return IndexedConsent(
+        id=row.id,
+        contact_id=row.contact_id,
+        channel=ConsentChannel(row.channel).value,
+        consent_type=ConsentType(row.consent_type).value,
+        granted_at=naive_utc(row.granted_at),
+        expires_at=naive_utc(row.expires_at),
+    )
+
+
+_ACTIVE_CONSENTS = (
+    select(
+        Consent.id, Consent.tenant_id, Consent.contact_id, Consent.channel,
+        Consent.consent_type, Consent.granted_at, Consent.expires_at,
+    )
+    .where(
+        Consent.status == ConsentStatus.GRANTED,
+        or_(Consent.expires_at.is_(None), Consent.expires_at > bindparam("now")),
+    )
+)
+
+
+async def load_active_consents(
+    db,
+    tenant_id: str,
+    contact_ids: Iterable[UUID],
+    now: datetime,
+    chunk_size: int = 5000,
+) -> "ConsentIndex":
+    """
+    Index of the active consents of some contacts, straight from the database.
+
+    Used by the bulk check while the shared index is not built yet: one
+    query per ``chunk_size`` contacts instead of one per check.
+    """
+    index = ConsentIndex(clock=lambda: now)
+    tenant = index._tenants.setdefault(tenant_id, _TenantIndex())
+    ids = list(set(contact_ids))
+    for start in range(0, len(ids), chunk_size):
+        result = await db.execute(
+            _ACTIVE_CONSENTS.where(
+                Consent.tenant_id == tenant_id,
+                Consent.contact_id.in_(ids[start:start + chunk_size]),
+            ),
+            {"now": now},
+        )
+        for row in result:
+            tenant.add(_indexed(row))
+    index.ready = True
+    return index
+
+
+# Global index instance
+_consent_index: Optional[ConsentIndex] = None
+
+
+def get_consent_index() -> ConsentIndex:
+    """Get the global consent index instance."""
+    global _consent_index
+    if _consent_index is None:
+        _consent_index = ConsentIndex()
+    return _consent_index
+
+
+async def start_consent_index() -> None:
+    """Build the global consent index and start its timers."""
+    await get_consent_index().start()
+
+
+async def stop_consent_index() -> None:
+    """Stop the global consent index timers."""
+    await get_consent_index().stop()
@@ -3,17 +3,32 @@ CRM Consent Service
 FastAPI application for GDPR-compliant consent management.
 """
 
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.v1.api import api_router
 from app.config.settings import settings
+from app.services.consent_index import start_consent_index, stop_consent_index
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    # Full index build on start; kept fresh by local changes, refresh and expiry timers
+    await start_consent_index()
+    try:
+        yield
+    finally:
+        await stop_consent_index()
+
 
 app = FastAPI(
     title="CRM Consent Service",
     description="GDPR-compliant consent management with double opt-in",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS middleware
@@ -0,0 +1,111 @@
+"""
+Benchmark: bulk consent checks
+
+Seeds N contacts with random consents, builds the ConsentIndex (one query)
+and answers M (contact, channel, type) checks from it. For comparison a
+sample of checks is run through the per-check query path and extrapolated.
+
+Uses an in-memory SQLite database via ``aiosqlite`` unless
+``--database-url`` points at PostgreSQL.
+
+Usage:
+    python scripts/bench_consent_check.py --contacts 200000 --checks 1000000
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import insert  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.db import models  # noqa: E402
+from app.services.consent_index import ConsentIndex, latest_consent_query  # noqa: E402
+
+TENANT_ID = "bench"
+CHANNELS = [c.value for c in models.ConsentChannel]
+TYPES = [t.value for t in models.ConsentType]
+
+
+async def seed(session_factory, contacts: int, rng: random.Random):
+    now = datetime.utcnow()
+    contact_ids = [uuid.UUID(int=rng.getrandbits(128), version=4) for _ in range(contacts)]
+    rows = []
+    for contact_id in contact_ids:
+        for _ in range(rng.randint(1, 3)):
+            rows.append({
+                "id": uuid.uuid4(),
+                "tenant_id": TENANT_ID,
+                "contact_id": contact_id,
+                "channel": models.ConsentChannel(rng.choice(CHANNELS)),
+                "consent_type": models.ConsentType(rng.choice(TYPES)),
+                "status": rng.choice([models.ConsentStatus.GRANTED] * 3 + [models.ConsentStatus.REVOKED]),
+                "source": models.ConsentSource.IMPORT,
+                "granted_at": now - timedelta(days=rng.randint(0, 700)),
+                "expires_at": now + timedelta(days=rng.randint(-60, 365)) if rng.random() < 0.3 else None,
+            })
+    async with session_factory() as db:
+        for start in range(0, len(rows), 10_000):
+            await db.execute(insert(models.Consent), rows[start:start + 10_000])
+        await db.commit()
+    return contact_ids, len(rows)
+
+
+async def main_async(args) -> None:
+    rng = random.Random(42)
+    engine = create_async_engine(args.database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+    session_factory = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    contact_ids, consents = await seed(session_factory, args.contacts, rng)
+
+    index = ConsentIndex(session_factory=session_factory)
+    start = time.perf_counter()
+    indexed = await index.rebuild()
+    t_build = time.perf_counter() - start
+
+    checks = [
+        (rng.choice(contact_ids), rng.choice(CHANNELS), rng.choice(TYPES + [None]))
+        for _ in range(args.checks)
+    ]
+    start = time.perf_counter()
+    decisions = index.check_many(TENANT_ID, checks)
+    t_index = time.perf_counter() - start
+    granted = sum(1 for d in decisions if d.has_consent)
+
+    sample = checks[:args.query_sample]
+    now = datetime.utcnow()
+    start = time.perf_counter()
+    async with session_factory() as db:
+        for contact_id, channel, consent_type in sample:
+            await db.scalar(latest_consent_query(TENANT_ID, contact_id, channel, consent_type, now))
+    t_query = time.perf_counter() - start
+    await engine.dispose()
+
+    print(f"consents         {consents:,} ({indexed:,} active) for {args.contacts:,} contacts")
+    print(f"index build      {t_build:.2f} s")
+    print(f"index checks     {args.checks:,} in {t_index:.2f} s "
+          f"({args.checks / t_index:,.0f} checks/s, {granted:,} granted)")
+    print(f"query path       {len(sample):,} in {t_query:.2f} s "
+          f"({len(sample) / t_query:,.0f} checks/s, ~{args.checks * t_query / len(sample):,.0f} s for all)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--contacts", type=int, default=200_000)
+    parser.add_argument("--checks", type=int, default=1_000_000)
+    parser.add_argument("--query-sample", type=int, default=2_000)
+    parser.add_argument("--database-url", default="sqlite+aiosqlite:///:memory:")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+SERVICE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(SERVICE_DIR))
+
+# Drop another service's (or the monolith's) ``app`` package if one is loaded
+if not str(getattr(sys.modules.get("app"), "__file__", "")).startswith(str(SERVICE_DIR)):
+    for name in [m for m in sys.modules if m == "app" or m.startswith("app.")]:
+        del sys.modules[name]
+
+from app.db import models  # noqa: E402
+from app.services.consent_index import ConsentIndex, latest_consent_query, load_active_consents  # noqa: E402
+
+DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+NOW = datetime(2025, 6, 1, 12, 0, 0)
+CHANNELS = [c.value for c in models.ConsentChannel]
+TYPES = [t.value for t in models.ConsentType]
+
+
+@pytest_asyncio.fixture
+async def session_factory():
+    engine = create_async_engine(DATABASE_URL, future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+    yield sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    await engine.dispose()
+
+
+async def _seed_random(session_factory, contacts: int, seed: int = 7):
+    rng = random.Random(seed)
+    contact_ids = [uuid.UUID(int=rng.getrandbits(128)) for _ in range(contacts)]
+    async with session_factory() as db:
+        for contact_id in contact_ids:
+            for _ in range(rng.randint(0, 5)):
+                granted_at = NOW - timedelta(days=rng.randint(0, 400)) if rng.random() < 0.9 else None
+                expires_at = None
+                if rng.random() < 0.4:
+                    expires_at = NOW + timedelta(days=rng.randint(-30, 30))
+                db.add(models.Consent(
+                    tenant_id=rng.choice(["t1", "t1", "t2"]),
+                    contact_id=contact_id,
+                    channel=models.ConsentChannel(rng.choice(CHANNELS)),
+                    consent_type=models.ConsentType(rng.choice(TYPES)),
+                    status=rng.choice(list(models.ConsentStatus)),
+                    granted_at=granted_at,
+                    expires_at=expires_at,
+                ))
+        await db.commit()
+    return contact_ids
+
+
+@pytest.mark.asyncio
+async def test_index_matches_query_path(session_factory):
+    contact_ids = await _seed_random(session_factory, 60)
+    index = ConsentIndex(session_factory=session_factory, clock=lambda: NOW)
+    await index.rebuild()
+
+    checks = [
+        (contact_id, channel, consent_type)
+        for contact_id in contact_ids
+        for channel in CHANNELS
+        for consent_type in TYPES + [None]
+    ]
+    granted = 0
+    async with session_factory() as db:
+        for tenant_id in ("t1", "t2", "unknown"):
+            decisions = index.check_many(tenant_id, checks)
+            fallback = await load_active_consents(db, tenant_id, contact_ids, NOW)
+            for (contact_id, channel, consent_type), decision, from_db in zip(
+                checks, decisions, fallback.check_many(tenant_id, checks)
+            ):
+                consent = await db.scalar(latest_consent_query(tenant_id, contact_id, channel, consent_type, NOW))
+                expected = consent is not None and (consent.expires_at is None or consent.expires_at > NOW)
+                assert decision.has_consent == expected
+                assert decision.consent_id == (consent.id if expected else None)
+                assert from_db == decision
+                granted += expected
+    assert granted > 0
+
+
+@pytest.mark.asyncio
+async def test_index_follows_changes_and_expiry(session_factory):
+    now = [NOW]
+    index = ConsentIndex(session_factory=session_factory, clock=lambda: now[0])
+    await index.rebuild()
+    contact_id = uuid.uuid4()
+    older = models.Consent(
+        id=uuid.uuid4(), tenant_id="t1", contact_id=contact_id, channel=models.ConsentChannel.EMAIL,
+        consent_type=models.ConsentType.MARKETING, status=models.ConsentStatus.GRANTED,
+        granted_at=NOW - timedelta(days=10),
+    )
+    newer = models.Consent(
+        id=uuid.uuid4(), tenant_id="t1", contact_id=contact_id, channel=models.ConsentChannel.EMAIL,
+        consent_type=models.ConsentType.SERVICE, status=models.ConsentStatus.GRANTED,
+        granted_at=NOW - timedelta(days=1), expires_at=NOW + timedelta(hours=1),
+    )
+    index.upsert(older)
+    index.upsert(newer)
+
+    assert index.check("t1", contact_id, "email").consent_id == newer.id
+    assert index.check("t1", contact_id, "email", "marketing").consent_id == older.id
+    assert not index.check("t1", contact_id, "sms").has_consent
+
+    now[0] = NOW + timedelta(hours=2)
+    assert index.check("t1", contact_id, "email").consent_id == older.id
+    assert not index.check("t1", contact_id, "email", "service").has_consent
+
+    older.status = models.ConsentStatus.REVOKED
+    index.upsert(older)
+    assert not index.check("t1", contact_id, "email").has_consent
+    assert len(index) == 0
+
+
+@pytest.mark.asyncio
+async def test_refresh_picks_up_changes_from_other_writers(session_factory):
+    index = ConsentIndex(session_factory=session_factory)
+    await index.rebuild()
+    contact_id = uuid.uuid4()
+    async with session_factory() as db:
+        db.add(models.Consent(
+            tenant_id="t1", contact_id=contact_id, channel=models.ConsentChannel.SMS,
+            consent_type=models.ConsentType.MARKETING, status=models.ConsentStatus.GRANTED,
+            granted_at=datetime.utcnow(),
+        ))
+        await db.commit()
+
+    assert not index.check("t1", contact_id, "sms").has_consent
+    assert await index.refresh() == 1
+    assert index.check("t1", contact_id, "sms").has_consent
+
+
+@pytest.mark.asyncio
+async def test_verified_check_ignores_consents_removed_by_other_replicas(session_factory):
+    contact_id = uuid.uuid4()
+    consents = [
+        models.Consent(
+            id=uuid.uuid4(), tenant_id="t1", contact_id=contact_id, channel=models.ConsentChannel.EMAIL,
+            consent_type=consent_type, status=models.ConsentStatus.GRANTED,
+            granted_at=NOW - timedelta(days=days),
+        )
+        for consent_type, days in ((models.ConsentType.MARKETING, 3), (models.ConsentType.SERVICE, 1))
+    ]
+    async with session_factory() as db:
+        db.add_all(consents)
+        await db.commit()
+    index = ConsentIndex(session_factory=session_factory, clock=lambda: NOW)
+    await index.rebuild()
+    older, newer = consents
+
+    # Another replica deletes the newer consent and revokes the older one
+    async with session_factory() as db:
+        await db.delete(await db.get(models.Consent, newer.id))
+        await db.commit()
+    checks = [(contact_id, "email", None), (contact_id, "email", "marketing")]
+    assert [d.consent_id for d in index.check_many("t1", checks)] == [newer.id, older.id]
+    async with session_factory() as db:
+        decisions = await index.check_many_verified(db, "t1", checks)
+        assert [d.consent_id for d in decisions] == [older.id, older.id]
+
+        (await db.get(models.Consent, older.id)).status = models.ConsentStatus.REVOKED
+        await db.commit()
+        decisions = await index.check_many_verified(db, "t1", checks)
+    assert not any(d.has_consent for d in decisions)
+    assert len(index) == 0
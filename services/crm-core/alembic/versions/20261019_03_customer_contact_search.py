@@ -0,0 +1,51 @@
+"""Trigram search and keyset indexes for customer and contact lists.
+
+Revision ID: 20261019_03_customer_contact_search
+Revises: 20251114_02_expand_crm_entities
+Create Date: 2026-10-19 15:00:00
+
+The list endpoints match LIKE '%term%' against the expressions built by
+app.db.search.search_text; the GIN indexes must use exactly those
+expressions. Unfiltered lists page by (created_at, id) descending.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "20261019_03_customer_contact_search"
+down_revision: Union[str, None] = "20251114_02_expand_crm_entities"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CUSTOMER_SEARCH_TEXT = "lower(coalesce(display_name, ''))"
+CONTACT_SEARCH_TEXT = (
+    "lower((((coalesce(first_name, '') || ' ') || coalesce(last_name, '')) || ' ') || coalesce(email, ''))"
+)
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_crm_core_customers_search_trgm "
+        f"ON crm_core_customers USING gin (({CUSTOMER_SEARCH_TEXT}) gin_trgm_ops)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_crm_core_contacts_search_trgm "
+        f"ON crm_core_contacts USING gin (({CONTACT_SEARCH_TEXT}) gin_trgm_ops)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_crm_core_customers_tenant_created "
+        "ON crm_core_customers (tenant_id, created_at DESC, id DESC)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_crm_core_contacts_created "
+        "ON crm_core_contacts (created_at DESC, id DESC)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_crm_core_contacts_created")
+    op.execute("DROP INDEX IF EXISTS ix_crm_core_customers_tenant_created")
+    op.execute("DROP INDEX IF EXISTS ix_crm_core_contacts_search_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_crm_core_customers_search_trgm")
@@ -1,19 +1,32 @@
+from datetime import datetime
 from typing import List
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-import sqlalchemy as sa
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.config import settings
 from app.db.models import Contact, Customer
+from app.db.search import (
+    decode_cursor,
+    encode_cursor,
+    estimate_count,
+    keyset_after,
+    match,
+    normalize_term,
+    search_text,
+    similarity,
+)
 from app.db.session import get_session
 from app.schemas import ContactCreate, ContactListResponse, ContactRead, ContactUpdate
 
 router = APIRouter()
 
+# Same expression as the trigram index ix_crm_core_contacts_search_trgm
+CONTACT_SEARCH_TEXT = search_text(Contact.first_name, Contact.last_name, Contact.email)
+
 
 def _ensure_contact_customer_name(records: List[Contact]) -> None:
     for contact in records:
@@ -25,39 +38,58 @@ def _ensure_contact_customer_name(records: List[Contact]) -> None:
 async def list_contacts(
     customer_id: UUID | None = Query(default=None),
     search: str | None = Query(default=None),
-    skip: int = Query(0, ge=0),
+    skip: int = Query(0, ge=0, description="Deprecated: use cursor"),
     limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = Query(default=None, description="next_cursor of the previous page"),
+    exact_total: bool = Query(False, description="Exact COUNT(*) instead of the planner estimate"),
     session: AsyncSession = Depends(get_session),
 ) -> ContactListResponse:
+    """Keyset-paginated contacts: newest first, or by relevance when searching."""
+    term = normalize_term(search)
     filters = [Customer.tenant_id == settings.DEFAULT_TENANT_ID]
     if customer_id:
         filters.append(Contact.customer_id == customer_id)
-    if search:
-        like_pattern = f"%{search.strip()}%"
-        filters.append(
-            sa.or_(  # type: ignore[attr-defined]
-                Contact.first_name.ilike(like_pattern),
-                Contact.last_name.ilike(like_pattern),
-                Contact.email.ilike(like_pattern),
-            )
-        )
-
-    total_stmt = select(func.count()).select_from(Contact).join(Customer).where(*filters)
-    total = await session.scalar(total_stmt)
-
-    stmt = (
-        select(Contact)
-        .options(selectinload(Contact.customer))
-        .join(Customer)
-        .where(*filters)
-        .offset(skip)
-        .limit(limit)
-        .order_by(Contact.created_at.desc())
-    )
-    result = await session.execute(stmt)
-    contacts = result.scalars().all()
+    if term:
+        filters.append(match(CONTACT_SEARCH_TEXT, term))
+        keys, descending = [similarity(CONTACT_SEARCH_TEXT, term), Contact.id], [True, False]
+    else:
+        keys, descending = [Contact.created_at, Contact.id], [True, True]
+
+    stmt = select(Contact, keys[0]).options(selectinload(Contact.customer)).join(Customer).where(*filters)
+    if cursor:
+        try:
+            sort_value, last_id = decode_cursor(cursor, 2)
+            sort_value = float(sort_value) if term else datetime.fromisoformat(sort_value)
+            last_id = UUID(last_id)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        stmt = stmt.where(keyset_after(keys, [sort_value, last_id], descending))
+    elif skip:
+        stmt = stmt.offset(skip)
+    stmt = stmt.order_by(*[key.desc() if desc else key.asc() for key, desc in zip(keys, descending)]).limit(limit + 1)
+
+    rows = (await session.execute(stmt)).all()
+    contacts = [contact for contact, _ in rows[:limit]]
     _ensure_contact_customer_name(contacts)
-    return ContactListResponse(items=[ContactRead.model_validate(row) for row in contacts], total=total or 0)
+    next_cursor = None
+    if len(rows) > limit:
+        last, sort_value = rows[limit - 1]
+        next_cursor = encode_cursor(sort_value.isoformat() if isinstance(sort_value, datetime) else sort_value, last.id)
+
+    total, estimated = None, False
+    if cursor is None:
+        if next_cursor is None and not skip:
+            total = len(contacts)
+        elif exact_total:
+            total = await session.scalar(select(func.count()).select_from(Contact).join(Customer).where(*filters))
+        else:
+            total, estimated = await estimate_count(session, select(Contact.id).join(Customer).where(*filters)), True
+    return ContactListResponse(
+        items=[ContactRead.model_validate(row) for row in contacts],
+        total=total,
+        next_cursor=next_cursor,
+        total_is_estimate=estimated,
+    )
 
 
 @router.post("/", response_model=ContactRead, status_code=status.HTTP_201_CREATED)
@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import List
 from uuid import UUID
 
@@ -7,36 +8,73 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
 from app.db.models import Customer
+from app.db.search import (
+    decode_cursor,
+    encode_cursor,
+    estimate_count,
+    keyset_after,
+    match,
+    normalize_term,
+    search_text,
+    similarity,
+)
 from app.db.session import get_session
 from app.schemas import CustomerCreate, CustomerListResponse, CustomerRead, CustomerUpdate
 
 router = APIRouter()
 
+# Same expression as the trigram index ix_crm_core_customers_search_trgm
+CUSTOMER_SEARCH_TEXT = search_text(Customer.display_name)
+
 
 @router.get("/", response_model=CustomerListResponse)
 async def list_customers(
-    skip: int = Query(0, ge=0),
+    skip: int = Query(0, ge=0, description="Deprecated: use cursor"),
     limit: int = Query(50, ge=1, le=200),
     search: str | None = Query(default=None, description="Case-insensitive search in display_name"),
+    cursor: str | None = Query(default=None, description="next_cursor of the previous page"),
+    exact_total: bool = Query(False, description="Exact COUNT(*) instead of the planner estimate"),
     session: AsyncSession = Depends(get_session),
 ) -> CustomerListResponse:
+    """Keyset-paginated customers: newest first, or by relevance when searching."""
+    term = normalize_term(search)
     filters = [Customer.tenant_id == settings.DEFAULT_TENANT_ID]
-    if search:
-        filters.append(Customer.display_name.ilike(f"%{search}%"))
-
-    total_stmt = select(func.count()).select_from(Customer).where(*filters)
-    total = await session.scalar(total_stmt)
-
-    stmt = (
-        select(Customer)
-        .where(*filters)
-        .offset(skip)
-        .limit(limit)
-        .order_by(Customer.created_at.desc())
-    )
-    result = await session.execute(stmt)
-    items = [CustomerRead.model_validate(row) for row in result.scalars().all()]
-    return CustomerListResponse(items=items, total=total or 0)
+    if term:
+        filters.append(match(CUSTOMER_SEARCH_TEXT, term))
+        score = similarity(CUSTOMER_SEARCH_TEXT, term)
+        keys, descending = [score, Customer.id], [True, False]
+    else:
+        keys, descending = [Customer.created_at, Customer.id], [True, True]
+
+    stmt = select(Customer, keys[0]).where(*filters)
+    if cursor:
+        try:
+            sort_value, last_id = decode_cursor(cursor, 2)
+            sort_value = float(sort_value) if term else datetime.fromisoformat(sort_value)
+            last_id = UUID(last_id)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        stmt = stmt.where(keyset_after(keys, [sort_value, last_id], descending))
+    elif skip:
+        stmt = stmt.offset(skip)
+    stmt = stmt.order_by(*[key.desc() if desc else key.asc() for key, desc in zip(keys, descending)]).limit(limit + 1)
+
+    rows = (await session.execute(stmt)).all()
+    items = [CustomerRead.model_validate(customer) for customer, _ in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last, sort_value = rows[limit - 1]
+        next_cursor = encode_cursor(sort_value.isoformat() if isinstance(sort_value, datetime) else sort_value, last.id)
+
+    total, estimated = None, False
+    if cursor is None:
+        if next_cursor is None and not skip:
+            total = len(items)
+        elif exact_total:
+            total = await session.scalar(select(func.count()).select_from(Customer).where(*filters))
+        else:
+            total, estimated = await estimate_count(session, select(Customer.id).where(*filters)), True
+    return CustomerListResponse(items=items, total=total, next_cursor=next_cursor, total_is_estimate=estimated)
 
 
 @router.post("/", response_model=CustomerRead, status_code=status.HTTP_201_CREATED)
@@ -0,0 +1,80 @@
+"""Search and keyset pagination helpers for CRM Core list endpoints.
+
+Search terms are matched with ``LIKE '%term%'`` against one lower-cased
+expression per table, served by the pg_trgm GIN indexes of revision
+``20261019_03_customer_contact_search`` and ranked by ``word_similarity``.
+Pages are addressed by opaque cursors over the sort key instead of OFFSET;
+totals come from the planner estimate unless an exact count is requested.
+"""
+
+import base64
+import json
+from typing import Any, Sequence
+
+from sqlalchemy import Select, and_, func, literal_column, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import ColumnElement
+
+
+def encode_cursor(*values: Any) -> str:
+    raw = json.dumps(values, default=str, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list[Any]:
+    """Raises ValueError for anything that is not a cursor with ``size`` values."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def search_text(*columns) -> ColumnElement:
+    """Lower-cased concatenation of ``columns``, identical to the trigram index expression.
+
+    Separators are SQL literals: asyncpg sends parameters server-side and the
+    planner only matches an index expression without parameters.
+    """
+    empty, space = literal_column("''"), literal_column("' '")
+    expression = func.coalesce(columns[0], empty)
+    for column in columns[1:]:
+        expression = expression.op("||")(space).op("||")(func.coalesce(column, empty))
+    return func.lower(expression)
+
+
+def normalize_term(term: str | None) -> str | None:
+    term = " ".join((term or "").split()).lower()
+    return term or None
+
+
+def match(expression: ColumnElement, term: str) -> ColumnElement:
+    escaped = term.replace("/", "//").replace("%", "/%").replace("_", "/_")
+    return expression.like(f"%{escaped}%", escape="/")
+
+
+def similarity(expression: ColumnElement, term: str) -> ColumnElement:
+    return func.word_similarity(term, expression)
+
+
+def keyset_after(keys: Sequence[ColumnElement], values: Sequence[Any], descending: Sequence[bool]) -> ColumnElement:
+    """Rows strictly after ``values`` in the order of ``keys`` (per-key direction)."""
+    branches = []
+    for position, (key, value, desc) in enumerate(zip(keys, values, descending)):
+        equal = [k == v for k, v in zip(keys[:position], values[:position])]
+        branches.append(and_(*equal, key < value if desc else key > value))
+    return or_(*branches)
+
+
+async def estimate_count(session: AsyncSession, stmt: Select) -> int:
+    """Planner row estimate of ``stmt`` instead of a second full COUNT(*)."""
+    connection = await session.connection()
+    compiled = stmt.order_by(None).limit(None).compile(dialect=connection.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup or ())
+    result = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", params)
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
@@ -41,4 +41,7 @@ class ContactRead(ORMModel):
 
 class ContactListResponse(BaseModel):
     items: list[ContactRead]
-    total: int
+    # Only on the first page; total_is_estimate marks a planner estimate
+    total: int | None = None
+    total_is_estimate: bool = False
+    next_cursor: str | None = None
@@ -46,4 +46,7 @@ class CustomerRead(Timestamped):
 
 class CustomerListResponse(BaseModel):
     items: list[CustomerRead]
-    total: int
+    # Only on the first page; total_is_estimate marks a planner estimate
+    total: int | None = None
+    total_is_estimate: bool = False
+    next_cursor: str | None = None
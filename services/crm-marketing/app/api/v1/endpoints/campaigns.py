@@ -4,7 +4,8 @@ from datetime import datetime
 from uuid import UUID
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import RedirectResponse, Response
 from sqlalchemy import select, and_, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -16,7 +17,6 @@ from app.db.models import (
     CampaignPerformance,
     CampaignType,
     CampaignStatus,
-    RecipientStatus,
     CampaignEventType,
 )
 from app.db.session import get_db
@@ -34,7 +34,9 @@ from app.schemas.campaign import (
     CampaignScheduleRequest,
     CampaignTestRequest,
 )
+from app.services.campaign_tracker import get_tracking_ingestor
 from app.services.events import get_event_publisher
+from app.services.tracking_links import verify_tracking_token
 
 router = APIRouter()
 
@@ -486,81 +488,50 @@ async def delete_campaign_template(
 
 
 # Public Tracking Endpoints
+# Hits are handed to the tracking ingestor and written in batches; the pixel
+# and the redirect go out without touching the database. The link token
+# (HMAC over campaign, recipient and URL) is checked first, so forged hits
+# and redirects to foreign URLs get a 404; hits for recipients deleted since
+# the mailing are discarded when the batch is flushed.
+TRACKING_PIXEL_GIF = b'\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\x00\x00\x00\x21\xF9\x04\x01\x00\x00\x00\x00\x2C\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02\x04\x01\x00\x3B'
+
+
 @router.post("/tracking/open", status_code=200)
 async def track_campaign_open(
+    request: Request,
     campaign_id: UUID = Query(..., description="Campaign ID"),
     recipient_id: UUID = Query(..., description="Recipient ID"),
-    db: AsyncSession = Depends(get_db),
+    token: str = Query(..., description="Link signature"),
 ):
     """Track campaign email open (public endpoint for tracking pixel)."""
-    campaign = await db.get(Campaign, campaign_id)
-    if not campaign:
-        raise HTTPException(status_code=404, detail="Campaign not found")
-    
-    recipient = await db.get(CampaignRecipient, recipient_id)
-    if not recipient or recipient.campaign_id != campaign_id:
-        raise HTTPException(status_code=404, detail="Recipient not found")
-    
-    # Create event
-    event = CampaignEvent(
-        campaign_id=campaign_id,
-        recipient_id=recipient_id,
-        event_type=CampaignEventType.OPENED,
+    if not verify_tracking_token(token, campaign_id, recipient_id):
+        raise HTTPException(status_code=404, detail="Tracking link not found")
+    get_tracking_ingestor().record_open(
+        campaign_id, recipient_id, user_agent=request.headers.get("user-agent")
     )
-    db.add(event)
-    
-    # Update recipient
-    if not recipient.opened_at:
-        recipient.opened_at = datetime.utcnow()
-    recipient.open_count += 1
-    recipient.status = RecipientStatus.DELIVERED
-    
-    # Update campaign metrics
-    campaign.open_count += 1
-    
-    await db.commit()
     
     # Return 1x1 transparent pixel
-    from fastapi.responses import Response
-    pixel = b'\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\x00\x00\x00\x21\xF9\x04\x01\x00\x00\x00\x00\x2C\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02\x04\x01\x00\x3B'
-    return Response(content=pixel, media_type="image/gif")
+    return Response(
+        content=TRACKING_PIXEL_GIF,
+        media_type="image/gif",
+        headers={"Cache-Control": "no-store, max-age=0"},
+    )
 
 
 @router.post("/tracking/click", status_code=307)
 async def track_campaign_click(
+    request: Request,
     campaign_id: UUID = Query(..., description="Campaign ID"),
     recipient_id: UUID = Query(..., description="Recipient ID"),
     url: str = Query(..., description="Target URL"),
-    db: AsyncSession = Depends(get_db),
+    token: str = Query(..., description="Link signature"),
 ):
     """Track campaign link click (public endpoint for link redirect)."""
-    campaign = await db.get(Campaign, campaign_id)
-    if not campaign:
-        raise HTTPException(status_code=404, detail="Campaign not found")
-    
-    recipient = await db.get(CampaignRecipient, recipient_id)
-    if not recipient or recipient.campaign_id != campaign_id:
-        raise HTTPException(status_code=404, detail="Recipient not found")
-    
-    # Create event
-    event = CampaignEvent(
-        campaign_id=campaign_id,
-        recipient_id=recipient_id,
-        event_type=CampaignEventType.CLICKED,
-        details={"url": url},
+    if not verify_tracking_token(token, campaign_id, recipient_id, url):
+        raise HTTPException(status_code=404, detail="Tracking link not found")
+    get_tracking_ingestor().record_click(
+        campaign_id, recipient_id, url, user_agent=request.headers.get("user-agent")
     )
-    db.add(event)
-    
-    # Update recipient
-    if not recipient.clicked_at:
-        recipient.clicked_at = datetime.utcnow()
-    recipient.click_count += 1
-    
-    # Update campaign metrics
-    campaign.click_count += 1
-    
-    await db.commit()
     
     # Redirect to target URL
-    from fastapi.responses import RedirectResponse
     return RedirectResponse(url=url, status_code=307)
@@ -29,6 +29,32 @@ class Settings(BaseSettings):
     # Performance Tracking
     PERFORMANCE_AGGREGATION_INTERVAL: str = Field(default="daily")  # daily, weekly, monthly
     
+    # Email delivery
+    SMTP_HOST: str = Field(default="localhost")
+    SMTP_PORT: int = Field(default=587)
+    SMTP_USER: str | None = Field(default=None)
+    SMTP_PASSWORD: str | None = Field(default=None)
+    SMTP_STARTTLS: bool = Field(default=True)
+    SMTP_TIMEOUT: float = Field(default=30.0)
+    SMTP_POOL_SIZE: int = Field(default=10)  # Persistent connections = concurrent sends
+    SMTP_MAX_MESSAGES_PER_CONNECTION: int = Field(default=1000)  # Reconnect after N messages
+    DELIVERY_BATCH_SIZE: int = Field(default=500)  # Recipients per page / status flush
+    DELIVERY_MAX_ATTEMPTS: int = Field(default=3)  # Attempts for transient SMTP errors
+    DELIVERY_RETRY_BACKOFF: float = Field(default=2.0)  # Seconds, doubled per attempt
+    DELIVERY_DOMAIN_RATE: float = Field(default=50.0)  # Messages per second per recipient domain
+    DELIVERY_WRITE_ATTEMPTS: int = Field(default=5)  # Attempts for a batch status write
+    DELIVERY_SENT_LOG_DIR: str = Field(default="data/delivery_sent_log")  # Results not yet written
+    TRACKING_BASE_URL: str = Field(default="https://example.com")
+    TRACKING_SECRET: str = Field(default="dev-tracking-secret-change-in-production")  # Signs open/click links
+    
+    # Tracking ingestion (pixel/click hits are buffered and written in batches)
+    TRACKING_FLUSH_BATCH_SIZE: int = Field(default=5000)  # Hits per flush
+    TRACKING_FLUSH_INTERVAL: float = Field(default=1.0)  # Max seconds a hit stays buffered
+    TRACKING_MAX_BUFFER: int = Field(default=100_000)  # Beyond this, hits are spilled to disk
+    TRACKING_OPEN_DEDUP_WINDOW: float = Field(default=3600.0)  # Seconds; repeated opens count once
+    TRACKING_CLICK_DEDUP_WINDOW: float = Field(default=60.0)  # Seconds, per recipient and link
+    TRACKING_SPOOL_DIR: str = Field(default="data/tracking_spool")
+    
     # Event Bus (future use)
     EVENT_BUS_URL: str | None = Field(default=None)
     
@@ -218,6 +218,12 @@ class Campaign(Base):
     started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
     completed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
     
+    # Sender / content (columns from 002_add_campaign_schema)
+    sender_name: Mapped[str | None] = mapped_column(String(255))
+    sender_email: Mapped[str | None] = mapped_column(String(255))
+    subject: Mapped[str | None] = mapped_column(String(500))
+    settings: Mapped[dict | None] = mapped_column(JSONB)
+    
     # Budget
     budget: Mapped[float | None] = mapped_column(Numeric(12, 2))
     spent: Mapped[float] = mapped_column(Numeric(12, 2), default=0)
@@ -357,8 +363,8 @@ class CampaignEvent(Base):
     event_type: Mapped[CampaignEventType] = mapped_column(SQLEnum(CampaignEventType), nullable=False)
     timestamp: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow, index=True)
     
-    # Metadata
-    metadata: Mapped[dict | None] = mapped_column(JSONB)  # IP, User-Agent, Link-URL, etc.
+    # Metadata ("metadata" is reserved on declarative classes)
+    details: Mapped[dict | None] = mapped_column("metadata", JSONB)  # IP, User-Agent, Link-URL, etc.
     
     # Relationships
     campaign: Mapped["Campaign"] = relationship("Campaign", back_populates="events")
@@ -1,65 +1,602 @@
-"""Campaign tracking service."""
+"""Campaign tracking service.
 
-from uuid import UUID
-from typing import Dict, Any
+Open/click/conversion hits are not written per request. The public tracking
+endpoints hand them to the ``TrackingIngestor``, which deduplicates them
+(image proxies and mail scanners fetch the same pixel or link several
+times), and writes each flush as one event INSERT plus one aggregated
+recipient and campaign UPDATE. Failed batches go to an NDJSON spool that
+the next flush replays; rows the database keeps rejecting are isolated by
+bisection into a quarantine file. One summary event is published per
+campaign and flush.
+"""
+
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import re
+import threading
+import time
 from datetime import datetime
-from sqlalchemy import select, and_
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import Integer, and_, bindparam, case, func, insert, literal, or_, select, text, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config.settings import settings
 from app.db.models import Campaign, CampaignRecipient, CampaignEvent, CampaignEventType, RecipientStatus
 from app.services.events import get_event_publisher
 
+logger = logging.getLogger(__name__)
+
+# Recipient lookups per IN list when validating a flush
+VALIDATION_CHUNK_SIZE = 5000
+
+_SPOOL_NAME = re.compile(r"tracking-(\d+)\.ndjson")
+
+# Spool locks held by this process (flock conflicts between two descriptors
+# of the same process, so ingestors sharing a spool directory share the lock)
+_held_spool_locks: Dict[Path, Any] = {}
+_held_spool_locks_guard = threading.Lock()
+
+_recipients = CampaignRecipient.__table__
+_campaigns = Campaign.__table__
+
+
+class TrackingIngestor:
+    """
+    Buffered ingestion of tracking hits.
+
+    ``record_*`` is O(1) and never touches the database; hits for unknown
+    recipients are dropped at flush time (one IN query per flush) instead of
+    being validated on the request path.
+
+    The spool file is named after the process, which holds
+    ``tracking-<pid>.lock`` once it spools; ``start`` takes over the spool
+    files of processes that are gone.
+    """
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable] = None,
+        publisher: Any = None,
+        max_batch_size: int = settings.TRACKING_FLUSH_BATCH_SIZE,
+        max_latency: float = settings.TRACKING_FLUSH_INTERVAL,
+        max_buffer: int = settings.TRACKING_MAX_BUFFER,
+        open_window: float = settings.TRACKING_OPEN_DEDUP_WINDOW,
+        click_window: float = settings.TRACKING_CLICK_DEDUP_WINDOW,
+        max_dedup_keys: int = 500_000,
+        spool_dir: Path = Path(settings.TRACKING_SPOOL_DIR),
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._session_factory = session_factory
+        self._publisher = publisher
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.max_buffer = max_buffer
+        self.open_window = open_window
+        self.click_window = click_window
+        self.max_dedup_keys = max_dedup_keys
+        self.spool_dir = Path(spool_dir)
+        self.clock = clock
+        self._buffer: List[Dict[str, Any]] = []
+        self._oldest: Optional[float] = None
+        self._seen: Dict[Tuple, float] = {}  # dedup key -> expiry
+        self._flush_lock = asyncio.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._spills: set = set()
+        self.running = False
+        self.accepted = 0
+        self.duplicates = 0
+        self.written = 0
+        self.dropped = 0
+        self.spooled = 0
+        self.quarantined = 0
+        self.flushes = 0
+
+    @property
+    def session_factory(self) -> Callable:
+        if self._session_factory is None:
+            from app.db.session import async_session
+
+            self._session_factory = async_session
+        return self._session_factory
+
+    @property
+    def publisher(self):
+        if self._publisher is None:
+            self._publisher = get_event_publisher()
+        return self._publisher
+
+    @property
+    def spool_file(self) -> Path:
+        return self.spool_dir / f"tracking-{os.getpid()}.ndjson"
+
+    @property
+    def quarantine_file(self) -> Path:
+        return self.spool_dir / f"tracking-{os.getpid()}.rejected.ndjson"
+
+    def _lock_file(self, pid: int) -> Path:
+        return self.spool_dir / f"tracking-{pid}.lock"
+
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    # ------------------------------------------------------------------
+    # Request path
+    # ------------------------------------------------------------------
+
+    def record_open(self, campaign_id: UUID, recipient_id: UUID, user_agent: str | None = None) -> bool:
+        """Record a pixel hit. Returns False for a duplicate within the open window."""
+        return self._record(
+            ("o", campaign_id, recipient_id), self.open_window,
+            campaign_id, recipient_id, CampaignEventType.OPENED, {"user_agent": user_agent},
+        )
+
+    def record_click(
+        self, campaign_id: UUID, recipient_id: UUID, url: str, user_agent: str | None = None
+    ) -> bool:
+        """Record a link click. Returns False for a duplicate (same link) within the click window."""
+        return self._record(
+            ("c", campaign_id, recipient_id, url), self.click_window,
+            campaign_id, recipient_id, CampaignEventType.CLICKED, {"url": url, "user_agent": user_agent},
+        )
+
+    def record_conversion(self, campaign_id: UUID, recipient_id: UUID, details: Dict[str, Any]) -> bool:
+        """Record a conversion (never deduplicated)."""
+        return self._record(None, 0, campaign_id, recipient_id, CampaignEventType.CONVERTED, details)
+
+    def _record(
+        self,
+        key: Optional[Tuple],
+        window: float,
+        campaign_id: UUID,
+        recipient_id: UUID,
+        event_type: CampaignEventType,
+        details: Dict[str, Any],
+    ) -> bool:
+        now = self.clock()
+        if key is not None and window > 0:
+            expiry = self._seen.get(key)
+            if expiry is not None and expiry > now:
+                self.duplicates += 1
+                return False
+            if len(self._seen) >= self.max_dedup_keys:
+                # Insertion order is roughly expiry order; evict the oldest key
+                self._seen.pop(next(iter(self._seen)))
+            self._seen.pop(key, None)
+            self._seen[key] = now + window
+
+        if not self._buffer:
+            self._oldest = now
+        self._buffer.append({
+            "campaign_id": campaign_id,
+            "recipient_id": recipient_id,
+            "event_type": event_type,
+            "timestamp": datetime.utcnow(),
+            "details": details,
+        })
+        self.accepted += 1
+
+        if len(self._buffer) >= self.max_buffer:
+            # Database cannot keep up: spill to disk rather than grow unbounded
+            self._spill(self._take())
+        elif len(self._buffer) >= self.max_batch_size and self._wakeup is not None:
+            self._wakeup.set()
+        return True
+
+    def _spill(self, rows: List[Dict[str, Any]]) -> None:
+        task = asyncio.get_running_loop().create_task(self._spill_rows(rows))
+        self._spills.add(task)
+        task.add_done_callback(self._spills.discard)
+
+    async def _spill_rows(self, rows: List[Dict[str, Any]]) -> None:
+        try:
+            async with self._flush_lock:
+                await asyncio.to_thread(self._spool, rows)
+        except Exception as e:
+            logger.error(f"Spilling {len(rows)} tracking hits failed, hits lost: {e}", exc_info=True)
+
+    def _take(self) -> List[Dict[str, Any]]:
+        rows, self._buffer = self._buffer, []
+        self._oldest = None
+        return rows
+
+    def _expire_seen(self) -> None:
+        now = self.clock()
+        expired = [key for key, expiry in self._seen.items() if expiry <= now]
+        for key in expired:
+            del self._seen[key]
+
+    # ------------------------------------------------------------------
+    # Flush
+    # ------------------------------------------------------------------
+
+    async def flush(self) -> int:
+        """Write buffered (and spooled) hits. Returns events written."""
+        async with self._flush_lock:
+            rows = self._take()
+            spooled = await asyncio.to_thread(self._read_spool)
+            batch = (spooled or []) + rows
+            self._expire_seen()
+            if not batch:
+                if spooled is not None:
+                    await asyncio.to_thread(self._replace_spool, [])
+                return 0
+
+            summaries, rejected, unwritten = await self._write_isolating(batch)
+            if unwritten:
+                logger.error(f"Tracking flush of {len(unwritten)} hits failed, spooling")
+            if spooled is not None or unwritten:
+                # Replaces the spool: replayed hits leave it, unwritten ones (re)enter it
+                await asyncio.to_thread(self._replace_spool, unwritten)
+                self.spooled += max(0, len(unwritten) - len(spooled or []))
+            if spooled and not unwritten:
+                logger.info(f"Replayed {len(spooled)} spooled tracking hits")
+            if rejected:
+                await asyncio.to_thread(self._quarantine, rejected)
+            written = sum(s["opens"] + s["clicks"] + s["conversions"] for s in summaries.values())
+            self.written += written
+            self.dropped += len(batch) - written - len(unwritten) - len(rejected)
+            if summaries:
+                self.flushes += 1
+
+        for campaign_id, summary in summaries.items():
+            summary["unique_recipients"] = len(summary.pop("recipients"))
+            await self.publisher.publish_campaign_tracking_summary(campaign_id=campaign_id, **summary)
+        return written
+
+    async def _write_isolating(
+        self, batch: List[Dict[str, Any]]
+    ) -> Tuple[Dict[UUID, Dict[str, Any]], List[Tuple[Dict[str, Any], str]], List[Dict[str, Any]]]:
+        """
+        Write ``batch``; returns (summaries, rejected rows, unwritten rows).
+
+        If a write fails while the database is reachable, the failing part is
+        split in halves until the rows the database rejects are isolated.
+        If the database is unavailable, everything not yet committed is
+        returned as unwritten.
+        """
+        summaries: Dict[UUID, Dict[str, Any]] = {}
+        rejected: List[Tuple[Dict[str, Any], str]] = []
+        parts = [batch]
+        while parts:
+            part = parts.pop()
+            try:
+                async with self.session_factory() as db:
+                    try:
+                        written = await self._write(db, part)
+                        await db.commit()
+                    except Exception:
+                        await db.rollback()
+                        raise
+            except Exception as e:
+                if not await self._database_available():
+                    return summaries, rejected, [row for rest in [part] + parts[::-1] for row in rest]
+                if len(part) == 1:
+                    rejected.append((part[0], f"{type(e).__name__}: {e}"))
+                else:
+                    middle = len(part) // 2
+                    parts += [part[middle:], part[:middle]]
+                continue
+            for campaign_id, summary in written.items():
+                merged = summaries.get(campaign_id)
+                if merged is None:
+                    summaries[campaign_id] = summary
+                    continue
+                for field in ("opens", "clicks", "conversions"):
+                    merged[field] += summary[field]
+                merged["recipients"] |= summary["recipients"]
+                merged["first_seen"] = min(merged["first_seen"], summary["first_seen"])
+                merged["last_seen"] = max(merged["last_seen"], summary["last_seen"])
+        return summaries, rejected, []
+
+    async def _database_available(self) -> bool:
+        try:
+            async with self.session_factory() as db:
+                await db.execute(text("SELECT 1"))
+            return True
+        except Exception:
+            return False
+
+    async def _write(self, db: AsyncSession, batch: List[Dict[str, Any]]) -> Dict[UUID, Dict[str, Any]]:
+        owners = await self._recipient_campaigns(db, {row["recipient_id"] for row in batch})
+        events = [row for row in batch if owners.get(row["recipient_id"]) == row["campaign_id"]]
+        if not events:
+            return {}
+
+        per_recipient: Dict[UUID, Dict[str, Any]] = {}
+        per_campaign: Dict[UUID, Dict[str, Any]] = {}
+        for row in events:
+            field = _COUNTERS[row["event_type"]]
+            r = per_recipient.setdefault(row["recipient_id"], {
+                "rid": row["recipient_id"],
+                "opens": 0, "clicks": 0, "conversions": 0,
+                "first_open": None, "first_click": None, "first_conversion": None,
+            })
+            r[field] += 1
+            first = _FIRST[row["event_type"]]
+            if r[first] is None or row["timestamp"] < r[first]:
+                r[first] = row["timestamp"]
+            c = per_campaign.setdefault(row["campaign_id"], {
+                "opens": 0, "clicks": 0, "conversions": 0, "recipients": set(),
+                "first_seen": row["timestamp"], "last_seen": row["timestamp"],
+            })
+            c[field] += 1
+            c["recipients"].add(row["recipient_id"])
+            c["first_seen"] = min(c["first_seen"], row["timestamp"])
+            c["last_seen"] = max(c["last_seen"], row["timestamp"])
+
+        for start in range(0, len(events), self.max_batch_size):
+            await db.execute(insert(CampaignEvent), events[start:start + self.max_batch_size])
+        await db.execute(_RECIPIENT_UPDATE, list(per_recipient.values()))
+        await db.execute(_CAMPAIGN_UPDATE, [
+            {"cid": cid, "opens": c["opens"], "clicks": c["clicks"], "conversions": c["conversions"]}
+            for cid, c in per_campaign.items()
+        ])
+
+        return per_campaign
+
+    async def _recipient_campaigns(self, db: AsyncSession, recipient_ids: set) -> Dict[UUID, UUID]:
+        ids = list(recipient_ids)
+        owners: Dict[UUID, UUID] = {}
+        for start in range(0, len(ids), VALIDATION_CHUNK_SIZE):
+            result = await db.execute(
+                select(_recipients.c.id, _recipients.c.campaign_id)
+                .where(_recipients.c.id.in_(ids[start:start + VALIDATION_CHUNK_SIZE]))
+            )
+            owners.update({rid: cid for rid, cid in result.all()})
+        return owners
+
+    # ------------------------------------------------------------------
+    # Durable spool (blocking file I/O: worker thread, under the flush lock)
+    # ------------------------------------------------------------------
+
+    def _claim_spool(self) -> None:
+        path = self._lock_file(os.getpid()).resolve()
+        with _held_spool_locks_guard:
+            if path not in _held_spool_locks:
+                self.spool_dir.mkdir(parents=True, exist_ok=True)
+                fh = open(path, "a")
+                fcntl.flock(fh, fcntl.LOCK_EX)
+                _held_spool_locks[path] = fh
+
+    def _spool(self, rows: List[Dict[str, Any]]) -> None:
+        if not rows:
+            return
+        self._claim_spool()
+        with open(self.spool_file, "a", encoding="utf-8") as fh:
+            for row in rows:
+                fh.write(json.dumps(row, default=_json_default) + "\n")
+            fh.flush()
+            os.fsync(fh.fileno())
+        self.spooled += len(rows)
+
+    def _replace_spool(self, rows: List[Dict[str, Any]]) -> None:
+        if not rows:
+            self.spool_file.unlink(missing_ok=True)
+            return
+        self._claim_spool()
+        tmp = self.spool_file.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            for row in rows:
+                fh.write(json.dumps(row, default=_json_default) + "\n")
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, self.spool_file)
+
+    def _quarantine(self, rejected: List[Tuple[Dict[str, Any], str]]) -> None:
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.quarantine_file, "a", encoding="utf-8") as fh:
+            for row, error in rejected:
+                fh.write(json.dumps({**row, "error": error}, default=_json_default) + "\n")
+            fh.flush()
+            os.fsync(fh.fileno())
+        self.quarantined += len(rejected)
+        logger.error(f"Quarantined {len(rejected)} tracking hits rejected by the database to {self.quarantine_file}")
+
+    def _adopt_orphaned_spools(self) -> int:
+        """Move spool files whose owner no longer holds its lock into this spool."""
+        if not self.spool_dir.exists():
+            return 0
+        adopted = 0
+        for path in sorted(self.spool_dir.glob("tracking-*.ndjson")):
+            match = _SPOOL_NAME.fullmatch(path.name)
+            if not match or path == self.spool_file:
+                continue
+            # Lock files stay: a new process reusing the PID could otherwise
+            # lock a different file than the adopter
+            with open(self._lock_file(int(match.group(1))), "a") as lock:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue
+                rows = self._read_spool(path) or []
+                self._spool(rows)
+                path.unlink()
+            adopted += len(rows)
+        if adopted:
+            logger.info(f"Took over {adopted} tracking hits spooled by stopped ingestors")
+        return adopted
+
+    def _read_spool(self, path: Optional[Path] = None) -> Optional[List[Dict[str, Any]]]:
+        """Spooled hits, None without a spool file."""
+        path = path or self.spool_file
+        if not path.exists():
+            return None
+        rows, unreadable = [], []
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                    row["campaign_id"] = UUID(row["campaign_id"])
+                    row["recipient_id"] = UUID(row["recipient_id"])
+                    row["event_type"] = CampaignEventType(row["event_type"])
+                    row["timestamp"] = datetime.fromisoformat(row["timestamp"])
+                except (ValueError, KeyError, TypeError) as e:
+                    # Torn write or foreign content: would fail every replay
+                    unreadable.append(({"line": line.rstrip("\n")}, f"unreadable: {e}"))
+                    continue
+                rows.append(row)
+        if unreadable:
+            self._quarantine(unreadable)
+        return rows
+
+    # ------------------------------------------------------------------
+    # Background loop
+    # ------------------------------------------------------------------
+
+    async def start(self) -> None:
+        """Start the flush loop on the running event loop."""
+        if self.running:
+            return
+        self.running = True
+        self._wakeup = asyncio.Event()
+        try:
+            async with self._flush_lock:
+                await asyncio.to_thread(self._adopt_orphaned_spools)
+        except OSError as e:
+            logger.error(f"Could not take over orphaned tracking spool files: {e}")
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"Tracking ingestor started (batch={self.max_batch_size}, max_latency={self.max_latency}s)"
+        )
+
+    async def stop(self) -> None:
+        """Stop the loop and flush what is left."""
+        self.running = False
+        if self._wakeup is not None:
+            self._wakeup.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        if self._spills:
+            await asyncio.gather(*self._spills)
+        await self.flush()
+        logger.info("Tracking ingestor stopped")
+
+    async def _run(self) -> None:
+        while self.running:
+            timeout = self.max_latency
+            if self._oldest is not None:
+                timeout = max(0.0, self.max_latency - (self.clock() - self._oldest))
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            if self._buffer or self.spool_file.exists():
+                try:
+                    await self.flush()
+                except Exception as e:
+                    logger.error(f"Tracking ingestor error: {e}", exc_info=True)
+
+
+_COUNTERS = {
+    CampaignEventType.OPENED: "opens",
+    CampaignEventType.CLICKED: "clicks",
+    CampaignEventType.CONVERTED: "conversions",
+}
+_FIRST = {
+    CampaignEventType.OPENED: "first_open",
+    CampaignEventType.CLICKED: "first_click",
+    CampaignEventType.CONVERTED: "first_conversion",
+}
+
+# One executemany per flush; first-hit timestamps only fill empty columns,
+# an open marks a sent recipient as delivered
+_opens = bindparam("opens", type_=Integer)
+_RECIPIENT_UPDATE = (
+    update(_recipients)
+    .where(_recipients.c.id == bindparam("rid"))
+    .values(
+        open_count=func.coalesce(_recipients.c.open_count, 0) + _opens,
+        click_count=func.coalesce(_recipients.c.click_count, 0) + bindparam("clicks", type_=Integer),
+        opened_at=func.coalesce(_recipients.c.opened_at, bindparam("first_open", type_=_recipients.c.opened_at.type)),
+        clicked_at=func.coalesce(_recipients.c.clicked_at, bindparam("first_click", type_=_recipients.c.clicked_at.type)),
+        converted_at=func.coalesce(
+            _recipients.c.converted_at, bindparam("first_conversion", type_=_recipients.c.converted_at.type)
+        ),
+        status=case(
+            (
+                and_(
+                    _opens > 0,
+                    # No IN list: expanding parameters cannot be used with executemany
+                    or_(
+                        _recipients.c.status == RecipientStatus.PENDING,
+                        _recipients.c.status == RecipientStatus.SENT,
+                    ),
+                ),
+                literal(RecipientStatus.DELIVERED, _recipients.c.status.type),
+            ),
+            else_=_recipients.c.status,
+        ),
+    )
+)
+
+_CAMPAIGN_UPDATE = (
+    update(_campaigns)
+    .where(_campaigns.c.id == bindparam("cid"))
+    .values(
+        open_count=func.coalesce(_campaigns.c.open_count, 0) + bindparam("opens", type_=Integer),
+        click_count=func.coalesce(_campaigns.c.click_count, 0) + bindparam("clicks", type_=Integer),
+        conversion_count=func.coalesce(_campaigns.c.conversion_count, 0) + bindparam("conversions", type_=Integer),
+    )
+)
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+# Global ingestor instance
+_ingestor: Optional[TrackingIngestor] = None
+
+
+def get_tracking_ingestor() -> TrackingIngestor:
+    """Get the global tracking ingestor instance."""
+    global _ingestor
+    if _ingestor is None:
+        _ingestor = TrackingIngestor()
+    return _ingestor
+
+
+async def start_tracking_ingestor() -> None:
+    """Start the global tracking ingestor."""
+    await get_tracking_ingestor().start()
+
+
+async def stop_tracking_ingestor() -> None:
+    """Flush and stop the global tracking ingestor."""
+    await get_tracking_ingestor().stop()
+
 
 class CampaignTracker:
     """Tracks campaign events (opens, clicks, conversions)."""
-    
-    def __init__(self, db: AsyncSession):
+
+    def __init__(self, db: AsyncSession, ingestor: TrackingIngestor | None = None):
         self.db = db
-    
+        self.ingestor = ingestor or get_tracking_ingestor()
+
     async def track_open(
         self,
         campaign_id: UUID,
         recipient_id: UUID,
         ip_address: str | None = None,
         user_agent: str | None = None,
-    ):
-        """Track email open."""
-        # Check if already tracked
-        existing = await self.db.scalar(
-            select(CampaignEvent).where(
-                and_(
-                    CampaignEvent.campaign_id == campaign_id,
-                    CampaignEvent.recipient_id == recipient_id,
-                    CampaignEvent.event_type == CampaignEventType.OPENED
-                )
-            )
-        )
-        
-        if existing:
-            return  # Already tracked
-        
-        # Create event
-        event = CampaignEvent(
-            campaign_id=campaign_id,
-            recipient_id=recipient_id,
-            event_type=CampaignEventType.OPENED,
-            details={
-                "user_agent": user_agent,
-            },
-            ip_address=ip_address,
-        )
-        
-        self.db.add(event)
-        await self.db.commit()
-        
-        # Publish event
-        event_publisher = get_event_publisher()
-        await event_publisher.publish_campaign_event(
-            campaign_id=campaign_id,
-            event_type="email.opened",
-            recipient_id=recipient_id,
-        )
-    
+    ) -> bool:
+        """Track email open (buffered, deduplicated within the open window)."""
+        return self.ingestor.record_open(campaign_id, recipient_id, user_agent=user_agent)
+
     async def track_click(
         self,
         campaign_id: UUID,
@@ -67,31 +604,10 @@ class CampaignTracker:
         link_url: str,
         ip_address: str | None = None,
         user_agent: str | None = None,
-    ):
-        """Track link click."""
-        # Create event
-        event = CampaignEvent(
-            campaign_id=campaign_id,
-            recipient_id=recipient_id,
-            event_type=CampaignEventType.CLICKED,
-            details={
-                "link_url": link_url,
-                "user_agent": user_agent,
-            },
-            ip_address=ip_address,
-        )
-        
-        self.db.add(event)
-        await self.db.commit()
-        
-        # Publish event
-        event_publisher = get_event_publisher()
-        await event_publisher.publish_campaign_event(
-            campaign_id=campaign_id,
-            event_type="email.clicked",
-            recipient_id=recipient_id,
-        )
-    
+    ) -> bool:
+        """Track link click (buffered, deduplicated per link within the click window)."""
+        return self.ingestor.record_click(campaign_id, recipient_id, link_url, user_agent=user_agent)
+
     async def track_conversion(
         self,
         campaign_id: UUID,
@@ -99,31 +615,14 @@ class CampaignTracker:
         conversion_type: str,
         conversion_value: float | None = None,
         details: Dict[str, Any] | None = None,
-    ):
-        """Track conversion."""
-        # Create event
-        event = CampaignEvent(
-            campaign_id=campaign_id,
-            recipient_id=recipient_id,
-            event_type=CampaignEventType.CONVERTED,
-            details={
-                "conversion_type": conversion_type,
-                "conversion_value": conversion_value,
-                **(details or {}),
-            },
-        )
-        
-        self.db.add(event)
-        await self.db.commit()
-        
-        # Publish event
-        event_publisher = get_event_publisher()
-        await event_publisher.publish_campaign_event(
-            campaign_id=campaign_id,
-            event_type="converted",
-            recipient_id=recipient_id,
-        )
-    
+    ) -> bool:
+        """Track conversion (buffered)."""
+        return self.ingestor.record_conversion(campaign_id, recipient_id, {
+            "conversion_type": conversion_type,
+            "conversion_value": conversion_value,
+            **(details or {}),
+        })
+
     async def track_bounce(
         self,
         campaign_id: UUID,
@@ -135,7 +634,7 @@ class CampaignTracker:
         if recipient:
             recipient.status = RecipientStatus.BOUNCED
             recipient.bounce_reason = bounce_reason
-        
+
         # Create event
         event = CampaignEvent(
             campaign_id=campaign_id,
@@ -145,10 +644,10 @@ class CampaignTracker:
                 "bounce_reason": bounce_reason,
             },
         )
-        
+
         self.db.add(event)
         await self.db.commit()
-        
+
         # Publish event
         event_publisher = get_event_publisher()
         await event_publisher.publish_campaign_event(
@@ -156,7 +655,7 @@ class CampaignTracker:
             event_type="bounced",
             recipient_id=recipient_id,
         )
-    
+
     async def track_unsubscribe(
         self,
         campaign_id: UUID,
@@ -169,10 +668,10 @@ class CampaignTracker:
             recipient_id=recipient_id,
             event_type=CampaignEventType.UNSUBSCRIBED,
         )
-        
+
         self.db.add(event)
         await self.db.commit()
-        
+
         # Publish event
         event_publisher = get_event_publisher()
         await event_publisher.publish_campaign_event(
@@ -180,4 +679,3 @@ class CampaignTracker:
             event_type="unsubscribed",
             recipient_id=recipient_id,
         )
-
@@ -1,50 +1,689 @@
-"""Email sender service for campaigns."""
+"""Email sender service for campaigns.
 
-from uuid import UUID
-from typing import Dict, Any
-import httpx
+Delivery engine for email campaigns:
+
+- templates are compiled once per campaign (campaign-wide variables and the
+  tracking pixel are substituted up front), per recipient only the
+  personal placeholders are filled in
+- a fixed number of workers each own one persistent SMTP connection, which
+  bounds concurrency; a per-domain token bucket throttles sending
+- recipient status updates and SENT events are written in batches
+- transient SMTP errors are retried with backoff, 5xx replies are classified
+  as bounces; recipients stay PENDING until handled, so an interrupted run
+  can simply be started again
+- send results are appended to a per-campaign sent log before they are
+  written; the status write is retried, only applied to recipients that are
+  still PENDING, and a run first replays what an earlier run could not
+  write, so a database error never turns a delivered recipient back into
+  a pending one
+"""
+
+import asyncio
+import base64
+import json
 import logging
+import os
+import re
+import smtplib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
+from email.header import Header
+from email.utils import formataddr, formatdate, make_msgid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from uuid import UUID
 
+from sqlalchemy import and_, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models import Campaign, CampaignTemplate, CampaignRecipient, CampaignEvent, CampaignType, CampaignEventType, RecipientStatus
+from app.db.models import Campaign, CampaignTemplate, CampaignRecipient, CampaignEvent, CampaignType, CampaignEventType, CampaignStatus, RecipientStatus
 from app.config.settings import settings
+from app.services.tracking_links import open_tracking_url
 
 logger = logging.getLogger(__name__)
 
+_PLACEHOLDER = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+TRACKING_PIXEL = '<img src="{{open_tracking_url}}" width="1" height="1" style="display:none;" />'
+
+
+# ----------------------------------------------------------------------
+# Templates
+# ----------------------------------------------------------------------
+
+class CompiledTemplate:
+    """
+    Template split into literal chunks and placeholder names.
+
+    Campaign-wide values are merged into the literals at compile time, so
+    rendering a recipient is a single join over the remaining slots.
+    Unknown placeholders are kept verbatim, as before.
+    """
+
+    __slots__ = ("_literals", "_names", "_raw")
+
+    def __init__(self, source: str, static: Dict[str, Any] | None = None):
+        static = static or {}
+        literals = [""]
+        names: List[str] = []
+        raw: List[str] = []
+        pos = 0
+        for match in _PLACEHOLDER.finditer(source):
+            literals[-1] += source[pos:match.start()]
+            name = match.group(1)
+            if name in static:
+                literals[-1] += str(static[name])
+            else:
+                names.append(name)
+                raw.append(match.group(0))
+                literals.append("")
+            pos = match.end()
+        literals[-1] += source[pos:]
+        self._literals = literals
+        self._names = names
+        self._raw = raw
+
+    @property
+    def placeholders(self) -> List[str]:
+        return list(self._names)
+
+    def render(self, variables: Dict[str, Any]) -> str:
+        literals = self._literals
+        if not self._names:
+            return literals[0]
+        out = [literals[0]]
+        for i, name in enumerate(self._names):
+            value = variables.get(name)
+            out.append(self._raw[i] if value is None else str(value))
+            out.append(literals[i + 1])
+        return "".join(out)
+
+
+@dataclass
+class CompiledCampaign:
+    """Everything needed to build a message, prepared once per campaign."""
+    campaign_id: UUID
+    subject: CompiledTemplate
+    html: CompiledTemplate | None
+    text: CompiledTemplate | None
+    from_header: str
+    envelope_from: str
+    msgid_domain: str
+
+
+def compile_campaign(campaign: Campaign, template: CampaignTemplate) -> CompiledCampaign:
+    """Compile subject and bodies of ``template`` for ``campaign``."""
+    static = {
+        "campaign_name": campaign.name,
+        "sender_name": campaign.sender_name or "",
+    }
+    html = template.body_html
+    if html:
+        if "</body>" in html:
+            html = html.replace("</body>", f"{TRACKING_PIXEL}</body>", 1)
+        else:
+            html = html + TRACKING_PIXEL
+    envelope_from = campaign.sender_email or "noreply@example.com"
+    return CompiledCampaign(
+        campaign_id=campaign.id,
+        subject=CompiledTemplate(campaign.subject or template.subject or "", static),
+        html=CompiledTemplate(html, static) if html else None,
+        text=CompiledTemplate(template.body_text, static) if template.body_text else None,
+        from_header=formataddr((str(Header(campaign.sender_name, "utf-8")), envelope_from))
+        if campaign.sender_name else envelope_from,
+        envelope_from=envelope_from,
+        msgid_domain=envelope_from.rpartition("@")[2] or "localhost",
+    )
+
+
+def recipient_variables(campaign: CompiledCampaign, recipient_id: UUID, email: str) -> Dict[str, Any]:
+    """Per-recipient placeholder values."""
+    base = settings.TRACKING_BASE_URL.rstrip("/")
+    return {
+        "contact_name": "Contact",  # TODO: Get from contact
+        "email": email,
+        "unsubscribe_url": f"{base}/unsubscribe?token={recipient_id}",  # TODO: Generate token
+        "open_tracking_url": open_tracking_url(campaign.campaign_id, recipient_id),
+    }
+
+
+def _b64_lines(text: str) -> str:
+    encoded = base64.b64encode(text.encode("utf-8")).decode("ascii")
+    return "\r\n".join(encoded[i:i + 76] for i in range(0, len(encoded), 76))
+
+
+def _encode_header(value: str) -> str:
+    return value if value.isascii() else Header(value, "utf-8").encode()
+
+
+def build_message(campaign: CompiledCampaign, recipient_id: UUID, email: str) -> bytes:
+    """Render and serialize one message (multipart/alternative when both bodies exist)."""
+    variables = recipient_variables(campaign, recipient_id, email)
+    headers = [
+        f"From: {campaign.from_header}",
+        f"To: {email}",
+        f"Subject: {_encode_header(campaign.subject.render(variables))}",
+        f"Date: {formatdate(localtime=False)}",
+        f"Message-ID: {make_msgid(domain=campaign.msgid_domain)}",
+        f"List-Unsubscribe: <{variables['unsubscribe_url']}>",
+        "MIME-Version: 1.0",
+    ]
+    parts = []
+    if campaign.text is not None:
+        parts.append(("text/plain", campaign.text.render(variables)))
+    if campaign.html is not None:
+        parts.append(("text/html", campaign.html.render(variables)))
+    if not parts:
+        parts.append(("text/plain", ""))
+
+    if len(parts) == 1:
+        content_type, body = parts[0]
+        headers += [
+            f'Content-Type: {content_type}; charset="utf-8"',
+            "Content-Transfer-Encoding: base64",
+        ]
+        return ("\r\n".join(headers) + "\r\n\r\n" + _b64_lines(body) + "\r\n").encode("ascii")
+
+    boundary = f"=_{recipient_id.hex}"
+    headers.append(f'Content-Type: multipart/alternative; boundary="{boundary}"')
+    chunks = ["\r\n".join(headers), ""]
+    for content_type, body in parts:
+        chunks += [
+            f"--{boundary}",
+            f'Content-Type: {content_type}; charset="utf-8"',
+            "Content-Transfer-Encoding: base64",
+            "",
+            _b64_lines(body),
+        ]
+    chunks += [f"--{boundary}--", ""]
+    return "\r\n".join(chunks).encode("ascii")
+
+
+# ----------------------------------------------------------------------
+# SMTP
+# ----------------------------------------------------------------------
+
+HARD_BOUNCE = "hard_bounce"
+SOFT_BOUNCE = "soft_bounce"
+TRANSIENT = "transient"
+REJECTED = "rejected"
+
+
+def classify_smtp_error(exc: Exception) -> Tuple[str, str]:
+    """
+    Map an SMTP failure to (classification, reason).
+
+    - ``hard_bounce``: 5xx for the recipient, the address is not retried
+    - ``soft_bounce``: 4xx for the recipient (mailbox full, greylisting)
+    - ``transient``: connection problems or 4xx for the whole message
+    - ``rejected``: 5xx for the message itself (content, sender policy)
+    """
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        code, message = next(iter(exc.recipients.values()))
+        reason = f"{code} {_decode(message)}"
+        return (HARD_BOUNCE if code >= 500 else SOFT_BOUNCE), reason
+    if isinstance(exc, smtplib.SMTPResponseException):
+        reason = f"{exc.smtp_code} {_decode(exc.smtp_error)}"
+        if exc.smtp_code >= 500:
+            return REJECTED, reason
+        return TRANSIENT, reason
+    return TRANSIENT, f"{type(exc).__name__}: {exc}"
+
+
+def _decode(value: Any) -> str:
+    return value.decode("utf-8", "replace") if isinstance(value, bytes) else str(value)
+
+
+class SmtpConnection:
+    """One persistent SMTP session, reopened lazily and after ``max_messages``."""
+
+    def __init__(
+        self,
+        host: str = None,
+        port: int = None,
+        user: str | None = None,
+        password: str | None = None,
+        starttls: bool | None = None,
+        timeout: float | None = None,
+        max_messages: int | None = None,
+    ):
+        self.host = host or settings.SMTP_HOST
+        self.port = port or settings.SMTP_PORT
+        self.user = user if user is not None else settings.SMTP_USER
+        self.password = password if password is not None else settings.SMTP_PASSWORD
+        self.starttls = settings.SMTP_STARTTLS if starttls is None else starttls
+        self.timeout = timeout or settings.SMTP_TIMEOUT
+        self.max_messages = max_messages or settings.SMTP_MAX_MESSAGES_PER_CONNECTION
+        self._smtp: smtplib.SMTP | None = None
+        self._sent = 0
+
+    def _connect(self) -> smtplib.SMTP:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        smtp.ehlo()
+        if self.starttls and smtp.has_extn("starttls"):
+            smtp.starttls()
+            smtp.ehlo()
+        if self.user:
+            smtp.login(self.user, self.password or "")
+        return smtp
+
+    def send(self, envelope_from: str, to_email: str, message: bytes) -> None:
+        if self._smtp is None or self._sent >= self.max_messages:
+            self.close()
+            self._smtp = self._connect()
+            self._sent = 0
+        try:
+            self._smtp.sendmail(envelope_from, [to_email], message)
+        except (smtplib.SMTPServerDisconnected, OSError):
+            # Drop the broken session; the caller retries on a fresh one
+            self._smtp = None
+            raise
+        except smtplib.SMTPRecipientsRefused:
+            # Session is still usable, but reset the transaction state
+            self._reset()
+            raise
+        self._sent += 1
+
+    def _reset(self) -> None:
+        try:
+            self._smtp.rset()
+        except Exception:
+            self._smtp = None
+
+    def close(self) -> None:
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+            self._smtp = None
+
+
+class DomainThrottle:
+    """Token bucket per recipient domain (``rate`` messages per second)."""
+
+    def __init__(self, rate: float, burst: float | None = None, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self._clock = clock
+        self._buckets: Dict[str, List[float]] = {}
+
+    def delay(self, domain: str) -> float:
+        """Reserve one token; returns the seconds to wait before sending."""
+        if self.rate <= 0:
+            return 0.0
+        now = self._clock()
+        bucket = self._buckets.get(domain)
+        if bucket is None:
+            bucket = self._buckets[domain] = [self.burst, now]
+        tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        tokens -= 1.0
+        bucket[0], bucket[1] = tokens, now
+        return 0.0 if tokens >= 0 else -tokens / self.rate
+
+    async def acquire(self, domain: str) -> None:
+        wait = self.delay(domain)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+# ----------------------------------------------------------------------
+# Engine
+# ----------------------------------------------------------------------
+
+Result = Tuple[UUID, RecipientStatus, Optional[str]]
+
+
+class SentLog:
+    """
+    Send results of one campaign that are not yet in the database (NDJSON).
+
+    Appended (and fsync'd) before each status write and removed once the
+    write is committed; whatever is left is replayed by the next run.
+    Blocking file I/O - call from a worker thread.
+    """
+
+    def __init__(self, directory: Path, campaign_id: UUID):
+        self.directory = Path(directory)
+        self.path = self.directory / f"delivery-{campaign_id}.ndjson"
+
+    def append(self, results: List[Result]) -> None:
+        if not results:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as fh:
+            for recipient_id, status, reason in results:
+                fh.write(json.dumps([str(recipient_id), status.value, reason]) + "\n")
+            fh.flush()
+            os.fsync(fh.fileno())
+
+    def read(self) -> List[Result]:
+        if not self.path.exists():
+            return []
+        results = []
+        with open(self.path, encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    recipient_id, status, reason = json.loads(line)
+                    results.append((UUID(recipient_id), RecipientStatus(status), reason))
+                except ValueError:
+                    # Torn last line after a crash
+                    logger.warning(f"Skipping unreadable line in {self.path}")
+        return results
+
+    def clear(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+@dataclass
+class DeliveryReport:
+    """Outcome of one delivery run."""
+    campaign_id: UUID
+    sent: int = 0
+    bounced: int = 0
+    failed: int = 0
+    retries: int = 0
+    elapsed: float = 0.0
+    stopped: bool = False  # campaign was paused/cancelled during the run
+    bounce_reasons: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def messages_per_second(self) -> float:
+        return self.sent / self.elapsed if self.elapsed else 0.0
+
+
+class DeliveryEngine:
+    """Sends all pending recipients of an email campaign."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] | None = None,
+        connection_factory: Callable[[], Any] | None = None,
+        pool_size: int | None = None,
+        batch_size: int | None = None,
+        max_attempts: int | None = None,
+        retry_backoff: float | None = None,
+        domain_rate: float | None = None,
+        write_attempts: int | None = None,
+        sent_log_dir: Path | None = None,
+    ):
+        if session_factory is None:
+            from app.db.session import async_session as session_factory
+        self.session_factory = session_factory
+        self.connection_factory = connection_factory or SmtpConnection
+        self.pool_size = pool_size or settings.SMTP_POOL_SIZE
+        self.batch_size = batch_size or settings.DELIVERY_BATCH_SIZE
+        self.max_attempts = max_attempts or settings.DELIVERY_MAX_ATTEMPTS
+        self.retry_backoff = settings.DELIVERY_RETRY_BACKOFF if retry_backoff is None else retry_backoff
+        self.throttle = DomainThrottle(settings.DELIVERY_DOMAIN_RATE if domain_rate is None else domain_rate)
+        self.write_attempts = write_attempts or settings.DELIVERY_WRITE_ATTEMPTS
+        self.sent_log_dir = Path(sent_log_dir or settings.DELIVERY_SENT_LOG_DIR)
+
+    async def run(self, campaign_id: UUID, limit: int | None = None) -> DeliveryReport:
+        """
+        Deliver to pending recipients of ``campaign_id`` (at most ``limit``).
+
+        Safe to call again after an interruption: results left in the sent
+        log are written first, then only PENDING recipients are picked up;
+        results are flushed every ``batch_size`` sends. If the results cannot
+        be written, no further recipients are sent (``report.stopped``).
+        """
+        report = DeliveryReport(campaign_id=campaign_id)
+        sent_log = SentLog(self.sent_log_dir, campaign_id)
+        unwritten = await asyncio.to_thread(sent_log.read)
+        if unwritten:
+            async with self.session_factory() as db:
+                if not await self._flush(db, campaign_id, unwritten, report):
+                    # Sending now would repeat recipients that already got the mail
+                    report.stopped = True
+                    return report
+            await asyncio.to_thread(sent_log.clear)
+            logger.info(f"Campaign {campaign_id}: wrote {len(unwritten)} results left by an earlier run")
+        async with self.session_factory() as db:
+            campaign = await db.get(Campaign, campaign_id)
+            if not campaign or campaign.type != CampaignType.EMAIL:
+                return report
+            template = await db.get(CampaignTemplate, campaign.template_id) if campaign.template_id else None
+            if template is None:
+                logger.error(f"No template for campaign {campaign_id}")
+                return report
+            compiled = compile_campaign(campaign, template)
+
+        started = time.perf_counter()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.pool_size * 4)
+        results: asyncio.Queue = asyncio.Queue()
+        write_failed = asyncio.Event()
+        executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="smtp")
+        workers = [
+            asyncio.create_task(self._worker(compiled, queue, results, executor, report))
+            for _ in range(self.pool_size)
+        ]
+        writer = asyncio.create_task(self._writer(campaign_id, results, report, sent_log, write_failed))
+        try:
+            await self._produce(campaign_id, queue, limit, report, write_failed)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await results.put(None)
+            await writer
+            executor.shutdown(wait=False)
+
+        report.elapsed = time.perf_counter() - started
+        logger.info(
+            f"Campaign {campaign_id}: sent={report.sent} bounced={report.bounced} failed={report.failed} "
+            f"({report.messages_per_second:.0f} msg/s)"
+        )
+        return report
+
+    async def _produce(self, campaign_id: UUID, queue: asyncio.Queue, limit: int | None, report: DeliveryReport,
+                       write_failed: asyncio.Event) -> None:
+        """Page through pending recipients by id (keyset) and feed the workers."""
+        last_id = None
+        remaining = limit
+        async with self.session_factory() as db:
+            while remaining is None or remaining > 0:
+                if write_failed.is_set():
+                    logger.error(f"Campaign {campaign_id}: stopping, delivery results cannot be written")
+                    report.stopped = True
+                    return
+                status = await db.scalar(select(Campaign.status).where(Campaign.id == campaign_id))
+                if status in (CampaignStatus.PAUSED, CampaignStatus.CANCELLED):
+                    report.stopped = True
+                    return
+
+                page = self.batch_size if remaining is None else min(self.batch_size, remaining)
+                conditions = [
+                    CampaignRecipient.campaign_id == campaign_id,
+                    CampaignRecipient.status == RecipientStatus.PENDING,
+                ]
+                if last_id is not None:
+                    conditions.append(CampaignRecipient.id > last_id)
+                rows = (await db.execute(
+                    select(CampaignRecipient.id, CampaignRecipient.email)
+                    .where(and_(*conditions))
+                    .order_by(CampaignRecipient.id)
+                    .limit(page)
+                )).all()
+                if not rows:
+                    return
+                for recipient_id, email in rows:
+                    await queue.put((recipient_id, email))
+                last_id = rows[-1][0]
+                if remaining is not None:
+                    remaining -= len(rows)
+
+    async def _worker(self, compiled: CompiledCampaign, queue: asyncio.Queue, results: asyncio.Queue,
+                      executor: ThreadPoolExecutor, report: DeliveryReport) -> None:
+        loop = asyncio.get_running_loop()
+        connection = self.connection_factory()
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                recipient_id, email = item
+                if not email:
+                    await results.put((recipient_id, RecipientStatus.FAILED, "No email address"))
+                    continue
+
+                await self.throttle.acquire(email.rpartition("@")[2].lower())
+                message = build_message(compiled, recipient_id, email)
+                outcome = None
+                for attempt in range(1, self.max_attempts + 1):
+                    try:
+                        await loop.run_in_executor(executor, connection.send, compiled.envelope_from, email, message)
+                        outcome = (recipient_id, RecipientStatus.SENT, None)
+                        break
+                    except Exception as e:
+                        kind, reason = classify_smtp_error(e)
+                        if kind == HARD_BOUNCE:
+                            outcome = (recipient_id, RecipientStatus.BOUNCED, reason)
+                            break
+                        if kind == REJECTED:
+                            outcome = (recipient_id, RecipientStatus.FAILED, reason)
+                            break
+                        if attempt == self.max_attempts:
+                            status = RecipientStatus.BOUNCED if kind == SOFT_BOUNCE else RecipientStatus.FAILED
+                            outcome = (recipient_id, status, reason)
+                            break
+                        report.retries += 1
+                        await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+                await results.put(outcome)
+        finally:
+            await loop.run_in_executor(executor, connection.close)
+
+    async def _writer(self, campaign_id: UUID, results: asyncio.Queue, report: DeliveryReport,
+                      sent_log: SentLog, write_failed: asyncio.Event) -> None:
+        """Collect send results, log them and write them in batches."""
+        pending: List[Result] = []  # not yet in the sent log
+        unwritten: List[Result] = []  # in the sent log, not yet in the database
+        async with self.session_factory() as db:
+            while True:
+                try:
+                    item = await asyncio.wait_for(results.get(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    # Latency bound: slow (throttled) runs still persist progress
+                    item = ()
+                if item:
+                    pending.append(item)
+                    if len(pending) < self.batch_size:
+                        continue
+                if pending:
+                    await asyncio.to_thread(sent_log.append, pending)
+                    unwritten += pending
+                    pending = []
+                if unwritten:
+                    if await self._flush(db, campaign_id, unwritten, report):
+                        await asyncio.to_thread(sent_log.clear)
+                        unwritten = []
+                    else:
+                        # Kept in the sent log and retried with the next batch / run
+                        write_failed.set()
+                if item is None:
+                    return
+
+    async def _flush(self, db: AsyncSession, campaign_id: UUID, results: List[Result],
+                     report: DeliveryReport) -> bool:
+        """Write ``results``, retrying with backoff; False if every attempt failed."""
+        for attempt in range(1, self.write_attempts + 1):
+            try:
+                counts = await self._write(db, campaign_id, results)
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                logger.warning(
+                    f"Recording {len(results)} delivery results for campaign {campaign_id} failed "
+                    f"(attempt {attempt}/{self.write_attempts}): {e}"
+                )
+                if attempt < self.write_attempts:
+                    await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+                continue
+            sent, bounced, failed, reasons = counts
+            report.sent += sent
+            report.bounced += bounced
+            report.failed += failed
+            for reason, count in reasons.items():
+                report.bounce_reasons[reason] = report.bounce_reasons.get(reason, 0) + count
+            return True
+        logger.error(f"Failed to record {len(results)} delivery results for campaign {campaign_id}, kept in sent log")
+        return False
+
+    async def _write(self, db: AsyncSession, campaign_id: UUID,
+                     results: List[Result]) -> Tuple[int, int, int, Dict[str, int]]:
+        """
+        Apply results to recipients that are still PENDING.
+
+        Results that were already written (replayed sent log, a commit whose
+        acknowledgement was lost) are skipped, so events and ``sent_count``
+        are never counted twice.
+        """
+        still_pending = set(await db.scalars(
+            select(CampaignRecipient.id)
+            .where(
+                CampaignRecipient.id.in_([recipient_id for recipient_id, _, _ in results]),
+                CampaignRecipient.status == RecipientStatus.PENDING,
+            )
+            .with_for_update()
+        ))
+        now = datetime.utcnow()
+        updates: List[Dict[str, Any]] = []
+        events: List[Dict[str, Any]] = []
+        sent = bounced = failed = 0
+        reasons: Dict[str, int] = {}
+        for recipient_id, status, reason in results:
+            if recipient_id not in still_pending:
+                continue
+            still_pending.discard(recipient_id)
+            if status == RecipientStatus.SENT:
+                sent += 1
+                updates.append({"id": recipient_id, "status": status, "sent_at": now})
+                events.append({
+                    "campaign_id": campaign_id,
+                    "recipient_id": recipient_id,
+                    "event_type": CampaignEventType.SENT,
+                    "timestamp": now,
+                })
+            elif status == RecipientStatus.BOUNCED:
+                bounced += 1
+                reasons[reason or ""] = reasons.get(reason or "", 0) + 1
+                updates.append({"id": recipient_id, "status": status, "bounce_reason": reason})
+                events.append({
+                    "campaign_id": campaign_id,
+                    "recipient_id": recipient_id,
+                    "event_type": CampaignEventType.BOUNCED,
+                    "timestamp": now,
+                    "details": {"reason": reason},
+                })
+            else:
+                failed += 1
+                updates.append({"id": recipient_id, "status": status, "failure_reason": reason})
+
+        if updates:
+            # ORM bulk UPDATE by primary key, grouped by parameter set
+            await db.execute(update(CampaignRecipient), updates)
+        if events:
+            await db.execute(insert(CampaignEvent), events)
+        if sent:
+            await db.execute(
+                update(Campaign)
+                .where(Campaign.id == campaign_id)
+                .values(sent_count=Campaign.sent_count + sent)
+            )
+        return sent, bounced, failed, reasons
+
 
 class EmailSender:
     """Sends emails for campaigns."""
-    
-    def __init__(self, db: AsyncSession):
+
+    def __init__(self, db: AsyncSession, engine: DeliveryEngine | None = None):
         self.db = db
-        self.smtp_host = "localhost"  # TODO: Get from config
-        self.smtp_port = 587
-        self.smtp_user = None  # TODO: Get from config
-        self.smtp_password = None  # TODO: Get from config
-    
-    def _render_template(self, template: str, variables: Dict[str, Any]) -> str:
-        """Render template with variables."""
-        result = template
-        for key, value in variables.items():
-            result = result.replace(f"{{{{{key}}}}}", str(value))
-        return result
-    
-    async def _send_email(
-        self,
-        to_email: str,
-        subject: str,
-        body: str,
-        from_email: str,
-        from_name: str | None = None,
-    ) -> bool:
-        """Send email via SMTP or email service."""
-        # TODO: Implement actual email sending
-        # For now, just log
-        logger.info(f"Sending email to {to_email}: {subject}")
-        return True
-    
+        self.engine = engine or DeliveryEngine()
+
     async def send_campaign_email(
         self,
         campaign: Campaign,
@@ -52,99 +691,46 @@ class EmailSender:
         template: CampaignTemplate | None = None,
         variant: str | None = None,
     ) -> bool:
-        """Send email for a campaign recipient."""
-        # Get template
+        """Send email for a single campaign recipient (test sends, resends)."""
         if not template:
             if campaign.template_id:
                 template = await self.db.get(CampaignTemplate, campaign.template_id)
-            else:
+            if not template:
                 logger.error(f"No template for campaign {campaign.id}")
                 return False
-        
-        # Get subject and body
-        subject = campaign.subject or template.subject_template or ""
-        body = template.body_template
-        
-        # Render template with variables
-        variables = {
-            "contact_name": "Contact",  # TODO: Get from contact
-            "campaign_name": campaign.name,
-            "unsubscribe_url": f"https://example.com/unsubscribe?token={recipient.id}",  # TODO: Generate token
-        }
-        
-        # If A/B-Test variant, use variant content
-        if variant and campaign.settings and campaign.settings.get("ab_test_enabled"):
-            # TODO: Get variant content from CampaignABTest
-            pass
-        
-        subject = self._render_template(subject, variables)
-        body = self._render_template(body, variables)
-        
-        # Add tracking pixel for opens
-        tracking_pixel = f'<img src="https://example.com/track/open?campaign_id={campaign.id}&recipient_id={recipient.id}" width="1" height="1" style="display:none;" />'
-        body = body.replace("</body>", f"{tracking_pixel}</body>")
-        
-        # Wrap links for click tracking
-        # TODO: Implement link wrapping
-        
-        # Send email
-        success = await self._send_email(
-            to_email=recipient.email or "",
-            subject=subject,
-            body=body,
-            from_email=campaign.sender_email or "noreply@example.com",
-            from_name=campaign.sender_name,
-        )
-        
-        if success:
-            # Update recipient status
-            recipient.status = RecipientStatus.SENT
-            recipient.sent_at = datetime.utcnow()
-            
-            # Create sent event
-            event = CampaignEvent(
-                campaign_id=campaign.id,
-                recipient_id=recipient.id,
-                event_type=CampaignEventType.SENT,
-            )
-            self.db.add(event)
-            
+
+        # TODO: Get variant content from CampaignABTest when variant is set
+        compiled = compile_campaign(campaign, template)
+        message = build_message(compiled, recipient.id, recipient.email or "")
+        connection = self.engine.connection_factory()
+        try:
+            await asyncio.to_thread(connection.send, compiled.envelope_from, recipient.email or "", message)
+        except Exception as e:
+            kind, reason = classify_smtp_error(e)
+            if kind in (HARD_BOUNCE, SOFT_BOUNCE):
+                recipient.status = RecipientStatus.BOUNCED
+                recipient.bounce_reason = reason
+            else:
+                recipient.failure_reason = reason
             await self.db.commit()
-        
-        return success
-    
+            return False
+        finally:
+            await asyncio.to_thread(connection.close)
+
+        recipient.status = RecipientStatus.SENT
+        recipient.sent_at = datetime.utcnow()
+        self.db.add(CampaignEvent(
+            campaign_id=campaign.id,
+            recipient_id=recipient.id,
+            event_type=CampaignEventType.SENT,
+        ))
+        await self.db.commit()
+        return True
+
     async def send_batch(
         self,
         campaign_id: UUID,
         batch_size: int = 100,
-    ):
-        """Send emails in batches for a campaign."""
-        campaign = await self.db.get(Campaign, campaign_id)
-        if not campaign or campaign.type != CampaignType.EMAIL:
-            return
-        
-        # Get pending recipients
-        from sqlalchemy import select, and_
-        stmt = select(CampaignRecipient).where(
-            and_(
-                CampaignRecipient.campaign_id == campaign_id,
-                CampaignRecipient.status == RecipientStatus.PENDING
-            )
-        ).limit(batch_size)
-        
-        result = await self.db.execute(stmt)
-        recipients = list(result.scalars().all())
-        
-        # Get template
-        template = None
-        if campaign.template_id:
-            template = await self.db.get(CampaignTemplate, campaign.template_id)
-        
-        # Send to each recipient
-        for recipient in recipients:
-            await self.send_campaign_email(
-                campaign=campaign,
-                recipient=recipient,
-                template=template,
-            )
-
+    ) -> DeliveryReport:
+        """Send up to ``batch_size`` pending recipients of a campaign."""
+        return await self.engine.run(campaign_id, limit=batch_size)
@@ -1,5 +1,6 @@
 """Event publishing for CRM Marketing service."""
 
+from datetime import datetime
 from uuid import UUID
 from typing import Optional
 import httpx
@@ -220,6 +221,29 @@ class EventPublisher:
         }
         await self._publish(event)
     
+    async def publish_campaign_tracking_summary(
+        self,
+        campaign_id: UUID,
+        opens: int,
+        clicks: int,
+        conversions: int,
+        unique_recipients: int,
+        first_seen: datetime,
+        last_seen: datetime,
+    ):
+        """Publish campaign.tracking.summary event (aggregated hits of one flush)."""
+        event = {
+            "event_type": "crm.campaign.tracking.summary",
+            "campaign_id": str(campaign_id),
+            "opens": opens,
+            "clicks": clicks,
+            "conversions": conversions,
+            "unique_recipients": unique_recipients,
+            "first_seen": first_seen.isoformat(),
+            "last_seen": last_seen.isoformat(),
+        }
+        await self._publish(event)
+    
     async def _publish(self, event: dict):
         """Publish event to event bus."""
         if not self.event_bus_url:
@@ -0,0 +1,45 @@
+"""Signed tracking links.
+
+Open and click URLs carry an HMAC over ``(campaign_id, recipient_id, url)``
+so the public tracking endpoints can reject forged hits, and in particular
+refuse to redirect to arbitrary URLs, without a database lookup.
+"""
+
+import base64
+import hashlib
+import hmac
+from urllib.parse import urlencode
+from uuid import UUID
+
+from app.config.settings import settings
+
+
+def tracking_token(campaign_id: UUID, recipient_id: UUID, url: str = "") -> str:
+    """Token for an open (``url`` empty) or a click on ``url``."""
+    message = f"{campaign_id}\n{recipient_id}\n{url}".encode()
+    digest = hmac.new(settings.TRACKING_SECRET.encode(), message, hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest[:16]).rstrip(b"=").decode()
+
+
+def verify_tracking_token(token: str, campaign_id: UUID, recipient_id: UUID, url: str = "") -> bool:
+    return hmac.compare_digest(token, tracking_token(campaign_id, recipient_id, url))
+
+
+def open_tracking_url(campaign_id: UUID, recipient_id: UUID) -> str:
+    query = urlencode({
+        "campaign_id": campaign_id,
+        "recipient_id": recipient_id,
+        "token": tracking_token(campaign_id, recipient_id),
+    })
+    return f"{settings.TRACKING_BASE_URL.rstrip('/')}/track/open?{query}"
+
+
+def click_tracking_url(campaign_id: UUID, recipient_id: UUID, url: str) -> str:
+    """Redirect URL that replaces a link to ``url`` in a recipient's message."""
+    query = urlencode({
+        "campaign_id": campaign_id,
+        "recipient_id": recipient_id,
+        "url": url,
+        "token": tracking_token(campaign_id, recipient_id, url),
+    })
+    return f"{settings.TRACKING_BASE_URL.rstrip('/')}/track/click?{query}"
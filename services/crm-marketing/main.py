@@ -3,17 +3,32 @@ CRM Marketing Service
 FastAPI application for marketing automation: segments, campaigns, and target groups.
 """
 
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.v1.api import api_router
 from app.config.settings import settings
+from app.services.campaign_tracker import start_tracking_ingestor, stop_tracking_ingestor
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    await start_tracking_ingestor()
+    try:
+        yield
+    finally:
+        # Flush buffered tracking hits before shutdown
+        await stop_tracking_ingestor()
+
 
 app = FastAPI(
     title="CRM Marketing Service",
     description="Marketing automation: segments, campaigns, and target groups",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS middleware
@@ -0,0 +1,132 @@
+"""
+Benchmark: campaign delivery throughput against a local SMTP sink
+
+Starts an aiosmtpd sink on localhost, seeds a campaign with N recipients and
+runs the DeliveryEngine end to end (compiled templates, persistent SMTP
+connections, batched status writes). Reports messages/second.
+
+Requires ``aiosmtpd``; uses an in-memory SQLite database via ``aiosqlite``
+unless ``--database-url`` points at PostgreSQL.
+
+Usage:
+    python scripts/bench_delivery.py --recipients 50000 --pool-size 20
+    python scripts/bench_delivery.py --recipients 500000 --database-url postgresql+asyncpg://...
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import insert  # noqa: E402
+from sqlalchemy.dialects.postgresql import JSONB  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+from sqlalchemy.ext.compiler import compiles  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.db import models  # noqa: E402
+from app.services.email_sender import DeliveryEngine, SmtpConnection  # noqa: E402
+
+try:
+    from aiosmtpd.controller import Controller
+except ImportError:  # pragma: no cover
+    sys.exit("aiosmtpd is required: pip install aiosmtpd")
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_on_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+class CountingSink:
+    def __init__(self):
+        self.messages = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages += 1
+        return "250 OK"
+
+
+async def seed(session_factory, recipients: int, domains: int):
+    async with session_factory() as db:
+        template = models.CampaignTemplate(
+            tenant_id="bench", name="Bench", type=models.CampaignType.EMAIL,
+            subject="{{campaign_name}} - Angebote für {{email}}",
+            body_html="<html><body><h1>{{campaign_name}}</h1><p>Hallo {{contact_name}},</p>"
+                      + "<p>Lorem ipsum dolor sit amet.</p>" * 40
+                      + '<a href="{{unsubscribe_url}}">Abmelden</a></body></html>',
+            body_text="Hallo {{contact_name}}\nAbmelden: {{unsubscribe_url}}",
+        )
+        db.add(template)
+        await db.flush()
+        campaign = models.Campaign(
+            tenant_id="bench", name="Bench Newsletter", type=models.CampaignType.EMAIL,
+            status=models.CampaignStatus.RUNNING, template_id=template.id,
+            sender_email="news@bench.example", sender_name="Bench",
+        )
+        db.add(campaign)
+        await db.flush()
+        for start in range(0, recipients, 10_000):
+            await db.execute(insert(models.CampaignRecipient), [
+                {
+                    "campaign_id": campaign.id,
+                    "contact_id": campaign.id,
+                    "email": f"user{i}@domain{i % domains}.example",
+                    "status": models.RecipientStatus.PENDING,
+                }
+                for i in range(start, min(start + 10_000, recipients))
+            ])
+        await db.commit()
+        return campaign.id
+
+
+async def main_async(args) -> None:
+    sink = CountingSink()
+    controller = Controller(sink, hostname="127.0.0.1", port=args.smtp_port)
+    controller.start()
+
+    engine = create_async_engine(args.database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+    session_factory = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    campaign_id = await seed(session_factory, args.recipients, args.domains)
+
+    delivery = DeliveryEngine(
+        session_factory=session_factory,
+        connection_factory=lambda: SmtpConnection(
+            host="127.0.0.1", port=args.smtp_port, user="", starttls=False, max_messages=10_000
+        ),
+        pool_size=args.pool_size,
+        batch_size=args.batch_size,
+        domain_rate=args.domain_rate,
+    )
+    start = time.perf_counter()
+    report = await delivery.run(campaign_id)
+    elapsed = time.perf_counter() - start
+
+    controller.stop()
+    await engine.dispose()
+    print(f"recipients     {args.recipients:,}")
+    print(f"pool size      {args.pool_size}")
+    print(f"sent           {report.sent:,} (sink received {sink.messages:,})")
+    print(f"elapsed        {elapsed:.1f} s")
+    print(f"throughput     {report.sent / elapsed:,.0f} messages/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipients", type=int, default=20_000)
+    parser.add_argument("--domains", type=int, default=200)
+    parser.add_argument("--pool-size", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--domain-rate", type=float, default=0, help="Messages/s per domain (0 = unthrottled)")
+    parser.add_argument("--smtp-port", type=int, default=8025)
+    parser.add_argument("--database-url", default="sqlite+aiosqlite:///:memory:")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import sys
+import uuid
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event, func, select
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+SERVICE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(SERVICE_DIR))
+
+# Drop another service's (or the monolith's) ``app`` package if one is loaded
+if not str(getattr(sys.modules.get("app"), "__file__", "")).startswith(str(SERVICE_DIR)):
+    for name in [m for m in sys.modules if m == "app" or m.startswith("app.")]:
+        del sys.modules[name]
+
+from app.db import models  # noqa: E402
+from app.api.v1.endpoints import campaigns  # noqa: E402
+from app.services import campaign_tracker  # noqa: E402
+from app.services.campaign_tracker import TrackingIngestor  # noqa: E402
+from app.services.tracking_links import click_tracking_url, open_tracking_url  # noqa: E402
+
+DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_on_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+class FakePublisher:
+    def __init__(self):
+        self.summaries = []
+
+    async def publish_campaign_tracking_summary(self, campaign_id, **summary):
+        self.summaries.append((campaign_id, summary))
+
+
+class BrokenSession:
+    async def __aenter__(self):
+        raise ConnectionError("database unavailable")
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+@pytest_asyncio.fixture
+async def engine():
+    engine = create_async_engine(DATABASE_URL, future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def session_factory(engine):
+    return sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+
+async def _seed(session_factory, recipients: int):
+    async with session_factory() as db:
+        campaign = models.Campaign(
+            tenant_id="t1", name="Herbst", type=models.CampaignType.EMAIL,
+            status=models.CampaignStatus.RUNNING,
+        )
+        db.add(campaign)
+        await db.flush()
+        rows = [
+            models.CampaignRecipient(
+                campaign_id=campaign.id, contact_id=campaign.id, email=f"user{i}@example.com",
+                status=models.RecipientStatus.SENT,
+            )
+            for i in range(recipients)
+        ]
+        db.add_all(rows)
+        await db.commit()
+        return campaign.id, [r.id for r in rows]
+
+
+def test_hits_are_deduplicated_within_window(tmp_path):
+    now = [0.0]
+    ingestor = TrackingIngestor(
+        open_window=3600, click_window=60, spool_dir=tmp_path, clock=lambda: now[0],
+    )
+    campaign_id, recipient_id = uuid.uuid4(), uuid.uuid4()
+
+    assert ingestor.record_open(campaign_id, recipient_id)
+    assert not ingestor.record_open(campaign_id, recipient_id)
+    assert ingestor.record_click(campaign_id, recipient_id, "https://a.example")
+    assert ingestor.record_click(campaign_id, recipient_id, "https://b.example")
+    assert not ingestor.record_click(campaign_id, recipient_id, "https://a.example")
+    now[0] = 61.0
+    assert ingestor.record_click(campaign_id, recipient_id, "https://a.example")
+    assert not ingestor.record_open(campaign_id, recipient_id)
+    now[0] = 3601.0
+    assert ingestor.record_open(campaign_id, recipient_id)
+
+    assert ingestor.pending() == 5
+    assert ingestor.duplicates == 3
+
+
+def test_tracking_endpoints_reject_unsigned_links(tmp_path, monkeypatch):
+    ingestor = TrackingIngestor(spool_dir=tmp_path)
+    monkeypatch.setattr(campaign_tracker, "_ingestor", ingestor)
+    app = FastAPI()
+    app.include_router(campaigns.router, prefix="/campaigns")
+    client = TestClient(app)
+    campaign_id, recipient_id = uuid.uuid4(), uuid.uuid4()
+
+    def tracked(link):
+        parts = urlsplit(link)
+        return f"/campaigns/tracking/{parts.path.rsplit('/', 1)[1]}?{parts.query}"
+
+    response = client.post(tracked(click_tracking_url(campaign_id, recipient_id, "https://shop.example/p/1")),
+                           follow_redirects=False)
+    assert response.status_code == 307 and response.headers["location"] == "https://shop.example/p/1"
+    assert client.post(tracked(open_tracking_url(campaign_id, recipient_id))).status_code == 200
+    assert ingestor.pending() == 2
+
+    # Fremde Ziel-URL, fremder Empfänger oder fehlende Signatur: kein Redirect, kein Hit
+    forged = tracked(click_tracking_url(campaign_id, recipient_id, "https://shop.example/p/1"))
+    assert client.post(forged.replace("shop.example", "evil.example"), follow_redirects=False).status_code == 404
+    other = tracked(open_tracking_url(campaign_id, uuid.uuid4()))
+    assert client.post(other.replace(str(campaign_id), str(uuid.uuid4()))).status_code == 404
+    params = {"campaign_id": str(campaign_id), "recipient_id": str(recipient_id), "url": "https://evil.example"}
+    assert client.post("/campaigns/tracking/click", params=params, follow_redirects=False).status_code == 422
+    assert ingestor.pending() == 2
+
+
+@pytest.mark.asyncio
+async def test_flush_writes_events_and_aggregates_in_few_statements(engine, session_factory, tmp_path):
+    campaign_id, recipient_ids = await _seed(session_factory, 3)
+    publisher = FakePublisher()
+    ingestor = TrackingIngestor(session_factory=session_factory, publisher=publisher, spool_dir=tmp_path)
+    for recipient_id in recipient_ids:
+        ingestor.record_open(campaign_id, recipient_id)
+        ingestor.record_open(campaign_id, recipient_id)  # duplicate
+    ingestor.record_click(campaign_id, recipient_ids[0], "https://a.example")
+    ingestor.record_click(campaign_id, recipient_ids[0], "https://b.example")
+    ingestor.record_open(campaign_id, uuid.uuid4())  # unknown recipient
+    ingestor.record_open(uuid.uuid4(), recipient_ids[1])  # recipient of another campaign
+
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute",
+                 lambda conn, cursor, sql, *args: statements.append(sql))
+    written = await ingestor.flush()
+
+    assert written == 5
+    assert ingestor.dropped == 2
+    # recipient lookup, event insert, recipient update, campaign update
+    assert len(statements) == 4
+
+    async with session_factory() as db:
+        campaign = await db.get(models.Campaign, campaign_id)
+        first = await db.get(models.CampaignRecipient, recipient_ids[0])
+        events = await db.scalar(select(func.count()).select_from(models.CampaignEvent))
+    assert (campaign.open_count, campaign.click_count) == (3, 2)
+    assert (first.open_count, first.click_count) == (1, 2)
+    assert first.opened_at is not None and first.clicked_at is not None
+    assert first.status == models.RecipientStatus.DELIVERED
+    assert events == 5
+    assert publisher.summaries == [(campaign_id, {
+        "opens": 3, "clicks": 2, "conversions": 0, "unique_recipients": 3,
+        "first_seen": publisher.summaries[0][1]["first_seen"],
+        "last_seen": publisher.summaries[0][1]["last_seen"],
+    })]
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_is_spooled_and_replayed(session_factory, tmp_path):
+    campaign_id, recipient_ids = await _seed(session_factory, 2)
+    broken = TrackingIngestor(session_factory=BrokenSession, publisher=FakePublisher(), spool_dir=tmp_path)
+    broken.record_open(campaign_id, recipient_ids[0])
+    broken.record_click(campaign_id, recipient_ids[1], "https://a.example")
+
+    assert await broken.flush() == 0
+    assert broken.spool_file.exists()
+
+    ingestor = TrackingIngestor(session_factory=session_factory, publisher=FakePublisher(), spool_dir=tmp_path)
+    ingestor.record_open(campaign_id, recipient_ids[1])
+    assert await ingestor.flush() == 3
+    assert not ingestor.spool_file.exists()
+
+    async with session_factory() as db:
+        campaign = await db.get(models.Campaign, campaign_id)
+    assert (campaign.open_count, campaign.click_count) == (2, 1)
+
+
+@pytest.mark.asyncio
+async def test_start_takes_over_spools_of_stopped_ingestors(session_factory, tmp_path):
+    campaign_id, recipient_ids = await _seed(session_factory, 3)
+    broken = TrackingIngestor(session_factory=BrokenSession, publisher=FakePublisher(), spool_dir=tmp_path)
+    for recipient_id in recipient_ids:
+        broken.record_open(campaign_id, recipient_id)
+    await broken.flush()
+    lines = broken.spool_file.read_text().splitlines()
+    broken.spool_file.unlink()
+    # Spools of two other processes: one has exited, one still holds its lock
+    (tmp_path / "tracking-999998.ndjson").write_text("\n".join(lines[:2]) + "\n")
+    (tmp_path / "tracking-999999.ndjson").write_text(lines[2] + "\n")
+
+    with open(tmp_path / "tracking-999999.lock", "a") as live:
+        fcntl.flock(live, fcntl.LOCK_EX)
+        ingestor = TrackingIngestor(session_factory=session_factory, publisher=FakePublisher(), spool_dir=tmp_path)
+        await ingestor.start()
+        await ingestor.stop()
+
+    assert ingestor.written == 2
+    assert not (tmp_path / "tracking-999998.ndjson").exists()
+    assert (tmp_path / "tracking-999999.ndjson").exists()
+
+
+class GatedSession:
+    """Session factory whose sessions wait until ``gate`` is set."""
+
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+        self.gate = asyncio.Event()
+
+    def __call__(self):
+        gated = self
+
+        class _Session:
+            async def __aenter__(self):
+                await gated.gate.wait()
+                self.session = gated.session_factory()
+                return await self.session.__aenter__()
+
+            async def __aexit__(self, *exc):
+                return await self.session.__aexit__(*exc)
+
+        return _Session()
+
+
+@pytest.mark.asyncio
+async def test_hits_spilled_during_a_flush_are_kept(session_factory, tmp_path):
+    campaign_id, recipient_ids = await _seed(session_factory, 4)
+    broken = TrackingIngestor(session_factory=BrokenSession, publisher=FakePublisher(), spool_dir=tmp_path)
+    broken.record_open(campaign_id, recipient_ids[0])
+    await broken.flush()
+
+    gated = GatedSession(session_factory)
+    ingestor = TrackingIngestor(session_factory=gated, publisher=FakePublisher(), spool_dir=tmp_path, max_buffer=2)
+    flush = asyncio.ensure_future(ingestor.flush())
+    await asyncio.sleep(0.05)  # flush has read the spool and waits for the database
+    ingestor.record_open(campaign_id, recipient_ids[1])
+    ingestor.record_open(campaign_id, recipient_ids[2])  # buffer full: spilled to the spool
+    assert ingestor.pending() == 0
+    gated.gate.set()
+
+    assert await flush == 1
+    await asyncio.gather(*ingestor._spills)
+    assert ingestor.spool_file.exists()
+    assert await ingestor.flush() == 2
+    assert not ingestor.spool_file.exists()
+
+
+@pytest.mark.asyncio
+async def test_rows_rejected_by_the_database_are_quarantined(session_factory, tmp_path):
+    campaign_id, recipient_ids = await _seed(session_factory, 3)
+    ingestor = TrackingIngestor(session_factory=session_factory, publisher=FakePublisher(), spool_dir=tmp_path)
+    for recipient_id in recipient_ids:
+        ingestor.record_open(campaign_id, recipient_id)
+    ingestor.record_conversion(campaign_id, recipient_ids[0], {"order": object()})  # not JSON serializable
+
+    assert await ingestor.flush() == 3
+    assert ingestor.quarantined == 1
+    assert len(ingestor.quarantine_file.read_text().splitlines()) == 1
+    assert not ingestor.spool_file.exists()
+
+    # Unreadable spool lines are quarantined as well instead of failing every replay
+    ingestor.spool_file.write_text("{not json\n")
+    ingestor.record_open(campaign_id, uuid.uuid4())
+    assert await ingestor.flush() == 0
+    assert ingestor.quarantined == 2 and not ingestor.spool_file.exists()
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import smtplib
+import sys
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+SERVICE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(SERVICE_DIR))
+
+# Drop another service's (or the monolith's) ``app`` package if one is loaded
+if not str(getattr(sys.modules.get("app"), "__file__", "")).startswith(str(SERVICE_DIR)):
+    for name in [m for m in sys.modules if m == "app" or m.startswith("app.")]:
+        del sys.modules[name]
+
+from app.db import models  # noqa: E402
+from app.services.email_sender import (  # noqa: E402
+    HARD_BOUNCE,
+    SOFT_BOUNCE,
+    TRANSIENT,
+    CompiledTemplate,
+    DeliveryEngine,
+    DomainThrottle,
+    SentLog,
+    classify_smtp_error,
+)
+
+# File database: producer and writer sessions need their own connections
+# (an in-memory database shares one, and a rollback in one session would
+# discard the other's pending batch)
+DATABASE_URL = "sqlite+aiosqlite:///{path}"
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_on_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+class FakeConnection:
+    """Records messages; addresses decide the SMTP outcome."""
+
+    sent: list = []
+    attempts: dict = {}
+
+    def send(self, envelope_from, to_email, message):
+        FakeConnection.attempts[to_email] = FakeConnection.attempts.get(to_email, 0) + 1
+        if to_email.startswith("bounce"):
+            raise smtplib.SMTPRecipientsRefused({to_email: (550, b"5.1.1 User unknown")})
+        if to_email.startswith("flaky") and FakeConnection.attempts[to_email] == 1:
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        FakeConnection.sent.append((to_email, message))
+
+    def close(self):
+        pass
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(DATABASE_URL.format(path=tmp_path / "marketing.db"), future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+    FakeConnection.sent = []
+    FakeConnection.attempts = {}
+    yield sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    await engine.dispose()
+
+
+async def _seed_campaign(session_factory, emails):
+    async with session_factory() as db:
+        template = models.CampaignTemplate(
+            tenant_id="t1", name="Newsletter", type=models.CampaignType.EMAIL,
+            subject="{{campaign_name}} für {{email}}",
+            body_html="<html><body>Hallo {{contact_name}} - {{campaign_name}}</body></html>",
+            body_text="Abmelden: {{unsubscribe_url}}",
+        )
+        db.add(template)
+        await db.flush()
+        campaign = models.Campaign(
+            tenant_id="t1", name="Herbst", type=models.CampaignType.EMAIL,
+            status=models.CampaignStatus.RUNNING, template_id=template.id,
+            sender_email="news@valeo.example", sender_name="VALEO",
+        )
+        db.add(campaign)
+        await db.flush()
+        for email in emails:
+            db.add(models.CampaignRecipient(campaign_id=campaign.id, contact_id=campaign.id, email=email))
+        await db.commit()
+        return campaign.id
+
+
+def test_compiled_template_substitutes_static_values_once():
+    template = CompiledTemplate("Hi {{ name }}, {{campaign_name}} {{unknown}}", {"campaign_name": "Herbst"})
+
+    assert template.placeholders == ["name", "unknown"]
+    assert template.render({"name": "Anna"}) == "Hi Anna, Herbst {{unknown}}"
+
+
+def test_classify_smtp_error():
+    hard = smtplib.SMTPRecipientsRefused({"a@x.de": (550, b"User unknown")})
+    soft = smtplib.SMTPRecipientsRefused({"a@x.de": (452, b"Mailbox full")})
+
+    assert classify_smtp_error(hard) == (HARD_BOUNCE, "550 User unknown")
+    assert classify_smtp_error(soft)[0] == SOFT_BOUNCE
+    assert classify_smtp_error(smtplib.SMTPServerDisconnected("gone"))[0] == TRANSIENT
+
+
+def test_domain_throttle_spaces_sends_per_domain():
+    now = [0.0]
+    throttle = DomainThrottle(rate=2, burst=2, clock=lambda: now[0])
+
+    assert [throttle.delay("x.de") for _ in range(3)] == [0.0, 0.0, 0.5]
+    assert throttle.delay("y.de") == 0.0
+    now[0] = 10.0
+    assert throttle.delay("x.de") == 0.0
+
+
+@pytest.mark.asyncio
+async def test_engine_batches_results_and_resumes(session_factory, tmp_path):
+    emails = [f"user{i}@example.com" for i in range(20)] + ["bounce@example.com", "flaky@example.com"]
+    campaign_id = await _seed_campaign(session_factory, emails)
+    engine = DeliveryEngine(
+        session_factory=session_factory, connection_factory=FakeConnection,
+        pool_size=4, batch_size=5, retry_backoff=0, domain_rate=0, sent_log_dir=tmp_path,
+    )
+
+    first = await engine.run(campaign_id, limit=10)
+    second = await engine.run(campaign_id)
+
+    assert first.sent + first.bounced == 10
+    assert first.sent + second.sent == 21
+    assert first.bounced + second.bounced == 1
+    assert FakeConnection.attempts["flaky@example.com"] == 2
+    to_email, message = FakeConnection.sent[0]
+    assert b"Subject: =?utf-8?" in message and b"multipart/alternative" in message
+
+    async with session_factory() as db:
+        campaign = await db.get(models.Campaign, campaign_id)
+        events = await db.scalar(select(func.count()).select_from(models.CampaignEvent))
+        pending = await db.scalar(
+            select(func.count()).select_from(models.CampaignRecipient)
+            .where(models.CampaignRecipient.status == models.RecipientStatus.PENDING)
+        )
+        bounced = await db.scalar(
+            select(models.CampaignRecipient.bounce_reason)
+            .where(models.CampaignRecipient.email == "bounce@example.com")
+        )
+    assert campaign.sent_count == 21
+    assert events == 22  # 21 SENT + 1 BOUNCED
+    assert pending == 0
+    assert bounced.startswith("550")
+
+
+@pytest.mark.asyncio
+async def test_failed_status_write_is_kept_and_not_resent(session_factory, tmp_path, monkeypatch):
+    emails = [f"user{i}@example.com" for i in range(40)]
+    campaign_id = await _seed_campaign(session_factory, emails)
+    engine = DeliveryEngine(
+        session_factory=session_factory, connection_factory=FakeConnection,
+        pool_size=2, batch_size=4, retry_backoff=0, domain_rate=0, write_attempts=2, sent_log_dir=tmp_path,
+    )
+    write = DeliveryEngine._write
+    attempts = []
+
+    async def failing_write(self, db, campaign_id, results):
+        attempts.append(len(results))
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(DeliveryEngine, "_write", failing_write)
+    first = await engine.run(campaign_id)
+
+    assert first.stopped and first.sent == 0
+    # Stopped after the first failed batch (plus what the workers had already queued)
+    assert 4 <= len(FakeConnection.sent) <= 20
+    assert attempts[:2] == [4, 4]  # retried
+    logged = SentLog(tmp_path, campaign_id).read()
+    assert len(logged) == len(FakeConnection.sent)
+
+    # Database still down: the logged results block new sends
+    blocked = await engine.run(campaign_id)
+    assert blocked.stopped and len(FakeConnection.sent) == len(logged)
+
+    monkeypatch.setattr(DeliveryEngine, "_write", write)
+    second = await engine.run(campaign_id)
+
+    assert second.sent == 40 and not second.stopped
+    assert sorted(to_email for to_email, _ in FakeConnection.sent) == sorted(emails)
+    assert not SentLog(tmp_path, campaign_id).path.exists()
+
+    # A replayed log (e.g. a commit whose acknowledgement was lost) is not counted twice
+    SentLog(tmp_path, campaign_id).append(logged)
+    third = await engine.run(campaign_id)
+    async with session_factory() as db:
+        campaign = await db.get(models.Campaign, campaign_id)
+        events = await db.scalar(select(func.count()).select_from(models.CampaignEvent))
+    assert third.sent == 0
+    assert campaign.sent_count == 40 and events == 40
@@ -0,0 +1,57 @@
+"""stock ledger: one stock item per bin and lot, non-negative quantity
+
+Revision ID: 20261019_01
+Revises: 20251116_03
+Create Date: 2026-10-19
+"""
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261019_01"
+down_revision = "20251116_03"
+branch_labels = None
+depends_on = None
+
+_GROUPS = """
+    SELECT id,
+           first_value(id) OVER (PARTITION BY warehouse_id, location_id, lot_id ORDER BY created_at, id) AS keep_id,
+           sum(quantity) OVER (PARTITION BY warehouse_id, location_id, lot_id) AS total,
+           sum(reserved_quantity) OVER (PARTITION BY warehouse_id, location_id, lot_id) AS reserved
+    FROM inventory_stock_items
+"""
+
+
+def upgrade() -> None:
+    # Doppelte Bestände aus parallelen Zugängen auf den ältesten zusammenführen
+    op.execute(f"""
+        WITH groups AS ({_GROUPS})
+        UPDATE inventory_transactions t SET stock_item_id = g.keep_id
+        FROM groups g WHERE t.stock_item_id = g.id AND g.id <> g.keep_id
+    """)
+    op.execute(f"""
+        WITH groups AS ({_GROUPS})
+        UPDATE inventory_stock_items s SET quantity = g.total, reserved_quantity = g.reserved
+        FROM groups g WHERE s.id = g.id AND g.id = g.keep_id
+    """)
+    op.execute(f"""
+        WITH groups AS ({_GROUPS})
+        DELETE FROM inventory_stock_items s USING groups g WHERE s.id = g.id AND g.id <> g.keep_id
+    """)
+    op.create_unique_constraint(
+        "uq_inventory_stock_items_bin_lot",
+        "inventory_stock_items",
+        ["warehouse_id", "location_id", "lot_id"],
+    )
+    # NOT VALID: gilt ab sofort für alle Schreibzugriffe; bereits negative Altbestände
+    # werden nicht stillschweigend korrigiert (VALIDATE CONSTRAINT nach Bereinigung)
+    op.execute(
+        "ALTER TABLE inventory_stock_items ADD CONSTRAINT ck_inventory_stock_items_quantity_non_negative "
+        "CHECK (quantity >= 0) NOT VALID"
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("ck_inventory_stock_items_quantity_non_negative", "inventory_stock_items", type_="check")
+    op.drop_constraint("uq_inventory_stock_items_bin_lot", "inventory_stock_items", type_="unique")
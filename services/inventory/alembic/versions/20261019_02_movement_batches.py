@@ -0,0 +1,36 @@
+"""movement batches with idempotency key
+
+Revision ID: 20261019_02
+Revises: 20261019_01
+Create Date: 2026-10-19
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "20261019_02"
+down_revision = "20261019_01"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "inventory_movement_batches",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("tenant_id", sa.String(length=64), nullable=False, server_default="default"),
+        sa.Column("idempotency_key", sa.String(length=128), nullable=False),
+        sa.Column("movement_type", sa.String(length=16), nullable=False),
+        sa.Column("reference", sa.String(length=128), nullable=True),
+        sa.Column("line_count", sa.Integer(), nullable=False),
+        sa.Column("total_quantity", sa.Numeric(16, 3), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.UniqueConstraint("tenant_id", "idempotency_key", name="uq_inventory_movement_batches_key"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("inventory_movement_batches")
@@ -0,0 +1,53 @@
+"""lot genealogy links and lot search indexes
+
+Revision ID: 20261019_03
+Revises: 20261019_02
+Create Date: 2026-10-19
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "20261019_03"
+down_revision = "20261019_02"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "inventory_lot_links",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("parent_lot_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("inventory_lots.id"), nullable=False),
+        sa.Column("child_lot_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("inventory_lots.id"), nullable=False),
+        sa.Column("link_type", sa.String(length=32), nullable=False, server_default="transformation"),
+        sa.Column("quantity", sa.Numeric(16, 3), nullable=True),
+        sa.Column("reference", sa.String(length=128), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index("ix_inventory_lot_links_parent_child", "inventory_lot_links", ["parent_lot_id", "child_lot_id"])
+    op.create_index("ix_inventory_lot_links_child_parent", "inventory_lot_links", ["child_lot_id", "parent_lot_id"])
+
+    op.create_index("ix_inventory_lots_lot_number_id", "inventory_lots", ["lot_number", "id"])
+    # Abgänge je Bestand nach Zeit für die Outbound-Liste der Rückverfolgung
+    op.create_index(
+        "ix_inventory_transactions_stock_item_created", "inventory_transactions", ["stock_item_id", "created_at"]
+    )
+    # Teilstring-Suche der Chargenliste; Ausdruck identisch mit _lot_search_text() im Service
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_inventory_lots_search_trgm ON inventory_lots "
+        "USING gin (lower(lot_number || ' ' || sku) gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_inventory_lots_search_trgm")
+    op.drop_index("ix_inventory_transactions_stock_item_created", table_name="inventory_transactions")
+    op.drop_index("ix_inventory_lots_lot_number_id", table_name="inventory_lots")
+    op.drop_index("ix_inventory_lot_links_child_parent", table_name="inventory_lot_links")
+    op.drop_index("ix_inventory_lot_links_parent_child", table_name="inventory_lot_links")
+    op.drop_table("inventory_lot_links")
@@ -0,0 +1,59 @@
+"""EPCIS outbox, retention progress and JSONB extensions
+
+Revision ID: 20261019_04
+Revises: 20261019_03
+Create Date: 2026-10-19
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "20261019_04"
+down_revision = "20261019_03"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # JSONB erlaubt das serverseitige Entfernen von Schlüsseln (extensions - ARRAY[...])
+    op.alter_column(
+        "inventory_epcis_events",
+        "extensions",
+        type_=postgresql.JSONB(),
+        postgresql_using="extensions::jsonb",
+    )
+    op.create_index(
+        "ix_inventory_epcis_events_tenant_time", "inventory_epcis_events", ["tenant_id", "event_time", "id"]
+    )
+    op.create_table(
+        "inventory_epcis_outbox",
+        sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column("tenant_id", sa.String(length=64), nullable=False),
+        sa.Column("event_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("last_error", sa.String(length=256), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_table(
+        "inventory_epcis_retention_state",
+        sa.Column("scope", sa.String(length=64), primary_key=True),
+        sa.Column("anonymized_until", sa.DateTime(), nullable=True),
+        sa.Column("anonymized_until_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("inventory_epcis_retention_state")
+    op.drop_table("inventory_epcis_outbox")
+    op.drop_index("ix_inventory_epcis_events_tenant_time", table_name="inventory_epcis_events")
+    op.alter_column(
+        "inventory_epcis_events",
+        "extensions",
+        type_=sa.JSON(),
+        postgresql_using="extensions::json",
+    )
@@ -0,0 +1,31 @@
+"""EPCIS event_key unique per tenant
+
+Revision ID: 20261019_05
+Revises: 20261019_04
+Create Date: 2026-10-19
+"""
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261019_05"
+down_revision = "20261019_04"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Idempotenzschlüssel eines Tenants dürfen die Events eines anderen nicht verdecken
+    op.drop_index(op.f("ix_inventory_epcis_events_event_key"), table_name="inventory_epcis_events")
+    op.create_index(
+        "ux_inventory_epcis_events_tenant_event_key",
+        "inventory_epcis_events",
+        ["tenant_id", "event_key"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ux_inventory_epcis_events_tenant_event_key", table_name="inventory_epcis_events")
+    op.create_index(op.f("ix_inventory_epcis_events_event_key"), "inventory_epcis_events", ["event_key"], unique=True)
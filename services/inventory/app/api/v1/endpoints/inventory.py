@@ -2,14 +2,24 @@
 
 from __future__ import annotations
 
+from typing import Literal
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 
 from app.db.session import get_session
 from app.dependencies import get_event_bus, resolve_tenant_id
-from app.schemas import LotListResponse, LotTraceResponse, ReceiptCreate, StockItemRead, TransferCreate
+from app.schemas import (
+    LotListResponse,
+    LotTraceResponse,
+    ReceiptCreate,
+    StockItemRead,
+    TransferCreate,
+    TransformationCreate,
+    TransformationRead,
+)
 from app.services import InventoryService
+from app.services.lot_genealogy import GENEALOGY_MAX_DEPTH
 
 router = APIRouter()
 
@@ -17,12 +27,17 @@ router = APIRouter()
 @router.get("/lots", response_model=LotListResponse)
 async def list_lots(
     search: str | None = Query(default=None, description="Filter für SKU, Lot-Nummer, Lagerort oder Warehouse-Code"),
+    limit: int = Query(default=50, ge=1, le=500),
+    cursor: str | None = Query(default=None, description="next_cursor der vorherigen Seite"),
     session=Depends(get_session),
     tenant_id: str = Depends(resolve_tenant_id),
     event_bus=Depends(get_event_bus),
 ) -> LotListResponse:
     service = InventoryService(session, event_bus=event_bus, tenant_id=tenant_id)
-    return await service.list_lots(search=search)
+    try:
+        return await service.list_lots(search=search, limit=limit, cursor=cursor)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
 
 
 @router.post("/receipts", response_model=StockItemRead, status_code=status.HTTP_201_CREATED)
@@ -53,15 +68,32 @@ async def transfer_stock(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
 
 
+@router.post("/transformations", response_model=TransformationRead, status_code=status.HTTP_201_CREATED)
+async def record_transformation(
+    payload: TransformationCreate,
+    session=Depends(get_session),
+    tenant_id: str = Depends(resolve_tenant_id),
+    event_bus=Depends(get_event_bus),
+) -> TransformationRead:
+    service = InventoryService(session, event_bus=event_bus, tenant_id=tenant_id)
+    try:
+        return await service.record_transformation(payload)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+
 @router.get("/lots/{lot_id}", response_model=LotTraceResponse)
 async def trace_lot(
     lot_id: UUID,
+    direction: Literal["both", "backward", "forward"] = Query(default="both"),
+    max_depth: int = Query(default=GENEALOGY_MAX_DEPTH, ge=1, le=GENEALOGY_MAX_DEPTH),
+    outbound_limit: int = Query(default=100, ge=0, le=1000),
     session=Depends(get_session),
     tenant_id: str = Depends(resolve_tenant_id),
     event_bus=Depends(get_event_bus),
 ) -> LotTraceResponse:
     service = InventoryService(session, event_bus=event_bus, tenant_id=tenant_id)
     try:
-        return await service.trace_lot(lot_id)
+        return await service.trace_lot(lot_id, direction=direction, max_depth=max_depth, outbound_limit=outbound_limit)
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
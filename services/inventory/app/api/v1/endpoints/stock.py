@@ -6,7 +6,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status
 
 from app.db.session import get_session
 from app.dependencies import get_event_bus, resolve_tenant_id
-from app.schemas import ArticleSummary, StockMovementCreate, StockMovementRecord
+from app.schemas import ArticleSummary, BatchMovementCreate, BatchMovementRead, StockMovementCreate, StockMovementRecord
 from app.services import InventoryService
 
 router = APIRouter()
@@ -52,3 +52,25 @@ async def create_stock_movement(
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
 
+
+
+@router.post(
+    "/stock-movements/batch",
+    response_model=BatchMovementRead,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_batch_movement(
+    payload: BatchMovementCreate,
+    session=Depends(get_session),
+    tenant_id: str = Depends(resolve_tenant_id),
+    event_bus=Depends(get_event_bus),
+) -> BatchMovementRead:
+    """Mehrzeiliger Beleg; Wiederholungen mit gleichem ``idempotency_key`` buchen nicht erneut."""
+    service = InventoryService(session, event_bus=event_bus, tenant_id=tenant_id)
+    try:
+        result = await service.book_batch(payload)
+    except ValueError as exc:
+        await session.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    await session.commit()
+    return result
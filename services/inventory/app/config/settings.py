@@ -71,12 +71,24 @@ class Settings(BaseSettings):
     RATE_LIMIT_PER_MINUTE: int = 600
     NATS_FAILURE_THRESHOLD: int = 5
     NATS_CIRCUIT_BREAKER_OPEN_SECONDS: int = 60
+    # Parallel verarbeitete Belege je Subscription (Einkaufs-/Versandbelege)
+    SUBSCRIBER_CONCURRENCY: int = 4
 
     # DSGVO / Retention für EPCIS
     EPCIS_RETENTION_DAYS: int = 365
     EPCIS_ANONYMIZE_KEYS: List[str] = Field(
         default_factory=lambda: ["userName", "email", "phone", "address", "personalId"]
     )
+    # Sensible Extension-Felder werden nach dieser Frist entfernt, die Events selbst erst nach EPCIS_RETENTION_DAYS
+    EPCIS_ANONYMIZE_AFTER_DAYS: int = 90
+    # Hintergrundlauf für Retention/Pseudonymisierung (0 = nur manuell über den Maintenance-Endpunkt)
+    EPCIS_RETENTION_INTERVAL_SECONDS: int = 3600
+    EPCIS_RETENTION_CHUNK: int = 5000
+    # Bulk-Capture und Outbox-Relay für epcis.event.created
+    EPCIS_CAPTURE_MAX_EVENTS: int = 10000
+    EPCIS_OUTBOX_BATCH: int = 500
+    EPCIS_OUTBOX_INTERVAL_SECONDS: float = 1.0
+    EPCIS_OUTBOX_MAX_ATTEMPTS: int = 10
 
     @field_validator("MODULE_MODE_OVERRIDES", mode="before")
     @classmethod
@@ -3,12 +3,13 @@
 from __future__ import annotations
 
 from datetime import datetime
+from decimal import Decimal
 from enum import Enum as PyEnum
 from uuid import UUID, uuid4
 
-from sqlalchemy import Boolean, Column, DateTime, Enum as SQLEnum, ForeignKey, Integer, Numeric, String, Text
+from sqlalchemy import BigInteger, Boolean, CheckConstraint, Column, DateTime, Enum as SQLEnum, ForeignKey, Index, Integer, Numeric, String, Text, UniqueConstraint
 from sqlalchemy import JSON
-from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy.dialects.postgresql import JSONB, UUID as PGUUID
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -58,6 +59,10 @@ class Location(Base):
 
 class Lot(Base):
     __tablename__ = "inventory_lots"
+    __table_args__ = (
+        # Sortierschlüssel der Keyset-Paginierung in InventoryService.list_lots
+        Index("ix_inventory_lots_lot_number_id", "lot_number", "id"),
+    )
 
     id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), primary_key=True, default=uuid4)
     sku: Mapped[str] = mapped_column(String(64), nullable=False)
@@ -69,15 +74,39 @@ class Lot(Base):
     stock_items: Mapped[list[StockItem]] = relationship(back_populates="lot")
 
 
+class LotLink(Base):
+    """Genealogie-Kante: Charge ``child`` ist (teilweise) aus Charge ``parent`` entstanden."""
+
+    __tablename__ = "inventory_lot_links"
+    __table_args__ = (
+        # Je Richtung ein Index, der die rekursive Rückverfolgung ohne Tabellenzugriff bedient
+        Index("ix_inventory_lot_links_parent_child", "parent_lot_id", "child_lot_id"),
+        Index("ix_inventory_lot_links_child_parent", "child_lot_id", "parent_lot_id"),
+    )
+
+    id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), primary_key=True, default=uuid4)
+    parent_lot_id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), ForeignKey("inventory_lots.id"), nullable=False)
+    child_lot_id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), ForeignKey("inventory_lots.id"), nullable=False)
+    link_type: Mapped[str] = mapped_column(String(32), nullable=False, default="transformation")
+    quantity: Mapped[Decimal | None] = mapped_column(Numeric(16, 3))
+    reference: Mapped[str | None] = mapped_column(String(128))
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
 class StockItem(Base):
     __tablename__ = "inventory_stock_items"
+    __table_args__ = (
+        # Ein Bestand je (Lager, Platz, Charge); Ziel von INSERT ... ON CONFLICT im StockLedger
+        UniqueConstraint("warehouse_id", "location_id", "lot_id", name="uq_inventory_stock_items_bin_lot"),
+        CheckConstraint("quantity >= 0", name="ck_inventory_stock_items_quantity_non_negative"),
+    )
 
     id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), primary_key=True, default=uuid4)
     warehouse_id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), ForeignKey("inventory_warehouses.id"), nullable=False, index=True)
     location_id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), ForeignKey("inventory_locations.id"), nullable=False, index=True)
     lot_id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), ForeignKey("inventory_lots.id"), nullable=False, index=True)
-    quantity: Mapped[float] = mapped_column(Numeric(16, 3), nullable=False, default=0)
-    reserved_quantity: Mapped[float] = mapped_column(Numeric(16, 3), nullable=False, default=0)
+    quantity: Mapped[Decimal] = mapped_column(Numeric(16, 3), nullable=False, default=0)
+    reserved_quantity: Mapped[Decimal] = mapped_column(Numeric(16, 3), nullable=False, default=0)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
     location: Mapped[Location] = relationship(back_populates="stock_items")
@@ -87,6 +116,9 @@ class StockItem(Base):
 
 class InventoryTransaction(Base):
     __tablename__ = "inventory_transactions"
+    __table_args__ = (
+        Index("ix_inventory_transactions_stock_item_created", "stock_item_id", "created_at"),
+    )
 
     id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), primary_key=True, default=uuid4)
     stock_item_id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), ForeignKey("inventory_stock_items.id"), nullable=False, index=True)
@@ -94,7 +126,7 @@ class InventoryTransaction(Base):
         SQLEnum(InventoryTransactionType, name="inventory_transaction_type"),
         nullable=False,
     )
-    quantity: Mapped[float] = mapped_column(Numeric(16, 3), nullable=False)
+    quantity: Mapped[Decimal] = mapped_column(Numeric(16, 3), nullable=False)
     reference: Mapped[str | None] = mapped_column(String(128))
     from_location_id: Mapped[UUID | None] = mapped_column(PGUUID(as_uuid=True), ForeignKey("inventory_locations.id"))
     to_location_id: Mapped[UUID | None] = mapped_column(PGUUID(as_uuid=True), ForeignKey("inventory_locations.id"))
@@ -103,6 +135,24 @@ class InventoryTransaction(Base):
     stock_item: Mapped[StockItem] = relationship(back_populates="transactions")
 
 
+class MovementBatch(Base):
+    """Gebuchter Mehrzeilen-Beleg; der Idempotenzschlüssel verhindert Doppelbuchungen."""
+
+    __tablename__ = "inventory_movement_batches"
+    __table_args__ = (
+        UniqueConstraint("tenant_id", "idempotency_key", name="uq_inventory_movement_batches_key"),
+    )
+
+    id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), primary_key=True, default=uuid4)
+    tenant_id: Mapped[str] = mapped_column(String(64), nullable=False, default="default")
+    idempotency_key: Mapped[str] = mapped_column(String(128), nullable=False)
+    movement_type: Mapped[str] = mapped_column(String(16), nullable=False)
+    reference: Mapped[str | None] = mapped_column(String(128))
+    line_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    total_quantity: Mapped[Decimal] = mapped_column(Numeric(16, 3), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
 class EpcisEventType(str, PyEnum):  # type: ignore[misc]
     OBJECT = "ObjectEvent"
     AGGREGATION = "AggregationEvent"
@@ -114,11 +164,17 @@ class EpcisEvent(Base):
     """Minimale EPCIS-Event-Persistenz für Lieferkettentracking."""
 
     __tablename__ = "inventory_epcis_events"
+    __table_args__ = (
+        # Keyset-Listing je Tenant und chunkweise Retention entlang der Ereigniszeit
+        Index("ix_inventory_epcis_events_tenant_time", "tenant_id", "event_time", "id"),
+        # Deduplikation je Tenant: gleiche Schlüssel zweier Tenants sind verschiedene Events
+        Index("ux_inventory_epcis_events_tenant_event_key", "tenant_id", "event_key", unique=True),
+    )
 
     id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), primary_key=True, default=uuid4)
     tenant_id: Mapped[str] = mapped_column(String(64), nullable=False, default="default", index=True)
-    # Idempotenz-/Deduplikationsschlüssel (optional, aber falls gesetzt: eindeutig)
-    event_key: Mapped[str | None] = mapped_column(String(128), unique=True, index=True)
+    # Idempotenz-/Deduplikationsschlüssel (optional, aber falls gesetzt: je Tenant eindeutig)
+    event_key: Mapped[str | None] = mapped_column(String(128))
     event_type: Mapped[EpcisEventType] = mapped_column(SQLEnum(EpcisEventType, name="epcis_event_type"), nullable=False)
     event_time: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False, index=True)
     biz_step: Mapped[str | None] = mapped_column(String(128))
@@ -126,7 +182,33 @@ class EpcisEvent(Base):
     lot_id: Mapped[UUID | None] = mapped_column(PGUUID(as_uuid=True), ForeignKey("inventory_lots.id"))
     sku: Mapped[str | None] = mapped_column(String(64))
     quantity: Mapped[float | None] = mapped_column(Numeric(16, 3))
-    extensions: Mapped[dict | None] = mapped_column(JSON)
+    # JSONB auf PostgreSQL, damit die Pseudonymisierung Schlüssel per ``-`` serverseitig entfernt
+    extensions: Mapped[dict | None] = mapped_column(JSON().with_variant(JSONB(), "postgresql"))
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
 
     lot: Mapped[Lot | None] = relationship()
+
+
+class EpcisOutbox(Base):
+    """Noch nicht publizierte ``epcis.event.created``-Nachrichten; geschrieben in der Capture-Transaktion."""
+
+    __tablename__ = "inventory_epcis_outbox"
+
+    id: Mapped[int] = mapped_column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    tenant_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    event_id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_error: Mapped[str | None] = mapped_column(String(256))
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class EpcisRetentionState(Base):
+    """Fortschritt der Pseudonymisierung je Geltungsbereich (Tenant oder ``*`` für alle)."""
+
+    __tablename__ = "inventory_epcis_retention_state"
+
+    scope: Mapped[str] = mapped_column(String(64), primary_key=True)
+    anonymized_until: Mapped[datetime | None] = mapped_column(DateTime)
+    anonymized_until_id: Mapped[UUID | None] = mapped_column(PGUUID(as_uuid=True))
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
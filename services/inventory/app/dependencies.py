@@ -10,6 +10,7 @@ from fastapi import Header
 from app.config import settings
 from app.db.session import get_session_factory
 from app.integration.event_bus import EventBus
+from app.integration.outbox import EpcisOutboxRelay
 from app.integration.subscribers import InventoryEventSubscribers
 
 
@@ -17,11 +18,12 @@ logger = logging.getLogger(__name__)
 
 _event_bus: Optional[EventBus] = None
 _subscribers: Optional[InventoryEventSubscribers] = None
+_outbox_relay: Optional[EpcisOutboxRelay] = None
 
 
 async def init_event_bus() -> None:
     """EventBus-Verbindung bei Service-Start initialisieren."""
-    global _event_bus, _subscribers
+    global _event_bus, _subscribers, _outbox_relay
     if not settings.EVENT_BUS_ENABLED or _event_bus is not None:
         return
 
@@ -36,6 +38,9 @@ async def init_event_bus() -> None:
     subscribers = InventoryEventSubscribers(bus, get_session_factory())
     await subscribers.start()
     _subscribers = subscribers
+    relay = EpcisOutboxRelay(bus, get_session_factory())
+    await relay.start()
+    _outbox_relay = relay
 
 
 def get_event_bus() -> Optional[EventBus]:
@@ -43,9 +48,17 @@ def get_event_bus() -> Optional[EventBus]:
     return _event_bus
 
 
+def get_outbox_relay() -> Optional[EpcisOutboxRelay]:
+    """Outbox-Relay für EPCIS-Events (nur bei aktivem EventBus)."""
+    return _outbox_relay
+
+
 async def shutdown_event_bus() -> None:
     """EventBus-Verbindung sauber abbauen."""
-    global _event_bus, _subscribers
+    global _event_bus, _subscribers, _outbox_relay
+    if _outbox_relay:
+        await _outbox_relay.stop()
+        _outbox_relay = None
     if _subscribers:
         await _subscribers.stop()
         _subscribers = None
@@ -0,0 +1,118 @@
+"""Outbox-Relay: publiziert erfasste EPCIS-Events asynchron auf NATS."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.db.models import EpcisOutbox
+from app.services.epcis_capture import EPCIS_CREATED_EVENT
+from app.utils.circuit_breaker import CircuitBreaker
+
+from .event_bus import EventBus
+from .notifier import notify_ops
+
+logger = logging.getLogger(__name__)
+
+
+class EpcisOutboxRelay:
+    """Liest die Outbox in Erfassungsreihenfolge, publiziert und löscht publizierte Zeilen.
+
+    Schlägt ein Publish fehl, bleibt die Zeile mit erhöhtem ``attempts`` stehen
+    und der Durchlauf endet, damit die Reihenfolge erhalten bleibt. Nach
+    ``EPCIS_OUTBOX_MAX_ATTEMPTS`` Fehlversuchen wird eskaliert und die Zeile
+    nicht mehr angefasst. Mehrere Instanzen teilen sich die Outbox über
+    ``FOR UPDATE SKIP LOCKED``; die Zustellung ist at-least-once.
+    """
+
+    def __init__(
+        self,
+        bus: EventBus,
+        session_factory: async_sessionmaker[AsyncSession],
+        *,
+        batch_size: int | None = None,
+        interval: float | None = None,
+        breaker: CircuitBreaker | None = None,
+    ) -> None:
+        self._bus = bus
+        self._session_factory = session_factory
+        self._batch_size = batch_size or settings.EPCIS_OUTBOX_BATCH
+        self._interval = interval if interval is not None else settings.EPCIS_OUTBOX_INTERVAL_SECONDS
+        self._max_attempts = settings.EPCIS_OUTBOX_MAX_ATTEMPTS
+        self._breaker = breaker or CircuitBreaker(
+            failure_threshold=settings.NATS_FAILURE_THRESHOLD,
+            open_seconds=settings.NATS_CIRCUIT_BREAKER_OPEN_SECONDS,
+        )
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+
+    async def start(self) -> None:
+        """Relay-Schleife im Hintergrund starten."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Schleife beenden; nicht publizierte Zeilen bleiben für den nächsten Start."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def wake(self) -> None:
+        """Nach einem Commit mit neuen Outbox-Zeilen sofort statt nach ``interval`` publizieren."""
+        self._wakeup.set()
+
+    async def relay_once(self) -> int:
+        """Einen Stapel publizieren; liefert die Anzahl publizierter Zeilen."""
+        async with self._session_factory() as session:
+            stmt = (
+                select(EpcisOutbox)
+                .where(EpcisOutbox.attempts < self._max_attempts)
+                .order_by(EpcisOutbox.id)
+                .limit(self._batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            published: list[int] = []
+            for entry in (await session.execute(stmt)).scalars():
+                try:
+                    await self._bus.publish(event_type=EPCIS_CREATED_EVENT, tenant=entry.tenant_id, data=entry.payload)
+                except Exception as exc:  # noqa: BLE001
+                    self._breaker.record_failure()
+                    entry.attempts += 1
+                    entry.last_error = str(exc)[:256]
+                    if entry.attempts >= self._max_attempts:
+                        await notify_ops(
+                            "EPCIS-Event Publish fehlgeschlagen",
+                            {"eventId": str(entry.event_id), "attempts": entry.attempts, "error": entry.last_error},
+                        )
+                    break
+                self._breaker.record_success()
+                published.append(entry.id)
+            if published:
+                await session.execute(delete(EpcisOutbox).where(EpcisOutbox.id.in_(published)))
+            await session.commit()
+        return len(published)
+
+    async def _run(self) -> None:
+        while True:
+            published = 0
+            if not self._breaker.is_open:
+                try:
+                    published = await self.relay_once()
+                except Exception as exc:  # noqa: BLE001
+                    logger.warning("EPCIS-Outbox konnte nicht verarbeitet werden: %s", exc)
+            if published >= self._batch_size:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
@@ -2,15 +2,18 @@
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
 import logging
-from typing import Any
+from typing import Any, Awaitable, Callable
 from uuid import UUID
 
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app.db import models
-from app.schemas import ReceiptCreate
+from app.config import settings
+from app.schemas import BatchMovementCreate, MovementLine
 from app.services import InventoryService
 
 from .event_bus import EventBus
@@ -18,140 +21,179 @@ from .notifier import notify_ops
 
 logger = logging.getLogger(__name__)
 
+PURCHASE_RECEIPT_SUBJECT = "purchase.receipt.posted"
+SALES_SHIPMENT_SUBJECT = "sales.shipment.confirmed"
+
+
+def idempotency_key(subject: str, message: dict[str, Any]) -> str:
+    """Schlüssel aus der Event-ID; ohne ID aus dem Inhalt, damit Redeliveries nicht doppelt buchen."""
+    data = message.get("data") or {}
+    event_id = message.get("eventId") or message.get("event_id") or data.get("eventId")
+    if not event_id or len(str(event_id)) > 64:
+        event_id = hashlib.sha256(json.dumps(event_id or data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    return f"{subject}:{event_id}"
+
 
 class InventoryEventSubscribers:
-    """Registriert NATS-Subscriptions und triggert Inventory-Service-Funktionen."""
+    """Registriert NATS-Subscriptions und bucht eingehende Belege als Batch.
 
-    def __init__(self, bus: EventBus, session_factory: async_sessionmaker[AsyncSession]) -> None:
+    Jeder Beleg wird mit einer Session und einem Commit gebucht. Bis zu
+    ``concurrency`` Belege laufen parallel; ist die Grenze erreicht, wartet
+    der Handler und NATS puffert die weiteren Nachrichten.
+    """
+
+    def __init__(
+        self,
+        bus: EventBus,
+        session_factory: async_sessionmaker[AsyncSession],
+        *,
+        concurrency: int | None = None,
+    ) -> None:
         self._bus = bus
         self._session_factory = session_factory
         self._subscription_ids: list[int] = []
+        self._slots = asyncio.Semaphore(concurrency or settings.SUBSCRIBER_CONCURRENCY)
+        self._tasks: set[asyncio.Task[None]] = set()
 
     async def start(self) -> None:
         """Subscriptions aktivieren."""
-        purchase_sid = await self._bus.subscribe("purchase.receipt.posted", self._handle_purchase_receipt)
-        shipment_sid = await self._bus.subscribe("sales.shipment.confirmed", self._handle_sales_shipment)
+        purchase_sid = await self._bus.subscribe(PURCHASE_RECEIPT_SUBJECT, self._handle_purchase_receipt)
+        shipment_sid = await self._bus.subscribe(SALES_SHIPMENT_SUBJECT, self._handle_sales_shipment)
         self._subscription_ids.extend([purchase_sid, shipment_sid])
 
     async def stop(self) -> None:
-        """Subscriptions wieder lösen."""
+        """Subscriptions wieder lösen und laufende Buchungen abwarten."""
         for sid in list(self._subscription_ids):
             await self._bus.unsubscribe(sid)
         self._subscription_ids.clear()
+        await self.drain()
+
+    async def drain(self) -> None:
+        """Wartet, bis alle angenommenen Belege verarbeitet sind."""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
 
     async def _handle_purchase_receipt(self, message: dict[str, Any]) -> None:
+        await self._dispatch(PURCHASE_RECEIPT_SUBJECT, message, self._book_purchase_receipt)
+
+    async def _handle_sales_shipment(self, message: dict[str, Any]) -> None:
+        await self._dispatch(SALES_SHIPMENT_SUBJECT, message, self._book_sales_shipment)
+
+    async def _dispatch(
+        self,
+        subject: str,
+        message: dict[str, Any],
+        book: Callable[[dict[str, Any], str], Awaitable[None]],
+    ) -> None:
+        await self._slots.acquire()
+        task = asyncio.create_task(self._run(subject, message, book))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(
+        self,
+        subject: str,
+        message: dict[str, Any],
+        book: Callable[[dict[str, Any], str], Awaitable[None]],
+    ) -> None:
+        try:
+            await book(message, idempotency_key(subject, message))
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Konnte %s nicht verarbeiten: %s", subject, exc)
+            # Fachliche Ablehnungen (z.B. fehlender Bestand) sind keine Betriebsstörung
+            if not isinstance(exc, ValueError):
+                await notify_ops(
+                    "Beleg konnte nicht gebucht werden",
+                    {"subject": subject, "error": str(exc)[:200]},
+                )
+        finally:
+            self._slots.release()
+
+    async def _book_purchase_receipt(self, message: dict[str, Any], key: str) -> None:
         payload = message.get("data") or {}
-        lines = payload.get("lines") or []
         warehouse_id = payload.get("warehouseId")
         location_id = payload.get("locationId") or payload.get("defaultLocationId")
-        reference = payload.get("purchaseOrderId") or payload.get("reference")
 
         if not warehouse_id or not location_id:
             logger.warning("purchase.receipt.posted ohne Warehouse/Location ignoriert: %s", json.dumps(payload))
             return
 
-        async with self._session_factory() as session:
-            service = InventoryService(session)
-            for line in lines:
-                try:
-                    receipt = ReceiptCreate(
-                        warehouse_id=UUID(warehouse_id),
-                        location_id=UUID(location_id),
-                        sku=line["sku"],
-                        lot_number=line.get("lot") or line.get("lotNumber") or line["sku"],
-                        quantity=float(line.get("quantity") or line.get("qty") or 0),
-                        production_date=None,
-                        expiry_date=None,
-                        reference=reference,
-                    )
-                    await service.receive_stock(receipt)
-                    await self._create_epcis_object_event(
-                        session=session,
-                        biz_step="receiving",
-                        read_point=payload.get("dock") or payload.get("readPoint") or "RECEIVING",
-                        sku=receipt.sku,
-                        quantity=receipt.quantity,
-                        lot_number=receipt.lot_number,
-                    )
-                except Exception as exc:  # noqa: BLE001
-                    logger.warning("Konnte purchase.receipt.posted nicht verarbeiten: %s", exc)
+        lines = self._parse_lines(
+            PURCHASE_RECEIPT_SUBJECT,
+            payload,
+            lambda line: MovementLine(
+                sku=line["sku"],
+                lot_number=line.get("lot") or line.get("lotNumber") or line["sku"],
+                quantity=float(line.get("quantity") or line.get("qty") or 0),
+            ),
+        )
+        if not lines:
+            return
+        await self._book(
+            BatchMovementCreate(
+                movement_type="receipt",
+                warehouse_id=UUID(warehouse_id),
+                location_id=UUID(location_id),
+                reference=payload.get("purchaseOrderId") or payload.get("reference"),
+                idempotency_key=key,
+                read_point=payload.get("dock") or payload.get("readPoint") or "RECEIVING",
+                lines=lines,
+            )
+        )
 
-    async def _handle_sales_shipment(self, message: dict[str, Any]) -> None:
+    async def _book_sales_shipment(self, message: dict[str, Any], key: str) -> None:
         payload = message.get("data") or {}
         warehouse_id = payload.get("warehouseId")
         location_id = payload.get("locationId")
-        shipments = payload.get("lines") or payload.get("items") or []
 
         if not warehouse_id:
             logger.warning("sales.shipment.confirmed ohne WarehouseId ignoriert: %s", json.dumps(payload))
             return
 
-        async with self._session_factory() as session:
-            service = InventoryService(session)
-            for line in shipments:
-                try:
-                    await service.issue_stock(
-                        warehouse_id=UUID(warehouse_id),
-                        location_id=UUID(location_id) if location_id else None,
-                        sku=line.get("sku") or line.get("articleNumber"),
-                        lot_id=UUID(line["lotId"]) if line.get("lotId") else None,
-                        lot_number=line.get("lotNumber"),
-                        quantity=float(line.get("quantity") or line.get("qty") or 0),
-                        reference=line.get("reference") or payload.get("shipmentId"),
-                    )
-                    await self._create_epcis_object_event(
-                        session=session,
-                        biz_step="shipping",
-                        read_point=payload.get("dock") or payload.get("readPoint") or "SHIPPING",
-                        sku=line.get("sku") or line.get("articleNumber"),
-                        quantity=float(line.get("quantity") or line.get("qty") or 0),
-                        lot_number=line.get("lotNumber"),
-                    )
-                except Exception as exc:  # noqa: BLE001
-                    logger.warning("Konnte sales.shipment.confirmed nicht verarbeiten: %s", exc)
-
-    async def _create_epcis_object_event(
-        self,
-        *,
-        session: AsyncSession,
-        biz_step: str,
-        read_point: str | None,
-        sku: str | None,
-        quantity: float | None,
-        lot_number: str | None,
-    ) -> None:
-        lot: models.Lot | None = None
-        if lot_number:
-            lot = (
-                await session.execute(
-                    models.select(models.Lot).where(models.Lot.lot_number == lot_number)  # type: ignore[attr-defined]
-                )
-            )  # pragma: no cover
-        # Bestimme lot_id falls verfügbar
-        lot_id = None
-        if lot and hasattr(lot, "scalar_one_or_none"):
-            lot_row = lot.scalar_one_or_none()
-            lot_id = getattr(lot_row, "id", None)
-        event = models.EpcisEvent(  # type: ignore[attr-defined]
-            event_type=models.EpcisEventType.OBJECT,  # type: ignore[attr-defined]
-            biz_step=biz_step,
-            read_point=read_point,
-            lot_id=lot_id,
-            sku=sku,
-            quantity=quantity,
-            extensions=None,
+        lines = self._parse_lines(
+            SALES_SHIPMENT_SUBJECT,
+            payload,
+            lambda line: MovementLine(
+                sku=line.get("sku") or line.get("articleNumber"),
+                lot_id=UUID(line["lotId"]) if line.get("lotId") else None,
+                lot_number=line.get("lotNumber"),
+                quantity=float(line.get("quantity") or line.get("qty") or 0),
+                reference=line.get("reference"),
+            ),
+        )
+        if not lines:
+            return
+        await self._book(
+            BatchMovementCreate(
+                movement_type="issue",
+                warehouse_id=UUID(warehouse_id),
+                location_id=UUID(location_id) if location_id else None,
+                reference=payload.get("shipmentId"),
+                idempotency_key=key,
+                read_point=payload.get("dock") or payload.get("readPoint") or "SHIPPING",
+                lines=lines,
+            )
         )
-        # Auto-Remediation: bis zu 3 Versuche mit Eskalation
-        for attempt in range(1, 4):
+
+    @staticmethod
+    def _parse_lines(
+        subject: str, payload: dict[str, Any], parse: Callable[[dict[str, Any]], MovementLine]
+    ) -> list[MovementLine]:
+        lines: list[MovementLine] = []
+        for line in payload.get("lines") or payload.get("items") or []:
+            try:
+                lines.append(parse(line))
+            except (KeyError, TypeError, ValueError, ValidationError) as exc:
+                logger.warning("Ungültige Zeile in %s übersprungen: %s", subject, exc)
+        return lines
+
+    async def _book(self, batch: BatchMovementCreate) -> None:
+        async with self._session_factory() as session:
             try:
-                session.add(event)
-                await session.flush()
-                break
-            except Exception as exc:  # noqa: BLE001
-                if attempt == 3:
-                    await notify_ops(
-                        "EPCIS-Event Persistenz fehlgeschlagen",
-                        {"bizStep": biz_step, "readPoint": read_point or "", "error": str(exc)[:200]},
-                    )
-                else:
-                    continue
+                result = await InventoryService(session, event_bus=self._bus).book_batch(batch)
+            except Exception:
+                await session.rollback()
+                raise
+            await session.commit()
+        if result.duplicate:
+            logger.info("Beleg %s bereits gebucht, übersprungen", batch.idempotency_key)
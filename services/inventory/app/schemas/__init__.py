@@ -3,16 +3,24 @@
 from .warehouse import WarehouseCreate, WarehouseRead, WarehouseUpdate
 from .location import LocationCreate, LocationRead
 from .inventory import (
+    BatchMovementCreate,
+    BatchMovementRead,
+    LotLinkRead,
     LotListItem,
     LotListResponse,
     LotTraceResponse,
+    MovementLine,
     ReceiptCreate,
     StockItemRead,
+    TracedLot,
     TransactionRecord,
     TransferCreate,
+    TransformationCreate,
+    TransformationInput,
+    TransformationRead,
 )
 from .articles import ArticleSummary, StockMovementCreate, StockMovementRecord
-from .epcis import EpcisEventCreate, EpcisEventRead, EpcisEventsResponse
+from .epcis import EpcisCaptureDocument, EpcisCaptureResult, EpcisEventCreate, EpcisEventRead, EpcisEventsResponse
 
 __all__ = [
     "WarehouseCreate",
@@ -25,12 +33,22 @@ __all__ = [
     "StockItemRead",
     "TransactionRecord",
     "LotTraceResponse",
+    "LotLinkRead",
+    "TracedLot",
+    "TransformationInput",
+    "TransformationCreate",
+    "TransformationRead",
     "LotListItem",
     "LotListResponse",
+    "MovementLine",
+    "BatchMovementCreate",
+    "BatchMovementRead",
     "ArticleSummary",
     "StockMovementCreate",
     "StockMovementRecord",
     "EpcisEventCreate",
     "EpcisEventRead",
     "EpcisEventsResponse",
+    "EpcisCaptureDocument",
+    "EpcisCaptureResult",
 ]
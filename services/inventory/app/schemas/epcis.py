@@ -41,4 +41,17 @@ class EpcisEventRead(BaseModel):
 class EpcisEventsResponse(BaseModel):
     items: list[EpcisEventRead]
     total: int
+    next_cursor: str | None = None
+
+
+class EpcisCaptureDocument(BaseModel):
+    """Erfassungsdokument mit vielen Events; wird in einer Transaktion gespeichert."""
+
+    events: list[EpcisEventCreate] = Field(min_length=1)
+
+
+class EpcisCaptureResult(BaseModel):
+    captured: int
+    duplicates: int
+    outbox_pending: int
 
@@ -53,16 +53,63 @@ class TransactionRecord(BaseModel):
     created_at: datetime
     from_location_id: UUID | None
     to_location_id: UUID | None
+    lot_id: UUID | None = None
 
     class Config:
         from_attributes = True
 
 
+class LotLinkRead(BaseModel):
+    parent_lot_id: UUID
+    child_lot_id: UUID
+    link_type: str
+    quantity: float | None
+    reference: str | None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class TracedLot(BaseModel):
+    lot_id: UUID
+    sku: str
+    lot_number: str
+    direction: Literal["backward", "forward"]
+    depth: int
+    quantity_on_hand: float
+    transaction_count: int
+
+
 class LotTraceResponse(BaseModel):
     lot_id: UUID
     sku: str
     lot_number: str
     transactions: list[TransactionRecord]
+    # Vorfahren (backward) und Nachfahren (forward) über alle Ebenen
+    genealogy: list[TracedLot] = Field(default_factory=list)
+    links: list[LotLinkRead] = Field(default_factory=list)
+    # Abgänge der Charge und ihrer Nachfahren (Versand, Verbrauch), neueste zuerst
+    outbound: list[TransactionRecord] = Field(default_factory=list)
+
+
+class TransformationInput(BaseModel):
+    stock_item_id: UUID
+    quantity: float = Field(gt=0)
+
+
+class TransformationCreate(BaseModel):
+    """Verarbeitung: Eingangschargen werden verbraucht, die Ausgangscharge wird zugebucht und verknüpft."""
+
+    inputs: list[TransformationInput] = Field(min_length=1)
+    output: ReceiptCreate
+    link_type: Literal["transformation", "split", "merge"] = "transformation"
+    reference: str | None = Field(default=None, max_length=128)
+
+
+class TransformationRead(BaseModel):
+    output: StockItemRead
+    links: list[LotLinkRead]
 
 
 class LotListItem(BaseModel):
@@ -81,4 +128,39 @@ class LotListItem(BaseModel):
 
 class LotListResponse(BaseModel):
     items: list[LotListItem]
-    total: int
+    # Nur auf der ersten Seite gezählt
+    total: int | None
+    next_cursor: str | None = None
+
+
+class MovementLine(BaseModel):
+    sku: str = Field(max_length=64)
+    lot_number: str | None = Field(default=None, max_length=64)
+    lot_id: UUID | None = None
+    location_id: UUID | None = None
+    quantity: float = Field(gt=0)
+    production_date: datetime | None = None
+    expiry_date: datetime | None = None
+    reference: str | None = Field(default=None, max_length=128)
+
+
+class BatchMovementCreate(BaseModel):
+    """Mehrzeiliger Wareneingang (``receipt``) oder Warenausgang (``issue``) eines Belegs."""
+
+    movement_type: Literal["receipt", "issue"]
+    warehouse_id: UUID
+    location_id: UUID | None = None
+    reference: str | None = Field(default=None, max_length=128)
+    idempotency_key: str = Field(min_length=1, max_length=128)
+    read_point: str | None = Field(default=None, max_length=128)
+    lines: list[MovementLine] = Field(min_length=1)
+
+
+class BatchMovementRead(BaseModel):
+    id: UUID
+    movement_type: str
+    idempotency_key: str
+    reference: str | None
+    line_count: int
+    total_quantity: float
+    duplicate: bool = False
@@ -1,5 +1,6 @@
 """Service-Layer."""
 
 from .inventory_service import InventoryService
+from .stock_ledger import InsufficientStockError, StockLedger
 
-__all__ = ["InventoryService"]
+__all__ = ["InsufficientStockError", "InventoryService", "StockLedger"]
@@ -0,0 +1,132 @@
+"""EPCIS-Erfassung: Bulk-Insert mit Deduplikation und Outbox für die Publikation.
+
+Ein Erfassungsdokument wird in einem ``INSERT ... ON CONFLICT (tenant_id,
+event_key) DO NOTHING RETURNING id`` (executemany, seitenweise gebündelt) gespeichert; die
+zurückgelieferten IDs sind genau die neu erfassten Events. Für diese entstehen
+in derselben Transaktion Outbox-Zeilen, die ``EpcisOutboxRelay`` nach dem
+Commit publiziert – der Request wartet nicht auf NATS.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Sequence
+from uuid import uuid4
+
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.db import models
+from app.schemas import EpcisEventCreate
+
+EPCIS_CREATED_EVENT = "epcis.event.created"
+
+_events = models.EpcisEvent.__table__
+_outbox = models.EpcisOutbox.__table__
+
+
+def event_key(payload: EpcisEventCreate) -> str:
+    """Idempotenzschlüssel: explizit übergeben oder stabiler Hash der Eventdaten."""
+    provided = (payload.idempotency_key or "").strip()
+    if provided:
+        return provided
+    base = (
+        f"{payload.event_type}|{payload.event_time or ''}|{payload.biz_step or ''}|{payload.read_point or ''}"
+        f"|{payload.lot_id or ''}|{payload.sku or ''}|{payload.quantity or ''}"
+    )
+    return hashlib.sha256(base.encode("utf-8")).hexdigest()[:32]
+
+
+def publish_payload(row: dict[str, Any]) -> dict[str, Any]:
+    """Nutzdaten von ``epcis.event.created`` für eine Event-Zeile."""
+    return {
+        "id": str(row["id"]),
+        "type": row["event_type"].value,
+        "time": (row["event_time"] or row["created_at"]).isoformat(),
+        "bizStep": row["biz_step"],
+        "readPoint": row["read_point"],
+        "lotId": str(row["lot_id"]) if row["lot_id"] else None,
+        "sku": row["sku"],
+        "quantity": float(row["quantity"]) if row["quantity"] is not None else None,
+        "extensions": row["extensions"] or {},
+        "tenantId": row["tenant_id"],
+    }
+
+
+class EpcisCapture:
+    """Speichert Events eines Tenants innerhalb der Transaktion von ``session``."""
+
+    def __init__(self, session: AsyncSession, tenant_id: str, *, outbox: bool = True) -> None:
+        self._session = session
+        self._tenant_id = tenant_id
+        self._outbox = outbox
+
+    async def capture(self, events: Sequence[EpcisEventCreate]) -> tuple[list[dict[str, Any]], int]:
+        """Neu erfasste Event-Zeilen (in Dokumentreihenfolge) und Anzahl der Duplikate."""
+        now = datetime.utcnow()
+        anonymize_before = now - timedelta(days=settings.EPCIS_ANONYMIZE_AFTER_DAYS)
+        sensitive = set(settings.EPCIS_ANONYMIZE_KEYS or [])
+
+        rows: dict[str, dict[str, Any]] = {}
+        for payload in events:
+            key = event_key(payload)
+            if key in rows:
+                continue
+            event_time = payload.event_time or now
+            if event_time.tzinfo is not None:
+                event_time = event_time.astimezone(timezone.utc).replace(tzinfo=None)
+            extensions = payload.extensions
+            # Nachträglich erfasste Alt-Events liegen hinter dem Fortschritt der Pseudonymisierung
+            if extensions and sensitive and event_time < anonymize_before:
+                extensions = {name: value for name, value in extensions.items() if name not in sensitive}
+            rows[key] = {
+                "id": uuid4(),
+                "tenant_id": self._tenant_id,
+                "event_key": key,
+                "event_type": models.EpcisEventType(payload.event_type),
+                "event_time": event_time,
+                "biz_step": payload.biz_step,
+                "read_point": payload.read_point,
+                "lot_id": payload.lot_id,
+                "sku": payload.sku,
+                "quantity": payload.quantity,
+                "extensions": extensions,
+                "created_at": now,
+            }
+        if not rows:
+            return [], len(events)
+
+        dialect = self._session.get_bind().dialect.name
+        insert_ = pg_insert if dialect == "postgresql" else sqlite_insert
+        stmt = insert_(_events).on_conflict_do_nothing(index_elements=["tenant_id", "event_key"]).returning(_events.c.id)
+        inserted = set((await self._session.execute(stmt, list(rows.values()))).scalars())
+        captured = [row for row in rows.values() if row["id"] in inserted]
+
+        if captured and self._outbox:
+            await self._session.execute(
+                insert(_outbox),
+                [
+                    {
+                        "tenant_id": self._tenant_id,
+                        "event_id": row["id"],
+                        "payload": publish_payload(row),
+                        "attempts": 0,
+                        "created_at": now,
+                    }
+                    for row in captured
+                ],
+            )
+        return captured, len(events) - len(captured)
+
+    async def find(self, key: str) -> models.EpcisEvent | None:
+        """Bereits erfasstes Event des Tenants zu ``key``."""
+        return await self._session.scalar(
+            select(models.EpcisEvent).where(
+                models.EpcisEvent.tenant_id == self._tenant_id,
+                models.EpcisEvent.event_key == key,
+            )
+        )
@@ -0,0 +1,171 @@
+"""DSGVO-Retention für EPCIS-Events: chunkweises Löschen und Pseudonymisieren in der Datenbank.
+
+Beide Schritte laufen als mengenbasierte Statements über höchstens
+``EPCIS_RETENTION_CHUNK`` Zeilen mit einem Commit je Chunk, damit Sperren und
+WAL-Volumen klein bleiben und ein Abbruch keinen Fortschritt verliert:
+
+* Löschen: ``DELETE ... WHERE id IN (SELECT id ... ORDER BY event_time LIMIT n)``
+  über den Index ``(tenant_id, event_time, id)`` bzw. ``event_time``.
+* Pseudonymisieren: ``UPDATE ... SET extensions = extensions - keys`` (JSONB)
+  bzw. ``json_remove`` (SQLite) für Events älter als
+  ``EPCIS_ANONYMIZE_AFTER_DAYS``. Der Fortschritt ``(event_time, id)`` steht je
+  Geltungsbereich in ``inventory_epcis_retention_state``; spätere Läufe
+  bearbeiten nur den seither hinzugekommenen Zeitraum.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import Text, bindparam, delete, func, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.db.models import EpcisEvent, EpcisRetentionState
+
+logger = logging.getLogger(__name__)
+
+# Fortschritt eines Laufs über alle Tenants
+ALL_TENANTS = "*"
+
+
+class EpcisRetention:
+    """Setzt Aufbewahrungsfrist und Pseudonymisierung für einen Tenant oder alle Tenants durch."""
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession], *, chunk: int | None = None) -> None:
+        self._session_factory = session_factory
+        self._chunk = chunk or settings.EPCIS_RETENTION_CHUNK
+
+    async def run(self, tenant_id: str | None = None, *, now: datetime | None = None) -> dict[str, int]:
+        now = now or datetime.utcnow()
+        deleted = await self._delete_expired(tenant_id, now - timedelta(days=settings.EPCIS_RETENTION_DAYS))
+        anonymized = await self._pseudonymize(tenant_id, now - timedelta(days=settings.EPCIS_ANONYMIZE_AFTER_DAYS))
+        return {"deleted": deleted, "anonymized": anonymized}
+
+    async def _delete_expired(self, tenant_id: str | None, cutoff: datetime) -> int:
+        victims = (
+            select(EpcisEvent.id)
+            .where(*_scope(tenant_id), EpcisEvent.event_time < cutoff)
+            .order_by(EpcisEvent.event_time)
+            .limit(self._chunk)
+        )
+        stmt = delete(EpcisEvent).where(EpcisEvent.id.in_(victims)).execution_options(synchronize_session=False)
+        deleted = 0
+        async with self._session_factory() as session:
+            while True:
+                result = await session.execute(stmt)
+                await session.commit()
+                deleted += result.rowcount or 0
+                if (result.rowcount or 0) < self._chunk:
+                    return deleted
+
+    async def _pseudonymize(self, tenant_id: str | None, cutoff: datetime) -> int:
+        keys = sorted(set(settings.EPCIS_ANONYMIZE_KEYS or []))
+        if not keys:
+            return 0
+        scope = tenant_id or ALL_TENANTS
+        position = tuple_(EpcisEvent.event_time, EpcisEvent.id)
+        anonymized = 0
+        async with self._session_factory() as session:
+            stripped, contains_any = _strip_expressions(session.get_bind().dialect.name, keys)
+            state = await session.get(EpcisRetentionState, scope)
+            lower = (state.anonymized_until, state.anonymized_until_id) if state and state.anonymized_until else None
+            while True:
+                window = [*_scope(tenant_id), EpcisEvent.event_time < cutoff]
+                if lower:
+                    window.append(position > tuple_(*lower))
+                # Obere Grenze des Chunks; fehlt sie, ist dies der letzte (Teil-)Chunk bis ``cutoff``
+                upper = (await session.execute(
+                    select(EpcisEvent.event_time, EpcisEvent.id)
+                    .where(*window)
+                    .order_by(EpcisEvent.event_time, EpcisEvent.id)
+                    .offset(self._chunk - 1)
+                    .limit(1)
+                )).first()
+                if upper is None:
+                    upper = (await session.execute(
+                        select(EpcisEvent.event_time, EpcisEvent.id)
+                        .where(*window)
+                        .order_by(EpcisEvent.event_time.desc(), EpcisEvent.id.desc())
+                        .limit(1)
+                    )).first()
+                    if upper is None:
+                        return anonymized
+                    last_chunk = True
+                else:
+                    last_chunk = False
+
+                result = await session.execute(
+                    update(EpcisEvent)
+                    .where(*window, position <= tuple_(*upper), contains_any)
+                    .values(extensions=stripped)
+                    .execution_options(synchronize_session=False)
+                )
+                anonymized += result.rowcount or 0
+                lower = (upper[0], upper[1])
+                await _save_progress(session, scope, lower)
+                await session.commit()
+                if last_chunk:
+                    return anonymized
+
+
+class EpcisRetentionJob:
+    """Führt ``EpcisRetention`` periodisch über alle Tenants aus."""
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession], *, interval: float | None = None) -> None:
+        self._retention = EpcisRetention(session_factory)
+        self._interval = interval if interval is not None else settings.EPCIS_RETENTION_INTERVAL_SECONDS
+        self._task: asyncio.Task[None] | None = None
+
+    async def start(self) -> None:
+        if self._interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                result = await self._retention.run()
+                logger.info("EPCIS-Retention: %s", result)
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("EPCIS-Retention fehlgeschlagen: %s", exc)
+            await asyncio.sleep(self._interval)
+
+
+def _scope(tenant_id: str | None) -> list[Any]:
+    return [EpcisEvent.tenant_id == tenant_id] if tenant_id else []
+
+
+def _strip_expressions(dialect: str, keys: list[str]) -> tuple[Any, Any]:
+    """(extensions ohne ``keys``, Bedingung "enthält mindestens einen Key") für den Dialekt."""
+    column = EpcisEvent.__table__.c.extensions
+    if dialect == "postgresql":
+        names = bindparam("anonymize_keys", keys, type_=ARRAY(Text))
+        return column.op("-", return_type=JSONB)(names), column.op("?|", is_comparison=True)(names)
+    paths = [f'$."{key}"' for key in keys]
+    return (
+        func.json_remove(column, *paths),
+        or_(*(func.json_type(column, path).is_not(None) for path in paths)),
+    )
+
+
+async def _save_progress(session: AsyncSession, scope: str, position: tuple[datetime, Any]) -> None:
+    state = await session.get(EpcisRetentionState, scope)
+    if state is None:
+        state = EpcisRetentionState(scope=scope)
+        session.add(state)
+    state.anonymized_until, state.anonymized_until_id = position
+    state.updated_at = datetime.utcnow()
@@ -2,11 +2,17 @@
 
 from __future__ import annotations
 
+import base64
+import json
+from collections import defaultdict
 from datetime import datetime
-from typing import Iterable, Optional
+from decimal import Decimal
+from typing import Any, Iterable, Literal, Optional
 from uuid import UUID, uuid4
 
-from sqlalchemy import func, or_, select
+from sqlalchemy import and_, func, insert, literal_column, or_, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -14,10 +20,15 @@ from app.config import settings
 from app.db import models
 from app.integration.event_bus import EventBus
 from app.integration.workflow_client import emit_workflow_event
+from app.services.lot_genealogy import GENEALOGY_MAX_DEPTH, TRACE_CHUNK, LotGenealogy
+from app.services.stock_ledger import BATCH_CHUNK, StockLedger, to_quantity
 from app.schemas import (
     ArticleSummary,
+    BatchMovementCreate,
+    BatchMovementRead,
     LocationCreate,
     LocationRead,
+    LotLinkRead,
     LotListItem,
     LotListResponse,
     LotTraceResponse,
@@ -25,8 +36,11 @@ from app.schemas import (
     StockItemRead,
     StockMovementCreate,
     StockMovementRecord,
+    TracedLot,
     TransactionRecord,
     TransferCreate,
+    TransformationCreate,
+    TransformationRead,
     WarehouseCreate,
     WarehouseRead,
     WarehouseUpdate,
@@ -36,11 +50,31 @@ from app.schemas import (
 EVENT_VERSION_DEFAULT = 1
 
 
+def _lot_search_text():
+    # Identisch zum Trigramm-Index der Revision 20261019_03; Trenner als SQL-Literal,
+    # damit asyncpg keinen Parameter in den Index-Ausdruck setzt
+    return func.lower(models.Lot.lot_number.op("||")(literal_column("' '")).op("||")(models.Lot.sku))
+
+
+def _encode_lot_cursor(lot_number: str, stock_item_id: UUID) -> str:
+    raw = json.dumps([lot_number, str(stock_item_id)], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_lot_cursor(cursor: str) -> tuple[str, UUID]:
+    try:
+        lot_number, stock_item_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return str(lot_number), UUID(stock_item_id)
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
 class InventoryService:
     def __init__(self, session: AsyncSession, *, event_bus: EventBus | None = None, tenant_id: Optional[str] = None) -> None:
         self._session = session
         self._event_bus = event_bus
         self._tenant_id = tenant_id or settings.DEFAULT_TENANT
+        self._ledger = StockLedger(session)
 
     async def create_warehouse(self, payload: WarehouseCreate) -> WarehouseRead:
         warehouse = models.Warehouse(
@@ -118,19 +152,19 @@ class InventoryService:
         return LocationRead.model_validate(location, from_attributes=True)
 
     async def receive_stock(self, payload: ReceiptCreate) -> StockItemRead:
+        quantity = to_quantity(payload.quantity)
         lot = await self._get_or_create_lot(payload)
-        stock_item = await self._get_or_create_stock_item(payload.warehouse_id, payload.location_id, lot.id)
-        stock_item.quantity = float(stock_item.quantity) + payload.quantity
-
-        transaction = models.InventoryTransaction(
-            stock_item_id=stock_item.id,
-            transaction_type=models.InventoryTransactionType.RECEIPT,
-            quantity=payload.quantity,
+        stock_item_id = await self._ledger.ensure_stock_item(payload.warehouse_id, payload.location_id, lot.id)
+        await self._ledger.increase(stock_item_id, quantity)
+        self._ledger.record(
+            stock_item_id,
+            models.InventoryTransactionType.RECEIPT,
+            quantity,
             reference=payload.reference,
             to_location_id=payload.location_id,
         )
-        self._session.add(transaction)
         await self._session.flush()
+        stock_item = await self._load_stock_item(stock_item_id)
         await self._publish_event(
             event_type="inventory.goods.received",
             aggregate_id=str(stock_item.id),
@@ -167,28 +201,24 @@ class InventoryService:
             stock_item = (await self._session.execute(query)).scalar_one_or_none()
         if not stock_item:
             raise ValueError("Source stock item not found")
-        if float(stock_item.quantity) < payload.quantity:
-            raise ValueError("Insufficient quantity")
 
-        stock_item.quantity = float(stock_item.quantity) - payload.quantity
-
-        destination_stock = await self._get_or_create_stock_item(
+        quantity = to_quantity(payload.quantity)
+        destination_id = await self._ledger.ensure_stock_item(
             payload.destination_warehouse_id,
             payload.destination_location_id,
             stock_item.lot_id,
         )
-        destination_stock.quantity = float(destination_stock.quantity) + payload.quantity
-
-        transaction = models.InventoryTransaction(
-            stock_item_id=stock_item.id,
-            transaction_type=models.InventoryTransactionType.TRANSFER,
-            quantity=payload.quantity,
+        await self._ledger.move(stock_item.id, destination_id, quantity)
+        self._ledger.record(
+            stock_item.id,
+            models.InventoryTransactionType.TRANSFER,
+            quantity,
             reference=payload.reference,
             from_location_id=payload.source_location_id,
             to_location_id=payload.destination_location_id,
         )
-        self._session.add(transaction)
         await self._session.flush()
+        destination_stock = await self._load_stock_item(destination_id)
         await self._publish_event(
             event_type="inventory.stock.transferred",
             aggregate_id=str(stock_item.id),
@@ -207,17 +237,38 @@ class InventoryService:
         )
         return await self._serialize_stock_item(destination_stock)
 
-    async def trace_lot(self, lot_id: UUID) -> LotTraceResponse:
+    async def trace_lot(
+        self,
+        lot_id: UUID,
+        *,
+        direction: Literal["both", "backward", "forward"] = "both",
+        max_depth: int = GENEALOGY_MAX_DEPTH,
+        outbound_limit: int = 100,
+    ) -> LotTraceResponse:
+        """Direkte Bewegungen der Charge plus Genealogie über alle Ebenen und Abgänge der Nachfahren."""
         lot = await self._session.get(models.Lot, lot_id)
         if not lot:
             raise ValueError("Lot not found")
         query = (
-            select(models.InventoryTransaction)
+            select(models.InventoryTransaction, models.StockItem.lot_id)
             .join(models.StockItem)
             .where(models.StockItem.lot_id == lot_id)
             .order_by(models.InventoryTransaction.created_at)
         )
-        transactions = (await self._session.execute(query)).scalars().all()
+        transactions = [self._transaction_record(txn, txn_lot_id) for txn, txn_lot_id in await self._session.execute(query)]
+
+        genealogy = LotGenealogy(self._session)
+        reached: dict[UUID, tuple[str, int]] = {}
+        for step in ("backward", "forward"):
+            if direction in (step, "both"):
+                for reached_id, depth in (await genealogy.trace(lot_id, step, max_depth)).items():
+                    reached.setdefault(reached_id, (step, depth))
+
+        traced = await self._traced_lots(reached)
+        forward = [lot_id] + [reached_id for reached_id, (step, _) in reached.items() if step == "forward"]
+        links = await genealogy.links_among([lot_id, *reached])
+        outbound = await self._outbound_transactions(forward, outbound_limit)
+
         await self._publish_event(
             event_type="inventory.lot.trace.requested",
             aggregate_id=str(lot.id),
@@ -227,16 +278,107 @@ class InventoryService:
                 "sku": lot.sku,
                 "lotNumber": lot.lot_number,
                 "transactionCount": len(transactions),
+                "tracedLotCount": len(traced),
             },
         )
         return LotTraceResponse(
             lot_id=lot.id,
             sku=lot.sku,
             lot_number=lot.lot_number,
-            transactions=[TransactionRecord.model_validate(txn, from_attributes=True) for txn in transactions],
+            transactions=transactions,
+            genealogy=traced,
+            links=[LotLinkRead.model_validate(link) for link in links],
+            outbound=outbound,
+        )
+
+    async def record_transformation(self, payload: TransformationCreate) -> TransformationRead:
+        """Verbraucht die Eingangsbestände, bucht die Ausgangscharge zu und verknüpft die Chargen."""
+        quantities: dict[UUID, Decimal] = defaultdict(Decimal)
+        for item in payload.inputs:
+            quantities[item.stock_item_id] += to_quantity(item.quantity)
+        stmt = select(models.StockItem.id, models.StockItem.lot_id, models.StockItem.location_id).where(
+            models.StockItem.id.in_(list(quantities))
+        )
+        inputs = {row.id: row for row in await self._session.execute(stmt)}
+        missing = set(quantities) - set(inputs)
+        if missing:
+            raise ValueError(f"Stock item not found: {sorted(missing)[0]}")
+
+        reference = payload.reference or payload.output.reference or "inventory.transformation"
+        await self._ledger.decrease_many(quantities)
+        now = datetime.utcnow()
+        await self._ledger.record_many([
+            {
+                "stock_item_id": stock_item_id,
+                "transaction_type": models.InventoryTransactionType.ADJUSTMENT,
+                "quantity": quantity,
+                "reference": reference,
+                "from_location_id": inputs[stock_item_id].location_id,
+                "to_location_id": None,
+                "created_at": now,
+            }
+            for stock_item_id, quantity in quantities.items()
+        ])
+
+        output = payload.output
+        output_quantity = to_quantity(output.quantity)
+        lot = await self._get_or_create_lot(output)
+        stock_item_id = await self._ledger.ensure_stock_item(output.warehouse_id, output.location_id, lot.id)
+        await self._ledger.increase(stock_item_id, output_quantity)
+        self._ledger.record(
+            stock_item_id,
+            models.InventoryTransactionType.RECEIPT,
+            output_quantity,
+            reference=reference,
+            to_location_id=output.location_id,
         )
 
-    async def list_lots(self, search: str | None = None) -> LotListResponse:
+        consumed: dict[UUID, Decimal] = defaultdict(Decimal)
+        for input_id, quantity in quantities.items():
+            consumed[inputs[input_id].lot_id] += quantity
+        links = await LotGenealogy(self._session).link_many(
+            consumed.items(), lot.id, link_type=payload.link_type, reference=reference
+        )
+        self._session.add(models.EpcisEvent(
+            tenant_id=self._tenant_id,
+            event_type=models.EpcisEventType.TRANSFORMATION,
+            event_time=now,
+            biz_step="commissioning",
+            lot_id=lot.id,
+            sku=lot.sku,
+            quantity=output_quantity,
+            extensions={
+                "inputLots": [{"lotId": str(parent), "quantity": float(quantity)} for parent, quantity in consumed.items()],
+            },
+        ))
+        await self._session.flush()
+        stock_item = await self._load_stock_item(stock_item_id)
+        await self._publish_event(
+            event_type="inventory.lot.transformed",
+            aggregate_id=str(lot.id),
+            aggregate_type="inventory.lot",
+            data={
+                "lotId": str(lot.id),
+                "sku": lot.sku,
+                "lotNumber": lot.lot_number,
+                "quantity": float(output_quantity),
+                "inputLots": [{"lotId": str(parent), "quantity": float(quantity)} for parent, quantity in consumed.items()],
+                "reference": reference,
+            },
+        )
+        return TransformationRead(
+            output=await self._serialize_stock_item(stock_item),
+            links=[LotLinkRead.model_validate(link) for link in links],
+        )
+
+    async def list_lots(
+        self, search: str | None = None, *, limit: int = 50, cursor: str | None = None
+    ) -> LotListResponse:
+        """Bestände je Charge, sortiert nach Chargennummer, seitenweise per Cursor.
+
+        Die Suche trifft Chargennummer/SKU über den Trigramm-Index auf
+        ``lower(lot_number || ' ' || sku)`` sowie Lagerplatz- und Lager-Codes.
+        """
         stmt = (
             select(models.StockItem, models.Lot, models.Location, models.Warehouse)
             .join(models.Lot, models.StockItem.lot)
@@ -245,21 +387,40 @@ class InventoryService:
         )
 
         if search:
-            like_pattern = f"%{search.lower()}%"
+            escaped = search.lower().replace("/", "//").replace("%", "/%").replace("_", "/_")
+            like_pattern = f"%{escaped}%"
             stmt = stmt.where(
                 or_(
-                    func.lower(models.Lot.lot_number).like(like_pattern),
-                    func.lower(models.Lot.sku).like(like_pattern),
-                    func.lower(models.Location.code).like(like_pattern),
-                    func.lower(models.Warehouse.code).like(like_pattern),
+                    _lot_search_text().like(like_pattern, escape="/"),
+                    models.StockItem.location_id.in_(
+                        select(models.Location.id).where(func.lower(models.Location.code).like(like_pattern, escape="/"))
+                    ),
+                    models.StockItem.warehouse_id.in_(
+                        select(models.Warehouse.id).where(func.lower(models.Warehouse.code).like(like_pattern, escape="/"))
+                    ),
                 )
             )
 
-        result = await self._session.execute(stmt)
-        rows = result.all()
+        total = None
+        if cursor is None:
+            total = await self._session.scalar(select(func.count()).select_from(stmt.subquery()))
+        else:
+            after_number, after_id = _decode_lot_cursor(cursor)
+            # Die zusätzliche Bereichsbedingung lässt den Planer den Index (lot_number, id)
+            # ab dem Cursor lesen, statt die OR-Bedingung über alle Chargen zu sortieren
+            stmt = stmt.where(
+                models.Lot.lot_number >= after_number,
+                or_(
+                    models.Lot.lot_number > after_number,
+                    and_(models.Lot.lot_number == after_number, models.StockItem.id > after_id),
+                ),
+            )
+
+        stmt = stmt.order_by(models.Lot.lot_number, models.StockItem.id).limit(limit + 1)
+        rows = (await self._session.execute(stmt)).all()
 
         items: list[LotListItem] = []
-        for stock_item, lot, location, warehouse in rows:
+        for stock_item, lot, location, warehouse in rows[:limit]:
             items.append(
                 LotListItem(
                     id=stock_item.id,
@@ -274,7 +435,11 @@ class InventoryService:
                 )
             )
 
-        return LotListResponse(items=items, total=len(items))
+        next_cursor = None
+        if len(rows) > limit:
+            last_stock, last_lot = rows[limit - 1][0], rows[limit - 1][1]
+            next_cursor = _encode_lot_cursor(last_lot.lot_number, last_stock.id)
+        return LotListResponse(items=items, total=total, next_cursor=next_cursor)
 
     async def list_articles(self) -> list[ArticleSummary]:
         stmt = (
@@ -409,19 +574,16 @@ class InventoryService:
         )
         if not stock_item:
             raise ValueError("Stock item not found for issue")
-        if float(stock_item.quantity) < quantity:
-            raise ValueError("Insufficient quantity for issue")
-
-        stock_item.quantity = float(stock_item.quantity) - quantity
 
-        txn = models.InventoryTransaction(
-            stock_item_id=stock_item.id,
-            transaction_type=models.InventoryTransactionType.ADJUSTMENT,
-            quantity=quantity,
+        amount = to_quantity(quantity)
+        await self._ledger.decrease(stock_item.id, amount)
+        self._ledger.record(
+            stock_item.id,
+            models.InventoryTransactionType.ADJUSTMENT,
+            amount,
             reference=reference,
             from_location_id=stock_item.location_id,
         )
-        self._session.add(txn)
         await self._session.flush()
         await self._publish_event(
             event_type="inventory.stock.issued",
@@ -459,16 +621,15 @@ class InventoryService:
         )
         if not stock_item:
             raise ValueError("Stock item not found for adjustment")
-        stock_item.quantity = max(float(stock_item.quantity) - quantity, 0)
-
-        txn = models.InventoryTransaction(
-            stock_item_id=stock_item.id,
-            transaction_type=models.InventoryTransactionType.ADJUSTMENT,
-            quantity=quantity,
+        # Gebucht wird die tatsächlich ausgebuchte Menge (höchstens der Bestand)
+        applied, _ = await self._ledger.decrease_up_to(stock_item.id, to_quantity(quantity))
+        self._ledger.record(
+            stock_item.id,
+            models.InventoryTransactionType.ADJUSTMENT,
+            applied,
             reference=reference or "inventory.adjustment",
             from_location_id=stock_item.location_id,
         )
-        self._session.add(txn)
         await self._session.flush()
         await self._publish_event(
             event_type="inventory.stock.adjusted",
@@ -486,6 +647,289 @@ class InventoryService:
         )
         return await self._serialize_stock_item(stock_item)
 
+    async def book_batch(self, payload: BatchMovementCreate) -> BatchMovementRead:
+        """Bucht alle Zeilen eines Belegs mengenbasiert: wenige Abfragen statt mehrerer je Zeile.
+
+        Ein bereits gebuchter Idempotenzschlüssel liefert den gespeicherten
+        Beleg mit ``duplicate=True`` und bucht nichts. Alle Zeilen werden
+        gemeinsam gebucht oder (bei fehlendem Bestand) gar nicht.
+        """
+        existing = await self._find_batch(payload.idempotency_key)
+        if existing is not None:
+            return self._batch_read(existing, duplicate=True)
+
+        receipt = payload.movement_type == "receipt"
+        lines = []
+        for line in payload.lines:
+            location_id = line.location_id or payload.location_id
+            if receipt and location_id is None:
+                raise ValueError(f"Location required for receipt line {line.sku}")
+            lines.append((line, location_id, to_quantity(line.quantity)))
+        total = sum((quantity for _, _, quantity in lines), Decimal(0))
+
+        # Schlüssel zuerst belegen: ein paralleler Beleg mit gleichem Schlüssel wartet bis zum Commit
+        batch_id = await self._claim_batch(payload, len(lines), total)
+        if batch_id is None:
+            return self._batch_read(await self._find_batch(payload.idempotency_key), duplicate=True)
+
+        if receipt:
+            lots = await self._get_or_create_lots(
+                {(line.sku, line.lot_number or line.sku): line for line, _, _ in lines}
+            )
+            resolved = [
+                (location_id, lots[(line.sku, line.lot_number or line.sku)], line.sku, line.lot_number or line.sku)
+                for line, location_id, _ in lines
+            ]
+            stock_ids = await self._ledger.ensure_stock_items(
+                payload.warehouse_id, [(location_id, lot_id) for location_id, lot_id, _, _ in resolved]
+            )
+            positions = [(stock_ids[(location_id, lot_id)], location_id, lot_id, sku, lot_number)
+                         for location_id, lot_id, sku, lot_number in resolved]
+        else:
+            positions = await self._resolve_issue_lines(payload.warehouse_id, [(line, location_id) for line, location_id, _ in lines])
+
+        quantities: dict[UUID, Decimal] = defaultdict(Decimal)
+        for (stock_item_id, *_), (_, _, quantity) in zip(positions, lines):
+            quantities[stock_item_id] += quantity
+        if receipt:
+            await self._ledger.increase_many(quantities)
+        else:
+            await self._ledger.decrease_many(quantities)
+
+        transaction_type = models.InventoryTransactionType.RECEIPT if receipt else models.InventoryTransactionType.ADJUSTMENT
+        now = datetime.utcnow()
+        await self._ledger.record_many([
+            {
+                "stock_item_id": stock_item_id,
+                "transaction_type": transaction_type,
+                "quantity": quantity,
+                "reference": line.reference or payload.reference,
+                "from_location_id": None if receipt else location_id,
+                "to_location_id": location_id if receipt else None,
+                "created_at": now,
+            }
+            for (stock_item_id, location_id, *_), (line, _, quantity) in zip(positions, lines)
+        ])
+
+        # Ein EPCIS-ObjectEvent und ein Eintrag im Domain-Event je Bestand statt je Zeile
+        items = {}
+        for stock_item_id, location_id, lot_id, sku, lot_number in positions:
+            items[stock_item_id] = {
+                "stockItemId": str(stock_item_id),
+                "locationId": str(location_id),
+                "lotId": str(lot_id),
+                "sku": sku,
+                "lotNumber": lot_number,
+                "quantity": float(quantities[stock_item_id]),
+            }
+        read_point = payload.read_point or ("RECEIVING" if receipt else "SHIPPING")
+        await self._session.execute(insert(models.EpcisEvent.__table__), [
+            {
+                "id": uuid4(),
+                "tenant_id": self._tenant_id,
+                "event_type": models.EpcisEventType.OBJECT,
+                "event_time": now,
+                "biz_step": "receiving" if receipt else "shipping",
+                "read_point": read_point,
+                "lot_id": UUID(item["lotId"]),
+                "sku": item["sku"],
+                "quantity": quantities[stock_item_id],
+                "created_at": now,
+            }
+            for stock_item_id, item in items.items()
+        ])
+        await self._publish_event(
+            event_type="inventory.goods.received.batch" if receipt else "inventory.stock.issued.batch",
+            aggregate_id=str(batch_id),
+            aggregate_type="inventory.movement_batch",
+            data={
+                "batchId": str(batch_id),
+                "idempotencyKey": payload.idempotency_key,
+                "warehouseId": str(payload.warehouse_id),
+                "reference": payload.reference,
+                "lineCount": len(lines),
+                "totalQuantity": float(total),
+                "items": list(items.values()),
+            },
+        )
+        return BatchMovementRead(
+            id=batch_id,
+            movement_type=payload.movement_type,
+            idempotency_key=payload.idempotency_key,
+            reference=payload.reference,
+            line_count=len(lines),
+            total_quantity=float(total),
+        )
+
+    async def _find_batch(self, idempotency_key: str) -> models.MovementBatch | None:
+        stmt = select(models.MovementBatch).where(
+            models.MovementBatch.tenant_id == self._tenant_id,
+            models.MovementBatch.idempotency_key == idempotency_key,
+        )
+        return (await self._session.execute(stmt)).scalar_one_or_none()
+
+    async def _claim_batch(self, payload: BatchMovementCreate, line_count: int, total: Decimal) -> UUID | None:
+        dialect = self._session.get_bind().dialect.name
+        insert_ = pg_insert if dialect == "postgresql" else sqlite_insert
+        stmt = (
+            insert_(models.MovementBatch.__table__)
+            .values(
+                id=uuid4(),
+                tenant_id=self._tenant_id,
+                idempotency_key=payload.idempotency_key,
+                movement_type=payload.movement_type,
+                reference=payload.reference,
+                line_count=line_count,
+                total_quantity=total,
+                created_at=datetime.utcnow(),
+            )
+            .on_conflict_do_nothing(index_elements=["tenant_id", "idempotency_key"])
+            .returning(models.MovementBatch.__table__.c.id)
+        )
+        return (await self._session.execute(stmt)).scalar_one_or_none()
+
+    @staticmethod
+    def _batch_read(batch: models.MovementBatch, *, duplicate: bool = False) -> BatchMovementRead:
+        return BatchMovementRead(
+            id=batch.id,
+            movement_type=batch.movement_type,
+            idempotency_key=batch.idempotency_key,
+            reference=batch.reference,
+            line_count=batch.line_count,
+            total_quantity=float(batch.total_quantity),
+            duplicate=duplicate,
+        )
+
+    async def _get_or_create_lots(self, lines: dict[tuple[str, str], Any]) -> dict[tuple[str, str], UUID]:
+        """Chargen-IDs je (SKU, Chargennummer); fehlende Chargen mit einem Mehrzeilen-INSERT anlegen."""
+        keys = list(lines)
+        lots: dict[tuple[str, str], UUID] = {}
+        for start in range(0, len(keys), BATCH_CHUNK):
+            stmt = (
+                select(models.Lot.id, models.Lot.sku, models.Lot.lot_number)
+                .where(tuple_(models.Lot.sku, models.Lot.lot_number).in_(keys[start:start + BATCH_CHUNK]))
+                .order_by(models.Lot.created_at, models.Lot.id)
+            )
+            for row in await self._session.execute(stmt):
+                lots.setdefault((row.sku, row.lot_number), row.id)
+        missing = [
+            {
+                "id": uuid4(),
+                "sku": sku,
+                "lot_number": lot_number,
+                "production_date": lines[(sku, lot_number)].production_date,
+                "expiry_date": lines[(sku, lot_number)].expiry_date,
+                "created_at": datetime.utcnow(),
+            }
+            for sku, lot_number in keys
+            if (sku, lot_number) not in lots
+        ]
+        if missing:
+            await self._session.execute(insert(models.Lot.__table__), missing)
+            lots.update({(row["sku"], row["lot_number"]): row["id"] for row in missing})
+        return lots
+
+    async def _resolve_issue_lines(
+        self, warehouse_id: UUID, lines: list[tuple[Any, UUID | None]]
+    ) -> list[tuple[UUID, UUID, UUID, str, str]]:
+        """Bestand je Abgangszeile wie ``_find_stock_item``, aber mit einer Abfrage je Block von SKUs."""
+        skus = sorted({line.sku for line, _ in lines})
+        candidates: dict[str, list[Any]] = defaultdict(list)
+        for start in range(0, len(skus), BATCH_CHUNK):
+            stmt = (
+                select(
+                    models.StockItem.id,
+                    models.StockItem.location_id,
+                    models.StockItem.lot_id,
+                    models.Lot.sku,
+                    models.Lot.lot_number,
+                )
+                .join(models.Lot)
+                .where(models.StockItem.warehouse_id == warehouse_id, models.Lot.sku.in_(skus[start:start + BATCH_CHUNK]))
+                .order_by(models.StockItem.created_at, models.StockItem.id)
+            )
+            for row in await self._session.execute(stmt):
+                candidates[row.sku].append(row)
+
+        positions = []
+        for line, location_id in lines:
+            match = next(
+                (
+                    row for row in candidates[line.sku]
+                    if (location_id is None or row.location_id == location_id)
+                    and (row.lot_id == line.lot_id if line.lot_id else line.lot_number is None or row.lot_number == line.lot_number)
+                ),
+                None,
+            )
+            if match is None:
+                raise ValueError(f"Stock item not found for issue: {line.sku}")
+            positions.append(tuple(match))
+        return positions
+
+    async def _traced_lots(self, reached: dict[UUID, tuple[str, int]]) -> list[TracedLot]:
+        ids = sorted(reached)
+        traced: list[TracedLot] = []
+        for start in range(0, len(ids), TRACE_CHUNK):
+            chunk = ids[start:start + TRACE_CHUNK]
+            on_hand = dict((await self._session.execute(
+                select(models.StockItem.lot_id, func.sum(models.StockItem.quantity))
+                .where(models.StockItem.lot_id.in_(chunk))
+                .group_by(models.StockItem.lot_id)
+            )).all())
+            counts = dict((await self._session.execute(
+                select(models.StockItem.lot_id, func.count(models.InventoryTransaction.id))
+                .join(models.InventoryTransaction, models.InventoryTransaction.stock_item_id == models.StockItem.id)
+                .where(models.StockItem.lot_id.in_(chunk))
+                .group_by(models.StockItem.lot_id)
+            )).all())
+            lots = await self._session.execute(
+                select(models.Lot.id, models.Lot.sku, models.Lot.lot_number).where(models.Lot.id.in_(chunk))
+            )
+            for lot_id, sku, lot_number in lots:
+                step, depth = reached[lot_id]
+                traced.append(TracedLot(
+                    lot_id=lot_id,
+                    sku=sku,
+                    lot_number=lot_number,
+                    direction=step,
+                    depth=depth,
+                    quantity_on_hand=float(on_hand.get(lot_id) or 0),
+                    transaction_count=counts.get(lot_id, 0),
+                ))
+        return sorted(traced, key=lambda item: (item.direction, item.depth, item.lot_number))
+
+    async def _outbound_transactions(self, lot_ids: list[UUID], limit: int) -> list[TransactionRecord]:
+        """Abgänge (ohne Ziel-Lagerplatz) der Chargen, neueste zuerst."""
+        rows = []
+        for start in range(0, len(lot_ids), TRACE_CHUNK):
+            stmt = (
+                select(models.InventoryTransaction, models.StockItem.lot_id)
+                .join(models.StockItem)
+                .where(
+                    models.StockItem.lot_id.in_(lot_ids[start:start + TRACE_CHUNK]),
+                    models.InventoryTransaction.from_location_id.is_not(None),
+                    models.InventoryTransaction.to_location_id.is_(None),
+                )
+                .order_by(models.InventoryTransaction.created_at.desc())
+                .limit(limit)
+            )
+            rows.extend((await self._session.execute(stmt)).all())
+        rows.sort(key=lambda row: row[0].created_at, reverse=True)
+        return [self._transaction_record(txn, lot_id) for txn, lot_id in rows[:limit]]
+
+    @staticmethod
+    def _transaction_record(txn: models.InventoryTransaction, lot_id: UUID) -> TransactionRecord:
+        return TransactionRecord(
+            id=txn.id,
+            transaction_type=txn.transaction_type.value,
+            quantity=float(txn.quantity),
+            reference=txn.reference,
+            created_at=txn.created_at,
+            from_location_id=txn.from_location_id,
+            to_location_id=txn.to_location_id,
+            lot_id=lot_id,
+        )
+
     async def _latest_transaction_for_item(self, stock_item_id: UUID) -> models.InventoryTransaction | None:
         stmt = (
             select(models.InventoryTransaction)
@@ -527,29 +971,9 @@ class InventoryService:
         await self._session.flush()
         return lot
 
-    async def _get_or_create_stock_item(self, warehouse_id: UUID, location_id: UUID, lot_id: UUID) -> models.StockItem:
-        query = (
-            select(models.StockItem)
-            .where(
-                models.StockItem.warehouse_id == warehouse_id,
-                models.StockItem.location_id == location_id,
-                models.StockItem.lot_id == lot_id,
-            )
-            .options(selectinload(models.StockItem.lot))
-        )
-        stock_item = (await self._session.execute(query)).scalar_one_or_none()
-        if stock_item:
-            return stock_item
-        stock_item = models.StockItem(
-            warehouse_id=warehouse_id,
-            location_id=location_id,
-            lot_id=lot_id,
-            quantity=0,
-            reserved_quantity=0,
-        )
-        self._session.add(stock_item)
-        await self._session.flush()
-        return stock_item
+    async def _load_stock_item(self, stock_item_id: UUID) -> models.StockItem:
+        # Bereits geladene Objekte hat der Ledger auf den gebuchten Bestand gesetzt
+        return await self._session.get(models.StockItem, stock_item_id, options=[selectinload(models.StockItem.lot)])
 
     async def _find_stock_item(
         self,
@@ -0,0 +1,99 @@
+"""Chargen-Genealogie: Eltern-/Kind-Beziehungen und transitive Rückverfolgung.
+
+Jede Transformation (Verarbeitung, Mischung, Aufteilung) legt Kanten
+``parent -> child`` in ``inventory_lot_links`` ab. Rückverfolgung in beide
+Richtungen läuft als rekursive CTE über die beiden zusammengesetzten Indizes
+(parent, child) bzw. (child, parent); je Ebene ist das ein Index-Lookup pro
+erreichter Charge, unabhängig vom Umfang der Bewegungshistorie.
+``UNION`` statt ``UNION ALL`` verwirft bereits erreichte (Charge, Tiefe)-Paare,
+``max_depth`` begrenzt Zyklen aus fehlerhaften Daten.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from decimal import Decimal
+from typing import Iterable, Literal
+from uuid import UUID, uuid4
+
+from sqlalchemy import func, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import models
+
+GENEALOGY_MAX_DEPTH = 64
+# Chargen je IN-Liste beim Nachladen von Kanten und Kennzahlen
+TRACE_CHUNK = 500
+
+Direction = Literal["forward", "backward"]
+
+_links = models.LotLink.__table__
+
+
+class LotGenealogy:
+    """Schreibt und traversiert Chargenbeziehungen innerhalb der Transaktion von ``session``."""
+
+    def __init__(self, session: AsyncSession) -> None:
+        self._session = session
+
+    async def link_many(
+        self,
+        parents: Iterable[tuple[UUID, Decimal | None]],
+        child_lot_id: UUID,
+        *,
+        link_type: str = "transformation",
+        reference: str | None = None,
+    ) -> list[dict]:
+        """Kanten von allen ``parents`` (Charge, eingesetzte Menge) zur Kind-Charge anlegen."""
+        now = datetime.utcnow()
+        rows = [
+            {
+                "id": uuid4(),
+                "parent_lot_id": parent_lot_id,
+                "child_lot_id": child_lot_id,
+                "link_type": link_type,
+                "quantity": quantity,
+                "reference": reference,
+                "created_at": now,
+            }
+            for parent_lot_id, quantity in parents
+            if parent_lot_id != child_lot_id
+        ]
+        if rows:
+            await self._session.execute(insert(_links), rows)
+        return rows
+
+    async def trace(
+        self, lot_id: UUID, direction: Direction, max_depth: int = GENEALOGY_MAX_DEPTH
+    ) -> dict[UUID, int]:
+        """Alle in ``direction`` erreichbaren Chargen mit ihrer kleinsten Tiefe (ohne ``lot_id`` selbst)."""
+        if direction == "forward":
+            source, target = _links.c.parent_lot_id, _links.c.child_lot_id
+        else:
+            source, target = _links.c.child_lot_id, _links.c.parent_lot_id
+
+        trace = (
+            select(target.label("lot_id"), literal(1).label("depth"))
+            .where(source == lot_id)
+            .cte("lot_trace", recursive=True)
+        )
+        trace = trace.union(
+            select(target, trace.c.depth + 1)
+            .join(trace, source == trace.c.lot_id)
+            .where(trace.c.depth < max_depth)
+        )
+        stmt = select(trace.c.lot_id, func.min(trace.c.depth)).group_by(trace.c.lot_id)
+        reached = {row[0]: row[1] for row in await self._session.execute(stmt)}
+        reached.pop(lot_id, None)
+        return reached
+
+    async def links_among(self, lot_ids: Iterable[UUID]) -> list[dict]:
+        """Kanten, deren beide Enden in ``lot_ids`` liegen, als Zeilen (ohne ORM-Objekte)."""
+        wanted = set(lot_ids)
+        ordered = sorted(wanted)
+        links: list[dict] = []
+        for start in range(0, len(ordered), TRACE_CHUNK):
+            stmt = select(_links).where(_links.c.parent_lot_id.in_(ordered[start:start + TRACE_CHUNK]))
+            rows = (await self._session.execute(stmt)).all()
+            links.extend(row._asdict() for row in rows if row.child_lot_id in wanted)
+        return sorted(links, key=lambda link: (link["created_at"], link["id"]))
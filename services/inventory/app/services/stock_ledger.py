@@ -0,0 +1,241 @@
+"""Bestands-Ledger: atomare Mengenbuchungen auf Lagerplätzen.
+
+Jede Bewegung ist eine unveränderliche Zeile in ``inventory_transactions``;
+der Bestand in ``inventory_stock_items`` wird ausschließlich per
+``UPDATE ... SET quantity = quantity ± :q ... RETURNING quantity`` geändert.
+Abgänge sind an ``quantity >= :q`` gebunden, damit parallele Entnahmen weder
+Updates verlieren noch den Bestand negativ machen. Transfers sperren Quelle
+und Ziel in aufsteigender ID-Reihenfolge, sodass gegenläufige Transfers nicht
+verklemmen.
+
+Belege mit vielen Zeilen werden blockweise gebucht: Bestände werden per
+Mehrzeilen-INSERT angelegt und je Block mit einem ``UPDATE ... SET quantity =
+quantity ± CASE id ... END`` geändert; Buchungszeilen gehen als executemany.
+
+Mengen werden als ``Decimal`` mit der Skala der Spalten (3 Nachkommastellen)
+gerechnet; Floats aus den API-Schemas werden über ihre Dezimaldarstellung
+übernommen (0.1 bleibt 0.100).
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from decimal import ROUND_HALF_EVEN, Decimal
+from typing import Any, Iterable, Mapping
+from uuid import UUID, uuid4
+
+from sqlalchemy import case, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
+
+from app.db import models
+
+QUANTITY_STEP = Decimal("0.001")
+# Bestände je Mengen-UPDATE bzw. IN-Liste (hält auch SQLite unter seinem Parameterlimit)
+BATCH_CHUNK = 500
+
+_stock = models.StockItem.__table__
+_transactions = models.InventoryTransaction.__table__
+
+
+class InsufficientStockError(ValueError):
+    """Der Bestand reicht für den Abgang nicht aus."""
+
+
+def to_quantity(value: Decimal | float | int | str) -> Decimal:
+    """Exakte Menge auf der Skala der Bestandsspalten."""
+    if isinstance(value, float):
+        value = repr(value)
+    return Decimal(value).quantize(QUANTITY_STEP, rounding=ROUND_HALF_EVEN)
+
+
+class StockLedger:
+    """Mengenbuchungen auf ``StockItem``-Zeilen innerhalb der Transaktion von ``session``."""
+
+    def __init__(self, session: AsyncSession) -> None:
+        self._session = session
+
+    async def ensure_stock_item(self, warehouse_id: UUID, location_id: UUID, lot_id: UUID) -> UUID:
+        """ID des Bestands für (Lager, Platz, Charge); legt ihn bei Bedarf an, auch bei parallelen Zugängen."""
+        await self._session.execute(self._insert_stock_items(), [self._new_stock_item(warehouse_id, location_id, lot_id)])
+        query = select(_stock.c.id).where(
+            _stock.c.warehouse_id == warehouse_id,
+            _stock.c.location_id == location_id,
+            _stock.c.lot_id == lot_id,
+        )
+        return (await self._session.execute(query)).scalar_one()
+
+    async def ensure_stock_items(
+        self, warehouse_id: UUID, positions: Iterable[tuple[UUID, UUID]]
+    ) -> dict[tuple[UUID, UUID], UUID]:
+        """IDs der Bestände je (Platz, Charge) eines Lagers; fehlende werden mit einem Mehrzeilen-INSERT angelegt."""
+        positions = list(dict.fromkeys(positions))
+        if not positions:
+            return {}
+        await self._session.execute(
+            self._insert_stock_items(),
+            [self._new_stock_item(warehouse_id, location_id, lot_id) for location_id, lot_id in positions],
+        )
+        wanted = set(positions)
+        lot_ids = sorted({lot_id for _, lot_id in positions})
+        ids: dict[tuple[UUID, UUID], UUID] = {}
+        for start in range(0, len(lot_ids), BATCH_CHUNK):
+            query = select(_stock.c.id, _stock.c.location_id, _stock.c.lot_id).where(
+                _stock.c.warehouse_id == warehouse_id,
+                _stock.c.lot_id.in_(lot_ids[start:start + BATCH_CHUNK]),
+            )
+            for row in await self._session.execute(query):
+                if (row.location_id, row.lot_id) in wanted:
+                    ids[(row.location_id, row.lot_id)] = row.id
+        return ids
+
+    async def increase_many(self, quantities: Mapping[UUID, Decimal]) -> dict[UUID, Decimal]:
+        """Zugänge auf mehrere Bestände; liefert die neuen Bestände."""
+        return await self._update_many(quantities, decrease=False)
+
+    async def decrease_many(self, quantities: Mapping[UUID, Decimal]) -> dict[UUID, Decimal]:
+        """Abgänge auf mehrere Bestände, alle oder keiner.
+
+        Reicht ein Bestand nicht, wird ``InsufficientStockError`` ausgelöst;
+        die bereits geänderten Blöcke verwirft der Rollback des Aufrufers.
+        """
+        return await self._update_many(quantities, decrease=True)
+
+    async def increase(self, stock_item_id: UUID, quantity: Decimal) -> Decimal:
+        """Zugang; liefert den neuen Bestand."""
+        stmt = (
+            update(_stock)
+            .where(_stock.c.id == stock_item_id)
+            .values(quantity=_stock.c.quantity + quantity)
+            .returning(_stock.c.quantity)
+        )
+        balance = (await self._session.execute(stmt)).scalar_one_or_none()
+        if balance is None:
+            raise ValueError("Stock item not found")
+        return self._sync(stock_item_id, balance)
+
+    async def decrease(self, stock_item_id: UUID, quantity: Decimal) -> Decimal:
+        """Abgang nur bei ausreichendem Bestand; liefert den neuen Bestand."""
+        stmt = (
+            update(_stock)
+            .where(_stock.c.id == stock_item_id, _stock.c.quantity >= quantity)
+            .values(quantity=_stock.c.quantity - quantity)
+            .returning(_stock.c.quantity)
+        )
+        balance = (await self._session.execute(stmt)).scalar_one_or_none()
+        if balance is None:
+            raise InsufficientStockError("Insufficient quantity")
+        return self._sync(stock_item_id, balance)
+
+    async def decrease_up_to(self, stock_item_id: UUID, quantity: Decimal) -> tuple[Decimal, Decimal]:
+        """Abgang von höchstens dem vorhandenen Bestand; liefert (gebuchte Menge, neuer Bestand)."""
+        while True:
+            current = (await self._lock([stock_item_id])).get(stock_item_id)
+            if current is None:
+                raise ValueError("Stock item not found")
+            applied = min(to_quantity(current), quantity)
+            try:
+                return applied, await self.decrease(stock_item_id, applied)
+            except InsufficientStockError:
+                # Nur ohne Zeilensperre (SQLite) möglich: zwischen Lesen und Buchen wurde entnommen
+                continue
+
+    async def move(self, source_id: UUID, destination_id: UUID, quantity: Decimal) -> tuple[Decimal, Decimal]:
+        """Umbuchung; liefert (Bestand Quelle, Bestand Ziel).
+
+        Beide Zeilen werden vor der ersten Änderung in ID-Reihenfolge gesperrt;
+        scheitert der Abgang, ist noch nichts geschrieben.
+        """
+        if source_id == destination_id:
+            raise ValueError("Source and destination stock item are identical")
+        await self._lock([source_id, destination_id])
+        source_balance = await self.decrease(source_id, quantity)
+        destination_balance = await self.increase(destination_id, quantity)
+        return source_balance, destination_balance
+
+    def record(
+        self,
+        stock_item_id: UUID,
+        transaction_type: models.InventoryTransactionType,
+        quantity: Decimal,
+        *,
+        reference: str | None = None,
+        from_location_id: UUID | None = None,
+        to_location_id: UUID | None = None,
+    ) -> models.InventoryTransaction:
+        """Hängt die Buchungszeile an; geschrieben wird sie mit dem nächsten Flush."""
+        transaction = models.InventoryTransaction(
+            stock_item_id=stock_item_id,
+            transaction_type=transaction_type,
+            quantity=quantity,
+            reference=reference,
+            from_location_id=from_location_id,
+            to_location_id=to_location_id,
+        )
+        self._session.add(transaction)
+        return transaction
+
+    async def record_many(self, rows: list[dict[str, Any]]) -> None:
+        """Buchungszeilen (Spalten von ``inventory_transactions``) per executemany anhängen."""
+        if rows:
+            await self._session.execute(insert(_transactions), rows)
+
+    async def _update_many(self, quantities: Mapping[UUID, Decimal], *, decrease: bool) -> dict[UUID, Decimal]:
+        ids = sorted(quantities)
+        balances: dict[UUID, Decimal] = {}
+        for start in range(0, len(ids), BATCH_CHUNK):
+            chunk = ids[start:start + BATCH_CHUNK]
+            # Sperren in ID-Reihenfolge wie bei Einzelbuchungen, damit sich parallele Belege nicht verklemmen
+            await self._lock(chunk)
+            delta = case({stock_item_id: quantities[stock_item_id] for stock_item_id in chunk}, value=_stock.c.id)
+            stmt = update(_stock).where(_stock.c.id.in_(chunk))
+            if decrease:
+                stmt = stmt.where(_stock.c.quantity >= delta).values(quantity=_stock.c.quantity - delta)
+            else:
+                stmt = stmt.values(quantity=_stock.c.quantity + delta)
+            result = await self._session.execute(stmt.returning(_stock.c.id, _stock.c.quantity))
+            for stock_item_id, balance in result:
+                balances[stock_item_id] = self._sync(stock_item_id, balance)
+            if len(balances) != start + len(chunk):
+                if decrease:
+                    raise InsufficientStockError("Insufficient quantity")
+                raise ValueError("Stock item not found")
+        return balances
+
+    def _insert_stock_items(self):
+        dialect = self._session.get_bind().dialect.name
+        insert_ = pg_insert if dialect == "postgresql" else sqlite_insert
+        return insert_(_stock).on_conflict_do_nothing(index_elements=["warehouse_id", "location_id", "lot_id"])
+
+    @staticmethod
+    def _new_stock_item(warehouse_id: UUID, location_id: UUID, lot_id: UUID) -> dict[str, Any]:
+        return {
+            "id": uuid4(),
+            "warehouse_id": warehouse_id,
+            "location_id": location_id,
+            "lot_id": lot_id,
+            "quantity": 0,
+            "reserved_quantity": 0,
+            "created_at": datetime.utcnow(),
+        }
+
+    async def _lock(self, stock_item_ids: list[UUID]) -> dict[UUID, Decimal]:
+        # Feste Reihenfolge verhindert Deadlocks zwischen gegenläufigen Umbuchungen;
+        # SQLite ignoriert FOR UPDATE und serialisiert Schreiber ohnehin
+        query = (
+            select(_stock.c.id, _stock.c.quantity)
+            .where(_stock.c.id.in_(stock_item_ids))
+            .order_by(_stock.c.id)
+            .with_for_update()
+        )
+        return {row.id: row.quantity for row in await self._session.execute(query)}
+
+    def _sync(self, stock_item_id: UUID, balance: Decimal) -> Decimal:
+        # Bereits geladene StockItems auf den gebuchten Stand bringen, ohne sie als geändert zu markieren
+        loaded = self._session.identity_map.get(identity_key(models.StockItem, stock_item_id))
+        if loaded is not None:
+            set_committed_value(loaded, "quantity", balance)
+        return balance
@@ -1,11 +1,12 @@
 from __future__ import annotations
 
 import time
-from collections import defaultdict
-from typing import Dict, Tuple
+from collections import OrderedDict
 
 
 class TokenBucket:
+    __slots__ = ("capacity", "tokens", "refill_rate_per_sec", "last_refill_ts")
+
     def __init__(self, capacity: int, refill_per_minute: int) -> None:
         self.capacity = capacity
         self.tokens = capacity
@@ -24,16 +25,49 @@ class TokenBucket:
             return True
         return False
 
+    def full_at(self) -> float:
+        """Monotonic timestamp at which the bucket is completely refilled."""
+        if self.refill_rate_per_sec <= 0:
+            return float("inf")
+        return self.last_refill_ts + (self.capacity - self.tokens) / self.refill_rate_per_sec
+
 
 class RateLimiter:
-    def __init__(self, limit_per_minute: int) -> None:
+    """Token bucket per key, kept in a bounded LRU.
+
+    A bucket that has refilled completely is indistinguishable from a fresh one,
+    so idle keys can be dropped without changing limiter behaviour. When more
+    than ``max_keys`` keys are active the least recently used bucket is evicted.
+    """
+
+    def __init__(self, limit_per_minute: int, max_keys: int = 10_000) -> None:
         self.limit_per_minute = limit_per_minute
-        self._buckets: Dict[str, TokenBucket] = {}
+        self.max_keys = max_keys
+        self.evictions = 0
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
 
     def check(self, key: str) -> bool:
-        bucket = self._buckets.get(key)
+        buckets = self._buckets
+        bucket = buckets.get(key)
         if bucket is None:
+            self._evict()
             bucket = TokenBucket(capacity=self.limit_per_minute, refill_per_minute=self.limit_per_minute)
-            self._buckets[key] = bucket
+            buckets[key] = bucket
+        else:
+            buckets.move_to_end(key)
         return bucket.allow(1)
 
+    def _evict(self) -> None:
+        buckets = self._buckets
+        now = time.monotonic()
+        # Oldest entries first: drop fully refilled (idle) buckets, O(1) amortised
+        while buckets:
+            oldest_key = next(iter(buckets))
+            if len(buckets) >= self.max_keys or buckets[oldest_key].full_at() <= now:
+                del buckets[oldest_key]
+                self.evictions += 1
+            else:
+                break
@@ -12,8 +12,9 @@ from prometheus_client import make_asgi_app
 from app.api.v1.api import api_router
 from app.config import settings
 from app.db.models import Base
-from app.db.session import dispose_engine, get_engine
+from app.db.session import dispose_engine, get_engine, get_session_factory
 from app.dependencies import init_event_bus, shutdown_event_bus
+from app.services.epcis_retention import EpcisRetentionJob
 from app.workflows import register_inventory_workflow
 
 logging.basicConfig(
@@ -31,9 +32,12 @@ async def lifespan(_: FastAPI):
         await conn.run_sync(Base.metadata.create_all)
     await init_event_bus()
     await register_inventory_workflow()
+    retention_job = EpcisRetentionJob(get_session_factory())
+    await retention_job.start()
     try:
         yield
     finally:
+        await retention_job.stop()
         await shutdown_event_bus()
         await dispose_engine()
         logger.info("Inventory Service wird heruntergefahren…")
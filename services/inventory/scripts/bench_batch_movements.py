@@ -0,0 +1,126 @@
+"""
+Benchmark: multi-line goods receipts and shipments
+
+Books documents of N lines (distinct lots spread over a few bins) once line
+by line through ``InventoryService.receive_stock`` / ``issue_stock`` and
+once through ``InventoryService.book_batch``, then issues the same lines
+again as one shipment batch. Reports lines/second and SQL statements per
+document.
+
+Uses a temporary SQLite file database via ``aiosqlite`` unless
+``--database-url`` points at PostgreSQL (``postgresql+asyncpg://...``, schema
+from the service migrations). Workflow events are not sent.
+
+Usage:
+    python scripts/bench_batch_movements.py --lines 10000
+    python scripts/bench_batch_movements.py --lines 10000 --database-url postgresql+asyncpg://...
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from uuid import uuid4
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.db import models  # noqa: E402
+from app.schemas import BatchMovementCreate, LocationCreate, MovementLine, ReceiptCreate, WarehouseCreate  # noqa: E402
+from app.services import inventory_service  # noqa: E402
+from app.services.inventory_service import InventoryService  # noqa: E402
+
+
+async def _no_workflow_event(**_) -> None:
+    return None
+
+
+async def timed(engine, session_factory, book):
+    statements = 0
+
+    def _count(*_):
+        nonlocal statements
+        statements += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _count)
+    start = time.perf_counter()
+    async with session_factory() as session:
+        await book(InventoryService(session))
+        await session.commit()
+    elapsed = time.perf_counter() - start
+    event.remove(engine.sync_engine, "before_cursor_execute", _count)
+    return elapsed, statements
+
+
+def report(label: str, lines: int, elapsed: float, statements: int) -> None:
+    print(f"{label:<28} {elapsed:8.2f} s  {lines / elapsed:>10,.0f} lines/s  {statements:>7,} statements")
+
+
+async def main_async(args) -> None:
+    inventory_service.emit_workflow_event = _no_workflow_event
+    if args.database_url:
+        engine = create_async_engine(args.database_url)
+    else:
+        path = Path(tempfile.mkdtemp(prefix="bench-batch-movements-")) / "inventory.db"
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        async with engine.begin() as conn:
+            await conn.run_sync(models.Base.metadata.create_all)
+    session_factory = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+    async with session_factory() as session:
+        service = InventoryService(session)
+        warehouse = await service.create_warehouse(WarehouseCreate(code=f"BENCH{random.randrange(10**6)}", name="Bench"))
+        bins = [(await service.add_location(warehouse.id, LocationCreate(code=f"B{i:02d}"))).id for i in range(args.bins)]
+        await session.commit()
+
+    def document(prefix: str):
+        return [
+            MovementLine(sku=f"{prefix}-SKU{i % 500}", lot_number=f"{prefix}-LOT{i}", location_id=bins[i % len(bins)],
+                         quantity=random.choice((1, 2.5, 10)))
+            for i in range(args.lines)
+        ]
+
+    per_line = document(f"L{uuid4().hex[:6]}")[:args.per_line_lines]
+
+    async def book_per_line(service):
+        for line in per_line:
+            await service.receive_stock(ReceiptCreate(
+                warehouse_id=warehouse.id, location_id=line.location_id, sku=line.sku,
+                lot_number=line.lot_number, quantity=line.quantity,
+            ))
+
+    elapsed, statements = await timed(engine, session_factory, book_per_line)
+    report(f"receipt line by line ({len(per_line):,})", len(per_line), elapsed, statements)
+
+    lines = document(f"B{uuid4().hex[:6]}")
+    receipt = BatchMovementCreate(movement_type="receipt", warehouse_id=warehouse.id, reference="BENCH-PO",
+                                  idempotency_key=f"bench-{uuid4()}", lines=lines)
+    elapsed, statements = await timed(engine, session_factory, lambda service: service.book_batch(receipt))
+    report(f"receipt batch ({len(lines):,})", len(lines), elapsed, statements)
+
+    shipment = BatchMovementCreate(
+        movement_type="issue", warehouse_id=warehouse.id, reference="BENCH-SHP", idempotency_key=f"bench-{uuid4()}",
+        lines=[line.model_copy(update={"quantity": line.quantity / 2}) for line in lines],
+    )
+    elapsed, statements = await timed(engine, session_factory, lambda service: service.book_batch(shipment))
+    report(f"shipment batch ({len(lines):,})", len(lines), elapsed, statements)
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=10_000, help="Lines per batch document")
+    parser.add_argument("--per-line-lines", type=int, default=2_000, help="Lines booked one by one for comparison")
+    parser.add_argument("--bins", type=int, default=8)
+    parser.add_argument("--database-url", default=None)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Benchmark: EPCIS capture throughput and retention enforcement
+
+Capture: stores ``--events`` events once per event the way the old single
+event endpoint did (SELECT by key, INSERT, commit) and once as capture
+documents of ``--document-size`` events through ``EpcisCapture``
+(``ON CONFLICT DO NOTHING`` plus outbox rows), then captures the same
+documents again (all duplicates). Reports events/second.
+
+Retention: seeds ``--retention-events`` events spread over two years with set-based
+SQL inside the database (every second one carrying an ``email`` extension)
+and times ``EpcisRetention.run()`` once on the full history and once more
+incrementally.
+
+Uses a temporary SQLite file database via ``aiosqlite`` unless
+``--database-url`` points at an empty PostgreSQL database
+(``postgresql+asyncpg://...``). Tables are created like the service does at
+startup.
+
+Usage:
+    python scripts/bench_epcis.py --events 100000 --retention-events 1000000
+    python scripts/bench_epcis.py --retention-events 50000000 --database-url postgresql+asyncpg://...
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from uuid import uuid4
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import select, text  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from app.db import models  # noqa: E402
+from app.schemas import EpcisEventCreate  # noqa: E402
+from app.services.epcis_capture import EpcisCapture, event_key  # noqa: E402
+from app.services.epcis_retention import EpcisRetention  # noqa: E402
+
+# Hex-Präfix mit Buchstaben: SQLite legt reine Ziffernfolgen in UUID-Spalten sonst als Zahl ab
+ID_PREFIX = 0xE9C1
+
+SQLITE = {
+    "series": "WITH RECURSIVE s(n) AS (SELECT 0 UNION ALL SELECT n + 1 FROM s WHERE n + 1 < :count) SELECT n FROM s",
+    "id": f"printf('%016x%016x', {ID_PREFIX}, n)",
+    "at": "datetime(:start, '+' || (n * :step) || ' seconds')",
+    "extensions": "CASE WHEN n % 2 = 0 THEN json_object('poNumber', 'PO-' || n, 'email', 'user' || n || '@example.com') "
+                  "ELSE json_object('poNumber', 'PO-' || n) END",
+}
+POSTGRES = {
+    "series": "SELECT n FROM generate_series(0, :count - 1) AS s(n)",
+    "id": f"('{ID_PREFIX:016x}' || lpad(to_hex(n), 16, '0'))::uuid",
+    "at": "CAST(:start AS timestamp) + n * :step * interval '1 second'",
+    "extensions": "CASE WHEN n % 2 = 0 THEN jsonb_build_object('poNumber', 'PO-' || n, 'email', 'user' || n || '@example.com') "
+                  "ELSE jsonb_build_object('poNumber', 'PO-' || n) END",
+}
+
+
+def events(prefix: str, count: int) -> list[EpcisEventCreate]:
+    now = datetime.utcnow()
+    return [
+        EpcisEventCreate(
+            event_type="ObjectEvent", event_time=now - timedelta(seconds=n), biz_step="receiving",
+            read_point="WH1/DOCK-1", sku=f"SKU{n % 500}", quantity=1, extensions={"poNumber": f"PO-{n}"},
+            idempotency_key=f"{prefix}-{n}",
+        )
+        for n in range(count)
+    ]
+
+
+def report(label: str, count: int, elapsed: float) -> None:
+    print(f"{label:<34} {elapsed:8.2f} s  {count / elapsed:>10,.0f} events/s")
+
+
+async def capture_per_event(session_factory, payloads, tenant_id: str) -> None:
+    for payload in payloads:
+        async with session_factory() as session:
+            key = event_key(payload)
+            if await session.scalar(select(models.EpcisEvent).where(models.EpcisEvent.event_key == key)):
+                continue
+            session.add(models.EpcisEvent(
+                event_key=key, event_type=models.EpcisEventType(payload.event_type), event_time=payload.event_time,
+                biz_step=payload.biz_step, read_point=payload.read_point, sku=payload.sku, quantity=payload.quantity,
+                extensions=payload.extensions, tenant_id=tenant_id,
+            ))
+            await session.commit()
+
+
+async def capture_documents(session_factory, payloads, size: int, tenant_id: str) -> int:
+    captured = 0
+    for start in range(0, len(payloads), size):
+        async with session_factory() as session:
+            rows, _ = await EpcisCapture(session, tenant_id).capture(payloads[start:start + size])
+            await session.commit()
+        captured += len(rows)
+    return captured
+
+
+async def seed_history(engine, count: int) -> None:
+    sql = POSTGRES if engine.dialect.name == "postgresql" else SQLITE
+    start = datetime.utcnow() - timedelta(days=730)
+    statement = (
+        f"INSERT INTO inventory_epcis_events (id, tenant_id, event_key, event_type, event_time, biz_step, sku, "
+        f"quantity, extensions, created_at) "
+        f"SELECT {sql['id']}, 'bench', 'hist-' || n, 'OBJECT', {sql['at']}, 'shipping', 'SKU' || (n % 500), 1, "
+        f"{sql['extensions']}, {sql['at']} FROM ({sql['series']}) AS s"
+    )
+    async with engine.begin() as conn:
+        await conn.execute(text(statement), {"count": count, "start": start.isoformat(" "), "step": 730 * 86400 / count})
+
+
+async def main_async(args) -> None:
+    if args.database_url:
+        engine = create_async_engine(args.database_url)
+    else:
+        path = Path(tempfile.mkdtemp(prefix="bench-epcis-")) / "inventory.db"
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+    session_factory = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    tenant_id = f"bench-{uuid4().hex[:6]}"
+
+    per_event = events(f"single-{tenant_id}", args.per_event)
+    start = time.perf_counter()
+    await capture_per_event(session_factory, per_event, tenant_id)
+    report(f"per event ({len(per_event):,})", len(per_event), time.perf_counter() - start)
+
+    bulk = events(f"bulk-{tenant_id}", args.events)
+    start = time.perf_counter()
+    captured = await capture_documents(session_factory, bulk, args.document_size, tenant_id)
+    report(f"capture documents ({captured:,})", len(bulk), time.perf_counter() - start)
+    start = time.perf_counter()
+    captured = await capture_documents(session_factory, bulk, args.document_size, tenant_id)
+    report(f"re-capture, duplicates ({len(bulk) - captured:,})", len(bulk), time.perf_counter() - start)
+
+    if args.retention_events:
+        start = time.perf_counter()
+        await seed_history(engine, args.retention_events)
+        print(f"seeded {args.retention_events:,} history events in {time.perf_counter() - start:.1f} s")
+        retention = EpcisRetention(session_factory, chunk=args.chunk)
+        for label in ("retention full history", "retention incremental"):
+            start = time.perf_counter()
+            result = await retention.run("bench")
+            elapsed = time.perf_counter() - start
+            print(f"{label:<34} {elapsed:8.2f} s  deleted {result['deleted']:>11,}  anonymized {result['anonymized']:>11,}")
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=100_000, help="Events captured as documents")
+    parser.add_argument("--document-size", type=int, default=5_000)
+    parser.add_argument("--per-event", type=int, default=2_000, help="Events captured one by one for comparison")
+    parser.add_argument("--retention-events", type=int, default=1_000_000)
+    parser.add_argument("--chunk", type=int, default=settings.EPCIS_RETENTION_CHUNK)
+    parser.add_argument("--database-url", default=None)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
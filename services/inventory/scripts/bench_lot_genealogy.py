@@ -0,0 +1,181 @@
+"""
+Benchmark: lot genealogy trace and lot search over a large movement history
+
+Seeds a synthetic layered genealogy (``--layers`` layers of ``--width`` lots,
+every lot made from two lots of the previous layer), one stock item per lot
+and ``--transactions`` movements spread over all lots (every fifth one an
+outbound issue). Seeding runs as set-based SQL inside the database. Then
+times ``InventoryService.trace_lot`` forward from a root lot and backward
+from a leaf lot over the full depth, and pages through ``list_lots`` with
+and without a search term.
+
+Uses a temporary SQLite file database via ``aiosqlite`` unless
+``--database-url`` points at an empty PostgreSQL database
+(``postgresql+asyncpg://...``, schema from the service migrations).
+Workflow events are not sent.
+
+Usage:
+    python scripts/bench_lot_genealogy.py --transactions 1000000
+    python scripts/bench_lot_genealogy.py --transactions 10000000 --database-url postgresql+asyncpg://...
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+from uuid import UUID
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import text  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.db import models  # noqa: E402
+from app.schemas import LocationCreate, WarehouseCreate  # noqa: E402
+from app.services import inventory_service  # noqa: E402
+from app.services.inventory_service import InventoryService  # noqa: E402
+
+# Disjunkte ID-Bereiche je Tabelle, damit die Seeds deterministische UUIDs erzeugen. Die Präfixe
+# enthalten Hex-Buchstaben: SQLite speichert UUID-Spalten mit NUMERIC-Affinität und würde reine
+# Ziffernfolgen sonst als Zahl ablegen.
+LOT_BASE, ITEM_BASE, LINK_BASE, TXN_BASE = 0xA1 << 96, 0xA2 << 96, 0xA3 << 96, 0xA4 << 96
+
+SQLITE = {
+    "series": "WITH RECURSIVE s(n) AS (SELECT 0 UNION ALL SELECT n + 1 FROM s WHERE n + 1 < :count) SELECT n FROM s",
+    "at": "datetime('2026-01-01', '+' || (n % 31536000) || ' seconds')",
+}
+POSTGRES = {
+    "series": "SELECT n FROM generate_series(0, :count - 1) AS s(n)",
+    "at": "timestamp '2026-01-01' + (n % 31536000) * interval '1 second'",
+}
+
+
+def lot_uuid(n: int) -> UUID:
+    return UUID(int=LOT_BASE + n)
+
+
+async def _no_workflow_event(**_) -> None:
+    return None
+
+
+async def seed(engine, args, warehouse_id: UUID, location_id: UUID) -> None:
+    postgres = engine.dialect.name == "postgresql"
+    sql = POSTGRES if postgres else SQLITE
+    if postgres:
+        # to_hex() kennt kein numeric; die Basis passt nicht in bigint, daher hex-Präfix je Tabelle
+        def ident(base: int, expr: str = "n") -> str:
+            return f"('{base >> 64:016x}' || lpad(to_hex({expr}), 16, '0'))::uuid"
+    else:
+        def ident(base: int, expr: str = "n") -> str:
+            return f"printf('%016x%016x', {base >> 64}, {expr})"
+
+    lots = args.layers * args.width
+    wh = f"'{warehouse_id.hex}'" if not postgres else f"'{warehouse_id}'::uuid"
+    loc = f"'{location_id.hex}'" if not postgres else f"'{location_id}'::uuid"
+    statements = [
+        (lots, f"INSERT INTO inventory_lots (id, sku, lot_number, created_at) "
+               f"SELECT {ident(LOT_BASE)}, 'SKU' || (n % 997), 'LOT-' || n, {sql['at']} FROM ({sql['series']}) AS s"),
+        (lots, f"INSERT INTO inventory_stock_items (id, warehouse_id, location_id, lot_id, quantity, reserved_quantity, created_at) "
+               f"SELECT {ident(ITEM_BASE)}, {wh}, {loc}, {ident(LOT_BASE)}, 100, 0, {sql['at']} FROM ({sql['series']}) AS s"),
+        # Lot n + width entsteht aus Lot n und seinem Nachbarn derselben Ebene
+        (lots - args.width,
+         f"INSERT INTO inventory_lot_links (id, parent_lot_id, child_lot_id, link_type, created_at) "
+         f"SELECT {ident(LINK_BASE)}, {ident(LOT_BASE)}, {ident(LOT_BASE, f'n + {args.width}')}, 'transformation', {sql['at']} "
+         f"FROM ({sql['series']}) AS s"),
+        (lots - args.width,
+         f"INSERT INTO inventory_lot_links (id, parent_lot_id, child_lot_id, link_type, created_at) "
+         f"SELECT {ident(LINK_BASE, f'n + {lots}')}, {ident(LOT_BASE, f'n - n % {args.width} + (n + 1) % {args.width}')}, "
+         f"{ident(LOT_BASE, f'n + {args.width}')}, 'transformation', {sql['at']} FROM ({sql['series']}) AS s"),
+        (args.transactions,
+         f"INSERT INTO inventory_transactions (id, stock_item_id, transaction_type, quantity, reference, "
+         f"from_location_id, to_location_id, created_at) "
+         f"SELECT {ident(TXN_BASE)}, {ident(ITEM_BASE, f'n % {lots}')}, "
+         f"CASE WHEN n % 5 = 0 THEN 'TRANSFER' ELSE 'RECEIPT' END, 1, 'BENCH-' || n, "
+         f"CASE WHEN n % 5 = 0 THEN {loc} END, CASE WHEN n % 5 = 0 THEN NULL ELSE {loc} END, {sql['at']} "
+         f"FROM ({sql['series']}) AS s"),
+    ]
+    for count, statement in statements:
+        async with engine.begin() as conn:
+            await conn.execute(text(statement), {"count": count})
+    if not postgres:
+        async with engine.begin() as conn:
+            await conn.execute(text("ANALYZE"))
+
+
+async def timed(session_factory, run, repeat: int):
+    best = None
+    for _ in range(repeat):
+        async with session_factory() as session:
+            start = time.perf_counter()
+            result = await run(InventoryService(session))
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+async def main_async(args) -> None:
+    inventory_service.emit_workflow_event = _no_workflow_event
+    if args.database_url:
+        engine = create_async_engine(args.database_url)
+    else:
+        path = Path(tempfile.mkdtemp(prefix="bench-lot-genealogy-")) / "inventory.db"
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        async with engine.begin() as conn:
+            await conn.run_sync(models.Base.metadata.create_all)
+    session_factory = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+    async with session_factory() as session:
+        service = InventoryService(session)
+        warehouse = await service.create_warehouse(WarehouseCreate(code="BENCH", name="Bench"))
+        location = await service.add_location(warehouse.id, LocationCreate(code="B00"))
+        await session.commit()
+
+    lots = args.layers * args.width
+    start = time.perf_counter()
+    await seed(engine, args, warehouse.id, location.id)
+    print(f"seeded {lots:,} lots, {2 * (lots - args.width):,} links, {args.transactions:,} transactions "
+          f"in {time.perf_counter() - start:.1f} s")
+
+    root, leaf = lot_uuid(args.width // 2), lot_uuid(lots - args.width // 2)
+    for label, lot_id, direction in (("forward from root", root, "forward"), ("backward from leaf", leaf, "backward")):
+        elapsed, trace = await timed(
+            session_factory, lambda service: service.trace_lot(lot_id, direction=direction), args.repeat
+        )
+        depth = max((lot.depth for lot in trace.genealogy), default=0)
+        transactions = sum(lot.transaction_count for lot in trace.genealogy)
+        print(f"trace {label:<20} {elapsed * 1000:8.1f} ms  {len(trace.genealogy):>6,} lots  depth {depth:>4}  "
+              f"{transactions:>9,} transactions  {len(trace.outbound):>4} outbound")
+
+    async def pages(service, search=None, count=args.pages):
+        page = await service.list_lots(search, limit=args.page_size)
+        for _ in range(count - 1):
+            if not page.next_cursor:
+                break
+            page = await service.list_lots(search, limit=args.page_size, cursor=page.next_cursor)
+        return page
+
+    for label, search in (("lot list", None), ("lot search 'lot-12'", "lot-12")):
+        elapsed, _ = await timed(session_factory, lambda service: pages(service, search, count=1), args.repeat)
+        print(f"{label + ' first page':<31} {elapsed * 1000:8.1f} ms")
+        elapsed, _ = await timed(session_factory, lambda service: pages(service, search), args.repeat)
+        print(f"{label + f' {args.pages} pages':<31} {elapsed * 1000:8.1f} ms")
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transactions", type=int, default=1_000_000)
+    parser.add_argument("--layers", type=int, default=64, help="Genealogy depth (lots per chain)")
+    parser.add_argument("--width", type=int, default=3_000, help="Lots per layer")
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement, best is reported")
+    parser.add_argument("--database-url", default=None)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
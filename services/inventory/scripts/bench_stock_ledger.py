@@ -0,0 +1,139 @@
+"""
+Benchmark: contended picking through the stock ledger
+
+Seeds one warehouse with B bins of one lot and lets P concurrent pickers
+issue random quantities through ``InventoryService.issue_stock`` (one
+session and commit per pick) until every picker has done its share. Reports
+picks/second and checks the ledger afterwards: on-hand quantity plus the
+sum of issued ledger rows must equal the received quantity for every bin.
+
+Uses a temporary SQLite file database via ``aiosqlite`` unless
+``--database-url`` points at PostgreSQL (``postgresql+asyncpg://...``, schema
+from the service migrations). Workflow events are not sent.
+
+Usage:
+    python scripts/bench_stock_ledger.py --pickers 200 --picks 20 --bins 4
+    python scripts/bench_stock_ledger.py --pickers 500 --bins 1 --database-url postgresql+asyncpg://...
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import func, select  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.db import models  # noqa: E402
+from app.schemas import LocationCreate, ReceiptCreate, WarehouseCreate  # noqa: E402
+from app.services import inventory_service  # noqa: E402
+from app.services.inventory_service import InventoryService  # noqa: E402
+from app.services.stock_ledger import InsufficientStockError  # noqa: E402
+
+
+async def _no_workflow_event(**_) -> None:
+    return None
+
+
+async def seed(session_factory, bins: int, quantity: float):
+    async with session_factory() as session:
+        service = InventoryService(session)
+        suffix = random.randrange(10**6)
+        warehouse = await service.create_warehouse(WarehouseCreate(code=f"BENCH{suffix}", name="Bench"))
+        stock = []
+        for index in range(bins):
+            location = await service.add_location(warehouse.id, LocationCreate(code=f"B{index:03d}"))
+            stock.append(await service.receive_stock(ReceiptCreate(
+                warehouse_id=warehouse.id, location_id=location.id, sku=f"BENCH-{suffix}",
+                lot_number="LOT1", quantity=quantity,
+            )))
+        await session.commit()
+    return warehouse, stock
+
+
+async def main_async(args) -> None:
+    inventory_service.emit_workflow_event = _no_workflow_event
+    if args.database_url:
+        engine = create_async_engine(args.database_url, pool_size=args.pool_size, max_overflow=0, pool_timeout=300)
+    else:
+        path = Path(tempfile.mkdtemp(prefix="bench-stock-ledger-")) / "inventory.db"
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///{path}", connect_args={"timeout": 300},
+            pool_size=args.pool_size, max_overflow=0, pool_timeout=300,
+        )
+        async with engine.begin() as conn:
+            await conn.run_sync(models.Base.metadata.create_all)
+    session_factory = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    warehouse, stock = await seed(session_factory, args.bins, args.quantity)
+
+    picked = rejected = 0
+    latencies = []
+
+    async def picker(seed_value: int) -> None:
+        nonlocal picked, rejected
+        rng = random.Random(seed_value)
+        for _ in range(args.picks):
+            item = rng.choice(stock)
+            quantity = rng.choice((0.5, 1, 1.25, 2))
+            start = time.perf_counter()
+            async with session_factory() as session:
+                try:
+                    await InventoryService(session).issue_stock(
+                        warehouse_id=warehouse.id, location_id=item.location_id, sku=item.sku,
+                        lot_id=item.lot_id, lot_number=None, quantity=quantity,
+                    )
+                    await session.commit()
+                    picked += 1
+                except InsufficientStockError:
+                    await session.rollback()
+                    rejected += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(picker(i) for i in range(args.pickers)))
+    elapsed = time.perf_counter() - start
+
+    mismatches = 0
+    async with session_factory() as session:
+        for item in stock:
+            on_hand = (await session.get(models.StockItem, item.id)).quantity
+            issued = await session.scalar(
+                select(func.coalesce(func.sum(models.InventoryTransaction.quantity), 0)).where(
+                    models.InventoryTransaction.stock_item_id == item.id,
+                    models.InventoryTransaction.transaction_type == models.InventoryTransactionType.ADJUSTMENT,
+                )
+            )
+            if Decimal(on_hand) + Decimal(issued) != Decimal(str(args.quantity)) or on_hand < 0:
+                mismatches += 1
+    await engine.dispose()
+
+    latencies.sort()
+    print(f"pickers        {args.pickers} x {args.picks} picks on {args.bins} bin(s)")
+    print(f"picked         {picked:,} (rejected for insufficient stock: {rejected:,})")
+    print(f"elapsed        {elapsed:.2f} s")
+    print(f"throughput     {(picked + rejected) / elapsed:,.0f} picks/s")
+    print(f"latency        p50 {latencies[len(latencies) // 2] * 1000:.1f} ms  "
+          f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f} ms")
+    print(f"ledger         {args.bins - mismatches}/{args.bins} bins reconcile (lost updates: {mismatches})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pickers", type=int, default=200)
+    parser.add_argument("--picks", type=int, default=20, help="Picks per picker")
+    parser.add_argument("--bins", type=int, default=4)
+    parser.add_argument("--quantity", type=float, default=2500, help="Received quantity per bin")
+    parser.add_argument("--pool-size", type=int, default=20)
+    parser.add_argument("--database-url", default=None)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+from decimal import Decimal
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+sys.modules.pop("app", None)
+
+from app.db import models  # noqa: E402
+from app.integration import subscribers as subscribers_module  # noqa: E402
+from app.integration.subscribers import InventoryEventSubscribers  # noqa: E402
+from app.schemas import BatchMovementCreate, LocationCreate, MovementLine, WarehouseCreate  # noqa: E402
+from app.services import inventory_service  # noqa: E402
+from app.services.inventory_service import InventoryService  # noqa: E402
+from app.services.stock_ledger import InsufficientStockError  # noqa: E402
+
+
+async def _no_workflow_event(**_) -> None:
+    return None
+
+
+class RecordingBus:
+    def __init__(self) -> None:
+        self.handlers = {}
+        self.published: list[str] = []
+
+    async def subscribe(self, subject, handler, queue=None) -> int:
+        self.handlers[subject] = handler
+        return len(self.handlers)
+
+    async def unsubscribe(self, sid) -> None:
+        return None
+
+    async def publish(self, event_type, tenant, data) -> None:
+        self.published.append(event_type)
+
+
+@pytest_asyncio.fixture
+async def engine(tmp_path, monkeypatch):
+    monkeypatch.setattr(inventory_service, "emit_workflow_event", _no_workflow_event)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'inventory.db'}", connect_args={"timeout": 60})
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def session_factory(engine):
+    return sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+
+async def _warehouse(session_factory):
+    async with session_factory() as session:
+        service = InventoryService(session)
+        warehouse = await service.create_warehouse(WarehouseCreate(code="WH1", name="Warehouse 1"))
+        bin_a = await service.add_location(warehouse.id, LocationCreate(code="A1"))
+        bin_b = await service.add_location(warehouse.id, LocationCreate(code="B1"))
+        await session.commit()
+    return warehouse, bin_a, bin_b
+
+
+async def _total_stock(session_factory) -> Decimal:
+    async with session_factory() as session:
+        return Decimal(await session.scalar(select(func.coalesce(func.sum(models.StockItem.quantity), 0))))
+
+
+async def _count(session_factory, model) -> int:
+    async with session_factory() as session:
+        return await session.scalar(select(func.count()).select_from(model))
+
+
+@pytest.mark.asyncio
+async def test_receipt_batch_is_set_based_and_idempotent(engine, session_factory):
+    warehouse, bin_a, bin_b = await _warehouse(session_factory)
+    # 1000 Zeilen auf 250 Chargen und zwei Plätze
+    lines = [
+        MovementLine(sku=f"SKU{i % 50}", lot_number=f"LOT{i % 250}", location_id=bin_b.id if i % 4 == 0 else None, quantity=0.5)
+        for i in range(1000)
+    ]
+    payload = BatchMovementCreate(
+        movement_type="receipt", warehouse_id=warehouse.id, location_id=bin_a.id,
+        reference="PO-1", idempotency_key="po-1", lines=lines,
+    )
+
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    async with session_factory() as session:
+        result = await InventoryService(session).book_batch(payload)
+        await session.commit()
+
+    assert len(statements) < 20
+    assert (result.line_count, result.total_quantity, result.duplicate) == (1000, 500.0, False)
+    assert await _total_stock(session_factory) == Decimal("500")
+    assert await _count(session_factory, models.InventoryTransaction) == 1000
+    assert await _count(session_factory, models.Lot) == 250
+    assert await _count(session_factory, models.EpcisEvent) == await _count(session_factory, models.StockItem)
+
+    async with session_factory() as session:
+        again = await InventoryService(session).book_batch(payload)
+        await session.commit()
+    assert again.duplicate and again.id == result.id
+    assert await _total_stock(session_factory) == Decimal("500")
+
+
+@pytest.mark.asyncio
+async def test_issue_batch_is_all_or_nothing(session_factory):
+    warehouse, bin_a, _ = await _warehouse(session_factory)
+    async with session_factory() as session:
+        await InventoryService(session).book_batch(BatchMovementCreate(
+            movement_type="receipt", warehouse_id=warehouse.id, location_id=bin_a.id, idempotency_key="in",
+            lines=[MovementLine(sku="A", lot_number="L1", quantity=5), MovementLine(sku="B", lot_number="L2", quantity=1)],
+        ))
+        await session.commit()
+
+    issue = BatchMovementCreate(
+        movement_type="issue", warehouse_id=warehouse.id, idempotency_key="out",
+        lines=[MovementLine(sku="A", quantity=2), MovementLine(sku="B", lot_number="L2", quantity=1),
+               MovementLine(sku="A", lot_number="L1", quantity=3.5)],
+    )
+    async with session_factory() as session:
+        with pytest.raises(InsufficientStockError):
+            await InventoryService(session).book_batch(issue)
+        await session.rollback()
+    assert await _total_stock(session_factory) == Decimal("6")
+
+    async with session_factory() as session:
+        await InventoryService(session).book_batch(issue.model_copy(update={"lines": issue.lines[:2]}))
+        await session.commit()
+    assert await _total_stock(session_factory) == Decimal("3")
+
+
+@pytest.mark.asyncio
+async def test_subscribers_bound_concurrency_and_skip_redeliveries(session_factory, monkeypatch):
+    warehouse, bin_a, _ = await _warehouse(session_factory)
+    bus = RecordingBus()
+    subscribers = InventoryEventSubscribers(bus, session_factory, concurrency=3)
+    await subscribers.start()
+
+    running = peak = 0
+    book = InventoryService.book_batch
+
+    async def tracking_book(self, payload):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        try:
+            return await book(self, payload)
+        finally:
+            running -= 1
+
+    monkeypatch.setattr(subscribers_module.InventoryService, "book_batch", tracking_book)
+
+    messages = [
+        {"data": {
+            "eventId": str(uuid4()), "warehouseId": str(warehouse.id), "defaultLocationId": str(bin_a.id),
+            "lines": [{"sku": f"SKU{n}", "quantity": 2}, {"sku": f"SKU{n}", "quantity": 1}, {"quantity": 1}],
+        }}
+        for n in range(12)
+    ]
+    handler = bus.handlers["purchase.receipt.posted"]
+    for message in messages + messages[:4]:
+        await handler(message)
+    await subscribers.stop()
+
+    assert 1 < peak <= 3
+    assert await _count(session_factory, models.MovementBatch) == 12
+    assert await _total_stock(session_factory) == Decimal("36")
+    assert bus.published.count("inventory.goods.received.batch") == 12
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+sys.modules.pop("app", None)
+
+from app.config import settings  # noqa: E402
+from app.db import models  # noqa: E402
+from app.integration.outbox import EpcisOutboxRelay  # noqa: E402
+from app.schemas import EpcisEventCreate  # noqa: E402
+from app.services.epcis_capture import EpcisCapture  # noqa: E402
+from app.services.epcis_retention import EpcisRetention  # noqa: E402
+
+
+class RecordingBus:
+    def __init__(self, fail_after: int | None = None) -> None:
+        self.published: list[dict] = []
+        self.fail_after = fail_after
+
+    async def publish(self, event_type, tenant, data) -> None:
+        if self.fail_after is not None and len(self.published) >= self.fail_after:
+            raise ConnectionError("nats down")
+        self.published.append(data)
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'inventory.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+    yield sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    await engine.dispose()
+
+
+def _event(n: int, *, days_ago: int = 0, **extensions) -> EpcisEventCreate:
+    return EpcisEventCreate(
+        event_type="ObjectEvent",
+        event_time=datetime.utcnow() - timedelta(days=days_ago, minutes=n),
+        biz_step="receiving",
+        sku=f"SKU{n % 7}",
+        quantity=1,
+        extensions={"poNumber": f"PO-{n}", **extensions},
+        idempotency_key=f"evt-{n}",
+    )
+
+
+async def _count(session_factory, model) -> int:
+    async with session_factory() as session:
+        return await session.scalar(select(func.count()).select_from(model))
+
+
+async def _capture(session_factory, events, tenant_id="t1"):
+    async with session_factory() as session:
+        result = await EpcisCapture(session, tenant_id).capture(events)
+        await session.commit()
+    return result
+
+
+@pytest.mark.asyncio
+async def test_capture_dedups_within_and_across_documents(session_factory):
+    document = [_event(n) for n in range(2000)] + [_event(n) for n in range(10)]
+    captured, duplicates = await _capture(session_factory, document)
+    assert (len(captured), duplicates) == (2000, 10)
+
+    captured, duplicates = await _capture(session_factory, [_event(n) for n in range(1990, 2010)])
+    assert (len(captured), duplicates) == (10, 10)
+    assert await _count(session_factory, models.EpcisEvent) == 2010
+    assert await _count(session_factory, models.EpcisOutbox) == 2010
+
+
+@pytest.mark.asyncio
+async def test_event_keys_are_deduplicated_per_tenant(session_factory):
+    await _capture(session_factory, [_event(n) for n in range(3)], tenant_id="t1")
+    # Gleiche Idempotenzschlüssel eines anderen Tenants sind eigene Events
+    captured, duplicates = await _capture(session_factory, [_event(n) for n in range(3)], tenant_id="t2")
+    assert (len(captured), duplicates) == (3, 0)
+
+    async with session_factory() as session:
+        found = await EpcisCapture(session, "t2").find("evt-1")
+        missing = await EpcisCapture(session, "t3").find("evt-1")
+    assert found.tenant_id == "t2" and missing is None
+
+
+@pytest.mark.asyncio
+async def test_outbox_relay_publishes_in_order_and_keeps_failed_rows(session_factory):
+    await _capture(session_factory, [_event(n) for n in range(30)])
+
+    flaky = RecordingBus(fail_after=12)
+    relay = EpcisOutboxRelay(flaky, session_factory, batch_size=20)
+    assert await relay.relay_once() == 12
+    async with session_factory() as session:
+        stuck = await session.scalar(select(models.EpcisOutbox).order_by(models.EpcisOutbox.id).limit(1))
+    assert (stuck.attempts, stuck.last_error) == (1, "nats down")
+
+    bus = RecordingBus()
+    relay = EpcisOutboxRelay(bus, session_factory, batch_size=20)
+    assert await relay.relay_once() == 18
+    assert [data["id"] for data in flaky.published + bus.published] == [
+        data["id"] for data in sorted(flaky.published + bus.published, key=lambda data: data["time"], reverse=True)
+    ]
+    assert await _count(session_factory, models.EpcisOutbox) == 0
+
+
+@pytest.mark.asyncio
+async def test_retention_deletes_and_pseudonymizes_in_chunks(session_factory, monkeypatch):
+    monkeypatch.setattr(settings, "EPCIS_RETENTION_DAYS", 365)
+    monkeypatch.setattr(settings, "EPCIS_ANONYMIZE_AFTER_DAYS", 30)
+    monkeypatch.setattr(settings, "EPCIS_ANONYMIZE_KEYS", ["email", "userName"])
+    # Direkt gespeichert: diese Events wurden erfasst, als sie noch aktuell waren
+    async with session_factory() as session:
+        for n, days_ago, extensions, tenant_id in (
+            [(n, 400, {"email": "a@b.de"}, "t1") for n in range(25)]
+            + [(100 + n, 60, {"email": "a@b.de", "userName": "x"}, "t1") for n in range(45)]
+            + [(200 + n, 60, {}, "t1") for n in range(5)]
+            + [(300 + n, 0, {"email": "a@b.de"}, "t1") for n in range(10)]
+            + [(400, 60, {"email": "other"}, "t2")]
+        ):
+            event = _event(n, days_ago=days_ago, **extensions)
+            session.add(models.EpcisEvent(
+                tenant_id=tenant_id, event_key=event.idempotency_key, event_type=models.EpcisEventType.OBJECT,
+                event_time=event.event_time, sku=event.sku, quantity=event.quantity, extensions=event.extensions,
+            ))
+        await session.commit()
+
+    retention = EpcisRetention(session_factory, chunk=10)
+    assert await retention.run("t1") == {"deleted": 25, "anonymized": 45}
+    assert await retention.run("t1") == {"deleted": 0, "anonymized": 0}
+
+    async with session_factory() as session:
+        events = (await session.execute(select(models.EpcisEvent))).scalars().all()
+        state = await session.get(models.EpcisRetentionState, "t1")
+    assert len(events) == 61
+    old = [event for event in events if event.tenant_id == "t1" and event.event_time < datetime.utcnow() - timedelta(days=30)]
+    assert len(old) == 50 and all(set(event.extensions) == {"poNumber"} for event in old)
+    recent = [event for event in events if event.tenant_id == "t1" and event.event_time >= datetime.utcnow() - timedelta(days=30)]
+    assert all("email" in event.extensions for event in recent)
+    assert next(event for event in events if event.tenant_id == "t2").extensions["email"] == "other"
+    assert state.anonymized_until == max(event.event_time for event in old)
+
+    # Nachträglich erfasste Alt-Events werden schon bei der Erfassung bereinigt
+    captured, _ = await _capture(session_factory, [_event(500, days_ago=90, email="late@b.de")])
+    assert captured[0]["extensions"] == {"poNumber": "PO-500"}
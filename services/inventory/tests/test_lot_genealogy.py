@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+sys.modules.pop("app", None)
+
+from app.db import models  # noqa: E402
+from app.schemas import (  # noqa: E402
+    LocationCreate,
+    ReceiptCreate,
+    TransformationCreate,
+    TransformationInput,
+    WarehouseCreate,
+)
+from app.services import inventory_service  # noqa: E402
+from app.services.inventory_service import InventoryService  # noqa: E402
+from app.services.lot_genealogy import LotGenealogy  # noqa: E402
+
+DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+
+async def _no_workflow_event(**_) -> None:
+    return None
+
+
+@pytest_asyncio.fixture
+async def session(monkeypatch) -> AsyncSession:
+    monkeypatch.setattr(inventory_service, "emit_workflow_event", _no_workflow_event)
+    engine = create_async_engine(DATABASE_URL, future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+    async_session = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    async with async_session() as session:
+        yield session
+    await engine.dispose()
+
+
+async def _setup(service: InventoryService):
+    warehouse = await service.create_warehouse(WarehouseCreate(code="WH1", name="Warehouse 1"))
+    location = await service.add_location(warehouse.id, LocationCreate(code="A1"))
+
+    async def receive(sku: str, lot_number: str, quantity: float):
+        return await service.receive_stock(ReceiptCreate(
+            warehouse_id=warehouse.id, location_id=location.id, sku=sku, lot_number=lot_number, quantity=quantity,
+        ))
+
+    return warehouse, location, receive
+
+
+@pytest.mark.asyncio
+async def test_trace_follows_transformations_in_both_directions(session: AsyncSession):
+    service = InventoryService(session)
+    warehouse, location, receive = await _setup(service)
+    seed = await receive("WHEAT", "SEED-1", 100)
+    salt = await receive("SALT", "SALT-1", 10)
+
+    flour = await service.record_transformation(TransformationCreate(
+        inputs=[TransformationInput(stock_item_id=seed.id, quantity=80)],
+        output=ReceiptCreate(warehouse_id=warehouse.id, location_id=location.id, sku="FLOUR", lot_number="FL-1", quantity=60),
+        reference="MILL-1",
+    ))
+    bread = await service.record_transformation(TransformationCreate(
+        inputs=[TransformationInput(stock_item_id=flour.output.id, quantity=50),
+                TransformationInput(stock_item_id=salt.id, quantity=1)],
+        output=ReceiptCreate(warehouse_id=warehouse.id, location_id=location.id, sku="BREAD", lot_number="BR-1", quantity=90),
+        reference="BAKE-1",
+    ))
+    await service.issue_stock(
+        warehouse_id=warehouse.id, location_id=location.id, sku="BREAD", lot_id=bread.output.lot_id,
+        lot_number=None, quantity=40, reference="CUSTOMER-4711",
+    )
+
+    forward = await service.trace_lot(seed.lot_id, direction="forward")
+    assert [(lot.lot_number, lot.depth) for lot in forward.genealogy] == [("FL-1", 1), ("BR-1", 2)]
+    assert {"CUSTOMER-4711", "MILL-1"} <= {txn.reference for txn in forward.outbound}
+    assert len(forward.links) == 2
+
+    backward = await service.trace_lot(bread.output.lot_id, direction="backward")
+    assert {(lot.lot_number, lot.depth) for lot in backward.genealogy} == {("FL-1", 1), ("SALT-1", 1), ("SEED-1", 2)}
+    assert all(lot.direction == "backward" for lot in backward.genealogy)
+    seed_entry = next(lot for lot in backward.genealogy if lot.lot_number == "SEED-1")
+    assert (seed_entry.quantity_on_hand, seed_entry.transaction_count) == (20.0, 2)
+
+    both = await service.trace_lot(flour.output.lot_id)
+    assert {(lot.lot_number, lot.direction) for lot in both.genealogy} == {("SEED-1", "backward"), ("BR-1", "forward")}
+
+
+@pytest.mark.asyncio
+async def test_trace_terminates_on_cycles(session: AsyncSession):
+    service = InventoryService(session)
+    _, _, receive = await _setup(service)
+    a = await receive("A", "A-1", 1)
+    b = await receive("B", "B-1", 1)
+    genealogy = LotGenealogy(session)
+    await genealogy.link_many([(a.lot_id, None)], b.lot_id)
+    await genealogy.link_many([(b.lot_id, None)], a.lot_id)
+
+    assert await genealogy.trace(a.lot_id, "forward") == {b.lot_id: 1}
+    assert await genealogy.trace(a.lot_id, "backward", max_depth=3) == {b.lot_id: 1}
+
+
+@pytest.mark.asyncio
+async def test_list_lots_pages_by_cursor(session: AsyncSession):
+    service = InventoryService(session)
+    _, _, receive = await _setup(service)
+    for n in range(7):
+        await receive("SKU-X" if n % 2 else "SKU-Y", f"LOT-{n:02d}", 1)
+
+    first = await service.list_lots(limit=3)
+    assert first.total == 7 and len(first.items) == 3
+    seen = [item.lot_number for item in first.items]
+    cursor = first.next_cursor
+    while cursor:
+        page = await service.list_lots(limit=3, cursor=cursor)
+        assert page.total is None
+        seen += [item.lot_number for item in page.items]
+        cursor = page.next_cursor
+    assert seen == [f"LOT-{n:02d}" for n in range(7)]
+
+    filtered = await service.list_lots(search="sku-x", limit=2)
+    assert filtered.total == 3
+    assert [item.lot_number for item in filtered.items] == ["LOT-01", "LOT-03"]
+
+    with pytest.raises(ValueError):
+        await service.list_lots(cursor="not-a-cursor")
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+sys.modules.pop("app", None)
+
+from app.utils.ratelimit import RateLimiter  # noqa: E402
+
+
+def test_limit_per_key():
+    limiter = RateLimiter(limit_per_minute=2)
+    assert limiter.check("a")
+    assert limiter.check("a")
+    assert not limiter.check("a")
+    assert limiter.check("b")
+
+
+def test_bucket_storage_is_bounded():
+    limiter = RateLimiter(limit_per_minute=5, max_keys=100)
+    for i in range(10_000):
+        limiter.check(f"client-{i}")
+    assert len(limiter) <= 100
+    assert limiter.evictions >= 9_900
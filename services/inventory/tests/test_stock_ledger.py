@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+sys.modules.pop("app", None)
+
+from app.db import models  # noqa: E402
+from app.schemas import LocationCreate, ReceiptCreate, TransferCreate, WarehouseCreate  # noqa: E402
+from app.services import inventory_service  # noqa: E402
+from app.services.inventory_service import InventoryService  # noqa: E402
+from app.services.stock_ledger import InsufficientStockError, StockLedger  # noqa: E402
+
+PICKERS = 300
+
+
+async def _no_workflow_event(**_) -> None:
+    return None
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path, monkeypatch):
+    # Ohne Workflow-Service würde jede Buchung auf den HTTP-Timeout warten
+    monkeypatch.setattr(inventory_service, "emit_workflow_event", _no_workflow_event)
+    # Dateidatenbank: jede Session bekommt eine eigene Verbindung wie in Produktion
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'inventory.db'}",
+        connect_args={"timeout": 60},
+        pool_size=50,
+        max_overflow=0,
+        pool_timeout=60,
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+    yield sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    await engine.dispose()
+
+
+async def _setup(session_factory, quantity: float):
+    async with session_factory() as session:
+        service = InventoryService(session)
+        warehouse = await service.create_warehouse(WarehouseCreate(code="WH1", name="Warehouse 1"))
+        bin_a = await service.add_location(warehouse.id, LocationCreate(code="A1"))
+        bin_b = await service.add_location(warehouse.id, LocationCreate(code="B1"))
+        stock = await service.receive_stock(
+            ReceiptCreate(warehouse_id=warehouse.id, location_id=bin_a.id, sku="SKU1", lot_number="LOT1", quantity=quantity)
+        )
+        await session.commit()
+    return warehouse, bin_a, bin_b, stock
+
+
+async def _quantity(session_factory, stock_item_id) -> Decimal:
+    async with session_factory() as session:
+        item = await session.get(models.StockItem, stock_item_id)
+        return item.quantity
+
+
+@pytest.mark.asyncio
+async def test_parallel_pickers_lose_no_updates(session_factory):
+    warehouse, bin_a, _, stock = await _setup(session_factory, 200)
+
+    async def pick() -> bool:
+        async with session_factory() as session:
+            try:
+                await InventoryService(session).issue_stock(
+                    warehouse_id=warehouse.id, location_id=bin_a.id, sku="SKU1",
+                    lot_id=stock.lot_id, lot_number=None, quantity=1,
+                )
+            except InsufficientStockError:
+                await session.rollback()
+                return False
+            await session.commit()
+            return True
+
+    results = await asyncio.gather(*(pick() for _ in range(PICKERS)))
+
+    assert sum(results) == 200
+    assert await _quantity(session_factory, stock.id) == Decimal("0")
+    async with session_factory() as session:
+        issued = await session.scalar(
+            select(func.count()).where(
+                models.InventoryTransaction.stock_item_id == stock.id,
+                models.InventoryTransaction.transaction_type == models.InventoryTransactionType.ADJUSTMENT,
+            )
+        )
+    assert issued == 200
+
+
+@pytest.mark.asyncio
+async def test_opposite_transfers_conserve_stock(session_factory):
+    warehouse, bin_a, bin_b, stock = await _setup(session_factory, 100)
+    async with session_factory() as session:
+        back = await InventoryService(session).transfer_stock(
+            TransferCreate(
+                source_stock_item_id=stock.id, source_warehouse_id=warehouse.id, source_location_id=bin_a.id,
+                destination_warehouse_id=warehouse.id, destination_location_id=bin_b.id, lot_id=stock.lot_id,
+                quantity=50,
+            )
+        )
+        await session.commit()
+
+    async def transfer(source, source_bin, destination_bin) -> None:
+        async with session_factory() as session:
+            try:
+                await InventoryService(session).transfer_stock(
+                    TransferCreate(
+                        source_stock_item_id=source, source_warehouse_id=warehouse.id, source_location_id=source_bin,
+                        destination_warehouse_id=warehouse.id, destination_location_id=destination_bin,
+                        lot_id=stock.lot_id, quantity=0.7,
+                    )
+                )
+            except InsufficientStockError:
+                await session.rollback()
+                return
+            await session.commit()
+
+    await asyncio.gather(*(
+        transfer(stock.id, bin_a.id, bin_b.id) if i % 2 else transfer(back.id, bin_b.id, bin_a.id)
+        for i in range(PICKERS)
+    ))
+
+    quantity_a = await _quantity(session_factory, stock.id)
+    quantity_b = await _quantity(session_factory, back.id)
+    assert quantity_a >= 0 and quantity_b >= 0
+    assert quantity_a + quantity_b == Decimal("100")
+
+
+@pytest.mark.asyncio
+async def test_receipts_are_exact_and_create_one_stock_item(session_factory):
+    warehouse, bin_a, bin_b, stock = await _setup(session_factory, 0.1)
+
+    async def ensure(_) -> object:
+        async with session_factory() as session:
+            stock_item_id = await StockLedger(session).ensure_stock_item(warehouse.id, bin_b.id, stock.lot_id)
+            await session.commit()
+            return stock_item_id
+
+    assert len(set(await asyncio.gather(*(ensure(i) for i in range(20))))) == 1
+
+    async with session_factory() as session:
+        service = InventoryService(session)
+        for _ in range(9):
+            result = await service.receive_stock(
+                ReceiptCreate(warehouse_id=warehouse.id, location_id=bin_a.id, sku="SKU1", lot_number="LOT1", quantity=0.1)
+            )
+        await session.commit()
+    assert result.id == stock.id
+    assert await _quantity(session_factory, stock.id) == Decimal("1.000")
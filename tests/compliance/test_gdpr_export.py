@@ -0,0 +1,186 @@
+"""
+GDPR Export Tests
+Streaming NDJSON/ZIP export over the personal-data registry
+"""
+
+import json
+import os
+import time
+import zipfile
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.v1.endpoints import gdpr as gdpr_endpoints
+from app.services import gdpr_export_service as gdpr_export
+
+
+metadata = MetaData()
+
+audit_logs = Table(
+    "audit_logs", metadata,
+    Column("id", String, primary_key=True),
+    Column("timestamp", DateTime),
+    Column("user_id", String),
+    Column("tenant_id", String),
+    Column("action", String),
+)
+
+orders = Table(
+    "orders", metadata,
+    Column("id", String, primary_key=True),
+    Column("created_by", String),
+    Column("approved_by", String),
+    Column("created_at", DateTime),
+)
+
+counters = Table(
+    "counters", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer),  # numeric ids cannot reference a user
+)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(audit_logs.insert(), [
+            {"id": f"a{i}", "timestamp": datetime(2025, 1, 1, 0, 0, i % 60),
+             "user_id": "u1" if i % 2 else "u2", "tenant_id": "t1", "action": "update"}
+            for i in range(2500)
+        ])
+        conn.execute(orders.insert(), [
+            {"id": "o1", "created_by": "u1", "approved_by": None, "created_at": datetime(2025, 1, 2)},
+            {"id": "o2", "created_by": "u2", "approved_by": "u1", "created_at": datetime(2025, 1, 3)},
+            {"id": "o3", "created_by": "u2", "approved_by": None, "created_at": datetime(2025, 1, 4)},
+        ])
+
+    monkeypatch.setattr(gdpr_export, "_registry", {})
+    monkeypatch.setattr(gdpr_export, "_discovered", True)
+    for source in gdpr_export.discover_personal_data_sources(metadata):
+        gdpr_export.register_personal_data_source(source)
+    monkeypatch.setattr(
+        gdpr_export, "load_subject",
+        lambda db, user_id, tenant_id: {"id": user_id, "email": f"{user_id}@example.com"}
+    )
+
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def test_discovery_finds_subject_columns():
+    sources = {s.name: s for s in gdpr_export.discover_personal_data_sources(metadata)}
+
+    assert set(sources) == {"audit_logs", "orders"}
+    assert sources["audit_logs"].category == "audit_logs"
+    assert list(sources["orders"].subject_columns) == ["created_by", "approved_by"]
+
+
+def test_ndjson_export_is_complete(db):
+    lines = [json.loads(line) for line in gdpr_export.iter_ndjson(db, "u1", "t1")]
+
+    assert lines[0]["_type"] == "export_metadata"
+    assert lines[1] == {"_type": "personal_data", "id": "u1", "email": "u1@example.com"}
+    # No 1,000 row cap on audit logs
+    assert sum(1 for line in lines if line["_type"] == "audit_logs") == 1250
+    assert {line["id"] for line in lines if line["_type"] == "orders"} == {"o1", "o2"}
+    assert lines[-1] == {"_type": "export_summary", "row_counts": {"audit_logs": 1250, "orders": 2}}
+
+
+def test_stream_batches_do_not_change_result(db):
+    source = next(s for s in gdpr_export.get_personal_data_sources() if s.name == "audit_logs")
+    rows = list(gdpr_export.iter_source_rows(db, source, "u2", "t1", batch_size=7))
+
+    assert len(rows) == 1250
+    assert rows == sorted(rows, key=lambda r: r["timestamp"])
+
+
+def test_inline_export_fills_created_entities(db):
+    data = gdpr_export.build_inline_export(db, "u2", None)
+
+    assert len(data["audit_logs"]) == 1250
+    assert {row["id"] for row in data["created_entities"]["orders"]} == {"o2", "o3"}
+
+
+def test_created_entities_only_reference_the_subject(db):
+    data = gdpr_export.build_inline_export(db, "u1", None)
+
+    # o2 was created by u2: only key, timestamp and u1's role in the row
+    assert data["created_entities"]["orders"] == [
+        {"id": "o1", "created_at": "2025-01-02T00:00:00", "subject_roles": ["created_by"]},
+        {"id": "o2", "created_at": "2025-01-03T00:00:00", "subject_roles": ["approved_by"]},
+    ]
+
+
+def test_zip_job_and_download_token(db, tmp_path):
+    manager = gdpr_export.GDPRExportJobManager(export_dir=tmp_path, session_factory=lambda: db)
+    job = manager.submit("u1", "t1", {"portability": {"schema_version": "1.0"}})
+
+    assert manager.resolve_download(job.id, job.token) is None  # not finished yet
+    manager.run(job.id)
+
+    assert manager.get(job.id).status == "completed"
+    assert manager.resolve_download(job.id, "wrong-token") is None
+    finished = manager.resolve_download(job.id, job.token)
+    with zipfile.ZipFile(finished.file_path) as zf:
+        names = set(zf.namelist())
+        assert {"personal_data.json", "export_metadata.json",
+                "audit_logs/audit_logs.ndjson", "created_entities/orders.ndjson"} <= names
+        assert len(zf.read("audit_logs/audit_logs.ndjson").splitlines()) == 1250
+        meta = json.loads(zf.read("export_metadata.json"))
+        assert meta["row_counts"] == {"audit_logs": 1250, "orders": 2}
+        assert meta["portability"] == {"schema_version": "1.0"}
+
+
+def test_job_state_is_shared_through_export_dir(db, tmp_path):
+    submitting = gdpr_export.GDPRExportJobManager(export_dir=tmp_path, session_factory=lambda: db)
+    job = submitting.submit("u1", "t1")
+    submitting.run(job.id)
+
+    # Another replica with the same directory sees status and file
+    other = gdpr_export.GDPRExportJobManager(export_dir=tmp_path)
+    assert other.get(job.id).row_counts == {"audit_logs": 1250, "orders": 2}
+    assert other.resolve_download(job.id, job.token).file_path == str(tmp_path / f"{job.id}.zip")
+    assert job.token not in (tmp_path / f"{job.id}.json").read_text()
+    assert other.get("../" + job.id) is None
+
+
+def test_cleanup_removes_expired_jobs_and_files(db, tmp_path):
+    manager = gdpr_export.GDPRExportJobManager(export_dir=tmp_path, session_factory=lambda: db)
+    expired = manager.submit("u1", "t1")
+    manager.run(expired.id)
+    live = manager.submit("u2", "t1")
+
+    stale = manager.get(expired.id)
+    stale.created_at -= timedelta(seconds=gdpr_export.DOWNLOAD_TOKEN_TTL_SECONDS + 1)
+    manager._save(stale)
+    old = time.time() - gdpr_export.DOWNLOAD_TOKEN_TTL_SECONDS - 1
+    os.utime(tmp_path / f"{expired.id}.zip", (old, old))
+    (tmp_path / "orphan.zip").write_bytes(b"")
+
+    assert manager.get(expired.id) is None
+    assert manager.cleanup_expired() == 2
+    assert not manager.cleanup_due()
+    assert {p.name for p in tmp_path.iterdir()} == {"orphan.zip", f"{live.id}.json"}
+
+
+def _request(**claims):
+    return SimpleNamespace(state=SimpleNamespace(token_claims=claims))
+
+
+def test_exports_are_limited_to_subject_or_admin():
+    gdpr_endpoints._authorize_subject(_request(sub="u1"), "u1")
+    gdpr_endpoints._authorize_subject(_request(token_type="dev"), "u1")
+    for request in (_request(sub="u2"), _request(), SimpleNamespace(state=SimpleNamespace())):
+        with pytest.raises(HTTPException) as denied:
+            gdpr_endpoints._authorize_subject(request, "u1")
+        assert denied.value.status_code == 403
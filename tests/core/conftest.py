@@ -0,0 +1,48 @@
+"""
+Gemeinsame Fixtures für die Core-Tests: SQLite-Engines mit angehängten Domänen-Schemas
+"""
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import StaticPool
+
+
+def _attach_schemas(engine, schemas, directory=None):
+    # SQLite kennt keine Schemas: jedes domain_* wird bei jeder neuen Verbindung als
+    # eigene Datenbank angehängt (in-memory oder als Datei unter ``directory``)
+    @event.listens_for(engine, "connect")
+    def _attach(dbapi_conn, _):
+        for schema in schemas:
+            path = ":memory:" if directory is None else directory / f"{schema}.db"
+            dbapi_conn.execute(f"ATTACH DATABASE '{path}' AS {schema}")
+
+
+@pytest.fixture
+def attach_schemas():
+    """Hängt Schemas an eine bestehende (z.B. asynchrone) Engine an: ``attach_schemas(engine.sync_engine, "domain_erp")``."""
+    return lambda engine, *schemas: _attach_schemas(engine, schemas)
+
+
+@pytest.fixture
+def sqlite_engine(tmp_path):
+    """
+    Factory für SQLite-Engines mit den übergebenen Schemas, z.B. ``sqlite_engine("domain_erp")``.
+
+    Standardmäßig liegt alles in einer einzigen in-memory-Verbindung (StaticPool, auch aus dem
+    Threadpool nutzbar). ``on_disk=True`` legt Haupt- und Schema-Datenbanken unter ``tmp_path`` an,
+    damit parallele Sessions eigene Verbindungen bekommen.
+    """
+    engines = []
+
+    def make(*schemas, on_disk=False):
+        if on_disk:
+            engine = create_engine(f"sqlite:///{tmp_path / 'main.db'}")
+        else:
+            engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+        _attach_schemas(engine, schemas, tmp_path if on_disk else None)
+        engines.append(engine)
+        return engine
+
+    yield make
+    for engine in engines:
+        engine.dispose()
@@ -0,0 +1,230 @@
+"""
+Unit Tests für die Admission Control (Prioritäten, Tenant-Quoten, adaptives Report-Limit)
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.middleware.admission import (
+    ADJUST_INTERVAL,
+    INCREASE_INTERVAL,
+    INTERACTIVE,
+    PROBE_INTERVAL,
+    REPORTS,
+    SHARED_TENANT,
+    AdmissionController,
+    AdmissionMiddleware,
+    Rejected,
+    TenantCounter,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class DictCounter(TenantCounter):
+    def __init__(self):
+        self.leases = {}
+
+    async def acquire(self, tenant, permit_id, limit):
+        leases = self.leases.setdefault(tenant, set())
+        if len(leases) >= limit:
+            return False
+        leases.add(permit_id)
+        return True
+
+    async def release(self, tenant, permit_id):
+        self.leases[tenant].discard(permit_id)
+
+
+async def _settle():
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+def test_interactive_requests_are_dispatched_before_reports():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=2, report_max=1, tenant_limit=10)
+        report = await controller.acquire(REPORTS, "t1")
+        interactive = await controller.acquire(INTERACTIVE, "t1")
+        queued_report = asyncio.ensure_future(controller.acquire(REPORTS, "t2"))
+        queued_interactive = asyncio.ensure_future(controller.acquire(INTERACTIVE, "t2"))
+        await _settle()
+        assert controller.queued == {INTERACTIVE: 1, REPORTS: 1}
+
+        await controller.release(report)
+        await _settle()
+        assert queued_interactive.done() and not queued_report.done()
+        await controller.release(interactive)
+        await _settle()
+        assert queued_report.done()
+        return controller
+
+    controller = asyncio.run(scenario())
+    assert controller.in_flight == {INTERACTIVE: 1, REPORTS: 1}
+
+
+def test_tenants_get_fair_share_of_free_slots():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=2, tenant_limit=2)
+        held = [await controller.acquire(INTERACTIVE, "a"), await controller.acquire(INTERACTIVE, "a")]
+        waiting_a = [asyncio.ensure_future(controller.acquire(INTERACTIVE, "a")) for _ in range(3)]
+        waiting_b = asyncio.ensure_future(controller.acquire(INTERACTIVE, "b"))
+        await _settle()
+        # Tenant b kam zuletzt, hat aber nichts in Arbeit und erhält den nächsten Platz
+        await controller.release(held[0])
+        await _settle()
+        assert waiting_b.done() and not any(task.done() for task in waiting_a)
+
+        # Quote je Tenant: a bleibt bei zwei Plätzen, auch wenn die Replica frei ist
+        controller.max_concurrency = 10
+        await controller.release(held[1])
+        await _settle()
+        assert sum(task.done() for task in waiting_a) == 2
+        assert controller.tenant_in_flight == {"a": 2, "b": 1}
+        for task in waiting_a:
+            task.cancel()
+        await asyncio.gather(*waiting_a, return_exceptions=True)
+        return controller
+
+    controller = asyncio.run(scenario())
+    assert controller.queued[INTERACTIVE] == 0 and controller.tenant_in_flight == {"a": 2, "b": 1}
+
+
+def test_report_limit_follows_interactive_latency():
+    clock = FakeClock()
+
+    async def burst(controller, latency):
+        permits = [await controller.acquire(INTERACTIVE, "t1") for _ in range(30)]
+        clock.now += latency
+        for permit in permits:
+            await controller.release(permit)
+        # Angepasst wird höchstens alle ADJUST_INTERVAL Sekunden, hier beim nächsten Request
+        clock.now += ADJUST_INTERVAL
+        await controller.release(await controller.acquire(INTERACTIVE, "t1"))
+        return controller.report_limit
+
+    async def scenario():
+        controller = AdmissionController(max_concurrency=64, tenant_limit=64, report_max=8, report_min=1,
+                                         target_p99=0.1, clock=clock)
+        # Anhaltende Überlast: halbieren bis zum Minimum
+        limits = [await burst(controller, 0.2) for _ in range(4)]
+        clock.now += 5
+        # Wachsen höchstens einmal je INCREASE_INTERVAL
+        for latency in (0.01, 0.01, 0.01, 0.08, 0.01):
+            clock.now += INCREASE_INTERVAL
+            limits.append(await burst(controller, latency))
+        # Die zurückgenommene Erhöhung auf 5 wird erst nach PROBE_INTERVAL wieder versucht
+        clock.now += PROBE_INTERVAL
+        limits.append(await burst(controller, 0.01))
+        return limits
+
+    # 0.08 s liegt unter dem Ziel, aber über dem Spielraum (70 %): Erhöhung auf 5 wird zurückgenommen
+    assert asyncio.run(scenario()) == [4, 2, 1, 1, 2, 3, 4, 4, 4, 5]
+
+
+def test_reports_are_shed_when_queue_is_full_or_wait_too_long():
+    async def scenario():
+        controller = AdmissionController(report_max=1, report_max_queue=1, report_queue_timeout=0.05)
+        held = await controller.acquire(REPORTS, "t1")
+        waiting = asyncio.ensure_future(controller.acquire(REPORTS, "t1"))
+        await _settle()
+        with pytest.raises(Rejected) as full:
+            await controller.acquire(REPORTS, "t2")
+        with pytest.raises(Rejected) as timeout:
+            await waiting
+        await controller.release(held)
+        return full.value, timeout.value, controller
+
+    full, timeout, controller = asyncio.run(scenario())
+    assert (full.reason, full.status_code, full.retry_after) == ("queue_full", 503, 10)
+    assert (timeout.reason, timeout.status_code) == ("timeout", 503)
+    assert controller.queued[REPORTS] == 0 and controller.total_in_flight == 0
+
+
+def test_shared_counter_limits_tenant_across_replicas():
+    counter = DictCounter()
+
+    async def scenario():
+        replicas = [AdmissionController(counter=counter, shared_tenant_limit=1, queue_timeout=0.5)
+                    for _ in range(2)]
+        first = await replicas[0].acquire(INTERACTIVE, "t1")
+        other_tenant = await replicas[1].acquire(INTERACTIVE, "t2")
+        waiting = asyncio.ensure_future(replicas[1].acquire(INTERACTIVE, "t1"))
+        await asyncio.sleep(0.1)
+        assert not waiting.done() and replicas[1].tenant_in_flight == {"t2": 1}
+        await replicas[0].release(first)
+        second = await waiting
+
+        replicas[0].queue_timeout[INTERACTIVE] = 0.1
+        with pytest.raises(Rejected) as quota:
+            await replicas[0].acquire(INTERACTIVE, "t1")
+        await replicas[1].release(second)
+        await replicas[1].release(other_tenant)
+        return quota.value
+
+    quota = asyncio.run(scenario())
+    assert (quota.reason, quota.status_code) == ("tenant_quota", 429)
+    assert counter.leases == {"t1": set(), "t2": set()}
+
+
+def test_middleware_classifies_paths_and_answers_503():
+    controller = AdmissionController(report_max=1, report_min=1, report_queue_timeout=0.05)
+    app = FastAPI()
+    release = asyncio.Event()
+    seen = []
+
+    @app.get("/api/reports/slow")
+    async def slow_report():
+        seen.append(dict(controller.tenant_in_flight))
+        await release.wait()
+        return {"ok": True}
+
+    @app.get("/api/v1/finance/export/datev")
+    async def datev_export():
+        return {"ok": True}
+
+    @app.get("/api/v1/articles")
+    async def articles():
+        return {"in_flight": dict(controller.in_flight), "tenants": dict(controller.tenant_in_flight)}
+
+    @app.get("/healthz")
+    async def healthz():
+        return {"in_flight": controller.total_in_flight}
+
+    app.add_middleware(AdmissionMiddleware, controller=controller)
+
+    @app.middleware("http")
+    async def authenticate(request, call_next):
+        # Ersatz für die Authentifizierung: Claims aus einem Test-Header
+        tenant = request.headers.get("X-Test-Claim-Tenant")
+        request.state.token_claims = {"tenant_id": tenant} if tenant else {}
+        return await call_next(request)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            slow = asyncio.ensure_future(client.get("/api/reports/slow", headers={"X-Test-Claim-Tenant": "t1"}))
+            await asyncio.sleep(0.01)
+            export = await client.get("/api/v1/finance/export/datev", headers={"X-Test-Claim-Tenant": "t2"})
+            # Header und Query-Parameter bestimmen keinen Tenant: ohne Claim die gemeinsame Quote
+            interactive = await client.get("/api/v1/articles?tenant_id=t1", headers={"X-Tenant-ID": "t1"})
+            health = await client.get("/healthz")
+            release.set()
+            return await slow, export, interactive, health
+
+    slow, export, interactive, health = asyncio.run(scenario())
+    assert slow.status_code == 200 and seen == [{"t1": 1}]
+    assert export.status_code == 503 and export.headers["Retry-After"] == "10"
+    assert export.json()["type"] == "timeout"
+    assert interactive.json() == {"in_flight": {INTERACTIVE: 1, REPORTS: 1}, "tenants": {"t1": 1, SHARED_TENANT: 1}}
+    assert health.json() == {"in_flight": 1}
+    assert controller.total_in_flight == 0
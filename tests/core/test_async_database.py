@@ -0,0 +1,110 @@
+"""
+Unit Tests für den Async-Datenbankzugriff (Workload-Pools, Threadpool für synchrone Sessions)
+"""
+
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from app.api.v1.endpoints.chart_of_accounts import list_accounts
+from app.core import database
+from app.core.config import settings
+from app.infrastructure.models import Account
+
+
+@pytest.fixture
+def async_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "ASYNC_DATABASE_URL", f"sqlite+aiosqlite:///{tmp_path / 'erp.db'}")
+    monkeypatch.setattr(settings, "DATABASE_REPORT_POOL_SIZE", 2)
+    monkeypatch.setattr(settings, "DEBUG", False)
+    yield
+    asyncio.run(database.dispose_async_engines())
+
+
+def test_async_database_url():
+    assert database.async_database_url("postgresql://u:p@db:5432/erp") == "postgresql+asyncpg://u:p@db:5432/erp"
+    assert database.async_database_url("postgresql+psycopg2://u@db/erp") == "postgresql+asyncpg://u@db/erp"
+    assert database.async_database_url("sqlite:///erp.db") == "sqlite+aiosqlite:///erp.db"
+    assert database.async_database_url("postgresql+asyncpg://u@db/erp") == "postgresql+asyncpg://u@db/erp"
+
+
+def test_workloads_get_separate_pools(async_db):
+    interactive = database.get_async_engine("interactive")
+    reports = database.get_async_engine("reports")
+    assert interactive is not reports
+    assert interactive is database.get_async_engine()
+    assert interactive.pool.size() == settings.DATABASE_INTERACTIVE_POOL_SIZE
+    assert reports.pool.size() == 2
+    with pytest.raises(ValueError):
+        database.get_async_engine("batch")
+
+
+def test_list_accounts_on_async_session(async_db, attach_schemas):
+    async def scenario():
+        engine = database.get_async_engine()
+        attach_schemas(engine.sync_engine, "domain_erp")
+        async with engine.begin() as conn:
+            await conn.run_sync(lambda sync_conn: Account.__table__.create(sync_conn))
+        now = datetime.now(timezone.utc)
+        async with database.get_async_session_factory()() as session:
+            session.add_all([
+                Account(account_number=f"{1000 + n}", account_name="Bank" if n % 2 else "Kasse",
+                        account_type="asset", category="current_assets", tenant_id="system", updated_at=now)
+                for n in range(5)
+            ] + [Account(account_number="1200", account_name="Bank", account_type="asset",
+                         category="current_assets", tenant_id="other", updated_at=now)])
+            await session.commit()
+
+        dependency = database.get_async_db()
+        session = await dependency.__anext__()
+        try:
+            return await list_accounts(tenant_id=None, search="bank", skip=0, limit=1, db=session)
+        finally:
+            await dependency.aclose()
+
+    page = asyncio.run(scenario())
+    assert (page.total, len(page.items), page.pages, page.has_next) == (2, 1, 2, True)
+    assert page.items[0].account_name == "Bank"
+
+
+def test_threadpool_is_bounded_and_keeps_loop_responsive(monkeypatch):
+    monkeypatch.setattr(settings, "DATABASE_SYNC_THREADS", 3)
+    database._sync_limiter.cache_clear()
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def blocking_query():
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        time.sleep(0.05)
+        with lock:
+            running.pop()
+        return threading.get_ident()
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.005)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        threads = await asyncio.gather(*(database.run_in_db_threadpool(blocking_query) for _ in range(9)))
+        task.cancel()
+        return threads, ticks
+
+    try:
+        threads, ticks = asyncio.run(scenario())
+    finally:
+        database._sync_limiter.cache_clear()
+    assert max(peak) == 3
+    assert threading.get_ident() not in threads
+    # Drei Runden à 50 ms: der Loop lief währenddessen weiter
+    assert ticks >= 10
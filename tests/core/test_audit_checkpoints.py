@@ -0,0 +1,59 @@
+"""
+Unit Tests für die checkpoint-basierte Integritätsprüfung des ISMS-Audit-Trails
+"""
+
+import dataclasses
+
+from app.security.audit_checkpoints import AuditChainVerifier
+from app.security.audit_service import ISMSAuditService
+
+
+def _service(events, **kwargs):
+    service = ISMSAuditService(db_session=None, checkpoint_key=b"geheim", checkpoint_interval=10, **kwargs)
+    for i in range(events):
+        service.log_security_event({
+            'event_type': 'data_access', 'user_id': f'user-{i % 3}', 'tenant_id': 't1',
+            'resource_type': 'Customer', 'resource_id': f'C-{i}', 'action': 'read',
+            'details': {'felder': ['name', 'iban'], 'anzahl': i},
+        })
+    return service
+
+
+def test_incremental_check_only_rehashes_entries_after_last_checkpoint():
+    service = _service(25)
+
+    first = service.verify_audit_integrity(workers=1)
+    assert first['integrity_maintained'] and first['entries_checked'] == 25
+    assert first['checkpoints'] == 2
+
+    for i in range(12):
+        service.log_security_event({'event_type': 'login_success', 'user_id': 'user-x', 'tenant_id': 't1'})
+    second = service.verify_audit_integrity(workers=1)
+    assert second['verified_from'] == 20 and second['entries_checked'] == 17
+    assert second['integrity_maintained'] and second['checkpoints'] == 3
+
+
+def test_full_check_finds_tampering_behind_checkpoints_in_parallel():
+    service = _service(45)
+    service.verify_audit_integrity(workers=1)
+
+    service.audit_trail[7].details['anzahl'] = 999
+    service.audit_trail[31] = dataclasses.replace(service.audit_trail[31], previous_hash="0" * 64)
+    assert service.verify_audit_integrity(workers=1)['integrity_maintained']  # hinter dem Checkpoint
+
+    report = service.verify_audit_integrity(full=True, workers=2)
+    assert not report['integrity_maintained']
+    assert {(b['index'], b['type']) for b in report['breach_details']} == {(7, 'hash'), (31, 'link'), (31, 'hash')}
+    assert report['checkpoint_errors'] == []  # gespeicherte Hashes unverändert, nur neu berechnete weichen ab
+
+
+def test_forged_checkpoint_is_rejected():
+    service = _service(20)
+    service.verify_audit_integrity(workers=1)
+    service.checkpoints[1] = dataclasses.replace(service.checkpoints[1], last_hash="0" * 64)
+
+    report = service.verify_audit_integrity(workers=1)
+    assert not report['integrity_maintained']
+    assert report['checkpoint_errors'] == ['checkpoint 10-20: invalid signature']
+
+    assert AuditChainVerifier(b"anderer-schluessel", interval=10).checkpoint_errors(service.checkpoints[:1], 20)
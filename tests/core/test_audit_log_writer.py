@@ -0,0 +1,227 @@
+"""
+Unit Tests für den gebatchten Audit-Log-Writer und die Keyset-Cursor
+"""
+
+import asyncio
+import fcntl
+import json
+import threading
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import JSON, Column, DateTime, MetaData, String, Table, create_engine, func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.v1.endpoints.audit import decode_cursor, encode_cursor
+from app.workers.audit_log_writer import AuditLogWriter
+
+
+metadata = MetaData()
+
+audit_logs = Table(
+    "audit_logs", metadata,
+    Column("id", String, primary_key=True),
+    Column("timestamp", DateTime(timezone=True), primary_key=True),
+    Column("user_id", String),
+    Column("tenant_id", String),
+    Column("action", String),
+    Column("changes", JSON),
+)
+
+
+class CountingSessionFactory:
+    def __init__(self, engine):
+        self._factory = sessionmaker(bind=engine)
+        self.sessions = 0
+        self.fail = False
+
+    def __call__(self):
+        self.sessions += 1
+        if self.fail:
+            raise RuntimeError("database unavailable")
+        return self._factory()
+
+
+@pytest.fixture
+def engine():
+    # One shared in-memory database for the flush threads
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    metadata.create_all(engine)
+    return engine
+
+
+def _row(i: int) -> dict:
+    return {
+        "id": f"id-{i}",
+        "timestamp": datetime(2025, 1, 1, tzinfo=timezone.utc),
+        "user_id": "u1",
+        "tenant_id": "t1",
+        "action": "update",
+        "changes": {"seq": i},
+    }
+
+
+def _count(engine) -> int:
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(audit_logs)).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_rows_are_written_in_batches(engine, tmp_path):
+    sessions = CountingSessionFactory(engine)
+    writer = AuditLogWriter(
+        table=audit_logs, session_factory=sessions,
+        max_batch_size=100, max_latency=0.05, spool_dir=tmp_path
+    )
+    writer._last_partition_check = float("inf")
+    await writer.start()
+    for i in range(1000):
+        writer.enqueue(_row(i))
+    await asyncio.sleep(0.2)
+    await writer.stop()
+
+    assert _count(engine) == 1000
+    # One session per flush, not per row
+    assert sessions.sessions <= 20
+    assert writer.written == 1000
+
+
+@pytest.mark.asyncio
+async def test_latency_bound_flushes_small_batches(engine, tmp_path):
+    writer = AuditLogWriter(
+        table=audit_logs, session_factory=CountingSessionFactory(engine),
+        max_batch_size=500, max_latency=0.05, spool_dir=tmp_path
+    )
+    writer._last_partition_check = float("inf")
+    await writer.start()
+    writer.enqueue(_row(1))
+    await asyncio.sleep(0.2)
+
+    assert _count(engine) == 1
+    await writer.stop()
+
+
+def test_failed_flush_is_spooled_and_replayed(engine, tmp_path):
+    sessions = CountingSessionFactory(engine)
+    writer = AuditLogWriter(table=audit_logs, session_factory=sessions, spool_dir=tmp_path)
+
+    sessions.fail = True
+    writer.enqueue(_row(1))
+    assert writer.spool_file.exists()
+
+    # Failures inside the transaction go to the spool file as well
+    sessions.fail = False
+    writer._table = Table("missing_table", MetaData(), Column("id", String))
+    writer.enqueue(_row(2))
+    assert writer.spooled == 2
+
+    writer._table = audit_logs
+    writer.enqueue(_row(3))
+    assert not writer.spool_file.exists()
+    with engine.connect() as conn:
+        ids = set(conn.execute(select(audit_logs.c.id)).scalars())
+    assert ids == {"id-1", "id-2", "id-3"}
+
+
+def test_rejected_rows_are_dead_lettered(engine, tmp_path):
+    writer = AuditLogWriter(table=audit_logs, session_factory=CountingSessionFactory(engine), spool_dir=tmp_path)
+    duplicate = {**_row(1), "action": "delete"}  # Primärschlüssel doppelt
+
+    writer._buffer = [_row(1), duplicate, _row(3)]
+    assert writer.flush() == 2
+    assert writer.dead_lettered == 1
+    assert len(writer.dead_letter_file.read_text().splitlines()) == 1
+    assert not writer.spool_file.exists()
+
+    # Die nächsten Flushes laufen wieder gebatcht
+    writer.enqueue(_row(4))
+    with engine.connect() as conn:
+        ids = set(conn.execute(select(audit_logs.c.id)).scalars())
+    assert ids == {"id-1", "id-3", "id-4"}
+
+
+def test_connection_loss_during_row_pass_is_spooled_not_dead_lettered(engine, tmp_path):
+    lost_at = ["id-3"]
+
+    class FlakySessions(CountingSessionFactory):
+        def __call__(self):
+            session = super().__call__()
+            execute = session.execute
+
+            def flaky_execute(statement, params=None, *args, **kwargs):
+                if params and lost_at[0] in {row["id"] for row in params}:
+                    raise OperationalError("INSERT", {}, Exception("server closed the connection"))
+                return execute(statement, params, *args, **kwargs)
+
+            session.execute = flaky_execute
+            return session
+
+    sessions = FlakySessions(engine)
+    writer = AuditLogWriter(table=audit_logs, session_factory=sessions, spool_dir=tmp_path)
+    sessions.fail = True
+    writer.enqueue(_row(0))
+    sessions.fail = False
+
+    # id-1 wird geschrieben, das Duplikat abgewiesen; ab id-3 ist die Verbindung weg
+    writer._buffer = [_row(1), {**_row(1), "action": "delete"}, _row(3), _row(4)]
+    assert writer.flush() == 2
+    assert writer.dead_lettered == 1
+    assert [json.loads(line)["id"] for line in writer.spool_file.read_text().splitlines()] == ["id-3", "id-4"]
+
+    lost_at[0] = None
+    writer.enqueue(_row(5))
+    assert not writer.spool_file.exists()
+    with engine.connect() as conn:
+        ids = set(conn.execute(select(audit_logs.c.id)).scalars())
+    assert ids == {"id-0", "id-1", "id-3", "id-4", "id-5"}
+
+
+def test_start_takes_over_spools_of_stopped_writers(engine, tmp_path):
+    def spool(pid, *ids):
+        lines = [json.dumps({**_row(i), "timestamp": _row(i)["timestamp"].isoformat()}) for i in ids]
+        (tmp_path / f"audit-{pid}.ndjson").write_text("\n".join(lines) + "\n")
+
+    spool(999998, 1, 2)
+    spool(999999, 3)
+    (tmp_path / "audit-999998.rejected.ndjson").write_text("{}\n")
+    # Ein laufender Writer hält seine Sperre: dessen Spool bleibt unangetastet
+    with open(tmp_path / "audit-999999.lock", "a") as live:
+        fcntl.flock(live, fcntl.LOCK_EX)
+        writer = AuditLogWriter(table=audit_logs, session_factory=CountingSessionFactory(engine), spool_dir=tmp_path)
+        writer._last_partition_check = float("inf")
+
+        async def scenario():
+            await writer.start()
+            await writer.stop()
+
+        asyncio.run(scenario())
+
+    assert _count(engine) == 2
+    assert not (tmp_path / "audit-999998.ndjson").exists()
+    assert (tmp_path / "audit-999999.ndjson").exists()
+    assert (tmp_path / "audit-999998.rejected.ndjson").exists()
+    assert writer.adopt_orphaned_spools() == 1
+
+
+def test_submit_does_not_write_on_the_event_loop(engine, tmp_path):
+    threads = []
+
+    class RecordingSessions(CountingSessionFactory):
+        def __call__(self):
+            threads.append(threading.current_thread())
+            return super().__call__()
+
+    writer = AuditLogWriter(table=audit_logs, session_factory=RecordingSessions(engine), spool_dir=tmp_path)
+    asyncio.run(writer.submit(_row(1)))
+
+    assert _count(engine) == 1
+    assert threads and threading.main_thread() not in threads
+
+
+def test_cursor_round_trip():
+    ts = datetime(2025, 3, 1, 12, 30, tzinfo=timezone.utc)
+    assert decode_cursor(encode_cursor(ts, "abc|def")) == (ts, "abc|def")
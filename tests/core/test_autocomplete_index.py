@@ -0,0 +1,152 @@
+"""
+Unit Tests für den Autocomplete-Index (Präfix- und Trigramm-Suche, Ranking, Änderungen)
+"""
+
+import asyncio
+import time
+import uuid
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.infrastructure.models import Customer
+from app.services import autocomplete_index
+from app.services.autocomplete_index import AutocompleteIndex, AutocompleteService, AutocompleteSource
+
+CUSTOMERS = AutocompleteSource("customers", Customer, number="customer_number", label="company_name", hint="city")
+DAY = 86400.0
+NOW = time.time()
+
+
+def _rows(*entries):
+    return [(f"k{n}", number, label, hint, NOW - days * DAY) for n, (number, label, hint, days) in enumerate(entries)]
+
+
+def _labels(results):
+    return [result["label"] for result in results]
+
+
+@pytest.fixture
+def index():
+    return AutocompleteIndex(CUSTOMERS, _rows(
+        ("K-1001", "Landhandel Meyer GmbH", "Emden", 40),
+        ("K-1002", "AGRAR Nord GmbH", "Oldenburg", 10),
+        ("K-1003", "Müller Agrar KG", "Bremen", 5),
+        ("K-1004", "Mueller Landtechnik", "Leer", 1),
+        ("K-1005", "Meyerhof Agrarhandel", "Aurich", 20),
+    ), half_life=30 * DAY)
+
+
+def test_prefix_search_ranks_recent_entries_first(index):
+    assert _labels(index.search("agr")) == ["Müller Agrar KG", "AGRAR Nord GmbH", "Meyerhof Agrarhandel"]
+    # Freie Plätze werden mit unscharfen Treffern aufgefüllt
+    assert _labels(index.search("müll")) == ["Müller Agrar KG", "Mueller Landtechnik"]
+    assert _labels(index.search("MEY")) == ["Meyerhof Agrarhandel", "Landhandel Meyer GmbH"]
+    assert _labels(index.search("meyer gmb")) == ["Landhandel Meyer GmbH"]
+    assert index.search("k-1003")[0] == {"id": "K-1003", "key": "k2", "label": "Müller Agrar KG", "hint": "Bremen"}
+    assert _labels(index.search("agr", limit=1)) == ["Müller Agrar KG"]
+    assert index.search("") == [] and index.search("xyz") == []
+
+
+def test_typos_fall_back_to_trigram_terms(index):
+    assert _labels(index.search("landtechnick")) == ["Mueller Landtechnik"]
+    # Treffer ohne Tippfehler stehen vor den unscharfen
+    assert _labels(index.search("muel"))[0] == "Mueller Landtechnik"
+    assert "Müller Agrar KG" in _labels(index.search("muler"))
+
+
+def test_usage_raises_rank_by_frequency_and_recency(index, monkeypatch):
+    monkeypatch.setattr(autocomplete_index, "LARGE_RANGE", 1)
+    # Großer Bereich: Top-Liste wird gehalten und bei Nutzung nachgezogen
+    assert _labels(index.search("a"))[0] == "Müller Agrar KG"
+    for _ in range(3):
+        assert index.record_use("k1", at=NOW - 2 * DAY)
+    assert _labels(index.search("a"))[0] == "AGRAR Nord GmbH"
+    assert _labels(index.search("agrar"))[0] == "AGRAR Nord GmbH"
+    # Ein einzelner alter Zugriff zählt weniger als drei neue
+    index.record_use("k4", at=NOW - 60 * DAY)
+    assert _labels(index.search("agrar"))[0] == "AGRAR Nord GmbH"
+    assert not index.record_use("missing")
+
+
+def test_multiple_words_fall_back_from_top_lists_to_whole_range(index, monkeypatch):
+    # Top-Listen mit einem Eintrag reichen nie: geprüft wird am Ende der ganze Bereich
+    for name in ("LARGE_RANGE", "TOP_CACHE_SIZE", "DEEP_CACHE_SIZE"):
+        monkeypatch.setattr(autocomplete_index, name, 1)
+    assert _labels(index.search("agrar nord")) == ["AGRAR Nord GmbH"]
+    assert _labels(index.search("me agrar")) == ["Meyerhof Agrarhandel"]
+    # Ein Suchwort: nur die gehaltene Top-Liste
+    assert _labels(index.search("gmbh")) == ["AGRAR Nord GmbH"]
+
+
+def test_changes_go_to_overlay_and_survive_rebuild(index):
+    index.upsert(("k1", "K-1002", "Nordagrar GmbH", "Oldenburg", NOW))
+    index.upsert(("k9", "K-1009", "Agrarservice Weser", "Nienburg", None))
+    index.delete("k2")
+    assert _labels(index.search("agrar")) == ["Agrarservice Weser", "Meyerhof Agrarhandel"]
+    assert _labels(index.search("nord")) == ["Nordagrar GmbH"]
+    index.record_use("k4")
+    assert index.overlay_size == 2
+
+    # Neuaufbau aus der "Datenbank"; Nutzung bleibt erhalten, Änderungen während des Baus werden nachgespielt
+    rows = _rows(
+        ("K-1001", "Landhandel Meyer GmbH", "Emden", 40),
+        ("K-1002", "Nordagrar GmbH", "Oldenburg", 0),
+        ("K-1003", "Müller Agrar KG", "Bremen", 5),
+        ("K-1004", "Mueller Landtechnik", "Leer", 1),
+        ("K-1005", "Meyerhof Agrarhandel", "Aurich", 20),
+    )
+
+    def load():
+        index.delete("k0")
+        yield from [row for row in rows if row[0] != "k2"] + [("k9", "K-1009", "Agrarservice Weser", "Nienburg", NOW)]
+
+    index.rebuild(load())
+    assert index.overlay_size == 0
+    assert _labels(index.search("meyer")) == ["Meyerhof Agrarhandel"]
+    assert _labels(index.search("agr"))[0] == "Meyerhof Agrarhandel"
+    assert len(index) == 4
+
+
+@pytest.fixture
+def session_factory(sqlite_engine):
+    # Der Index wird im Threadpool gebaut
+    engine = sqlite_engine("domain_crm")
+    Customer.__table__.create(engine)
+    return sessionmaker(bind=engine)
+
+
+def test_service_builds_from_database_and_follows_orm_changes(session_factory):
+    service = AutocompleteService({"customers": CUSTOMERS}, session_factory)
+    service.install_hooks()
+    try:
+        with session_factory() as session:
+            for n, (name, tenant, active) in enumerate([
+                ("Landhandel Meyer GmbH", "t1", True), ("Meyer Agrar", "t1", False), ("Meyer Nord", "t2", True),
+            ]):
+                session.add(Customer(id=str(uuid.uuid4()), customer_number=f"K-{n}", company_name=name,
+                                     city="Emden", tenant_id=tenant, is_active=active))
+            session.commit()
+
+        async def scenario():
+            first = _labels(await service.search("customers", "t1", "meyer"))
+            with session_factory() as session:
+                session.add(Customer(id="new", customer_number="K-9", company_name="Meyer Landtechnik",
+                                     tenant_id="t1", is_active=True))
+                landhandel = session.query(Customer).filter_by(customer_number="K-0").one()
+                landhandel.is_active = False
+                session.commit()
+                session.add(Customer(id="rolled-back", customer_number="K-10", company_name="Meyer Rollback",
+                                     tenant_id="t1"))
+                session.flush()
+                session.rollback()
+            second = _labels(await service.search("customers", "t1", "meyer"))
+            used = await service.record_use("customers", "t1", "new")
+            return first, second, used
+
+        first, second, used = asyncio.run(scenario())
+    finally:
+        service.remove_hooks()
+    assert first == ["Landhandel Meyer GmbH"]
+    assert second == ["Meyer Landtechnik"]
+    assert used
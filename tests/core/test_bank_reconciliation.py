@@ -0,0 +1,158 @@
+"""
+Unit Tests für die gebündelte Bankabstimmungs-Buchung
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from app.finance.bank_reconciliation import (
+    apply_booking_plan,
+    find_differences,
+    plan_bookings,
+    resolve_accounts,
+)
+
+SCHEMA = [
+    "CREATE TABLE domain_erp.chart_of_accounts (id TEXT PRIMARY KEY, tenant_id TEXT, account_number TEXT)",
+    "CREATE TABLE domain_erp.bank_accounts (id TEXT PRIMARY KEY, tenant_id TEXT, account_number TEXT)",
+    "CREATE TABLE domain_erp.bank_statement_lines (id TEXT PRIMARY KEY, tenant_id TEXT, statement_id TEXT, "
+    "booking_date DATE, amount NUMERIC, reference TEXT, remittance_info TEXT, status TEXT, updated_at TIMESTAMP)",
+    "CREATE TABLE domain_erp.journal_entries (id TEXT PRIMARY KEY, tenant_id TEXT, entry_number TEXT UNIQUE, "
+    "entry_date DATE, posting_date DATE, description TEXT, reference TEXT, source TEXT, currency TEXT, "
+    "status TEXT, total_debit NUMERIC, total_credit NUMERIC, created_at TIMESTAMP, updated_at TIMESTAMP)",
+    "CREATE TABLE domain_erp.journal_entry_lines (id TEXT PRIMARY KEY, tenant_id TEXT, journal_entry_id TEXT, "
+    "account_id TEXT, debit_amount NUMERIC, credit_amount NUMERIC, line_number INTEGER, description TEXT, "
+    "created_at TIMESTAMP, updated_at TIMESTAMP)",
+]
+
+
+class CountingSession:
+    def __init__(self, session):
+        self.session = session
+        self.statements = 0
+
+    def execute(self, *args, **kwargs):
+        self.statements += 1
+        return self.session.execute(*args, **kwargs)
+
+
+@pytest.fixture
+def db(sqlite_engine):
+    engine = sqlite_engine("domain_erp")
+
+    with engine.begin() as conn:
+        for ddl in SCHEMA:
+            conn.execute(text(ddl))
+        conn.execute(text(
+            "INSERT INTO domain_erp.chart_of_accounts VALUES ('acc-bank', 't1', '1000'), ('acc-ar', 't1', '1200'), "
+            "('acc-bank-t2', 't2', '1000')"
+        ))
+        conn.execute(text("INSERT INTO domain_erp.bank_accounts VALUES ('ba-1', 't1', '1000')"))
+        for i in range(1, 6):
+            conn.execute(text(
+                "INSERT INTO domain_erp.bank_statement_lines VALUES "
+                "(:id, 't1', 'st-1', :d, :a, :r, :info, 'UNMATCHED', NULL)"
+            ), {"id": f"st-1-L{i}", "d": date(2025, 3, i), "a": 100 * i, "r": f"REF{i}", "info": f"Zahlung {i}"})
+        # L1 is already in the books; E9 has no bank transaction; T2 is another tenant's
+        # booking on its own account 1000 and must not show up or be paired with L2
+        for entry_id, tenant, account, day, amount in (
+            ("E1", "t1", "acc-bank", 1, 100), ("E9", "t1", "acc-bank", 4, 999), ("T2", "t2", "acc-bank-t2", 2, 200),
+        ):
+            conn.execute(text(
+                "INSERT INTO domain_erp.journal_entries (id, tenant_id, entry_number, entry_date, status) "
+                "VALUES (:id, :t, :id, :d, 'posted')"
+            ), {"id": entry_id, "t": tenant, "d": date(2025, 3, day)})
+            conn.execute(text(
+                "INSERT INTO domain_erp.journal_entry_lines (id, tenant_id, journal_entry_id, account_id, "
+                "debit_amount, credit_amount, line_number) VALUES (:id, :t, :id, :acc, :a, 0, 1)"
+            ), {"id": entry_id, "t": tenant, "acc": account, "a": amount})
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def _suggestions(differences, counter_account="1200"):
+    return [
+        {
+            "description": d["description"],
+            "date": d["date"].isoformat(),
+            "account_debit": "1000",
+            "account_credit": counter_account,
+            "amount": float(d["amount"]),
+            "statement_line_id": d["statement_line_id"],
+        }
+        for d in differences
+        if d["item_type"] == "UNMATCHED_STATEMENT"
+    ]
+
+
+def test_differences_are_found_in_both_directions(db):
+    differences = find_differences(db, "st-1", "ba-1", "t1")
+
+    unmatched_statement = {d["statement_line_id"] for d in differences if d["item_type"] == "UNMATCHED_STATEMENT"}
+    unmatched_accounting = [d for d in differences if d["item_type"] == "UNMATCHED_ACCOUNTING"]
+    assert unmatched_statement == {"st-1-L2", "st-1-L3", "st-1-L4", "st-1-L5"}
+    assert [d["journal_entry_id"] for d in unmatched_accounting] == ["E9"]
+
+
+
+def test_equal_transactions_are_matched_one_to_one(db):
+    # Second 100 on 1 March: E1 can only clear one of the two statement lines
+    db.execute(text(
+        "INSERT INTO domain_erp.bank_statement_lines VALUES "
+        "('st-1-L6', 't1', 'st-1', :d, 100, 'REF6', NULL, 'UNMATCHED', NULL)"
+    ), {"d": date(2025, 3, 1)})
+    # Two bookings of 300 on 3 March against the single statement line L3
+    for entry_id in ("E3a", "E3b"):
+        db.execute(text(
+            "INSERT INTO domain_erp.journal_entries (id, tenant_id, entry_number, entry_date, status) "
+            "VALUES (:id, 't1', :id, :d, 'posted')"
+        ), {"id": entry_id, "d": date(2025, 3, 3)})
+        db.execute(text(
+            "INSERT INTO domain_erp.journal_entry_lines (id, tenant_id, journal_entry_id, account_id, debit_amount, "
+            "credit_amount, line_number) VALUES (:id, 't1', :id, 'acc-bank', 300, 0, 1)"
+        ), {"id": entry_id})
+
+    differences = find_differences(db, "st-1", "ba-1", "t1")
+
+    unmatched_statement = {d["statement_line_id"] for d in differences if d["item_type"] == "UNMATCHED_STATEMENT"}
+    unmatched_accounting = {d["journal_entry_id"] for d in differences if d["item_type"] == "UNMATCHED_ACCOUNTING"}
+    assert unmatched_statement == {"st-1-L2", "st-1-L4", "st-1-L5", "st-1-L6"}
+    assert unmatched_accounting == {"E3b", "E9"}
+
+
+def test_auto_booking_is_bulk_and_balanced(db):
+    counting = CountingSession(db)
+    suggestions = _suggestions(find_differences(db, "st-1", "ba-1", "t1"))
+    accounts = resolve_accounts(counting, "t1", ["1000", "1200"])
+    plan = plan_bookings(suggestions, accounts, "t1", datetime(2025, 3, 31))
+    apply_booking_plan(counting, plan, "t1")
+    db.commit()
+
+    # One account lookup, one INSERT each for entries and lines, one UPDATE
+    assert counting.statements == 4
+    assert len(plan.entries) == 4 and len(plan.lines) == 8
+    totals = db.execute(text(
+        "SELECT SUM(debit_amount), SUM(credit_amount) FROM domain_erp.journal_entry_lines "
+        "WHERE tenant_id = 't1' AND journal_entry_id <> 'E1' AND journal_entry_id <> 'E9'"
+    )).one()
+    assert Decimal(str(totals[0])) == Decimal(str(totals[1])) == Decimal("1400")
+    assert db.execute(text(
+        "SELECT COUNT(*) FROM domain_erp.bank_statement_lines WHERE status = 'MATCHED'"
+    )).scalar() == 4
+    remaining = find_differences(db, "st-1", "ba-1", "t1")
+    assert [d["item_type"] for d in remaining] == ["UNMATCHED_ACCOUNTING"]
+
+
+def test_dry_run_plan_skips_missing_accounts(db):
+    suggestions = _suggestions(find_differences(db, "st-1", "ba-1", "t1"), counter_account="9999")
+    accounts = resolve_accounts(db, "t1", ["1000", "9999"])
+    plan = plan_bookings(suggestions, accounts, "t1", datetime(2025, 3, 31))
+
+    view = plan.to_dict()
+    assert view["entries"] == [] and len(view["skipped"]) == 4
+    assert view["skipped"][0]["reason"] == "Account 9999 not found"
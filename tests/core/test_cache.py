@@ -0,0 +1,165 @@
+"""
+Unit Tests für den In-Process-Cache (app.core.cache)
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.cache import CacheBackend, TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class DictBackend(CacheBackend):
+    def __init__(self, clock=None):
+        self.data = {}
+        self.clock = clock or (lambda: 0.0)
+
+    def get(self, key):
+        if key not in self.data:
+            return None
+        value, expires_at = self.data[key]
+        return value, (expires_at - self.clock() if expires_at is not None else None)
+
+    def set(self, key, value, ttl):
+        self.data[key] = (value, self.clock() + ttl if ttl else None)
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def clear(self, namespace):
+        for key in [k for k in self.data if k.startswith(f"{namespace}:")]:
+            del self.data[key]
+
+
+def test_lru_eviction_keeps_recently_used():
+    cache = TTLCache("test_lru", max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats.evictions == 1
+
+
+def test_ttl_expiry():
+    clock = FakeClock()
+    cache = TTLCache("test_ttl", max_entries=10, default_ttl=60, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=600)
+
+    clock.now += 61
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert cache.stats.expirations == 1
+
+    clock.now += 600
+    assert cache.cleanup_expired() == 1
+    assert len(cache) == 0
+
+
+def test_byte_limit_and_accounting():
+    cache = TTLCache("test_bytes", max_entries=100, max_bytes=250, sizer=lambda v: 100)
+    cache.set("a", "x")
+    cache.set("b", "y")
+    assert cache.size_bytes == 200
+
+    cache.set("c", "z")
+    assert len(cache) == 2
+    assert "a" not in cache
+    assert cache.size_bytes == 200
+
+    cache.delete("b")
+    assert cache.size_bytes == 100
+
+
+def test_stats_hit_rate():
+    cache = TTLCache("test_stats", max_entries=10)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("missing")
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_get_or_load_caches_result():
+    cache = TTLCache("test_load", max_entries=10)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return "value"
+
+    assert cache.get_or_load("k", loader) == "value"
+    assert cache.get_or_load("k", loader) == "value"
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_async_single_flight():
+    cache = TTLCache("test_single_flight", max_entries=10)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 42
+
+    results = await asyncio.gather(*(cache.aget_or_load("k", loader) for _ in range(20)))
+
+    assert results == [42] * 20
+    assert len(calls) == 1
+    assert cache.stats.loads == 1
+
+
+@pytest.mark.asyncio
+async def test_async_loader_error_propagates_and_is_not_cached():
+    cache = TTLCache("test_load_error", max_entries=10)
+
+    async def failing():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        await cache.aget_or_load("k", failing)
+    assert "k" not in cache
+    assert cache.stats.load_errors == 1
+
+
+def test_shared_backend_fills_local_cache():
+    backend = DictBackend()
+    writer = TTLCache("test_shared", max_entries=10, backend=backend)
+    reader = TTLCache("test_shared", max_entries=10, backend=backend)
+
+    writer.set("iban", {"bic": "TESTDEFF"})
+    assert reader.get("iban") == {"bic": "TESTDEFF"}
+    assert "iban" in reader
+
+    writer.clear()
+    assert backend.data == {}
+
+
+def test_shared_hit_keeps_remaining_ttl():
+    clock = FakeClock()
+    backend = DictBackend(clock)
+    writer = TTLCache("test_shared_ttl", max_entries=10, default_ttl=60, backend=backend, clock=clock)
+    reader = TTLCache("test_shared_ttl", max_entries=10, default_ttl=60, backend=backend, clock=clock)
+
+    writer.set("k", "v")
+    clock.now += 50
+    assert reader.get("k") == "v"
+    # Copied with the 10 s left in the shared store, not another 60 s
+    clock.now += 11
+    assert "k" not in reader
@@ -0,0 +1,116 @@
+"""
+Unit Tests für den Crawler und das Wettbewerber-Monitoring (gegen lokale, aufgezeichnete Shop-Seiten)
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.competitor_monitor import CompetitorMonitor
+from app.services.crawler import PoliteCrawler
+from tests.fixtures.shop_server import FixtureShopServer
+
+
+def _shop(server, host="127.0.0.1"):
+    return {
+        "name": "Fixture-Shop",
+        "base_url": server.url("", host),
+        "search_url": server.url("/suche", host),
+        "categories": ["duenger", "saatgut"],
+        "selectors": {"product_link": ".product-link", "price": ".price", "image": ".product-image img",
+                      "name": ".product-name"},
+    }
+
+
+@pytest.fixture
+def server():
+    with FixtureShopServer() as server:
+        yield server
+
+
+def test_unchanged_pages_are_not_parsed_again(server):
+    crawler = PoliteCrawler(delay=0)
+    parsed = []
+
+    def parse(response):
+        parsed.append(response.url)
+        return len(response.content)
+
+    async def scenario():
+        url = server.url("/produkt/html_product")
+        first = await crawler.fetch(url, parse)
+        second = await crawler.fetch(url, parse)
+        # Server ohne Validatoren: gleicher Inhalt wird am Hash erkannt
+        server.validators = False
+        third = await crawler.fetch(url, parse)
+        server.overrides["/produkt/html_product"] = b"<html>neu</html>"
+        fourth = await crawler.fetch(url, parse)
+        return first, second, third, fourth
+
+    first, second, third, fourth = asyncio.run(scenario())
+    assert first.changed and first.status == 200
+    assert second.status == 304 and not second.changed and second.data == first.data
+    assert third.status == 200 and not third.changed and third.data == first.data
+    assert fourth.changed and fourth.data == len(b"<html>neu</html>")
+    assert len(parsed) == 2
+    assert crawler.stats["not_modified"] == 1 and crawler.stats["unchanged"] == 1
+
+
+
+def test_page_cache_is_bounded(server, monkeypatch):
+    monkeypatch.setattr("app.services.crawler.settings.CRAWLER_CACHE_MAX_ENTRIES", 2)
+    crawler = PoliteCrawler(delay=0)
+    urls = [server.url(f"/produkt/html_product/{n}") for n in range(3)]
+
+    async def scenario():
+        for url in urls:
+            await crawler.fetch(url)
+        # Die älteste URL wurde verdrängt und wird ohne Validatoren geholt
+        return await crawler.fetch(urls[0]), await crawler.fetch(urls[2])
+
+    evicted, cached = asyncio.run(scenario())
+    assert len(crawler.cache) == 2
+    assert evicted.status == 200 and cached.status == 304
+
+def test_requests_per_host_are_limited_and_spaced():
+    crawler = PoliteCrawler(per_host=2, delay=0.05)
+    with FixtureShopServer(latency=0.1) as server:
+        urls = [server.url(f"/produkt/html_product/{n}", host) for host in ("127.0.0.1", "localhost")
+                for n in range(6)]
+        results = asyncio.run(crawler.crawl(urls))
+        requests = [request for request in server.requests if request[1] != "/robots.txt"]
+
+    assert all(result.status == 200 for result in results)
+    assert set(server.max_in_flight.values()) == {2}
+    for host in server.max_in_flight:
+        # Sechs Starts im Abstand von 0.05 s (Ankunftszeiten schwanken etwas)
+        starts = sorted(at for name, _, _, at in requests if name == host)
+        assert len(starts) == 6 and starts[-1] - starts[0] >= 0.2
+
+
+def test_monitor_scrapes_recorded_pages_and_respects_robots(server):
+    monitor = CompetitorMonitor(shops={"fixture": _shop(server)}, crawler=PoliteCrawler(delay=0))
+    urls = [server.url("/produkt/jsonld_product"), server.url("/produkt/html_product"),
+            server.url("/intern/produkt/html_product")]
+
+    async def scenario():
+        first = await monitor.scrape_products(urls)
+        again = await monitor.scrape_products(urls[:2])
+        return first, again
+
+    first, again = asyncio.run(scenario())
+    kas, weizen = first
+    assert (kas.product_name, kas.price, kas.currency, kas.gtin, kas.brand) == (
+        "Kalkammonsalpeter KAS 27 % N, 600 kg Big Bag", 312.9, "EUR", "4012345678901", "YARA")
+    assert (weizen.product_name, weizen.price) == ("Winterweizen Patras Z-Saatgut 25 kg", 48.5)
+    assert [img.url for img in kas.images] == [server.url("/bilder/kas27.png")]
+    assert weizen.images[0].url == server.url("/bilder/weizen.png")
+    assert all(len(img.hash) == 16 for img in kas.images + weizen.images)
+    assert kas.images[0].hash != weizen.images[0].hash
+
+    # Zweiter Lauf: alles 304, gleiche Daten mit neuem Zeitstempel
+    assert [(price.product_name, price.images[0].hash) for price in again] == [
+        (price.product_name, price.images[0].hash) for price in first]
+    assert again[0].scraped_at >= kas.scraped_at
+    assert monitor.crawler.stats["parsed"] == 4 and monitor.crawler.stats["disallowed"] == 1
+    assert not any("/intern/" in path for _, path, _, _ in server.requests)
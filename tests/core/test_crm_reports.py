@@ -0,0 +1,154 @@
+"""
+Unit Tests für die CRM Tages- und Wochenberichte
+"""
+
+import json
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+from app.domains.crm.models import Activity, Contact, Customer, VisitReport
+from app.domains.crm.services import report_data
+from app.domains.crm.services.daily_report_service import DailyReportService
+from app.domains.crm.services.weekly_report_service import WeeklyReportService
+from app.infrastructure.models import User
+
+REPORT_DAY = datetime(2025, 3, 12)  # Wednesday
+WEEK_START = datetime(2025, 3, 10)
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+@pytest.fixture
+def engine(sqlite_engine):
+    # Die Chunks laufen parallel in eigenen Sessions und brauchen echte Verbindungen
+    engine = sqlite_engine("domain_crm", "domain_shared", on_disk=True)
+    for model in (User, Customer, Contact, Activity, VisitReport):
+        model.__table__.create(engine)
+    return engine
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def _rep(db, name, roles, active=True):
+    user = User(id=str(uuid.uuid4()), username=name, email=f"{name}@example.com", first_name=name,
+                last_name="Muster", roles=json.dumps(roles), tenant_id="t1", is_active=active)
+    db.add(user)
+    return user
+
+
+def _customer(db, name):
+    customer = Customer(id=str(uuid.uuid4()), customer_number=uuid.uuid4().hex[:20], company_name=name,
+                        last_name="X", street="Hauptstr. 1", postal_code="12345", city="Berlin", tenant_id="t1")
+    contact = Contact(id=str(uuid.uuid4()), customer_id=customer.id, first_name="Eva", last_name=name,
+                      email=f"eva@{name}.de", tenant_id="t1")
+    db.add_all([customer, contact])
+    return customer, contact
+
+
+def _seed(db, reps, per_rep, day=REPORT_DAY):
+    """``per_rep`` activities and visits per rep on ``day`` (customers and contacts included)."""
+    for rep in reps:
+        for i in range(per_rep):
+            customer, contact = _customer(db, f"Kunde {rep.username} {day:%d} {i}")
+            at = day + timedelta(hours=8, minutes=10 * i)
+            db.add(Activity(id=str(uuid.uuid4()), customer_id=customer.id, contact_id=contact.id,
+                            activity_type="call" if i % 2 else "visit", subject=f"Termin {i}",
+                            activity_date=at, duration_minutes=15, assigned_to=rep.id, status="completed",
+                            next_action_description="Nachfassen", next_action_date=at + timedelta(days=3),
+                            tenant_id="t1"))
+            db.add(VisitReport(id=str(uuid.uuid4()), customer_id=customer.id, contact_person=contact.id,
+                               visit_date=at, sales_rep=rep.id, kilometers_driven=12.5,
+                               main_topics=["Dünger"], orders_placed=["A-1"], quotes_created=["Q-1", "Q-2"],
+                               customer_feedback="Sehr zufrieden", tenant_id="t1"))
+    db.commit()
+
+
+def _count_statements(engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+def test_daily_reports_run_a_fixed_number_of_queries(engine, db):
+    reps = [_rep(db, f"rep{i}", ["sales"]) for i in range(3)]
+    _rep(db, "lager", ["warehouse"])
+    _rep(db, "ehemalig", ["field_sales"], active=False)
+    _seed(db, reps, per_rep=2)
+
+    statements = _count_statements(engine)
+    small = DailyReportService(db).generate_daily_reports(REPORT_DAY)
+    small_count = len(statements)
+
+    _seed(db, reps, per_rep=40, day=REPORT_DAY + timedelta(hours=1))
+    db.expire_all()
+    statements.clear()
+    large = DailyReportService(db).generate_daily_reports(REPORT_DAY)
+
+    # Reps query plus activities, visits and two aggregates, whatever the row count
+    assert small_count == len(statements) == 5
+    assert set(small) == set(large) == {rep.id for rep in reps}
+
+    report = large[reps[0].id]["data"]
+    assert report["summary"]["total_activities"] == 42
+    assert report["summary"]["total_visits"] == 42
+    assert report["summary"]["total_time_minutes"] == 42 * 15
+    assert report["summary"]["total_kilometers"] == pytest.approx(42 * 12.5)
+    assert report["summary"]["activity_types"] == {"visit": 21, "call": 21}
+    assert report["summary"]["orders_placed"] == 42 and report["summary"]["quotes_created"] == 84
+    first = report["activities"][0]
+    assert first["customer"] == f"Kunde rep0 {REPORT_DAY:%d} 0"
+    assert first["contact"] == f"Eva Kunde rep0 {REPORT_DAY:%d} 0"
+    assert report["route"][0]["customer"] == first["customer"]
+    assert len(report["follow_ups"]) == 42
+
+
+def test_weekly_report_aggregates_in_sql(engine, db):
+    rep = _rep(db, "rep", ["field_sales"])
+    _seed(db, [rep], per_rep=3, day=WEEK_START + timedelta(days=1))
+    _seed(db, [rep], per_rep=1, day=WEEK_START + timedelta(days=3))
+    _seed(db, [rep], per_rep=2, day=WEEK_START - timedelta(days=5))  # previous week
+
+    statements = _count_statements(engine)
+    reports = WeeklyReportService(db).generate_weekly_reports(WEEK_START)
+    assert len(statements) == 8
+
+    data = reports[rep.id]["data"]
+    metrics = data["metrics"]
+    assert metrics["total_activities"] == 4 and metrics["total_visits"] == 4
+    assert metrics["unique_customers"] == 4
+    assert metrics["total_kilometers"] == pytest.approx(50)
+    assert metrics["positive_feedback_count"] == 4
+    assert metrics["conversion_rate"] == 50
+    assert data["trends"]["activities_change"] == 100
+    assert data["daily_breakdown"]["Tuesday"]["activities"] == 3
+    assert data["daily_breakdown"]["Thursday"]["time_minutes"] == 15
+    inactive = next(c for c in data["challenges"] if c["type"] == "inactive_days")
+    assert inactive["description"] == "Inaktive Tage: Monday, Wednesday, Friday"
+
+
+def test_concurrent_chunks_match_sequential_run(engine, db, monkeypatch):
+    reps = [_rep(db, f"rep{i}", ["sales"]) for i in range(7)]
+    _seed(db, reps, per_rep=3)
+    sequential = DailyReportService(db).generate_daily_reports(REPORT_DAY)
+
+    monkeypatch.setattr(report_data, "REP_CHUNK_SIZE", 2)
+    concurrent = DailyReportService(db, session_factory=sessionmaker(bind=engine)).generate_daily_reports(
+        REPORT_DAY
+    )
+
+    assert list(concurrent) == list(sequential)
+    assert {k: v["data"] for k, v in concurrent.items()} == {k: v["data"] for k, v in sequential.items()}
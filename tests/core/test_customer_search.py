@@ -0,0 +1,89 @@
+"""
+Unit Tests für die Kundensuche mit Keyset-Pagination
+"""
+
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.infrastructure.models import Customer
+from app.infrastructure.repositories.implementations import CustomerRepositoryImpl
+from app.infrastructure.repositories.search import decode_cursor, encode_cursor
+
+TENANT = "t1"
+
+
+@pytest.fixture
+def repo(sqlite_engine):
+    engine = sqlite_engine("domain_crm")
+
+    Customer.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    yield CustomerRepositoryImpl(session)
+    session.close()
+
+
+def _customer(repo, name, contact=None, tenant_id=TENANT, active=True):
+    customer = Customer(id=str(uuid.uuid4()), customer_number=uuid.uuid4().hex[:12], company_name=name,
+                        contact_person=contact, tenant_id=tenant_id, is_active=active)
+    repo.session.add(customer)
+    return customer
+
+
+def _walk(repo, **kwargs):
+    pages, cursor = [], None
+    while True:
+        page = asyncio.run(repo.search_page(TENANT, cursor=cursor, **kwargs))
+        pages.append(page)
+        cursor = page.next_cursor
+        if cursor is None:
+            return pages
+
+
+def test_keyset_pages_cover_every_customer_once(repo):
+    names = [f"Agrar Handel {i % 7}" for i in range(53)]  # duplicate names need the id tie-breaker
+    for name in names:
+        _customer(repo, name)
+    _customer(repo, "Agrar Handel 0", tenant_id="other")
+    _customer(repo, "Agrar Handel 0", active=False)
+    repo.session.commit()
+
+    pages = _walk(repo, limit=10)
+    seen = [c.id for page in pages for c in page.items]
+    assert len(pages) == 6 and len(seen) == len(set(seen)) == 53
+    assert [c.company_name for page in pages for c in page.items] == sorted(names)
+    assert pages[0].total == 53 and pages[1].total is None
+    # Offset paging returns the same order
+    offset = asyncio.run(repo.get_all(TENANT, skip=20, limit=10))
+    assert [c.id for c in offset] == [c.id for c in pages[2].items]
+
+
+def test_search_ranks_prefix_hits_and_escapes_wildcards(repo):
+    _customer(repo, "Raiffeisen Markt", contact="Eva Müller")
+    prefix = _customer(repo, "Müller Landtechnik")
+    _customer(repo, "Hof 100%", contact="Müllerin")
+    _customer(repo, "Hof 1000")
+    repo.session.commit()
+
+    page = asyncio.run(repo.search_page(TENANT, search="  MÜLLER ", limit=2))
+    assert page.items[0].id == prefix.id
+    assert page.total == 3 and page.total_is_estimate
+    rest = asyncio.run(repo.search_page(TENANT, search="müller", cursor=page.next_cursor, limit=2))
+    assert len(rest.items) == 1 and rest.next_cursor is None and rest.total is None
+    assert {c.company_name for c in page.items + rest.items} == {
+        "Raiffeisen Markt", "Müller Landtechnik", "Hof 100%"
+    }
+
+    assert [c.company_name for c in asyncio.run(repo.search_page(TENANT, search="100%")).items] == ["Hof 100%"]
+    assert asyncio.run(repo.count(TENANT, search="hof")) == 2
+    assert asyncio.run(repo.count(TENANT, search="hof", exact=False)) == 2
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    assert decode_cursor(encode_cursor(0.5, "abc"), 2) == [0.5, "abc"]
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor", 2)
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor("x"), 2)
@@ -0,0 +1,115 @@
+"""
+Unit Tests für das Document Repository (Upsert, Filter, Keyset-Pagination)
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.documents.repository import DocumentRepository
+from app.documents.router_helpers import list_from_store
+
+# SQLite-Gegenstück zur Tabelle nach Revision documents_generated_columns
+DOCUMENTS_DDL = """
+    CREATE TABLE documents (
+        id VARCHAR(36) PRIMARY KEY,
+        doc_type VARCHAR(50) NOT NULL,
+        doc_number VARCHAR(100) NOT NULL UNIQUE,
+        data JSON NOT NULL,
+        created_at TIMESTAMP,
+        updated_at TIMESTAMP,
+        customer_id TEXT GENERATED ALWAYS AS (json_extract(data, '$.customerId')) STORED,
+        supplier_id TEXT GENERATED ALWAYS AS (json_extract(data, '$.supplierId')) STORED,
+        status TEXT GENERATED ALWAYS AS (json_extract(data, '$.status')) STORED,
+        doc_date TEXT GENERATED ALWAYS AS (substr(json_extract(data, '$.date'), 1, 10)) STORED
+    )
+"""
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    with engine.begin() as conn:
+        conn.execute(text(DOCUMENTS_DDL))
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def repo(engine):
+    session = sessionmaker(bind=engine)()
+    yield DocumentRepository(session)
+    session.close()
+
+
+def _order(customer, status="open", day=1):
+    return {"customerId": customer, "status": status, "date": f"2025-03-{day:02d}T10:00:00", "total": day}
+
+
+def test_save_document_is_a_single_upsert(engine, repo):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    repo.save_document("sales_order", "SO-1", _order("K1"))
+    repo.save_document("sales_order", "SO-1", _order("K1", status="done"))
+
+    assert [s.lstrip().split()[0] for s in statements] == ["INSERT", "INSERT"]
+    doc = repo.get_document("sales_order", "SO-1")
+    assert doc["status"] == "done" and doc["number"] == "SO-1" and doc["type"] == "sales_order"
+    assert repo.count_documents("sales_order", {"status": "done"}) == 1
+    assert repo.count_documents("sales_order") == 1
+
+    # Dieselbe Nummer unter anderem Typ überschreibt nichts
+    with pytest.raises(ValueError):
+        repo.save_document("sales_invoice", "SO-1", {"customerId": "K9"})
+    assert repo.get_document("sales_order", "SO-1")["customerId"] == "K1"
+
+
+def test_keyset_pages_cover_filtered_documents_once(engine, repo):
+    for i in range(25):
+        repo.save_document("sales_order", f"SO-{i:03d}", _order(f"K{i % 2}", day=1 + i % 10))
+    repo.save_document("sales_invoice", "INV-1", _order("K0"))
+    # Gleicher Zeitstempel für mehrere Belege: id entscheidet die Reihenfolge
+    with engine.begin() as conn:
+        conn.execute(text(
+            "UPDATE documents SET created_at = (SELECT created_at FROM documents WHERE doc_number = 'SO-000') "
+            "WHERE doc_number < 'SO-005'"
+        ))
+
+    seen, cursor = [], None
+    while True:
+        docs, cursor = repo.list_page("sales_order", limit=4, filters={"customerId": "K0"}, cursor=cursor)
+        seen.extend(doc["number"] for doc in docs)
+        if cursor is None:
+            break
+    expected = [doc["number"] for doc in repo.list_documents("sales_order", limit=100, filters={"customerId": "K0"})]
+    assert seen == expected
+    assert sorted(seen) == [f"SO-{i:03d}" for i in range(0, 25, 2)]
+
+    ranged, _ = repo.list_page("sales_order", filters={"dateFrom": "2025-03-03", "dateTo": "2025-03-04"})
+    assert sorted(doc["number"] for doc in ranged) == ["SO-002", "SO-003", "SO-012", "SO-013", "SO-022", "SO-023"]
+
+    with pytest.raises(ValueError):
+        repo.list_page("sales_order", cursor="kein-cursor")
+
+
+def test_list_from_store_counts_only_first_pages(repo):
+    start = datetime(2025, 3, 1)
+    for i in range(5):
+        repo.save_document("purchase_order", f"PO-{i}", {"supplierId": "L1", "date": (start + timedelta(days=i)).isoformat()})
+
+    first = list_from_store("purchase_order", limit=2, filters={"supplierId": "L1"}, repo=repo)
+    assert first["total"] == 5 and len(first["data"]) == 2 and first["next_cursor"]
+
+    second = list_from_store("purchase_order", limit=2, filters={"supplierId": "L1"}, repo=repo,
+                             cursor=first["next_cursor"])
+    assert second["total"] is None and len(second["data"]) == 2
+
+    complete = list_from_store("purchase_order", limit=10, repo=repo)
+    assert complete["total"] == 5 and complete["next_cursor"] is None
+
+    with pytest.raises(ValueError):
+        list_from_store("purchase_order", repo=repo, cursor="kaputt")
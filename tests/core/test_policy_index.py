@@ -0,0 +1,138 @@
+"""
+Unit Tests für den kompilierten Policy-Index und den Bulk-Upsert der Policies
+"""
+
+import random
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+from app.infrastructure.models import PolicyRule
+from app.policy.engine import decide
+from app.policy.models import Alert as LegacyAlert, Rule as LegacyRule
+from app.services.policy_compiler import PolicyIndex, PolicyIndexCache
+from app.services.policy_service import Alert, PolicyEngine, PolicyStore, Rule
+
+WEDNESDAY_NOON = datetime(2025, 3, 12, 12, 0)
+SEVERITIES = ["ok", "warn", "crit"]
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+def _rule(i, kpi, severity, **extra):
+    return Rule(
+        id=f"r{i:05d}",
+        when={"kpiId": kpi, "severity": severity},
+        action="inventory.reorder",
+        params={"qty": {"warn": 10, "crit": 50}, "note": "Delta {delta}", "fixed": i},
+        **extra,
+    )
+
+
+def _linear_reference(user_roles, alert, rules, now):
+    """Bisherige lineare Entscheidung als Referenz"""
+    rule = next((r for r in rules if r.when.kpiId == alert.kpiId and alert.severity in r.when.severity), None)
+    if not rule:
+        return {"type": "deny", "reason": "No matching rule"}
+    if not PolicyEngine.within_window(rule.window, now):
+        return {"type": "deny", "reason": "Outside window"}
+    needs_approval = bool(rule.approval and rule.approval.required and not (
+        rule.approval.bypassIfSeverity and alert.severity == rule.approval.bypassIfSeverity))
+    roles = rule.approval.roles if rule.approval else None
+    return {
+        "type": "allow",
+        "execute": bool(rule.autoExecute and (not needs_approval or any(r in (roles or []) for r in user_roles))),
+        "needsApproval": needs_approval,
+        "approverRoles": roles,
+        "ruleId": rule.id,
+        "resolvedParams": PolicyEngine.resolve_params(rule, alert.severity, alert),
+    }
+
+
+def test_index_matches_linear_decisions():
+    rng = random.Random(3)
+    windows = [None, {"days": [3], "start": "08:00", "end": "17:00"}, {"days": [0, 6], "start": "00:00", "end": "23:59"}]
+    approvals = [None, {"required": True, "roles": ["manager"]},
+                 {"required": True, "roles": ["admin"], "bypassIfSeverity": "crit"}]
+    rules = [
+        _rule(i, f"kpi{rng.randrange(40)}", rng.sample(SEVERITIES, rng.randint(1, 3)),
+              window=rng.choice(windows), approval=rng.choice(approvals), autoExecute=rng.random() < 0.5)
+        for i in range(300)
+    ]
+    index = PolicyIndex(rules)
+
+    for n in range(500):
+        alert = Alert(id=str(n), kpiId=f"kpi{rng.randrange(45)}", title="t", message="m",
+                      severity=rng.choice(SEVERITIES), delta=rng.choice([None, 2.5]))
+        roles = rng.choice([[], ["manager"], ["admin", "operator"]])
+        compiled = index.decide(roles, alert.kpiId, alert.severity, alert.delta, WEDNESDAY_NOON)
+        assert compiled == _linear_reference(roles, alert, rules, WEDNESDAY_NOON)
+
+
+def test_legacy_engine_accepts_either_day_convention():
+    rule = LegacyRule(id="r1", when={"kpiId": "stock", "severity": ["warn"]}, action="sales.notify",
+                      window={"days": [2], "start": "09:00", "end": "10:30"}, autoExecute=True)
+    alert = LegacyAlert(id="a", kpiId="stock", title="t", message="m", severity="warn")
+    index = PolicyIndex([rule], either_day_convention=True)
+
+    # days=[2]: Dienstag (0=So) oder Mittwoch (0=Mo)
+    assert index.decide([], "stock", "warn", now=datetime(2025, 3, 11, 9, 0))["type"] == "allow"
+    assert index.decide([], "stock", "warn", now=datetime(2025, 3, 12, 10, 30))["type"] == "allow"
+    assert index.decide([], "stock", "warn", now=datetime(2025, 3, 12, 10, 31))["reason"] == "Outside window"
+    assert index.decide([], "stock", "warn", now=datetime(2025, 3, 13, 9, 30))["reason"] == "Outside window"
+    assert decide([], alert, [rule]).type == decide([], alert, index).type
+
+
+@pytest.fixture
+def session_factory(sqlite_engine):
+    engine = sqlite_engine("domain_shared")
+    PolicyRule.__table__.create(engine)
+    return sessionmaker(bind=engine)
+
+
+def test_bulk_upsert_is_one_statement_and_refreshes_shared_index(session_factory):
+    store = PolicyStore(session_factory)
+    statements = []
+    event.listen(session_factory.kw["bind"], "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    store.bulk_upsert([_rule(i, f"kpi{i}", ["warn"]) for i in range(250)])
+    assert [s.split()[0] for s in statements] == ["INSERT"]
+
+    index = store.index()
+    assert index is store.index() is PolicyStore(session_factory).index()
+    assert index.lookup("kpi7", "warn").rule_id == "r00007"
+
+    statements.clear()
+    store.bulk_upsert([_rule(7, "kpi7", ["crit"], autoExecute=True), _rule(999, "kpi7", ["warn"])])
+    assert len(statements) == 1
+    assert len(store.list()) == 251
+
+    refreshed = store.index()
+    assert refreshed is not index
+    assert refreshed.lookup("kpi7", "crit").rule_id == "r00007"
+    assert refreshed.lookup("kpi7", "warn").rule_id == "r00999"
+    assert index.lookup("kpi7", "warn").rule_id == "r00007"  # alter Index bleibt unverändert
+
+    store.delete("r00999")
+    assert store.index().lookup("kpi7", "warn") is None
+
+
+def test_cache_rebuilds_on_foreign_changes_after_max_age():
+    now, loads, fingerprint = [0.0], [], [1]
+    cache = PolicyIndexCache(lambda: loads.append(1) or [], lambda: fingerprint[0], max_age=10, clock=lambda: now[0])
+
+    first = cache.get()
+    now[0] = 5
+    assert cache.get() is first
+    now[0] = 11
+    assert cache.get() is first and len(loads) == 1  # Fingerprint unverändert
+    fingerprint[0] = 2
+    now[0] = 22
+    assert cache.get() is not first and len(loads) == 2
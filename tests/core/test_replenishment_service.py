@@ -0,0 +1,170 @@
+"""
+Unit Tests für die mengenbasierten Lager-Auswertungen
+"""
+
+import random
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from app.domains.inventory.application.services.article_stats import (
+    refresh_article_stats,
+    stats_refreshed_at,
+    touch_article_stats,
+)
+from app.domains.inventory.application.services.replenishment_service import ReplenishmentService
+
+TENANT = "t1"
+
+
+@pytest.fixture
+def db(sqlite_engine):
+    engine = sqlite_engine("domain_inventory")
+
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE domain_inventory.articles (id TEXT PRIMARY KEY, article_number TEXT, name TEXT, "
+            "unit TEXT, category TEXT, supplier_number TEXT, purchase_price NUMERIC, sales_price NUMERIC, "
+            "currency TEXT, min_stock NUMERIC, max_stock NUMERIC, current_stock NUMERIC, "
+            "reserved_stock NUMERIC, available_stock NUMERIC, tenant_id TEXT, is_active BOOLEAN)"
+        ))
+        conn.execute(text(
+            "CREATE TABLE domain_inventory.inventory_stock_movements (id TEXT PRIMARY KEY, article_id TEXT, "
+            "movement_type TEXT, quantity NUMERIC, unit_cost NUMERIC, total_cost NUMERIC, tenant_id TEXT, "
+            "created_at DATETIME)"
+        ))
+        conn.execute(text(
+            "CREATE TABLE domain_inventory.article_stock_stats (article_id TEXT PRIMARY KEY, tenant_id TEXT, "
+            "last_movement_at DATETIME, last_outbound_at DATETIME, outbound_qty_30d NUMERIC DEFAULT 0, "
+            "outbound_qty_90d NUMERIC DEFAULT 0, cogs_30d NUMERIC DEFAULT 0, cogs_90d NUMERIC DEFAULT 0, "
+            "movements_90d INTEGER DEFAULT 0, refreshed_at DATETIME)"
+        ))
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def _article(db, number, current, min_stock=None, max_stock=None, purchase_price=10, sales_price=20,
+             supplier="S1", tenant_id=TENANT, category="Dünger"):
+    article_id = str(uuid.uuid4())
+    db.execute(text(
+        "INSERT INTO domain_inventory.articles (id, article_number, name, unit, category, supplier_number, "
+        "purchase_price, sales_price, currency, min_stock, max_stock, current_stock, reserved_stock, "
+        "available_stock, tenant_id, is_active) VALUES (:id, :n, :n, 'kg', :c, :s, :pp, :sp, 'EUR', "
+        ":min, :max, :cur, 0, :cur, :t, 1)"
+    ), {"id": article_id, "n": number, "c": category, "s": supplier, "pp": purchase_price, "sp": sales_price,
+        "min": min_stock, "max": max_stock, "cur": current, "t": tenant_id})
+    return article_id
+
+
+def _movement(db, article_id, movement_type, quantity, days_ago, unit_cost=None, tenant_id=TENANT):
+    db.execute(text(
+        "INSERT INTO domain_inventory.inventory_stock_movements (id, article_id, movement_type, quantity, "
+        "unit_cost, total_cost, tenant_id, created_at) VALUES (:id, :a, :mt, :q, :uc, :tc, :t, :at)"
+    ), {"id": str(uuid.uuid4()), "a": article_id, "mt": movement_type, "q": quantity, "uc": unit_cost,
+        "tc": abs(quantity) * unit_cost if unit_cost is not None else None, "t": tenant_id,
+        "at": (datetime.utcnow() - timedelta(days=days_ago)).isoformat(sep=" ")})
+
+
+def test_stats_match_movement_history(db):
+    rng = random.Random(3)
+    articles = [_article(db, f"A{i:03d}", current=rng.randint(0, 500), purchase_price=rng.choice([None, 4, 9]))
+                for i in range(40)]
+    history = []
+    for article_id in articles:
+        for _ in range(rng.randint(0, 12)):
+            movement_type = rng.choice(["in", "out", "out", "adjustment"])
+            quantity = rng.randint(1, 50) * (-1 if movement_type == "out" else 1)
+            days_ago = rng.uniform(0, 200)
+            unit_cost = rng.choice([None, 3])
+            _movement(db, article_id, movement_type, quantity, days_ago, unit_cost)
+            history.append((article_id, movement_type, quantity, days_ago, unit_cost))
+    _movement(db, articles[0], "out", -5, 1, tenant_id="other")
+
+    refresh_article_stats(db, TENANT, full=True)
+    # A second, windowed refresh must not lose movements older than 90 days
+    refresh_article_stats(db, TENANT)
+
+    prices = dict(db.execute(text("SELECT id, purchase_price FROM domain_inventory.articles")).fetchall())
+    stats = {row.article_id: row for row in db.execute(text("SELECT * FROM domain_inventory.article_stock_stats"))}
+    assert set(stats) == {a for a, *_ in history}
+    for article_id in articles:
+        moves = [m for m in history if m[0] == article_id]
+        if not moves:
+            continue
+        row = stats[article_id]
+        outs = [m for m in moves if m[1] == "out"]
+        expected_30 = sum(-q for _, _, q, d, _ in outs if d <= 30)
+        expected_cogs_90 = sum(-q * (uc if uc is not None else (prices[article_id] or 0))
+                               for _, _, q, d, uc in outs if d <= 90)
+        assert Decimal(str(row.outbound_qty_30d)) == expected_30
+        assert Decimal(str(row.cogs_90d)) == pytest.approx(Decimal(str(expected_cogs_90)))
+        assert row.movements_90d == sum(1 for m in moves if m[3] <= 90)
+        newest = min(d for *_, d, _ in moves)
+        last = datetime.fromisoformat(str(row.last_movement_at))
+        assert abs((datetime.utcnow() - last) - timedelta(days=newest)) < timedelta(minutes=1)
+
+
+def test_suggestions_use_priorities_and_projected_usage(db):
+    empty = _article(db, "EMPTY", current=0, min_stock=10, max_stock=40)
+    low = _article(db, "LOW", current=4, min_stock=10)
+    below = _article(db, "BELOW", current=8, min_stock=10, purchase_price=None)
+    busy = _article(db, "BUSY", current=30, min_stock=10, max_stock=50)
+    calm = _article(db, "CALM", current=30, min_stock=10, max_stock=50)
+    _article(db, "INACTIVE", current=0, min_stock=10, tenant_id="other")
+    _movement(db, busy, "out", -60, 5)  # 2 per day over the last 30 days
+    _movement(db, calm, "out", -3, 20)
+    db.commit()
+
+    service = ReplenishmentService(db)
+    suggestions = service.get_replenishment_suggestions(TENANT, days_ahead=14)
+
+    assert [s["article_id"] for s in suggestions] == [empty, low, below, busy]
+    assert [s["priority"] for s in suggestions] == [5, 4, 3, 2]
+    assert suggestions[0]["suggested_quantity"] == 40
+    assert suggestions[1]["max_stock"] == 20 and suggestions[1]["suggested_quantity"] == 16
+    assert suggestions[2]["estimated_cost"] is None
+    assert suggestions[3]["avg_daily_usage"] == 2
+    assert suggestions[3]["days_of_cover"] == 15
+    assert suggestions[3]["deficit"] == 0
+
+    summary = service.get_replenishment_summary(TENANT, days_ahead=14)
+    assert summary["total_suggestions"] == 4
+    assert summary["priority_counts"] == {5: 1, 4: 1, 3: 1, 2: 1}
+    assert summary["estimated_total_cost"] == pytest.approx(400 + 160 + 200)
+    assert [s["article_id"] for s in service.get_replenishment_suggestions(TENANT, 14, limit=2)] == [empty, low]
+
+    # Movements processed after the refresh are folded in immediately
+    touch_article_stats(db, TENANT, calm, "out", Decimal("-597"), Decimal("0"))
+    assert [s["article_id"] for s in service.get_replenishment_suggestions(TENANT, days_ahead=14)][-1] == calm
+
+
+def test_slow_moving_and_turnover(db):
+    dormant = _article(db, "DORMANT", current=200, purchase_price=10)
+    never = _article(db, "NEVER", current=100, purchase_price=0, sales_price=30)
+    active = _article(db, "ACTIVE", current=500, purchase_price=10)
+    _article(db, "CHEAP", current=5, purchase_price=10)
+    _movement(db, dormant, "out", -10, 120, unit_cost=10)
+    _movement(db, active, "out", -20, 3, unit_cost=10)
+    _movement(db, active, "out", -10, 45)
+    db.commit()
+
+    service = ReplenishmentService(db)
+    slow = service.get_slow_moving_inventory(TENANT, days_threshold=90)
+    assert [item["article_id"] for item in slow] == [never, dormant]
+    assert slow[0]["stock_value"] == 3000 and slow[0]["days_since_last_movement"] is None
+    assert slow[1]["days_since_last_movement"] == 120
+    assert stats_refreshed_at(db, TENANT) is not None
+    assert service.get_slow_moving_summary(TENANT, 90) == {"total_items": 2, "total_value": 5000}
+    assert len(service.get_slow_moving_inventory(TENANT, 90, limit=1)) == 1
+
+    value = 200 * 10 + 500 * 10 + 5 * 10
+    report_30 = service.get_inventory_turnover_report(TENANT, 30)
+    assert report_30["total_inventory_value"] == value
+    assert report_30["total_cogs"] == 200
+    assert service.get_inventory_turnover_report(TENANT, 90)["total_cogs"] == 300
+    assert service.get_inventory_turnover_report(TENANT, 180)["total_cogs"] == 400
@@ -0,0 +1,111 @@
+"""
+Unit Tests für den Startup (Router-Manifest, Lazy Loading, Reihenfolge der Routen)
+"""
+
+import asyncio
+import sys
+import types
+
+import pytest
+from fastapi import APIRouter, FastAPI, WebSocket
+from fastapi.testclient import TestClient
+
+from app.core.startup import RouterLoader, RouterSpec
+
+
+def _module(monkeypatch, name: str, router: APIRouter) -> str:
+    module = types.ModuleType(name)
+    module.router = router
+    monkeypatch.setitem(sys.modules, name, module)
+    return name
+
+
+@pytest.fixture
+def manifest(monkeypatch):
+    probes = APIRouter()
+    probes.get("/health")(lambda: {"status": "ok"})
+    # Generische Route vor der spezifischen: die Manifest-Reihenfolge entscheidet
+    items = APIRouter(prefix="/api/items")
+    items.get("/{item_id}")(lambda item_id: {"router": "items", "item_id": item_id})
+    reports = APIRouter(prefix="/api/items")
+    reports.get("/summary")(lambda: {"router": "reports"})
+    reports.websocket("/live")(_echo)
+    return [
+        RouterSpec(_module(monkeypatch, "startup_test_probes", probes), eager=True),
+        RouterSpec(_module(monkeypatch, "startup_test_items", items), ("/api/items",)),
+        RouterSpec(_module(monkeypatch, "startup_test_reports", reports), ("/api/items",), tags=("Reports",)),
+        RouterSpec("startup_test_missing", ("/api/missing",), optional=True),
+    ]
+
+
+async def _echo(websocket: WebSocket):
+    await websocket.accept()
+    await websocket.send_text(await websocket.receive_text())
+    await websocket.close()
+
+
+def _routes(app: FastAPI):
+    return [(type(route).__name__, route.path, getattr(route, "endpoint", None)) for route in app.routes[4:]]
+
+
+def _app(manifest, *, lazy: bool) -> tuple[FastAPI, RouterLoader]:
+    app = FastAPI()
+    loader = RouterLoader(app, manifest)
+    loader.install(lazy=lazy)
+    return app, loader
+
+
+def test_lazy_routers_load_on_first_request_in_manifest_order(manifest):
+    eager, _ = _app(manifest, lazy=False)
+    app, loader = _app(manifest, lazy=True)
+    client = TestClient(app)
+
+    assert client.get("/health").json() == {"status": "ok"}
+    assert loader.pending == ["startup_test_items", "startup_test_reports", "startup_test_missing"]
+
+    # Der Websocket lädt beide Router; der Items-Router bleibt vorne, wie im Manifest
+    with client.websocket_connect("/api/items/live") as websocket:
+        websocket.send_text("ping")
+        assert websocket.receive_text() == "ping"
+    assert client.get("/api/items/summary").json() == {"router": "items", "item_id": "summary"}
+    assert loader.pending == ["startup_test_missing"]
+
+    assert client.get("/api/missing/x").status_code == 404
+    assert client.get("/api/unknown").status_code == 404
+    assert loader.pending == []
+    assert _routes(app) == _routes(eager)
+    assert set(loader.profile) == {spec.module for spec in manifest}
+
+
+def test_openapi_and_preload_load_all_routers(manifest):
+    app, loader = _app(manifest, lazy=True)
+    paths = TestClient(app).get("/openapi.json").json()["paths"]
+    assert set(paths) == {"/health", "/api/items/{item_id}", "/api/items/summary"}
+    assert loader.pending == []
+
+    app, loader = _app(manifest, lazy=True)
+    asyncio.run(loader.preload())
+    assert loader.pending == []
+    assert _routes(app) == _routes(_app(manifest, lazy=False)[0])
+
+
+def test_first_request_imports_router_off_the_event_loop(manifest):
+    app, loader = _app(manifest, lazy=True)
+    on_event_loop = []
+    import_router = loader._import
+
+    def _import(spec):
+        try:
+            asyncio.get_running_loop()
+            on_event_loop.append(True)
+        except RuntimeError:
+            on_event_loop.append(False)
+        return import_router(spec)
+
+    loader._import = _import
+    client = TestClient(app)
+    assert client.get("/api/items/1").json() == {"router": "items", "item_id": "1"}
+    assert client.get("/api/missing/x").status_code == 404
+
+    # Je Router ein Import im Worker-Thread; fehlende optionale Router werden nicht erneut importiert
+    assert on_event_loop == [False, False]
@@ -0,0 +1,194 @@
+"""
+Unit Tests für die UStVA-Steuer-Buckets
+"""
+
+import random
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from app.finance.vat_buckets import (
+    compute_positions,
+    expand_period,
+    get_buckets,
+    gl_totals,
+    load_buckets,
+)
+
+TAX_KEYS = {
+    "U19": {"rate": Decimal("19"), "ustva_position": "81", "ustva_description": "Umsätze 19%"},
+    "U7": {"rate": Decimal("7"), "ustva_position": "86", "ustva_description": "Umsätze 7%"},
+    "V19": {"rate": Decimal("19"), "ustva_position": "66", "ustva_description": "Vorsteuer 19%"},
+    "NOPOS": {"rate": Decimal("19"), "ustva_position": "", "ustva_description": ""},
+}
+
+
+@pytest.fixture
+def db(sqlite_engine):
+    engine = sqlite_engine("domain_erp")
+
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE domain_erp.journal_entries (id TEXT PRIMARY KEY, tenant_id TEXT, "
+            "period TEXT, status TEXT, document_type TEXT, created_at TIMESTAMP, updated_at TIMESTAMP)"
+        ))
+        conn.execute(text(
+            "CREATE TABLE domain_erp.journal_entry_lines (id INTEGER PRIMARY KEY, journal_entry_id TEXT, "
+            "account_id TEXT, debit_amount NUMERIC, credit_amount NUMERIC, tax_code TEXT)"
+        ))
+        conn.execute(text(
+            "CREATE TABLE domain_erp.vat_tax_buckets (tenant_id TEXT, period TEXT, tax_code TEXT, "
+            "side TEXT, doc_class TEXT, gross_amount NUMERIC, debit_total NUMERIC, credit_total NUMERIC, "
+            "line_count INTEGER, refreshed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP, "
+            "PRIMARY KEY (tenant_id, period, tax_code, side, doc_class))"
+        ))
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def _seed(db, months, entries_per_month=60):
+    rng = random.Random(7)
+    lines = []
+    for period in months:
+        for n in range(entries_per_month):
+            entry_id = f"{period}-{n}"
+            db.execute(text(
+                "INSERT INTO domain_erp.journal_entries VALUES (:id, 't1', :p, :s, :d, '2025-04-01 08:00:00', NULL)"
+            ), {
+                "id": entry_id, "p": period,
+                "s": "posted" if n % 10 else "draft",
+                "d": rng.choice(["AR_INVOICE", "AP_INVOICE", "GL"]),
+            })
+            for _ in range(3):
+                line = {
+                    "e": entry_id,
+                    "a": rng.choice(["8400", "4000", "6300", "5400", "1200"]),
+                    "dr": str(Decimal(rng.randint(0, 50000)) / 100) if rng.random() < 0.5 else "0",
+                    "cr": str(Decimal(rng.randint(0, 50000)) / 100),
+                    "t": rng.choice(["U19", "U7", "V19", "NOPOS", None]),
+                }
+                db.execute(text(
+                    "INSERT INTO domain_erp.journal_entry_lines "
+                    "(journal_entry_id, account_id, debit_amount, credit_amount, tax_code) "
+                    "VALUES (:e, :a, :dr, :cr, :t)"
+                ), line)
+                lines.append((period, n % 10 != 0, line))
+    db.commit()
+    return lines
+
+
+def _per_line_totals(lines, months):
+    """Reference: the former line-by-line computation."""
+    output_tax = input_tax = sales_net = Decimal("0")
+    for period, posted, line in lines:
+        if period not in months or not posted or line["t"] is None:
+            continue
+        key = TAX_KEYS[line["t"]]
+        if not key["ustva_position"]:
+            continue
+        debit, credit = Decimal(line["dr"]), Decimal(line["cr"])
+        divisor = Decimal("1") + key["rate"] / Decimal("100")
+        if line["a"][0] in "84":
+            amount = credit if credit > 0 else debit
+            sales_net += amount / divisor
+            output_tax += amount - amount / divisor
+        elif line["a"][0] in "65":
+            amount = debit if debit > 0 else credit
+            input_tax += amount - amount / divisor
+    return sales_net, output_tax, input_tax
+
+
+def test_expand_period():
+    assert expand_period("2025-03") == ("monthly", ["2025-03"])
+    assert expand_period("2025-Q4") == ("quarterly", ["2025-10", "2025-11", "2025-12"])
+    return_type, months = expand_period("2025")
+    assert return_type == "yearly" and len(months) == 12
+    with pytest.raises(ValueError):
+        expand_period("2025-13")
+
+
+def test_buckets_match_line_by_line_computation(db):
+    _, months = expand_period("2025-Q1")
+    lines = _seed(db, months)
+
+    result = compute_positions(get_buckets(db, "t1", months), TAX_KEYS)
+    sales_net, output_tax, input_tax = _per_line_totals(lines, months)
+
+    assert abs(result["total_sales_net"] - sales_net) < Decimal("0.01")
+    assert abs(result["total_output_tax"] - output_tax) < Decimal("0.01")
+    assert abs(result["total_input_tax"] - input_tax) < Decimal("0.01")
+    assert {p["position_code"] for p in result["positions"]} <= {"81", "86", "66"}
+
+
+def test_quarter_combines_monthly_buckets(db):
+    _, months = expand_period("2025-Q1")
+    _seed(db, months)
+
+    quarter = compute_positions(get_buckets(db, "t1", months), TAX_KEYS)
+    monthly = [compute_positions(load_buckets(db, "t1", [m]), TAX_KEYS) for m in months]
+
+    assert quarter["vat_payable"] == sum((m["vat_payable"] for m in monthly), Decimal("0"))
+    # Months without buckets are recomputed
+    db.execute(text("DELETE FROM domain_erp.vat_tax_buckets WHERE period = '2025-02'"))
+    again = compute_positions(get_buckets(db, "t1", months), TAX_KEYS)
+    assert again["vat_payable"] == quarter["vat_payable"]
+
+
+def _refreshed_at(db):
+    return dict(db.execute(text(
+        "SELECT period, MIN(refreshed_at) FROM domain_erp.vat_tax_buckets GROUP BY period"
+    )).fetchall())
+
+
+def test_only_stale_months_are_refreshed(db):
+    _, months = expand_period("2025-Q1")
+    _seed(db, months, entries_per_month=20)
+    get_buckets(db, "t1", months)
+    db.execute(text("UPDATE domain_erp.vat_tax_buckets SET refreshed_at = '2025-06-01 00:00:00'"))
+    before = compute_positions(load_buckets(db, "t1", months), TAX_KEYS)
+
+    # Nichts geändert: kein Monat wird neu berechnet
+    get_buckets(db, "t1", months)
+    assert set(_refreshed_at(db).values()) == {"2025-06-01 00:00:00"}
+
+    # Nachbuchung im Februar nach dem letzten Refresh
+    db.execute(text(
+        "INSERT INTO domain_erp.journal_entries VALUES "
+        "('late', 't1', '2025-02', 'posted', 'AR_INVOICE', '2025-07-01 09:00:00', NULL)"
+    ))
+    db.execute(text(
+        "INSERT INTO domain_erp.journal_entry_lines (journal_entry_id, account_id, debit_amount, credit_amount, "
+        "tax_code) VALUES ('late', '8400', 0, 119, 'U19')"
+    ))
+    after = compute_positions(get_buckets(db, "t1", months), TAX_KEYS)
+    refreshed = _refreshed_at(db)
+    assert refreshed["2025-01"] == refreshed["2025-03"] == "2025-06-01 00:00:00"
+    assert refreshed["2025-02"] != "2025-06-01 00:00:00"
+    assert after["total_output_tax"] - before["total_output_tax"] == Decimal("19")
+
+    # Storno (Statusänderung) macht den Monat ebenfalls veraltet; refresh=True rechnet alles neu
+    db.execute(text("UPDATE domain_erp.vat_tax_buckets SET refreshed_at = '2025-06-01 00:00:00'"))
+    db.execute(text("UPDATE domain_erp.journal_entries SET status = 'reversed', updated_at = '2025-08-01 00:00:00' "
+                    "WHERE id = 'late'"))
+    assert compute_positions(get_buckets(db, "t1", months), TAX_KEYS)["total_output_tax"] == before["total_output_tax"]
+    get_buckets(db, "t1", months, refresh=True)
+    assert "2025-06-01 00:00:00" not in _refreshed_at(db).values()
+
+
+def test_gl_totals_from_buckets(db):
+    _, months = expand_period("2025-01")
+    _seed(db, months, entries_per_month=20)
+    buckets = get_buckets(db, "t1", months)
+    gl_sales, gl_purchases = gl_totals(buckets)
+
+    rows = db.execute(text(
+        "SELECT SUM(CASE WHEN je.document_type LIKE 'AR%' THEN jel.credit_amount ELSE 0 END), "
+        "SUM(CASE WHEN je.document_type LIKE 'AP%' THEN jel.debit_amount ELSE 0 END) "
+        "FROM domain_erp.journal_entry_lines jel JOIN domain_erp.journal_entries je "
+        "ON jel.journal_entry_id = je.id WHERE je.status = 'posted' AND jel.tax_code IS NOT NULL"
+    )).one()
+    assert abs(gl_sales - Decimal(str(rows[0]))) < Decimal("0.01")
+    assert abs(gl_purchases - Decimal(str(rows[1]))) < Decimal("0.01")
@@ -0,0 +1,122 @@
+"""
+Lokaler Fixture-Server mit aufgezeichneten Shop-Seiten (Crawler-Tests und Benchmark)
+
+Pfade:
+    /robots.txt                  sperrt /intern/
+    /produkt/<seite>[/<n>]       competitor_shops/<seite>.html (gleicher Inhalt für jedes n)
+    /bilder/<datei>              competitor_shops/<datei>
+
+Antworten tragen ETag und Last-Modified und beantworten bedingte GETs mit
+304 (abschaltbar mit ``validators=False``). ``latency`` verzögert jede Antwort
+(entfernter Shop). Der Server protokolliert Requests (Host, Pfad, Status,
+Ankunftszeit) und die höchste Zahl gleichzeitiger Requests je Host-Header.
+"""
+
+import hashlib
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+PAGES = Path(__file__).parent / "competitor_shops"
+ROBOTS = b"User-agent: *\nDisallow: /intern/\n"
+LAST_MODIFIED = formatdate(1767225600, usegmt=True)  # 2026-01-01
+
+
+class FixtureShopServer:
+    """Startet einen HTTP-Server auf 127.0.0.1 (freier Port) in einem Daemon-Thread"""
+
+    def __init__(self, latency: float = 0.0, validators: bool = True) -> None:
+        self.latency = latency
+        self.validators = validators
+        self.overrides: Dict[str, bytes] = {}
+        self.requests: List[Tuple[str, str, int, float]] = []
+        self.max_in_flight: Dict[str, int] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def url(self, path: str, host: str = "127.0.0.1") -> str:
+        return f"http://{host}:{self.port}{path}"
+
+    def __enter__(self) -> "FixtureShopServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def body(self, path: str) -> Optional[bytes]:
+        if path in self.overrides:
+            return self.overrides[path]
+        if path == "/robots.txt":
+            return ROBOTS
+        parts = path.strip("/").split("/")
+        if len(parts) in (2, 3) and parts[0] == "produkt":
+            file = PAGES / f"{parts[1]}.html"
+        elif len(parts) == 2 and parts[0] == "bilder":
+            file = PAGES / parts[1]
+        else:
+            return None
+        return file.read_bytes() if file.is_file() else None
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                host = self.headers.get("Host", "")
+                started = time.monotonic()
+                with server._lock:
+                    server._in_flight[host] = server._in_flight.get(host, 0) + 1
+                    server.max_in_flight[host] = max(server.max_in_flight.get(host, 0), server._in_flight[host])
+                try:
+                    if server.latency:
+                        time.sleep(server.latency)
+                    status, headers, body = self._response(self.path.split("?")[0])
+                finally:
+                    # Vor dem Senden austragen: danach kann der Client schon den nächsten Request stellen
+                    with server._lock:
+                        server._in_flight[host] -= 1
+                        server.requests.append((host, self.path, status, started))
+                if status == 404:
+                    self.send_error(404)
+                    return
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                if body:
+                    self.wfile.write(body)
+
+            def _response(self, path: str) -> Tuple[int, Dict[str, str], bytes]:
+                body = server.body(path)
+                if body is None:
+                    return 404, {}, b""
+                etag = '"%s"' % hashlib.sha1(body).hexdigest()
+                # If-None-Match hat Vorrang vor If-Modified-Since (RFC 9110)
+                match = self.headers.get("If-None-Match")
+                unchanged = match == etag if match is not None else self.headers.get("If-Modified-Since") == LAST_MODIFIED
+                if server.validators and unchanged:
+                    return 304, {"ETag": etag}, b""
+                headers = {
+                    "Content-Type": "image/png" if path.endswith(".png") else "text/html; charset=utf-8",
+                    "Content-Length": str(len(body)),
+                }
+                if server.validators:
+                    headers.update({"ETag": etag, "Last-Modified": LAST_MODIFIED})
+                return 200, headers, body
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
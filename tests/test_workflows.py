@@ -71,3 +71,84 @@ def test_bestellvorschlag_workflow_build():
     # Workflow compiled successfully
     assert callable(workflow)
 
+
+
+@pytest.fixture
+def inventory_repositories(tmp_path, monkeypatch):
+    """File-backed SQLite inventory tables wired into the container (one session per resolve)."""
+    from sqlalchemy import create_engine, event
+    from sqlalchemy.orm import sessionmaker
+
+    from app.agents.workflows import bestellvorschlag
+    from app.core.dependency_container import container
+    from app.infrastructure.models import Article, StockMovement
+    from app.infrastructure.repositories import ArticleRepository, StockMovementRepository
+    from app.infrastructure.repositories.implementations import ArticleRepositoryImpl, StockMovementRepositoryImpl
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'main.db'}")
+
+    @event.listens_for(engine, "connect")
+    def _attach(dbapi_conn, _):
+        dbapi_conn.execute(f"ATTACH DATABASE '{tmp_path / 'inventory.db'}' AS domain_inventory")
+
+    Article.__table__.create(engine)
+    StockMovement.__table__.create(engine)
+    Session = sessionmaker(bind=engine)
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, sql, *args: statements.append(sql))
+
+    saved = dict(container._factories)
+    container.register_factory(ArticleRepository, lambda: ArticleRepositoryImpl(Session()))
+    container.register_factory(StockMovementRepository, lambda: StockMovementRepositoryImpl(Session()))
+    monkeypatch.setattr(bestellvorschlag, "ARTICLE_PAGE_SIZE", 7)
+    monkeypatch.setattr(bestellvorschlag, "HISTORY_CHUNK_SIZE", 5)
+    yield Session, statements
+    container._factories.clear()
+    container._factories.update(saved)
+    engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_bestellvorschlag_batches_data_access(inventory_repositories):
+    """All low stock articles are found and their history is loaded per chunk, not per article."""
+    from app.agents.workflows.bestellvorschlag import analyze_stock_levels, check_sales_history
+    from app.infrastructure.models import Article, StockMovement
+
+    Session, statements = inventory_repositories
+    now = datetime.utcnow()
+    with Session() as db:
+        for i in range(30):
+            db.add(Article(
+                id=f"art-{i:02d}", article_number=f"A{i}", name=f"Artikel {i}", unit="kg", category="Dünger",
+                sales_price=Decimal("5"), purchase_price=Decimal("3"), tenant_id="t1", is_active=True,
+                min_stock=Decimal("10") if i % 3 else None, current_stock=Decimal(i % 15),
+            ))
+            for month in range(4):
+                db.add(StockMovement(
+                    article_id=f"art-{i:02d}", warehouse_id="w1", movement_type="out",
+                    quantity=Decimal(-(month + 1) * 10 if i % 2 else -10), previous_stock=0, new_stock=0,
+                    tenant_id="t1", created_at=now - timedelta(days=31 * month + 1),
+                ))
+            db.add(StockMovement(
+                article_id=f"art-{i:02d}", warehouse_id="w1", movement_type="in", quantity=Decimal(50),
+                previous_stock=0, new_stock=0, tenant_id="t1", created_at=now - timedelta(days=2),
+            ))
+        db.commit()
+
+    state = {"tenant_id": "t1", "low_stock_articles": [], "sales_history": []}
+    statements.clear()
+    state = await analyze_stock_levels(state)
+    expected = [f"art-{i:02d}" for i in range(30) if i % 3 and i % 15 < 10]
+    assert [a["article_id"] for a in state["low_stock_articles"]] == expected
+    assert len(statements) == 2  # two keyset pages of 7
+
+    statements.clear()
+    state = await check_sales_history(state)
+    assert len(statements) == 3  # one aggregate per chunk of 5
+    assert [h["article_id"] for h in state["sales_history"]] == expected
+    by_id = {h["article_id"]: h for h in state["sales_history"]}
+    assert by_id["art-01"]["trend"] == "decreasing"
+    assert by_id["art-01"]["avg_monthly_sales"] == 25
+    assert by_id["art-02"]["trend"] == "stable"
+    assert by_id["art-02"]["total_movements"] == 5